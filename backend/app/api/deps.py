@@ -14,7 +14,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import decode_token
 from app.db.session import get_db
 from app.models.user import User
-from app.repositories.user import UserRepository
 
 
 # OAuth2 scheme for Bearer token authentication
@@ -32,6 +31,8 @@ async def get_current_user(
     Dependency to get the current authenticated user.
 
     Validates the JWT token and returns the corresponding user.
+    The user comes from the cached access snapshot when it is fresh
+    (no query), see ``app.services.access_snapshot``.
 
     Args:
         token: JWT access token from Authorization header
@@ -59,9 +60,10 @@ async def get_current_user(
     except ValueError:
         raise credentials_exception
 
-    # Get user from database
-    user_repo = UserRepository(db)
-    user = await user_repo.get_by_id(user_id)
+    # Get user from the access snapshot (or the database on a miss)
+    from app.services.access_snapshot import load_user
+
+    user = await load_user(db, user_id)
 
     if user is None:
         raise credentials_exception
@@ -82,28 +82,18 @@ async def mark_paid(
     )
     await db.flush()
 
-    # Sync vers QB en background : si l'Achat a un qbo_bill_id, on
+    # Sync vers QB en file de travaux : si l'Achat a un qbo_bill_id, on
     # cree la BillPayment correspondante pour que le Bill QB passe
-    # aussi en paye cote comptable. Fire-and-forget : on n'attend pas
-    # la reponse QB pour repondre au frontend (la modal reste rapide).
+    # aussi en paye cote comptable. On n'attend pas la reponse QB pour
+    # repondre au frontend (la modal reste rapide) ; le travail part au
+    # commit de la requete et est repris avec backoff si QB echoue.
     # Action DÉLIBÉRÉE sur UN achat (« marquer payé ») → push direct, PAS
     # conditionné à l'interrupteur de migration. Idempotent
     # (qbo_bill_payment_id).
     if achat.qbo_bill_id:
-        import asyncio
+        from app.services.qbo_jobs import enqueue_bill_payment
 
-        from app.db.session import AsyncSessionLocal
-        from app.services.achat_qbo import push_bill_payment_to_qbo
-
-        async def _push_async(achat_id: int) -> None:
-            async with AsyncSessionLocal() as fresh_db:
-                try:
-                    await push_bill_payment_to_qbo(fresh_db, achat_id)
-                    await fresh_db.commit()
-                except Exception:
-                    await fresh_db.rollback()
-
-        asyncio.create_task(_push_async(int(achat.id)))
+        await enqueue_bill_payment(db, int(achat.id))
 
     return AchatPaymentRead.model_validate(achat)
 
@@ -41,6 +41,7 @@ from sqlalchemy import select
 
 from app.api.api_key_deps import ApiKeyContext
 from app.api.deps import DBSession
+from app.core.responses import FastJSONResponse
 from app.models.audit_log import AuditLog
 from app.models.devlog_project_task import DevlogProjectTask
 from app.models.devlog_project import DevlogProject
@@ -55,6 +56,7 @@ from app.models.sales_task import SalesTask, sales_task_assignees
 from app.models.user import User
 from app.services.api_capabilities import POLE_LABELS, readable_poles
 from app.services.audit import log_action
+from app.services.entity_loader import BatchLoader
 from app.services.entity_serializers import serialize_entity
 
 # Modèles supplémentaires chargés UNIQUEMENT pour la lecture détaillée
@@ -153,6 +155,10 @@ class AuditActivity(BaseModel):
     entity_id: Optional[int]
     timestamp: datetime
     summary: str
+    # Résumé de l'entité visée (même forme que ``TaskActivity.entity``)
+    # quand son type est connu des sérialiseurs et son pôle lisible.
+    # None sinon (entité supprimée, type non géré).
+    entity: Optional[dict] = None
 
 
 class ActivityResponse(BaseModel):
@@ -348,12 +354,22 @@ async def _collect_tasks(
     start: datetime,
     end: datetime,
     allowed_poles: Optional[set[str]] = None,
+    loader: Optional[BatchLoader] = None,
 ) -> List[TaskActivity]:
     """Collecte les tâches de l'utilisateur sur la période. Si
     ``allowed_poles`` est fourni (set de slugs du catalogue), on ne
     collecte QUE les modèles dont le slug est autorisé. None = tous
-    (rétrocompat / usage interne sans filtrage)."""
+    (rétrocompat / usage interne sans filtrage).
+
+    Une requête par modèle de tâche ; les assignés sont ensuite chargés
+    en un lot via ``loader`` (partagé avec ``_collect_audit`` par
+    l'appelant) avant la sérialisation — coût fixe quelle que soit la
+    longueur de la période."""
     out: List[TaskActivity] = []
+    # Objet ORM de chaque entrée de ``out`` (même ordre), sérialisé à la fin.
+    objs: List[Any] = []
+    loader = loader or BatchLoader(db)
+    loader.prime("user", [user])
     employe_ids = await _employe_ids_for_user(db, user)
 
     def _allowed(internal_pole: str) -> bool:
@@ -383,7 +399,6 @@ async def _collect_tasks(
                         pole="devlog",
                         entity_type="devlog_project_task",
                         entity_id=t.id,
-                        entity=serialize_entity("devlog_project_task", t),
                         title=t.title,
                         status=t.status,
                         is_completed=is_done,
@@ -393,6 +408,7 @@ async def _collect_tasks(
                         reasons=reasons,
                     )
                 )
+                objs.append(t)
 
     # ── Entreprise (assignee_user_id ; status « done » ; completed_at). ──
     if _allowed("entreprise"):
@@ -415,7 +431,6 @@ async def _collect_tasks(
                         pole="entreprise",
                         entity_type="entreprise_tache",
                         entity_id=t.id,
-                        entity=serialize_entity("entreprise_tache", t),
                         title=t.title,
                         status=t.status,
                         is_completed=is_done,
@@ -425,6 +440,7 @@ async def _collect_tasks(
                         reasons=reasons,
                     )
                 )
+                objs.append(t)
 
     # ── Prospection (assignee_user_id ; status « done » ; pas de
     #    completed_at → updated_at comme proxy). ──
@@ -448,7 +464,6 @@ async def _collect_tasks(
                         pole="prospection",
                         entity_type="prospection_deal_task",
                         entity_id=t.id,
-                        entity=serialize_entity("prospection_deal_task", t),
                         title=t.name,
                         status=t.status,
                         is_completed=is_done,
@@ -458,6 +473,7 @@ async def _collect_tasks(
                         reasons=reasons,
                     )
                 )
+                objs.append(t)
 
     # ── Sales (assignation via employes ; done/done_at). → prospection ──
     if employe_ids and _allowed("sales"):
@@ -485,7 +501,6 @@ async def _collect_tasks(
                         pole="sales",
                         entity_type="sales_task",
                         entity_id=t.id,
-                        entity=serialize_entity("sales_task", t),
                         title=t.title,
                         status="done" if t.done else "open",
                         is_completed=t.done,
@@ -495,6 +510,7 @@ async def _collect_tasks(
                         reasons=reasons,
                     )
                 )
+                objs.append(t)
 
     # ── Project (assignee_id via employes ; done/done_at). → construction ──
     if employe_ids and _allowed("project"):
@@ -516,7 +532,6 @@ async def _collect_tasks(
                         pole="project",
                         entity_type="project_task",
                         entity_id=t.id,
-                        entity=serialize_entity("project_task", t),
                         title=t.title,
                         status="done" if t.done else "open",
                         is_completed=t.done,
@@ -526,6 +541,17 @@ async def _collect_tasks(
                         reasons=reasons,
                     )
                 )
+                objs.append(t)
+
+    # Enrichissement groupé : assignés (User) en une requête, puis
+    # sérialisation sans I/O.
+    loader.want("user", (getattr(t, "assignee_user_id", None) for t in objs))
+    await loader.load()
+    for ta, t in zip(out, objs):
+        uid = getattr(t, "assignee_user_id", None)
+        if uid is not None:
+            t.assignee = loader.get("user", uid)
+        ta.entity = serialize_entity(ta.entity_type, t)
 
     # Tri : les plus récents d'abord (par date d'événement la plus parlante).
     def _sort_key(ta: TaskActivity) -> datetime:
@@ -565,7 +591,11 @@ async def _collect_audit(
     start: datetime,
     end: datetime,
     allowed_poles: Optional[set[str]] = None,
+    loader: Optional[BatchLoader] = None,
 ) -> List[AuditActivity]:
+    """Journal d'audit de l'utilisateur sur la période. Les entités visées
+    sont chargées en un lot par type (``loader``) pour le résumé
+    ``entity``."""
     stmt = (
         select(AuditLog)
         .where(
@@ -597,9 +627,36 @@ async def _collect_audit(
                 summary=_humanize_audit(e),
             )
         )
+
+    loader = loader or BatchLoader(db)
+    targets = [
+        a for a in out
+        if a.entity_id is not None
+        and _audit_entity_pole(a.entity_type, allowed_poles) is not None
+    ]
+    for a in targets:
+        loader.want(a.entity_type, [a.entity_id])
+    await loader.load()
+    for a in targets:
+        obj = loader.get(a.entity_type, a.entity_id)
+        if obj is not None:
+            a.entity = serialize_entity(a.entity_type, obj)
     return out
 
 
+def _audit_entity_pole(
+    entity_type: Optional[str], allowed_poles: Optional[set[str]]
+) -> Optional[str]:
+    """Pôle d'un ``entity_type`` d'audit enrichissable (types de lecture
+    détail), ou None s'il n'est pas géré ou pas lisible par la clé."""
+    for _, pole, ser_type, _ in _DETAIL_ENTITIES.values():
+        if ser_type == entity_type:
+            if allowed_poles is not None and pole not in allowed_poles:
+                return None
+            return pole
+    return None
+
+
 # ── Résumé en langage naturel ──────────────────────────────────────
 
 _POLE_LABELS = {
@@ -1300,8 +1357,13 @@ async def my_activity(
     start, end = _resolve_window(date, date_from, date_to)
     single_day = (end - start) <= timedelta(days=1)
 
-    tasks = await _collect_tasks(db, user, start, end, allowed_poles=poles)
-    audit = await _collect_audit(db, user, start, end, allowed_poles=poles)
+    loader = BatchLoader(db)
+    tasks = await _collect_tasks(
+        db, user, start, end, allowed_poles=poles, loader=loader
+    )
+    audit = await _collect_audit(
+        db, user, start, end, allowed_poles=poles, loader=loader
+    )
     summary = _build_summary(tasks, audit, start, end, single_day)
 
     return ActivityResponse(
@@ -1333,8 +1395,13 @@ async def my_activity_summary(
     start, end = _resolve_window(date, date_from, date_to)
     single_day = (end - start) <= timedelta(days=1)
 
-    tasks = await _collect_tasks(db, user, start, end, allowed_poles=poles)
-    audit = await _collect_audit(db, user, start, end, allowed_poles=poles)
+    loader = BatchLoader(db)
+    tasks = await _collect_tasks(
+        db, user, start, end, allowed_poles=poles, loader=loader
+    )
+    audit = await _collect_audit(
+        db, user, start, end, allowed_poles=poles, loader=loader
+    )
     summary = _build_summary(tasks, audit, start, end, single_day)
 
     return SummaryResponse(
@@ -1597,50 +1664,102 @@ def _can_read_entity(ctx, pole: str, detail_cap: str) -> bool:
     return ctx.has_scope(detail_cap) or ctx.has_scope(f"{pole}:activity:read")
 
 
-async def _enrich_soumission(db, obj: DevlogSoumission) -> None:
+async def _enrich_soumissions(
+    loader: BatchLoader, objs: List[DevlogSoumission]
+) -> None:
     """Précharge (best-effort, sans casser) lead/client/modules/items sur
-    une soumission devlog pour que le serializer « full » les expose. Les
-    attributs sont posés en clair sur l'instance (pas des relations ORM)."""
+    des soumissions devlog pour que le serializer « full » les expose. Les
+    attributs sont posés en clair sur l'instance (pas des relations ORM).
+    Une requête par type pour tout le lot."""
     try:
-        if getattr(obj, "lead_id", None) is not None:
-            obj.lead = await db.get(DevlogLead, obj.lead_id)
-        if getattr(obj, "client_id", None) is not None:
-            obj.client = await db.get(DevlogClient, obj.client_id)
-        mods = (
-            await db.execute(
-                select(DevlogSoumissionModule)
-                .where(DevlogSoumissionModule.soumission_id == obj.id)
-                .order_by(DevlogSoumissionModule.position)
-            )
-        ).scalars().all()
-        obj.modules = list(mods)
-        items = (
-            await db.execute(
-                select(DevlogSoumissionItem)
-                .where(DevlogSoumissionItem.soumission_id == obj.id)
-                .order_by(DevlogSoumissionItem.position)
-            )
-        ).scalars().all()
-        obj.items = list(items)
+        loader.want("devlog_lead", (o.lead_id for o in objs))
+        loader.want("devlog_client", (o.client_id for o in objs))
+        await loader.load()
+        ids = [o.id for o in objs]
+        mods = await loader.children("devlog_soumission_module", ids)
+        items = await loader.children("devlog_soumission_item", ids)
+        for obj in objs:
+            if obj.lead_id is not None:
+                obj.lead = loader.get("devlog_lead", obj.lead_id)
+            if obj.client_id is not None:
+                obj.client = loader.get("devlog_client", obj.client_id)
+            obj.modules = list(mods[obj.id])
+            obj.items = list(items[obj.id])
     except Exception:
         # L'enrichissement est best-effort : le détail de base reste servi.
         pass
 
 
-async def _enrich_entreprise(db, obj: Entreprise) -> None:
-    """Précharge les partenaires d'une entreprise (best-effort)."""
+async def _enrich_entreprises(
+    loader: BatchLoader, objs: List[Entreprise]
+) -> None:
+    """Précharge les partenaires des entreprises (best-effort, une requête)."""
     try:
-        partners = (
-            await db.execute(
-                select(EntreprisePartner)
-                .where(EntreprisePartner.entreprise_id == obj.id)
-            )
-        ).scalars().all()
-        obj.partners = list(partners)
+        partners = await loader.children(
+            "entreprise_partner", [o.id for o in objs]
+        )
+        for obj in objs:
+            obj.partners = list(partners[obj.id])
     except Exception:
         pass
 
 
+async def load_entities_full(
+    db,
+    ctx,
+    refs: List[tuple[str, int]],
+    loader: Optional[BatchLoader] = None,
+) -> List[Any]:
+    """Version groupée de ``load_entity_full`` : pour chaque ``(type, id)``
+    de ``refs``, le JSON « full » OU l'exception qu'aurait levée
+    ``load_entity_full`` (ValueError / PermissionError / LookupError),
+    dans l'ordre. Les entités et leurs dépendances sont chargées en une
+    requête par type, quel que soit le nombre de refs."""
+    loader = loader or BatchLoader(db)
+    resolved: List[Any] = []
+    for entity_type, entity_id in refs:
+        spec = _DETAIL_ENTITIES.get(entity_type)
+        if spec is None:
+            resolved.append(ValueError("unknown"))
+            continue
+        _, pole, ser_type, detail_cap = spec
+        if not _can_read_entity(ctx, pole, detail_cap):
+            resolved.append(
+                PermissionError(
+                    f"Lecture du détail non autorisée pour le pôle "
+                    f"« {POLE_LABELS.get(pole, pole)} » sur cette clé d'API."
+                )
+            )
+            continue
+        loader.want(ser_type, [entity_id])
+        resolved.append((ser_type, entity_id))
+    await loader.load()
+
+    found: dict[str, list] = {}
+    for r in resolved:
+        if isinstance(r, tuple):
+            obj = loader.get(*r)
+            if obj is not None and obj not in found.setdefault(r[0], []):
+                found[r[0]].append(obj)
+    # Préchargement spécifique selon le type (best-effort).
+    if found.get("devlog_soumission"):
+        await _enrich_soumissions(loader, found["devlog_soumission"])
+    if found.get("entreprise"):
+        await _enrich_entreprises(loader, found["entreprise"])
+
+    out: List[Any] = []
+    for (entity_type, entity_id), r in zip(refs, resolved):
+        if not isinstance(r, tuple):
+            out.append(r)
+            continue
+        obj = loader.get(*r)
+        if obj is None:
+            out.append(LookupError(f"{entity_type} #{entity_id} introuvable."))
+        else:
+            out.append(serialize_entity(r[0], obj, level="full"))
+    return out
+
+
 async def load_entity_full(
     db,
     ctx,
@@ -1655,28 +1774,10 @@ async def load_entity_full(
       - PermissionError(message) si la clé n'a pas le scope requis ;
       - LookupError(message) si l'entité est introuvable.
     """
-    spec = _DETAIL_ENTITIES.get(entity_type)
-    if spec is None:
-        raise ValueError("unknown")
-    model, pole, ser_type, detail_cap = spec
-
-    if not _can_read_entity(ctx, pole, detail_cap):
-        raise PermissionError(
-            f"Lecture du détail non autorisée pour le pôle "
-            f"« {POLE_LABELS.get(pole, pole)} » sur cette clé d'API."
-        )
-
-    obj = await db.get(model, entity_id)
-    if obj is None:
-        raise LookupError(f"{entity_type} #{entity_id} introuvable.")
-
-    # Préchargement spécifique selon le type (best-effort).
-    if ser_type == "devlog_soumission":
-        await _enrich_soumission(db, obj)
-    elif ser_type == "entreprise":
-        await _enrich_entreprise(db, obj)
-
-    return serialize_entity(ser_type, obj, level="full")
+    (result,) = await load_entities_full(db, ctx, [(entity_type, entity_id)])
+    if isinstance(result, Exception):
+        raise result
+    return result
 
 
 @router.get(
@@ -1702,7 +1803,9 @@ async def get_entity_detail(
     404 si le type est inconnu ou l'entité introuvable ; 403 si la clé n'a
     pas le scope de lecture du pôle correspondant."""
     try:
-        return await load_entity_full(db, ctx, entity_type, entity_id)
+        return FastJSONResponse(
+            await load_entity_full(db, ctx, entity_type, entity_id)
+        )
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1727,7 +1830,9 @@ async def get_soumission_detail(
     entity_id: int = Path(..., description="Id de la soumission devlog."),
 ) -> dict:
     try:
-        return await load_entity_full(db, ctx, "devlog_soumission", entity_id)
+        return FastJSONResponse(
+            await load_entity_full(db, ctx, "devlog_soumission", entity_id)
+        )
     except PermissionError as exc:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
     except LookupError as exc:
@@ -1743,7 +1848,9 @@ async def get_deal_detail(
     entity_id: int = Path(..., description="Id du deal de prospection."),
 ) -> dict:
     try:
-        return await load_entity_full(db, ctx, "prospection_deal", entity_id)
+        return FastJSONResponse(
+            await load_entity_full(db, ctx, "prospection_deal", entity_id)
+        )
     except PermissionError as exc:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
     except LookupError as exc:
@@ -1759,7 +1866,9 @@ async def get_entreprise_detail(
     entity_id: int = Path(..., description="Id de l'entreprise."),
 ) -> dict:
     try:
-        return await load_entity_full(db, ctx, "entreprise", entity_id)
+        return FastJSONResponse(
+            await load_entity_full(db, ctx, "entreprise", entity_id)
+        )
     except PermissionError as exc:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
     except LookupError as exc:
@@ -1777,7 +1886,9 @@ async def get_lead_analysis_detail(
     """Renvoie le JSON « full » d'une analyse de lead (fiche d'analyse
     financière) du pôle Prospection. Respecte le scope de pôle."""
     try:
-        return await load_entity_full(db, ctx, "lead_analysis", entity_id)
+        return FastJSONResponse(
+            await load_entity_full(db, ctx, "lead_analysis", entity_id)
+        )
     except PermissionError as exc:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(exc))
     except LookupError as exc:
@@ -2056,4 +2167,4 @@ async def list_entities_endpoint(
             "list_entities %s tronquée (limit=%s offset=%s) pour clé API",
             list_type, result.get("limit"), result.get("offset"),
         )
-    return result
\ No newline at end of file
+    return FastJSONResponse(result)
\ No newline at end of file
@@ -13,7 +13,7 @@ import os
 import tempfile
 import uuid
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Literal, Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -1582,3 +1582,26 @@ async def force_init_db(_: RequireOwner) -> dict:
             500, f"init_db a échoué : {exc}"
         ) from exc
     return {"ok": True}
+
+
+@router.post(
+    "/dedupe/rebuild",
+    summary="Reconstruit l'index de déduplication (achats ou factures) "
+    "depuis toute la table et supprime les doublons trouvés.",
+)
+async def rebuild_dedupe_index(
+    db: DBSession,
+    _: RequireOwner,
+    scope: Literal["achats", "factures"] = "achats",
+) -> dict:
+    """Les passes automatiques (fin de synchro QB, cron) sont
+    incrémentales ; ici on repart de zéro — après une correction en masse
+    faite en SQL, par exemple (``updated_at`` non touché)."""
+    if scope == "achats":
+        from app.services.achat_dedupe import dedupe_achats as dedupe
+    else:
+        from app.services.facture_dedupe import dedupe_factures as dedupe
+
+    removed = await dedupe(db, full=True)
+    await db.commit()
+    return {"scope": scope, "deduped": removed}
@@ -313,6 +313,7 @@ async def confirmer_action(
             "apercu": action.apercu,
             "via": f"par Kratos IA au nom de {user.display_name}",
         },
+        transactional=True,
     )
     await db.commit()
     await db.refresh(action)
@@ -1,15 +1,21 @@
 """
 Read-only public endpoints for the blog/SEO articles.
+
+Responses are rendered once and served from ``app.services.blog_cache``
+(ETag / Last-Modified / ``304``, ``Cache-Control: s-maxage``) until the
+blog changes.
 """
 
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException, Query, status
-from pydantic import BaseModel, ConfigDict
-from sqlalchemy import select
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sqlalchemy import and_, case, func, literal, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import DBSession
 from app.models.seo_article import SeoArticle
+from app.services.blog_cache import cached_response
 
 
 router = APIRouter(prefix="/blog", tags=["blog"])
@@ -34,18 +40,55 @@ class ArticleFull(ArticleSummary):
     keywords: Optional[str] = None
 
 
+class ArticleSearchHit(ArticleSummary):
+    rank: float
+
+
+_SUMMARIES = TypeAdapter(List[ArticleSummary])
+
+
+def _summary(r: SeoArticle) -> ArticleSummary:
+    return ArticleSummary(
+        id=r.id,
+        slug=r.slug,
+        locale=r.locale,
+        title=r.title,
+        excerpt=r.excerpt,
+        target_city=r.target_city,
+        target_service=r.target_service,
+        published_at=r.published_at.isoformat() if r.published_at else None,
+    )
+
+
 @router.get(
     "",
     response_model=List[ArticleSummary],
     summary="List public SEO articles",
 )
 async def list_articles(
+    request: Request,
     db: DBSession,
     locale: str = Query(default="fr", pattern="^(fr|en)$"),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
     service: Optional[str] = Query(default=None, max_length=64),
     city: Optional[str] = Query(default=None, max_length=120),
+) -> Response:
+    async def _render() -> bytes:
+        return _SUMMARIES.dump_json(
+            await _list(db, locale, skip, limit, service, city)
+        )
+
+    return await cached_response(request, db, _render)
+
+
+async def _list(
+    db: AsyncSession,
+    locale: str,
+    skip: int,
+    limit: int,
+    service: Optional[str],
+    city: Optional[str],
 ) -> List[ArticleSummary]:
     stmt = (
         select(SeoArticle)
@@ -67,19 +110,7 @@ async def list_articles(
         .limit(limit)
     )
     rows = (await db.execute(stmt)).scalars().all()
-    return [
-        ArticleSummary(
-            id=r.id,
-            slug=r.slug,
-            locale=r.locale,
-            title=r.title,
-            excerpt=r.excerpt,
-            target_city=r.target_city,
-            target_service=r.target_service,
-            published_at=r.published_at.isoformat() if r.published_at else None,
-        )
-        for r in rows
-    ]
+    return [_summary(r) for r in rows]
 
 
 class ArticleSitemapEntry(BaseModel):
@@ -88,15 +119,25 @@ class ArticleSitemapEntry(BaseModel):
     published_at: Optional[str] = None
 
 
+_SITEMAP = TypeAdapter(List[ArticleSitemapEntry])
+
+
 @router.get(
     "/sitemap",
     response_model=List[ArticleSitemapEntry],
     summary="All published article slugs for the XML sitemap",
 )
-async def sitemap_articles(db: DBSession) -> List[ArticleSitemapEntry]:
+async def sitemap_articles(request: Request, db: DBSession) -> Response:
     # Charge léger (slug + locale + date) de TOUS les articles publiés,
     # toutes locales. Consommé par frontend/src/app/sitemap.ts pour que
     # chaque /blog/{slug} soit découvrable par Google.
+    async def _render() -> bytes:
+        return _SITEMAP.dump_json(await _sitemap(db))
+
+    return await cached_response(request, db, _render)
+
+
+async def _sitemap(db: AsyncSession) -> List[ArticleSitemapEntry]:
     stmt = (
         select(
             SeoArticle.slug, SeoArticle.locale, SeoArticle.published_at
@@ -115,28 +156,115 @@ async def sitemap_articles(db: DBSession) -> List[ArticleSitemapEntry]:
     ]
 
 
+@router.get(
+    "/search",
+    response_model=List[ArticleSearchHit],
+    summary="Full-text search over published articles (ranked)",
+)
+async def search_articles(
+    request: Request,
+    db: DBSession,
+    q: str = Query(..., min_length=2, max_length=200),
+    locale: str = Query(default="fr", pattern="^(fr|en)$"),
+    limit: int = Query(default=20, ge=1, le=50),
+) -> Response:
+    async def _render() -> bytes:
+        return _HITS.dump_json(await _search(db, q, locale, limit))
+
+    return await cached_response(request, db, _render)
+
+
+_HITS = TypeAdapter(List[ArticleSearchHit])
+# Configuration tsvector par locale. Les index GIN partiels de init_db
+# (ix_seo_articles_fts_*) portent EXACTEMENT l'expression de
+# ``_fts_document`` : la modifier ici = la modifier là-bas.
+_FTS_CONFIG = {"fr": "french", "en": "english"}
+
+
+def _fts_document(config: str):
+    # Littéraux SQL (pas de paramètres liés) : le planificateur ne
+    # reconnaît l'index d'expression que sur une expression identique.
+    regconfig = literal_column(f"'{config}'::regconfig")
+
+    def _weighted(column, weight: str):
+        return func.setweight(
+            func.to_tsvector(regconfig, func.coalesce(column, literal_column("''"))),
+            literal_column(f"'{weight}'"),
+        )
+
+    return _weighted(SeoArticle.title, "A").op("||")(
+        _weighted(SeoArticle.content_md, "B")
+    )
+
+
+async def _search(
+    db: AsyncSession, q: str, locale: str, limit: int
+) -> List[ArticleSearchHit]:
+    base = select(SeoArticle).where(
+        SeoArticle.published.is_(True), SeoArticle.locale == locale
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        config = _FTS_CONFIG[locale]
+        document = _fts_document(config)
+        query = func.websearch_to_tsquery(
+            literal_column(f"'{config}'::regconfig"), q
+        )
+        rank = func.ts_rank_cd(document, query)
+        stmt = base.where(document.op("@@")(query))
+    else:
+        # SQLite (tests, dev) : LIKE par terme — tous les termes requis,
+        # un terme dans le titre pèse plus que dans le corps.
+        terms = [t for t in q.lower().split() if t][:8]
+        if not terms:
+            return []
+        rank = literal(0.0)
+        conds = []
+        for t in terms:
+            pattern = f"%{t}%"
+            in_title = func.lower(SeoArticle.title).like(pattern)
+            in_body = func.lower(SeoArticle.content_md).like(pattern)
+            conds.append(or_(in_title, in_body))
+            rank = rank + case((in_title, 1.0), else_=0.0) + case(
+                (in_body, 0.1), else_=0.0
+            )
+        stmt = base.where(and_(*conds))
+    rows = (
+        await db.execute(
+            stmt.add_columns(rank.label("rank"))
+            .order_by(
+                rank.desc(),
+                SeoArticle.published_at.desc().nulls_last(),
+                SeoArticle.id.desc(),
+            )
+            .limit(limit)
+        )
+    ).all()
+    return [
+        ArticleSearchHit(**_summary(r).model_dump(), rank=round(float(score), 6))
+        for r, score in rows
+    ]
+
+
 @router.get(
     "/{slug}",
     response_model=ArticleFull,
     summary="Get a public SEO article by slug",
 )
-async def get_article(slug: str, db: DBSession) -> ArticleFull:
-    stmt = select(SeoArticle).where(
-        SeoArticle.slug == slug, SeoArticle.published.is_(True)
-    )
-    r = (await db.execute(stmt)).scalar_one_or_none()
-    if r is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
-    return ArticleFull(
-        id=r.id,
-        slug=r.slug,
-        locale=r.locale,
-        title=r.title,
-        excerpt=r.excerpt,
-        target_city=r.target_city,
-        target_service=r.target_service,
-        published_at=r.published_at.isoformat() if r.published_at else None,
-        meta_description=r.meta_description,
-        content_md=r.content_md,
-        keywords=r.keywords,
-    )
+async def get_article(slug: str, request: Request, db: DBSession) -> Response:
+    async def _render() -> bytes:
+        stmt = select(SeoArticle).where(
+            SeoArticle.slug == slug, SeoArticle.published.is_(True)
+        )
+        r = (await db.execute(stmt)).scalar_one_or_none()
+        if r is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Not found"
+            )
+        return ArticleFull(
+            **_summary(r).model_dump(),
+            meta_description=r.meta_description,
+            content_md=r.content_md,
+            keywords=r.keywords,
+        ).model_dump_json().encode("utf-8")
+
+    return await cached_response(request, db, _render)
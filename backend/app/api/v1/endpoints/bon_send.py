@@ -75,13 +75,11 @@ async def ensure_bon_project(
     pour porter ses achats / heures / facture. Idempotent : renvoie le
     projet existant si déjà lié, sinon en crée un (titre/client/assigné
     repris du bon)."""
-    import asyncio
-
     from app.models.bon_travail import BonTravail
     from app.services.bon_project import (
         ensure_bon_project as _ensure_bon_project,
-        push_bon_qbo_job_now,
     )
+    from app.services.qbo_jobs import enqueue_bon_job
 
     bon = await db.get(BonTravail, bon_id)
     if bon is None:
@@ -120,10 +118,10 @@ async def ensure_bon_project(
         ).scalars():
             fac.client_id = bon.client_id
     await db.flush()
-    # Sous-client QB « BT-xx — titre » sous le client mère, en arrière-plan
+    # Sous-client QB « BT-xx — titre » sous le client mère, mis en file
     # (best-effort ; la 1ʳᵉ facture/coût le créerait de toute façon).
     if proj.client_id:
-        asyncio.create_task(push_bon_qbo_job_now(int(proj.id)))
+        await enqueue_bon_job(db, int(proj.id))
     return {"project_id": proj.id}
 
 
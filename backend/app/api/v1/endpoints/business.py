@@ -151,11 +151,10 @@ def _maybe_dedupe_achats_bg() -> None:
 
         try:
             async with AsyncSessionLocal() as s:
-                removed = await dedupe_achats(s)
-                if removed:
-                    await s.commit()
-                else:
-                    await s.rollback()
+                # Commit même sans doublon : la passe tient aussi l'index
+                # de dédup à jour (achats examinés).
+                await dedupe_achats(s)
+                await s.commit()
         except Exception:  # noqa: BLE001
             pass
 
@@ -185,11 +184,10 @@ def _maybe_dedupe_factures_bg() -> None:
 
         try:
             async with AsyncSessionLocal() as s:
-                removed = await dedupe_factures(s)
-                if removed:
-                    await s.commit()
-                else:
-                    await s.rollback()
+                # Commit même sans doublon : la passe tient aussi l'index
+                # de dédup à jour (achats examinés).
+                await dedupe_factures(s)
+                await s.commit()
         except Exception:  # noqa: BLE001
             pass
 
@@ -38,7 +38,7 @@ from app.models.calendar_sync import (
     ExternalBusyBlock,
     UserCalendarFeed,
 )
-from app.services.ical_sync import sync_user_feed
+from app.services.ical_sync import sync_feeds, sync_user_feed
 
 
 log = logging.getLogger(__name__)
@@ -98,6 +98,11 @@ async def set_feed(
         )
         db.add(existing)
     else:
+        if existing.ics_url != body.ics_url.strip():
+            # Autre flux : les validateurs HTTP de l'ancien ne valent rien.
+            existing.etag = existing.last_modified = None
+            existing.content_hash = None
+            existing.window_end = None
         existing.ics_url = body.ics_url.strip()
         existing.label = body.label.strip() if body.label else None
         existing.last_sync_error = None
@@ -187,6 +192,11 @@ async def delete_feed_by_id(
     obj = await db.get(UserCalendarFeed, feed_id)
     if obj is None or obj.user_id != user.id:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Flux introuvable.")
+    # Colonne ajoutée après coup (sans FK sur les bases existantes) :
+    # les blocs du flux partent explicitement avec lui.
+    await db.execute(
+        delete(ExternalBusyBlock).where(ExternalBusyBlock.feed_id == obj.id)
+    )
     await db.delete(obj)
     await db.flush()
 
@@ -215,11 +225,7 @@ async def sync_all_my_feeds(
             )
         )
     ).scalars().all()
-    for f in feeds:
-        try:
-            await sync_user_feed(db, f)
-        except Exception:
-            log.exception("sync feed %s failed", f.id)
+    await sync_feeds(db, feeds)
     return [FeedRead.model_validate(f) for f in feeds]
 
 
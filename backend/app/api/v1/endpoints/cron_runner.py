@@ -12,18 +12,24 @@ secret valide, on retourne 401 sans révéler la cible.
     POST /api/v1/cron/run/facture-reminders
     POST /api/v1/cron/run/seo-daily
 
-Chaque endpoint relance la fonction `_run()` du job correspondant.
+Chaque endpoint MET EN FILE le job correspondant (``job_queue``, file
+``cron``) et répond tout de suite : l'appel HTTP ne porte plus l'exécution
+entière (timeouts du scheduler, worker web bloqué). Le résultat détaillé
+est consultable via ``GET /api/v1/cron/jobs/{job_id}``. Un déclenchement
+rejoué pendant qu'un run du même job est encore en attente est coalescé.
 """
 
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import APIRouter, Header, HTTPException, Query, status
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.services.job_queue import enqueue, job_handler
 
 
 log = logging.getLogger(__name__)
@@ -34,6 +40,10 @@ router = APIRouter(prefix="/cron", tags=["cron"])
 class CronResult(BaseModel):
     ok: bool
     job: str
+    # Mis en file : les compteurs détaillés sont dans le résultat du
+    # travail (GET /cron/jobs/{job_id}).
+    queued: bool = False
+    job_id: Optional[int] = None
 
 
 def _check_secret(
@@ -53,90 +63,193 @@ def _check_secret(
         )
 
 
+CronJobFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+_CRON_JOBS: Dict[str, CronJobFn] = {}
+
+
+def _cron_job(name: str) -> Callable[[CronJobFn], CronJobFn]:
+    """Déclare le corps d'un job cron (exécuté par le worker)."""
+
+    def deco(fn: CronJobFn) -> CronJobFn:
+        _CRON_JOBS[name] = fn
+        return fn
+
+    return deco
+
+
+# Pas de reprise automatique : un job de rappels qui échoue à mi-course
+# ne doit pas renvoyer les courriels déjà partis — le prochain
+# déclenchement du scheduler fait office de reprise.
+@job_handler("cron", queue="cron", max_attempts=1)
+async def _run_cron_job(payload: Dict[str, Any]) -> Any:
+    return await _CRON_JOBS[payload["job"]](payload)
+
+
+async def _enqueue_cron(job: str, **params: Any) -> Dict[str, Any]:
+    """Met le job en file (clé ``cron:<job>``) ; champs communs de la
+    réponse."""
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        job_id = await enqueue(
+            db, "cron", {"job": job, **params}, dedup_key=f"cron:{job}"
+        )
+        await db.commit()
+    return {"ok": True, "job": job, "queued": True, "job_id": job_id}
+
+
+class CronJobStatus(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    payload: Dict[str, Any] = {}
+    result: Any = None
+    last_error: Optional[str] = None
+
+
+@router.get("/jobs/{job_id}", response_model=CronJobStatus)
+async def get_cron_job(
+    job_id: int,
+    x_cron_secret: Optional[str] = Header(default=None),
+    secret: Optional[str] = Query(default=None),
+) -> CronJobStatus:
+    """État et résultat d'un travail mis en file par un endpoint cron."""
+    _check_secret(x_cron_secret, secret)
+    from app.db.session import AsyncSessionLocal
+    from app.models.background_job import BackgroundJob
+
+    async with AsyncSessionLocal() as db:
+        job = await db.get(BackgroundJob, job_id)
+    if job is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Travail introuvable.")
+    return CronJobStatus(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        attempts=job.attempts,
+        payload=json.loads(job.payload_json or "{}"),
+        result=json.loads(job.result_json) if job.result_json else None,
+        last_error=job.last_error,
+    )
+
+
+@_cron_job("unassigned-day-alerts")
+async def _job_unassigned_day_alerts(params: Dict[str, Any]) -> None:
+    from app.jobs.unassigned_day_alerts import _run
+
+    await _run()
+
+
 @router.post("/run/unassigned-day-alerts", response_model=CronResult)
 async def trigger_unassigned_day_alerts(
     x_cron_secret: Optional[str] = Header(default=None),
     secret: Optional[str] = Query(default=None),
 ) -> CronResult:
     _check_secret(x_cron_secret, secret)
-    from app.jobs.unassigned_day_alerts import _run
+    return CronResult(**await _enqueue_cron("unassigned-day-alerts"))
 
-    try:
-        await _run()
-    except Exception as exc:
-        log.exception("Cron unassigned_day_alerts failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CronResult(ok=True, job="unassigned-day-alerts")
 
+@_cron_job("immobilier-rollups-reconcile")
+async def _job_immobilier_rollups_reconcile(params: Dict[str, Any]) -> dict:
+    from app.jobs.immobilier_rollups_reconcile import _run
 
-@router.post("/run/teams-meeting-sync", response_model=CronResult)
-async def trigger_teams_meeting_sync(
+    return await _run()
+
+
+@router.post("/run/immobilier-rollups-reconcile", response_model=CronResult)
+async def trigger_immobilier_rollups_reconcile(
     x_cron_secret: Optional[str] = Header(default=None),
     secret: Optional[str] = Query(default=None),
 ) -> CronResult:
-    """Importe les rencontres Teams transcrites en fiches Rencontres."""
+    """Recalcule les agrégats Dépôts / maintenance, journalise et
+    corrige les écarts (rapport dans ``GET /cron/jobs/{job_id}``)."""
+    _check_secret(x_cron_secret, secret)
+    return CronResult(**await _enqueue_cron("immobilier-rollups-reconcile"))
+
+
+@_cron_job("timesheet-ledger-reconcile")
+async def _job_timesheet_ledger_reconcile(params: Dict[str, Any]) -> dict:
+    from app.jobs.timesheet_ledger_reconcile import _run
+
+    return await _run()
+
+
+@router.post("/run/timesheet-ledger-reconcile", response_model=CronResult)
+async def trigger_timesheet_ledger_reconcile(
+    x_cron_secret: Optional[str] = Header(default=None),
+    secret: Optional[str] = Query(default=None),
+) -> CronResult:
+    """Recalcule le livre des soldes Feuille de temps, journalise et
+    corrige les écarts (rapport dans ``GET /cron/jobs/{job_id}``)."""
     _check_secret(x_cron_secret, secret)
+    return CronResult(**await _enqueue_cron("timesheet-ledger-reconcile"))
+
+
+@_cron_job("teams-meeting-sync")
+async def _job_teams_meeting_sync(params: Dict[str, Any]) -> None:
     from app.jobs.teams_meeting_sync import _run
 
-    try:
-        await _run()
-    except Exception as exc:
-        log.exception("Cron teams_meeting_sync failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CronResult(ok=True, job="teams-meeting-sync")
+    await _run()
 
 
-@router.post("/run/follow-up-reminders", response_model=CronResult)
-async def trigger_follow_up_reminders(
+@router.post("/run/teams-meeting-sync", response_model=CronResult)
+async def trigger_teams_meeting_sync(
     x_cron_secret: Optional[str] = Header(default=None),
     secret: Optional[str] = Query(default=None),
 ) -> CronResult:
+    """Importe les rencontres Teams transcrites en fiches Rencontres."""
     _check_secret(x_cron_secret, secret)
+    return CronResult(**await _enqueue_cron("teams-meeting-sync"))
+
+
+@_cron_job("follow-up-reminders")
+async def _job_follow_up_reminders(params: Dict[str, Any]) -> None:
     from app.jobs.follow_up_reminders import _run
 
-    try:
-        await _run()
-    except Exception as exc:
-        log.exception("Cron follow_up_reminders failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CronResult(ok=True, job="follow-up-reminders")
+    await _run()
 
 
-@router.post("/run/facture-reminders", response_model=CronResult)
-async def trigger_facture_reminders(
+@router.post("/run/follow-up-reminders", response_model=CronResult)
+async def trigger_follow_up_reminders(
     x_cron_secret: Optional[str] = Header(default=None),
     secret: Optional[str] = Query(default=None),
-    force: bool = Query(default=False),
 ) -> CronResult:
     _check_secret(x_cron_secret, secret)
+    return CronResult(**await _enqueue_cron("follow-up-reminders"))
+
+
+@_cron_job("facture-reminders")
+async def _job_facture_reminders(params: Dict[str, Any]) -> Any:
     from app.db.session import AsyncSessionLocal
     from app.jobs.facture_reminders import run as _job_run
     from app.services.cron_guard import claim_cron_run
 
     # Anti-doublon : pas deux fois en moins de 2 h (sauf force).
-    if not force:
+    if not params.get("force"):
         async with AsyncSessionLocal() as gdb:
             if not await claim_cron_run(gdb, "facture-reminders", 2 * 3600):
-                return CronResult(ok=True, job="facture-reminders")
+                return {"skipped": "run trop récent (< 2 h) — anti-doublon"}
+    await _job_run()
+    return None
 
-    try:
-        await _job_run()
-    except Exception as exc:
-        log.exception("Cron facture_reminders failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CronResult(ok=True, job="facture-reminders")
+
+@router.post("/run/facture-reminders", response_model=CronResult)
+async def trigger_facture_reminders(
+    x_cron_secret: Optional[str] = Header(default=None),
+    secret: Optional[str] = Query(default=None),
+    force: bool = Query(default=False),
+) -> CronResult:
+    _check_secret(x_cron_secret, secret)
+    return CronResult(**await _enqueue_cron("facture-reminders", force=force))
+
+
+@_cron_job("appointment-reminders")
+async def _job_appointment_reminders(params: Dict[str, Any]) -> None:
+    from app.jobs.appointment_reminders import run as _job_run
+
+    await _job_run()
 
 
 @router.post("/run/appointment-reminders", response_model=CronResult)
@@ -145,17 +258,18 @@ async def trigger_appointment_reminders(
     secret: Optional[str] = Query(default=None),
 ) -> CronResult:
     _check_secret(x_cron_secret, secret)
-    from app.jobs.appointment_reminders import run as _job_run
+    return CronResult(**await _enqueue_cron("appointment-reminders"))
 
-    try:
-        await _job_run()
-    except Exception as exc:
-        log.exception("Cron appointment_reminders failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CronResult(ok=True, job="appointment-reminders")
+
+@_cron_job("email-inbound")
+async def _job_email_inbound(params: Dict[str, Any]) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.email_inbound import poll_inbound_emails
+
+    async with AsyncSessionLocal() as db:
+        r = await poll_inbound_emails(db)
+        await db.commit()
+        return r
 
 
 @router.post("/run/email-inbound", response_model=CronResult)
@@ -166,20 +280,7 @@ async def trigger_email_inbound(
     """Relève les courriels entrants et les rattache aux fiches CRM
     (nécessite Graph Mail.Read)."""
     _check_secret(x_cron_secret, secret)
-    from app.db.session import AsyncSessionLocal
-    from app.services.email_inbound import poll_inbound_emails
-
-    try:
-        async with AsyncSessionLocal() as db:
-            await poll_inbound_emails(db)
-            await db.commit()
-    except Exception as exc:
-        log.exception("Cron email_inbound failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CronResult(ok=True, job="email-inbound")
+    return CronResult(**await _enqueue_cron("email-inbound"))
 
 
 class QGDailyPulseResult(CronResult):
@@ -187,6 +288,8 @@ class QGDailyPulseResult(CronResult):
 
     total: int = 0
     generated: int = 0
+    # État inchangé depuis le dernier briefing : recopié sans appel IA.
+    reused: int = 0
     skipped: int = 0
     errors: int = 0
 
@@ -197,6 +300,19 @@ class QGInsightsResult(CronResult):
     errors: int = 0
 
 
+@_cron_job("qg-weekly-insights")
+async def _job_qg_weekly_insights(params: Dict[str, Any]) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.qg_insights import generate_for_all_active
+
+    async with AsyncSessionLocal() as db:
+        result = await generate_for_all_active(
+            db, force=bool(params.get("force"))
+        )
+        await db.commit()
+        return result
+
+
 @router.api_route(
     "/run/qg-weekly-insights",
     methods=["GET", "POST"],
@@ -210,26 +326,22 @@ async def trigger_qg_weekly_insights(
     """Cron hebdo : génère des insights pour toutes les entreprises
     actives. À planifier 1×/semaine (lundi 8h)."""
     _check_secret(x_cron_secret, secret)
+    return QGInsightsResult(
+        **await _enqueue_cron("qg-weekly-insights", force=force)
+    )
+
+
+@_cron_job("qg-daily-pulse")
+async def _job_qg_daily_pulse(params: Dict[str, Any]) -> Any:
     from app.db.session import AsyncSessionLocal
-    from app.services.qg_insights import generate_for_all_active
+    from app.services.qg_daily_pulse import generate_for_all_active
 
-    try:
-        async with AsyncSessionLocal() as db:
-            result = await generate_for_all_active(db, force=force)
-            await db.commit()
-    except Exception as exc:
-        log.exception("Cron qg_weekly_insights failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
+    async with AsyncSessionLocal() as db:
+        result = await generate_for_all_active(
+            db, force=bool(params.get("force"))
         )
-    return QGInsightsResult(
-        ok=True,
-        job="qg-weekly-insights",
-        total=result.get("total", 0),
-        created=result.get("created", 0),
-        errors=result.get("errors", 0),
-    )
+        await db.commit()
+        return result
 
 
 @router.api_route(
@@ -246,38 +358,27 @@ async def trigger_qg_daily_pulse(
     entreprises actives. À planifier ~7h heure locale via cron-job.org
     ou GitHub Actions. ``force=true`` regénère les briefings du jour."""
     _check_secret(x_cron_secret, secret)
-    from app.db.session import AsyncSessionLocal
-    from app.services.qg_daily_pulse import generate_for_all_active
-
-    try:
-        async with AsyncSessionLocal() as db:
-            result = await generate_for_all_active(db, force=force)
-            await db.commit()
-    except Exception as exc:
-        log.exception("Cron qg_daily_pulse failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
     return QGDailyPulseResult(
-        ok=True,
-        job="qg-daily-pulse",
-        total=result.get("total", 0),
-        generated=result.get("generated", 0),
-        skipped=result.get("skipped", 0),
-        errors=result.get("errors", 0),
+        **await _enqueue_cron("qg-daily-pulse", force=force)
     )
 
 
-class QGRecurrenceResult(BaseModel):
-    ok: bool
-    job: str
+class QGRecurrenceResult(CronResult):
     templates_scanned: int = 0
     taches_created: int = 0
     templates_updated: int = 0
     errors: int = 0
 
 
+@_cron_job("qg-tache-recurrence")
+async def _job_qg_tache_recurrence(params: Dict[str, Any]) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.qg_recurrence import materialize_due_templates
+
+    async with AsyncSessionLocal() as db:
+        return await materialize_due_templates(db)
+
+
 @router.api_route(
     "/run/qg-tache-recurrence",
     methods=["GET", "POST"],
@@ -293,31 +394,10 @@ async def trigger_qg_tache_recurrence(
     n'écrira pas en double pour le même (template, due_date).
     """
     _check_secret(x_cron_secret, secret)
-    from app.db.session import AsyncSessionLocal
-    from app.services.qg_recurrence import materialize_due_templates
+    return QGRecurrenceResult(**await _enqueue_cron("qg-tache-recurrence"))
 
-    try:
-        async with AsyncSessionLocal() as db:
-            result = await materialize_due_templates(db)
-    except Exception as exc:
-        log.exception("Cron qg_tache_recurrence failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return QGRecurrenceResult(
-        ok=True,
-        job="qg-tache-recurrence",
-        templates_scanned=result.get("templates_scanned", 0),
-        taches_created=result.get("taches_created", 0),
-        templates_updated=result.get("templates_updated", 0),
-        errors=len(result.get("errors", [])),
-    )
 
-
-class BailRenouvellementCronResult(BaseModel):
-    ok: bool
-    job: str
+class BailRenouvellementCronResult(CronResult):
     bails_scanned: int = 0
     avis_crees: int = 0
     courriels_envoyes: int = 0
@@ -344,14 +424,43 @@ async def trigger_bail_renouvellements(
     return BailRenouvellementCronResult(ok=True, job="bail-renouvellements")
 
 
-class CalendarSyncCronResult(BaseModel):
-    ok: bool
-    job: str
+class CalendarSyncCronResult(CronResult):
     feeds_total: int = 0
     feeds_synced: int = 0
     feeds_failed: int = 0
 
 
+@_cron_job("calendar-feeds-sync")
+async def _job_calendar_feeds_sync(params: Dict[str, Any]) -> Any:
+    # Respecte le toggle « Synchro calendriers iCal » du hub
+    # d'automatisations. is_automation_enabled est fail-open (True si
+    # la ligne/table est absente) → défaut ON = comportement inchangé.
+    from app.services.automation_state import is_automation_enabled
+
+    if not await is_automation_enabled("ical_sync_all"):
+        return {"skipped": True}
+
+    from app.db.session import AsyncSessionLocal
+    from app.models.calendar_sync import UserCalendarFeed
+    from app.services.ical_sync import sync_feeds
+    from sqlalchemy import select
+
+    async with AsyncSessionLocal() as db:
+        feeds = (
+            await db.execute(select(UserCalendarFeed))
+        ).scalars().all()
+        stats = await sync_feeds(db, feeds)
+        await db.commit()
+    return {
+        "feeds_total": stats["feeds_total"],
+        "feeds_synced": stats["synced"],
+        "feeds_failed": stats["failed"],
+        "feeds_unchanged": stats["unchanged"],
+        "blocks_inserted": stats["inserted"],
+        "blocks_removed": stats["removed"],
+    }
+
+
 @router.api_route(
     "/run/calendar-feeds-sync",
     methods=["GET", "POST"],
@@ -367,60 +476,25 @@ async def trigger_calendar_feeds_sync(
     `sync_user_feed` remplace les ExternalBusyBlock existants par lot.
     """
     _check_secret(x_cron_secret, secret)
-    # Respecte le toggle « Synchro calendriers iCal » du hub
-    # d'automatisations. is_automation_enabled est fail-open (True si
-    # la ligne/table est absente) → défaut ON = comportement inchangé.
-    from app.services.automation_state import is_automation_enabled
-
-    if not await is_automation_enabled("ical_sync_all"):
-        return CalendarSyncCronResult(ok=True, job="calendar-feeds-sync")
-
-    from app.db.session import AsyncSessionLocal
-    from app.models.calendar_sync import UserCalendarFeed
-    from app.services.ical_sync import sync_user_feed
-    from sqlalchemy import select
-
-    total = 0
-    synced = 0
-    failed = 0
-    try:
-        async with AsyncSessionLocal() as db:
-            feeds = (
-                await db.execute(select(UserCalendarFeed))
-            ).scalars().all()
-            total = len(feeds)
-            for f in feeds:
-                try:
-                    await sync_user_feed(db, f)
-                    synced += 1
-                except Exception:
-                    log.exception("sync feed %s failed", f.id)
-                    failed += 1
-            await db.commit()
-    except Exception as exc:
-        log.exception("Cron calendar_feeds_sync failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return CalendarSyncCronResult(
-        ok=True,
-        job="calendar-feeds-sync",
-        feeds_total=total,
-        feeds_synced=synced,
-        feeds_failed=failed,
-    )
+    return CalendarSyncCronResult(**await _enqueue_cron("calendar-feeds-sync"))
 
 
-class BailRenewTasksResult(BaseModel):
-    ok: bool
-    job: str
+class BailRenewTasksResult(CronResult):
     bails_scanned: int = 0
     tasks_created: int = 0
     tasks_skipped: int = 0
     errors: int = 0
 
 
+@_cron_job("bail-renouvellement-tasks")
+async def _job_bail_renouvellement_tasks(params: Dict[str, Any]) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.bail_renew_tasks import scan_and_create_renew_tasks
+
+    async with AsyncSessionLocal() as db:
+        return await scan_and_create_renew_tasks(db)
+
+
 @router.api_route(
     "/run/bail-renouvellement-tasks",
     methods=["GET", "POST"],
@@ -435,25 +509,8 @@ async def trigger_bail_renouvellement_tasks(
     la fin pour bail ≥ 12 mois, 2 mois sinon). Idempotent (tag
     `bail-renew:{bail_id}` empêche les doublons)."""
     _check_secret(x_cron_secret, secret)
-    from app.db.session import AsyncSessionLocal
-    from app.services.bail_renew_tasks import scan_and_create_renew_tasks
-
-    try:
-        async with AsyncSessionLocal() as db:
-            res = await scan_and_create_renew_tasks(db)
-    except Exception as exc:
-        log.exception("Cron bail_renew_tasks failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
     return BailRenewTasksResult(
-        ok=True,
-        job="bail-renouvellement-tasks",
-        bails_scanned=res.get("bails_scanned", 0),
-        tasks_created=res.get("tasks_created", 0),
-        tasks_skipped=res.get("tasks_skipped", 0),
-        errors=len(res.get("errors", []) or []),
+        **await _enqueue_cron("bail-renouvellement-tasks")
     )
 
 
@@ -465,6 +522,15 @@ class DevlogWeeklyReportResult(CronResult):
     skipped_no_client_email: int = 0
 
 
+@_cron_job("devlog-weekly-client-reports")
+async def _job_devlog_weekly_client_reports(params: Dict[str, Any]) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.jobs.devlog_weekly_client_report import run_weekly_client_reports
+
+    async with AsyncSessionLocal() as db:
+        return await run_weekly_client_reports(db)
+
+
 @router.api_route(
     "/run/devlog-weekly-client-reports",
     methods=["GET", "POST"],
@@ -480,25 +546,8 @@ async def trigger_devlog_weekly_client_reports(
     ``0 21 * * 5`` en UTC ≈ vendredi 16h-17h EDT/EST selon DST).
     Skip silencieusement les projets sans activité dans la semaine."""
     _check_secret(x_cron_secret, secret)
-    from app.db.session import AsyncSessionLocal
-    from app.jobs.devlog_weekly_client_report import run_weekly_client_reports
-
-    try:
-        async with AsyncSessionLocal() as db:
-            res = await run_weekly_client_reports(db)
-    except Exception as exc:
-        log.exception("Cron devlog_weekly_client_reports failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
     return DevlogWeeklyReportResult(
-        ok=True,
-        job="devlog-weekly-client-reports",
-        projects_total=res.get("projects_total", 0),
-        emails_sent=res.get("emails_sent", 0),
-        skipped_no_activity=res.get("skipped_no_activity", 0),
-        skipped_no_client_email=res.get("skipped_no_client_email", 0),
+        **await _enqueue_cron("devlog-weekly-client-reports")
     )
 
 
@@ -509,6 +558,15 @@ class DevlogNpsDispatchResult(CronResult):
     skipped_no_client_email: int = 0
 
 
+@_cron_job("devlog-nps-dispatch")
+async def _job_devlog_nps_dispatch(params: Dict[str, Any]) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.jobs.devlog_nps_dispatch import run_nps_dispatch
+
+    async with AsyncSessionLocal() as db:
+        return await run_nps_dispatch(db)
+
+
 @router.api_route(
     "/run/devlog-nps-dispatch",
     methods=["GET", "POST"],
@@ -524,24 +582,8 @@ async def trigger_devlog_nps_dispatch(
     n'envoie pas deux fois pour le même projet (table
     ``devlog_nps_responses`` sert d'état)."""
     _check_secret(x_cron_secret, secret)
-    from app.db.session import AsyncSessionLocal
-    from app.jobs.devlog_nps_dispatch import run_nps_dispatch
-
-    try:
-        async with AsyncSessionLocal() as db:
-            res = await run_nps_dispatch(db)
-    except Exception as exc:
-        log.exception("Cron devlog_nps_dispatch failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
     return DevlogNpsDispatchResult(
-        ok=True,
-        job="devlog-nps-dispatch",
-        eligible_projects=res.get("eligible_projects", 0),
-        dispatched=res.get("dispatched", 0),
-        skipped_no_client_email=res.get("skipped_no_client_email", 0),
+        **await _enqueue_cron("devlog-nps-dispatch")
     )
 
 
@@ -601,6 +643,11 @@ async def _run_qbo_loyers_sync() -> dict:
         return stats
 
 
+@_cron_job("qbo-loyers-sync")
+async def _job_qbo_loyers_sync(params: Dict[str, Any]) -> Any:
+    return await _run_qbo_loyers_sync()
+
+
 @router.api_route(
     "/run/qbo-loyers-sync",
     methods=["GET", "POST"],
@@ -613,34 +660,18 @@ async def trigger_qbo_loyers_sync(
     """Cron quotidien : importe les transactions bancaires de loyers
     publiées dans QBO (comptes « Loyer à remettre » mappés, fenêtre
     glissante 90 j, idempotent) et rejoue le rapprochement. Aucune
-    écriture dans QuickBooks."""
+    écriture dans QuickBooks. Le rapport détaillé par compte est le
+    résultat du travail (``GET /cron/jobs/{job_id}``)."""
     _check_secret(x_cron_secret, secret)
-    try:
-        res = await _run_qbo_loyers_sync()
-    except Exception as exc:
-        log.exception("Cron qbo_loyers_sync failed: %s", exc)
-        raise HTTPException(
-            status.HTTP_500_INTERNAL_SERVER_ERROR,
-            f"Job a échoué : {exc}",
-        )
-    return QboLoyersSyncResult(
-        ok=True,
-        job="qbo-loyers-sync",
-        comptes=res.get("comptes", 0),
-        importees=res.get("importees", 0),
-        mises_a_jour=res.get("mises_a_jour", 0),
-        ignorees=res.get("ignorees", 0),
-        details=res.get("details", []),
-        skipped=bool(res.get("skipped", False)),
-    )
+    return QboLoyersSyncResult(**await _enqueue_cron("qbo-loyers-sync"))
 
 
 # ─── Mega-cron : exécute tous les jobs daily en un seul appel ──────────
 
 
-class MegaCronResult(BaseModel):
-    """Résultat agrégé du mega-cron : statut par sous-job."""
-    ok: bool
+class MegaCronResult(CronResult):
+    """Résultat agrégé du mega-cron : statut par sous-job (rempli dans le
+    résultat du travail ; la réponse HTTP ne porte que ``job_id``)."""
     job: str = "all-daily"
     jobs_run: int = 0
     jobs_ok: int = 0
@@ -658,44 +689,42 @@ async def _safe(name: str, coro_factory, results: dict) -> None:
         results[name] = {"ok": False, "error": str(exc)[:240]}
 
 
-@router.api_route(
-    "/run/all-daily",
-    methods=["GET", "POST"],
-    response_model=MegaCronResult,
-)
-async def trigger_all_daily(
-    x_cron_secret: Optional[str] = Header(default=None),
-    secret: Optional[str] = Query(default=None),
-    force: bool = Query(default=False),
-) -> MegaCronResult:
-    """Mega-cron daily : exécute tous les jobs schedulés du jour
-    en séquence dans un seul appel HTTP. À configurer une seule fois
-    dans cron-job.org (~6h heure locale) — toute nouvelle routine ajoutée
-    par la suite sera automatiquement incluse sans toucher à cron-job.
+def _mega_summary(details: dict) -> dict:
+    ok_count = sum(1 for v in details.values() if v.get("ok"))
+    fail_count = sum(1 for v in details.values() if not v.get("ok"))
+    return {
+        "ok": fail_count == 0,
+        "jobs_run": len(details),
+        "jobs_ok": ok_count,
+        "jobs_failed": fail_count,
+        "details": details,
+    }
+
 
-    Gère les erreurs job par job — si l'un échoue, les suivants
-    s'exécutent quand même et le rapport agrégé remonte les détails.
+@_cron_job("all-daily")
+async def _job_all_daily(params: Dict[str, Any]) -> dict:
+    """Tous les jobs schedulés du jour, en séquence. Gère les erreurs job
+    par job — si l'un échoue, les suivants s'exécutent quand même et le
+    rapport agrégé remonte les détails.
 
     Anti-doublon : refuse de tourner si un run a déjà eu lieu il y a moins
-    de 6 h (sauf ``force=true``), pour éviter les doubles courriels de
-    rappel si le scheduler rejoue l'appel.
+    de 6 h (sauf ``force``), pour éviter les doubles courriels de rappel
+    si le scheduler rejoue l'appel.
     """
-    _check_secret(x_cron_secret, secret)
     from app.db.session import AsyncSessionLocal
     from app.services.cron_guard import claim_cron_run
 
-    if not force:
+    if not params.get("force"):
         async with AsyncSessionLocal() as gdb:
             claimed = await claim_cron_run(gdb, "all-daily", 6 * 3600)
         if not claimed:
-            return MegaCronResult(
-                ok=True,
-                job="all-daily",
-                jobs_run=0,
-                jobs_ok=0,
-                jobs_failed=0,
-                details={"skipped": "run trop récent (< 6 h) — anti-doublon"},
-            )
+            return {
+                "ok": True,
+                "jobs_run": 0,
+                "details": {
+                    "skipped": "run trop récent (< 6 h) — anti-doublon"
+                },
+            }
 
     details: dict = {}
 
@@ -760,6 +789,20 @@ async def trigger_all_daily(
     await _safe("qg-tache-recurrence", _run_qg_recurrence, details)
     await _safe("bail-renouvellement-tasks", _run_bail_renew_tasks, details)
 
+    async def _run_immobilier_rollups():
+        from app.jobs.immobilier_rollups_reconcile import _run
+
+        return await _run()
+
+    await _safe("immobilier-rollups-reconcile", _run_immobilier_rollups, details)
+
+    async def _run_timesheet_ledger():
+        from app.jobs.timesheet_ledger_reconcile import _run
+
+        return await _run()
+
+    await _safe("timesheet-ledger-reconcile", _run_timesheet_ledger, details)
+
     async def _run_email_inbound():
         from app.services.email_inbound import poll_inbound_emails
 
@@ -829,31 +872,32 @@ async def trigger_all_daily(
 
     await _safe("devlog-nps-dispatch", _run_devlog_nps_dispatch, details)
 
-    ok_count = sum(1 for v in details.values() if v.get("ok"))
-    fail_count = sum(1 for v in details.values() if not v.get("ok"))
-    return MegaCronResult(
-        ok=fail_count == 0,
-        job="all-daily",
-        jobs_run=len(details),
-        jobs_ok=ok_count,
-        jobs_failed=fail_count,
-        details=details,
-    )
+    return _mega_summary(details)
 
 
 @router.api_route(
-    "/run/all-hourly",
+    "/run/all-daily",
     methods=["GET", "POST"],
     response_model=MegaCronResult,
 )
-async def trigger_all_hourly(
+async def trigger_all_daily(
     x_cron_secret: Optional[str] = Header(default=None),
     secret: Optional[str] = Query(default=None),
+    force: bool = Query(default=False),
 ) -> MegaCronResult:
-    """Mega-cron horaire : jobs à fréquence > 1× par jour (sync calendrier
-    ICS). À configurer une seule fois dans cron-job.org si tu veux les
-    busy blocks à jour pour les suggestions intelligentes d'assignation."""
+    """Mega-cron daily : met en file tous les jobs schedulés du jour en
+    un seul appel HTTP. À configurer une seule fois dans cron-job.org
+    (~6h heure locale) — toute nouvelle routine ajoutée par la suite sera
+    automatiquement incluse sans toucher à cron-job. ``force=true``
+    ignore l'anti-doublon de 6 h."""
     _check_secret(x_cron_secret, secret)
+    return MegaCronResult(**await _enqueue_cron("all-daily", force=force))
+
+
+@_cron_job("all-hourly")
+async def _job_all_hourly(params: Dict[str, Any]) -> dict:
+    """Jobs à fréquence > 1× par jour (sync calendrier ICS, dédoublonnage,
+    imports et filets QB)."""
     from app.db.session import AsyncSessionLocal
 
     details: dict = {}
@@ -869,21 +913,14 @@ async def trigger_all_hourly(
             return {"skipped": True, "feeds_total": 0, "synced": 0, "failed": 0}
 
         from app.models.calendar_sync import UserCalendarFeed
-        from app.services.ical_sync import sync_user_feed
+        from app.services.ical_sync import sync_feeds
         from sqlalchemy import select
 
         async with AsyncSessionLocal() as db:
             feeds = (await db.execute(select(UserCalendarFeed))).scalars().all()
-            ok = 0
-            fail = 0
-            for f in feeds:
-                try:
-                    await sync_user_feed(db, f)
-                    ok += 1
-                except Exception:
-                    fail += 1
+            stats = await sync_feeds(db, feeds)
             await db.commit()
-            return {"feeds_total": len(feeds), "synced": ok, "failed": fail}
+            return stats
 
     await _safe("calendar-feeds-sync", _run_calendar_sync, details)
 
@@ -1063,13 +1100,20 @@ async def trigger_all_hourly(
         "qbo-facture-autopush", _run_qbo_facture_autopush_hourly, details
     )
 
-    ok_count = sum(1 for v in details.values() if v.get("ok"))
-    fail_count = sum(1 for v in details.values() if not v.get("ok"))
-    return MegaCronResult(
-        ok=fail_count == 0,
-        job="all-hourly",
-        jobs_run=len(details),
-        jobs_ok=ok_count,
-        jobs_failed=fail_count,
-        details=details,
-    )
+    return _mega_summary(details)
+
+
+@router.api_route(
+    "/run/all-hourly",
+    methods=["GET", "POST"],
+    response_model=MegaCronResult,
+)
+async def trigger_all_hourly(
+    x_cron_secret: Optional[str] = Header(default=None),
+    secret: Optional[str] = Query(default=None),
+) -> MegaCronResult:
+    """Mega-cron horaire : jobs à fréquence > 1× par jour (sync calendrier
+    ICS). À configurer une seule fois dans cron-job.org si tu veux les
+    busy blocks à jour pour les suggestions intelligentes d'assignation."""
+    _check_secret(x_cron_secret, secret)
+    return MegaCronResult(**await _enqueue_cron("all-hourly"))
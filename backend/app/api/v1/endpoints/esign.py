@@ -64,9 +64,10 @@ from app.models.esign import (
     EsignTemplate,
     EsignTemplateField,
 )
+from app.services import esign_pages
 from app.services.esign_pdf import (
+    PAGE_DPI,
     final_pdf_filename,
-    page_png,
     pdf_page_count,
 )
 from app.services.esign_send import (
@@ -85,7 +86,6 @@ _PDF_MAX_BYTES = 25 * 1024 * 1024
 _ATTACHMENT_MAX_BYTES = 15 * 1024 * 1024
 _ATTACHMENTS_MAX_COUNT = 10
 _FIELD_KINDS = {k.value for k in EsignFieldKind}
-_PAGE_DPI = 130
 _TZ_MONTREAL = ZoneInfo("America/Toronto")
 
 
@@ -465,6 +465,8 @@ async def create_document(
     )
     db.add(doc)
     await db.flush()
+    # Pages rendues une fois, hors requête (file « pdf »).
+    await esign_pages.schedule_prerender(db, doc)
     await _add_event(db, doc, "cree", detail=f"par {user.email}")
     await db.refresh(doc)
     return await _doc_to_detail(db, doc)
@@ -635,12 +637,16 @@ async def document_signed_pdf(
 async def document_page_png(
     doc_id: int, page_number: int, db: DBSession, user: CurrentUser
 ) -> Response:
-    doc = await _load_doc(db, doc_id, with_blob=True)
+    doc = await _load_doc(db, doc_id)
     if page_number < 1 or page_number > max(doc.page_count, 1):
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Page hors limites.")
+
+    async def _blob() -> bytes:
+        return bytes((await _load_doc(db, doc_id, with_blob=True)).pdf_blob)
+
     try:
-        png = await asyncio.to_thread(
-            page_png, bytes(doc.pdf_blob), page_number, _PAGE_DPI
+        png = await esign_pages.page_png(
+            db, doc, page_number, _blob, PAGE_DPI
         )
     except Exception as exc:  # noqa: BLE001
         log.exception("eSign : rendu page %s du doc %s échoué",
@@ -1356,6 +1362,8 @@ async def create_from_template(
     )
     db.add(doc)
     await db.flush()
+    # Même PDF que le modèle : pages déjà en cache en général (no-op).
+    await esign_pages.schedule_prerender(db, doc)
 
     created_signers: list[EsignSigner] = []
     for i, sc in enumerate(data.signers):
@@ -411,21 +411,17 @@ async def import_into_facture(
         for ac, item in new_items:
             ac.invoiced_at = now
             ac.facture_item_id = item.id
-        # Dépense QB liée → flip CIBLÉ de la case FACTURABLE en fond
-        # (NotBillable) : l'« imputation de dépense facturable » en attente
-        # disparaît côté QB (la refacturation, majoration incluse, est déjà
-        # sur CETTE facture — sinon double comptage à l'Invoice). Ciblé
-        # plutôt que re-push complet : fonctionne aussi pour les achats
-        # IMPORTÉS de QB (qbo_purchase_id seul) sans risque de doublon.
-        import asyncio as _asyncio
-
-        from app.services.achat_qbo import flip_qbo_billable_now
+        # Dépense QB liée → flip CIBLÉ de la case FACTURABLE en file de
+        # travaux (NotBillable) : l'« imputation de dépense facturable » en
+        # attente disparaît côté QB (la refacturation, majoration incluse,
+        # est déjà sur CETTE facture — sinon double comptage à l'Invoice).
+        # Ciblé plutôt que re-push complet : fonctionne aussi pour les
+        # achats IMPORTÉS de QB (qbo_purchase_id seul) sans doublon.
+        from app.services.qbo_jobs import enqueue_billable_flip
 
         for ac, _item in new_items:
             if ac.qbo_bill_id or ac.qbo_purchase_id:
-                _asyncio.create_task(
-                    flip_qbo_billable_now(int(ac.id), False)
-                )
+                await enqueue_billable_flip(db, int(ac.id), False)
 
     await db.flush()
     # Regroupe les lignes importées par type (service → extra → frais
@@ -441,14 +437,12 @@ async def import_into_facture(
     await _recompute_facture_totals(db, facture_id)
     # MIROIR QB : les lignes importées (achats refacturés, heures) doivent
     # apparaître aussi sur l'Invoice QuickBooks de la facture — sans clic.
-    # Push en arrière-plan pour une facture ÉMISE ; un brouillon partira
+    # Push mis en file pour une facture ÉMISE ; un brouillon partira
     # entier à l'envoi au client (sync_facture_to_qbo saute les drafts).
     if (fa.status or "") not in ("draft", "void"):
-        import asyncio as _asyncio
-
-        from app.services.qbo_auto_sync import push_facture_now
+        from app.services.qbo_jobs import enqueue_facture_push
 
-        _asyncio.create_task(push_facture_now(int(fa.id)))
+        await enqueue_facture_push(db, int(fa.id))
     return ImportResult(added=added)
 
 
@@ -668,11 +662,9 @@ async def import_bon_into_facture(
         pos += 1
         added += 1
         if ac.qbo_bill_id or ac.qbo_purchase_id:
-            import asyncio as _asyncio
+            from app.services.qbo_jobs import enqueue_billable_flip
 
-            from app.services.achat_qbo import flip_qbo_billable_now
-
-            _asyncio.create_task(flip_qbo_billable_now(int(ac.id), False))
+            await enqueue_billable_flip(db, int(ac.id), False)
 
     # Bon « complété à refacturer » → « facturé » (kanban à jour).
     if bon.status == BonTravailStatus.COMPLETE_A_REFACTURER.value:
@@ -680,11 +672,9 @@ async def import_bon_into_facture(
 
     await _recompute_facture_totals(db, facture_id)
     if (fa.status or "") not in ("draft", "void"):
-        import asyncio as _asyncio2
-
-        from app.services.qbo_auto_sync import push_facture_now
+        from app.services.qbo_jobs import enqueue_facture_push
 
-        _asyncio2.create_task(push_facture_now(int(fa.id)))
+        await enqueue_facture_push(db, int(fa.id))
     return ImportBonResult(
         added=added, bon_reference=bon.reference, client_set=client_set
     )
@@ -218,23 +218,19 @@ async def list_items(
     return out
 
 
-def _autopush_if_emise(fa: Facture) -> None:
+async def _autopush_if_emise(db, fa: Facture) -> None:
     """Reflète en arrière-plan toute mutation de LIGNE sur l'Invoice QB
     d'une facture ÉMISE (sent/overdue) : le miroir QuickBooks doit suivre
     l'éditeur SANS clic (lignes importées, ajoutées, modifiées,
     supprimées). Les brouillons partent entiers à l'envoi au client ;
-    push_facture_now est délibéré (non gated) et idempotent
-    (qbo_invoice_id → mise à jour sparse, jamais de doublon)."""
+    le push est délibéré (non gated) et idempotent (qbo_invoice_id → mise
+    à jour sparse, jamais de doublon). Mis en file avec dédoublonnage :
+    une rafale d'éditions de lignes = UN seul push."""
     if (fa.status or "") in ("draft", "void"):
         return
-    import asyncio
+    from app.services.qbo_jobs import enqueue_facture_push
 
-    from app.services.qbo_auto_sync import push_facture_now
-
-    try:
-        asyncio.create_task(push_facture_now(int(fa.id)))
-    except RuntimeError:
-        pass
+    await enqueue_facture_push(db, int(fa.id))
 
 
 @router.post(
@@ -280,7 +276,7 @@ async def create_item(
     await db.flush()
     await _recompute_facture_totals(db, facture_id)
     await db.refresh(item)
-    _autopush_if_emise(fa)
+    await _autopush_if_emise(db, fa)
     return FactureItemRead.model_validate(item)
 
 
@@ -323,7 +319,7 @@ async def update_item(
     await db.flush()
     await _recompute_facture_totals(db, facture_id)
     await db.refresh(item)
-    _autopush_if_emise(fa)
+    await _autopush_if_emise(db, fa)
     return FactureItemRead.model_validate(item)
 
 
@@ -374,7 +370,7 @@ async def delete_item(
     await db.delete(item)
     await db.flush()
     await _recompute_facture_totals(db, facture_id)
-    _autopush_if_emise(fa)
+    await _autopush_if_emise(db, fa)
 
 
 # Backfill : resynchronise les totaux de TOUTES les factures
@@ -42,6 +42,7 @@ from app.repositories.user import UserRepository
 
 from app.api.deps import CurrentUser, DBSession
 from app.models.user import User
+from app.services import immobilier_rollups
 from app.services.locatif_demarrage import get_demarrage, set_demarrage
 from app.services.loyer_echeance import paiement_en_retard, seuil_retard
 from app.services.permissions_service import require_capability
@@ -1654,39 +1655,22 @@ async def maintenance_rollup(
 
     Somme le montant refacturé des bons internes non annulés de l'année.
     Aucune notion de profit (vue propriétaire/locatif). Filtrable sur un
-    immeuble précis (pour sa fiche)."""
+    immeuble précis (pour sa fiche) ; limité aux immeubles visibles de
+    l'utilisateur."""
     _require_volet(user)
     target_year = year if year is not None else _now().year
-    # Fenêtre de l'année ciblée bornée en SQL plutôt que filtrée en Python
-    # après un fetch complet (évite de charger tous les bons internes de
-    # l'historique). created_at est un TIMESTAMPTZ stocké en UTC : on utilise
-    # des bornes datetime UTC (minuit 1er janvier ← inclus, minuit 1er janvier
-    # suivant → exclu) pour reproduire exactement `created_at.year == year`
-    # quelle que soit la timezone de session Postgres. NULL reste exclu par la
-    # comparaison (created_at est de toute façon NOT NULL).
-    year_start = datetime(target_year, 1, 1, tzinfo=timezone.utc)
-    year_end = datetime(target_year + 1, 1, 1, tzinfo=timezone.utc)
-    q = select(BonTravail).where(
-        BonTravail.kind == "interne",
-        BonTravail.status != "cancelled",
-        BonTravail.immeuble_id.isnot(None),
-        BonTravail.created_at >= year_start,
-        BonTravail.created_at < year_end,
+    # Agrégats mensuels matérialisés (imm_maintenance_rollups, tenus à
+    # jour à chaque écriture de bon) : on cumule les mois de l'année au
+    # lieu de relire tous les bons internes. Mois bornés en UTC, comme
+    # l'ancien filtre `created_at` de l'année.
+    visible = await visible_immeuble_ids(db, user)
+    par_immeuble = await immobilier_rollups.maintenance_for_year(
+        db, target_year, immeuble_id=immeuble_id, visible=visible
     )
-    if immeuble_id is not None:
-        q = q.where(BonTravail.immeuble_id == int(immeuble_id))
-    bons = (await db.execute(q)).scalars().all()
-    if not bons:
+    if not par_immeuble:
         return []
 
-    imm_ids = {b.immeuble_id for b in bons}
-    immeubles = {
-        i.id: i
-        for i in (
-            await db.execute(select(Immeuble).where(Immeuble.id.in_(imm_ids)))
-        ).scalars().all()
-    }
-    log_ids = {b.logement_id for b in bons if b.logement_id}
+    log_ids = {lid for e in par_immeuble.values() for lid in e["logements"]}
     logements = (
         {
             lg.id: lg
@@ -1700,61 +1684,25 @@ async def maintenance_rollup(
         else {}
     )
 
-    def _tri_bons(items: List[_RollupBon]) -> List[_RollupBon]:
+    def _tri_bons(items: List[dict]) -> List[_RollupBon]:
         # Plus récents d'abord (created_at desc, NULL en dernier) — clé
         # textuelle ISO pour éviter toute comparaison naive/aware.
         return sorted(
-            items,
+            (_RollupBon(**b) for b in items),
             key=lambda x: x.created_at.isoformat() if x.created_at else "",
             reverse=True,
         )
 
-    by_imm: dict = {}
-    for b in bons:
-        amt = float(b.amount) if b.amount is not None else 0.0
-        rb = _RollupBon(
-            id=b.id,
-            titre=b.title,
-            montant=amt,
-            status=b.status,
-            created_at=b.created_at,
-        )
-        e = by_imm.setdefault(
-            b.immeuble_id,
-            {
-                "total": 0.0,
-                "count": 0,
-                "communs": 0.0,
-                "communs_count": 0,
-                "communs_bons": [],
-                "logs": {},
-            },
-        )
-        e["total"] += amt
-        e["count"] += 1
-        if b.logement_id:
-            le = e["logs"].setdefault(
-                b.logement_id, {"total": 0.0, "count": 0, "bons": []}
-            )
-            le["total"] += amt
-            le["count"] += 1
-            le["bons"].append(rb)
-        else:
-            e["communs"] += amt
-            e["communs_count"] += 1
-            e["communs_bons"].append(rb)
-
     out: List[_RollupImmeuble] = []
-    for imm_id, e in by_imm.items():
-        imm = immeubles.get(imm_id)
+    for imm_id, e in par_immeuble.items():
         out.append(
             _RollupImmeuble(
                 immeuble_id=imm_id,
-                name=imm.name if imm else f"Immeuble #{imm_id}",
-                address=imm.address if imm else None,
+                name=e["name"] if e["name"] is not None else f"Immeuble #{imm_id}",
+                address=e["address"],
                 total=round(e["total"], 2),
                 count=e["count"],
-                communs_total=round(e["communs"], 2),
+                communs_total=round(e["communs_total"], 2),
                 communs_count=int(e["communs_count"]),
                 communs_bons=_tri_bons(e["communs_bons"]),
                 logements=[
@@ -1767,7 +1715,7 @@ async def maintenance_rollup(
                         count=lv["count"],
                         bons=_tri_bons(lv["bons"]),
                     )
-                    for lid, lv in sorted(e["logs"].items())
+                    for lid, lv in sorted(e["logements"].items())
                 ],
             )
         )
@@ -3362,155 +3310,34 @@ async def depots_overview(
     d'autre, ou son départ était acté et la date est passée.
     """
     _require_volet(user)
-    today = _now().date()
-
-    # Gestion externe : dépôts suivis par le gestionnaire tiers → exclu
-    # (isnot(True) couvre les NULL legacy).
-    imm_q = select(Immeuble).where(Immeuble.gestion_externe.isnot(True))
-    if entreprise_id is not None:
-        imm_q = imm_q.where(Immeuble.owner_entreprise_id == int(entreprise_id))
-    if immeuble_id is not None:
-        imm_q = imm_q.where(Immeuble.id == int(immeuble_id))
-    immeubles = (await db.execute(imm_q)).scalars().all()
+    # Lignes par bail matérialisées par immeuble (imm_depot_rollups,
+    # recalculées à chaque écriture de bail / dossier de départ /
+    # logement) ; seul le « départ acté dont la date est passée » dépend
+    # du jour et est appliqué ici, à la lecture.
     visible = await visible_immeuble_ids(db, user)
-    if visible is not None:
-        immeubles = [i for i in immeubles if i.id in visible]
-    imm_by_id = {i.id: i for i in immeubles}
-    if not imm_by_id:
-        return DepotOverview(rows=[])
-
-    logements = (
-        await db.execute(
-            select(Logement).where(
-                Logement.immeuble_id.in_(list(imm_by_id.keys()))
-            )
-        )
-    ).scalars().all()
-    log_by_id = {l.id: l for l in logements}
-    if not log_by_id:
-        return DepotOverview(rows=[])
-
-    # TOUS les baux visibles — y compris les actifs SANS dépôt saisi
-    # (statut « aucun ») pour permettre la saisie depuis la page Dépôts.
-    baux = (
-        await db.execute(
-            select(Bail).where(
-                Bail.logement_id.in_(list(log_by_id.keys())),
-            )
-        )
-    ).scalars().all()
-
-    loc_ids = {b.locataire_id for b in baux if b.locataire_id}
-    loc_by_id = {}
-    if loc_ids:
-        for lo in (
-            await db.execute(
-                select(Locataire).where(Locataire.id.in_(list(loc_ids)))
-            )
-        ).scalars().all():
-            loc_by_id[lo.id] = lo
-
-    a_rendre_status = {
-        BailStatus.TERMINE.value,
-        BailStatus.RESILIE.value,
-    }
-    # Départs ACTÉS dont la date est passée : le locataire est parti,
-    # qu'on ait reloué ou non.
-    baux_partis: set[int] = set()
-    if baux:
-        from app.models.immobilier import LocationDossier
-        from app.services.locatif_depart import DOSSIER_STATUTS_REGLES
-
-        dossiers = (
-            await db.execute(
-                select(LocationDossier).where(
-                    LocationDossier.logement_id.in_(
-                        {b.logement_id for b in baux}
-                    )
-                )
-            )
-        ).scalars().all()
-        for d in dossiers:
-            depart = d.date_depart
-            if depart is None or depart > today:
-                continue
-            if d.statut in DOSSIER_STATUTS_REGLES and (
-                d.statut != "reloue"
-            ):
-                continue  # dossier annulé : le locataire est resté
-            for b in baux:
-                if b.logement_id == d.logement_id and (
-                    d.bail_id is None or d.bail_id == b.id
-                ):
-                    baux_partis.add(b.id)
-    # Baux ACTIFS par logement — pour savoir si un logement a été REMIS
-    # EN LOCATION (c'est ça, et pas la fin du bail, qui déclenche le
-    # remboursement du dépôt de l'ancien locataire).
-    actifs_par_logement: Dict[int, List[Bail]] = {}
-    for b in baux:
-        if b.status == BailStatus.ACTIF.value:
-            actifs_par_logement.setdefault(b.logement_id, []).append(b)
+    lignes = await immobilier_rollups.depot_rows(
+        db,
+        _now().date(),
+        entreprise_id=entreprise_id,
+        immeuble_id=immeuble_id,
+        visible=visible,
+    )
     rows: List[DepotRow] = []
     total_detenu = 0.0
     total_a_rendre = 0.0
     total_rendu = 0.0
-    for b in baux:
-        lg = log_by_id.get(b.logement_id)
-        im = imm_by_id.get(lg.immeuble_id) if lg else None
-        if im is None:
-            continue
-        montant = float(b.depot_garantie or 0)
-        if montant <= 0:
-            # Bail sans dépôt : on n'affiche que les ACTIFS, comme ligne
-            # « à saisir » — les baux passés sans dépôt n'apportent rien.
-            if b.status != BailStatus.ACTIF.value:
-                continue
-            statut = "aucun"
-        elif b.depot_rendu_le is not None:
-            statut = "rendu"
-            total_rendu += montant
-        elif b.status in a_rendre_status and (
-            any(
-                nb.id != b.id and nb.locataire_id != b.locataire_id
-                for nb in actifs_par_logement.get(b.logement_id, [])
-            )
-            or b.id in baux_partis
-        ):
-            # Retour Phil 2026-07-30 : la fin du bail ne suffit pas —
-            # c'est le DÉPART qui veut dire que l'ancien locataire est
-            # parti. Deux façons de le savoir :
-            #   - le logement a été reloué à quelqu'un d'autre ;
-            #   - ou son départ était ACTÉ et la date est passée.
-            #
-            # Le second cas a été ajouté le 2026-08-19 : attendre la
-            # relocation retardait l'alerte de plusieurs semaines, alors
-            # que le dépôt est dû au locataire dès son départ. C'est
-            # précisément l'oubli que Phil voulait attraper — « il
-            # oublie tout le temps de venir l'enlever à la fin ».
-            statut = "a_rendre"
-            total_a_rendre += montant
-        else:
-            # Bail actif, ou terminé sans relocation (le locataire est
-            # probablement encore là) : l'argent est toujours détenu.
-            statut = "detenu"
-            total_detenu += montant
-        loc = loc_by_id.get(b.locataire_id)
-        rows.append(DepotRow(
-            bail_id=b.id,
-            immeuble_id=im.id,
-            immeuble_name=im.name,
-            logement_id=(lg.id if lg else None),
-            logement_numero=(lg.numero if lg else None),
-            locataire_id=loc.id if loc else None,
-            locataire_name=loc.full_name if loc else None,
-            montant=montant,
-            statut=statut,
-            depot_recu_le=b.depot_recu_le,
-            depot_detenteur=b.depot_detenteur,
-            depot_rendu_le=b.depot_rendu_le,
-            date_debut=b.date_debut,
-            date_fin=b.date_fin,
-        ))
+    for r in lignes:
+        # Retour Phil 2026-07-30 / 2026-08-19 : « à rendre » = le
+        # locataire est PARTI (logement reloué à quelqu'un d'autre, ou
+        # départ acté dont la date est passée) — la fin du bail ne
+        # suffit pas. Règles dans immobilier_rollups.compute_depots.
+        if r["statut"] == "rendu":
+            total_rendu += r["montant"]
+        elif r["statut"] == "a_rendre":
+            total_a_rendre += r["montant"]
+        elif r["statut"] == "detenu":
+            total_detenu += r["montant"]
+        rows.append(DepotRow(**r))
 
     rank = {"a_rendre": 0, "detenu": 1, "aucun": 2, "rendu": 3}
 
@@ -1750,15 +1750,12 @@ RECALC_INPUT_FIELDS = {
 }
 
 
-async def _compute_and_store(rec, db) -> dict:
-    """Construit les intrants depuis ``rec`` (+ overrides globaux),
-    lance ``compute_all`` et PERSISTE les champs dérivés sur ``rec``
-    (``analysis_results_json``, ``best_refi_amount``,
-    ``best_refi_program``, ``mdf_preteur_b``). Ne commit PAS et ne
-    touche pas au statut — au caller de le faire. Partagé par le bouton
-    Calculer ET par le PATCH (recalcul auto quand un intrant change sur
-    une analyse déjà calculée)."""
-    from app.services.lead_analysis_finance import FinanceInputs, compute_all
+async def _build_finance_inputs(rec, db):
+    """Construit les ``FinanceInputs`` du moteur depuis ``rec`` (+
+    overrides globaux). Retourne ``(inputs, frais_registry)`` — le
+    registre ordonné des frais est exposé tel quel dans les résultats.
+    Partagé par ``_compute_and_store`` et la grille de sensibilité."""
+    from app.services.lead_analysis_finance import FinanceInputs
 
     # Désérialise les loyers projetés (typologie_prix) depuis le JSON
     # stocké dans `loyers_projetes_json` : { "3.5": 1400, "4.5": 1600 }
@@ -1935,8 +1932,26 @@ async def _compute_and_store(rec, db) -> dict:
         ),
     )
 
-    use_aph = loyer_abord > 0 and inputs.nombre_logements > 0
-    results = compute_all(inputs, use_aph_select=use_aph)
+    return inputs, frais_registry_global
+
+
+def _use_aph_select(inputs) -> bool:
+    """APH 100 pts calculé seulement si un loyer abordable est saisi."""
+    return inputs.nouveau_loyer_abordable > 0 and inputs.nombre_logements > 0
+
+
+async def _compute_and_store(rec, db) -> dict:
+    """Construit les intrants depuis ``rec`` (+ overrides globaux),
+    lance ``compute_all`` et PERSISTE les champs dérivés sur ``rec``
+    (``analysis_results_json``, ``best_refi_amount``,
+    ``best_refi_program``, ``mdf_preteur_b``). Ne commit PAS et ne
+    touche pas au statut — au caller de le faire. Partagé par le bouton
+    Calculer ET par le PATCH (recalcul auto quand un intrant change sur
+    une analyse déjà calculée)."""
+    from app.services.lead_analysis_finance import compute_all
+
+    inputs, frais_registry_global = await _build_finance_inputs(rec, db)
+    results = compute_all(inputs, use_aph_select=_use_aph_select(inputs))
     results_dict = results.to_dict()
 
     # Juin 2026 : expose l'ORDRE et les LABELS du registre dans le JSON
@@ -3411,3 +3426,71 @@ async def compute_tri_endpoint(
     await db.commit()
 
     return result
+
+
+# ── Grille de sensibilité ──────────────────────────────────────────
+#
+# Le moteur financier + TRI évalué sur une grille prix × taux refi ×
+# TGA × loyers en une passe vectorisée (`app.services.lead_analysis_grid`).
+# Lecture seule : rien n'est persisté sur la fiche.
+
+
+class SensitivityRequest(BaseModel):
+    """Axes de la grille, dans les unités de la fiche (%, $). Axe
+    absent ou vide → valeur actuelle de la fiche (dimension 1)."""
+
+    prix_achat: List[float] = Field(default_factory=list, max_length=50)
+    taux_interet_refi_pct: List[float] = Field(
+        default_factory=list, max_length=50
+    )
+    tga_pct: List[float] = Field(default_factory=list, max_length=50)
+    # Variation des loyers en % (−10 = loyers × 0.9).
+    variation_loyers_pct: List[float] = Field(
+        default_factory=list, max_length=50
+    )
+    # Ajoute les grilles TRI (intrants manuels de la fiche / défauts).
+    inclure_tri: bool = True
+
+
+@router.post(
+    "/{analysis_id}/sensitivity",
+    summary="Grille de sensibilité (prix × taux × TGA × loyers).",
+)
+async def compute_sensitivity(
+    analysis_id: int,
+    payload: SensitivityRequest,
+    db: DBSession,
+    user: CurrentUser,
+) -> dict:
+    """Évalue l'analyse financière (et le TRI si le capital injecté est
+    connu) sur chaque combinaison des axes fournis. Les grilles sont
+    des listes imbriquées de forme ``shape`` = (prix, taux, tga,
+    loyers) ; ``best_refi_index`` indexe ``programs``."""
+    _require_prospection(user)
+    rec = await db.get(LeadAnalysis, analysis_id)
+    if rec is None:
+        raise HTTPException(404, "Analyse introuvable.")
+
+    from app.services.lead_analysis_grid import compute_grid
+
+    inputs, _registry = await _build_finance_inputs(rec, db)
+    tri_manuels = None
+    if payload.inclure_tri:
+        tri_manuels = _persisted_manual_inputs(
+            rec, await _load_tri_defaults(db)
+        )
+    try:
+        grid = compute_grid(
+            inputs,
+            use_aph_select=_use_aph_select(inputs),
+            prix_achat=payload.prix_achat,
+            taux_interet_refi=[v / 100.0 for v in payload.taux_interet_refi_pct],
+            tga=[v / 100.0 for v in payload.tga_pct],
+            facteur_loyers=[
+                1.0 + v / 100.0 for v in payload.variation_loyers_pct
+            ],
+            tri_manuels=tri_manuels,
+        )
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+    return grid.to_dict()
@@ -78,6 +78,7 @@ from app.services.api_capabilities import (
     key_has_scope,
     readable_poles,
 )
+from app.services.entity_loader import BatchLoader
 
 logger = logging.getLogger(__name__)
 
@@ -819,8 +820,15 @@ async def _activity_payload(
     start, end = _resolve_window(date, date_from, date_to)
     single_day = (end - start) <= timedelta(days=1)
 
-    tasks = await _collect_tasks(db, user, start, end, allowed_poles=allowed_poles)
-    audit = await _collect_audit(db, user, start, end, allowed_poles=allowed_poles)
+    # Un seul chargeur pour tout l'appel : une requête par type d'entité,
+    # quelle que soit la longueur de la plage.
+    loader = BatchLoader(db)
+    tasks = await _collect_tasks(
+        db, user, start, end, allowed_poles=allowed_poles, loader=loader
+    )
+    audit = await _collect_audit(
+        db, user, start, end, allowed_poles=allowed_poles, loader=loader
+    )
     summary = _build_summary(tasks, audit, start, end, single_day)
 
     return {
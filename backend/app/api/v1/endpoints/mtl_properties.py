@@ -21,10 +21,11 @@ from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Query, status
 
 log = logging.getLogger(__name__)
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from sqlalchemy import and_, func, or_, select
 
 from app.api.deps import CurrentAdmin, CurrentUser, DBSession
+from app.core.responses import stream_json_list
 from app.models.montreal_property_unit import MontrealPropertyUnit
 from app.models.prospection_lead import (
     ProspectionLead,
@@ -98,6 +99,11 @@ class ListResponse(BaseModel):
     properties: List[MtlPropertyRead]
 
 
+# Au-delà, ``list_properties`` écrit la réponse en flux.
+STREAM_MIN_ITEMS = 500
+_PROPERTIES = TypeAdapter(List[MtlPropertyRead])
+
+
 class ConvertIn(BaseModel):
     matricule: str = Field(..., min_length=1)
     owner_neq: Optional[str] = None  # NEQ du proprio si identifié
@@ -121,6 +127,43 @@ def _full_addr(p: MontrealPropertyUnit) -> str:
     return " ".join(x for x in parts if x).strip()
 
 
+def _to_read(r: MontrealPropertyUnit, already_set: set[str]) -> MtlPropertyRead:
+    """Ligne de ``list_properties`` : champs calculés + propriétaires
+    extraits d'``owners_json``."""
+    d = MtlPropertyRead.model_validate(r)
+    d.full_address = _full_addr(r) or None
+    d.already_lead = r.matricule in already_set
+    d.has_owner_data = bool(r.owners_json)
+    # Extrait les noms + dates d'inscription des owners depuis
+    # owners_json (best-effort). Listes parallèles : idx N du nom
+    # correspond à idx N de la date.
+    if r.owners_json:
+        try:
+            owners_data = json.loads(r.owners_json)
+            pairs = [
+                (
+                    (o.get("name") or "").strip(),
+                    (o.get("inscription_date") or "").strip() or None,
+                )
+                for o in owners_data
+                if o.get("name")
+            ]
+            if pairs:
+                d.owner_names = [n for n, _ in pairs]
+                d.owner_inscription_dates = [dt for _, dt in pairs]
+            else:
+                d.owner_names = None
+                d.owner_inscription_dates = None
+        except Exception:
+            d.owner_names = None
+            d.owner_inscription_dates = None
+    if d.superficie_terrain is not None:
+        d.superficie_terrain = float(d.superficie_terrain)
+    if d.superficie_batiment is not None:
+        d.superficie_batiment = float(d.superficie_batiment)
+    return d
+
+
 # --------------------------- Endpoints ---------------------------
 
 
@@ -392,41 +435,18 @@ async def list_properties(
         ).all()
         already_set = {m for (m,) in existing if m}
 
-    out: List[MtlPropertyRead] = []
-    for r in rows:
-        d = MtlPropertyRead.model_validate(r)
-        d.full_address = _full_addr(r) or None
-        d.already_lead = r.matricule in already_set
-        d.has_owner_data = bool(r.owners_json)
-        # Extrait les noms + dates d'inscription des owners depuis
-        # owners_json (best-effort). Listes parallèles : idx N du nom
-        # correspond à idx N de la date.
-        if r.owners_json:
-            try:
-                owners_data = json.loads(r.owners_json)
-                pairs = [
-                    (
-                        (o.get("name") or "").strip(),
-                        (o.get("inscription_date") or "").strip() or None,
-                    )
-                    for o in owners_data
-                    if o.get("name")
-                ]
-                if pairs:
-                    d.owner_names = [n for n, _ in pairs]
-                    d.owner_inscription_dates = [dt for _, dt in pairs]
-                else:
-                    d.owner_names = None
-                    d.owner_inscription_dates = None
-            except Exception:
-                d.owner_names = None
-                d.owner_inscription_dates = None
-        if d.superficie_terrain is not None:
-            d.superficie_terrain = float(d.superficie_terrain)
-        if d.superficie_batiment is not None:
-            d.superficie_batiment = float(d.superficie_batiment)
-        out.append(d)
-    return ListResponse(total=total, properties=out)
+    # Grandes pages (jusqu'à 1000 lignes) : réponse en flux, chaque
+    # ligne convertie au moment de l'écrire — même JSON que ListResponse.
+    if len(rows) >= STREAM_MIN_ITEMS:
+        return stream_json_list(
+            {"total": total},
+            "properties",
+            (_to_read(r, already_set) for r in rows),
+            _PROPERTIES,
+        )
+    return ListResponse(
+        total=total, properties=[_to_read(r, already_set) for r in rows]
+    )
 
 
 class UtilisationType(BaseModel):
@@ -14,10 +14,16 @@ from typing import List, Optional
 
 from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy import and_, func, or_, select
 
 from app.api.deps import CurrentUser, DBSession
 from app.models.notification import Notification
+from app.services.notifications import (
+    KIND_VOLET as _KIND_VOLET,
+    VOLET_PREFIXES as _VOLET_PREFIXES,
+    mark_all_read as _mark_all_read,
+    unread_total,
+)
 
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
@@ -34,29 +40,6 @@ class NotificationRead(BaseModel):
     created_at: datetime
 
 
-# Préfixes de href par volet. Sert à cloisonner la cloche : une
-# notification dont le href cible explicitement un AUTRE volet
-# n'apparaît pas (ex. un NDA signé — href /prospection/… — ne doit
-# pas s'afficher dans la cloche du volet construction /app).
-_VOLET_PREFIXES: dict[str, tuple[str, ...]] = {
-    "construction": ("/app", "/m"),
-    "prospection": ("/prospection",),
-    "immobilier": ("/immobilier",),
-    "entreprises": ("/entreprises",),
-    "devlog": ("/dev-logiciel",),
-}
-
-# Certaines notifications appartiennent à un volet de façon non ambiguë,
-# peu importe leur href (qui peut être nul sur d'anciennes notifs, ou
-# pointer vers un autre volet pour des raisons de routage historique).
-# On les rattache par `kind` pour cloisonner la cloche de façon fiable —
-# ex. « NDA signé » est de la prospection et ne doit jamais apparaître
-# dans la cloche du volet construction.
-_KIND_VOLET: dict[str, str] = {
-    "nda.signed": "prospection",
-}
-
-
 def _volet_filter(scope: Optional[str]):
     """Condition SQL ne gardant que les notifications du volet `scope`.
 
@@ -116,14 +99,17 @@ async def unread_count(
     scope: Optional[str] = Query(default=None),
     kind: Optional[str] = Query(default=None),
 ) -> int:
+    if not kind:
+        # Badge de la cloche : compteurs tenus à l'écriture
+        # (services.notifications), une lecture au lieu d'un COUNT.
+        return await unread_total(db, user.id, scope)
+    # Filtre par type (ex. voicemail_received) — sert aux badges ciblés
+    # dans les menus latéraux.
     stmt = select(func.count(Notification.id)).where(
         Notification.user_id == user.id,
         Notification.is_read.is_(False),
+        Notification.kind == kind,
     )
-    if kind:
-        # Filtre par type (ex. voicemail_received) — sert aux badges
-        # ciblés dans les menus latéraux.
-        stmt = stmt.where(Notification.kind == kind)
     clause = _volet_filter(scope)
     if clause is not None:
         stmt = stmt.where(clause)
@@ -153,16 +139,7 @@ async def mark_read(
 
 @router.post("/read-all")
 async def mark_all_read(db: DBSession, user: CurrentUser) -> dict:
-    res = await db.execute(
-        update(Notification)
-        .where(
-            Notification.user_id == user.id,
-            Notification.is_read.is_(False),
-        )
-        .values(is_read=True, read_at=datetime.now(timezone.utc))
-    )
-    await db.flush()
-    return {"updated": res.rowcount or 0}
+    return {"updated": await _mark_all_read(db, user.id)}
 
 
 @router.delete("/{nid}", status_code=status.HTTP_204_NO_CONTENT)
@@ -7,6 +7,7 @@ Project.
 Lookup propriétaire via rôle d'évaluation et REQ : Phase 2.
 """
 
+import asyncio
 import logging
 from datetime import date as DateT, datetime, timezone
 from typing import List, Optional
@@ -1035,7 +1036,7 @@ async def enrich_owner(
        liste, l'utilisateur choisit (un clic remplit owner_*).
     """
     from app.integrations.req.companies import (
-        lookup_by_address as req_lookup_by_address,
+        search_by_address as req_search_by_address,
     )
     from app.integrations.roles_evaluation.montreal import (
         lookup_by_address as mtl_lookup_by_address,
@@ -1091,8 +1092,8 @@ async def enrich_owner(
 
     # 2. REQ — candidats corporations à cette adresse
     req_candidates: list[dict] = []
-    req_rows = await req_lookup_by_address(db, lead.address, lead.city)
-    for c in req_rows:
+    req_matches = await req_search_by_address(db, lead.address, lead.city)
+    for c, score in req_matches:
         req_candidates.append(
             {
                 "neq": c.neq,
@@ -1103,6 +1104,8 @@ async def enrich_owner(
                 "ville": c.ville,
                 "code_postal": c.code_postal,
                 "telephone": c.telephone,
+                # Similarité trigramme de l'adresse (0–1), candidats triés.
+                "score": round(score, 3),
             }
         )
     if not req_candidates:
@@ -2491,11 +2494,6 @@ async def import_jlr_pdf(
     """
     if not (pdf.filename or "").lower().endswith(".pdf"):
         raise HTTPException(415, "Le fichier doit être un PDF.")
-    blob = await pdf.read()
-    if not blob:
-        raise HTTPException(400, "PDF vide.")
-    if len(blob) > 20 * 1024 * 1024:
-        raise HTTPException(413, "PDF trop volumineux (max 20 Mo).")
 
     lead = (
         await db.execute(
@@ -2505,19 +2503,23 @@ async def import_jlr_pdf(
     if lead is None:
         raise HTTPException(404, "Prospect introuvable")
 
-    # Parsing PDF
-    try:
-        from pypdf import PdfReader
-        import io as _io
+    # Parsing PDF — upload spoolé (disque au-delà de ~1 Mo), couche
+    # texte lue page par page hors de la boucle.
+    from app.services.pdf_documents import PdfDocument, page_texts
 
-        reader = PdfReader(_io.BytesIO(blob))
-        text = "\n".join(
-            (page.extract_text() or "") for page in reader.pages
-        )
-    except Exception as exc:
-        raise HTTPException(
-            500, f"Échec du parsing PDF : {exc}"
-        ) from exc
+    try:
+        doc = await PdfDocument.from_upload(pdf, max_bytes=20 * 1024 * 1024)
+    except ValueError:
+        raise HTTPException(413, "PDF trop volumineux (max 20 Mo).")
+    with doc:
+        if not doc.size:
+            raise HTTPException(400, "PDF vide.")
+        try:
+            text = "\n".join(await asyncio.to_thread(page_texts, doc))
+        except Exception as exc:
+            raise HTTPException(
+                500, f"Échec du parsing PDF : {exc}"
+            ) from exc
 
     import re as _re
     from app.models.prospection_lead_transaction import (
@@ -639,6 +639,7 @@ async def sign_public_soumission(
             "signed_ip": soumission.signed_ip,
             "accept": data.accept,
         },
+        transactional=True,
     )
 
     # Auto-flow closing : sur acceptation publique, on convertit le
@@ -51,11 +51,11 @@ from app.models.esign import (
     EsignObserver,
     EsignSigner,
 )
+from app.services import esign_pages
 from app.services.esign_pdf import (
     build_final_pdf,
     date_fr_ca_long,
     final_pdf_filename,
-    page_png,
 )
 from app.services.esign_send import (
     EsignSendError,
@@ -446,19 +446,20 @@ async def esign_page_png(
     token: str, page_number: int, db: DBSession
 ) -> Response:
     signer, doc = await _load_by_token(db, token)
-    doc_blob = (
-        await db.execute(
-            select(EsignDocument)
-            .where(EsignDocument.id == doc.id)
-            .options(undefer(EsignDocument.pdf_blob))
-        )
-    ).scalar_one()
     if page_number < 1 or page_number > max(doc.page_count, 1):
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Page hors limites.")
+
+    async def _blob() -> bytes:
+        return (
+            await db.execute(
+                select(EsignDocument.pdf_blob).where(
+                    EsignDocument.id == doc.id
+                )
+            )
+        ).scalar_one()
+
     try:
-        png = await asyncio.to_thread(
-            page_png, bytes(doc_blob.pdf_blob), page_number, 130
-        )
+        png = await esign_pages.page_png(db, doc, page_number, _blob)
     except Exception as exc:  # noqa: BLE001
         log.exception(
             "eSign public : rendu page %s (doc %s) échoué",
@@ -966,8 +967,9 @@ async def _finalize_document(db: AsyncSession, doc_id: int) -> None:
                 )
             ).scalar_one_or_none()
 
+        sizes = await esign_pages.page_sizes(db, doc.sha256)
         final_pdf = await asyncio.to_thread(
-            build_final_pdf, doc, signers, fields, events, ent_name
+            build_final_pdf, doc, signers, fields, events, ent_name, sizes
         )
         doc.signed_pdf_blob = final_pdf
         await db.flush()
@@ -650,15 +650,13 @@ async def approve_punch(
         details={"employe_id": p.employe_id, "hours": float(p.hours or 0)},
     )
     # Heures approuvées + projet → feuille de temps QB (TimeActivity) en
-    # arrière-plan : suivi de projet/rentabilité SANS écriture comptable
-    # (la paie est déjà au grand livre). Best-effort ; le filet horaire
-    # (qbo_nets) rattrape tout échec.
+    # file de travaux : suivi de projet/rentabilité SANS écriture
+    # comptable (la paie est déjà au grand livre). Repris avec backoff ;
+    # le filet horaire (qbo_nets) rattrape tout échec définitif.
     if p.project_id:
-        import asyncio as _asyncio
+        from app.services.qbo_jobs import enqueue_punch_time
 
-        from app.services.labour_time_qbo import push_punch_time_now
-
-        _asyncio.create_task(push_punch_time_now(int(p.id)))
+        await enqueue_punch_time(db, int(p.id))
     emp = (
         await db.execute(select(Employe).where(Employe.id == p.employe_id))
     ).scalar_one_or_none()
@@ -705,11 +703,9 @@ async def reject_punch(
     await db.delete(p)
     await db.flush()
     if _ta_id:
-        import asyncio as _asyncio
-
-        from app.services.labour_time_qbo import delete_time_activity_now
+        from app.services.qbo_jobs import enqueue_time_activity_delete
 
-        _asyncio.create_task(delete_time_activity_now(_ta_id))
+        await enqueue_time_activity_delete(db, _ta_id)
 
 
 # ---------- Payroll monthly report (manager+) ----------
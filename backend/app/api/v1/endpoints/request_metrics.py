@@ -0,0 +1,50 @@
+"""Métriques de requêtes par route (admin+).
+
+    GET    /api/v1/admin/metrics/requests?min_queries=5
+    DELETE /api/v1/admin/metrics/requests     (remise à zéro)
+
+Histogrammes en mémoire du worker alimentés par
+``app.core.request_metrics.QueryMetricsMiddleware`` : latence, nombre de
+requêtes SQL, N+1 probables (forme la plus répétée). Sert à repérer les
+endpoints lents ou bavards sans chercher à la main.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Query, status
+
+from app.api.deps import RequireAdminRole
+from app.core import request_metrics
+from app.core.config import settings
+
+router = APIRouter(prefix="/admin/metrics", tags=["admin-metrics"])
+
+
+@router.get("/requests")
+async def get_request_metrics(
+    _: RequireAdminRole,
+    min_queries: float = Query(
+        default=0, ge=0, description="Ne garder que les routes à SQL moyen ≥."
+    ),
+    n_plus_one_only: bool = Query(
+        default=False, description="Seulement les routes avec N+1 détecté."
+    ),
+) -> Dict[str, Any]:
+    routes = {
+        route: data
+        for route, data in request_metrics.snapshot().items()
+        if data["queries"]["avg"] >= min_queries
+        and (not n_plus_one_only or data["n_plus_one"])
+    }
+    return {
+        "enabled": settings.request_metrics_enabled,
+        "repeat_threshold": settings.query_repeat_threshold,
+        "routes": routes,
+    }
+
+
+@router.delete("/requests", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_request_metrics(_: RequireAdminRole) -> None:
+    request_metrics.reset()
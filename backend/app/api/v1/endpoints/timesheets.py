@@ -18,12 +18,14 @@ from sqlalchemy import delete, func, or_, select
 
 from app.api.deps import CurrentUser, DBSession
 from app.integrations.quickbooks import QuickBooksError, get_qbo
+from app.services import timesheet_ledger
 from app.services.qbo_monthly_invoice import add_lines_to_monthly_invoice
 from app.models.automation_setting import AutomationSetting
 from app.services.permissions_service import user_has_capability
 from app.models.timesheet import (
     TIMESHEET_DAYS,
     Timesheet,
+    TimesheetBalance,
     TimesheetCompany,
     TimesheetEntry,
     TimesheetReglement,
@@ -435,11 +437,18 @@ async def update_company(
         c.position = payload.position
     if payload.refacturable is not None:
         c.refacturable = payload.refacturable
+    nr_changed = False
     if payload.heures_nr_autorisees is not None:
+        nr_changed = bool(c.heures_nr_autorisees) != payload.heures_nr_autorisees
         c.heures_nr_autorisees = payload.heures_nr_autorisees
     if payload.qbo_customer_id is not None:
         c.qbo_customer_id = payload.qbo_customer_id or None
         c.qbo_customer_name = payload.qbo_customer_name or None
+    if nr_changed:
+        # Compagnie passée interne (ou l'inverse) : la refacturation de
+        # tout l'historique change → livre reconstruit.
+        await db.flush()
+        await timesheet_ledger.rebuild_balances(db)
     await db.commit()
     return CompanyOut(
         id=c.id,
@@ -879,6 +888,9 @@ async def upsert_user_rate(
                 refacturable=payload.refacturable,
             )
         )
+    # Le taux s'applique à TOUT l'historique approuvé de l'employé.
+    await db.flush()
+    await timesheet_ledger.rebuild_balances(db, [payload.user_id])
     await db.commit()
     return {"ok": True}
 
@@ -927,116 +939,63 @@ async def timesheet_dashboard(
         raise HTTPException(status_code=403, detail="Réservé aux gestionnaires")
     await _ensure_seed(db)
 
-    sheets = (
-        await db.execute(
-            select(Timesheet).where(Timesheet.status == "approuve")
-        )
-    ).scalars().all()
-    sheets_by_id = {s.id: s for s in sheets}
+    # Livre des soldes maintenu à chaque écriture (timesheet_ledger) :
+    # une lecture, quelle que soit la profondeur de l'historique.
+    balances = await timesheet_ledger.load_balances(db)
     companies = {
         c.id: c
         for c in (await db.execute(select(TimesheetCompany))).scalars().all()
     }
-    overrides = {
-        (o.user_id, o.company_id): o
-        for o in (
-            await db.execute(select(TimesheetUserRate))
-        ).scalars().all()
-    }
-    sums = (
-        await db.execute(
-            select(
-                TimesheetEntry.timesheet_id,
-                TimesheetEntry.company_id,
-                TimesheetEntry.refacturable,
-                func.sum(TimesheetEntry.hours),
-            ).group_by(
-                TimesheetEntry.timesheet_id,
-                TimesheetEntry.company_id,
-                TimesheetEntry.refacturable,
-            )
-        )
-    ).all()
-
-    # Paie = TOUTES les heures × taux horaire de la feuille ; refacturation
-    # = heures refacturables seulement × taux effectif (perso → défaut).
-    hours_by_user: Dict[int, float] = {}
-    paie_due: Dict[int, float] = {}
-    comp_hours: Dict[tuple, float] = {}
-    comp_due: Dict[tuple, float] = {}
-    for ts_id, cid, refc, h in sums:
-        ts = sheets_by_id.get(ts_id)
-        if not ts or cid not in companies or not h:
-            continue
-        h = float(h)
-        uid = ts.user_id
-        hours_by_user[uid] = hours_by_user.get(uid, 0.0) + h
-        paie_due[uid] = (
-            paie_due.get(uid, 0.0) + h * float(ts.taux_horaire or 0.0)
-        )
-        if refc and not bool(
-            getattr(companies[cid], "heures_nr_autorisees", False)
-        ):
-            rate, _src = _line_rate(ts, overrides.get((uid, cid)))
-            key = (uid, cid)
-            comp_hours[key] = comp_hours.get(key, 0.0) + h
-            comp_due[key] = comp_due.get(key, 0.0) + h * rate
-
     regs = (
         await db.execute(
-            select(TimesheetReglement).order_by(
+            select(TimesheetReglement)
+            .order_by(
                 TimesheetReglement.date_reglement.desc(),
                 TimesheetReglement.id.desc(),
             )
+            .limit(100)
         )
     ).scalars().all()
-    paie_reglee: Dict[int, float] = {}
-    refac_reglee: Dict[int, float] = {}
-    comp_reglee: Dict[tuple, float] = {}
-    for r in regs:
-        m = float(r.montant or 0.0)
-        if r.kind == "paie":
-            paie_reglee[r.user_id] = paie_reglee.get(r.user_id, 0.0) + m
-        else:
-            refac_reglee[r.user_id] = refac_reglee.get(r.user_id, 0.0) + m
-            if r.company_id:
-                key = (r.user_id, r.company_id)
-                comp_reglee[key] = comp_reglee.get(key, 0.0) + m
-
-    user_ids = (
-        set(hours_by_user)
-        | set(paie_reglee)
-        | set(refac_reglee)
-        | {r.user_id for r in regs}
-    )
+
+    by_user: Dict[int, List] = {}
+    for b in balances:
+        if any(
+            abs(getattr(b, f) or 0.0) > timesheet_ledger.TOLERANCE
+            for f in timesheet_ledger.FIELDS
+        ):
+            by_user.setdefault(b.user_id, []).append(b)
+    user_ids = set(by_user)
     users: Dict[int, User] = {}
-    if user_ids or regs:
-        wanted = set(user_ids) | {
-            r.created_by_user_id for r in regs if r.created_by_user_id
-        }
-        if wanted:
-            for u in (
-                await db.execute(select(User).where(User.id.in_(wanted)))
-            ).scalars().all():
-                users[u.id] = u
+    wanted = user_ids | {r.user_id for r in regs} | {
+        r.created_by_user_id for r in regs if r.created_by_user_id
+    }
+    if wanted:
+        for u in (
+            await db.execute(select(User).where(User.id.in_(wanted)))
+        ).scalars().all():
+            users[u.id] = u
 
     employees: List[DashboardEmployee] = []
     for uid in user_ids:
         emp = users.get(uid)
-        comp_keys = [
-            k for k in (set(comp_hours) | set(comp_reglee)) if k[0] == uid
-        ]
-        comp_keys.sort(
-            key=lambda k: (
-                companies[k[1]].position if k[1] in companies else 999,
-                k[1],
-            )
+        lines = sorted(
+            (
+                b
+                for b in by_user[uid]
+                if b.company_id != timesheet_ledger.NO_COMPANY
+            ),
+            key=lambda b: (
+                companies[b.company_id].position
+                if b.company_id in companies
+                else 999,
+                b.company_id,
+            ),
         )
         rows: List[DashboardCompanyRow] = []
-        for k in comp_keys:
-            cid = k[1]
-            due = round(comp_due.get(k, 0.0), 2)
-            regle = round(comp_reglee.get(k, 0.0), 2)
+        for b in lines:
+            cid = b.company_id
+            due = round(b.refac_due or 0.0, 2)
+            regle = round(b.refac_reglee or 0.0, 2)
             if not due and not regle:
                 continue
             rows.append(
@@ -1047,16 +1006,16 @@ async def timesheet_dashboard(
                         if cid in companies
                         else f"Compagnie {cid}"
                     ),
-                    heures=round(comp_hours.get(k, 0.0), 2),
+                    heures=round(b.refac_heures or 0.0, 2),
                     due=due,
                     regle=regle,
                     solde=round(due - regle, 2),
                 )
             )
-        p_due = round(paie_due.get(uid, 0.0), 2)
-        p_reg = round(paie_reglee.get(uid, 0.0), 2)
+        p_due = round(sum(b.paie_due or 0.0 for b in by_user[uid]), 2)
+        p_reg = round(sum(b.paie_reglee or 0.0 for b in by_user[uid]), 2)
         r_due = round(sum(r.due for r in rows), 2)
-        r_reg = round(refac_reglee.get(uid, 0.0), 2)
+        r_reg = round(sum(b.refac_reglee or 0.0 for b in by_user[uid]), 2)
         employees.append(
             DashboardEmployee(
                 user_id=uid,
@@ -1065,7 +1024,9 @@ async def timesheet_dashboard(
                     if emp
                     else f"Utilisateur {uid}"
                 ),
-                total_heures=round(hours_by_user.get(uid, 0.0), 2),
+                total_heures=round(
+                    sum(b.heures or 0.0 for b in by_user[uid]), 2
+                ),
                 paie_due=p_due,
                 paie_reglee=p_reg,
                 paie_solde=round(p_due - p_reg, 2),
@@ -1107,9 +1068,7 @@ async def timesheet_dashboard(
         employees=employees,
         total_paie_solde=round(sum(e.paie_solde for e in employees), 2),
         total_refac_solde=round(sum(e.refac_solde for e in employees), 2),
-        reglements=[
-            _reglement_out(r, users, companies) for r in regs[:100]
-        ],
+        reglements=[_reglement_out(r, users, companies) for r in regs],
         a_approuver=a_approuver,
     )
 
@@ -1148,6 +1107,13 @@ async def create_reglement(
     )
     db.add(r)
     await db.flush()
+    await timesheet_ledger.reglement_changed(
+        db,
+        kind=r.kind,
+        user_id=r.user_id,
+        company_id=r.company_id,
+        montant=r.montant,
+    )
     await db.commit()
     return _reglement_out(
         r,
@@ -1177,6 +1143,13 @@ async def update_reglement(
     if not r:
         raise HTTPException(status_code=404, detail="Règlement introuvable")
     if payload.montant is not None:
+        await timesheet_ledger.reglement_changed(
+            db,
+            kind=r.kind,
+            user_id=r.user_id,
+            company_id=r.company_id,
+            montant=float(payload.montant) - float(r.montant or 0.0),
+        )
         r.montant = float(payload.montant)
     if payload.date_reglement is not None:
         r.date_reglement = payload.date_reglement
@@ -1203,6 +1176,13 @@ async def delete_reglement(
     r = await db.get(TimesheetReglement, reglement_id)
     if not r:
         raise HTTPException(status_code=404, detail="Règlement introuvable")
+    await timesheet_ledger.reglement_changed(
+        db,
+        kind=r.kind,
+        user_id=r.user_id,
+        company_id=r.company_id,
+        montant=-float(r.montant or 0.0),
+    )
     await db.delete(r)
     await db.commit()
     return {"ok": True}
@@ -1354,59 +1334,18 @@ async def facturer_solde_qbo(
         raise HTTPException(status_code=404, detail="Compagnie introuvable")
 
     # Dû cumulé (heures refacturables × taux effectif par feuille) − déjà
-    # refacturé = solde à facturer. Même calcul que le dashboard.
-    sheets = (
-        await db.execute(
-            select(Timesheet).where(
-                Timesheet.user_id == payload.user_id,
-                Timesheet.status == "approuve",
-            )
-        )
-    ).scalars().all()
-    ov = (
+    # refacturé = solde à facturer. Même livre que le dashboard.
+    bal = (
         await db.execute(
-            select(TimesheetUserRate).where(
-                TimesheetUserRate.user_id == payload.user_id,
-                TimesheetUserRate.company_id == payload.company_id,
+            select(TimesheetBalance).where(
+                TimesheetBalance.user_id == payload.user_id,
+                TimesheetBalance.company_id == payload.company_id,
             )
         )
     ).scalar_one_or_none()
-    heures = 0.0
-    due = 0.0
-    if sheets:
-        by_id = {s.id: s for s in sheets}
-        sums = (
-            await db.execute(
-                select(
-                    TimesheetEntry.timesheet_id,
-                    func.sum(TimesheetEntry.hours),
-                )
-                .where(
-                    TimesheetEntry.timesheet_id.in_(by_id.keys()),
-                    TimesheetEntry.company_id == payload.company_id,
-                    TimesheetEntry.refacturable.is_(True),
-                )
-                .group_by(TimesheetEntry.timesheet_id)
-            )
-        ).all()
-        for ts_id, h in sums:
-            ts = by_id.get(ts_id)
-            if not ts or not h:
-                continue
-            rate, _src = _line_rate(ts, ov)
-            heures += float(h)
-            due += float(h) * rate
-    regle = 0.0
-    for r in (
-        await db.execute(
-            select(TimesheetReglement).where(
-                TimesheetReglement.user_id == payload.user_id,
-                TimesheetReglement.company_id == payload.company_id,
-                TimesheetReglement.kind == "refacturation",
-            )
-        )
-    ).scalars().all():
-        regle += float(r.montant or 0.0)
+    heures = float(bal.refac_heures or 0.0) if bal else 0.0
+    due = float(bal.refac_due or 0.0) if bal else 0.0
+    regle = float(bal.refac_reglee or 0.0) if bal else 0.0
     solde = round(due - regle, 2)
     if solde <= 0 or heures <= 0:
         raise HTTPException(
@@ -1494,6 +1433,13 @@ async def facturer_solde_qbo(
     invoice_id = result["invoice_id"]
     doc_number = result["doc_number"]
 
+    await timesheet_ledger.reglement_changed(
+        db,
+        kind="refacturation",
+        user_id=payload.user_id,
+        company_id=payload.company_id,
+        montant=montant,
+    )
     db.add(
         TimesheetReglement(
             kind="refacturation",
@@ -1568,6 +1514,7 @@ async def patch_timesheet(
     if not ts:
         raise HTTPException(status_code=404, detail="Feuille introuvable")
     _assert_editable(ts, user)
+    before = await timesheet_ledger.sheet_contribution(db, ts)
     # Seul un gestionnaire modifie les taux ; l'employé édite ses notes.
     if payload.taux_horaire is not None:
         if not _is_manager(user):
@@ -1583,6 +1530,7 @@ async def patch_timesheet(
         ts.taux_refacturation = payload.taux_refacturation
     if payload.notes is not None:
         ts.notes_json = json.dumps(payload.notes, ensure_ascii=False)
+    await timesheet_ledger.sheet_changed(db, ts, before)
     await db.commit()
     return await _build_detail(db, ts, user)
 
@@ -1598,6 +1546,7 @@ async def replace_entries(
     if not ts:
         raise HTTPException(status_code=404, detail="Feuille introuvable")
     _assert_editable(ts, user)
+    before = await timesheet_ledger.sheet_contribution(db, ts)
     # Remplacement complet de la grille.
     await db.execute(
         delete(TimesheetEntry).where(
@@ -1637,6 +1586,7 @@ async def replace_entries(
         )
     if payload.notes is not None:
         ts.notes_json = json.dumps(payload.notes, ensure_ascii=False)
+    await timesheet_ledger.sheet_changed(db, ts, before)
     await db.commit()
     return await _build_detail(db, ts, user)
 
@@ -1651,6 +1601,7 @@ async def submit_timesheet(
     if not (_is_manager(user) or ts.user_id == user.id):
         raise HTTPException(status_code=403, detail="Accès refusé")
     deja_soumise = ts.status in ("soumis", "approuve")
+    before = await timesheet_ledger.sheet_contribution(db, ts)
     ts.status = "soumis"
     ts.submitted_at = datetime.now(timezone.utc)
 
@@ -1689,6 +1640,7 @@ async def submit_timesheet(
         except Exception as exc:  # noqa: BLE001
             log.warning("notif feuille soumise échouée: %s", exc)
 
+    await timesheet_ledger.sheet_changed(db, ts, before)
     await db.commit()
     return await _build_detail(db, ts, user)
 
@@ -1702,11 +1654,13 @@ async def approve_timesheet(
     ts = await db.get(Timesheet, timesheet_id)
     if not ts:
         raise HTTPException(status_code=404, detail="Feuille introuvable")
+    before = await timesheet_ledger.sheet_contribution(db, ts)
     ts.status = "approuve"
     ts.approved_at = datetime.now(timezone.utc)
     ts.approved_by_user_id = user.id
     if not ts.submitted_at:
         ts.submitted_at = datetime.now(timezone.utc)
+    await timesheet_ledger.sheet_changed(db, ts, before)
     await db.commit()
     return await _build_detail(db, ts, user)
 
@@ -1722,10 +1676,12 @@ async def reopen_timesheet(
     # soumise est figée pour l'employé (retour Phil 2026-07-22).
     if not await user_has_capability(db, user, "timesheet.reopen"):
         raise HTTPException(status_code=403, detail="Réservé aux gestionnaires")
+    before = await timesheet_ledger.sheet_contribution(db, ts)
     ts.status = "brouillon"
     ts.submitted_at = None
     ts.approved_at = None
     ts.approved_by_user_id = None
+    await timesheet_ledger.sheet_changed(db, ts, before)
     await db.commit()
     return await _build_detail(db, ts, user)
 
@@ -1742,6 +1698,9 @@ async def delete_timesheet(
     if not await user_has_capability(db, user, "timesheet.delete"):
         if ts.user_id != user.id or ts.status == "approuve":
             raise HTTPException(status_code=403, detail="Accès refusé")
+    await timesheet_ledger.apply_delta(
+        db, ts.user_id, {}, await timesheet_ledger.sheet_contribution(db, ts)
+    )
     await db.execute(
         delete(TimesheetEntry).where(TimesheetEntry.timesheet_id == ts.id)
     )
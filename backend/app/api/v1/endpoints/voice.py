@@ -20,6 +20,7 @@ import asyncio
 import logging
 import os
 import json
+import time
 from datetime import datetime, timezone
 from typing import List, Optional
 
@@ -49,6 +50,7 @@ from app.integrations.voice.secretary import (
     decide_initial_greeting,
     decide_next_turn,
 )
+from app.integrations.voice import turn_prefetch
 from app.integrations.voice.spam_filter import (
     SpamCheckResult,
     check_incoming,
@@ -298,24 +300,27 @@ async def _record_turn(
     role: str,
     text: str,
     confidence: Optional[float] = None,
-) -> None:
+    llm_ms: Optional[int] = None,
+    llm_first_token_ms: Optional[int] = None,
+) -> CallTurn:
     """Insère un CallTurn (role ∈ {user, assistant}) à la suite du dernier."""
-    count = (
+    next_idx = (
         await db.execute(
-            select(CallTurn).where(CallTurn.call_id == call_id)
-        )
-    ).scalars().all()
-    next_idx = len(count)
-    db.add(
-        CallTurn(
-            call_id=call_id,
-            turn_index=next_idx,
-            role=role,
-            text=text,
-            confidence=int(confidence * 100) if confidence is not None else None,
-        )
+            select(func.count(CallTurn.id)).where(CallTurn.call_id == call_id)
+        )
+    ).scalar_one()
+    turn = CallTurn(
+        call_id=call_id,
+        turn_index=next_idx,
+        role=role,
+        text=text,
+        confidence=int(confidence * 100) if confidence is not None else None,
+        llm_ms=llm_ms,
+        llm_first_token_ms=llm_first_token_ms,
     )
+    db.add(turn)
     await db.flush()
+    return turn
 
 
 async def _create_lead_from_callback(db, *, call: Call) -> Optional[int]:
@@ -849,42 +854,16 @@ async def _propose_appointment_slots(
     """Cherche les 3 meilleurs créneaux libres pour un closer et les
     mémorise dans intake_data['proposed_slots']. Retourne la liste
     serialisée (str-friendly pour Polly) à annoncer à l'appelant."""
-    from app.models.appointment_type import AppointmentType
-    from app.services.agenda_slot_finder import find_available_slots
-
-    # Type « évaluation soumission » par défaut (seedé au boot).
-    apt_type = (
-        await db.execute(
-            select(AppointmentType).where(
-                AppointmentType.slug == "evaluation_soumission",
-                AppointmentType.active.is_(True),
-            )
-        )
-    ).scalar_one_or_none()
-    if apt_type is None:
-        return []
     location = (intake_data or {}).get("adresse") or ""
-    slots = await find_available_slots(
-        db,
-        appointment_type_id=apt_type.id,
-        location=location or None,
-        role_kind="closer",
-        days_ahead=7,
-        max_results=3,
-    )
-    if not slots:
+    # Créneaux souvent déjà calculés en tâche de fond pendant que
+    # l'appelant donnait ses infos d'intake (cf. turn_prefetch).
+    out = await turn_prefetch.take_prefetched_slots(call.id, location=location)
+    if out is None:
+        out = await turn_prefetch.compute_slot_proposals(
+            db, location=location or None
+        )
+    if not out:
         return []
-    out = []
-    for s in slots:
-        out.append(
-            {
-                "user_id": s.user_id,
-                "user_display": s.user_display,
-                "start_at": s.start_at.isoformat(),
-                "end_at": s.end_at.isoformat(),
-                "appointment_type_id": s.appointment_type_id,
-            }
-        )
     # Persiste les slots sur le Call.session_state pour les retrouver
     # quand Léa retournera next_action=book_slot au tour suivant.
     state = {}
@@ -1293,6 +1272,16 @@ async def _begin_secretary_greeting(
         lang="fr-CA", personalized_say=personalized, after_hours=after_hours
     )
     call.lang = greeting.lang
+    # Contexte réutilisé par chaque tour suivant (pas de ré-identification).
+    turn_prefetch.remember_context(
+        call.id,
+        identity_context=(
+            build_identity_context_block(identified)
+            if identified.kind != CallerKind.UNKNOWN
+            else None
+        ),
+        after_hours=after_hours,
+    )
     await _record_turn(
         db, call_id=call.id, role="assistant", text=greeting.say
     )
@@ -1581,8 +1570,17 @@ async def _twilio_incoming_call_impl(request: Request, db: DBSession) -> Respons
     response_class=Response,
 )
 async def twilio_secretary_turn(request: Request, db: DBSession) -> Response:
+    # Latence du tour = réception du webhook (fin de la reco vocale
+    # Twilio) → TwiML prêt. Posée sur le tour assistant enregistré.
+    started = time.perf_counter()
+    timing: dict = {}
     try:
-        return await _twilio_secretary_turn_impl(request, db)
+        response = await _twilio_secretary_turn_impl(request, db, timing)
+        turn = timing.get("turn")
+        if turn is not None:
+            turn.latency_ms = int((time.perf_counter() - started) * 1000)
+            await db.flush()
+        return response
     except HTTPException as _http_exc:
         # On préfère un TwiML poli en français à la lecture du message
         # d'erreur anglais par défaut de Twilio. Les 401 signature
@@ -1598,9 +1596,16 @@ async def twilio_secretary_turn(request: Request, db: DBSession) -> Response:
         return _safe_error_twiml()
 
 
-async def _twilio_secretary_turn_impl(request: Request, db: DBSession) -> Response:
+async def _twilio_secretary_turn_impl(
+    request: Request, db: DBSession, timing: Optional[dict] = None
+) -> Response:
     """Reçoit la transcription du tour de l'appelant + renvoie le TwiML
-    suivant (continue / transfer / callback / end_spam)."""
+    suivant (continue / transfer / callback / end_spam).
+
+    `timing["turn"]` reçoit le CallTurn assistant du tour, pour que le
+    wrapper y pose la latence totale une fois le TwiML construit."""
+    if timing is None:
+        timing = {}
     params = await _validate_twilio_signature(request)
     provider = _twilio_provider()
 
@@ -1649,22 +1654,31 @@ async def _twilio_secretary_turn_impl(request: Request, db: DBSession) -> Respon
     ).scalars().all()
     history = [(t.role, t.text) for t in turns]
 
-    # Re-identifie l'appelant pour passer le contexte à Claude (rapide :
-    # comparaison SQL sur 10 derniers chiffres, indexée).
-    identified = await identify_caller(db, call.from_e164)
-    identity_ctx = (
-        build_identity_context_block(identified)
-        if identified.kind != CallerKind.UNKNOWN
-        else None
-    )
-    # Hors heures : Léa applique les règles after-hours (urgence
-    # locataire → gestionnaires ; reste → prise de message).
-    try:
-        after_hours = not await is_within_business_hours(
-            db, phone_number_id=call.phone_number_id
+    # Contexte appelant mémorisé au décroché ; à défaut (autre worker,
+    # redémarrage) on ré-identifie (comparaison SQL sur 10 derniers
+    # chiffres, indexée) et on mémorise pour les tours suivants.
+    prefetched = turn_prefetch.cached_context(call.id)
+    if prefetched is not None:
+        identity_ctx = prefetched.identity_context
+        after_hours = prefetched.after_hours
+    else:
+        identified = await identify_caller(db, call.from_e164)
+        identity_ctx = (
+            build_identity_context_block(identified)
+            if identified.kind != CallerKind.UNKNOWN
+            else None
+        )
+        # Hors heures : Léa applique les règles after-hours (urgence
+        # locataire → gestionnaires ; reste → prise de message).
+        try:
+            after_hours = not await is_within_business_hours(
+                db, phone_number_id=call.phone_number_id
+            )
+        except Exception:  # noqa: BLE001
+            after_hours = False
+        turn_prefetch.remember_context(
+            call.id, identity_context=identity_ctx, after_hours=after_hours
         )
-    except Exception:  # noqa: BLE001
-        after_hours = False
     decision = await decide_next_turn(
         history=history,
         current_turn_count=len(turns),
@@ -1704,10 +1718,20 @@ async def _twilio_secretary_turn_impl(request: Request, db: DBSession) -> Respon
     if decision.lead_reason:
         call.lead_reason = decision.lead_reason
 
-    await _record_turn(
-        db, call_id=call.id, role="assistant", text=decision.say
+    timing["turn"] = await _record_turn(
+        db,
+        call_id=call.id,
+        role="assistant",
+        text=decision.say,
+        llm_ms=decision.llm_ms,
+        llm_first_token_ms=decision.llm_first_token_ms,
     )
 
+    # Pendant que l'appelant répond, on prépare les créneaux de RDV si
+    # l'intake est assez avancé pour que Léa les propose au tour suivant.
+    if decision.next_action == "continue" and not after_hours:
+        turn_prefetch.schedule_slot_prefetch(call.id, decision.intake_data)
+
     # ─── Routage spécialisé Phase 8 ───
     #
     # 1) Urgence locataire : on transfère TOUT DE SUITE vers le numéro
@@ -2210,6 +2234,7 @@ async def twilio_call_status(request: Request, db: DBSession) -> Response:
         call.duration_sec = int(duration_raw)
     if call_status in ("completed", "busy", "no-answer", "failed", "canceled"):
         call.ended_at = datetime.now(timezone.utc)
+        turn_prefetch.forget(call.id)
         if call_status == "completed" and call.answered_at is None and call.duration_sec:
             from datetime import timedelta
 
@@ -4018,6 +4043,9 @@ class CallTurnRead(BaseModel):
     role: str
     text: str
     confidence: Optional[int]
+    latency_ms: Optional[int] = None
+    llm_ms: Optional[int] = None
+    llm_first_token_ms: Optional[int] = None
     created_at: datetime
 
 
@@ -83,6 +83,7 @@ from app.api.v1.endpoints import (
     optimisation,
     rencontres,
     rencontres_teams,
+    request_metrics,
     timesheets,
     achat_receipt,
     bon_items,
@@ -454,6 +455,7 @@ api_router.include_router(purchase_agreement_template.router, dependencies=DEP_P
 api_router.include_router(prospection.router, dependencies=DEP_PROSPECTION_INVEST)
 api_router.include_router(email_templates.router)
 api_router.include_router(admin_data.router)
+api_router.include_router(request_metrics.router)
 api_router.include_router(help.router)
 api_router.include_router(kratos.router)
 api_router.include_router(org_nodes.router)
@@ -0,0 +1,228 @@
+"""Compression négociée des réponses (gzip, brotli si installé).
+
+Les listes JSON (prospection Montréal, loyers, flux d'activité) partent
+telles quelles vers l'app mobile : 450 Ko pour 1000 unités d'évaluation,
+moins de 10 Ko une fois compressées. ``CompressionMiddleware`` (ASGI pur,
+comme ``QueryMetricsMiddleware``) :
+
+- choisit l'encodage d'après ``Accept-Encoding`` (valeurs ``q``
+  respectées) : ``br`` si le paquet ``brotli`` est importable, sinon
+  ``gzip`` ;
+- ne compresse que les types texte / JSON, à partir de
+  ``response_compression_min_bytes`` (en dessous, l'en-tête gzip coûte
+  plus qu'il ne rapporte), jamais un ``204`` / ``304``, une réponse à
+  ``HEAD`` ni un corps déjà encodé ;
+- compresse les réponses en flux (``StreamingResponse``) au fil de
+  l'eau, sans les mettre en mémoire : chaque morceau est vidé
+  (``Z_SYNC_FLUSH`` / ``flush`` brotli) pour que le client le reçoive
+  aussitôt, au lieu d'attendre que zlib ait rempli son tampon ;
+- ne touche jamais à ``text/event-stream`` (SSE) : chaque événement doit
+  partir tel quel, dès qu'il est émis ;
+- ajoute ``Vary: Accept-Encoding`` à toute réponse compressible, qu'elle
+  soit compressée ou non (caches / CDN : une variante par encodage).
+
+L'``ETag`` n'est pas modifié : il désigne le contenu JSON, et les
+validations ``If-None-Match`` se font en comparaison faible.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover — brotli optionnel, gzip suffit
+    brotli = None
+
+_COMPRESSIBLE = (
+    "application/json",
+    "application/geo+json",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+# Types texte jamais compressés : flux d'événements (SSE) à livrer tels quels.
+_NEVER = ("text/event-stream",)
+_SKIP_STATUS = {204, 304}
+_GZIP_LEVEL = 6
+# Qualité brotli « dynamique » : ratio proche de gzip -9, CPU proche de gzip -6.
+_BROTLI_QUALITY = 4
+
+
+def _supported() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Meilleur encodage accepté parmi ceux qu'on sait produire, ou ``None``."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[token] = q
+    best: Optional[str] = None
+    best_q = 0.0
+    for enc in _supported():  # ordre = préférence à poids égal
+        q = weights.get(enc, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=_BROTLI_QUALITY)
+            self._zlib = None
+        else:
+            self._br = None
+            # wbits 16+ : conteneur gzip (en-tête + CRC).
+            self._zlib = zlib.compressobj(_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._br is not None:
+            return self._br.process(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        """Vide ce qui est en tampon sans clore le flux (morceau suivant)."""
+        if self._br is not None:
+            return self._br.flush()
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._br is not None:
+            return self._br.finish()
+        return self._zlib.flush()
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    out: List[Tuple[bytes, bytes]] = []
+    found = False
+    for k, v in headers:
+        if k.lower() == b"vary":
+            found = True
+            values = {x.strip().lower() for x in v.split(b",")}
+            if b"accept-encoding" not in values and b"*" not in values:
+                v = v + b", Accept-Encoding"
+        out.append((k, v))
+    if not found:
+        out.append((b"vary", b"Accept-Encoding"))
+    return out
+
+
+def _compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    ctype = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    return ctype.startswith(_COMPRESSIBLE) and not ctype.startswith(_NEVER)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI : compression négociée (voir l'en-tête du module)."""
+
+    def __init__(self, app: Callable, minimum_size: Optional[int] = None) -> None:
+        self.app = app
+        self.minimum_size = (
+            settings.response_compression_min_bytes
+            if minimum_size is None
+            else minimum_size
+        )
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = b""
+        for k, v in scope.get("headers") or []:
+            if k == b"accept-encoding":
+                accept = v
+                break
+        encoding = negotiate(accept.decode("latin-1")) if accept else None
+        minimum = self.minimum_size
+
+        start: Optional[dict] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def _send(message: dict) -> None:
+            nonlocal start, compressor, passthrough
+            kind = message["type"]
+            if kind == "http.response.start":
+                start = message
+                return
+            if kind != "http.response.body" or start is None:
+                await send(message)
+                return
+            body: bytes = message.get("body", b"")
+            more = message.get("more_body", False)
+
+            if passthrough:
+                await send(message)
+                return
+            if compressor is not None:
+                chunk = compressor.compress(body)
+                if more:
+                    if body:
+                        chunk += compressor.flush()
+                else:
+                    chunk += compressor.finish()
+                if chunk or not more:
+                    await send({"type": kind, "body": chunk, "more_body": more})
+                return
+
+            # Premier morceau du corps : décision.
+            headers: List[Tuple[bytes, bytes]] = list(start.get("headers") or [])
+            eligible = start["status"] not in _SKIP_STATUS and _compressible(headers)
+            if eligible:
+                if more:
+                    declared = _header(headers, b"content-length")
+                    eligible = declared is None or int(declared) >= minimum
+                else:
+                    eligible = len(body) >= minimum
+            if not eligible:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            headers = _add_vary(headers)
+            if encoding is None:
+                passthrough = True
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            compressor = _Compressor(encoding)
+            headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode()))
+            if more:
+                chunk = compressor.compress(body) + compressor.flush()
+            else:
+                chunk = compressor.compress(body) + compressor.finish()
+                headers.append((b"content-length", str(len(chunk)).encode()))
+            await send({**start, "headers": headers})
+            await send({"type": kind, "body": chunk, "more_body": more})
+
+        await self.app(scope, receive, _send)
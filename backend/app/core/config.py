@@ -145,6 +145,31 @@ class Settings(BaseSettings):
     # jobs (alternative gratuite aux Render Cron Jobs payants).
     cron_secret: Optional[str] = None
 
+    # Traitement des PDF (services/pdf_documents) : mémoire maximale des
+    # pages rendues en même temps (bitmaps décodés, tout le process) et
+    # taille au-delà de laquelle un PDF téléversé est spoolé sur disque.
+    # Instance Render 512 Mo : garder le budget bien sous la moitié.
+    pdf_render_budget_mb: int = 96
+    pdf_spool_memory_kb: int = 1024
+
+    # Instrumentation des requêtes (core/request_metrics) : compteur SQL
+    # et histogrammes par route, en-tête Server-Timing hors production.
+    # Une même forme de requête exécutée ``query_repeat_threshold`` fois
+    # dans une requête HTTP est signalée comme N+1 probable.
+    request_metrics_enabled: bool = True
+    query_repeat_threshold: int = 10
+    # Compression gzip / brotli négociée (core/compression) : corps
+    # texte / JSON d'au moins ce nombre d'octets.
+    response_compression_enabled: bool = True
+    response_compression_min_bytes: int = 1024
+    # Journal d'audit tamponné (services/audit) : les entrées validées
+    # partent en INSERT multi-lignes par paquets de ``audit_flush_rows``
+    # ou toutes les ``audit_flush_interval_s`` secondes. False = écriture
+    # dans la transaction de l'appelant, comme avant.
+    audit_buffer_enabled: bool = True
+    audit_flush_rows: int = 200
+    audit_flush_interval_s: float = 2.0
+
     # Anthropic (SEO content + validation — usage hors extraction lead)
     anthropic_api_key: Optional[str] = None
     # Feature flag pour la ré-extraction Claude (Couche 3, payante).
@@ -27,10 +27,16 @@ async def visible_immeuble_ids(
 
     Returns ``None`` for managers+ (meaning "no restriction, see all").
     Returns a possibly-empty set for employees (only the immeubles they
-    were assigned to via ``user_immeubles``).
+    were assigned to via ``user_immeubles``). Served from the user's
+    access snapshot when it is fresh.
     """
     if user.has_min_role("manager"):
         return None
+    from app.services.access_snapshot import current_snapshot
+
+    snap = current_snapshot(user)
+    if snap is not None:
+        return set(snap.visible_immeuble_ids)
     rows = (
         await db.execute(
             select(UserImmeuble.immeuble_id).where(
@@ -47,10 +53,16 @@ async def visible_project_ids(
     """Return the set of project IDs the user can see.
 
     Returns ``None`` for managers+ (meaning "no restriction, see all").
-    Returns a possibly-empty set for employees.
+    Returns a possibly-empty set for employees. Served from the user's
+    access snapshot when it is fresh.
     """
     if user.has_min_role("manager"):
         return None
+    from app.services.access_snapshot import current_snapshot
+
+    snap = current_snapshot(user)
+    if snap is not None:
+        return set(snap.visible_project_ids)
     rows = (
         await db.execute(
             select(ProjectMember.project_id).where(
@@ -0,0 +1,268 @@
+"""Instrumentation des requêtes : nombre et durée des requêtes SQL, N+1.
+
+Les endpoints lents ou trop bavards étaient trouvés à la main (cf.
+``tests/smoke/test_smoke_immo_perf.py``). Ici :
+
+- ``track()`` ouvre un compteur ``RequestStats`` dans le contexte courant
+  (``ContextVar`` : suit la requête HTTP à travers les greenlets de
+  SQLAlchemy async). Les compteurs s'emboîtent : une instruction SQL est
+  comptée dans chaque compteur ouvert (le middleware ET un test qui
+  encadre plusieurs appels) ;
+- ``record_statement`` est appelé par les hooks ``before/after_cursor_execute``
+  posés sur l'engine (``app.db.session``). Chaque instruction est réduite
+  à sa « forme » (listes ``IN`` et littéraux effacés) : une même forme
+  répétée ``query_repeat_threshold`` fois dans une requête = N+1 probable ;
+- ``QueryMetricsMiddleware`` (ASGI pur) : compteur par requête, en-tête
+  ``Server-Timing`` hors production, histogrammes par route (gabarit
+  ``/immeubles/{id}``, pas l'URL brute) lus par ``/admin/metrics``.
+
+Histogrammes en mémoire du worker (perdus au redémarrage) : un outil de
+diagnostic, pas un stockage de métriques.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+#: Bornes supérieures (ms) des classes de latence ; la dernière est ouverte.
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+#: Bornes supérieures des classes de nombre de requêtes SQL.
+QUERY_BUCKETS: Tuple[int, ...] = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Forme normalisée d'une instruction : deux requêtes qui ne diffèrent
+    que par leurs valeurs (ou la taille d'une liste ``IN``) ont la même."""
+    shape = _IN_LIST.sub("IN (…)", statement)
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class RequestStats:
+    """Instructions SQL exécutées dans un ``track()``."""
+
+    __slots__ = ("queries", "sql_ms", "shapes", "started", "parent")
+
+    def __init__(self, parent: Optional["RequestStats"] = None) -> None:
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.started = time.perf_counter()
+        self.parent = parent
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Formes exécutées au moins ``threshold`` fois (N+1 probables),
+        les plus fréquentes d'abord."""
+        limit = threshold or settings.query_repeat_threshold
+        return [(s, n) for s, n in self.shapes.most_common() if n >= limit]
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_sql_stats", default=None
+)
+
+
+@contextlib.contextmanager
+def track() -> Iterator[RequestStats]:
+    """Compte les instructions SQL exécutées dans le bloc."""
+    stats = RequestStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def record_statement(statement: str, elapsed_ms: float) -> None:
+    stats = _current.get()
+    if stats is None:
+        return
+    shape = statement_shape(statement)
+    while stats is not None:
+        stats.queries += 1
+        stats.sql_ms += elapsed_ms
+        stats.shapes[shape] += 1
+        stats = stats.parent
+
+
+# ── Histogrammes par route ────────────────────────────────────────
+
+
+def _bucket(bounds: Tuple[float, ...], value: float) -> int:
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            return i
+    return len(bounds)
+
+
+class _RouteHistogram:
+    __slots__ = (
+        "count", "latency", "latency_sum", "latency_max",
+        "queries", "queries_sum", "queries_max", "n_plus_one", "worst",
+    )
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.latency = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.queries = [0] * (len(QUERY_BUCKETS) + 1)
+        self.queries_sum = 0
+        self.queries_max = 0
+        self.n_plus_one = 0
+        # Forme la plus répétée vue sur cette route : (forme, répétitions).
+        self.worst: Optional[Tuple[str, int]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        def _buckets(bounds, counts):
+            labels = [f"<={b}" for b in bounds] + [f">{bounds[-1]}"]
+            return dict(zip(labels, counts))
+
+        return {
+            "count": self.count,
+            "latency_ms": {
+                "avg": round(self.latency_sum / self.count, 1),
+                "max": round(self.latency_max, 1),
+                "buckets": _buckets(LATENCY_BUCKETS_MS, self.latency),
+            },
+            "queries": {
+                "avg": round(self.queries_sum / self.count, 1),
+                "max": self.queries_max,
+                "buckets": _buckets(QUERY_BUCKETS, self.queries),
+            },
+            "n_plus_one": self.n_plus_one,
+            "worst_repeat": (
+                {"statement": self.worst[0], "count": self.worst[1]}
+                if self.worst else None
+            ),
+        }
+
+
+_routes: Dict[str, _RouteHistogram] = {}
+_routes_lock = threading.Lock()
+
+
+def observe(route: str, stats: RequestStats, latency_ms: float) -> None:
+    """Verse une requête terminée dans l'histogramme de sa route."""
+    repeated = stats.repeated()
+    if repeated:
+        shape, n = repeated[0]
+        log.warning(
+            "N+1 probable sur %s : %d× « %s » (%d requêtes SQL)",
+            route, n, shape[:200], stats.queries,
+        )
+    with _routes_lock:
+        h = _routes.get(route)
+        if h is None:
+            h = _routes[route] = _RouteHistogram()
+        h.count += 1
+        h.latency[_bucket(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        h.latency_sum += latency_ms
+        h.latency_max = max(h.latency_max, latency_ms)
+        h.queries[_bucket(QUERY_BUCKETS, stats.queries)] += 1
+        h.queries_sum += stats.queries
+        h.queries_max = max(h.queries_max, stats.queries)
+        if repeated:
+            h.n_plus_one += 1
+            if h.worst is None or repeated[0][1] > h.worst[1]:
+                h.worst = repeated[0]
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Histogrammes par route (``"GET /api/v1/…"``), triés par SQL moyen."""
+    with _routes_lock:
+        data = {route: h.as_dict() for route, h in _routes.items()}
+    return dict(
+        sorted(data.items(), key=lambda kv: -kv[1]["queries"]["avg"])
+    )
+
+
+def reset() -> None:
+    with _routes_lock:
+        _routes.clear()
+
+
+# ── Middleware ────────────────────────────────────────────────────
+
+
+def _route_label(scope: dict) -> str:
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        # Pas de route résolue (404, fichiers statiques) : un seul seau
+        # plutôt qu'une entrée par URL.
+        return f"{scope.get('method', '')} <unmatched>"
+    # Le gabarit d'une route incluse via ``include_router(prefix=…)`` ne
+    # porte pas le préfixe (/api/v1) : on le reprend de l'URL réelle, en
+    # cherchant le segment à partir duquel le gabarit correspond.
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    prefix = ""
+    if regex is not None and not regex.match(path):
+        for i, ch in enumerate(path):
+            if ch == "/" and i and regex.match(path[i:]):
+                prefix = path[:i]
+                break
+    return f"{scope.get('method', '')} {prefix}{template}"
+
+
+class QueryMetricsMiddleware:
+    """Middleware ASGI : compteur SQL par requête HTTP, ``Server-Timing``
+    hors production, histogrammes par route."""
+
+    def __init__(self, app, server_timing: Optional[bool] = None) -> None:
+        self.app = app
+        self.server_timing = (
+            not settings.is_production if server_timing is None
+            else server_timing
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track() as stats:
+            async def _send(message) -> None:
+                if message["type"] == "http.response.start" and self.server_timing:
+                    timing = (
+                        f'db;dur={stats.sql_ms:.1f};desc="{stats.queries} queries", '
+                        f"app;dur={stats.elapsed_ms:.1f}"
+                    )
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timing.encode("latin-1"))
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                observe(_route_label(scope), stats, stats.elapsed_ms)
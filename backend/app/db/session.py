@@ -9,15 +9,18 @@ Provides:
 
 import json
 import logging
+import time
 from collections.abc import AsyncGenerator
 from typing import Optional
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 
+from app.core import request_metrics
 from app.core.config import settings
 
 
@@ -31,6 +34,25 @@ engine = create_async_engine(
     max_overflow=10,
 )
 
+
+# Instrumentation : chaque instruction SQL est comptée (et chronométrée)
+# dans la requête HTTP en cours — voir app.core.request_metrics. Hors
+# requête suivie (crons, démarrage), record_statement ne fait rien.
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _sql_started(conn, cursor, statement, parameters, context, executemany):
+    context._sql_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _sql_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_started", None)
+    if started is None:
+        return
+    request_metrics.record_statement(
+        statement, (time.perf_counter() - started) * 1000
+    )
+
+
 # Session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -162,6 +184,9 @@ async def ensure_critical_columns() -> None:
         # Sans cette colonne, GET /api/v1/contact (pipeline construction)
         # plante → « Impossible de charger les prospects » (régression #785).
         ("contact_requests", "lost_reason", "VARCHAR(120)"),
+        # Clé de dédup des notifications (cron relancé) : sans elle,
+        # tout SELECT de la cloche plante.
+        ("notifications", "dedup_key", "VARCHAR(255)"),
         # Rappel planifié sur un prospect (badge « à rappeler » dans le CRM).
         ("contact_requests", "rappel_at", "TIMESTAMP WITH TIME ZONE"),
         # Coffre Abonnements : quantité (prix unitaire × N). La table
@@ -188,6 +213,10 @@ async def ensure_critical_columns() -> None:
         # Id de la Purchase (dépense) QB importée comme Achat.
         ("achats", "qbo_purchase_id", "VARCHAR(64)"),
         ("voice_calls", "dial_state_json", "TEXT"),
+        # Latence par tour de la secrétaire IA (webhook → TwiML, IA).
+        ("voice_call_turns", "latency_ms", "INTEGER"),
+        ("voice_call_turns", "llm_ms", "INTEGER"),
+        ("voice_call_turns", "llm_first_token_ms", "INTEGER"),
         # Hub Automatisations : config éditable (cadence, etc.). La table
         # a été créée sans cette colonne au 1er déploiement → on l'ajoute.
         ("automation_settings", "config_json", "TEXT"),
@@ -531,6 +560,19 @@ async def ensure_critical_columns() -> None:
         # v7 — suggestion IA (pré-sélection à confirmer, jamais auto).
         ("qbo_transactions_loyers", "suggestion_bail_id", "INTEGER"),
         ("qbo_transactions_loyers", "suggestion_confiance", "DOUBLE PRECISION"),
+        # Synchro iCal conditionnelle + diff par flux : validateurs HTTP
+        # du dernier import et rattachement de chaque bloc à SON flux.
+        ("user_calendar_feeds", "etag", "VARCHAR(255)"),
+        ("user_calendar_feeds", "last_modified", "VARCHAR(64)"),
+        ("user_calendar_feeds", "content_hash", "VARCHAR(64)"),
+        ("user_calendar_feeds", "window_end", "DATE"),
+        ("external_busy_blocks", "feed_id", "INTEGER"),
+        # Générations IA quotidiennes : empreinte de l'état analysé
+        # (réutilisation sans appel IA quand rien n'a changé).
+        ("qg_summaries", "input_hash", "VARCHAR(64)"),
+        ("kratos_problems", "input_hash", "VARCHAR(64)"),
+        # REQ : adresse normalisée pour le lookup trigramme.
+        ("req_companies", "adresse_normalized", "VARCHAR(500)"),
     )
     for table, column, col_type in critical_columns:
         try:
@@ -1124,6 +1166,7 @@ async def ensure_timesheet_tables() -> None:
         from app.db.base import Base
         from app.models.timesheet import (  # noqa: F401
             Timesheet,
+            TimesheetBalance,
             TimesheetCompany,
             TimesheetEntry,
             TimesheetReglement,
@@ -1136,6 +1179,7 @@ async def ensure_timesheet_tables() -> None:
             TimesheetEntry.__table__,
             TimesheetUserRate.__table__,
             TimesheetReglement.__table__,
+            TimesheetBalance.__table__,
         ]
         async with engine.begin() as conn:
             await conn.run_sync(
@@ -1188,6 +1232,24 @@ async def ensure_timesheet_tables() -> None:
             )
     except Exception as exc:  # noqa: BLE001
         log.warning("ensure_timesheet_tables failed: %s", exc)
+    # Livre des soldes réconcilié avec l'historique à CHAQUE démarrage :
+    # ``init_db`` crée la table tôt et les deltas des écritures servies
+    # pendant le démarrage la rendent non vide sans qu'elle soit complète
+    # — un test « table vide » sauterait la construction pour de bon.
+    # Seuls les employés en écart sont réécrits (tous au premier passage).
+    try:
+        from app.services.timesheet_ledger import reconcile_balances
+
+        async with AsyncSessionLocal() as db:
+            issues = await reconcile_balances(db)
+            if issues:
+                await db.commit()
+                log.info(
+                    "timesheet_balances réconcilié : %d employé(s)",
+                    len({i["user_id"] for i in issues}),
+                )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_timesheet_tables ledger backfill failed: %s", exc)
 
 
 async def ensure_project_corrections_tables() -> None:
@@ -1430,7 +1492,8 @@ async def ensure_esign_tables() -> None:
     documents, pôle Gestion d'entreprise) dans leur PROPRE transaction :
     `esign_documents`, `esign_signers`, `esign_fields`, `esign_events`,
     plus les tables V2 (`esign_templates`, `esign_template_fields`,
-    `esign_observers`, `esign_attachments`) et les colonnes additives
+    `esign_observers`, `esign_attachments`), le cache des pages rendues
+    (`esign_page_images`) et les colonnes additives
     V2 (expiration, rappels automatiques) sur les tables V1 déjà
     créées en prod.
 
@@ -1448,6 +1511,7 @@ async def ensure_esign_tables() -> None:
             EsignEvent,
             EsignField,
             EsignObserver,
+            EsignPageImage,
             EsignSigner,
             EsignTemplate,
             EsignTemplateField,
@@ -1466,6 +1530,7 @@ async def ensure_esign_tables() -> None:
                         EsignTemplateField.__table__,
                         EsignObserver.__table__,
                         EsignAttachment.__table__,
+                        EsignPageImage.__table__,
                     ],
                 )
             )
@@ -1491,6 +1556,178 @@ async def ensure_esign_tables() -> None:
         log.warning("ensure_esign_tables failed: %s", exc)
 
 
+async def ensure_dedupe_tables() -> None:
+    """Crée l'index de déduplication (`dedupe_entries`,
+    `dedupe_fingerprints`) dans sa propre transaction, pour survivre à un
+    abort d'``init_db``. L'index vide est construit par la première
+    passe de dédup (reconstruction complète)."""
+    import logging
+
+    log = logging.getLogger("db.ensure_dedupe_tables")
+    try:
+        from app.db.base import Base
+        from app.models.dedupe_index import DedupeEntry, DedupeFingerprint
+
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda c: Base.metadata.create_all(
+                    c,
+                    tables=[DedupeEntry.__table__, DedupeFingerprint.__table__],
+                )
+            )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_dedupe_tables failed: %s", exc)
+
+
+async def ensure_mail_outbox_tables() -> None:
+    """Crée l'outbox des courriels (`mail_outbox`,
+    `mail_outbox_attachments`) dans sa propre transaction, pour survivre
+    à un abort d'``init_db``."""
+    import logging
+
+    log = logging.getLogger("db.ensure_mail_outbox_tables")
+    try:
+        from app.db.base import Base
+        from app.models.mail_outbox import OutboundMail, OutboundMailAttachment
+
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda c: Base.metadata.create_all(
+                    c,
+                    tables=[
+                        OutboundMail.__table__,
+                        OutboundMailAttachment.__table__,
+                    ],
+                )
+            )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_mail_outbox_tables failed: %s", exc)
+
+
+async def ensure_notification_tables() -> None:
+    """Crée ``notification_counters`` et l'index unique de dédup
+    ``uq_notifications_user_dedup`` (``notifications`` préexiste :
+    create_all ne pose pas l'index), chacun dans sa transaction, puis
+    recalcule les compteurs depuis ``notifications`` à CHAQUE démarrage :
+    un test « table vide » raterait les compteurs créés par les écritures
+    de la fenêtre de démarrage, qui les rendent non vides mais partiels."""
+    import logging
+    from sqlalchemy import text
+
+    log = logging.getLogger("db.ensure_notification_tables")
+    try:
+        from app.db.base import Base
+        from app.models.notification import NotificationCounter
+
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda c: Base.metadata.create_all(
+                    c, tables=[NotificationCounter.__table__]
+                )
+            )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_notification_tables create_all failed: %s", exc)
+        return
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS "
+                    "uq_notifications_user_dedup "
+                    "ON notifications (user_id, dedup_key)"
+                )
+            )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_notification_tables index failed: %s", exc)
+    try:
+        from app.services.notifications import rebuild_counters
+
+        async with AsyncSessionLocal() as db:
+            await rebuild_counters(db)
+            await db.commit()
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_notification_tables backfill failed: %s", exc)
+
+
+async def ensure_req_search_indexes() -> None:
+    """Lookup REQ par similarité : extension ``pg_trgm`` et index GIN
+    trigrammes sur ``nom_normalized`` / ``adresse_normalized`` (Postgres
+    seulement — create_all ne sait pas les poser). Le calcul des adresses
+    normalisées des lignes importées avant la colonne part dans la file
+    de travaux (``req.backfill_normalized``, un seul en attente) : il ne
+    retarde ni ce démarrage ni les ``ensure_*`` suivants."""
+    import logging
+    from sqlalchemy import text
+
+    log = logging.getLogger("db.ensure_req_search_indexes")
+    if engine.dialect.name == "postgresql":
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for index, column in (
+                ("ix_req_nom_trgm", "nom_normalized"),
+                ("ix_req_adresse_trgm", "adresse_normalized"),
+            ):
+                async with engine.begin() as conn:
+                    await conn.execute(
+                        text(
+                            f"CREATE INDEX IF NOT EXISTS {index} ON req_companies "
+                            f"USING gin ({column} gin_trgm_ops)"
+                        )
+                    )
+        except Exception as exc:  # noqa: BLE001
+            log.warning("ensure_req_search_indexes index failed: %s", exc)
+    try:
+        from app.integrations.req.companies import schedule_backfill
+
+        async with AsyncSessionLocal() as db:
+            await schedule_backfill(db)
+            await db.commit()
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_req_search_indexes backfill failed: %s", exc)
+
+
+async def ensure_immobilier_rollup_tables() -> None:
+    """Crée ``imm_maintenance_rollups`` / ``imm_depot_rollups`` dans leur
+    propre transaction, puis réconcilie les agrégats à CHAQUE démarrage.
+
+    Pas de test « tables vides » : ``init_db`` les crée tôt et les
+    rafraîchissements incrémentaux de la fenêtre de démarrage les
+    rendent non vides sans qu'elles soient complètes. ``reconcile_rollups``
+    recalcule tout et ne réécrit que les immeubles en écart (tous au
+    premier démarrage, aucun ensuite)."""
+    import logging
+
+    log = logging.getLogger("db.ensure_immobilier_rollup_tables")
+    try:
+        from app.db.base import Base
+        from app.models.immobilier_rollup import DepotRollup, MaintenanceRollup
+
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda c: Base.metadata.create_all(
+                    c,
+                    tables=[MaintenanceRollup.__table__, DepotRollup.__table__],
+                )
+            )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_immobilier_rollup_tables failed: %s", exc)
+        return
+    try:
+        from app.services.immobilier_rollups import reconcile_rollups
+
+        async with AsyncSessionLocal() as db:
+            issues = await reconcile_rollups(db)
+            if issues:
+                await db.commit()
+                log.info(
+                    "rollups immobilier réconciliés : %d immeubles",
+                    len({i["immeuble_id"] for i in issues}),
+                )
+    except Exception as exc:  # noqa: BLE001
+        log.warning("ensure_immobilier_rollup_tables backfill failed: %s", exc)
+
+
 async def ensure_invest_portal_tables() -> None:
     """Crée les tables du Portail Investisseur v2 (participation par
     compagnie) dans leur PROPRE transaction : `inv_participations`,
@@ -2831,6 +3068,20 @@ async def init_db() -> None:
                 "mtl_property_units",
                 "(arrondissement)",
             ),
+            # Recherche plein texte du blog (/blog/search) : même
+            # expression que blog._fts_document, une par locale.
+            *(
+                (
+                    f"ix_seo_articles_fts_{loc}",
+                    "seo_articles",
+                    "USING gin ((setweight(to_tsvector("
+                    f"'{cfg}'::regconfig, coalesce(title, '')), 'A') || "
+                    f"setweight(to_tsvector('{cfg}'::regconfig, "
+                    f"coalesce(content_md, '')), 'B'))) "
+                    f"WHERE locale = '{loc}'",
+                )
+                for loc, cfg in (("fr", "french"), ("en", "english"))
+            ),
         )
         for idx_name, table, expr in additive_indexes:
             try:
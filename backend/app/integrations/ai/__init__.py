@@ -39,6 +39,7 @@ from app.integrations.ai._base import (
 from app.integrations.ai._factory import (
     chat,
     chat_provider,
+    chat_stream,
     complete,
     current_provider,
     embed,
@@ -55,6 +56,7 @@ __all__ = [
     "Message",
     "chat",
     "chat_provider",
+    "chat_stream",
     "complete",
     "current_provider",
     "embed",
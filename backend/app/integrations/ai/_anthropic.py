@@ -7,9 +7,10 @@ Claude Sonnet 4.6 (rapport qualité/prix). Pour Opus, surcharge via
 
 from __future__ import annotations
 
+import json
 import logging
 import os
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 import httpx
 
@@ -127,6 +128,89 @@ class AnthropicProvider:
             raw=data,
         )
 
+    async def chat_stream(
+        self,
+        *,
+        messages: List[Message],
+        system: Optional[str] = None,
+        cached_system: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Streame la réponse (SSE ``content_block_delta``) morceau par
+        morceau. ``cached_system`` est envoyé comme premier bloc system
+        marqué ``cache_control: ephemeral`` : Anthropic réutilise alors le
+        préfixe déjà traité (TTL ~5 min) au lieu de le re-tokeniser à
+        chaque tour. Fermer le générateur avant la fin coupe la requête
+        HTTP — la génération s'arrête côté serveur."""
+        self._check_key()
+        model = model or os.getenv("AI_MODEL") or self.default_completion_model
+
+        body: dict = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            "messages": [
+                {"role": m.role, "content": m.content}
+                for m in messages
+                if m.role in ("user", "assistant")
+            ],
+        }
+        blocks: list[dict] = []
+        if cached_system:
+            blocks.append(
+                {
+                    "type": "text",
+                    "text": cached_system,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            )
+        if system:
+            blocks.append({"type": "text", "text": system})
+        if blocks:
+            body["system"] = blocks
+
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": ANTHROPIC_VERSION,
+            "content-type": "application/json",
+        }
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            try:
+                async with client.stream(
+                    "POST",
+                    f"{ANTHROPIC_BASE}/messages",
+                    json=body,
+                    headers=headers,
+                ) as resp:
+                    if resp.status_code >= 400:
+                        detail = (await resp.aread()).decode(
+                            "utf-8", "replace"
+                        )
+                        raise AIProviderError(
+                            f"Anthropic HTTP {resp.status_code}: {detail[:300]}"
+                        )
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        try:
+                            event = json.loads(line[5:].strip())
+                        except ValueError:
+                            continue
+                        if event.get("type") == "error":
+                            raise AIProviderError(
+                                f"Anthropic stream : {event.get('error')}"
+                            )
+                        delta = event.get("delta") or {}
+                        if delta.get("type") == "text_delta" and delta.get(
+                            "text"
+                        ):
+                            yield delta["text"]
+            except httpx.HTTPError as exc:
+                raise AIProviderError(f"Anthropic réseau : {exc}") from exc
+
     async def embed(self, *, text: str, model: Optional[str] = None) -> EmbeddingResult:
         # Pas d'embedding natif — le factory route ailleurs.
         raise AIProviderUnavailable(
@@ -8,7 +8,7 @@ variable d'environnement, sans toucher au code applicatif.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Optional, Protocol
+from typing import AsyncIterator, List, Optional, Protocol
 
 
 @dataclass
@@ -96,3 +96,26 @@ class AIProvider(Protocol):
         text: str,
         model: Optional[str] = None,
     ) -> EmbeddingResult: ...
+
+
+class StreamingAIProvider(AIProvider, Protocol):
+    """Provider capable de streamer la complétion token par token.
+
+    Optionnel : le factory teste ``hasattr(p, "chat_stream")`` et retombe
+    sur ``chat()`` (un seul morceau) pour les providers qui ne streament
+    pas. ``cached_system`` est la partie STATIQUE du system prompt, placée
+    en tête ; les providers qui supportent le cache de prompt côté serveur
+    (Anthropic ``cache_control``) la marquent comme cacheable, les autres
+    la concatènent simplement devant ``system``.
+    """
+
+    def chat_stream(
+        self,
+        *,
+        messages: List[Message],
+        system: Optional[str] = None,
+        cached_system: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]: ...
@@ -15,7 +15,7 @@ from __future__ import annotations
 import logging
 import os
 from functools import lru_cache
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 from app.integrations.ai._anthropic import AnthropicProvider
 from app.integrations.ai._base import (
@@ -220,6 +220,75 @@ async def chat(
     raise AIProviderUnavailable("Aucun provider IA disponible.")
 
 
+async def chat_stream(
+    *,
+    messages: List[Message],
+    system: Optional[str] = None,
+    cached_system: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    model: Optional[str] = None,
+    prefer: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Multi-turn chat en STREAMING : produit le texte morceau par morceau.
+
+    ``cached_system`` : partie statique du system prompt (toujours placée
+    en tête). Les providers qui le supportent la mettent en cache côté
+    serveur ; ``system`` reste la partie dynamique, jamais cachée.
+
+    Fallback : un provider qui échoue AVANT d'avoir produit le moindre
+    morceau est remplacé par le suivant de la chaîne. Une erreur en
+    cours de flux est propagée (on ne peut pas « dé-dire » le début).
+    Les providers sans ``chat_stream`` (Gemini) passent par ``chat()`` et
+    produisent la réponse en un seul morceau.
+    """
+    chain = _build_chain()
+    if prefer:
+        chain = sorted(chain, key=lambda p: 0 if p.name == prefer else 1)
+    last_err: Optional[Exception] = None
+    for p in chain:
+        started = False
+        try:
+            if hasattr(p, "chat_stream"):
+                async for piece in p.chat_stream(  # type: ignore[attr-defined]
+                    messages=messages,
+                    system=system,
+                    cached_system=cached_system,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    model=model,
+                ):
+                    started = True
+                    yield piece
+            else:
+                full_system = "\n\n".join(
+                    part for part in (cached_system, system) if part
+                )
+                result = await p.chat(
+                    messages=messages,
+                    system=full_system or None,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    model=model,
+                )
+                started = True
+                yield result.text
+            return
+        except AIProviderUnavailable:
+            continue
+        except Exception as exc:  # noqa: BLE001
+            if started:
+                raise
+            last_err = exc
+            log.warning(
+                "AI provider %s stream failed (%s) — fallback", p.name, exc
+            )
+            continue
+    if last_err:
+        raise last_err
+    raise AIProviderUnavailable("Aucun provider IA disponible.")
+
+
 async def embed(
     text: str,
     *,
@@ -7,9 +7,10 @@ sur Gemini pour les embeddings dans ce cas.
 
 from __future__ import annotations
 
+import json
 import logging
 import os
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
 import httpx
 
@@ -120,6 +121,75 @@ class GroqProvider:
             raw=data,
         )
 
+    async def chat_stream(
+        self,
+        *,
+        messages: List[Message],
+        system: Optional[str] = None,
+        cached_system: Optional[str] = None,
+        max_tokens: int = 1024,
+        temperature: float = 0.7,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Streame la réponse (SSE format OpenAI, ``stream: true``).
+
+        Groq n'expose pas de ``cache_control`` explicite : on place la
+        partie statique (``cached_system``) EN TÊTE du message system pour
+        que le préfixe reste identique d'un tour à l'autre (condition du
+        cache de préfixe automatique côté Groq)."""
+        self._check_key()
+        model = model or os.getenv("AI_MODEL") or self.default_completion_model
+
+        system_text = "\n\n".join(p for p in (cached_system, system) if p)
+        msgs = []
+        if system_text:
+            msgs.append({"role": "system", "content": system_text})
+        for m in messages:
+            if m.role in ("user", "assistant", "system"):
+                msgs.append({"role": m.role, "content": m.content})
+
+        body = {
+            "model": model,
+            "messages": msgs,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            try:
+                async with client.stream(
+                    "POST",
+                    f"{GROQ_BASE}/chat/completions",
+                    json=body,
+                    headers=headers,
+                ) as resp:
+                    if resp.status_code >= 400:
+                        detail = (await resp.aread()).decode(
+                            "utf-8", "replace"
+                        )
+                        raise AIProviderError(
+                            f"Groq HTTP {resp.status_code}: {detail[:300]}"
+                        )
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        payload = line[5:].strip()
+                        if payload == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(payload)
+                            text = chunk["choices"][0]["delta"].get("content")
+                        except (ValueError, KeyError, IndexError, TypeError):
+                            continue
+                        if text:
+                            yield text
+            except httpx.HTTPError as exc:
+                raise AIProviderError(f"Groq réseau : {exc}") from exc
+
     async def embed(self, *, text: str, model: Optional[str] = None) -> EmbeddingResult:
         raise AIProviderUnavailable(
             "Groq ne fournit pas d'API embedding native."
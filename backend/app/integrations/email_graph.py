@@ -3,14 +3,24 @@ Microsoft Graph mailer — sends emails from info@immohorizon.com using
 OAuth client-credentials flow (Azure App registration).
 
 Ported from bridge-web; kept minimal and async.
+
+- ``send`` : un courriel, un aller-retour (envois ponctuels) ;
+- ``send_batch`` : envois en nombre (outbox ``app.services.mail_outbox``)
+  — ``sendMail`` groupés par requêtes ``$batch`` (20 par appel) ;
+- pièces jointes au-delà de ``INLINE_ATTACHMENTS_MAX`` : brouillon +
+  session de téléversement par morceaux au lieu du base64 en ligne ;
+- ``Retry-After`` (429/503) retenu PAR BOÎTE d'envoi : les envois
+  suivants de la même boîte attendent, les autres boîtes non.
 """
 
 from __future__ import annotations
 
+import asyncio
+import base64
 import logging
 import time
 from dataclasses import dataclass, field
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import httpx
 
@@ -19,7 +29,23 @@ from app.core.config import settings
 log = logging.getLogger(__name__)
 
 _TOKEN_URL = "https://login.microsoftonline.com/{tenant}/oauth2/v2.0/token"
-_SEND_URL = "https://graph.microsoft.com/v1.0/users/{sender}/sendMail"
+_GRAPH_URL = "https://graph.microsoft.com/v1.0"
+_SEND_URL = _GRAPH_URL + "/users/{sender}/sendMail"
+_BATCH_URL = _GRAPH_URL + "/$batch"
+
+# Limite Graph : 20 requêtes par $batch.
+BATCH_MAX_REQUESTS = 20
+# Corps d'un $batch gardé sous la limite de 4 Mo d'une requête Graph.
+_BATCH_MAX_BYTES = 3_500_000
+# Pièces jointes en ligne (base64) jusqu'à ce total ; au-delà, session de
+# téléversement (base64 = +33 % : 3 Mo bruts ≈ la limite de 4 Mo).
+INLINE_ATTACHMENTS_MAX = 3 * 1024 * 1024
+# Morceaux de téléversement : multiple de 320 Kio exigé par Graph.
+_UPLOAD_CHUNK = 10 * 320 * 1024
+_THROTTLED = {429, 503}
+_MAX_429_RETRIES = 3
+# Retry-After plus long : on n'immobilise pas le worker, la file reprend.
+_MAX_THROTTLE_WAIT_SECONDS = 60.0
 
 
 @dataclass
@@ -35,6 +61,78 @@ class EmailAttachment:
     content_type: str = "application/octet-stream"
 
 
+@dataclass
+class OutgoingMail:
+    """Arguments de ``GraphMailer.send``, pour ``send_batch``."""
+
+    to: List[str]
+    subject: str
+    html_body: str
+    cc: Optional[List[str]] = None
+    bcc: Optional[List[str]] = None
+    reply_to: Optional[str] = None
+    attachments: Optional[List[EmailAttachment]] = None
+    internal: bool = False
+    from_email: Optional[str] = None
+    from_name: Optional[str] = None
+    request_read_receipt: bool = False
+
+
+@dataclass
+class _Composed:
+    sender: str
+    message: dict
+    # Pièces jointes trop grosses pour le corps (session de téléversement).
+    uploads: List[EmailAttachment] = field(default_factory=list)
+
+
+class GraphSendError(RuntimeError):
+    """Échec d'envoi Graph. ``retryable`` : limitation ou panne passagère
+    (à reprendre) ; sinon refus définitif (adresse invalide, 4xx)."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(f"Graph {status} : {message}")
+        self.status = status
+        self.retryable = status == 0 or status in _THROTTLED or status >= 500
+
+
+def _retry_after(headers, attempt: int) -> float:
+    try:
+        return float(headers.get("Retry-After") or headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 2.0 * 2**attempt
+
+
+def _error_text(body) -> str:
+    if isinstance(body, dict):
+        err = body.get("error") or {}
+        if isinstance(err, dict) and err.get("message"):
+            return f"{err.get('code') or ''} {err['message']}".strip()
+    return str(body)[:300]
+
+
+def _batches(
+    items: List[Tuple[int, _Composed]],
+) -> Iterator[List[Tuple[int, _Composed]]]:
+    """Paquets de ``BATCH_MAX_REQUESTS`` sous ``_BATCH_MAX_BYTES``."""
+    chunk: List[Tuple[int, _Composed]] = []
+    size = 0
+    for item in items:
+        # Estimation : corps HTML + pièces jointes base64 en ligne.
+        weight = len(item[1].message["body"]["content"]) + sum(
+            len(a["contentBytes"]) for a in item[1].message.get("attachments", [])
+        )
+        if chunk and (
+            len(chunk) >= BATCH_MAX_REQUESTS or size + weight > _BATCH_MAX_BYTES
+        ):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += weight
+    if chunk:
+        yield chunk
+
+
 class GraphMailer:
     def __init__(self) -> None:
         self.tenant = settings.azure_tenant_id
@@ -42,6 +140,8 @@ class GraphMailer:
         self.client_secret = settings.azure_client_secret
         self.sender = settings.mail_from_email
         self._cache = _TokenCache()
+        # Boîte d'envoi (minuscules) → fin du throttling (time.monotonic).
+        self._throttled_until: Dict[str, float] = {}
 
     @property
     def ready(self) -> bool:
@@ -72,40 +172,30 @@ class GraphMailer:
         self._cache.expires_at = time.time() + int(data.get("expires_in", 3600))
         return self._cache.access_token  # type: ignore[return-value]
 
-    async def send(
-        self,
-        to: Iterable[str],
-        subject: str,
-        html_body: str,
-        cc: Optional[Iterable[str]] = None,
-        bcc: Optional[Iterable[str]] = None,
-        reply_to: Optional[str] = None,
-        attachments: Optional[List[EmailAttachment]] = None,
-        internal: bool = False,
-        from_email: Optional[str] = None,
-        from_name: Optional[str] = None,
-        request_read_receipt: bool = False,
-    ) -> None:
-        """``from_email`` doit être une boîte du tenant M365 (Graph refuse
-        sinon) ; ``from_name`` change seulement le nom affiché — utile pour
-        un gestionnaire contractuel (« Kyle — Gestion Horizon ») dont les
-        réponses partent vers ``reply_to`` (son adresse externe)."""
+    def _compose(self, mail: "OutgoingMail") -> Optional["_Composed"]:
+        """Message Graph prêt à envoyer (modes staging, BCC superviseur,
+        pièces jointes) — ``None`` en mode capture (rien ne part)."""
+        to: List[str] = list(mail.to)
+        subject = mail.subject
+        cc = list(mail.cc) if mail.cc else None
+        bcc = list(mail.bcc) if mail.bcc else None
+        internal = mail.internal
         # STAGING : capture au lieu d'envoyer — le flux appelant voit un
         # succès (audit, statuts) mais RIEN ne part vers de vraies boîtes.
         if settings.mail_capture_only:
             log.info(
                 "[MAIL CAPTURÉ — staging] to=%s subject=%r from=%s reply_to=%s "
                 "attachments=%d",
-                list(to), subject, from_email or self.sender, reply_to,
-                len(attachments or []),
+                to, subject, mail.from_email or self.sender, mail.reply_to,
+                len(mail.attachments or []),
             )
-            return
+            return None
         # STAGING (redirection) : le courriel part POUR VRAI mais vers
         # l'adresse de test uniquement — cc/bcc vidés, BCC superviseur
         # sauté, destinataires originaux affichés dans le sujet.
         redirect = (settings.mail_redirect_all_to or "").strip()
         if redirect:
-            originaux = ", ".join(list(to)) or "(aucun)"
+            originaux = ", ".join(to) or "(aucun)"
             log.info(
                 "[MAIL REDIRIGÉ — staging] destinataires réels=%s → %s "
                 "subject=%r", originaux, redirect, subject,
@@ -115,11 +205,9 @@ class GraphMailer:
             cc = None
             bcc = None
             internal = True  # pas de BCC superviseur sur les tests
-        token = await self._token()
-        sender = (from_email or "").strip() or self.sender
-        display_name = (from_name or "").strip() or settings.mail_from_name
-        to_list = list(to)
-        recipients = [{"emailAddress": {"address": addr}} for addr in to_list]
+        sender = (mail.from_email or "").strip() or self.sender
+        display_name = (mail.from_name or "").strip() or settings.mail_from_name
+        recipients = [{"emailAddress": {"address": addr}} for addr in to]
         # Copie cachée de supervision : tout courriel externe (client,
         # fournisseur…) est BCC'd vers settings.client_email_bcc. Les
         # envois internes (internal=True : codes/tests d'auth, rappels
@@ -127,60 +215,299 @@ class GraphMailer:
         bcc_list = list(bcc) if bcc else []
         owner = (settings.client_email_bcc or "").strip()
         if owner and not internal:
-            already = {
-                a.lower()
-                for a in (to_list + list(cc or []) + bcc_list)
-            }
+            already = {a.lower() for a in (to + list(cc or []) + bcc_list)}
             if owner.lower() not in already:
                 bcc_list.append(owner)
-        msg = {
-            "message": {
-                "subject": subject,
-                "body": {"contentType": "HTML", "content": html_body},
-                "toRecipients": recipients,
-                "from": {"emailAddress": {"address": sender, "name": display_name}},
-            },
-            "saveToSentItems": True,
+        message: dict = {
+            "subject": subject,
+            "body": {"contentType": "HTML", "content": mail.html_body},
+            "toRecipients": recipients,
+            "from": {"emailAddress": {"address": sender, "name": display_name}},
         }
-        if request_read_receipt:
+        if mail.request_read_receipt:
             # Accusé de lecture Outlook — « envoi certifié » des avis.
             # ⚠️ Ce paramètre était passé par bail_renouvellement.py sans
             # exister ici → TypeError silencieux : AUCUN avis n'est
             # jamais parti (cause du « je ne l'ai jamais reçu », Phil
             # 2026-07-30).
-            msg["message"]["isReadReceiptRequested"] = True
+            message["isReadReceiptRequested"] = True
         if cc:
-            msg["message"]["ccRecipients"] = [
+            message["ccRecipients"] = [
                 {"emailAddress": {"address": a}} for a in cc
             ]
         if bcc_list:
-            msg["message"]["bccRecipients"] = [
+            message["bccRecipients"] = [
                 {"emailAddress": {"address": a}} for a in bcc_list
             ]
-        if reply_to:
-            msg["message"]["replyTo"] = [{"emailAddress": {"address": reply_to}}]
-        if attachments:
-            import base64
-            msg["message"]["attachments"] = [
+        if mail.reply_to:
+            message["replyTo"] = [{"emailAddress": {"address": mail.reply_to}}]
+        # Pièces jointes en ligne (base64) tant que le total reste sous
+        # INLINE_ATTACHMENTS_MAX ; les autres passent par une session de
+        # téléversement (Graph refuse un corps de requête > 4 Mo).
+        inline: list = []
+        uploads: List[EmailAttachment] = []
+        inline_bytes = 0
+        for a in mail.attachments or []:
+            size = len(a.content_bytes)
+            if inline_bytes + size > INLINE_ATTACHMENTS_MAX:
+                uploads.append(a)
+                continue
+            inline_bytes += size
+            inline.append(
                 {
                     "@odata.type": "#microsoft.graph.fileAttachment",
                     "name": a.name,
                     "contentType": a.content_type,
                     "contentBytes": base64.b64encode(a.content_bytes).decode("ascii"),
                 }
-                for a in attachments
-            ]
+            )
+        if inline:
+            message["attachments"] = inline
+        return _Composed(sender=sender, message=message, uploads=uploads)
+
+    async def send(
+        self,
+        to: Iterable[str],
+        subject: str,
+        html_body: str,
+        cc: Optional[Iterable[str]] = None,
+        bcc: Optional[Iterable[str]] = None,
+        reply_to: Optional[str] = None,
+        attachments: Optional[List[EmailAttachment]] = None,
+        internal: bool = False,
+        from_email: Optional[str] = None,
+        from_name: Optional[str] = None,
+        request_read_receipt: bool = False,
+    ) -> None:
+        """``from_email`` doit être une boîte du tenant M365 (Graph refuse
+        sinon) ; ``from_name`` change seulement le nom affiché — utile pour
+        un gestionnaire contractuel (« Kyle — Gestion Horizon ») dont les
+        réponses partent vers ``reply_to`` (son adresse externe).
 
+        Envoi immédiat, un aller-retour ; pour les envois en nombre, voir
+        ``send_batch`` (et l'outbox ``app.services.mail_outbox``)."""
+        composed = self._compose(
+            OutgoingMail(
+                to=list(to),
+                subject=subject,
+                html_body=html_body,
+                cc=list(cc) if cc else None,
+                bcc=list(bcc) if bcc else None,
+                reply_to=reply_to,
+                attachments=attachments,
+                internal=internal,
+                from_email=from_email,
+                from_name=from_name,
+                request_read_receipt=request_read_receipt,
+            )
+        )
+        if composed is None:
+            return
+        token = await self._token()
         async with httpx.AsyncClient(timeout=30.0) as http:
+            if composed.uploads:
+                await self._send_with_uploads(http, token, composed)
+                return
             r = await http.post(
-                _SEND_URL.format(sender=sender),
+                _SEND_URL.format(sender=composed.sender),
                 headers={"Authorization": f"Bearer {token}"},
-                json=msg,
+                json={"message": composed.message, "saveToSentItems": True},
             )
             if r.status_code >= 400:
                 log.error("Graph sendMail failed: %s %s", r.status_code, r.text)
+                if r.status_code == 429:
+                    self._throttle(composed.sender, _retry_after(r.headers, 0))
                 r.raise_for_status()
 
+    # -- Envois groupés ------------------------------------------------------
+
+    async def send_batch(
+        self, mails: Sequence["OutgoingMail"]
+    ) -> List[Optional[Exception]]:
+        """Envoie plusieurs courriels : ``$batch`` Graph (20 ``sendMail``
+        par appel) par boîte d'envoi, session de téléversement pour ceux
+        qui portent de grosses pièces jointes. Retourne une issue par
+        courriel, dans l'ordre : ``None`` = envoyé (ou capturé), sinon
+        l'exception (``GraphSendError.retryable`` : à reprendre)."""
+        out: List[Optional[Exception]] = [None] * len(mails)
+        by_sender: Dict[str, List[Tuple[int, _Composed]]] = {}
+        for i, mail in enumerate(mails):
+            composed = self._compose(mail)
+            if composed is not None:
+                by_sender.setdefault(composed.sender.lower(), []).append(
+                    (i, composed)
+                )
+        if not by_sender:
+            return out
+        token = await self._token()
+        async with httpx.AsyncClient(timeout=60.0) as http:
+            for items in by_sender.values():
+                sender = items[0][1].sender
+                for i, composed in items:
+                    if not composed.uploads:
+                        continue
+                    try:
+                        await self._send_with_uploads(http, token, composed)
+                    except Exception as exc:  # noqa: BLE001
+                        out[i] = exc
+                for chunk in _batches([it for it in items if not it[1].uploads]):
+                    for i, outcome in (
+                        await self._post_batch(http, token, sender, chunk)
+                    ).items():
+                        out[i] = outcome
+        return out
+
+    async def _post_batch(
+        self,
+        http: httpx.AsyncClient,
+        token: str,
+        sender: str,
+        items: List[Tuple[int, "_Composed"]],
+    ) -> Dict[int, Optional[Exception]]:
+        """Un ``$batch`` de ``sendMail`` pour ``sender`` ; les requêtes
+        limitées (429/503) sont rejouées après ``Retry-After``."""
+        out: Dict[int, Optional[Exception]] = {}
+        pending = {str(n): item for n, item in enumerate(items, 1)}
+        for attempt in range(_MAX_429_RETRIES + 1):
+            if not await self._wait_mailbox(sender):
+                break
+            r = await http.post(
+                _BATCH_URL,
+                headers={"Authorization": f"Bearer {token}"},
+                json={
+                    "requests": [
+                        {
+                            "id": rid,
+                            "method": "POST",
+                            "url": f"/users/{sender}/sendMail",
+                            "headers": {"Content-Type": "application/json"},
+                            "body": {
+                                "message": composed.message,
+                                "saveToSentItems": True,
+                            },
+                        }
+                        for rid, (_, composed) in pending.items()
+                    ]
+                },
+            )
+            if r.status_code in _THROTTLED:
+                self._throttle(sender, _retry_after(r.headers, attempt))
+                continue
+            if r.status_code >= 400:
+                log.error("Graph $batch failed: %s %s", r.status_code, r.text[:500])
+                err = GraphSendError(r.status_code, r.text[:500])
+                return {**out, **{i: err for i, _ in pending.values()}}
+            retry: Dict[str, Tuple[int, _Composed]] = {}
+            wait = 0.0
+            for resp in r.json().get("responses", []):
+                rid = str(resp.get("id"))
+                if rid not in pending:
+                    continue
+                status = int(resp.get("status") or 0)
+                i = pending[rid][0]
+                if status < 300:
+                    out[i] = None
+                elif status in _THROTTLED:
+                    retry[rid] = pending[rid]
+                    wait = max(
+                        wait, _retry_after(resp.get("headers") or {}, attempt)
+                    )
+                else:
+                    out[i] = GraphSendError(status, _error_text(resp.get("body")))
+            for rid, (i, _) in pending.items():
+                if rid not in retry and i not in out:
+                    out[i] = GraphSendError(0, "réponse absente du $batch")
+            pending = retry
+            if not pending:
+                return out
+            self._throttle(sender, wait)
+        for i, _ in pending.values():
+            out[i] = GraphSendError(429, f"boîte {sender} limitée (Retry-After)")
+        return out
+
+    async def _send_with_uploads(
+        self, http: httpx.AsyncClient, token: str, composed: "_Composed"
+    ) -> None:
+        """Brouillon + session de téléversement par grosse pièce jointe
+        (morceaux de ``_UPLOAD_CHUNK``), puis envoi du brouillon."""
+        auth = {"Authorization": f"Bearer {token}"}
+        sender = composed.sender
+        base = f"{_GRAPH_URL}/users/{sender}/messages"
+        if not await self._wait_mailbox(sender):
+            raise GraphSendError(429, f"boîte {sender} limitée (Retry-After)")
+        r = await http.post(base, headers=auth, json=composed.message)
+        self._check(r, sender, "brouillon")
+        msg_id = r.json()["id"]
+        try:
+            for a in composed.uploads:
+                total = len(a.content_bytes)
+                r = await http.post(
+                    f"{base}/{msg_id}/attachments/createUploadSession",
+                    headers=auth,
+                    json={
+                        "AttachmentItem": {
+                            "attachmentType": "file",
+                            "name": a.name,
+                            "size": total,
+                            "contentType": a.content_type,
+                        }
+                    },
+                )
+                self._check(r, sender, "session de téléversement")
+                upload_url = r.json()["uploadUrl"]
+                for start in range(0, total, _UPLOAD_CHUNK):
+                    chunk = a.content_bytes[start : start + _UPLOAD_CHUNK]
+                    # URL pré-authentifiée : pas d'en-tête Authorization.
+                    r = await http.put(
+                        upload_url,
+                        content=chunk,
+                        headers={
+                            "Content-Type": "application/octet-stream",
+                            "Content-Range": (
+                                f"bytes {start}-{start + len(chunk) - 1}/{total}"
+                            ),
+                        },
+                    )
+                    self._check(r, sender, f"téléversement {a.name}")
+            r = await http.post(f"{base}/{msg_id}/send", headers=auth)
+            self._check(r, sender, "envoi du brouillon")
+        except Exception:
+            # Pas de brouillon orphelin dans la boîte d'envoi.
+            try:
+                await http.delete(f"{base}/{msg_id}", headers=auth)
+            except Exception:  # noqa: BLE001
+                pass
+            raise
+
+    def _check(self, r: httpx.Response, sender: str, what: str) -> None:
+        if r.status_code < 400:
+            return
+        if r.status_code in _THROTTLED:
+            self._throttle(sender, _retry_after(r.headers, 0))
+        log.error("Graph %s failed: %s %s", what, r.status_code, r.text[:500])
+        raise GraphSendError(r.status_code, f"{what} : {r.text[:300]}")
+
+    # -- Throttling par boîte ------------------------------------------------
+
+    def _throttle(self, sender: str, seconds: float) -> None:
+        """Retient le ``Retry-After`` de Graph pour la boîte ``sender`` :
+        tous les envois suivants depuis cette boîte attendent."""
+        until = time.monotonic() + max(seconds, 0.0)
+        key = sender.lower()
+        self._throttled_until[key] = max(self._throttled_until.get(key, 0.0), until)
+
+    async def _wait_mailbox(self, sender: str) -> bool:
+        """Attend la fin du throttling de ``sender``. False si l'attente
+        dépasse ``_MAX_THROTTLE_WAIT_SECONDS`` : l'appelant abandonne
+        (la file reprendra plus tard) au lieu de bloquer le worker."""
+        remaining = self._throttled_until.get(sender.lower(), 0.0) - time.monotonic()
+        if remaining <= 0:
+            return True
+        if remaining > _MAX_THROTTLE_WAIT_SECONDS:
+            return False
+        await asyncio.sleep(remaining)
+        return True
+
     async def list_inbox_messages(self, top: int = 50) -> list[dict]:
         """Liste les derniers messages reçus dans la boîte (nécessite la
         permission Graph Mail.Read sur la boîte). Retourne une liste de
@@ -6,6 +6,13 @@ Surface:
 - Customers: query by email, create, ensure (idempotent)
 - Estimates: create, update (future)
 - Invoices: get, create (future)
+- Batch : jusqu'à 30 opérations par appel ``/batch``
+
+Débit : chaque appel passe par un seau à jetons PAR REALM (limites
+Intuit : 500 requêtes/min, 40 appels batch/min) et un 429 est rejoué
+après ``Retry-After``. ``memoized_reads()`` mémoïse les GET identiques
+dans un lot de synchro (un même client / item / classe n'est lu qu'une
+fois) ; toute écriture vide la mémo.
 
 Refresh tokens are rotated on every /tokens/bearer call; the new value
 is persisted back to the Render service env var (QBO_REFRESH_TOKEN)
@@ -16,15 +23,18 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import contextvars
+import copy
 import json
 import logging
 import os
 import re
 import time
 import urllib.parse
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 import httpx
 from sqlalchemy import select
@@ -57,6 +67,89 @@ class QuickBooksError(Exception):
     """Raised by QuickBooksClient helpers when QBO returns a non-2xx."""
 
 
+# Opérations max par appel /batch (limite Intuit).
+BATCH_MAX_ITEMS = 30
+# Marge sous les limites Intuit par realm (500 req/min, 40 batch/min).
+_RATE_PER_MINUTE = 450
+_BATCH_RATE_PER_MINUTE = 35
+_RATE_BURST = 20
+_BATCH_BURST = 5
+_MAX_429_RETRIES = 3
+
+
+class _TokenBucket:
+    """Seau à jetons : ``rate_per_minute`` en régime, ``burst`` d'avance."""
+
+    def __init__(self, rate_per_minute: float, burst: int) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_buckets: Dict[tuple, _TokenBucket] = {}
+
+
+def _bucket(realm_id: Optional[str], batch: bool) -> _TokenBucket:
+    key = (realm_id or "", batch)
+    b = _buckets.get(key)
+    if b is None:
+        b = (
+            _TokenBucket(_BATCH_RATE_PER_MINUTE, _BATCH_BURST)
+            if batch
+            else _TokenBucket(_RATE_PER_MINUTE, _RATE_BURST)
+        )
+        _buckets[key] = b
+    return b
+
+
+# Mémo des GET dans un lot de synchro (cf. memoized_reads).
+_read_memo: contextvars.ContextVar[Optional[Dict[str, Any]]] = (
+    contextvars.ContextVar("qbo_read_memo", default=None)
+)
+
+
+@contextmanager
+def memoized_reads() -> Iterator[None]:
+    """Dans ce bloc, un GET identique (requête, lecture d'entité) n'est
+    envoyé qu'une fois ; la première écriture vide la mémo (un find-or-
+    create ne peut donc pas relire un « introuvable » périmé)."""
+    token = _read_memo.set({})
+    try:
+        yield
+    finally:
+        _read_memo.reset(token)
+
+
+def batch_fault_message(item: Dict[str, Any]) -> Optional[str]:
+    """Motif lisible d'une réponse ``BatchItemResponse`` en faute."""
+    fault = item.get("Fault")
+    if not fault:
+        return None
+    errs = fault.get("Error") or []
+    if errs:
+        e0 = errs[0]
+        reason = (e0.get("Detail") or e0.get("Message") or "").strip()
+        code = e0.get("code") or ""
+        return f"QBO refus : {reason} ({code})" if code else f"QBO refus : {reason}"
+    return f"QBO refus : {fault}"
+
+
 class QuickBooksClient:
     def __init__(self, scope: str = "construction") -> None:
         # "construction" = connexion historique (table qbo_tokens id=1 +
@@ -265,20 +358,48 @@ class QuickBooksClient:
         json_body: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
+        memo = _read_memo.get()
+        memo_key = None
+        if memo is not None:
+            if method == "GET":
+                memo_key = json.dumps(
+                    [path, sorted((params or {}).items())], default=str
+                )
+                if memo_key in memo:
+                    return copy.deepcopy(memo[memo_key])
+            else:
+                memo.clear()
         token = await self._access()
         url = f"{self.base_url}/v3/company/{self.realm_id}{path}"
+        bucket = _bucket(self.realm_id, path == "/batch")
         async with httpx.AsyncClient(timeout=30.0) as http:
-            r = await http.request(
-                method,
-                url,
-                headers={
-                    "Accept": "application/json",
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                },
-                json=json_body,
-                params=params,
-            )
+            for attempt in range(_MAX_429_RETRIES + 1):
+                await bucket.acquire()
+                r = await http.request(
+                    method,
+                    url,
+                    headers={
+                        "Accept": "application/json",
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json",
+                    },
+                    json=json_body,
+                    params=params,
+                )
+                if r.status_code != 429 or attempt == _MAX_429_RETRIES:
+                    break
+                # Limité par Intuit : on attend ce qu'il demande (ou un
+                # backoff) ; le seau reprend ensuite son rythme.
+                try:
+                    wait = float(r.headers.get("Retry-After") or 0)
+                except ValueError:
+                    wait = 0.0
+                wait = wait or 2.0 * 2 ** attempt
+                log.warning(
+                    "QBO %s %s -> 429, nouvel essai dans %.1f s",
+                    method, path, wait,
+                )
+                await asyncio.sleep(wait)
             # Capture le `intuit_tid` retourné par QBO sur chaque
             # réponse — Intuit l'utilise comme correlation ID quand on
             # ouvre un support ticket. On le logge systématiquement
@@ -332,7 +453,51 @@ class QuickBooksClient:
                     r.status_code,
                     intuit_tid,
                 )
-            return r.json()
+            data = r.json()
+            if memo_key is not None:
+                memo[memo_key] = copy.deepcopy(data)
+            return data
+
+    async def batch(
+        self, operations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Envoie des opérations via ``/batch`` (paquets de 30).
+
+        Chaque opération : ``{"operation": "create"|"update"|"delete",
+        "entity": "Invoice", "payload": {...}}`` ou ``{"query": "SELECT …"}``.
+        Retourne, dans le MÊME ordre, la réponse de chaque opération :
+        l'entité (``{"Invoice": {...}}``), le ``QueryResponse`` ou une
+        ``Fault`` (cf. ``batch_fault_message``) — une faute n'annule pas
+        les autres opérations du paquet.
+        """
+        out: List[Dict[str, Any]] = []
+        for start in range(0, len(operations), BATCH_MAX_ITEMS):
+            chunk = operations[start:start + BATCH_MAX_ITEMS]
+            items = []
+            for n, op in enumerate(chunk):
+                item: Dict[str, Any] = {"bId": str(n)}
+                if "query" in op:
+                    item["Query"] = op["query"]
+                else:
+                    item["operation"] = op["operation"]
+                    item[op["entity"]] = op["payload"]
+                items.append(item)
+            data = await self._request(
+                "POST",
+                "/batch",
+                json_body={"BatchItemRequest": items},
+                params={"minorversion": "70"},
+            )
+            by_id = {
+                str(r.get("bId")): r
+                for r in data.get("BatchItemResponse") or []
+            }
+            for n in range(len(chunk)):
+                out.append(
+                    by_id.get(str(n))
+                    or {"Fault": {"Error": [{"Message": "réponse batch absente"}]}}
+                )
+        return out
 
     # ------------------------------------------------------------------
     # Company
@@ -929,6 +1094,24 @@ class QuickBooksClient:
         )
         return rows[0] if rows else None
 
+    async def find_invoices_by_docnumbers(
+        self, doc_numbers: list[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Version groupée de ``find_invoice_by_docnumber`` : UNE requête
+        ``DocNumber IN (…)`` par tranche de 30 numéros → ``{numéro: Invoice}``."""
+        clean = sorted({(d or "").strip() for d in doc_numbers} - {""})
+        found: Dict[str, Dict[str, Any]] = {}
+        for i in range(0, len(clean), BATCH_MAX_ITEMS):
+            chunk = clean[i:i + BATCH_MAX_ITEMS]
+            quoted = ", ".join("'" + d.replace("'", "''") + "'" for d in chunk)
+            rows = await self.query(
+                f"SELECT * FROM Invoice WHERE DocNumber IN ({quoted}) "
+                f"MAXRESULTS {len(chunk)}"
+            )
+            for row in rows:
+                found.setdefault(str(row.get("DocNumber") or ""), row)
+        return found
+
     async def create_invoice(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         return await self._request(
             "POST", "/invoice", json_body=payload, params={"minorversion": "70"}
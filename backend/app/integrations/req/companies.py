@@ -18,16 +18,22 @@ from __future__ import annotations
 import csv
 import io
 import logging
-import re
-import unicodedata
 import zipfile
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
 
-from sqlalchemy import or_, select
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.integrations.req.matching import (
+    civic_number,
+    normalize_address,
+    normalize_company_name,
+    normalize_place,
+    trigram_similarity,
+)
 from app.models.req_company import ReqCompany
+from app.services.job_queue import enqueue, job_handler
 
 log = logging.getLogger(__name__)
 
@@ -47,62 +53,136 @@ ADRESSE_CSV_NAMES = (
 )
 
 
-# ----------------------------- Normalisation -----------------------------
+# ----------------------------- Lookup -----------------------------
 
+#: Score ``similarity`` minimal (0–1) d'un candidat — valeur par défaut
+#: de ``pg_trgm.similarity_threshold``.
+DEFAULT_MIN_SCORE = 0.3
+#: SQLite (tests, dev) : candidats préfiltrés par mot avant le score
+#: Python. Pas de scan de la table entière.
+_FALLBACK_CANDIDATES = 5000
 
-_PUNCT_RE = re.compile(r"[^a-z0-9 ]+")
-_SPACES_RE = re.compile(r"\s+")
-_LEGAL_SUFFIX_RE = re.compile(
-    r"\b(inc|ltd|ltee|ltée|enr|sec|senc|sa|cie|corp|"
-    r"corporation|holdings?|gp)\b\.?",
-    re.IGNORECASE,
-)
 
+class ReqMatch(NamedTuple):
+    company: ReqCompany
+    score: float
 
-def _strip_accents(s: str) -> str:
-    return "".join(
-        c
-        for c in unicodedata.normalize("NFKD", s)
-        if not unicodedata.combining(c)
-    )
 
+def _contains(column, query: str):
+    return column.like(f"%{query}%")
 
-def normalize_company_name(name: str) -> str:
-    """Réduit un nom de compagnie à une forme canonique.
 
-    « Gestion 9123-4567 Québec Inc. » et « gestion 9123 4567 quebec »
-    matchent.
-    """
-    if not name:
-        return ""
-    s = _strip_accents(name).lower().strip()
-    s = _LEGAL_SUFFIX_RE.sub(" ", s)
-    s = _PUNCT_RE.sub(" ", s)
-    s = _SPACES_RE.sub(" ", s).strip()
-    return s
+async def _ranked(
+    db: AsyncSession,
+    column,
+    query: str,
+    *,
+    where: Sequence[Any] = (),
+    limit: int,
+    min_score: float,
+) -> List[ReqMatch]:
+    """Candidats triés par similarité décroissante : score ≥ ``min_score``
+    ou nom / adresse contenant la requête telle quelle (comportement
+    historique du ``LIKE``, conservé)."""
+    if db.get_bind().dialect.name == "postgresql":
+        score = func.similarity(column, query)
+        # Seuil de l'opérateur « % » (indexé GIN) pour cette transaction.
+        await db.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.similarity_threshold", str(min_score), True
+                )
+            )
+        )
+        stmt = (
+            select(ReqCompany, score)
+            .where(or_(column.op("%")(query), _contains(column, query)), *where)
+            .order_by(score.desc(), ReqCompany.neq)
+            .limit(limit)
+        )
+        return [ReqMatch(c, float(sc)) for c, sc in (await db.execute(stmt)).all()]
 
+    words = [w for w in query.split() if len(w) >= 3] or query.split()
+    stmt = (
+        select(ReqCompany)
+        .where(or_(*(_contains(column, w) for w in words)), *where)
+        .limit(_FALLBACK_CANDIDATES)
+    )
+    key = column.key
+    matches = []
+    for c in (await db.execute(stmt)).scalars():
+        value = getattr(c, key) or ""
+        sc = trigram_similarity(query, value)
+        if sc >= min_score or query in value:
+            matches.append(ReqMatch(c, sc))
+    matches.sort(key=lambda m: (-m.score, m.company.neq))
+    return matches[:limit]
+
+
+async def search_by_name(
+    db: AsyncSession,
+    name: str,
+    *,
+    limit: int = 10,
+    min_score: float = DEFAULT_MIN_SCORE,
+) -> List[ReqMatch]:
+    """Corporations dont le nom ressemble à ``name`` (fautes de frappe,
+    « St- » / « Saint », suffixes légaux), les plus proches d'abord."""
+    norm = normalize_company_name(name or "")
+    if not norm:
+        return []
+    return await _ranked(
+        db, ReqCompany.nom_normalized, norm, limit=limit, min_score=min_score
+    )
 
-# ----------------------------- Lookup -----------------------------
+
+async def search_by_address(
+    db: AsyncSession,
+    address: str,
+    city: Optional[str] = None,
+    *,
+    limit: int = 20,
+    min_score: float = DEFAULT_MIN_SCORE,
+) -> List[ReqMatch]:
+    """Corporations dont le siège ressemble à ``address``, les plus
+    proches d'abord.
+
+    Le numéro civique doit être identique (« 4520 » et « 4250 » sont
+    proches en trigrammes, mais pas le même immeuble). ``city`` écarte
+    les sièges d'une autre ville (ville inconnue au REQ : gardé)."""
+    norm = normalize_address(address or "")
+    if len(norm) < 4:
+        return []
+    civic = civic_number(norm)
+    where = [ReqCompany.adresse_normalized.like(f"{civic} %")] if civic else []
+    place = normalize_place(city or "")
+    matches = await _ranked(
+        db,
+        ReqCompany.adresse_normalized,
+        norm,
+        where=where,
+        limit=limit * 3 if place else limit,
+        min_score=min_score,
+    )
+    if place:
+        matches = [
+            m
+            for m in matches
+            if not m.company.ville
+            or trigram_similarity(place, normalize_place(m.company.ville)) >= 0.5
+        ]
+    return matches[:limit]
 
 
 async def lookup_by_name(
     db: AsyncSession, name: str, *, limit: int = 10
 ) -> List[ReqCompany]:
-    """Recherche les corporations dont le nom matche (LIKE %term%).
+    """Recherche les corporations dont le nom ressemble à ``name``.
 
-    Insensible aux accents/casse via la colonne `nom_normalized`.
+    Insensible aux accents/casse via la colonne `nom_normalized` ; la
+    meilleure correspondance en tête (voir ``search_by_name``).
     """
-    if not name:
-        return []
-    norm = normalize_company_name(name)
-    if not norm:
-        return []
-    stmt = (
-        select(ReqCompany)
-        .where(ReqCompany.nom_normalized.like(f"%{norm}%"))
-        .limit(limit)
-    )
-    return list((await db.execute(stmt)).scalars().all())
+    return [m.company for m in await search_by_name(db, name, limit=limit)]
 
 
 async def lookup_by_neq(
@@ -123,22 +203,11 @@ async def lookup_by_address(
     """Cherche les corporations dont le siège social correspond à
     l'adresse fournie. Utile pour identifier le propriétaire d'un
     multi-logement détenu par une compagnie à numéro qui a son siège
-    à la même adresse.
+    à la même adresse (voir ``search_by_address``).
     """
-    if not address:
-        return []
-    addr = address.strip()
-    if len(addr) < 4:
-        return []
-    stmt = select(ReqCompany).where(ReqCompany.adresse.ilike(f"%{addr}%"))
-    if city:
-        stmt = stmt.where(
-            or_(
-                ReqCompany.ville.ilike(f"%{city.strip()}%"),
-                ReqCompany.ville.is_(None),
-            )
-        )
-    return list((await db.execute(stmt.limit(limit))).scalars().all())
+    return [
+        m.company for m in await search_by_address(db, address, city, limit=limit)
+    ]
 
 
 # ----------------------------- Ingestion -----------------------------
@@ -183,6 +252,7 @@ def _entreprise_row_to_dict(
         "neq": neq,
         "nom": nom or None,
         "nom_normalized": normalize_company_name(nom) or None,
+        "adresse_normalized": normalize_address(adr.get("adresse") or ""),
         "statut": statut or None,
         "forme_juridique": forme or None,
         "date_immatriculation": date_imm or None,
@@ -324,3 +394,64 @@ async def ingest_zip(
         "REQ ingest: processed=%d upserted=%d", processed, upserted
     )
     return {"rows_processed": processed, "rows_upserted": upserted}
+
+
+BACKFILL_JOB = "req.backfill_normalized"
+
+
+async def backfill_normalized(db: AsyncSession, *, batch_size: int = 5000) -> int:
+    """Calcule ``adresse_normalized`` (et recalcule ``nom_normalized``,
+    dont la normalisation a évolué) des lignes importées avant la
+    colonne. Reprend là où il s'est arrêté : ``NULL`` = à faire.
+
+    Pagination par clé (``neq > dernier``, ordre de la clé primaire) : un
+    ``WHERE adresse_normalized IS NULL LIMIT n`` répété relisait à chaque
+    lot toutes les lignes déjà traitées en tête de table."""
+    done = 0
+    last = ""
+    while True:
+        rows = (
+            await db.execute(
+                select(ReqCompany.neq, ReqCompany.nom, ReqCompany.adresse)
+                .where(
+                    ReqCompany.neq > last,
+                    ReqCompany.adresse_normalized.is_(None),
+                )
+                .order_by(ReqCompany.neq)
+                .limit(batch_size)
+            )
+        ).all()
+        if not rows:
+            return done
+        await db.execute(
+            update(ReqCompany),
+            [
+                {
+                    "neq": neq,
+                    "nom_normalized": normalize_company_name(nom or "") or None,
+                    "adresse_normalized": normalize_address(adresse or ""),
+                }
+                for neq, nom, adresse in rows
+            ],
+        )
+        await db.commit()
+        done += len(rows)
+        last = rows[-1][0]
+
+
+async def schedule_backfill(db: AsyncSession) -> None:
+    """Met ``backfill_normalized`` en file (hors de la chaîne de
+    démarrage). Coalescé : un seul en attente, quel que soit le nombre de
+    workers qui démarrent. L'appelant commite."""
+    await enqueue(db, BACKFILL_JOB, dedup_key=BACKFILL_JOB)
+
+
+@job_handler(BACKFILL_JOB, max_attempts=3)
+async def _backfill_job(payload: dict) -> dict:
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        done = await backfill_normalized(db)
+    if done:
+        log.info("req_companies : %d adresses normalisées", done)
+    return {"normalized": done}
@@ -0,0 +1,210 @@
+"""Normalisation et score de ressemblance pour les lookups REQ.
+
+Les adresses saisies côté prospection ne ressemblent jamais tout à fait
+à celles du Registraire : « 201-4520 boul. St-Laurent », « 4520
+Boulevard Saint-Laurent app. 201 », « 4520 St Laurent Blvd ». On
+ramène noms et adresses à une forme canonique, côté ingestion (colonnes
+``nom_normalized`` / ``adresse_normalized``) comme côté requête :
+
+- accents, casse et ponctuation retirés ;
+- types de voie ramenés à une abréviation unique (``boulevard`` /
+  ``boul`` / ``bd`` / ``blvd`` → ``boul``), ``st`` / ``ste`` →
+  ``saint`` / ``sainte``, points cardinaux en toutes lettres,
+  ordinaux en ``Ne`` (``1ère`` → ``1e``) ;
+- unité retirée (``app 201``, ``bureau 300``, ``#12``, ``local 2``,
+  préfixe québécois ``201-4520``) : le REQ publie l'adresse du siège,
+  rarement le local.
+
+Le score est celui de ``pg_trgm`` (``similarity``) : trigrammes des
+mots bordés de deux espaces devant et d'un derrière, |A ∩ B| / |A ∪ B|.
+``trigram_similarity`` le reproduit en Python pour SQLite (tests) —
+mêmes scores, donc même seuil des deux côtés.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import FrozenSet, List, Optional
+
+_PUNCT_RE = re.compile(r"[^a-z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_LEGAL_SUFFIX_RE = re.compile(
+    r"\b(inc|ltd|ltee|ltée|enr|sec|senc|sa|cie|corp|"
+    r"corporation|holdings?|gp)\b\.?",
+    re.IGNORECASE,
+)
+# « 201-4520 rue … » : unité puis numéro civique (usage québécois).
+_UNIT_PREFIX_RE = re.compile(r"^\s*\d+[a-z]?\s*-\s*(?=\d)")
+# « #12 », « # 12b », « C.P. 123 », « case postale 9 » : retirés avant
+# la ponctuation.
+_HASH_UNIT_RE = re.compile(r"#\s*[a-z0-9]+|\bc\.?\s?p\.?\s*\d+|\bcase postale\s*\d+")
+_ORDINAL_RE = re.compile(r"\b(\d+)(?:ere|re|er|ieme|eme|e)\b")
+
+_STREET_TYPES = {
+    "rue": "rue",
+    "street": "rue",
+    "avenue": "av",
+    "ave": "av",
+    "av": "av",
+    "boulevard": "boul",
+    "boul": "boul",
+    "blvd": "boul",
+    "bd": "boul",
+    "bl": "boul",
+    "chemin": "ch",
+    "ch": "ch",
+    "place": "pl",
+    "pl": "pl",
+    "montee": "mtee",
+    "mtee": "mtee",
+    "route": "rte",
+    "rte": "rte",
+    "terrasse": "terr",
+    "terr": "terr",
+    "croissant": "crois",
+    "crois": "crois",
+    "impasse": "imp",
+    "imp": "imp",
+    "promenade": "prom",
+    "prom": "prom",
+    "allee": "all",
+    "square": "sq",
+    "sq": "sq",
+}
+_STREET_ABBREVS = frozenset(_STREET_TYPES.values())
+_SAINTS = {"st": "saint", "ste": "sainte"}
+_DIRECTIONS = {
+    "e": "est",
+    "east": "est",
+    "o": "ouest",
+    "w": "ouest",
+    "west": "ouest",
+    "n": "nord",
+    "north": "nord",
+    "s": "sud",
+    "south": "sud",
+}
+_DIRECTION_NAMES = frozenset(_DIRECTIONS.values())
+# Mot d'unité suivi de son numéro : les deux sont retirés.
+_UNIT_WORDS = {
+    "app",
+    "appt",
+    "apt",
+    "appartement",
+    "unite",
+    "unit",
+    "suite",
+    "bureau",
+    "bur",
+    "local",
+    "loc",
+    "logement",
+    "log",
+    "porte",
+}
+_PLACES = {"mtl": "montreal", "qc": "quebec"}
+
+
+def _strip_accents(s: str) -> str:
+    return "".join(
+        c
+        for c in unicodedata.normalize("NFKD", s)
+        if not unicodedata.combining(c)
+    )
+
+
+def _clean(s: str) -> str:
+    s = _strip_accents(s).lower().strip()
+    s = _PUNCT_RE.sub(" ", s)
+    return _SPACES_RE.sub(" ", s).strip()
+
+
+def normalize_company_name(name: str) -> str:
+    """Réduit un nom de compagnie à une forme canonique.
+
+    « Gestion 9123-4567 Québec Inc. » et « gestion 9123 4567 quebec »
+    matchent ; « Immeubles St-Denis » et « immeubles saint denis »
+    aussi.
+    """
+    if not name:
+        return ""
+    s = _strip_accents(name).lower().strip()
+    s = _LEGAL_SUFFIX_RE.sub(" ", s)
+    s = s.replace("&", " et ")
+    s = _clean(s)
+    return " ".join(_SAINTS.get(t, t) for t in s.split())
+
+
+def normalize_address(address: str) -> str:
+    """Forme canonique d'une adresse (voir l'en-tête du module).
+
+    « 201-4520 Boul. St-Laurent O. » → « 4520 boul saint laurent ouest ».
+    """
+    if not address:
+        return ""
+    s = _strip_accents(address).lower().strip()
+    s = _UNIT_PREFIX_RE.sub("", s)
+    s = _HASH_UNIT_RE.sub(" ", s)
+    s = _clean(s)
+    s = _ORDINAL_RE.sub(r"\1e", s)
+    tokens: List[str] = []
+    words = s.split()
+    i = 0
+    while i < len(words):
+        if words[i] in _UNIT_WORDS and tokens:
+            i += 2  # le mot et son numéro
+            continue
+        tokens.append(words[i])
+        i += 1
+    out: List[str] = []
+    for i, tok in enumerate(tokens):
+        last = i == len(tokens) - 1
+        if tok == "st" and last and out:
+            out.append("rue")  # « Main St »
+        elif tok in _SAINTS:
+            out.append(_SAINTS[tok])
+        elif last and tok in _DIRECTIONS and len(out) > 1:
+            out.append(_DIRECTIONS[tok])
+        else:
+            out.append(_STREET_TYPES.get(tok, tok))
+    # Ordre anglais (« 4520 St Laurent Blvd W ») : type de voie ramené
+    # juste après le civique, comme dans « 4520 boul saint laurent ».
+    end = len(out) - 1 if out and out[-1] in _DIRECTION_NAMES else len(out)
+    if end >= 3 and out[1] not in _STREET_ABBREVS and out[end - 1] in _STREET_ABBREVS:
+        out.insert(1, out.pop(end - 1))
+    return " ".join(out)
+
+
+def normalize_place(city: str) -> str:
+    """Ville : « Mtl », « Montréal (QC) » et « montreal » → « montreal »."""
+    if not city:
+        return ""
+    tokens = [_PLACES.get(t, t) for t in _clean(city).split()]
+    if len(tokens) > 1 and tokens[-1] == "quebec":
+        tokens.pop()  # « Montréal, QC »
+    return " ".join(_SAINTS.get(t, t) for t in tokens)
+
+
+def civic_number(normalized_address: str) -> Optional[str]:
+    """Numéro civique en tête d'une adresse normalisée (``4520a`` compris)."""
+    head = normalized_address.split(" ", 1)[0] if normalized_address else ""
+    return head if head[:1].isdigit() else None
+
+
+def trigrams(s: str) -> FrozenSet[str]:
+    """Trigrammes à la ``pg_trgm`` : chaque mot bordé de « ␣␣ » et « ␣ »."""
+    out = set()
+    for word in _WORD_RE.findall(s.lower()):
+        padded = f"  {word} "
+        out.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(out)
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Équivalent Python de ``similarity(a, b)`` de ``pg_trgm``."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
@@ -46,6 +46,13 @@ Réponse Claude attendue (JSON parsé) ::
 L'intent `information` signifie que Léa est en mode Q&A
 conversationnel — pas de pression vers une action, on laisse
 l'appelant poser ses questions tant qu'il veut.
+
+Latence : la réponse est STREAMÉE (`chat_stream`). On demande `say` en
+DERNIER champ ; dès que sa chaîne JSON est fermée, tous les champs
+utiles sont connus → on coupe le flux et on rend la décision sans
+attendre la fin de la génération. Le system prompt statique est envoyé
+comme préfixe cacheable (`cached_system`), la partie dynamique
+(contexte appelant, règles hors heures) à part.
 """
 
 from __future__ import annotations
@@ -53,10 +60,11 @@ from __future__ import annotations
 import json
 import logging
 import re
+import time
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Literal, Optional
 
-from app.integrations.ai import Message, chat
+from app.integrations.ai import Message, chat_stream
 
 log = logging.getLogger(__name__)
 
@@ -362,6 +370,10 @@ class SecretaryDecision:
     # Index 0-based du slot proposé que l'appelant a choisi (uniquement
     # pour next_action = book_slot).
     chosen_slot_index: Optional[int] = None
+    # Mesures du tour (ms) : durée totale de l'appel IA et délai du 1er
+    # morceau streamé. None pour les décisions sans IA (greeting, repli).
+    llm_ms: Optional[int] = None
+    llm_first_token_ms: Optional[int] = None
 
 
 async def decide_initial_greeting(
@@ -474,24 +486,32 @@ async def decide_next_turn(
     if current_turn_count >= MAX_TURNS:
         return _fallback_callback("max_turns_reached")
 
-    system = SECRETARY_SYSTEM_PROMPT
+    # Le prompt statique reste un préfixe IDENTIQUE d'un tour à l'autre
+    # (cacheable côté provider) ; seul le suffixe dynamique varie.
+    dynamic_parts: List[str] = []
     if identity_context:
-        system = (
-            f"{system}\n\n--- CONTEXTE APPELANT ---\n"
+        dynamic_parts.append(
+            f"--- CONTEXTE APPELANT ---\n"
             f"{identity_context}\n\nUtilise ce contexte pour appliquer "
             "les règles de routage (urgence locataire, suivi projet, "
             "intake construction)."
         )
     if after_hours:
-        system = f"{system}{_AFTER_HOURS_RULES}"
+        dynamic_parts.append(_AFTER_HOURS_RULES.strip())
+    system = "\n\n".join(dynamic_parts) or None
 
     user_prompt = _build_user_prompt(history, caller_e164)
     messages = [Message(role="user", content=user_prompt)]
 
+    started = time.perf_counter()
+    first_token_ms: Optional[int] = None
+    buffer = ""
+    decision: Optional[SecretaryDecision] = None
     try:
-        result = await chat(
+        stream = chat_stream(
             messages=messages,
             system=system,
+            cached_system=SECRETARY_SYSTEM_PROMPT,
             max_tokens=500,
             temperature=0.4,
             # Le téléphone est sensible à la latence et au quota : Groq
@@ -499,11 +519,32 @@ async def decide_next_turn(
             # seulement en secours.
             prefer="groq",
         )
-        return _parse_decision(result.text)
+        try:
+            async for piece in stream:
+                if first_token_ms is None:
+                    first_token_ms = _elapsed_ms(started)
+                buffer += piece
+                decision = parse_partial_decision(buffer)
+                if decision is not None:
+                    # `say` est fermé et la décision est complète : on
+                    # coupe le flux (la génération s'arrête côté serveur).
+                    break
+        finally:
+            await stream.aclose()
+        if decision is None:
+            decision = _parse_decision(buffer)
     except Exception as exc:  # noqa: BLE001
         log.warning("Secretary IA failed (%s) — falling back to callback", exc)
         return _fallback_callback(str(exc))
 
+    decision.llm_ms = _elapsed_ms(started)
+    decision.llm_first_token_ms = first_token_ms
+    return decision
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
 
 def _build_user_prompt(
     history: List[tuple[str, str]], caller_e164: str
@@ -515,9 +556,10 @@ def _build_user_prompt(
         lines.append(f"- {tag} : {text}")
     lines.append("")
     lines.append(
-        "Réponds UNIQUEMENT par un objet JSON conforme au schéma "
-        "(lang, intent, lead_name, lead_callback_phone, lead_reason, "
-        "intake_data, next_action, say). Pas de markdown."
+        "Réponds UNIQUEMENT par un objet JSON conforme au schéma, champs "
+        "DANS CET ORDRE (lang, intent, lead_name, lead_callback_phone, "
+        "lead_reason, intake_data, chosen_slot_index, next_action, say) — "
+        "`say` toujours en DERNIER. Pas de markdown."
     )
     return "\n".join(lines)
 
@@ -538,6 +580,37 @@ _VALID_ACTIONS = {
 }
 
 
+# Chaîne JSON `"say": "..."` FERMÉE (échappements `\"` tolérés).
+_SAY_CLOSED_RE = re.compile(r'"say"\s*:\s*"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+def parse_partial_decision(buffer: str) -> Optional[SecretaryDecision]:
+    """Décision anticipée sur un flux JSON encore incomplet.
+
+    Retourne une décision dès que la chaîne `say` est fermée ET que
+    l'objet tronqué juste après `say` est un JSON valide contenant
+    `next_action` (champs demandés dans l'ordre, `say` en dernier).
+    Pour `book_slot`, `chosen_slot_index` doit aussi être déjà présent.
+    Sinon `None` : l'appelant continue de lire le flux puis retombe sur
+    `_parse_decision` avec la réponse complète.
+    """
+    start = buffer.find("{")
+    if start < 0:
+        return None
+    match = _SAY_CLOSED_RE.search(buffer, start)
+    if match is None:
+        return None
+    try:
+        data = json.loads(buffer[start : match.end()] + "}")
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or "next_action" not in data:
+        return None
+    if data.get("next_action") == "book_slot" and "chosen_slot_index" not in data:
+        return None
+    return _decision_from_data(data)
+
+
 def _parse_decision(text: str) -> SecretaryDecision:
     """Tolère les wrappers ``` ```json ... ``` et le texte autour."""
     match = _JSON_RE.search(text)
@@ -549,7 +622,13 @@ def _parse_decision(text: str) -> SecretaryDecision:
     except json.JSONDecodeError as exc:
         log.warning("Secretary returned invalid JSON (%s): %s", exc, text[:200])
         return _fallback_callback("invalid_json")
+    if not isinstance(data, dict):
+        return _fallback_callback("invalid_json")
+    return _decision_from_data(data)
+
 
+def _decision_from_data(data: Dict[str, Any]) -> SecretaryDecision:
+    """Normalise l'objet JSON de l'IA en `SecretaryDecision`."""
     lang = str(data.get("lang") or "fr-CA")
     if lang not in ("fr-CA", "en-US"):
         lang = "fr-CA"
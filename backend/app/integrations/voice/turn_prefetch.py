@@ -0,0 +1,207 @@
+"""Pré-calculs de la secrétaire IA pendant que l'appelant parle.
+
+Entre deux webhooks `/twilio/secretary`, l'appelant parle (Twilio fait
+la reconnaissance vocale) : plusieurs secondes pendant lesquelles le
+serveur ne fait rien. On en profite pour préparer ce dont le tour
+suivant aura besoin, afin que le webhook n'ait plus que l'appel IA à
+attendre :
+
+- **Contexte d'identité** (bloc CRM + drapeau hors heures) : calculé une
+  fois au décroché (`_begin_secretary_greeting`) puis réutilisé à chaque
+  tour au lieu de refaire `identify_caller` + `is_within_business_hours`.
+- **Créneaux de RDV** : dès que l'intake construction a ce qu'il faut
+  pour proposer une visite (type de travaux + adresse + échéancier), on
+  lance en tâche de fond la recherche des 3 créneaux. Si Léa décide
+  `propose_slots` au tour suivant, les créneaux sont déjà prêts.
+
+Cache PAR PROCESSUS (dict en mémoire, TTL court) : un tour servi par un
+autre worker fait simplement un « miss » et recalcule comme avant —
+aucune incohérence possible, seulement une latence normale.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+log = logging.getLogger(__name__)
+
+
+# Un appel dure rarement plus de 15 min ; au-delà l'entrée est ignorée.
+CONTEXT_TTL_S = 15 * 60
+# Des créneaux calculés il y a plus de 2 min peuvent avoir été pris.
+SLOTS_TTL_S = 120
+# Borne dure sur la taille du cache (appels simultanés d'un worker).
+MAX_ENTRIES = 500
+
+
+@dataclass
+class CallPrefetch:
+    identity_context: Optional[str] = None
+    after_hours: bool = False
+    context_at: float = 0.0
+    # Créneaux pré-calculés + adresse pour laquelle ils l'ont été.
+    proposed_slots: Optional[List[dict]] = None
+    slots_location: Optional[str] = None
+    slots_at: float = 0.0
+    slots_task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+_CACHE: Dict[int, CallPrefetch] = {}
+# Références fortes des tâches de fond (sinon le GC peut les annuler).
+_TASKS: Set[asyncio.Task] = set()
+
+
+def _entry(call_id: int) -> CallPrefetch:
+    entry = _CACHE.get(call_id)
+    if entry is None:
+        if len(_CACHE) >= MAX_ENTRIES:
+            # Éviction de la plus ancienne (ordre d'insertion du dict).
+            _CACHE.pop(next(iter(_CACHE)), None)
+        entry = CallPrefetch()
+        _CACHE[call_id] = entry
+    return entry
+
+
+def remember_context(
+    call_id: int, *, identity_context: Optional[str], after_hours: bool
+) -> None:
+    """Mémorise le contexte appelant calculé au décroché."""
+    entry = _entry(call_id)
+    entry.identity_context = identity_context
+    entry.after_hours = after_hours
+    entry.context_at = time.monotonic()
+
+
+def cached_context(call_id: int) -> Optional[CallPrefetch]:
+    """Contexte mémorisé encore frais, sinon None (l'appelant recalcule)."""
+    entry = _CACHE.get(call_id)
+    if entry is None or not entry.context_at:
+        return None
+    if time.monotonic() - entry.context_at > CONTEXT_TTL_S:
+        return None
+    return entry
+
+
+def forget(call_id: int) -> None:
+    """Libère l'entrée d'un appel terminé (callback de statut)."""
+    entry = _CACHE.pop(call_id, None)
+    if entry and entry.slots_task and not entry.slots_task.done():
+        entry.slots_task.cancel()
+
+
+def ready_for_slots(intake_data: Optional[dict]) -> bool:
+    """Même seuil que le prompt (règle 3bis) pour proposer un RDV."""
+    data = intake_data or {}
+    return all(data.get(k) for k in ("type_travaux", "adresse", "echeancier"))
+
+
+async def compute_slot_proposals(
+    db: AsyncSession, *, location: Optional[str]
+) -> List[dict]:
+    """Cherche les 3 meilleurs créneaux libres pour un closer
+    (type « évaluation soumission »). Format sérialisé (str-friendly)
+    tel que stocké dans `Call.session_state['proposed_slots']`."""
+    from app.models.appointment_type import AppointmentType
+    from app.services.agenda_slot_finder import find_available_slots
+
+    # Type « évaluation soumission » par défaut (seedé au boot).
+    apt_type = (
+        await db.execute(
+            select(AppointmentType).where(
+                AppointmentType.slug == "evaluation_soumission",
+                AppointmentType.active.is_(True),
+            )
+        )
+    ).scalar_one_or_none()
+    if apt_type is None:
+        return []
+    slots = await find_available_slots(
+        db,
+        appointment_type_id=apt_type.id,
+        location=location or None,
+        role_kind="closer",
+        days_ahead=7,
+        max_results=3,
+    )
+    return [
+        {
+            "user_id": s.user_id,
+            "user_display": s.user_display,
+            "start_at": s.start_at.isoformat(),
+            "end_at": s.end_at.isoformat(),
+            "appointment_type_id": s.appointment_type_id,
+        }
+        for s in slots
+    ]
+
+
+def schedule_slot_prefetch(call_id: int, intake_data: Optional[dict]) -> None:
+    """Lance (une fois par adresse) la recherche des créneaux en tâche de
+    fond, avec sa propre session DB. No-op si l'intake n'est pas prêt ou
+    si un calcul pour la même adresse est déjà en cours / frais."""
+    if not ready_for_slots(intake_data):
+        return
+    location = (intake_data or {}).get("adresse") or ""
+    entry = _entry(call_id)
+    if entry.slots_location == location and (
+        (entry.slots_task and not entry.slots_task.done())
+        or time.monotonic() - entry.slots_at <= SLOTS_TTL_S
+    ):
+        return
+    entry.slots_location = location
+    entry.proposed_slots = None
+    entry.slots_at = 0.0
+
+    async def _run() -> None:
+        from app.db.session import AsyncSessionLocal
+
+        try:
+            async with AsyncSessionLocal() as db:
+                slots = await compute_slot_proposals(db, location=location)
+        except Exception as exc:  # noqa: BLE001
+            log.warning("slot prefetch failed for call %s: %s", call_id, exc)
+            return
+        current = _CACHE.get(call_id)
+        if current is not None and current.slots_location == location:
+            current.proposed_slots = slots
+            current.slots_at = time.monotonic()
+
+    task = asyncio.create_task(_run())
+    entry.slots_task = task
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
+
+
+async def take_prefetched_slots(
+    call_id: int, *, location: Optional[str], wait_s: float = 1.5
+) -> Optional[List[dict]]:
+    """Créneaux pré-calculés pour cette adresse s'ils sont frais.
+
+    Si la tâche tourne encore, on l'attend au plus `wait_s` secondes
+    (elle a déjà une longueur d'avance sur un recalcul). Retourne None
+    en cas de miss — l'appelant recalcule alors en ligne."""
+    entry = _CACHE.get(call_id)
+    if entry is None or entry.slots_location != (location or ""):
+        return None
+    task = entry.slots_task
+    if task is not None and not task.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=wait_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            return None
+    if entry.proposed_slots is None:
+        return None
+    if time.monotonic() - entry.slots_at > SLOTS_TTL_S:
+        return None
+    slots = entry.proposed_slots
+    # Usage unique : un second `propose_slots` recalcule (données fraîches).
+    entry.proposed_slots = None
+    entry.slots_at = 0.0
+    return slots
@@ -155,6 +155,7 @@ async def _run() -> None:
                         f"sa création ({p.created_at.strftime('%Y-%m-%d')})."
                     ),
                     href=f"/app/crm/{p.id}",
+                    dedup_key=f"lead.uncalled_24h:{p.id}",
                 )
                 # Marque le 1er auto-followup comme notifié pour
                 # éviter de re-notifier à la prochaine itération.
@@ -12,7 +12,7 @@ from sqlalchemy import select
 
 from app.db.session import AsyncSessionLocal
 from app.models.calendar_sync import UserCalendarFeed
-from app.services.ical_sync import sync_user_feed
+from app.services.ical_sync import sync_feeds
 
 
 log = logging.getLogger(__name__)
@@ -26,21 +26,16 @@ async def run() -> None:
         feeds = (
             await db.execute(select(UserCalendarFeed))
         ).scalars().all()
-        total_blocks = 0
-        ok = 0
-        for f in feeds:
-            try:
-                n = await sync_user_feed(db, f)
-                total_blocks += n
-                ok += 1
-            except Exception:
-                log.exception("Sync failed for user %s", f.user_id)
+        stats = await sync_feeds(db, feeds)
         await db.commit()
         log.info(
-            "iCal sync: %s feeds synced (of %s), %s busy blocks",
-            ok,
-            len(feeds),
-            total_blocks,
+            "iCal sync: %s feeds synced (of %s, %s unchanged), "
+            "+%s / -%s busy blocks",
+            stats["synced"],
+            stats["feeds_total"],
+            stats["unchanged"],
+            stats["inserted"],
+            stats["removed"],
         )
 
 
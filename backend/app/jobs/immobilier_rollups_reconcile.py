@@ -0,0 +1,50 @@
+"""Cron : contrôle des agrégats Dépôts / maintenance du tableau de bord
+immobilier (``imm_depot_rollups``, ``imm_maintenance_rollups``).
+
+Les agrégats sont rafraîchis à chaque écriture (``after_flush``). Ce
+qui échappe aux événements de session — ``update()`` / ``delete()`` en
+masse, SQL brut, deux transactions concurrentes sur le même immeuble —
+peut les laisser en retard. Chaque nuit :
+
+  - recalcul complet depuis les baux, dossiers de départ et bons ;
+  - chaque écart est journalisé (c'est un bug ou un chemin d'écriture
+    non couvert à corriger) ;
+  - les immeubles en écart sont réécrits.
+
+Usage local :
+    python -m app.jobs.immobilier_rollups_reconcile
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services.immobilier_rollups import reconcile_rollups
+
+
+log = logging.getLogger(__name__)
+
+
+async def _run() -> dict:
+    async with AsyncSessionLocal() as db:
+        issues = await reconcile_rollups(db)
+        await db.commit()
+    for i in issues[:50]:
+        log.warning(
+            "rollup %(rollup)s immeuble %(immeuble_id)s %(mois)s — "
+            "%(field)s : agrégat %(stored)s ≠ recalcul %(expected)s",
+            i,
+        )
+    immeubles = sorted({i["immeuble_id"] for i in issues})
+    log.info(
+        "immobilier_rollups_reconcile: %d écart(s), %d immeuble(s) réécrit(s)",
+        len(issues), len(immeubles),
+    )
+    return {"ecarts": len(issues), "immeubles_reecrits": immeubles}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run())
@@ -100,6 +100,8 @@ async def _run() -> None:
                 f"Relance-les depuis la page Loyers."
             ),
             href="/immobilier/paiements",
+            # Un rappel par jour : une relance du cron ne renotifie pas.
+            dedup_key=f"loyer_retard:{today.isoformat()}",
         )
         await db.commit()
         log.info("loyer_relances: %d retard(s), %.0f$", n, montant)
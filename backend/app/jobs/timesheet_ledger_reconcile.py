@@ -0,0 +1,50 @@
+"""Cron : contrôle du livre des soldes Feuille de temps
+(``timesheet_balances``, dashboard Paies).
+
+Le livre est tenu par deltas à chaque écriture (approbation, grille,
+règlement…). Ce qui échappe à ces chemins — SQL en masse ou brut,
+écriture oubliée dans un nouvel endpoint — le laisse en écart sans
+alarme. Chaque nuit :
+
+  - recalcul complet depuis les feuilles, taux et règlements ;
+  - chaque écart est journalisé (c'est un bug ou un chemin d'écriture
+    non couvert à corriger) ;
+  - les employés en écart sont réécrits.
+
+Usage local :
+    python -m app.jobs.timesheet_ledger_reconcile
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services.timesheet_ledger import reconcile_balances
+
+
+log = logging.getLogger(__name__)
+
+
+async def _run() -> dict:
+    async with AsyncSessionLocal() as db:
+        issues = await reconcile_balances(db)
+        await db.commit()
+    for i in issues[:50]:
+        log.warning(
+            "livre employé %(user_id)s / compagnie %(company_id)s — "
+            "%(field)s : livre %(ledger)s ≠ historique %(expected)s",
+            i,
+        )
+    employes = sorted({i["user_id"] for i in issues})
+    log.info(
+        "timesheet_ledger_reconcile: %d écart(s), %d employé(s) réécrit(s)",
+        len(issues), len(employes),
+    )
+    return {"ecarts": len(issues), "employes_reecrits": employes}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run())
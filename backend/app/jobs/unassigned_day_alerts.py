@@ -248,6 +248,7 @@ async def _run() -> None:
                     f"réaffecter. {marker}"
                 ),
                 href="/app/assignations",
+                dedup_key=f"employe.unassigned:{e.id}:{target.isoformat()}",
             )
             alerted += 1
 
@@ -13,18 +13,25 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1 import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.request_metrics import QueryMetricsMiddleware
 from app.db.session import (
     close_db,
     ensure_assistant_tables,
     ensure_contrat_gestion_tables,
     ensure_critical_columns,
+    ensure_dedupe_tables,
     ensure_esign_tables,
+    ensure_immobilier_rollup_tables,
     ensure_invest_portal_tables,
+    ensure_mail_outbox_tables,
+    ensure_notification_tables,
     ensure_immobilier_aux_tables,
     ensure_project_corrections_tables,
     ensure_raci_tables,
     ensure_relance_tables,
+    ensure_req_search_indexes,
     ensure_permissions_defaults_metier,
     ensure_role_permissions_tables,
     ensure_qbo_connections_table,
@@ -302,6 +309,51 @@ async def _run_startup_tasks() -> None:
             "ensure_esign_tables failed during startup: %s", exc
         )
 
+    # Index de déduplication achats / factures. Transaction isolée.
+    try:
+        await ensure_dedupe_tables()
+    except Exception as exc:
+        logger.warning(
+            "ensure_dedupe_tables failed during startup: %s", exc
+        )
+
+    # Outbox des courriels sortants (envois Graph groupés). Transaction
+    # isolée.
+    try:
+        await ensure_mail_outbox_tables()
+    except Exception as exc:
+        logger.warning(
+            "ensure_mail_outbox_tables failed during startup: %s", exc
+        )
+
+    # Compteurs de non-lues de la cloche + index de dédup des
+    # notifications. Transaction isolée.
+    try:
+        await ensure_notification_tables()
+    except Exception as exc:
+        logger.warning(
+            "ensure_notification_tables failed during startup: %s", exc
+        )
+
+    # Agrégats Dépôts / maintenance du tableau de bord immobilier
+    # (réconciliés avec l'historique à chaque démarrage, avant les
+    # backfills longs). Transaction isolée.
+    try:
+        await ensure_immobilier_rollup_tables()
+    except Exception as exc:
+        logger.warning(
+            "ensure_immobilier_rollup_tables failed during startup: %s", exc
+        )
+
+    # Lookup REQ tolérant (pg_trgm + index GIN ; adresses normalisées
+    # calculées par la file de travaux). Transaction isolée.
+    try:
+        await ensure_req_search_indexes()
+    except Exception as exc:
+        logger.warning(
+            "ensure_req_search_indexes failed during startup: %s", exc
+        )
+
     # Tables du Portail Investisseur v2 (participations par compagnie,
     # flux, réglages de publication, documents, jalons). Transaction
     # isolée.
@@ -445,6 +497,24 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     from app.services.qbo_nets import qbo_nets_loop
 
     qbo_nets_task = asyncio.create_task(qbo_nets_loop())
+    # Invalidation inter-workers des instantanés d'accès (auth sans
+    # requête) : LISTEN sur le canal notifié par chaque commit qui touche
+    # users / exceptions / seuils / affectations. Le cache du portefeuille
+    # investisseur s'abonne à la même connexion (import = abonnement et
+    # écouteurs de session, même dans un worker qui ne l'a pas encore lu).
+    import app.services.invest_portfolio_engine  # noqa: F401
+    from app.services.access_snapshot import listen_loop
+
+    access_listen_task = asyncio.create_task(listen_loop())
+    # File de travaux durable (pushes QBO, crons mis en file) : réclame
+    # les travaux dus par SELECT … FOR UPDATE SKIP LOCKED.
+    from app.services.job_queue import worker_loop
+
+    job_worker_task = asyncio.create_task(worker_loop())
+    # Journal d'audit tamponné : ce process le possède (drain à l'arrêt).
+    from app.services.audit import audit_sink
+
+    audit_sink.start()
     try:
         yield
     finally:
@@ -452,6 +522,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             startup_task.cancel()
         if not qbo_nets_task.done():
             qbo_nets_task.cancel()
+        if not access_listen_task.done():
+            access_listen_task.cancel()
+        if not job_worker_task.done():
+            job_worker_task.cancel()
+        # Journal d'audit tamponné : écrit ce qui reste AVANT de fermer
+        # le pool.
+        try:
+            await audit_sink.drain()
+        except Exception as exc:
+            logger.warning("audit drain failed during shutdown: %s", exc)
         await close_db()
 
 
@@ -504,6 +584,16 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Compteur SQL / latence par requête (N+1, histogrammes par route,
+    # Server-Timing hors production) — voir app.core.request_metrics.
+    if settings.request_metrics_enabled:
+        app.add_middleware(QueryMetricsMiddleware)
+
+    # Compression gzip / brotli négociée des gros corps JSON (app mobile) —
+    # ajoutée en dernier : enveloppe tout, y compris les en-têtes CORS.
+    if settings.response_compression_enabled:
+        app.add_middleware(CompressionMiddleware)
+
     app.include_router(api_router, prefix="/api/v1")
 
     # ── Serveur MCP « remote » (connecteur custom Claude) ───────────
@@ -50,6 +50,7 @@ from app.models.devlog_soumission_module import DevlogSoumissionModule  # noqa:
 from app.models.devlog_soumission_section import DevlogSoumissionSection  # noqa: F401
 from app.models.devlog_sous_traitant import DevlogSousTraitant  # noqa: F401
 from app.models.devlog_time_entry import DevlogTimeEntry  # noqa: F401
+from app.models.dedupe_index import DedupeEntry, DedupeFingerprint  # noqa: F401
 from app.models.drive_audit_log import DriveAuditLog  # noqa: F401
 from app.models.drive_auto_upload import DriveAutoUpload  # noqa: F401
 from app.models.drive_convention import DriveConvention  # noqa: F401
@@ -60,6 +61,9 @@ from app.models.email_log import EmailLog
 from app.models.email_template import EmailTemplate
 from app.models.note_template import NoteTemplate
 from app.models.cron_run import CronRun
+from app.models.background_job import BackgroundJob
+from app.models.qbo_sync_state import QboSyncState
+from app.models.mail_outbox import OutboundMail, OutboundMailAttachment  # noqa: F401
 from app.models.employe import Employe
 from app.models.employe_rate_history import EmployeRateHistory  # noqa: F401
 from app.models.entreprise import Entreprise, EntrepriseLink, EntreprisePartner  # noqa: F401
@@ -85,6 +89,7 @@ from app.models.esign import (  # noqa: F401
     EsignField,
     EsignFieldKind,
     EsignObserver,
+    EsignPageImage,
     EsignSigner,
     EsignTemplate,
     EsignTemplateField,
@@ -127,6 +132,7 @@ from app.models.qg_strategic import (  # noqa: F401
     AIMessage,
     Domain,
     DomainType,
+    GlobalSummary,
     Insight,
     InsightStatus,
     InsightType,
@@ -179,6 +185,7 @@ from app.models.immobilier import (  # noqa: F401
     MaintenanceStatus,
     PaiementLoyer,
 )
+from app.models.immobilier_rollup import DepotRollup, MaintenanceRollup  # noqa: F401
 from app.models.kratos_message import (  # noqa: F401
     KratosIntentKind,
     KratosMessage,
@@ -202,7 +209,7 @@ from app.models.subscription import Subscription  # noqa: F401
 from app.models.subscription_vault_access import (  # noqa: F401
     SubscriptionVaultAccess,
 )
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationCounter
 from app.models.numbering_counter import NumberingCounter
 from app.models.payment import Payment
 from app.models.project import Project
@@ -272,6 +279,7 @@ from app.models.relance_plan import RelancePlan  # noqa: F401
 from app.models.relance_item import RelanceItem  # noqa: F401
 from app.models.timesheet import (  # noqa: F401
     Timesheet,
+    TimesheetBalance,
     TimesheetCompany,
     TimesheetEntry,
 )
@@ -344,6 +352,12 @@ __all__ = [
     "EmailTemplate",
     "NoteTemplate",
     "CronRun",
+    "BackgroundJob",
+    "QboSyncState",
+    "OutboundMail",
+    "OutboundMailAttachment",
+    "DedupeEntry",
+    "DedupeFingerprint",
     "Employe",
     "Facture",
     "FactureItem",
@@ -389,6 +403,7 @@ __all__ = [
     "ContratGestionStatus",
     "ContratGestionTemplate",
     "Notification",
+    "NotificationCounter",
     "NumberingCounter",
     "Offer",
     "OfferStatus",
@@ -445,6 +460,7 @@ __all__ = [
     "EsignField",
     "EsignFieldKind",
     "EsignObserver",
+    "EsignPageImage",
     "EsignSigner",
     "EsignTemplate",
     "EsignTemplateField",
@@ -0,0 +1,73 @@
+"""BackgroundJob — file de travaux durable (remplace les ``create_task``).
+
+Une ligne par travail à exécuter hors requête (push QBO, crons). La ligne
+est insérée DANS la transaction de la requête : le travail n'existe que si
+la requête commite, et survit à un redéploiement. Les workers la
+réclament par ``SELECT … FOR UPDATE SKIP LOCKED`` (cf.
+``app.services.job_queue``).
+
+- ``dedup_key`` : au plus UN travail en attente par clé (index unique
+  partiel) — cinq pushes de la même facture n'en font qu'un ;
+- ``status`` : ``pending`` → ``running`` → ``done`` / ``failed`` ; un échec
+  non définitif repasse en ``pending`` avec ``run_after`` reculé (backoff),
+  ou ``superseded`` si un travail de même clé est déjà en attente.
+
+Nouvelle table → créée par `create_all`.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    queue: Mapped[str] = mapped_column(String(32), nullable=False)
+    kind: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    dedup_key: Mapped[Optional[str]] = mapped_column(
+        String(160), nullable=True
+    )
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="pending"
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=5
+    )
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    locked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    locked_by: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Résultat (JSON) du handler — diagnostic des crons mis en file.
+    result_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    __table_args__ = (
+        # Réclamation : « prochains travaux dus de la file X ».
+        Index("ix_background_jobs_claim", "queue", "status", "run_after"),
+        Index(
+            "uq_background_jobs_pending_dedup",
+            "dedup_key",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
@@ -12,10 +12,11 @@ zones) directly in the Horizon UI so managers see when they're
 explicitly free for scheduling visits/meetings.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from sqlalchemy import (
+    Date,
     DateTime,
     ForeignKey,
     String,
@@ -29,8 +30,8 @@ from app.db.base import Base
 
 class UserCalendarFeed(Base):
     """A user-submitted .ics subscription URL. We fetch the feed every
-    30 minutes or so and replace the user's ExternalBusyBlock rows
-    with a fresh import."""
+    30 minutes or so (conditional GET on the stored validators) and
+    apply the changed busy ranges to this feed's ExternalBusyBlock rows."""
 
     __tablename__ = "user_calendar_feeds"
 
@@ -48,6 +49,20 @@ class UserCalendarFeed(Base):
     last_sync_error: Mapped[Optional[str]] = mapped_column(
         Text, nullable=True
     )
+    # Validateurs HTTP de la dernière réponse (If-None-Match /
+    # If-Modified-Since) + empreinte des plages importées : un flux
+    # inchangé ne réécrit rien.
+    etag: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
+    content_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
+    # Fin de la fenêtre d'import (jour) utilisée pour ``content_hash`` :
+    # quand elle a avancé, on refait un GET complet (sans validateurs)
+    # pour importer les événements entrés dans la fenêtre.
+    window_end: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -57,7 +72,8 @@ class UserCalendarFeed(Base):
 
 class ExternalBusyBlock(Base):
     """An opaque 'busy' time range pulled from a user's external feed.
-    No title, no location — just dates. Rewritten on each sync."""
+    No title, no location — just dates. Only the ranges that changed
+    are inserted/removed on each sync."""
 
     __tablename__ = "external_busy_blocks"
 
@@ -67,6 +83,12 @@ class ExternalBusyBlock(Base):
         nullable=False,
         index=True,
     )
+    # Flux d'origine (NULL = import d'avant le rattachement par flux).
+    feed_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("user_calendar_feeds.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
     start_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, index=True
     )
@@ -0,0 +1,65 @@
+"""Index persistant de la déduplication (achats, factures).
+
+La dédup (``achat_dedupe``, ``facture_dedupe``) regroupait TOUTE la table
+à chaque synchro. Elle tient maintenant un index :
+
+- ``dedupe_entries`` : une ligne par enregistrement indexé — grappe
+  courante (``cluster_id`` = plus petit id de la grappe) et ``updated_at``
+  de l'enregistrement au moment de l'indexation (un écart = modifié
+  depuis, à réexaminer) ;
+- ``dedupe_fingerprints`` : les clés de blocage de chaque enregistrement
+  (transaction QB, n° de facture fournisseur, référence + montant…). Deux
+  enregistrements ne peuvent être regroupés que s'ils partagent une clé :
+  un nouvel achat n'est comparé qu'aux achats de ses blocs.
+
+``scope`` distingue les tables (« achat », « facture »). Pas de FK : un
+enregistrement supprimé hors dédup est repéré (entrée orpheline) et ses
+anciens voisins réexaminés. Tables créées par ``ensure_dedupe_tables()``
+(app/db/session.py). Maintenance : ``app.services.dedupe_index``.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+#: Longueur max d'une clé stockée (tronquée au-delà : un bloc plus large
+#: ne fait que rajouter des candidats, jamais en perdre).
+KEY_MAX = 255
+
+
+class DedupeEntry(Base):
+    """Enregistrement indexé et sa grappe courante."""
+
+    __tablename__ = "dedupe_entries"
+    __table_args__ = (
+        UniqueConstraint("scope", "entity_id", name="uq_dedupe_entry"),
+        Index("ix_dedupe_entries_cluster", "scope", "cluster_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scope: Mapped[str] = mapped_column(String(16), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    cluster_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Copie SQL brute de ``updated_at`` de l'enregistrement indexé.
+    source_updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class DedupeFingerprint(Base):
+    """Clé de blocage d'un enregistrement indexé."""
+
+    __tablename__ = "dedupe_fingerprints"
+    __table_args__ = (
+        Index("ix_dedupe_fingerprints_key", "scope", "key"),
+        Index("ix_dedupe_fingerprints_entity", "scope", "entity_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    scope: Mapped[str] = mapped_column(String(16), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    key: Mapped[str] = mapped_column(String(KEY_MAX), nullable=False)
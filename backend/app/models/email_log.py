@@ -30,7 +30,7 @@ class EmailLog(Base, TimestampMixin):
     )  # outbound | inbound
     status: Mapped[str] = mapped_column(
         String(24), nullable=False, default="sent"
-    )  # sent | failed | received
+    )  # queued | sent | failed | received (queued : dans l'outbox mail)
 
     from_email: Mapped[Optional[str]] = mapped_column(String(320), nullable=True)
     to_email: Mapped[Optional[str]] = mapped_column(
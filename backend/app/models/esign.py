@@ -33,6 +33,7 @@ from sqlalchemy import (
     LargeBinary,
     String,
     Text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import Mapped, deferred, mapped_column
 
@@ -428,3 +429,33 @@ class EsignAttachment(Base, TimestampMixin):
     size_bytes: Mapped[int] = mapped_column(
         Integer, nullable=False, default=0
     )
+
+
+class EsignPageImage(Base, TimestampMixin):
+    """Page du PDF original déjà rendue en PNG (cache adressé par contenu).
+
+    Clé = SHA-256 du PDF + page + dpi : un même PDF (document, copie
+    depuis un modèle, renvoi) n'est rastérisé qu'UNE fois, quel que soit
+    le nombre de documents ou de signataires qui le consultent. Rempli à
+    la création du document (``esign_pages.prerender``), lu directement
+    par l'éditeur de zones et la page publique. Porte aussi la géométrie
+    de la page (points PDF) reprise par ``build_final_pdf``."""
+
+    __tablename__ = "esign_page_images"
+    __table_args__ = (
+        UniqueConstraint(
+            "sha256", "page", "dpi", name="uq_esign_page_images_key"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    page: Mapped[int] = mapped_column(Integer, nullable=False)
+    dpi: Mapped[int] = mapped_column(Integer, nullable=False)
+    png: Mapped[bytes] = deferred(mapped_column(LargeBinary, nullable=False))
+    # Taille de l'image rendue (px) et de la page (points PDF, mediabox).
+    width_px: Mapped[int] = mapped_column(Integer, nullable=False)
+    height_px: Mapped[int] = mapped_column(Integer, nullable=False)
+    page_w_pt: Mapped[float] = mapped_column(Float, nullable=False)
+    page_h_pt: Mapped[float] = mapped_column(Float, nullable=False)
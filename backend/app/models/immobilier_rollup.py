@@ -0,0 +1,73 @@
+"""Agrégats matérialisés du tableau de bord immobilier.
+
+``/immobilier/depots/overview`` et ``/immobilier/maintenance-rollup``
+ré-agrégeaient baux, dossiers de départ et bons de travail de TOUS les
+immeubles à chaque ouverture. Ces deux tables gardent le résultat par
+immeuble (et par mois pour la maintenance), tenu à jour par
+``app.services.immobilier_rollups`` à chaque flush qui touche une ligne
+source. Contrôle / reconstruction :
+``python -m scripts.immobilier_rollups`` et le cron
+``immobilier_rollups_reconcile``.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class MaintenanceRollup(Base):
+    """Bons internes non annulés d'un immeuble pour un mois (UTC).
+
+    ``detail_json`` : ``{"logements": {"<id>": {"total", "count",
+    "bons": [...]}}, "communs_bons": [...]}`` — chaque bon ``{"id",
+    "titre", "montant", "status", "created_at"}``. Montants non arrondis :
+    l'endpoint somme les mois de l'année puis arrondit, comme avant.
+    """
+
+    __tablename__ = "imm_maintenance_rollups"
+
+    immeuble_id: Mapped[int] = mapped_column(
+        ForeignKey("imm_immeubles.id", ondelete="CASCADE"), primary_key=True
+    )
+    # Premier jour du mois.
+    mois: Mapped[date] = mapped_column(Date, primary_key=True)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    communs_total: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0
+    )
+    communs_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0
+    )
+    detail_json: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class DepotRollup(Base):
+    """Lignes « dépôt de garantie » d'un immeuble, une par bail retenu.
+
+    ``rows_json`` : liste de ``{"bail_id", "logement_id",
+    "logement_numero", "locataire_id", "locataire_name", "montant",
+    "statut", "a_rendre_des", "depot_recu_le", "depot_detenteur",
+    "depot_rendu_le", "date_debut", "date_fin"}`` (dates ISO). Le seul
+    ingrédient qui dépend du jour — un départ acté dont la date est
+    passée — est gardé en date (``a_rendre_des``) et appliqué à la
+    lecture : un dépôt « détenu » devient « à rendre » sans écriture.
+    """
+
+    __tablename__ = "imm_depot_rollups"
+
+    immeuble_id: Mapped[int] = mapped_column(
+        ForeignKey("imm_immeubles.id", ondelete="CASCADE"), primary_key=True
+    )
+    rows_json: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
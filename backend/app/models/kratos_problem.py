@@ -108,6 +108,13 @@ class KratosProblem(Base):
         Integer, nullable=True
     )
 
+    # Empreinte de l'état analysé (scan automatique réussi seulement) :
+    # tant qu'elle ne change pas, le scan quotidien réutilise ces
+    # problèmes au lieu de rappeler l'IA.
+    input_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True, index=True
+    )
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
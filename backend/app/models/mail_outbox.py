@@ -0,0 +1,88 @@
+"""Outbox des courriels sortants (envois groupés via Microsoft Graph).
+
+Une ligne par courriel à envoyer, insérée DANS la transaction de
+l'appelant (``app.services.mail_outbox.queue_mail``) avec son travail
+``mail.send`` (``job_queue``) : le courriel n'existe que si l'action
+commite, et survit à un redéploiement. Le dispatcher envoie les
+courriels dus ensemble par requêtes Graph ``$batch`` (20 par appel).
+
+- ``status`` : ``pending`` → ``sent`` / ``failed`` (``last_error`` garde
+  la raison ; ``attempts`` compte les essais Graph) ;
+- ``email_log_id`` : entrée du journal CRM (``email_logs``) créée en
+  ``queued`` par l'appelant, passée à ``sent`` / ``failed`` à l'envoi ;
+- pièces jointes dans ``mail_outbox_attachments`` (octets bruts) : les
+  petites partent en ligne, les grosses par session de téléversement.
+
+Tables créées par ``ensure_mail_outbox_tables()`` (app/db/session.py).
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class OutboundMail(Base):
+    __tablename__ = "mail_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="pending", index=True
+    )  # pending | sent | failed
+    # Boîte d'envoi demandée (vide = settings.mail_from_email).
+    from_email: Mapped[Optional[str]] = mapped_column(String(320), nullable=True)
+    from_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    # Listes d'adresses en JSON.
+    to_json: Mapped[str] = mapped_column(Text, nullable=False)
+    cc_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    bcc_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    reply_to: Mapped[Optional[str]] = mapped_column(String(320), nullable=True)
+    subject: Mapped[str] = mapped_column(String(500), nullable=False)
+    html_body: Mapped[str] = mapped_column(Text, nullable=False)
+    internal: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False
+    )
+    request_read_receipt: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False
+    )
+
+    email_log_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("email_logs.id", ondelete="SET NULL"), nullable=True
+    )
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class OutboundMailAttachment(Base):
+    __tablename__ = "mail_outbox_attachments"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    mail_id: Mapped[int] = mapped_column(
+        ForeignKey("mail_outbox.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    content_type: Mapped[str] = mapped_column(
+        String(128), nullable=False, default="application/octet-stream"
+    )
+    content: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
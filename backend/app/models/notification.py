@@ -5,14 +5,32 @@ par le code applicatif (ex. `service.create_notification(db, user_id=...,
 kind="soumission_signed", ...)`) et marquées lues quand l'utilisateur
 les ouvre.
 
-On garde le modèle minimal — pas de fan-out complexe, pas de push temps
-réel. Le frontend poll toutes les 60s.
+On garde le modèle minimal — pas de push temps réel. Le frontend poll
+toutes les 60s.
+
+- ``dedup_key`` : clé d'événement (ex. ``loyer_retard:2026-10-19``),
+  unique PAR UTILISATEUR — un cron relancé ne renotifie pas ;
+- ``NotificationCounter`` : non-lues par (utilisateur, volet), tenu à
+  jour par ``app.services.notifications`` — le badge de la cloche lit une
+  ligne au lieu de compter la boîte.
+
+``notification_counters`` et l'index unique sont posés par
+``ensure_notification_tables()`` (app/db/session.py).
 """
 
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -20,6 +38,14 @@ from app.db.base import Base
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index(
+            "uq_notifications_user_dedup",
+            "user_id",
+            "dedup_key",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
@@ -35,6 +61,8 @@ class Notification(Base):
     body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     # Deep link to open when the user clicks the notification
     href: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # Événement source (événement:entité) ; NULL = pas de dédup.
+    dedup_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
     read_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime(timezone=True), nullable=True, index=True
@@ -50,3 +78,25 @@ class Notification(Base):
         nullable=False,
         index=True,
     )
+
+
+class NotificationCounter(Base):
+    """Non-lues d'un utilisateur pour un volet de la cloche.
+
+    ``volet`` : ``""`` = visible dans tous les volets (href neutre),
+    ``"~"`` = visible seulement sans filtre de volet, sinon un volet de
+    ``services.notifications.VOLET_PREFIXES``."""
+
+    __tablename__ = "notification_counters"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    volet: Mapped[str] = mapped_column(String(16), primary_key=True)
+    unread: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
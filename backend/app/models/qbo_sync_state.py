@@ -0,0 +1,49 @@
+"""QboSyncState — état de synchro QBO par entité Kratos (par realm).
+
+Une ligne par (realm, type d'entité, id Kratos) : dernier statut du push
+(``ok`` / ``error``), l'id QB obtenu, la dernière erreur et l'heure de la
+dernière synchro réussie. Alimentée par les handlers de la file QBO
+(``qbo_jobs``) et par la migration en lot (``qbo_bulk_sync``) — permet de
+lister d'un coup ce qui n'a pas convergé, sans rouvrir chaque fiche.
+
+Nouvelle table → créée par `create_all`.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class QboSyncState(Base):
+    __tablename__ = "qbo_sync_states"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    realm_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    # « facture », « achat_billable », « bill_payment », « punch »…
+    entity_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    qbo_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    synced_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        UniqueConstraint(
+            "realm_id",
+            "entity_type",
+            "entity_id",
+            name="uq_qbo_sync_states_entity",
+        ),
+    )
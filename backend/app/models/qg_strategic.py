@@ -302,7 +302,54 @@ class Summary(Base):
     generation_duration_ms: Mapped[Optional[int]] = mapped_column(
         Integer, nullable=True
     )
+    # Empreinte de l'état envoyé à l'IA (cf. services.ai_briefings). Le
+    # lendemain, même empreinte → briefing recopié sans appel IA.
+    input_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
+class GlobalSummary(Base):
+    """Briefing IA global (toutes entreprises + deals Pipeline).
+
+    Une ligne par périmètre (``scope_key`` = ``all`` ou ``user:<id>``),
+    réécrite à chaque génération. Partagée par tous les workers et
+    conservée au redémarrage (remplace l'ancien cache en mémoire).
+    """
+
+    __tablename__ = "qg_global_summaries"
 
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    scope_key: Mapped[str] = mapped_column(
+        String(32), nullable=False, unique=True
+    )
+    period_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    period_end: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    headline: Mapped[str] = mapped_column(String(500), nullable=False)
+    summary_text: Mapped[str] = mapped_column(Text, nullable=False)
+    highlights_json: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True
+    )
+    model_used: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
+    provider: Mapped[Optional[str]] = mapped_column(
+        String(32), nullable=True
+    )
+    prompt_version: Mapped[Optional[str]] = mapped_column(
+        String(32), nullable=True
+    )
+    input_hash: Mapped[Optional[str]] = mapped_column(
+        String(64), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False
     )
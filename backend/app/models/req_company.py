@@ -7,7 +7,8 @@ Le téléchargement direct du ZIP par notre backend est bloqué par
 Cloudflare (challenge bot). L'utilisateur télécharge donc le ZIP via
 son navigateur, l'uploade dans le backend une fois, et on ingère
 le contenu dans cette table pour permettre des lookups SQL rapides
-par nom ou par NEQ depuis le module Prospection.
+par nom, adresse (similarité trigramme, tolérante aux fautes et aux
+abréviations) ou NEQ depuis le module Prospection.
 
 Ré-import idempotent : ON CONFLICT (neq) DO UPDATE.
 """
@@ -54,6 +55,13 @@ class ReqCompany(Base):
         String(500), nullable=True, index=True
     )
 
+    # Adresse normalisée (integrations/req/matching.normalize_address) :
+    # lookup par similarité trigramme (index GIN pg_trgm posé par
+    # ``ensure_req_search_indexes``). "" = pas d'adresse, déjà calculée.
+    adresse_normalized: Mapped[Optional[str]] = mapped_column(
+        String(500), nullable=True
+    )
+
     imported_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
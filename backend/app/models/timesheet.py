@@ -233,3 +233,44 @@ class TimesheetEntry(Base, TimestampUpdateMixin):
         Boolean, nullable=False, default=True, server_default="true"
     )
     hours: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+
+class TimesheetBalance(Base, TimestampUpdateMixin):
+    """Soldes cumulés maintenus par (employé, compagnie).
+
+    Tenu à jour à chaque écriture qui change un dû ou un règlement
+    (approbation / réouverture / grille / taux d'une feuille approuvée,
+    règlements) par ``app.services.timesheet_ledger`` : le dashboard lit
+    cette table au lieu de ré-agréger tout l'historique.
+    ``company_id = 0`` porte les règlements sans compagnie (paie).
+    Reconstruction / contrôle : ``python -m scripts.timesheet_ledger``.
+    """
+
+    __tablename__ = "timesheet_balances"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "company_id", name="uq_timesheet_balance"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Pas de FK : 0 = ligne « sans compagnie ».
+    company_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Toutes les heures approuvées (paie) et la part refacturable.
+    heures: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    paie_due: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    refac_heures: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0
+    )
+    refac_due: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    paie_reglee: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0
+    )
+    refac_reglee: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0
+    )
@@ -346,6 +346,15 @@ class CallTurn(Base):
     # Confidence de la transcription Twilio (0.0-1.0) pour les tours
     # 'user'. NULL pour 'assistant'.
     confidence: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Mesures de latence (ms) des tours 'assistant' décidés par l'IA :
+    # `latency_ms` = webhook reçu (fin reco vocale) → TwiML prêt ;
+    # `llm_ms` = appel IA streamé ; `llm_first_token_ms` = 1er morceau.
+    # NULL pour les tours 'user' et les phrases fixes (greeting).
+    latency_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    llm_ms: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    llm_first_token_ms: Mapped[Optional[int]] = mapped_column(
+        Integer, nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -26,13 +26,15 @@ Règles de combinaison :
 """
 from __future__ import annotations
 
+from typing import Callable, Mapping
+
 from sqlalchemy import select
 
 from app.core.access_registry import GENERAL, PAGE_KEY_PREFIX, PAGES
 from app.core.capabilities import CAPABILITIES
 from app.models.user import VALID_VOLETS, User
 from app.models.user_access_override import UserAccessOverride
-from app.services.permissions_service import get_min_role
+from app.services.permissions_service import default_min_role, role_thresholds
 
 #: Clés de pages par volet (ex. developpement_logiciel → devlogiciel.*) —
 #: le préfixe de clé ne suit pas toujours le nom du volet, on passe par
@@ -42,7 +44,13 @@ PAGE_KEYS_BY_VOLET: dict[str, tuple[str, ...]] = {
 }
 
 
-async def compute_access(db, user: User) -> dict[str, bool]:
+def compile_access(
+    user: User,
+    min_role_of: Callable[[str], str],
+    overrides: Mapping[str, bool],
+) -> dict[str, bool]:
+    """Règles de ``compute_access`` sans I/O : seuils via ``min_role_of``,
+    exceptions individuelles ``{clé: allow}`` déjà chargées."""
     out: dict[str, bool] = {}
     volets = set(user.volets)
 
@@ -53,30 +61,22 @@ async def compute_access(db, user: User) -> dict[str, bool]:
     # 2) Pages : volet du pôle + seuil de rôle configurable.
     for page in PAGES:
         key = f"{PAGE_KEY_PREFIX}{page.key}"
-        min_role = await get_min_role(key)
-        role_ok = user.has_min_role(min_role)
+        role_ok = user.has_min_role(min_role_of(key))
         volet_ok = page.volet == GENERAL or page.volet in volets
         out[key] = role_ok and volet_ok
 
     # 3) Capacités (actions) — mêmes clés qu'avant (rétrocompat
     #    telephonie.access / devlog.access incluses).
     for cap in CAPABILITIES:
-        out[cap.id] = user.has_min_role(await get_min_role(cap.id))
+        out[cap.id] = user.has_min_role(min_role_of(cap.id))
 
     # 4) Exceptions individuelles (owner jamais bloqué).
-    rows = (
-        await db.execute(
-            select(UserAccessOverride).where(
-                UserAccessOverride.user_id == user.id
-            )
-        )
-    ).scalars().all()
     is_owner = user.role == "owner"
-    for row in rows:
-        if row.allow:
-            out[row.key] = True
+    for key, allow in overrides.items():
+        if allow:
+            out[key] = True
         elif not is_owner:
-            out[row.key] = False
+            out[key] = False
 
     # 5) Dérivation : le volet suit ses pages — une page accordée (par
     #    rôle OU par exception) ouvre le pôle ; un volet dont AUCUNE page
@@ -92,13 +92,40 @@ async def compute_access(db, user: User) -> dict[str, bool]:
     return out
 
 
+async def compute_access(db, user: User) -> dict[str, bool]:
+    from app.services.access_snapshot import current_snapshot
+
+    snap = current_snapshot(user)
+    if snap is not None:
+        return snap.access()
+    thresholds = await role_thresholds()
+    rows = (
+        await db.execute(
+            select(UserAccessOverride).where(
+                UserAccessOverride.user_id == user.id
+            )
+        )
+    ).scalars().all()
+    return compile_access(
+        user,
+        lambda key: thresholds.get(key) or default_min_role(key),
+        {row.key: row.allow for row in rows},
+    )
+
+
 async def user_has_volet_access(db, user: User, *volets: str) -> bool:
     """Accès au pôle pour les GARDES API (``require_volet``) — mêmes
     règles que ``compute_access`` : volet coché OU au moins une page du
     volet accordée en exception individuelle. Chemin rapide sans requête
-    quand le volet est coché (cas normal)."""
+    quand le volet est coché (cas normal) ou que l'instantané d'accès
+    (``access_snapshot``) de l'utilisateur est à jour."""
     if any(user.has_volet(v) for v in volets):
         return True
+    from app.services.access_snapshot import current_snapshot
+
+    snap = current_snapshot(user)
+    if snap is not None:
+        return snap.has_volet_access(*volets)
     # Exceptions individuelles : volet:<v> ou n'importe quelle page du
     # volet accordée → le pôle (et ses API) s'ouvrent.
     allowed_keys: set[str] = set()
@@ -0,0 +1,402 @@
+"""Instantané d'accès compilé par utilisateur — auth sans requête.
+
+Chaque requête authentifiée relisait le ``User`` (``get_current_user``),
+puis souvent ses immeubles / projets visibles, ses exceptions d'accès et
+les seuils de rôle. ``AccessSnapshot`` fige tout ça une fois :
+
+- copie détachée des colonnes du ``User`` (rattachée à la session de la
+  requête par ``merge(load=False)`` — aucun SELECT) ;
+- volets, seuils ``role_permissions``, exceptions ``user_access_overrides`` ;
+- immeubles / projets visibles (``None`` = manager+, tout voir).
+
+Le cache est indexé par ``user_id`` et tamponné par une version
+``(globale, par utilisateur)``. Invalidation :
+
+- dans le process : les événements de session repèrent les écritures sur
+  ``users``, ``user_access_overrides``, ``user_immeubles``,
+  ``project_members`` (version de l'utilisateur) et ``role_permissions``
+  (version globale) ; la version est incrémentée au COMMIT ;
+- entre workers : la même écriture émet ``pg_notify`` dans SA
+  transaction (livré seulement si elle commite) ; ``listen_loop`` écoute
+  le canal et incrémente les mêmes versions.
+
+D'autres caches du process s'abonnent à la même connexion LISTEN avec
+``listen_channel`` (ex. ``invest_portfolio_engine``).
+
+Sans écoute active (SQLite, connexion perdue), un instantané vit au plus
+``_TTL_FALLBACK_SECONDS`` — la fenêtre de l'ancien cache de
+``permissions_service``. Les écritures SQL brutes (``text(...)``) ne sont
+pas vues : le TTL d'écoute borne leur délai.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Iterable, Mapping, Optional
+
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.models.project_member import ProjectMember
+from app.models.role_permission import RolePermission
+from app.models.user import User
+from app.models.user_access_override import UserAccessOverride
+from app.models.user_immeuble import UserImmeuble
+from app.services.access_service import PAGE_KEYS_BY_VOLET, compile_access
+from app.services.permissions_service import (
+    default_min_role,
+    invalidate_permissions_cache,
+    role_thresholds,
+)
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "kratos_access"
+# Durée de vie d'un instantané quand LISTEN est actif (filet de sécurité).
+_TTL_LISTENING_SECONDS = 600.0
+# Sans LISTEN : même fenêtre que le cache historique des permissions.
+_TTL_FALLBACK_SECONDS = 30.0
+_LISTEN_RETRY_SECONDS = 30.0
+_LISTEN_PING_SECONDS = 60.0
+
+# Marqueur « tout le monde » dans les ensembles d'utilisateurs touchés.
+_ALL = "*"
+_PENDING_KEY = "access_snapshot_pending"
+_BULK_KEY = "access_snapshot_bulk"
+
+
+@dataclass(frozen=True)
+class AccessSnapshot:
+    user_id: int
+    user: User  # gabarit détaché — ne jamais le modifier
+    role: str
+    volets: frozenset[str]
+    thresholds: Mapping[str, str]
+    overrides: Mapping[str, bool]
+    visible_immeuble_ids: Optional[frozenset[int]]
+    visible_project_ids: Optional[frozenset[int]]
+    stamp: tuple[int, int]
+    built_at: float
+
+    def min_role(self, key: str) -> str:
+        return self.thresholds.get(key) or default_min_role(key)
+
+    def has_capability(self, capability: str) -> bool:
+        """Mêmes règles que ``permissions_service.user_has_capability``."""
+        allow = self.overrides.get(capability)
+        if allow is True:
+            return True
+        if allow is False and self.role != "owner":
+            return False
+        return self.user.has_min_role(self.min_role(capability))
+
+    def has_volet_access(self, *volets: str) -> bool:
+        """Mêmes règles que ``access_service.user_has_volet_access``."""
+        if any(v in self.volets for v in volets):
+            return True
+        for v in volets:
+            keys = [f"volet:{v}"] + [
+                f"page:{k}" for k in PAGE_KEYS_BY_VOLET.get(v, ())
+            ]
+            if any(self.overrides.get(k) is True for k in keys):
+                return True
+        return False
+
+    def access(self) -> dict[str, bool]:
+        return compile_access(self.user, self.min_role, self.overrides)
+
+
+_snapshots: dict[int, AccessSnapshot] = {}
+_global_version = 0
+_user_versions: dict[int, int] = {}
+_listening = False
+# Autres canaux écoutés : canal → (payload reçu, remise à zéro du cache à
+# chaque (re)connexion — des notifications ont pu être manquées).
+_channels: dict[str, tuple[Callable[[str], None], Callable[[], None]]] = {}
+
+
+def listen_channel(
+    channel: str, on_payload: Callable[[str], None], reset: Callable[[], None]
+) -> None:
+    """Abonne un cache du process à ``channel`` (pris en compte à la
+    prochaine connexion de ``listen_loop`` — à appeler à l'import)."""
+    _channels[channel] = (on_payload, reset)
+
+
+def is_listening() -> bool:
+    """Vrai si ``listen_loop`` écoute : les caches abonnés peuvent
+    garder leurs entrées plus longtemps."""
+    return _listening
+
+
+def _stamp(user_id: int) -> tuple[int, int]:
+    return (_global_version, _user_versions.get(user_id, 0))
+
+
+def bump(user_ids: Iterable[object]) -> None:
+    """Invalide les instantanés des utilisateurs donnés (``"*"`` = tous)."""
+    global _global_version
+    for uid in set(user_ids):
+        if uid == _ALL:
+            _global_version += 1
+            _snapshots.clear()
+            invalidate_permissions_cache()
+        else:
+            uid = int(uid)
+            _user_versions[uid] = _user_versions.get(uid, 0) + 1
+            _snapshots.pop(uid, None)
+
+
+def invalidate_access_snapshots(user_id: Optional[int] = None) -> None:
+    bump([_ALL if user_id is None else user_id])
+
+
+def _fresh(snap: Optional[AccessSnapshot]) -> bool:
+    if snap is None or snap.stamp != _stamp(snap.user_id):
+        return False
+    ttl = _TTL_LISTENING_SECONDS if _listening else _TTL_FALLBACK_SECONDS
+    return time.monotonic() - snap.built_at < ttl
+
+
+def current_snapshot(user: User) -> Optional[AccessSnapshot]:
+    """Instantané à jour qui correspond à ``user`` tel qu'il est en
+    mémoire (rôle et volets identiques — un rôle modifié dans la requête
+    en cours retombe sur le calcul en DB)."""
+    snap = _snapshots.get(user.id)
+    if not _fresh(snap):
+        return None
+    if snap.role != user.role or snap.volets != frozenset(user.volets):
+        return None
+    return snap
+
+
+def _detached_copy(user: User) -> User:
+    mapper = inspect(User)
+    copy = User(
+        **{
+            attr.key: getattr(user, attr.key)
+            for attr in mapper.column_attrs
+        }
+    )
+    make_transient_to_detached(copy)
+    return copy
+
+
+async def build_snapshot(
+    db: AsyncSession,
+    user: User,
+    stamp: Optional[tuple[int, int]] = None,
+) -> AccessSnapshot:
+    """Compile (4 requêtes max) et met en cache l'instantané de ``user``.
+
+    ``stamp`` : version lue AVANT le chargement du ``User`` — une écriture
+    concurrente l'incrémente et l'instantané est rejeté au prochain accès.
+    """
+    if stamp is None:
+        stamp = _stamp(user.id)
+    thresholds = await role_thresholds()
+    overrides = {
+        key: allow
+        for key, allow in (
+            await db.execute(
+                select(UserAccessOverride.key, UserAccessOverride.allow).where(
+                    UserAccessOverride.user_id == user.id
+                )
+            )
+        ).all()
+    }
+    imm_ids: Optional[frozenset[int]] = None
+    proj_ids: Optional[frozenset[int]] = None
+    if not user.has_min_role("manager"):
+        imm_ids = frozenset(
+            int(r[0])
+            for r in (
+                await db.execute(
+                    select(UserImmeuble.immeuble_id).where(
+                        UserImmeuble.user_id == user.id
+                    )
+                )
+            ).all()
+        )
+        proj_ids = frozenset(
+            int(r[0])
+            for r in (
+                await db.execute(
+                    select(ProjectMember.project_id).where(
+                        ProjectMember.user_id == user.id
+                    )
+                )
+            ).all()
+        )
+    snap = AccessSnapshot(
+        user_id=user.id,
+        user=_detached_copy(user),
+        role=user.role,
+        volets=frozenset(user.volets),
+        thresholds=MappingProxyType(thresholds),
+        overrides=MappingProxyType(overrides),
+        visible_immeuble_ids=imm_ids,
+        visible_project_ids=proj_ids,
+        stamp=stamp,
+        built_at=time.monotonic(),
+    )
+    _snapshots[user.id] = snap
+    return snap
+
+
+async def load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """``User`` attaché à ``db`` : depuis l'instantané si frais (zéro
+    requête), sinon lu en DB et l'instantané est reconstruit."""
+    snap = _snapshots.get(user_id)
+    if _fresh(snap):
+        return await db.merge(snap.user, load=False)
+    stamp = _stamp(user_id)
+    user = (
+        await db.execute(select(User).where(User.id == user_id))
+    ).scalar_one_or_none()
+    if user is not None and user.is_active:
+        await build_snapshot(db, user, stamp)
+    return user
+
+
+# ---------------------------------------------------------------------------
+# Invalidation : événements de session (process) + NOTIFY (workers)
+# ---------------------------------------------------------------------------
+
+
+def _touched(obj: object) -> Optional[object]:
+    if isinstance(obj, User):
+        return obj.id
+    if isinstance(obj, (UserAccessOverride, UserImmeuble, ProjectMember)):
+        return obj.user_id
+    if isinstance(obj, RolePermission):
+        return _ALL
+    return None
+
+
+def _notify(session: Session, targets: set) -> None:
+    if not targets:
+        return
+    conn = session.connection()
+    if conn.dialect.name != "postgresql":
+        return
+    conn.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {
+            "channel": CHANNEL,
+            "payload": ",".join(sorted(str(t) for t in targets)),
+        },
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_on_flush(session: Session, _ctx) -> None:
+    targets = {
+        t
+        for t in map(
+            _touched,
+            list(session.new) + list(session.dirty) + list(session.deleted),
+        )
+        if t is not None
+    }
+    if targets:
+        session.info.setdefault(_PENDING_KEY, set()).update(targets)
+        _notify(session, targets)
+
+
+_WATCHED_TABLES = {
+    User.__tablename__,
+    UserAccessOverride.__tablename__,
+    UserImmeuble.__tablename__,
+    ProjectMember.__tablename__,
+    RolePermission.__tablename__,
+}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state) -> None:
+    """``update()`` / ``delete()`` ORM en masse : on ne connaît pas les
+    lignes → tout le monde est invalidé au commit."""
+    if not (state.is_update or state.is_delete):
+        return
+    table = getattr(state.statement, "table", None)
+    if table is not None and table.name in _WATCHED_TABLES:
+        state.session.info.setdefault(_PENDING_KEY, set()).add(_ALL)
+        state.session.info[_BULK_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_bulk(session: Session) -> None:
+    if session.info.pop(_BULK_KEY, False):
+        _notify(session, {_ALL})
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        bump(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_BULK_KEY, None)
+
+
+def _on_notify(_conn, _pid, _channel, payload: str) -> None:
+    bump(t for t in (payload or _ALL).split(",") if t)
+
+
+def _listeners() -> dict[str, Callable]:
+    out: dict[str, Callable] = {CHANNEL: _on_notify}
+    for channel, (on_payload, _reset) in _channels.items():
+        out[channel] = (
+            lambda _conn, _pid, _ch, payload, fn=on_payload: fn(payload or "")
+        )
+    return out
+
+
+def _reset_all() -> None:
+    invalidate_access_snapshots()
+    for _on_payload, reset in _channels.values():
+        reset()
+
+
+async def listen_loop() -> None:
+    """Tâche de fond : ``LISTEN kratos_access`` sur une connexion dédiée
+    du pool (asyncpg). Sans Postgres, ne fait rien (TTL court)."""
+    global _listening
+    from app.db.session import engine
+
+    if engine.dialect.name != "postgresql":
+        return
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw = (await conn.get_raw_connection()).driver_connection
+                listeners = _listeners()
+                for channel, callback in listeners.items():
+                    await raw.add_listener(channel, callback)
+                # Des notifications ont pu être manquées avant l'écoute.
+                _reset_all()
+                _listening = True
+                try:
+                    while True:
+                        await asyncio.sleep(_LISTEN_PING_SECONDS)
+                        await raw.execute("SELECT 1")
+                finally:
+                    _listening = False
+                    for channel, callback in listeners.items():
+                        await raw.remove_listener(channel, callback)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            log.warning("LISTEN %s interrompu, reprise", CHANNEL, exc_info=True)
+            _reset_all()
+        await asyncio.sleep(_LISTEN_RETRY_SECONDS)
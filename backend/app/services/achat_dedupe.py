@@ -13,6 +13,10 @@ regroupe que des achats reliés par un signal FORT (même transaction QB,
 même n° de facture fournisseur, ou même référence + même montant TTC), et
 l'achat conservé hérite du mode de paiement RÉEL (jamais « sur compte »
 quand un paiement a été fait).
+
+Incrémentale : seuls les achats nouveaux / modifiés et leurs voisins par
+clé de blocage (``_blocking_keys``) sont réexaminés à chaque passe — voir
+``app.services.dedupe_index``.
 """
 
 from __future__ import annotations
@@ -25,6 +29,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.achat import Achat
+from app.services import dedupe_index
 
 
 log = logging.getLogger(__name__)
@@ -191,8 +196,66 @@ def _merge_into_keeper(keeper: Achat, other: Achat) -> None:
         keeper.payment_method = other.payment_method
 
 
-async def dedupe_achats(db: AsyncSession) -> int:
-    """Supprime les achats en double, en conservant le plus complet.
+def _inv_key(a: Achat) -> str | None:
+    """Signal 2 : fournisseur + n° de facture fournisseur."""
+    inv = (a.supplier_invoice_number or "").strip().lower()
+    if inv and a.fournisseur_id:
+        return f"inv:{a.fournisseur_id}:{inv}"
+    return None
+
+
+def _tok_keys(a: Achat, ttc: float) -> list[str]:
+    """Signal 3 : référence + montant TTC."""
+    if ttc <= 0:
+        return []
+    return [f"tok:{tok}|{ttc:.2f}" for tok in _tokens(a)]
+
+
+def _auto_key(a: Achat, ttc: float) -> str | None:
+    """Signal 5 : achat auto-référencé (fournisseur, TTC, date)."""
+    if (
+        ttc > 0
+        and a.invoice_date is not None
+        and (a.fournisseur_id or a.sous_traitant_id)
+        and _is_auto_doc(a)
+    ):
+        return (
+            "auto:"
+            f"f{a.fournisseur_id or 0}:s{a.sous_traitant_id or 0}:"
+            f"{ttc:.2f}:{a.invoice_date.isoformat()}"
+        )
+    return None
+
+
+def _nref_keys(a: Achat, ttc: float) -> list[str]:
+    """Signal 4 : fournisseur + référence normalisée (montant comparé à
+    part)."""
+    if not (a.fournisseur_id and ttc > 0):
+        return []
+    out: list[str] = []
+    for tok in _tokens(a):
+        nref = _normalize_ref(tok)
+        if len(nref) < 4:
+            continue  # trop court → risque de collision, on ignore
+        out.append(f"nref:{a.fournisseur_id}:{nref}")
+    return out
+
+
+def _blocking_keys(a: Achat) -> set[str]:
+    """Toutes les clés par lesquelles ``_clusters`` peut rapprocher deux
+    achats (signal 1 : Id de transaction QB)."""
+    ttc = _ttc(a)
+    keys = {f"qb:{qid}" for qid in (a.qbo_bill_id, a.qbo_purchase_id) if qid}
+    keys.update(_tok_keys(a, ttc))
+    keys.update(_nref_keys(a, ttc))
+    for key in (_inv_key(a), _auto_key(a, ttc)):
+        if key:
+            keys.add(key)
+    return keys
+
+
+def _clusters(achats: list[Achat]) -> dict[int, list[Achat]]:
+    """Regroupe les achats (triés par id) en grappes de doublons.
 
     Trois signaux de regroupement, tous SÛRS (fusionnés par union-find,
     donc transitifs) :
@@ -208,12 +271,7 @@ async def dedupe_achats(db: AsyncSession) -> int:
          reçu Rona entré deux fois sous deux formats de numéro (compte-
          client « long » vs réception « compact ») avec un écart d'arrondi
          d'un cent — invisible pour le signal 3 (réf + TTC EXACTS).
-
-    Retourne le nombre d'achats supprimés. Ne committe pas (l'appelant
-    gère la transaction).
     """
-    achats = list((await db.execute(select(Achat))).scalars().all())
-
     uf = _UnionFind()
     # Index : clé de signal → premier achat vu portant cette clé. On unionne
     # chaque nouvel achat avec ce représentant.
@@ -259,14 +317,13 @@ async def dedupe_achats(db: AsyncSession) -> int:
                     break
                 qb_seen[str(qid)].append(a)
         # 2) Fournisseur + n° facture fournisseur.
-        inv = (a.supplier_invoice_number or "").strip().lower()
-        if inv and a.fournisseur_id:
-            link(f"inv:{a.fournisseur_id}:{inv}", a.id)
+        inv_key = _inv_key(a)
+        if inv_key:
+            link(inv_key, a.id)
         # 3) Référence + montant TTC (identique = même document).
         ttc = _ttc(a)
-        if ttc > 0:
-            for tok in _tokens(a):
-                link(f"tok:{tok}|{ttc:.2f}", a.id)
+        for key in _tok_keys(a, ttc):
+            link(key, a.id)
         # 5) Doublons AUTO-référencés : même fournisseur/sous-traitant,
         # même montant TTC, même DATE de facture, et AUCUN identifiant de
         # document réel des deux côtés (réf auto « A-<id> »). Cas réel :
@@ -274,35 +331,31 @@ async def dedupe_achats(db: AsyncSession) -> int:
         # à payer » A-210 / A-221 / … (doublons Christian Villiard) — les
         # signaux 2-4 ne peuvent pas les voir, leurs références divergent
         # par construction.
-        if (
-            ttc > 0
-            and a.invoice_date is not None
-            and (a.fournisseur_id or a.sous_traitant_id)
-            and _is_auto_doc(a)
-        ):
-            link(
-                "auto:"
-                f"f{a.fournisseur_id or 0}:s{a.sous_traitant_id or 0}:"
-                f"{ttc:.2f}:{a.invoice_date.isoformat()}",
-                a.id,
-            )
+        auto_key = _auto_key(a, ttc)
+        if auto_key:
+            link(auto_key, a.id)
         # 4) Fournisseur + référence NORMALISÉE + montant proche (Rona).
-        if a.fournisseur_id and ttc > 0:
-            for tok in _tokens(a):
-                nref = _normalize_ref(tok)
-                if len(nref) < 4:
-                    continue  # trop court → risque de collision, on ignore
-                key = f"nref:{a.fournisseur_id}:{nref}"
-                witness = nref_rep.get(key)
-                if witness is None:
-                    nref_rep[key] = a
-                elif _amounts_close(a, witness):
-                    uf.union(witness.id, a.id)
+        for key in _nref_keys(a, ttc):
+            witness = nref_rep.get(key)
+            if witness is None:
+                nref_rep[key] = a
+            elif _amounts_close(a, witness):
+                uf.union(witness.id, a.id)
 
     # Reconstruit les groupes à partir des composantes connexes.
     comps: dict[int, list[Achat]] = defaultdict(list)
     for a in achats:
         comps[uf.find(a.id)].append(a)
+    return comps
+
+
+async def _remove_duplicates(
+    db: AsyncSession, comps: dict[int, list[Achat]]
+) -> set[int]:
+    """Supprime les doublons de chaque grappe en gardant le plus complet.
+    Retourne les ids supprimés."""
+    if not any(len(members) > 1 for members in comps.values()):
+        return set()
 
     # Client QB (best-effort) pour supprimer AUSSI l'objet QuickBooks du
     # doublon perdant — sinon la dépense/facture reste en double dans QB
@@ -341,7 +394,7 @@ async def dedupe_achats(db: AsyncSession) -> int:
                 qid, exc_info=True,
             )
 
-    removed = 0
+    removed: set[int] = set()
     for members in comps.values():
         if len(members) < 2:
             continue
@@ -384,8 +437,32 @@ async def dedupe_achats(db: AsyncSession) -> int:
                 if qid and qid not in keeper_qids:
                     await _delete_qbo_object(qid)
             await db.delete(a)
-            removed += 1
+            removed.add(a.id)
     if removed:
         await db.flush()
-        log.info("dedupe_achats: %d doublon(s) supprimé(s)", removed)
+        log.info("dedupe_achats: %d doublon(s) supprimé(s)", len(removed))
     return removed
+
+
+_SPEC = dedupe_index.DedupeSpec(
+    scope="achat",
+    model=Achat,
+    keys=_blocking_keys,
+    cluster=_clusters,
+    remove=_remove_duplicates,
+)
+
+
+async def dedupe_achats(db: AsyncSession, *, full: bool = False) -> int:
+    """Supprime les achats en double, en conservant le plus complet.
+
+    Passe incrémentale : seuls les achats nouveaux / modifiés / supprimés
+    depuis la passe précédente et leurs voisins par clé de blocage sont
+    regroupés (``_clusters``) — même résultat qu'un regroupement de toute
+    la table. ``full=True`` (ou index encore vide) : reconstruction
+    complète.
+
+    Retourne le nombre d'achats supprimés. Ne committe pas (l'appelant
+    gère la transaction — index compris).
+    """
+    return await dedupe_index.run(db, _SPEC, full=full)
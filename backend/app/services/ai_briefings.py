@@ -0,0 +1,145 @@
+"""Socle des générations IA quotidiennes (briefings, problèmes Kratos).
+
+Les crons quotidiens appelaient l'IA une entreprise après l'autre, même
+quand rien n'avait bougé depuis la veille. Ici :
+
+- ``state_hash`` : empreinte stable de l'état rassemblé (lignes ORM,
+  textes, version du prompt). Chaque génération persistée garde son
+  ``input_hash`` ; empreinte identique → on réutilise, pas d'appel IA ;
+- ``fan_out`` : les appels restants partent en parallèle, bornés par
+  fournisseur (nombre d'appels simultanés + débit par minute), pour ne
+  pas se faire couper par le quota gratuit Gemini ou Groq.
+
+Les limites se surchargent par ``AI_<FOURNISSEUR>_RPM`` et
+``AI_<FOURNISSEUR>_CONCURRENCY`` (ex. ``AI_GEMINI_RPM=30``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+#: (appels / minute, appels simultanés) par défaut, par fournisseur.
+PROVIDER_LIMITS: Dict[str, tuple] = {
+    "gemini": (10, 3),
+    "anthropic": (50, 4),
+    "groq": (30, 3),
+}
+_DEFAULT_LIMITS = (10, 2)
+
+
+def _row_fingerprint(obj: Any) -> Any:
+    """Valeurs des colonnes d'une ligne ORM (sinon la valeur telle quelle)."""
+    table = getattr(obj, "__table__", None)
+    if table is None:
+        return obj
+    return [table.name, {c.key: getattr(obj, c.key, None) for c in table.columns}]
+
+
+def _canon(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+
+
+def state_hash(*parts: Any) -> str:
+    """SHA-256 d'un état rassemblé. Les lignes ORM sont réduites à
+    leurs colonnes ; l'ordre des listes est ignoré (les requêtes sans
+    ``ORDER BY`` ne rendent pas toujours les lignes dans le même
+    ordre)."""
+
+    def _norm(value: Any) -> Any:
+        if isinstance(value, (list, tuple)):
+            return sorted((_norm(v) for v in value), key=_canon)
+        if isinstance(value, dict):
+            return {str(k): _norm(v) for k, v in value.items()}
+        return _row_fingerprint(value)
+
+    raw = _canon([_norm(p) for p in parts])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _TokenBucket:
+    """Seau à jetons : ``rate_per_minute`` en régime, ``burst`` d'avance."""
+
+    def __init__(self, rate_per_minute: float, burst: int) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Un seau par fournisseur pour tout le process : deux crons qui tournent
+# en même temps se partagent le même débit.
+_buckets: Dict[str, _TokenBucket] = {}
+
+
+def provider_limits(provider: str) -> tuple:
+    """(appels / minute, appels simultanés) pour ``provider``."""
+    rpm, conc = PROVIDER_LIMITS.get(provider, _DEFAULT_LIMITS)
+    prefix = f"AI_{provider.upper()}_"
+    try:
+        rpm = float(os.getenv(prefix + "RPM") or rpm)
+        conc = int(os.getenv(prefix + "CONCURRENCY") or conc)
+    except ValueError:
+        log.warning("Limites IA invalides pour %s — défauts gardés", provider)
+    return max(rpm, 0.1), max(conc, 1)
+
+
+def _bucket(provider: str) -> _TokenBucket:
+    b = _buckets.get(provider)
+    if b is None:
+        rpm, conc = provider_limits(provider)
+        b = _TokenBucket(rpm, burst=conc)
+        _buckets[provider] = b
+    return b
+
+
+async def fan_out(
+    items: Iterable[T],
+    call: Callable[[T], Awaitable[R]],
+    *,
+    provider: str,
+) -> List[Any]:
+    """Exécute ``call(item)`` pour chaque élément, en parallèle sous la
+    limite du fournisseur. Retourne les résultats dans l'ordre ; une
+    exception est retournée à sa place (un échec n'annule pas les
+    autres)."""
+    items = list(items)
+    if not items:
+        return []
+    _, conc = provider_limits(provider)
+    sem = asyncio.Semaphore(conc)
+    bucket = _bucket(provider)
+
+    async def _one(item: T) -> Any:
+        async with sem:
+            await bucket.acquire()
+            return await call(item)
+
+    return list(
+        await asyncio.gather(*(_one(i) for i in items), return_exceptions=True)
+    )
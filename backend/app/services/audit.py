@@ -4,22 +4,245 @@ On l'appelle depuis les endpoints mutatifs importants:
     await log_action(db, user=current_user, action="soumission.sent",
                      entity_type="soumission", entity_id=s.id,
                      details={"to": email})
+
+Par défaut l'entrée n'est PAS écrite dans la transaction de l'appelant
+(un INSERT + un aller-retour de plus, et des verrous d'index tenus
+jusqu'au commit sur les chemins d'écriture chauds) :
+
+- ``log_action`` la range dans ``session.info`` ;
+- au commit de la session, elle passe au tampon ``audit_sink`` ; un
+  rollback la jette (on ne journalise pas une action annulée) ;
+- le tampon écrit par INSERT multi-lignes, dans sa propre session, dès
+  ``audit_flush_rows`` entrées ou au plus tard ``audit_flush_interval_s``
+  secondes après la première — dans l'ordre des commits ;
+- ``lifespan`` appelle ``audit_sink.drain()`` à l'arrêt, avant
+  ``close_db()`` : rien ne reste en mémoire.
+
+Le tampon n'est actif que dans un process qui le possède : ``lifespan``
+de l'API appelle ``audit_sink.start()``. Ailleurs (crons lancés par
+``python -m app.jobs.…``, scripts), ``asyncio.run`` fermerait la boucle
+avant le minuteur et personne n'appellerait ``drain()`` : ``log_action``
+y écrit donc dans la transaction de l'appelant, comme avant.
+
+``transactional=True`` garde l'écriture synchrone dans la transaction de
+l'appelant, pour les actions dont la trace doit exister si et seulement
+si l'action existe (signatures, paiements, actions confirmées au nom
+d'un utilisateur). ``created_at`` est fixé à l'appel dans les deux
+modes : l'heure journalisée est celle de l'action, pas celle de
+l'écriture.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any, Optional
+from datetime import datetime, timezone
+from typing import Any, Callable, List, Optional, Set
 
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.audit_log import AuditLog
 from app.models.user import User
 
 
 log = logging.getLogger(__name__)
 
+_PENDING_KEY = "audit_pending"
+#: Lignes par INSERT multi-lignes (7 colonnes → 7000 paramètres, sous la
+#: limite asyncpg de 32767).
+_INSERT_ROWS = 1000
+#: Au-delà, en cas de BDD indisponible, les plus anciennes entrées en
+#: attente sont abandonnées (avec un avertissement) plutôt que de faire
+#: grossir la mémoire sans borne.
+MAX_PENDING = 50_000
+
+
+def _row(
+    user: Optional[User],
+    action: str,
+    entity_type: Optional[str],
+    entity_id: Optional[int],
+    details: Optional[dict[str, Any]],
+) -> dict[str, Any]:
+    return {
+        "user_id": user.id if user else None,
+        "user_email": user.email if user else None,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "details_json": json.dumps(details, default=str) if details else None,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+class AuditSink:
+    """Tampon en mémoire des entrées d'audit validées (voir l'en-tête)."""
+
+    def __init__(
+        self,
+        *,
+        flush_rows: Optional[int] = None,
+        flush_interval_s: Optional[float] = None,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+        max_pending: int = MAX_PENDING,
+    ) -> None:
+        self.flush_rows = flush_rows or settings.audit_flush_rows
+        self.flush_interval_s = (
+            settings.audit_flush_interval_s
+            if flush_interval_s is None
+            else flush_interval_s
+        )
+        self.max_pending = max_pending
+        self._session_factory = session_factory
+        self._buffer: List[dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+        #: Nombre d'INSERT émis (diagnostic, benchmark).
+        self.inserts = 0
+        #: Vrai entre ``start()`` et ``drain()`` : un propriétaire à longue
+        #: durée de vie (lifespan de l'API) videra le tampon à l'arrêt.
+        self.active = False
+
+    def start(self) -> None:
+        """Active le tampon (à appeler par le propriétaire du process,
+        qui s'engage à appeler ``drain()`` avant de fermer sa boucle)."""
+        self.active = True
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def enqueue(self, rows: List[dict[str, Any]]) -> None:
+        """Ajoute des entrées et déclenche un flush au seuil de taille, ou
+        arme le minuteur. Appelable depuis un callback synchrone
+        (``after_commit``) : le flush part en tâche sur la boucle."""
+        self._buffer.extend(rows)
+        self._trim()
+        if len(self._buffer) >= self.flush_rows:
+            self._schedule(0)
+        else:
+            self._schedule(self.flush_interval_s)
+
+    def _trim(self) -> None:
+        excess = len(self._buffer) - self.max_pending
+        if excess > 0:
+            del self._buffer[:excess]
+            log.warning("audit buffer full: %d oldest entries dropped", excess)
+
+    def _schedule(self, delay: float) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Hors boucle (script synchrone) : le prochain enqueue ou
+            # drain() s'en chargera.
+            return
+        if self._timer is not None and self._timer_loop is loop:
+            if delay > 0:
+                return  # minuteur déjà armé pour ce lot
+            self._timer.cancel()
+        self._timer = None
+        if delay <= 0:
+            self._spawn(loop)
+        else:
+            self._timer = loop.call_later(delay, self._spawn, loop)
+            self._timer_loop = loop
+
+    def _spawn(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._timer = None
+        task = loop.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> int:
+        """Écrit tout le tampon ; renvoie le nombre de lignes écrites.
+
+        Sérialisé par un verrou : chaque flush prend le tampon entier au
+        moment où il obtient le verrou, l'ordre des commits est donc
+        l'ordre d'insertion. BDD indisponible → les lignes reviennent en
+        tête du tampon et un nouvel essai est programmé."""
+        async with self._lock:
+            rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                return await self._write(rows)
+            except Exception as exc:
+                log.warning("audit flush failed (%d entries kept): %s", len(rows), exc)
+                self._buffer[:0] = rows
+                self._trim()
+                self._schedule(self.flush_interval_s)
+                return 0
+
+    async def _write(self, rows: List[dict[str, Any]]) -> int:
+        factory = self._session_factory
+        if factory is None:
+            from app.db.session import AsyncSessionLocal as factory
+        async with factory() as db:
+            try:
+                for i in range(0, len(rows), _INSERT_ROWS):
+                    await db.execute(insert(AuditLog).values(rows[i : i + _INSERT_ROWS]))
+                    self.inserts += 1
+                await db.commit()
+                return len(rows)
+            except IntegrityError:
+                await db.rollback()
+            # Une ligne invalide (utilisateur supprimé entre-temps…) ne
+            # doit pas bloquer le lot : ligne par ligne, on écarte les
+            # fautives.
+            written = 0
+            for row in rows:
+                try:
+                    await db.execute(insert(AuditLog).values(row))
+                    self.inserts += 1
+                    await db.commit()
+                    written += 1
+                except IntegrityError as exc:
+                    await db.rollback()
+                    log.warning("audit entry %s dropped: %s", row["action"], exc)
+            return written
+
+    async def drain(self) -> int:
+        """Vide le tampon et attend les flushs en vol (arrêt de l'app)."""
+        self.active = False
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        written = 0
+        while self._tasks:
+            tasks = list(self._tasks)
+            self._tasks.difference_update(tasks)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            written += sum(r for r in results if isinstance(r, int))
+        written += await self.flush()
+        if self._timer is not None:  # échec : pas de nouvel essai à l'arrêt
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            log.warning("audit drain: %d entries lost at shutdown", len(self._buffer))
+        return written
+
+
+audit_sink = AuditSink()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_on_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        audit_sink.enqueue(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
 
 async def log_action(
     db: AsyncSession,
@@ -29,20 +252,23 @@ async def log_action(
     entity_type: Optional[str] = None,
     entity_id: Optional[int] = None,
     details: Optional[dict[str, Any]] = None,
+    transactional: bool = False,
 ) -> None:
     try:
-        entry = AuditLog(
-            user_id=user.id if user else None,
-            user_email=user.email if user else None,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            details_json=(
-                json.dumps(details, default=str) if details else None
-            ),
-        )
-        db.add(entry)
-        await db.flush()
+        row = _row(user, action, entity_type, entity_id, details)
+        if (
+            transactional
+            or not settings.audit_buffer_enabled
+            or not audit_sink.active
+        ):
+            db.add(AuditLog(**row))
+            await db.flush()
+        else:
+            if not db.in_transaction():
+                # Ouvre la transaction : sans elle, un rollback ne lève
+                # aucun événement et l'entrée survivrait à l'annulation.
+                await db.connection()
+            db.sync_session.info.setdefault(_PENDING_KEY, []).append(row)
     except Exception as exc:
         # Never let an audit failure break the actual business action.
         log.warning("audit log failed for %s: %s", action, exc)
@@ -0,0 +1,174 @@
+"""Cache des réponses publiques du blog (liste, article, sitemap, recherche).
+
+Les endpoints SEO (``/blog``) sont surtout lus par des robots et des
+visiteurs anonymes : chaque requête relisait Postgres et resérialisait
+la même liste. Ici la réponse RENDUE (octets JSON) est gardée par URL
+normalisée, avec :
+
+- ``ETag`` (empreinte du corps) et ``Last-Modified`` (dernière
+  modification du blog) → ``304 Not Modified`` sur ``If-None-Match`` /
+  ``If-Modified-Since`` ;
+- ``Cache-Control: public, max-age, s-maxage`` pour le CDN.
+
+Invalidation : la « version » du blog (nombre d'articles, derniers
+``updated_at`` / ``published_at``) est relue au plus toutes les
+``_VERSION_TTL_SECONDS`` — une requête d'agrégat au lieu du rendu. Le
+job ``seo_daily`` tourne dans un autre process (cron Render) : son
+commit est vu au plus tard à la relecture suivante. Un commit de ce
+process qui touche ``SeoArticle`` (édition admin) vide le cache tout de
+suite (écouteur ``after_commit``, comme le réveil de ``job_queue``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.seo_article import SeoArticle
+
+CACHE_CONTROL = "public, max-age=60, s-maxage=600, stale-while-revalidate=3600"
+_VERSION_TTL_SECONDS = 30.0
+# Borne les variantes gardées (recherches, filtres ville/service).
+_MAX_ENTRIES = 512
+
+_DIRTY_KEY = "blog_cache_dirty"
+
+
+@dataclass(frozen=True)
+class _Rendered:
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+
+
+_cache: "OrderedDict[str, _Rendered]" = OrderedDict()
+_version: Optional[tuple[Any, ...]] = None
+_version_checked_at = 0.0
+
+
+def invalidate() -> None:
+    """Vide le cache et force la relecture de la version."""
+    global _version, _version_checked_at
+    _cache.clear()
+    _version = None
+    _version_checked_at = 0.0
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):  # SQLite : agrégat renvoyé en texte
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def _current_version(db: AsyncSession) -> tuple[Any, ...]:
+    global _version, _version_checked_at
+    now = time.monotonic()
+    if _version is not None and now - _version_checked_at < _VERSION_TTL_SECONDS:
+        return _version
+    count, updated, published = (
+        await db.execute(
+            select(
+                func.count(SeoArticle.id),
+                func.max(SeoArticle.updated_at),
+                func.max(SeoArticle.published_at),
+            )
+        )
+    ).one()
+    version = (count, _utc(updated), _utc(published))
+    if version != _version:
+        _cache.clear()
+        _version = version
+    _version_checked_at = now
+    return version
+
+
+def _cache_key(request: Request) -> str:
+    params = sorted(request.query_params.multi_items())
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+
+def _not_modified(request: Request, entry: _Rendered) -> bool:
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        # If-None-Match prime sur If-Modified-Since (RFC 9110).
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        return "*" in tags or entry.etag in tags
+    ims = request.headers.get("if-modified-since")
+    if ims and entry.last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return entry.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+async def cached_response(
+    request: Request,
+    db: AsyncSession,
+    render: Callable[[], Awaitable[bytes]],
+) -> Response:
+    """Réponse JSON de ``render()`` (corps sérialisé), servie depuis le
+    cache tant que le blog n'a pas changé, en ``304`` si le client a déjà
+    cette version."""
+    version = await _current_version(db)
+    key = _cache_key(request)
+    entry = _cache.get(key)
+    if entry is None:
+        body = await render()
+        last_modified = max(
+            (v for v in version[1:] if v is not None), default=None
+        )
+        entry = _Rendered(
+            body=body,
+            etag='"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+            last_modified=last_modified,
+        )
+        _cache[key] = entry
+        while len(_cache) > _MAX_ENTRIES:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if entry.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(entry.last_modified, usegmt=True)
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=entry.body, media_type="application/json", headers=headers
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session: Session, _ctx: Any) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, SeoArticle):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_dirty(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
@@ -12,19 +12,23 @@ Pour chaque nouvelle CentrisListing, on tente de :
    + ajouter une note sur le lead
 
 Le job tourne en arrière-plan après chaque scrape Centris (auto ou
-paste manuel).
+paste manuel). En lot (`triage_recent_listings`), comparables et unités
+MTL sont chargés UNE fois pour toutes les annonces (`TriageContext`).
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import re
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.integrations.roles_evaluation.montreal import make_search_key
 from app.models.centris_listing import CentrisListing
 from app.models.montreal_property_unit import MontrealPropertyUnit
 from app.models.prospection_analyse import ProspectionAnalyse
@@ -45,80 +49,146 @@ from app.services.financial_calculator import (
 log = logging.getLogger(__name__)
 
 
-async def _estimate_market_rent(
-    db: AsyncSession,
-    listing: CentrisListing,
+# On vise les 4½ (2 chambres), typique multi-logements ; en deçà de
+# 3 comparables de cette taille, on prend la médiane tous formats.
+_TARGET_BEDS = 2
+_MIN_TARGET_COMPARABLES = 3
+
+
+def _fsa(postal_code: Optional[str]) -> str:
+    """Région de tri d'acheminement (3 premiers caractères, majuscules)."""
+    return (postal_code or "")[:3].upper()
+
+
+def _median(values: list[float]) -> Optional[float]:
+    if not values:
+        return None
+    sorted_p = sorted(values)
+    mid = len(sorted_p) // 2
+    if len(sorted_p) % 2 == 0:
+        return (sorted_p[mid - 1] + sorted_p[mid]) / 2
+    return sorted_p[mid]
+
+
+def _rent_from_comparables(
+    rows: list[tuple[Optional[int], float]],
 ) -> Optional[float]:
-    """Estime le loyer mensuel moyen depuis comparables.
+    """Médiane des loyers (bedrooms, price) — 4½ en priorité."""
+    candidates = [p for beds, p in rows if beds == _TARGET_BEDS and p]
+    if len(candidates) < _MIN_TARGET_COMPARABLES:
+        # Pas assez de 4½, fallback sur tous prix
+        candidates = [p for _beds, p in rows if p]
+    return _median(candidates)
 
-    Match : postal_code FSA (3 char) ou nom_rue. Filtre par chambres
-    si on a une idée de la taille typique (basé sur nb_units et année,
-    on suppose 4½ ou 5½). Sinon prend la médiane globale.
 
-    Retourne None si aucun comparable trouvé (le pipeline saute
-    le scoring auto).
+@dataclass
+class TriageContext:
+    """Données partagées d'un lot d'annonces, chargées en une fois.
+
+    - ``rents_by_fsa`` : comparables (chambres, loyer) de chaque FSA du
+      lot — une seule requête pour tout le lot, puis la médiane par
+      FSA est calculée une fois et réutilisée par chaque annonce ;
+    - ``mtl_by_key`` : unités du rôle MTL indexées par ``search_key``
+      (même normalisation que `lookup_by_address`) — une requête `IN`
+      sur l'index au lieu d'un `ILIKE '%rue%'` par annonce.
     """
-    fsa = (listing.postal_code or "")[:3].upper()
 
-    stmt = select(RentalListing).where(
-        RentalListing.price.is_not(None),
-        RentalListing.price > 0,
+    rents_by_fsa: dict[str, list[tuple[Optional[int], float]]] = field(
+        default_factory=dict
     )
-    if fsa:
-        from sqlalchemy import func as sa_func
+    mtl_by_key: dict[str, MontrealPropertyUnit] = field(default_factory=dict)
+    _rent_cache: dict[str, Optional[float]] = field(default_factory=dict)
 
-        stmt = stmt.where(
-            sa_func.upper(RentalListing.postal_code).like(f"{fsa}%")
-        )
-    elif listing.nom_rue:
-        stmt = stmt.where(
-            RentalListing.nom_rue.ilike(f"%{listing.nom_rue}%")
-        )
-    else:
-        return None
+    def rent_for_fsa(self, fsa: str) -> Optional[float]:
+        if fsa not in self._rent_cache:
+            self._rent_cache[fsa] = _rent_from_comparables(
+                self.rents_by_fsa.get(fsa, [])
+            )
+        return self._rent_cache[fsa]
 
-    rows = (await db.execute(stmt)).scalars().all()
-    if not rows:
-        return None
 
-    # On vise les 4½ (2 chambres) typique multi-logements
-    target_beds = 2
-    candidates = [
-        float(r.price) for r in rows if r.bedrooms == target_beds and r.price
-    ]
-    if len(candidates) < 3:
-        # Pas assez de 4½, fallback sur tous prix
-        candidates = [float(r.price) for r in rows if r.price]
-    if not candidates:
+def _mtl_search_key(listing: CentrisListing) -> Optional[str]:
+    if not listing.civique or not listing.nom_rue:
         return None
+    m = re.match(r"^(\d+)", str(listing.civique).strip())
+    if not m:
+        return None
+    return make_search_key(m.group(1), listing.nom_rue)
 
-    sorted_p = sorted(candidates)
-    mid = len(sorted_p) // 2
-    if len(sorted_p) % 2 == 0:
-        return (sorted_p[mid - 1] + sorted_p[mid]) / 2
-    return sorted_p[mid]
 
+async def load_triage_context(
+    db: AsyncSession, listings: Sequence[CentrisListing]
+) -> TriageContext:
+    """Charge comparables + unités MTL pour tout le lot (2 requêtes)."""
+    ctx = TriageContext()
 
-async def _enrich_from_mtl(
-    db: AsyncSession, listing: CentrisListing
-) -> Optional[MontrealPropertyUnit]:
-    """Cherche dans mtl_property_units une ligne qui matche
-    l'annonce Centris. Match par civique + nom_rue similaires."""
-    if not listing.civique or not listing.nom_rue:
+    fsas = {_fsa(lst.postal_code) for lst in listings} - {""}
+    if fsas:
+        fsa_expr = func.upper(func.substr(RentalListing.postal_code, 1, 3))
+        rows = (
+            await db.execute(
+                select(fsa_expr, RentalListing.bedrooms, RentalListing.price)
+                .where(
+                    RentalListing.price.is_not(None),
+                    RentalListing.price > 0,
+                    fsa_expr.in_(fsas),
+                )
+            )
+        ).all()
+        for fsa, beds, price in rows:
+            ctx.rents_by_fsa.setdefault(fsa, []).append((beds, float(price)))
+
+    keys = {k for k in (_mtl_search_key(lst) for lst in listings) if k}
+    if keys:
+        for unit in (
+            await db.execute(
+                select(MontrealPropertyUnit).where(
+                    MontrealPropertyUnit.search_key.in_(keys)
+                ).order_by(MontrealPropertyUnit.matricule)
+            )
+        ).scalars():
+            ctx.mtl_by_key.setdefault(unit.search_key, unit)
+    return ctx
+
+
+async def _estimate_market_rent(
+    db: AsyncSession,
+    listing: CentrisListing,
+    ctx: TriageContext,
+) -> Optional[float]:
+    """Estime le loyer mensuel moyen depuis comparables.
+
+    Match : postal_code FSA (3 char), via les comparables du lot
+    (``ctx``), ou nom_rue à défaut de code postal. 4½ en priorité,
+    sinon médiane globale.
+
+    Retourne None si aucun comparable trouvé (le pipeline saute
+    le scoring auto).
+    """
+    fsa = _fsa(listing.postal_code)
+    if fsa:
+        return ctx.rent_for_fsa(fsa)
+    if not listing.nom_rue:
         return None
-    candidates = (
+    rows = (
         await db.execute(
-            select(MontrealPropertyUnit)
-            .where(
-                MontrealPropertyUnit.civique_debut == listing.civique,
-                MontrealPropertyUnit.nom_rue.ilike(
-                    f"%{listing.nom_rue}%"
-                ),
+            select(RentalListing.bedrooms, RentalListing.price).where(
+                RentalListing.price.is_not(None),
+                RentalListing.price > 0,
+                RentalListing.nom_rue.ilike(f"%{listing.nom_rue}%"),
             )
-            .limit(1)
         )
-    ).scalar_one_or_none()
-    return candidates
+    ).all()
+    return _rent_from_comparables([(b, float(p)) for b, p in rows])
+
+
+def _enrich_from_mtl(
+    listing: CentrisListing, ctx: TriageContext
+) -> Optional[MontrealPropertyUnit]:
+    """Unité du rôle MTL qui matche l'annonce (civique + rue
+    normalisés), résolue depuis le lot préchargé."""
+    key = _mtl_search_key(listing)
+    return ctx.mtl_by_key.get(key) if key else None
 
 
 def _build_inputs(
@@ -179,10 +249,15 @@ def _build_inputs(
 
 
 async def triage_listing(
-    db: AsyncSession, listing: CentrisListing
+    db: AsyncSession,
+    listing: CentrisListing,
+    ctx: Optional[TriageContext] = None,
 ) -> dict:
     """Évalue UNE annonce Centris. Si rentable, crée le lead.
 
+    ``ctx`` : données préchargées du lot (`load_triage_context`) ; chargé
+    pour cette seule annonce si absent.
+
     Retourne un dict { status, lead_id, gain_aph50, gain_schl }.
     Status : 'created' | 'not_profitable' | 'skipped' | 'matched_lead'.
     """
@@ -208,8 +283,10 @@ async def triage_listing(
             }
 
     # 2. Enrichir depuis MTL + market rent
-    mtl = await _enrich_from_mtl(db, listing)
-    market_rent = await _estimate_market_rent(db, listing)
+    if ctx is None:
+        ctx = await load_triage_context(db, [listing])
+    mtl = _enrich_from_mtl(listing, ctx)
+    market_rent = await _estimate_market_rent(db, listing, ctx)
 
     inputs = _build_inputs(listing, mtl, market_rent)
     if inputs is None:
@@ -457,6 +534,9 @@ async def triage_recent_listings(
         )
     ).scalars().all()
 
+    # Comparables par FSA + unités MTL : chargés une fois pour le lot.
+    ctx = await load_triage_context(db, listings)
+
     summary = {
         "processed": 0,
         "created": 0,
@@ -466,7 +546,7 @@ async def triage_recent_listings(
     }
     for listing in listings:
         try:
-            r = await triage_listing(db, listing)
+            r = await triage_listing(db, listing, ctx)
             summary["processed"] += 1
             if r["status"] == "created":
                 summary["created"] += 1
@@ -0,0 +1,265 @@
+"""Déduplication incrémentale — moteur commun achats / factures.
+
+``dedupe_achats`` / ``dedupe_factures`` chargeaient toute la table et
+reconstruisaient les grappes (union-find) à chaque synchro : un coût qui
+grandit avec l'historique, pour quelques nouveaux achats à examiner. Ici
+chaque passe ne touche que les BLOCS concernés :
+
+1. enregistrements à réexaminer : nouveaux ou modifiés depuis leur
+   indexation (``updated_at`` ≠ copie indexée), et disparus (entrée
+   orpheline) — repérés en SQL, sans rien charger ;
+2. bloc = fermeture par clés de blocage partagées (index
+   ``dedupe_fingerprints``), anciennes clés comprises (un achat modifié
+   peut quitter sa grappe). Tout enregistrement qui partage une clé avec
+   un membre du bloc en fait partie : regrouper le bloc seul donne
+   exactement les grappes d'un regroupement complet ;
+3. regroupement + suppression des doublons par les règles du module
+   appelant, puis mise à jour de l'index. Un gardé enrichi par la fusion
+   (nouvelles clés) relance un tour sur son bloc.
+
+Index vide (première passe, tables neuves) ou ``full=True`` :
+reconstruction complète — aussi déclenchable par l'admin
+(``POST /admin/data/dedupe/rebuild``).
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from sqlalchemy import and_, bindparam, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dedupe_index import KEY_MAX, DedupeEntry, DedupeFingerprint
+
+log = logging.getLogger(__name__)
+
+# Taille des listes IN() (limite de paramètres SQLite / Postgres).
+_CHUNK = 500
+
+#: racine → membres (triés par id), comme l'union-find des modules appelants.
+Clusters = Dict[int, List[Any]]
+
+
+@dataclass(frozen=True)
+class DedupeSpec:
+    """Ce qui distingue achats et factures pour le moteur commun."""
+
+    scope: str
+    model: Any
+    # Clés de blocage : deux enregistrements sans clé commune ne sont
+    # jamais regroupés par ``cluster``.
+    keys: Callable[[Any], Set[str]]
+    # Grappes d'une liste d'enregistrements triée par id.
+    cluster: Callable[[List[Any]], Clusters]
+    # Supprime les doublons des grappes ; retourne les ids supprimés.
+    remove: Callable[[AsyncSession, Clusters], Awaitable[Set[int]]]
+
+
+def _chunks(ids: Iterable[Any]) -> Iterator[List[Any]]:
+    seq = sorted(ids)
+    for i in range(0, len(seq), _CHUNK):
+        yield seq[i : i + _CHUNK]
+
+
+def _stored_keys_of(spec: DedupeSpec, entity: Any) -> Set[str]:
+    return {k[:KEY_MAX] for k in spec.keys(entity)}
+
+
+async def _indexed(db: AsyncSession, scope: str) -> bool:
+    return (
+        await db.execute(
+            select(DedupeEntry.id).where(DedupeEntry.scope == scope).limit(1)
+        )
+    ).first() is not None
+
+
+async def pending(db: AsyncSession, spec: DedupeSpec) -> Tuple[Set[int], Set[int]]:
+    """(ids nouveaux ou modifiés depuis l'indexation, ids disparus)."""
+    M, E = spec.model, DedupeEntry
+    changed = await db.execute(
+        select(M.id)
+        .outerjoin(E, and_(E.scope == spec.scope, E.entity_id == M.id))
+        .where(
+            or_(
+                E.id.is_(None),
+                E.source_updated_at.is_(None),
+                E.source_updated_at != M.updated_at,
+            )
+        )
+    )
+    gone = await db.execute(
+        select(E.entity_id)
+        .outerjoin(M, M.id == E.entity_id)
+        .where(E.scope == spec.scope, M.id.is_(None))
+    )
+    return set(changed.scalars()), set(gone.scalars())
+
+
+async def _load(db: AsyncSession, spec: DedupeSpec, ids: Set[int]) -> List[Any]:
+    out: List[Any] = []
+    for chunk in _chunks(ids):
+        out.extend(
+            (
+                await db.execute(
+                    select(spec.model).where(spec.model.id.in_(chunk))
+                )
+            ).scalars()
+        )
+    return out
+
+
+async def _keys_of_ids(db: AsyncSession, scope: str, ids: Set[int]) -> Set[str]:
+    out: Set[str] = set()
+    for chunk in _chunks(ids):
+        out.update(
+            (
+                await db.execute(
+                    select(DedupeFingerprint.key).where(
+                        DedupeFingerprint.scope == scope,
+                        DedupeFingerprint.entity_id.in_(chunk),
+                    )
+                )
+            ).scalars()
+        )
+    return out
+
+
+async def _ids_of_keys(db: AsyncSession, scope: str, keys: Set[str]) -> Set[int]:
+    out: Set[int] = set()
+    for chunk in _chunks(keys):
+        out.update(
+            (
+                await db.execute(
+                    select(DedupeFingerprint.entity_id).where(
+                        DedupeFingerprint.scope == scope,
+                        DedupeFingerprint.key.in_(chunk),
+                    )
+                )
+            ).scalars()
+        )
+    return out
+
+
+async def _block(
+    db: AsyncSession, spec: DedupeSpec, seed: Set[int], gone: Set[int]
+) -> List[Any]:
+    """Fermeture de ``seed`` (et des anciennes clés de ``gone``) par clés
+    de blocage partagées, triée par id."""
+    loaded: Dict[int, Any] = {}
+    tried: Set[int] = set()
+    seen: Set[str] = set()
+    keys = await _keys_of_ids(db, spec.scope, seed | gone)
+    todo = set(seed)
+    while True:
+        tried |= todo
+        for entity in await _load(db, spec, todo):
+            loaded[entity.id] = entity
+            keys |= _stored_keys_of(spec, entity)
+        keys -= seen
+        if not keys:
+            break
+        seen |= keys
+        todo = await _ids_of_keys(db, spec.scope, keys) - tried
+        keys = set()
+    return sorted(loaded.values(), key=lambda e: e.id)
+
+
+async def _store(
+    db: AsyncSession,
+    spec: DedupeSpec,
+    clusters: Clusters,
+    stale: Set[int],
+    *,
+    wipe: bool = False,
+) -> None:
+    """Réécrit l'index des membres de ``clusters`` (et oublie ``stale``)."""
+    entries = DedupeEntry.__table__
+    prints = DedupeFingerprint.__table__
+    # updated_at des gardés enrichis posé AVANT sa copie dans l'index.
+    await db.flush()
+    members = [e for ms in clusters.values() for e in ms]
+    if wipe:
+        await db.execute(delete(entries).where(entries.c.scope == spec.scope))
+        await db.execute(delete(prints).where(prints.c.scope == spec.scope))
+    else:
+        for chunk in _chunks(stale | {e.id for e in members}):
+            for table in (entries, prints):
+                await db.execute(
+                    delete(table).where(
+                        table.c.scope == spec.scope,
+                        table.c.entity_id.in_(chunk),
+                    )
+                )
+    entry_rows: List[dict] = []
+    print_rows: List[dict] = []
+    for ms in clusters.values():
+        cluster_id = min(e.id for e in ms)
+        for e in ms:
+            entry_rows.append({"eid": e.id, "cid": cluster_id})
+            print_rows.extend(
+                {"scope": spec.scope, "entity_id": e.id, "key": k}
+                for k in sorted(_stored_keys_of(spec, e))
+            )
+    if entry_rows:
+        M = spec.model
+        # updated_at copié en SQL (valeur brute, comparée telle quelle par
+        # ``pending``).
+        await db.execute(
+            insert(entries).values(
+                scope=spec.scope,
+                entity_id=bindparam("eid"),
+                cluster_id=bindparam("cid"),
+                source_updated_at=select(M.updated_at)
+                .where(M.id == bindparam("eid"))
+                .scalar_subquery(),
+            ),
+            entry_rows,
+        )
+    if print_rows:
+        await db.execute(insert(prints), print_rows)
+
+
+async def run(db: AsyncSession, spec: DedupeSpec, *, full: bool = False) -> int:
+    """Passe de dédup : incrémentale, ou complète si ``full`` / index vide.
+    Retourne le nombre d'enregistrements supprimés. Ne committe pas."""
+    if not full and not await _indexed(db, spec.scope):
+        full = True
+    removed: Set[int] = set()
+
+    if full:
+        entities = list(
+            (await db.execute(select(spec.model).order_by(spec.model.id))).scalars()
+        )
+        while True:
+            clusters = spec.cluster(entities)
+            dropped = await spec.remove(db, clusters)
+            if not dropped:
+                break
+            removed |= dropped
+            entities = [e for e in entities if e.id not in dropped]
+        await _store(db, spec, clusters, set(), wipe=True)
+        log.info(
+            "dedupe %s : index reconstruit (%d enregistrement(s))",
+            spec.scope,
+            len(entities),
+        )
+        return len(removed)
+
+    seed, gone = await pending(db, spec)
+    stale = set(gone)
+    while seed or gone:
+        block = await _block(db, spec, seed, gone)
+        clusters = spec.cluster(block)
+        dropped = await spec.remove(db, clusters)
+        if dropped:
+            # Les gardés ont pu gagner des clés : nouveau tour sur le bloc.
+            removed |= dropped
+            stale |= dropped
+            seed = {e.id for e in block} - dropped
+            gone = dropped
+            continue
+        await _store(db, spec, clusters, stale)
+        break
+    return len(removed)
@@ -307,6 +307,7 @@ async def handle_stripe_webhook(
             "stripe_session_id": invoice.stripe_session_id,
             "stripe_payment_intent_id": invoice.stripe_payment_intent_id,
         },
+        transactional=True,
     )
 
     return {"ok": True, "invoice_id": invoice.id}
@@ -17,9 +17,12 @@ Le wrapper n'est PAS asynchrone côté Google : ``google-api-python-client``
 est synchrone. On exécute les appels Drive via ``asyncio.to_thread`` pour
 ne pas bloquer la boucle FastAPI.
 
-Aucun cache local : la source de vérité reste Google Drive. Les pages
-Kratos qui veulent éviter de retaper l'API à chaque rendu utilisent la
-table ``drive_entity_links`` (cf. Phase 4).
+La source de vérité reste Google Drive. Listing, métadonnées et
+breadcrumbs passent par le cache par utilisateur :mod:`drive_cache`,
+tenu à jour via ``changes.list`` ; les mutations de ce module y sont
+reportées immédiatement. Les pages Kratos qui veulent éviter de retaper
+l'API à chaque rendu utilisent aussi la table ``drive_entity_links``
+(cf. Phase 4).
 """
 
 from __future__ import annotations
@@ -37,7 +40,7 @@ from google.oauth2.credentials import Credentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.drive_audit_log import DriveAuditLog
-from app.services import drive_oauth
+from app.services import drive_cache, drive_oauth
 from app.services.drive_exceptions import (
     DriveAPIError,
     DriveAuthError,
@@ -224,6 +227,16 @@ async def _google_email_for(
         return None
 
 
+async def _fresh_cache(
+    user_id: int, db: AsyncSession
+) -> drive_cache.UserDriveCache:
+    return await drive_cache.fresh_cache(
+        user_id,
+        lambda: get_drive_service(user_id, db),
+        file_fields=_FILE_FIELDS,
+    )
+
+
 # ---------------------------------------------------------------------------
 # Listing & métadonnées
 # ---------------------------------------------------------------------------
@@ -238,12 +251,33 @@ async def list_folder_contents(
     page_token: Optional[str] = None,
     order_by: str = "folder,name",
 ) -> dict[str, Any]:
-    """Liste le contenu d'un dossier (non-trashed). Pagination Google."""
-    service = await get_drive_service(user_id, db)
+    """Liste le contenu d'un dossier (non-trashed). Pagination Google.
+
+    Servi par :mod:`drive_cache` tant qu'aucun changement Drive n'a
+    touché le dossier.
+    """
     google_email = await _google_email_for(user_id, db)
     # Query Drive : enfants directs du dossier, non corbeille.
     query = f"'{folder_id}' in parents and trashed = false"
+    cache_key = (page_size, page_token, order_by)
     try:
+        cache = await _fresh_cache(user_id, db)
+        cached = drive_cache.get_listing(cache, folder_id, cache_key)
+        if cached is not None:
+            await _audit(
+                db,
+                user_id=user_id,
+                google_email=google_email,
+                action="list_folder",
+                drive_file_id=folder_id,
+                details={
+                    "count": len(cached["files"]),
+                    "page_token": page_token,
+                    "cached": True,
+                },
+            )
+            return cached
+        service = await get_drive_service(user_id, db)
         result = await asyncio.to_thread(
             lambda: service.files().list(
                 q=query,
@@ -270,6 +304,12 @@ async def list_folder_contents(
 
     files = [_strip_user_id(f) for f in result.get("files", [])]
     next_page_token = result.get("nextPageToken")
+    drive_cache.store_listing(
+        cache,
+        folder_id,
+        cache_key,
+        {"files": files, "next_page_token": next_page_token},
+    )
     await _audit(
         db,
         user_id=user_id,
@@ -285,9 +325,22 @@ async def get_file_metadata(
     user_id: int, db: AsyncSession, file_id: str
 ) -> dict[str, Any]:
     """Métadonnées complètes (incluant parents pour breadcrumbs)."""
-    service = await get_drive_service(user_id, db)
     google_email = await _google_email_for(user_id, db)
     try:
+        cache = await _fresh_cache(user_id, db)
+        meta = drive_cache.get_file(cache, file_id)
+        if meta is not None:
+            await _audit(
+                db,
+                user_id=user_id,
+                google_email=google_email,
+                action="get_metadata",
+                drive_file_id=file_id,
+                drive_file_name=meta.get("name"),
+                details={"cached": True},
+            )
+            return meta
+        service = await get_drive_service(user_id, db)
         meta = await asyncio.to_thread(
             lambda: service.files().get(
                 fileId=file_id,
@@ -309,6 +362,7 @@ async def get_file_metadata(
         raise translated from exc
 
     meta = _strip_user_id(meta)
+    drive_cache.remember_file(cache, meta)
     await _audit(
         db,
         user_id=user_id,
@@ -326,25 +380,44 @@ async def get_folder_path(
     """Chaîne ``[racine, ..., dossier]`` pour les breadcrumbs UI.
 
     Remonte les ``parents[0]`` jusqu'à ne plus en avoir. Limite implicite
-    à 25 niveaux pour ne pas boucler sur un Drive pathologique.
+    à 25 niveaux pour ne pas boucler sur un Drive pathologique. Le chemin
+    est mémoïsé et chaque ancêtre déjà connu de :mod:`drive_cache` évite
+    un ``files.get``.
     """
-    service = await get_drive_service(user_id, db)
     google_email = await _google_email_for(user_id, db)
     segments: list[dict[str, str]] = []
     current_id: Optional[str] = folder_id
     visited: set[str] = set()
+    service: Optional[Resource] = None
     try:
+        cache = await _fresh_cache(user_id, db)
+        cached = drive_cache.get_path(cache, folder_id)
+        if cached is not None:
+            await _audit(
+                db,
+                user_id=user_id,
+                google_email=google_email,
+                action="get_folder_path",
+                drive_file_id=folder_id,
+                details={"depth": len(cached), "cached": True},
+            )
+            return cached
         for _ in range(25):
             if not current_id or current_id in visited:
                 break
             visited.add(current_id)
-            meta = await asyncio.to_thread(
-                lambda cid=current_id: service.files().get(
-                    fileId=cid,
-                    fields="id, name, parents",
-                    supportsAllDrives=True,
-                ).execute()
-            )
+            meta = drive_cache.get_file(cache, current_id)
+            if meta is None:
+                if service is None:
+                    service = await get_drive_service(user_id, db)
+                meta = await asyncio.to_thread(
+                    lambda cid=current_id: service.files().get(
+                        fileId=cid,
+                        fields=_FILE_FIELDS,
+                        supportsAllDrives=True,
+                    ).execute()
+                )
+                drive_cache.remember_file(cache, _strip_user_id(meta))
             segments.append({"id": meta["id"], "name": meta.get("name", "")})
             parents = meta.get("parents") or []
             current_id = parents[0] if parents else None
@@ -362,6 +435,7 @@ async def get_folder_path(
         raise translated from exc
 
     segments.reverse()
+    drive_cache.store_path(cache, folder_id, segments)
     await _audit(
         db,
         user_id=user_id,
@@ -423,6 +497,7 @@ async def upload_file(
         raise translated from exc
 
     created = _strip_user_id(created)
+    drive_cache.apply_file(user_id, created)
     await _audit(
         db,
         user_id=user_id,
@@ -477,6 +552,7 @@ async def upload_file_stream(
         raise translated from exc
 
     created = _strip_user_id(created)
+    drive_cache.apply_file(user_id, created)
     await _audit(
         db,
         user_id=user_id,
@@ -658,6 +734,7 @@ async def rename_file(
         raise translated from exc
 
     updated = _strip_user_id(updated)
+    drive_cache.apply_file(user_id, updated)
     await _audit(
         db,
         user_id=user_id,
@@ -722,6 +799,7 @@ async def move_file(
         raise translated from exc
 
     updated = _strip_user_id(updated)
+    drive_cache.apply_file(user_id, updated)
     await _audit(
         db,
         user_id=user_id,
@@ -765,6 +843,7 @@ async def trash_file(
         )
         raise translated from exc
 
+    drive_cache.apply_removed(user_id, file_id)
     await _audit(
         db,
         user_id=user_id,
@@ -799,6 +878,7 @@ async def delete_file_permanent(
         )
         raise translated from exc
 
+    drive_cache.apply_removed(user_id, file_id)
     await _audit(
         db,
         user_id=user_id,
@@ -837,6 +917,7 @@ async def restore_from_trash(
         raise translated from exc
 
     restored = _strip_user_id(restored)
+    drive_cache.apply_file(user_id, restored)
     await _audit(
         db,
         user_id=user_id,
@@ -890,6 +971,7 @@ async def create_folder(
         raise translated from exc
 
     created = _strip_user_id(created)
+    drive_cache.apply_file(user_id, created)
     await _audit(
         db,
         user_id=user_id,
@@ -1026,6 +1108,7 @@ async def copy_folder_recursive(
             )
         raise translated from exc
 
+    drive_cache.forget_listing(user_id, new_folder["id"])
     if _root_log:
         await _audit(
             db,
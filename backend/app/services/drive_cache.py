@@ -0,0 +1,261 @@
+"""Cache par utilisateur des métadonnées Google Drive.
+
+Les pages Drive relisent sans cesse les mêmes objets : listing d'un
+dossier, breadcrumbs (un ``files.get`` par niveau), métadonnée avant
+chaque téléchargement. On garde en mémoire, par utilisateur Kratos :
+
+- ``files`` : id → métadonnée (champs ``_FILE_FIELDS`` de :mod:`drive_api`) ;
+- ``listings`` : pages de listing, par dossier parent ;
+- ``paths`` : breadcrumbs mémoïsés, par dossier.
+
+Fraîcheur : le cache suit le flux ``changes.list`` de Drive. Le jeton de
+départ est pris AVANT la première lecture mise en cache ; ensuite, au
+plus toutes les ``_SYNC_INTERVAL_SECONDS``, une lecture rejoue les
+changements depuis le jeton et invalide le fichier, les listings de ses
+dossiers parents (anciens et nouveaux) et les chemins qui le traversent.
+Les mutations faites via :mod:`drive_api` sont appliquées tout de suite
+(``apply_file`` / ``apply_removed``) — pas besoin d'attendre le flux.
+
+Cache process-local (comme ``permissions_service``) : un autre worker
+voit la modification au prochain ``changes.list``. Le TTL global
+``_CACHE_TTL_SECONDS`` borne la durée de vie des liens signés
+(``thumbnailLink``) qui expirent sans générer de changement.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from googleapiclient.discovery import Resource
+
+# Intervalle minimal entre deux ``changes.list`` pour un utilisateur.
+_SYNC_INTERVAL_SECONDS = 15.0
+# Durée de vie max d'un cache utilisateur (liens signés Google).
+_CACHE_TTL_SECONDS = 60 * 30
+# Au-delà, on repart d'un cache vide (le jeton de changements est gardé).
+_MAX_FILES_PER_USER = 20_000
+
+
+@dataclass
+class UserDriveCache:
+    page_token: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+    synced_at: float = 0.0
+    files: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # folder_id → {(page_size, page_token, order_by): résultat}
+    listings: dict[str, dict[tuple, dict[str, Any]]] = field(
+        default_factory=dict
+    )
+    paths: dict[str, list[dict[str, str]]] = field(default_factory=dict)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+_caches: dict[int, UserDriveCache] = {}
+
+
+def invalidate_drive_cache(user_id: Optional[int] = None) -> None:
+    """Vide le cache d'un utilisateur (ou de tous si ``None``)."""
+    if user_id is None:
+        _caches.clear()
+    else:
+        _caches.pop(user_id, None)
+
+
+async def fresh_cache(
+    user_id: int,
+    service_factory: Callable[[], Awaitable[Resource]],
+    *,
+    file_fields: str,
+) -> UserDriveCache:
+    """Cache de l'utilisateur, synchronisé sur ``changes.list`` si besoin.
+
+    ``service_factory`` n'est appelé que si une synchro est due : un cache
+    frais ne coûte ni refresh de jeton OAuth ni construction de client.
+    ``file_fields`` : champs des fichiers demandés dans les changements
+    (les mêmes que pour le listing). Une ``HttpError`` de synchro vide le
+    cache puis remonte à l'appelant.
+    """
+    now = time.monotonic()
+    entry = _caches.get(user_id)
+    if entry is None or now - entry.created_at > _CACHE_TTL_SECONDS:
+        entry = UserDriveCache()
+        _caches[user_id] = entry
+    if now - entry.synced_at < _SYNC_INTERVAL_SECONDS:
+        return entry
+    async with entry.lock:
+        if time.monotonic() - entry.synced_at < _SYNC_INTERVAL_SECONDS:
+            return entry
+        try:
+            service = await service_factory()
+            if entry.page_token is None:
+                start = await asyncio.to_thread(
+                    lambda: service.changes().getStartPageToken(
+                        supportsAllDrives=True
+                    ).execute()
+                )
+                entry.page_token = start.get("startPageToken")
+            else:
+                changes, entry.page_token = await asyncio.to_thread(
+                    _list_changes_sync, service, entry.page_token, file_fields
+                )
+                for change in changes:
+                    _apply_change(entry, change)
+        except Exception:
+            if _caches.get(user_id) is entry:
+                del _caches[user_id]
+            raise
+        entry.synced_at = time.monotonic()
+    return entry
+
+
+def _list_changes_sync(
+    service: Resource, token: str, file_fields: str
+) -> tuple[list[dict[str, Any]], str]:
+    """Toutes les pages de changements depuis ``token`` + le jeton suivant."""
+    fields = (
+        "nextPageToken, newStartPageToken, "
+        f"changes(fileId, removed, file({file_fields}))"
+    )
+    changes: list[dict[str, Any]] = []
+    while True:
+        page = service.changes().list(
+            pageToken=token,
+            pageSize=1000,
+            includeRemoved=True,
+            fields=fields,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True,
+        ).execute()
+        changes.extend(page.get("changes", []))
+        if page.get("newStartPageToken"):
+            return changes, page["newStartPageToken"]
+        token = page["nextPageToken"]
+
+
+def _apply_change(entry: UserDriveCache, change: dict[str, Any]) -> None:
+    file_id = change.get("fileId")
+    if not file_id:
+        return  # changement de Shared Drive, pas d'un fichier
+    meta = change.get("file")
+    if change.get("removed") or not meta or meta.get("trashed"):
+        _drop(entry, file_id)
+    else:
+        _put(entry, meta)
+
+
+def _drop_paths_through(entry: UserDriveCache, file_id: str) -> None:
+    stale = [
+        k for k, segs in entry.paths.items()
+        if any(s["id"] == file_id for s in segs)
+    ]
+    for k in stale:
+        del entry.paths[k]
+
+
+def _put(entry: UserDriveCache, meta: dict[str, Any]) -> None:
+    file_id = meta["id"]
+    old = entry.files.get(file_id)
+    touched = set(meta.get("parents") or [])
+    if old is not None:
+        touched.update(old.get("parents") or [])
+    for parent in touched:
+        entry.listings.pop(parent, None)
+    meta.setdefault("parents", [])
+    entry.files[file_id] = meta
+    _drop_paths_through(entry, file_id)
+
+
+def _drop(entry: UserDriveCache, file_id: str) -> None:
+    old = entry.files.pop(file_id, None)
+    if old is not None:
+        for parent in old.get("parents") or []:
+            entry.listings.pop(parent, None)
+    entry.listings.pop(file_id, None)
+    _drop_paths_through(entry, file_id)
+
+
+# ---------------------------------------------------------------------------
+# Lecture / écriture (appelées par drive_api)
+# ---------------------------------------------------------------------------
+
+
+def get_file(entry: UserDriveCache, file_id: str) -> Optional[dict[str, Any]]:
+    meta = entry.files.get(file_id)
+    return dict(meta) if meta is not None else None
+
+
+def remember_file(entry: UserDriveCache, meta: dict[str, Any]) -> None:
+    """Mémorise une métadonnée lue chez Google (sans invalidation)."""
+    if len(entry.files) >= _MAX_FILES_PER_USER:
+        entry.files.clear()
+        entry.listings.clear()
+        entry.paths.clear()
+    entry.files[meta["id"]] = dict(meta)
+
+
+def get_listing(
+    entry: UserDriveCache, folder_id: str, key: tuple
+) -> Optional[dict[str, Any]]:
+    cached = entry.listings.get(folder_id, {}).get(key)
+    if cached is None:
+        return None
+    return {
+        "files": [dict(f) for f in cached["files"]],
+        "next_page_token": cached["next_page_token"],
+    }
+
+
+def store_listing(
+    entry: UserDriveCache, folder_id: str, key: tuple, result: dict[str, Any]
+) -> None:
+    for f in result["files"]:
+        remember_file(entry, f)
+    entry.listings.setdefault(folder_id, {})[key] = {
+        "files": [dict(f) for f in result["files"]],
+        "next_page_token": result["next_page_token"],
+    }
+
+
+def get_path(
+    entry: UserDriveCache, folder_id: str
+) -> Optional[list[dict[str, str]]]:
+    segments = entry.paths.get(folder_id)
+    return [dict(s) for s in segments] if segments is not None else None
+
+
+def store_path(
+    entry: UserDriveCache, folder_id: str, segments: list[dict[str, str]]
+) -> None:
+    entry.paths[folder_id] = [dict(s) for s in segments]
+
+
+# ---------------------------------------------------------------------------
+# Mutations locales (sans attendre changes.list)
+# ---------------------------------------------------------------------------
+
+
+def apply_file(user_id: int, meta: dict[str, Any]) -> None:
+    """Fichier créé / renommé / déplacé / restauré par Kratos."""
+    entry = _caches.get(user_id)
+    if entry is not None and meta.get("id"):
+        if meta.get("trashed"):
+            _drop(entry, meta["id"])
+        else:
+            _put(entry, dict(meta))
+
+
+def apply_removed(user_id: int, file_id: str) -> None:
+    """Fichier mis à la corbeille ou supprimé par Kratos."""
+    entry = _caches.get(user_id)
+    if entry is not None:
+        _drop(entry, file_id)
+
+
+def forget_listing(user_id: int, folder_id: str) -> None:
+    """Invalide les listings d'un dossier (contenu modifié en masse)."""
+    entry = _caches.get(user_id)
+    if entry is not None:
+        entry.listings.pop(folder_id, None)
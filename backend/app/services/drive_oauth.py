@@ -54,6 +54,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.models.drive_audit_log import DriveAuditLog
 from app.models.drive_user_token import DriveUserToken
+from app.services import drive_cache
 from app.services.drive_exceptions import (
     DriveAPIError,
     DriveAuthError,
@@ -540,6 +541,7 @@ async def revoke_token(db: AsyncSession, *, user_id: int) -> None:
         delete(DriveUserToken).where(DriveUserToken.user_id == user_id)
     )
     await db.flush()
+    drive_cache.invalidate_drive_cache(user_id)
     await _audit(
         db,
         user_id=user_id,
@@ -0,0 +1,166 @@
+"""Chargement groupé des entités (façon DataLoader) pour l'activité / MCP.
+
+L'activité d'un utilisateur et les lectures détaillées (``/activity/*``,
+outils MCP comme ``kratos_activity_range``) enrichissaient chaque entité
+une à une : un ``db.get`` par lead, client, assigné, puis une requête
+par liste d'enfants (modules, items, partenaires). Sur une plage de
+plusieurs semaines, des centaines de petites requêtes.
+
+``BatchLoader`` vit le temps d'UNE requête HTTP / d'un appel d'outil :
+
+- ``want(kind, ids)`` note les ids voulus (dédoublonnés) ;
+- ``load()`` les récupère avec UN ``SELECT … WHERE id IN (…)`` par type
+  (découpé par ``IN_CHUNK`` pour rester sous la limite de paramètres) ;
+- ``get(kind, id)`` lit le cache — un id absent en base est mémorisé
+  comme tel (pas de seconde requête) ;
+- ``children(kind, parent_ids)`` : listes d'enfants (modules d'une
+  soumission, partenaires d'une entreprise…) en une requête par type.
+
+Le coût d'une plage d'activité est donc fixe : une requête par type
+d'entité touché, quel que soit le nombre de jours ou d'entités.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+
+from app.models.devlog_client import DevlogClient
+from app.models.devlog_lead import DevlogLead
+from app.models.devlog_project import DevlogProject
+from app.models.devlog_project_task import DevlogProjectTask
+from app.models.devlog_soumission import DevlogSoumission
+from app.models.devlog_soumission_item import DevlogSoumissionItem
+from app.models.devlog_soumission_module import DevlogSoumissionModule
+from app.models.employe import Employe
+from app.models.entreprise import Entreprise, EntreprisePartner
+from app.models.entreprise_tache import EntrepriseTache
+from app.models.lead_analysis import LeadAnalysis
+from app.models.project import Project
+from app.models.project_task import ProjectTask
+from app.models.prospection_deal import ProspectionDeal
+from app.models.prospection_deal_task import ProspectionDealTask
+from app.models.sales_task import SalesTask
+from app.models.user import User
+
+#: Taille max d'une liste ``IN`` (Postgres accepte bien plus, mais un
+#: plan simple et des paramètres bornés valent mieux qu'une requête géante).
+IN_CHUNK = 500
+
+#: Type d'entité (mêmes clés que ``entity_serializers``) → modèle ORM.
+MODELS: Dict[str, Any] = {
+    "user": User,
+    "employe": Employe,
+    "devlog_soumission": DevlogSoumission,
+    "devlog_lead": DevlogLead,
+    "devlog_client": DevlogClient,
+    "devlog_project": DevlogProject,
+    "devlog_project_task": DevlogProjectTask,
+    "entreprise": Entreprise,
+    "entreprise_tache": EntrepriseTache,
+    "prospection_deal": ProspectionDeal,
+    "prospection_deal_task": ProspectionDealTask,
+    "lead_analysis": LeadAnalysis,
+    "project": Project,
+    "project_task": ProjectTask,
+    "sales_task": SalesTask,
+}
+
+#: Listes d'enfants : type → (modèle, colonne parent, colonne de tri).
+CHILDREN: Dict[str, tuple] = {
+    "devlog_soumission_module": (
+        DevlogSoumissionModule, "soumission_id", "position",
+    ),
+    "devlog_soumission_item": (
+        DevlogSoumissionItem, "soumission_id", "position",
+    ),
+    "entreprise_partner": (EntreprisePartner, "entreprise_id", "id"),
+}
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for i in range(0, len(ids), IN_CHUNK):
+        yield ids[i:i + IN_CHUNK]
+
+
+class BatchLoader:
+    """Cache d'entités par (type, id) pour une requête, chargé par lots."""
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self._rows: Dict[str, Dict[int, Any]] = {}
+        self._pending: Dict[str, Set[int]] = {}
+        self._children: Dict[str, Dict[int, List[Any]]] = {}
+
+    def want(self, kind: str, ids: Iterable[Optional[int]]) -> None:
+        """Note des ids à charger au prochain ``load()`` (None ignorés)."""
+        if kind not in MODELS:
+            raise KeyError(kind)
+        known = self._rows.get(kind, {})
+        pending = self._pending.setdefault(kind, set())
+        pending.update(i for i in ids if i is not None and i not in known)
+
+    def prime(self, kind: str, objs: Iterable[Any]) -> None:
+        """Ajoute au cache des lignes déjà chargées (pas de requête)."""
+        rows = self._rows.setdefault(kind, {})
+        for obj in objs:
+            rows[obj.id] = obj
+            self._pending.get(kind, set()).discard(obj.id)
+
+    async def load(self) -> None:
+        """Charge tout ce qui est en attente : une requête par type."""
+        pending, self._pending = self._pending, {}
+        for kind, ids in pending.items():
+            if not ids:
+                continue
+            model = MODELS[kind]
+            rows = self._rows.setdefault(kind, {})
+            for chunk in _chunks(sorted(ids)):
+                found = (
+                    await self.db.execute(
+                        select(model).where(model.id.in_(chunk))
+                    )
+                ).scalars().all()
+                for obj in found:
+                    rows[obj.id] = obj
+            # Absents en base : mémorisés pour ne pas les redemander.
+            for i in ids:
+                rows.setdefault(i, None)
+
+    def get(self, kind: str, entity_id: Optional[int]) -> Any:
+        if entity_id is None:
+            return None
+        return self._rows.get(kind, {}).get(entity_id)
+
+    async def fetch(self, kind: str, entity_id: int) -> Any:
+        """``get`` avec chargement à la demande (pour un id isolé)."""
+        if entity_id not in self._rows.get(kind, {}):
+            self.want(kind, [entity_id])
+            await self.load()
+        return self.get(kind, entity_id)
+
+    async def children(
+        self, kind: str, parent_ids: Iterable[int]
+    ) -> Dict[int, List[Any]]:
+        """Enfants de chaque parent (liste vide si aucun), triés par la
+        colonne déclarée. Une requête par type pour les parents pas encore
+        vus."""
+        model, fk, order = CHILDREN[kind]
+        cache = self._children.setdefault(kind, {})
+        missing = sorted({p for p in parent_ids if p not in cache})
+        if missing:
+            fk_col = getattr(model, fk)
+            for chunk in _chunks(missing):
+                found = (
+                    await self.db.execute(
+                        select(model)
+                        .where(fk_col.in_(chunk))
+                        .order_by(fk_col, getattr(model, order))
+                    )
+                ).scalars().all()
+                for obj in found:
+                    cache.setdefault(getattr(obj, fk), []).append(obj)
+            for p in missing:
+                cache.setdefault(p, [])
+        return {p: cache.get(p, []) for p in parent_ids}
@@ -0,0 +1,168 @@
+"""eSign — cache des pages rendues (PNG + géométrie), adressé par contenu.
+
+L'éditeur de zones et la page publique de signature rastérisaient la
+page demandée à CHAQUE affichage : un signataire qui fait défiler un
+bail de 20 pages = 20 rendus poppler sur l'instance 512 Mo, puis autant
+au moindre rechargement. Ici :
+
+- les pages sont rendues UNE fois, à la création du document, par un
+  travail de la file durable (``esign.prerender_pages``, file ``pdf`` à
+  un rendu à la fois par worker) — l'upload répond sans attendre ;
+- stockées dans ``esign_page_images`` sous la clé SHA-256 du PDF + page
+  + dpi : un document créé depuis un modèle (même PDF) réutilise les
+  pages du modèle, rien n'est re-rendu ;
+- servies directement (``page_png``) : le PDF original (jusqu'à 25 Mo)
+  n'est même plus chargé. Une page absente (document d'avant le cache,
+  travail pas encore passé) est rendue seule puis gardée ;
+- ``page_sizes`` : géométrie des pages pour ``build_final_pdf``.
+
+Les écritures passent par une session courte à part : le cache ne
+dépend pas du document (même contenu = mêmes pages), un rendu fait pour
+une requête qui échoue ensuite reste acquis.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+
+from app.models.esign import EsignDocument, EsignPageImage
+from app.services.esign_pdf import PAGE_DPI, RenderedPage, render_pages
+from app.services.job_queue import enqueue, job_handler
+
+log = logging.getLogger(__name__)
+
+PRERENDER_JOB = "esign.prerender_pages"
+
+
+async def cached_pages(db, sha256: str, dpi: int = PAGE_DPI) -> List[int]:
+    """Pages déjà rendues pour ce contenu, à cette résolution."""
+    return list(
+        (
+            await db.execute(
+                select(EsignPageImage.page).where(
+                    EsignPageImage.sha256 == sha256,
+                    EsignPageImage.dpi == dpi,
+                )
+            )
+        ).scalars()
+    )
+
+
+async def page_sizes(
+    db, sha256: Optional[str], dpi: int = PAGE_DPI
+) -> Dict[int, Tuple[float, float]]:
+    """page → (largeur, hauteur) en points PDF, pour les pages en cache."""
+    if not sha256:
+        return {}
+    rows = await db.execute(
+        select(
+            EsignPageImage.page,
+            EsignPageImage.page_w_pt,
+            EsignPageImage.page_h_pt,
+        ).where(EsignPageImage.sha256 == sha256, EsignPageImage.dpi == dpi)
+    )
+    return {page: (w, h) for page, w, h in rows.all()}
+
+
+async def _store(sha256: str, dpi: int, pages: List[RenderedPage]) -> None:
+    """Enregistre des pages rendues (session à part, best-effort). Un
+    autre worker qui a rendu la même page en même temps gagne."""
+    from app.db.session import AsyncSessionLocal
+
+    if not pages:
+        return
+    try:
+        async with AsyncSessionLocal() as s:
+            known = set(await cached_pages(s, sha256, dpi))
+            s.add_all(
+                EsignPageImage(sha256=sha256, dpi=dpi, **p._asdict())
+                for p in pages
+                if p.page not in known
+            )
+            await s.commit()
+    except IntegrityError:
+        log.info("eSign : pages de %s déjà en cache (rendu concurrent)",
+                 sha256[:12])
+    except Exception:  # noqa: BLE001
+        log.exception("eSign : mise en cache des pages de %s échouée",
+                      sha256[:12])
+
+
+async def prerender(
+    db, sha256: str, pdf_blob: bytes, page_count: int, dpi: int = PAGE_DPI
+) -> int:
+    """Rend et garde les pages pas encore en cache. Retourne le nombre de
+    pages rendues (0 si tout était déjà là)."""
+    missing = sorted(
+        set(range(1, page_count + 1)) - set(await cached_pages(db, sha256, dpi))
+    )
+    if not missing:
+        return 0
+    rendered = await asyncio.to_thread(render_pages, pdf_blob, missing, dpi)
+    await _store(sha256, dpi, rendered)
+    return len(rendered)
+
+
+async def schedule_prerender(db, doc: EsignDocument) -> None:
+    """Met le rendu des pages en file, dans la transaction de l'appelant
+    (rien ne part si la création échoue). Coalescé par contenu."""
+    if not doc.sha256:
+        return
+    await enqueue(
+        db,
+        PRERENDER_JOB,
+        {"document_id": doc.id},
+        dedup_key=f"{PRERENDER_JOB}:{doc.sha256}:{PAGE_DPI}",
+    )
+
+
+@job_handler(PRERENDER_JOB, queue="pdf", max_attempts=3)
+async def _prerender_job(payload: dict) -> dict:
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        doc = (
+            await db.execute(
+                select(EsignDocument)
+                .where(EsignDocument.id == payload["document_id"])
+                .options(undefer(EsignDocument.pdf_blob))
+            )
+        ).scalar_one_or_none()
+        if doc is None or not doc.sha256:
+            return {"rendered": 0}
+        n = await prerender(db, doc.sha256, bytes(doc.pdf_blob), doc.page_count)
+    return {"rendered": n}
+
+
+async def page_png(
+    db,
+    doc: EsignDocument,
+    page_number: int,
+    load_blob: Callable[[], Awaitable[bytes]],
+    dpi: int = PAGE_DPI,
+) -> bytes:
+    """PNG d'une page : lu dans le cache, sinon rendu (seul) et gardé.
+    ``load_blob`` n'est appelé qu'en cas d'absence."""
+    if doc.sha256:
+        png = (
+            await db.execute(
+                select(EsignPageImage.png).where(
+                    EsignPageImage.sha256 == doc.sha256,
+                    EsignPageImage.page == page_number,
+                    EsignPageImage.dpi == dpi,
+                )
+            )
+        ).scalar_one_or_none()
+        if png is not None:
+            return bytes(png)
+    blob = await load_blob()
+    [rendered] = await asyncio.to_thread(render_pages, blob, [page_number], dpi)
+    if doc.sha256:
+        await _store(doc.sha256, dpi, [rendered])
+    return rendered.png
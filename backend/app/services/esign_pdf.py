@@ -2,10 +2,13 @@
 
 Deux responsabilités :
 
-1. `page_png()` : rend UNE page du PDF original en PNG (pdf2image /
-   poppler, déjà dans l'Aptfile) — sert à l'éditeur visuel de zones
-   côté admin ET à la page publique de signature. Fonctions sync
-   CPU-bound → les endpoints les appellent via `asyncio.to_thread`.
+1. `page_png()` / `render_pages()` : rendent des pages du PDF original
+   en PNG (pdf2image / poppler, déjà dans l'Aptfile, via
+   `pdf_documents`) — pour l'éditeur visuel de zones côté admin ET la
+   page publique de signature. Les endpoints ne les appellent plus à
+   chaque affichage : les pages rendues sont gardées en base
+   (`esign_pages`, cache adressé par SHA-256). Fonctions sync
+   CPU-bound → appelées via `asyncio.to_thread`.
 
 2. `build_final_pdf()` : produit le PDF final « aplati » quand tous
    les signataires ont signé — chaque zone (signature, initiales,
@@ -21,10 +24,19 @@ ici, en points PDF réels de chaque page (pas de A4 codé en dur).
 
 from __future__ import annotations
 
+import contextlib
 import io
 import logging
 from datetime import datetime, timezone
-from typing import Iterable, Optional, Sequence
+from typing import (
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 from zoneinfo import ZoneInfo
 
 from app.models.esign import (
@@ -39,6 +51,11 @@ log = logging.getLogger(__name__)
 
 TZ_MONTREAL = ZoneInfo("America/Toronto")
 
+#: Résolution des pages affichées (éditeur de zones + page publique).
+#: 130 dpi ≈ 1100 px de large pour une page lettre — suffisant pour
+#: positionner des zones à l'écran sans exploser le poids réseau.
+PAGE_DPI = 130
+
 _MONTHS_FR_CA = (
     "janvier", "février", "mars", "avril", "mai", "juin",
     "juillet", "août", "septembre", "octobre", "novembre", "décembre",
@@ -88,31 +105,53 @@ def datetime_fr_ca(d: Optional[datetime]) -> str:
 
 
 def pdf_page_count(pdf_bytes: bytes) -> int:
-    from pypdf import PdfReader
+    from app.services.pdf_documents import page_count
 
-    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    return page_count(pdf_bytes)
 
 
-def page_png(pdf_bytes: bytes, page_number: int, dpi: int = 130) -> bytes:
-    """Rend la page `page_number` (1-based) en PNG.
+def page_png(pdf_bytes: bytes, page_number: int, dpi: int = PAGE_DPI) -> bytes:
+    """Rend la page `page_number` (1-based) en PNG, sous le budget
+    mémoire commun (`pdf_documents`)."""
+    from app.services.pdf_documents import render_page_png
+
+    return render_page_png(pdf_bytes, page_number, dpi)
 
-    130 dpi ≈ 1100 px de large pour une page lettre — suffisant pour
-    positionner des zones à l'écran sans exploser le poids réseau.
-    """
-    from pdf2image import convert_from_bytes
-
-    images = convert_from_bytes(
-        pdf_bytes,
-        dpi=dpi,
-        first_page=page_number,
-        last_page=page_number,
-        fmt="png",
-    )
-    if not images:
-        raise ValueError(f"Page {page_number} introuvable dans le PDF.")
-    buf = io.BytesIO()
-    images[0].save(buf, format="PNG")
-    return buf.getvalue()
+
+class RenderedPage(NamedTuple):
+    page: int
+    png: bytes
+    width_px: int
+    height_px: int
+    page_w_pt: float
+    page_h_pt: float
+
+
+def render_pages(
+    pdf_bytes: bytes, pages: Iterable[int], dpi: int = PAGE_DPI
+) -> List[RenderedPage]:
+    """Rend les pages demandées (1-based) en PNG avec leur géométrie.
+
+    Un seul passage sur le document (copie disque et lecture pypdf
+    partagées), une page décodée à la fois sous le budget mémoire."""
+    from app.services.pdf_documents import PdfDocument, iter_page_images
+
+    out: List[RenderedPage] = []
+    with PdfDocument.from_bytes(pdf_bytes) as doc:
+        for n in sorted(set(pages)):
+            box = doc.reader().pages[n - 1].mediabox
+            rendered = iter_page_images(doc, dpi=dpi, first_page=n, last_page=n)
+            with contextlib.closing(rendered):
+                for _, img in rendered:
+                    buf = io.BytesIO()
+                    img.save(buf, format="PNG")
+                    out.append(
+                        RenderedPage(
+                            n, buf.getvalue(), img.width, img.height,
+                            float(box.width), float(box.height),
+                        )
+                    )
+    return out
 
 
 # ---------------------------------------------------------------------------
@@ -378,9 +417,14 @@ def build_final_pdf(
     fields: Iterable[EsignField],
     events: Sequence[EsignEvent],
     entreprise_name: Optional[str] = None,
+    page_sizes: Optional[Mapping[int, Tuple[float, float]]] = None,
 ) -> bytes:
     """PDF final : original + zones fusionnées + page d'audit.
 
+    ``page_sizes`` (page → largeur, hauteur en points), repris du cache
+    des pages rendues, évite de relire la géométrie de chaque page ; une
+    page absente retombe sur sa mediabox.
+
     Ne lève JAMAIS pour un champ isolé (best-effort par zone) ; une
     exception globale est laissée remonter — l'appelant décide du
     fallback (la signature en DB reste la source de vérité).
@@ -408,9 +452,11 @@ def build_final_pdf(
 
     for idx, page in enumerate(reader.pages):
         page_num = idx + 1
-        box = page.mediabox
-        page_w = float(box.width)
-        page_h = float(box.height)
+        size = (page_sizes or {}).get(page_num)
+        if size is None:
+            box = page.mediabox
+            size = (float(box.width), float(box.height))
+        page_w, page_h = size
 
         overlay_buf = io.BytesIO()
         c = canvas.Canvas(overlay_buf, pagesize=(page_w, page_h))
@@ -11,6 +11,9 @@ On regroupe les factures qui représentent sûrement la même facture :
 On garde la facture « réelle » (référence non « QB-… », avec items /
 paiements) et on lui recopie le lien QB de la copie supprimée. Idempotent ;
 ne committe pas (l'appelant gère la transaction).
+
+Incrémentale : seules les factures nouvelles / modifiées et leurs voisines
+par clé (``_keys``) sont réexaminées — voir ``app.services.dedupe_index``.
 """
 
 from __future__ import annotations
@@ -23,6 +26,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.facture import Facture
 from app.models.payment import Payment
+from app.services import dedupe_index
 
 log = logging.getLogger(__name__)
 
@@ -58,25 +62,19 @@ def _keeper_score(f: Facture, pay_counts: dict[int, int]) -> tuple:
     )
 
 
-async def dedupe_factures(db: AsyncSession) -> int:
-    """Supprime les factures en double (même facture QB ré-importée).
-    Retourne le nombre supprimé."""
-    factures = list((await db.execute(select(Facture))).scalars().all())
-    if len(factures) < 2:
-        return 0
+def _keys(f: Facture) -> set[str]:
+    """Signaux SÛRS : même Invoice QB, ou même numéro effectif + total."""
+    keys: set[str] = set()
+    if f.qbo_invoice_id:
+        keys.add(f"inv:{f.qbo_invoice_id}")
+    num = _effective_number(f)
+    if num:
+        keys.add(f"num:{num}|{_total(f):.2f}")
+    return keys
 
-    # Nombre de paiements par facture (pour le choix du gardé + transfert).
-    pay_counts: dict[int, int] = {
-        int(fid): int(n)
-        for fid, n in (
-            await db.execute(
-                select(Payment.facture_id, func.count(Payment.id)).group_by(
-                    Payment.facture_id
-                )
-            )
-        ).all()
-    }
 
+def _clusters(factures: list[Facture]) -> dict[int, list[Facture]]:
+    """Grappes de factures (triées par id) reliées par une clé commune."""
     # Union-find par signaux SÛRS.
     parent: dict[int, int] = {}
 
@@ -103,20 +101,38 @@ async def dedupe_factures(db: AsyncSession) -> int:
 
     for f in factures:
         find(f.id)
-        if f.qbo_invoice_id:
-            link(f"inv:{f.qbo_invoice_id}", f.id)
-        num = _effective_number(f)
-        if num:
-            link(f"num:{num}|{_total(f):.2f}", f.id)
+        for key in sorted(_keys(f)):
+            link(key, f.id)
 
     comps: dict[int, list[Facture]] = defaultdict(list)
     for f in factures:
         comps[find(f.id)].append(f)
+    return comps
 
-    removed = 0
-    for members in comps.values():
-        if len(members) < 2:
-            continue
+
+async def _remove_duplicates(
+    db: AsyncSession, comps: dict[int, list[Facture]]
+) -> set[int]:
+    """Supprime les copies de chaque grappe. Retourne les ids supprimés."""
+    groups = [members for members in comps.values() if len(members) > 1]
+    if not groups:
+        return set()
+
+    # Nombre de paiements par facture (pour le choix du gardé + transfert).
+    ids = [f.id for members in groups for f in members]
+    pay_counts: dict[int, int] = {
+        int(fid): int(n)
+        for fid, n in (
+            await db.execute(
+                select(Payment.facture_id, func.count(Payment.id))
+                .where(Payment.facture_id.in_(ids))
+                .group_by(Payment.facture_id)
+            )
+        ).all()
+    }
+
+    removed: set[int] = set()
+    for members in groups:
         keeper = max(members, key=lambda f: _keeper_score(f, pay_counts))
         for f in members:
             if f.id == keeper.id:
@@ -142,8 +158,24 @@ async def dedupe_factures(db: AsyncSession) -> int:
                 keeper.status = "paid"
                 keeper.paid_at = keeper.paid_at or f.paid_at
             await db.delete(f)
-            removed += 1
+            removed.add(f.id)
     if removed:
         await db.flush()
-        log.info("dedupe_factures: %d doublon(s) supprimé(s)", removed)
+        log.info("dedupe_factures: %d doublon(s) supprimé(s)", len(removed))
     return removed
+
+
+_SPEC = dedupe_index.DedupeSpec(
+    scope="facture",
+    model=Facture,
+    keys=_keys,
+    cluster=_clusters,
+    remove=_remove_duplicates,
+)
+
+
+async def dedupe_factures(db: AsyncSession, *, full: bool = False) -> int:
+    """Supprime les factures en double (même facture QB ré-importée).
+    Incrémentale (factures nouvelles / modifiées et leurs voisines), ou
+    complète avec ``full=True``. Retourne le nombre supprimé."""
+    return await dedupe_index.run(db, _SPEC, full=full)
@@ -528,196 +528,184 @@ async def sync_facture_payments_to_qbo(
     return pushed
 
 
-async def sync_facture_to_qbo(
-    db: AsyncSession, facture_id: int
-) -> Dict[str, Any]:
-    qbo = get_qbo()
-    # Charge les tokens persistés avant de vérifier ready — sinon après
-    # un redeploy l'in-memory client ne sait pas qu'on a OAuth-connecté.
-    await qbo._load_refresh_from_db()
-    if not qbo.ready:
-        raise FactureSyncError(
-            "QuickBooks n'est pas configuré (client id / secret / refresh token / realm)."
-        )
+# Motifs QBO reconnus par la création/MAJ robuste d'une Invoice.
+_DUP_KEYS = (
+    "duplicate document number",
+    "numéro de document en double",
+    "numero de document en double",
+    "6140",
+)
+_STALE_KEYS = (
+    "not found", "object not found", "introuvable", "deleted",
+    "stale", "invalid reference", "5010", "610", "2010",
+)
+
+
+async def _resolve_customer_id(qbo, client: Client) -> str:
+    customer = await qbo.ensure_customer(
+        display_name=client.name,
+        email=client.email,
+        phone=client.phone,
+        billing_address=client.address,
+    )
+    customer_id = str(customer.get("Id") or "")
+    if not customer_id:
+        raise FactureSyncError("QBO customer creation did not return an Id.")
+    return customer_id
 
-    fa = await _load_facture(db, facture_id)
-    if fa is None:
-        raise FactureSyncError(f"Facture {facture_id} introuvable")
 
-    # On NE pousse PAS une facture en BROUILLON vers QBO : seules les
-    # factures ENVOYÉES (sent / paid / overdue) deviennent des Invoice QB.
-    # Le brouillon n'est pas un document émis — il partira quand on
-    # cliquera « Envoyer au client ».
-    if (fa.status or "") in ("draft", "void"):
-        return {
-            "skipped": True,
-            "reason": "facture_draft_ou_annulee",
-            "status": fa.status,
-        }
+async def _load_project(db: AsyncSession, fa: Facture):
+    if not fa.project_id:
+        return None
+    from app.models.project import Project
 
-    items = await _load_items(db, facture_id)
-    client = await _load_client(db, fa.client_id)
-    if client is None:
-        raise FactureSyncError(
-            "La facture doit être liée à un client avant d'être envoyée dans QBO."
-        )
+    return (
+        await db.execute(select(Project).where(Project.id == fa.project_id))
+    ).scalar_one_or_none()
 
-    # Modèle QB : la facture est rattachée au PROJET (sous-client converti
-    # en projet QB, ex. « 30 Boul. Quévillon — Projet de Gabrielle Lauzon »).
-    # CustomerRef = qbo_job_id du projet → le revenu apparaît dans l'onglet
-    # Projets et roule sous le client parent. À défaut de projet relié, on
-    # facture le client parent. On porte aussi la CLASSE = chantier.
-    project = None
-    if fa.project_id:
-        from app.models.project import Project
 
-        project = (
-            await db.execute(
-                select(Project).where(Project.id == fa.project_id)
-            )
-        ).scalar_one_or_none()
+def _link_invoice(fa: Facture, inv: Dict[str, Any]) -> None:
+    fa.qbo_invoice_id = str(inv.get("Id") or "") or None
+    fa.qbo_sync_token = str(inv.get("SyncToken") or "") or None
 
-    # Pré-initialisés : utilisés dans le chemin de RÉCUPÉRATION ci-dessous
-    # (si la MAJ du corps de facture échoue mais qu'une Invoice QB existe
-    # déjà, on pousse quand même les paiements).
-    customer_id = ""
-    invoice_warning: Optional[str] = None
-    try:
-        customer = await qbo.ensure_customer(
-            display_name=client.name,
-            email=client.email,
-            phone=client.phone,
-            billing_address=client.address,
-        )
-        customer_id = str(customer.get("Id") or "")
-        if not customer_id:
-            raise FactureSyncError("QBO customer creation did not return an Id.")
-
-        # CustomerRef = PROJET (sous-client) si relié, sinon client parent.
-        # On RÉSOUT le bon id même si le sous-client a été converti en projet
-        # QB (ancien qbo_job_id supprimé → « client supprimé »).
-        # ClassRef = chantier (adresse / nom du projet).
-        invoice_customer_id = customer_id
-        class_id: Optional[str] = None
-        if project is not None:
-            from app.services.qbo_project_resolve import (
-                resolve_project_customer_id,
-            )
 
-            invoice_customer_id = await resolve_project_customer_id(
-                qbo, db, project, customer_id
-            )
-            class_name = (
-                (getattr(project, "address", None) or "").strip()
-                or (project.name or "").strip()
-            )
-            if class_name:
-                try:
-                    klass = await qbo.ensure_class(name=class_name)
-                    class_id = (
-                        str(klass.get("Id"))
-                        if klass and klass.get("Id")
-                        else None
-                    )
-                except QuickBooksError as exc:
-                    log.warning(
-                        "QBO ensure_class facture %s: %s", fa.id, exc
-                    )
+async def _prepare_invoice_payload(
+    qbo,
+    db: AsyncSession,
+    fa: Facture,
+    project,
+    customer_id: str,
+    *,
+    link_docnumber: bool = True,
+) -> Dict[str, Any]:
+    """Payload Invoice de la facture (lectures QB : projet, classe, items).
+
+    ``link_docnumber=False`` : l'appelant a déjà cherché les Invoice QB du
+    même numéro (lot — une seule requête pour toutes les factures)."""
+    # CustomerRef = PROJET (sous-client) si relié, sinon client parent.
+    # On RÉSOUT le bon id même si le sous-client a été converti en projet
+    # QB (ancien qbo_job_id supprimé → « client supprimé »).
+    # ClassRef = chantier (adresse / nom du projet).
+    invoice_customer_id = customer_id
+    class_id: Optional[str] = None
+    if project is not None:
+        from app.services.qbo_project_resolve import (
+            resolve_project_customer_id,
+        )
 
-        # Si la facture Kratos n'est pas encore liée à une Invoice QB mais
-        # qu'une Invoice du MÊME numéro (DocNumber) existe déjà dans QB
-        # (cas migration), on s'y RATTACHE pour la METTRE À JOUR et pour que
-        # le PAIEMENT s'y enregistre — au lieu de créer une facture en double.
-        if not fa.qbo_invoice_id and (fa.reference or "").strip():
+        invoice_customer_id = await resolve_project_customer_id(
+            qbo, db, project, customer_id
+        )
+        class_name = (
+            (getattr(project, "address", None) or "").strip()
+            or (project.name or "").strip()
+        )
+        if class_name:
             try:
-                inv0 = await qbo.find_invoice_by_docnumber(fa.reference)
+                klass = await qbo.ensure_class(name=class_name)
+                class_id = (
+                    str(klass.get("Id"))
+                    if klass and klass.get("Id")
+                    else None
+                )
             except QuickBooksError as exc:
                 log.warning(
-                    "QBO lookup Invoice DocNumber=%s (facture %s): %s",
-                    fa.reference, fa.id, exc,
+                    "QBO ensure_class facture %s: %s", fa.id, exc
                 )
-                inv0 = None
-            if inv0:
-                fa.qbo_invoice_id = str(inv0.get("Id") or "") or None
-                fa.qbo_sync_token = str(inv0.get("SyncToken") or "") or None
-                await db.flush()
 
-        lines = await _build_lines(
-            qbo, items, fallback_name=fa.reference
-        )
-        payload = _build_invoice_payload(
-            facture=fa,
-            customer_id=invoice_customer_id,
-            lines=lines,
-            class_id=class_id,
-            existing_invoice_id=fa.qbo_invoice_id,
-            existing_sync_token=fa.qbo_sync_token,
-        )
+    # Si la facture Kratos n'est pas encore liée à une Invoice QB mais
+    # qu'une Invoice du MÊME numéro (DocNumber) existe déjà dans QB
+    # (cas migration), on s'y RATTACHE pour la METTRE À JOUR et pour que
+    # le PAIEMENT s'y enregistre — au lieu de créer une facture en double.
+    if link_docnumber and not fa.qbo_invoice_id and (fa.reference or "").strip():
+        try:
+            inv0 = await qbo.find_invoice_by_docnumber(fa.reference)
+        except QuickBooksError as exc:
+            log.warning(
+                "QBO lookup Invoice DocNumber=%s (facture %s): %s",
+                fa.reference, fa.id, exc,
+            )
+            inv0 = None
+        if inv0:
+            _link_invoice(fa, inv0)
+            await db.flush()
 
-        # Création/MAJ robuste : si QB refuse un DOUBLON de DocNumber, on se
-        # RELIE à la facture existante (même numéro) et on la MET À JOUR pour
-        # la corriger (projet/classe) — au lieu d'en créer une 2e. Si l'Id
-        # stocké est obsolète/supprimé, on repart sans Id (puis le doublon
-        # éventuel sera relié).
-        _DUP_KEYS = (
-            "duplicate document number",
-            "numéro de document en double",
-            "numero de document en double",
-            "6140",
-        )
-        _STALE_KEYS = (
-            "not found", "object not found", "introuvable", "deleted",
-            "stale", "invalid reference", "5010", "610", "2010",
-        )
+    items = await _load_items(db, fa.id)
+    lines = await _build_lines(qbo, items, fallback_name=fa.reference)
+    return _build_invoice_payload(
+        facture=fa,
+        customer_id=invoice_customer_id,
+        lines=lines,
+        class_id=class_id,
+        existing_invoice_id=fa.qbo_invoice_id,
+        existing_sync_token=fa.qbo_sync_token,
+    )
 
-        async def _push_invoice(p: Dict[str, Any]) -> Dict[str, Any]:
-            try:
-                return await qbo.create_invoice(p)
-            except QuickBooksError as exc:
-                m = str(exc).lower()
-                # Doublon de numéro → relier à la facture existante + MAJ.
-                if not p.get("Id") and any(k in m for k in _DUP_KEYS):
-                    docnum = str(p.get("DocNumber") or "").strip()
-                    found = (
-                        await qbo.find_invoice_by_docnumber(docnum)
-                        if docnum
-                        else None
-                    )
-                    if found and found.get("Id"):
-                        p["Id"] = str(found["Id"])
-                        p["SyncToken"] = str(found.get("SyncToken") or "0")
-                        p["sparse"] = True
-                        return await qbo.create_invoice(p)
-                # Id obsolète/supprimé → recréer à neuf.
-                if p.get("Id") and any(k in m for k in _STALE_KEYS):
-                    p.pop("Id", None)
-                    p.pop("SyncToken", None)
-                    p.pop("sparse", None)
-                    return await _push_invoice(p)
-                raise
-
-        invoice = await _push_invoice(payload)
 
+async def _push_invoice(qbo, p: Dict[str, Any]) -> Dict[str, Any]:
+    """Création/MAJ robuste : si QB refuse un DOUBLON de DocNumber, on se
+    RELIE à la facture existante (même numéro) et on la MET À JOUR pour
+    la corriger (projet/classe) — au lieu d'en créer une 2e. Si l'Id
+    stocké est obsolète/supprimé, on repart sans Id (puis le doublon
+    éventuel sera relié)."""
+    try:
+        return await qbo.create_invoice(p)
     except QuickBooksError as exc:
-        # Le corps de la facture n'a pas pu être poussé/mis à jour. Si une
-        # Invoice QB existe DÉJÀ (facture déjà synchronisée), on NE bloque
-        # PAS les paiements : on garde l'Invoice existante et on tente quand
-        # même de les pousser (le besoin réel de l'utilisateur). Sans
-        # Invoice, impossible d'imputer un paiement → on lève.
-        if not (fa.qbo_invoice_id or "").strip():
-            raise FactureSyncError(str(exc)) from exc
-        log.error(
-            "Facture %s : MAJ du corps QB échouée, on tente quand même les "
-            "paiements sur l'Invoice existante %s : %s",
-            fa.id, fa.qbo_invoice_id, exc,
-        )
-        invoice = {
-            "Id": fa.qbo_invoice_id,
-            "SyncToken": fa.qbo_sync_token,
-            "DocNumber": fa.qbo_doc_number,
-        }
-        invoice_warning = f"Corps de la facture non mis à jour dans QB : {exc}"
+        m = str(exc).lower()
+        # Doublon de numéro → relier à la facture existante + MAJ.
+        if not p.get("Id") and any(k in m for k in _DUP_KEYS):
+            docnum = str(p.get("DocNumber") or "").strip()
+            found = (
+                await qbo.find_invoice_by_docnumber(docnum)
+                if docnum
+                else None
+            )
+            if found and found.get("Id"):
+                p["Id"] = str(found["Id"])
+                p["SyncToken"] = str(found.get("SyncToken") or "0")
+                p["sparse"] = True
+                return await qbo.create_invoice(p)
+        # Id obsolète/supprimé → recréer à neuf.
+        if p.get("Id") and any(k in m for k in _STALE_KEYS):
+            p.pop("Id", None)
+            p.pop("SyncToken", None)
+            p.pop("sparse", None)
+            return await _push_invoice(qbo, p)
+        raise
+
+
+def _keep_existing_invoice(
+    fa: Facture, exc: QuickBooksError
+) -> tuple[Dict[str, Any], str]:
+    """Le corps de la facture n'a pas pu être poussé/mis à jour. Si une
+    Invoice QB existe DÉJÀ (facture déjà synchronisée), on NE bloque PAS
+    les paiements : on garde l'Invoice existante et on tente quand même de
+    les pousser (le besoin réel de l'utilisateur). Sans Invoice,
+    impossible d'imputer un paiement → on lève."""
+    if not (fa.qbo_invoice_id or "").strip():
+        raise FactureSyncError(str(exc)) from exc
+    log.error(
+        "Facture %s : MAJ du corps QB échouée, on tente quand même les "
+        "paiements sur l'Invoice existante %s : %s",
+        fa.id, fa.qbo_invoice_id, exc,
+    )
+    invoice = {
+        "Id": fa.qbo_invoice_id,
+        "SyncToken": fa.qbo_sync_token,
+        "DocNumber": fa.qbo_doc_number,
+    }
+    return invoice, f"Corps de la facture non mis à jour dans QB : {exc}"
+
 
+async def _finish_invoice_sync(
+    qbo,
+    db: AsyncSession,
+    fa: Facture,
+    invoice: Dict[str, Any],
+    customer_id: str,
+    invoice_warning: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Lie l'Invoice QB à la facture puis pousse les paiements."""
     inv = invoice.get("Invoice") or invoice
     if inv.get("Id"):
         fa.qbo_invoice_id = str(inv.get("Id"))
@@ -761,6 +749,190 @@ async def sync_facture_to_qbo(
     return result
 
 
+def _skip_result(fa: Facture) -> Optional[Dict[str, Any]]:
+    # On NE pousse PAS une facture en BROUILLON vers QBO : seules les
+    # factures ENVOYÉES (sent / paid / overdue) deviennent des Invoice QB.
+    # Le brouillon n'est pas un document émis — il partira quand on
+    # cliquera « Envoyer au client ».
+    if (fa.status or "") in ("draft", "void"):
+        return {
+            "skipped": True,
+            "reason": "facture_draft_ou_annulee",
+            "status": fa.status,
+        }
+    return None
+
+
+async def _ready_qbo():
+    qbo = get_qbo()
+    # Charge les tokens persistés avant de vérifier ready — sinon après
+    # un redeploy l'in-memory client ne sait pas qu'on a OAuth-connecté.
+    await qbo._load_refresh_from_db()
+    if not qbo.ready:
+        raise FactureSyncError(
+            "QuickBooks n'est pas configuré (client id / secret / refresh token / realm)."
+        )
+    return qbo
+
+
+async def sync_facture_to_qbo(
+    db: AsyncSession, facture_id: int
+) -> Dict[str, Any]:
+    qbo = await _ready_qbo()
+
+    fa = await _load_facture(db, facture_id)
+    if fa is None:
+        raise FactureSyncError(f"Facture {facture_id} introuvable")
+    skipped = _skip_result(fa)
+    if skipped is not None:
+        return skipped
+
+    client = await _load_client(db, fa.client_id)
+    if client is None:
+        raise FactureSyncError(
+            "La facture doit être liée à un client avant d'être envoyée dans QBO."
+        )
+
+    # Modèle QB : la facture est rattachée au PROJET (sous-client converti
+    # en projet QB, ex. « 30 Boul. Quévillon — Projet de Gabrielle Lauzon »).
+    # CustomerRef = qbo_job_id du projet → le revenu apparaît dans l'onglet
+    # Projets et roule sous le client parent. À défaut de projet relié, on
+    # facture le client parent. On porte aussi la CLASSE = chantier.
+    project = await _load_project(db, fa)
+
+    # Pré-initialisés : utilisés dans le chemin de RÉCUPÉRATION ci-dessous
+    # (si la MAJ du corps de facture échoue mais qu'une Invoice QB existe
+    # déjà, on pousse quand même les paiements).
+    customer_id = ""
+    invoice_warning: Optional[str] = None
+    try:
+        customer_id = await _resolve_customer_id(qbo, client)
+        payload = await _prepare_invoice_payload(
+            qbo, db, fa, project, customer_id
+        )
+        invoice = await _push_invoice(qbo, payload)
+    except QuickBooksError as exc:
+        invoice, invoice_warning = _keep_existing_invoice(fa, exc)
+
+    return await _finish_invoice_sync(
+        qbo, db, fa, invoice, customer_id, invoice_warning
+    )
+
+
+async def sync_factures_to_qbo_batch(
+    db: AsyncSession, facture_ids: list[int]
+) -> Dict[int, Any]:
+    """Synchro de PLUSIEURS factures en regroupant les appels QB.
+
+    Même résultat que ``sync_facture_to_qbo`` facture par facture, mais :
+    - les lectures (client, item, classe…) identiques ne partent qu'une
+      fois (``memoized_reads``) ;
+    - les factures non liées sont cherchées par DocNumber en UNE requête ;
+    - les Invoice sont écrites par paquets de 30 via ``/batch``. Une
+      opération refusée dans le paquet retombe sur le chemin unitaire
+      robuste (doublon de numéro, Id périmé).
+
+    Retourne ``{facture_id: résultat | exception}`` — une facture en échec
+    n'empêche pas les autres. L'appelant commite.
+    """
+    from app.integrations.quickbooks import batch_fault_message, memoized_reads
+
+    qbo = await _ready_qbo()
+    outcomes: Dict[int, Any] = {}
+    factures = list(
+        (
+            await db.execute(
+                select(Facture).where(Facture.id.in_(facture_ids))
+            )
+        ).scalars().all()
+    )
+    for fid in facture_ids:
+        outcomes[fid] = FactureSyncError(f"Facture {fid} introuvable")
+
+    with memoized_reads():
+        todo: list[Facture] = []
+        for fa in factures:
+            skipped = _skip_result(fa)
+            if skipped is not None:
+                outcomes[fa.id] = skipped
+            else:
+                todo.append(fa)
+
+        # Lien par DocNumber : une requête pour toutes les non liées.
+        refs = {
+            (fa.reference or "").strip(): fa
+            for fa in todo
+            if not fa.qbo_invoice_id and (fa.reference or "").strip()
+        }
+        if refs:
+            try:
+                found = await qbo.find_invoices_by_docnumbers(list(refs))
+            except QuickBooksError as exc:
+                log.warning("QBO lookup Invoice DocNumber IN (...): %s", exc)
+                found = {}
+            for docnum, inv0 in found.items():
+                if docnum in refs:
+                    _link_invoice(refs[docnum], inv0)
+            await db.flush()
+
+        prepared: list[tuple[Facture, str, Dict[str, Any]]] = []
+        for fa in todo:
+            try:
+                client = await _load_client(db, fa.client_id)
+                if client is None:
+                    raise FactureSyncError(
+                        "La facture doit être liée à un client avant "
+                        "d'être envoyée dans QBO."
+                    )
+                customer_id = await _resolve_customer_id(qbo, client)
+                payload = await _prepare_invoice_payload(
+                    qbo, db, fa, await _load_project(db, fa), customer_id,
+                    link_docnumber=False,
+                )
+            except QuickBooksError as exc:
+                try:
+                    invoice, warning = _keep_existing_invoice(fa, exc)
+                    outcomes[fa.id] = await _finish_invoice_sync(
+                        qbo, db, fa, invoice, "", warning
+                    )
+                except Exception as exc2:  # noqa: BLE001
+                    outcomes[fa.id] = exc2
+                continue
+            except Exception as exc:  # noqa: BLE001
+                outcomes[fa.id] = exc
+                continue
+            prepared.append((fa, customer_id, payload))
+
+        responses = await qbo.batch(
+            [
+                {
+                    "operation": "update" if payload.get("Id") else "create",
+                    "entity": "Invoice",
+                    "payload": payload,
+                }
+                for _fa, _cid, payload in prepared
+            ]
+        ) if prepared else []
+
+        for (fa, customer_id, payload), resp in zip(prepared, responses):
+            warning: Optional[str] = None
+            try:
+                fault = batch_fault_message(resp)
+                if fault is None:
+                    invoice = resp.get("Invoice") or resp
+                else:
+                    try:
+                        invoice = await _push_invoice(qbo, payload)
+                    except QuickBooksError as exc:
+                        invoice, warning = _keep_existing_invoice(fa, exc)
+                outcomes[fa.id] = await _finish_invoice_sync(
+                    qbo, db, fa, invoice, customer_id, warning
+                )
+            except Exception as exc:  # noqa: BLE001
+                outcomes[fa.id] = exc
+    return outcomes
+
+
 async def push_facture_payments_only(
     db: AsyncSession, facture_id: int
 ) -> Dict[str, Any]:
@@ -13,19 +13,31 @@ feeds Google Calendar, Outlook, and Apple iCloud publish:
 
 Anything unrecognized is silently skipped — a valid "subset" is far
 better than blowing up on an edge case.
+
+Sync is incremental: feeds are fetched concurrently with conditional
+GETs (ETag / Last-Modified), parsed while streaming, and only the busy
+ranges that changed are written (diff against the feed's blocks).
+
+Only events inside a sliding window are kept, so a feed that answers
+304 forever would never pick up events that the window reaches as days
+pass. The window end (day) used for the stored blocks is kept on the
+feed: once it has moved — at most once a day — the validators and the
+hash short-circuit are skipped and the feed is re-read in full.
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
 import re
-import ssl
-import urllib.request
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import date, datetime, time, timedelta, timezone
 from typing import Iterable, Optional
 
-from sqlalchemy import delete
+import httpx
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.calendar_sync import ExternalBusyBlock, UserCalendarFeed
@@ -59,117 +71,331 @@ def _parse_dt(raw: str) -> Optional[datetime]:
     return None
 
 
-def _unfold(lines: Iterable[str]) -> list[str]:
-    """Join continuation lines (leading space/tab) into their parent."""
-    out: list[str] = []
-    for line in lines:
-        if (line.startswith(" ") or line.startswith("\t")) and out:
-            out[-1] += line[1:].rstrip("\r\n")
-        else:
-            out.append(line.rstrip("\r\n"))
-    return out
+class _EventParser:
+    """Incremental VEVENT parser: feed physical lines one at a time
+    (unfolding is handled here), collect (start, end) tuples in UTC.
 
+    Lets the sync stream a large feed off the socket instead of holding
+    the whole body and its split lines in memory."""
 
-def parse_events(ics: str) -> list[tuple[datetime, datetime]]:
-    """Return (start, end) tuples for each VEVENT, both UTC."""
-    lines = _unfold(ics.splitlines())
-    events: list[tuple[datetime, datetime]] = []
-    in_event = False
-    start: Optional[datetime] = None
-    end: Optional[datetime] = None
-    start_is_date = False
-    for raw in lines:
+    def __init__(self) -> None:
+        self.events: list[tuple[datetime, datetime]] = []
+        self._pending: Optional[str] = None
+        self._in_event = False
+        self._start: Optional[datetime] = None
+        self._end: Optional[datetime] = None
+        self._start_is_date = False
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+        if (line.startswith(" ") or line.startswith("\t")) and self._pending is not None:
+            self._pending += line[1:]
+            return
+        if self._pending is not None:
+            self._logical(self._pending)
+        self._pending = line
+
+    def close(self) -> list[tuple[datetime, datetime]]:
+        if self._pending is not None:
+            self._logical(self._pending)
+            self._pending = None
+        return self.events
+
+    def _logical(self, raw: str) -> None:
         if raw == "BEGIN:VEVENT":
-            in_event, start, end, start_is_date = True, None, None, False
-            continue
+            self._in_event, self._start, self._end = True, None, None
+            self._start_is_date = False
+            return
         if raw == "END:VEVENT":
+            start, end = self._start, self._end
             if start:
                 # All-day: iCal convention says DTEND is exclusive and
                 # omitted DTEND defaults to DTSTART + 1 day.
                 if end is None:
-                    end = start + timedelta(days=1 if start_is_date else 0)
+                    end = start + timedelta(days=1 if self._start_is_date else 0)
                 if end > start:
-                    events.append((start, end))
-            in_event = False
-            continue
-        if not in_event:
-            continue
+                    self.events.append((start, end))
+            self._in_event = False
+            return
+        if not self._in_event:
+            return
         # Only look at DTSTART / DTEND. Strip parameters (e.g. TZID=).
         if raw.startswith("DTSTART"):
             value = raw.split(":", 1)[1] if ":" in raw else ""
-            start = _parse_dt(value)
-            start_is_date = bool(_DATE_ONLY.match(value.strip()))
+            self._start = _parse_dt(value)
+            self._start_is_date = bool(_DATE_ONLY.match(value.strip()))
         elif raw.startswith("DTEND"):
             value = raw.split(":", 1)[1] if ":" in raw else ""
-            end = _parse_dt(value)
-    return events
+            self._end = _parse_dt(value)
 
 
-async def _fetch_url(url: str, timeout: float = 10.0) -> str:
-    """HTTP GET with a forgiving TLS context (some calendar feeds use
-    slightly old chain bundles)."""
+def parse_events(ics: str) -> list[tuple[datetime, datetime]]:
+    """Return (start, end) tuples for each VEVENT, both UTC."""
+    parser = _EventParser()
+    for line in ics.splitlines():
+        parser.feed(line)
+    return parser.close()
 
-    def _blocking() -> str:
-        ctx = ssl.create_default_context()
-        req = urllib.request.Request(
-            url, headers={"User-Agent": "HorizonCalendarSync/1.0"}
-        )
-        with urllib.request.urlopen(req, timeout=timeout, context=ctx) as r:
-            data = r.read(5 * 1024 * 1024)  # hard cap 5 MB
-        return data.decode("utf-8", errors="replace")
 
-    return await asyncio.to_thread(_blocking)
+# Feeds fetched in parallel per sync pass (network only — DB writes stay
+# sequential on the caller's session).
+_FETCH_CONCURRENCY = 8
+_FETCH_TIMEOUT_SECONDS = 10.0
+_MAX_FEED_BYTES = 5 * 1024 * 1024  # hard cap 5 MB
+# Only keep events in a reasonable window (past 30d → future 180d) to
+# keep the table small. Anything older/further is dropped.
+_WINDOW_PAST_DAYS = 30
+_WINDOW_FUTURE_DAYS = 180
 
 
-async def sync_user_feed(
-    db: AsyncSession, feed: UserCalendarFeed
-) -> int:
-    """Fetch + parse + replace ExternalBusyBlock rows for this feed.
-    Returns the number of blocks persisted."""
+@dataclass
+class FeedFetch:
+    """Outcome of one conditional GET (no DB access involved)."""
+
+    status: str  # "ok" | "not_modified" | "error"
+    events: list[tuple[datetime, datetime]] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    error: Optional[str] = None
+    # Last day of the window the events were filtered with.
+    window_end: Optional[date] = None
+
+
+def _window() -> tuple[datetime, datetime]:
+    now = datetime.now(timezone.utc)
+    return (
+        now - timedelta(days=_WINDOW_PAST_DAYS),
+        now + timedelta(days=_WINDOW_FUTURE_DAYS),
+    )
+
+
+def _validators(feed: UserCalendarFeed) -> tuple[Optional[str], Optional[str]]:
+    """(ETag, Last-Modified) to send for this feed — none once the
+    window has moved since its blocks were computed (full re-read)."""
+    if feed.window_end != _window()[1].date():
+        return None, None
+    return feed.etag, feed.last_modified
+
+
+async def fetch_feed(
+    http: httpx.AsyncClient,
+    url: str,
+    *,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> FeedFetch:
+    """Conditional GET of an .ics feed, parsed while it streams in.
+    A 304 comes back as ``not_modified`` without a body."""
+    headers = {"User-Agent": "HorizonCalendarSync/1.0"}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    window_start, window_end = _window()
+    parser = _EventParser()
     try:
-        ics = await _fetch_url(feed.ics_url)
+        async with http.stream("GET", url, headers=headers) as r:
+            if r.status_code == 304:
+                return FeedFetch(
+                    "not_modified", etag=etag, last_modified=last_modified
+                )
+            r.raise_for_status()
+            read = 0
+            async for line in r.aiter_lines():
+                read += len(line) + 1
+                if read > _MAX_FEED_BYTES:
+                    break
+                parser.feed(line)
+            resp_etag = r.headers.get("ETag")
+            resp_modified = r.headers.get("Last-Modified")
     except Exception as exc:
-        feed.last_sync_error = f"Fetch error: {exc}"[:2000]
+        return FeedFetch("error", error=f"Fetch error: {exc}")
+    try:
+        events = parser.close()
+    except Exception as exc:
+        return FeedFetch("error", error=f"Parse error: {exc}")
+    return FeedFetch(
+        "ok",
+        events=[
+            (s, e) for (s, e) in events if e >= window_start and s <= window_end
+        ],
+        etag=resp_etag,
+        last_modified=resp_modified,
+        window_end=window_end.date(),
+    )
+
+
+def _http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=_FETCH_TIMEOUT_SECONDS, follow_redirects=True
+    )
+
+
+def _utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes; the rows were written in UTC.
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _events_hash(events: list[tuple[datetime, datetime]]) -> str:
+    h = hashlib.sha256()
+    for s, e in sorted(events):
+        h.update(f"{s.isoformat()}/{e.isoformat()};".encode())
+    return h.hexdigest()
+
+
+@dataclass
+class FeedApplied:
+    blocks: int
+    inserted: int = 0
+    removed: int = 0
+    unchanged: bool = False
+
+
+async def apply_fetch(
+    db: AsyncSession, feed: UserCalendarFeed, fetched: FeedFetch
+) -> FeedApplied:
+    """Apply a fetch to this feed's busy blocks as a DIFF: only the
+    ranges that appeared are inserted and only those that vanished are
+    deleted. An unchanged feed (304 or same ranges) writes nothing but
+    the sync timestamp."""
+    if fetched.status == "error":
+        feed.last_sync_error = (fetched.error or "")[:2000]
         log.warning(
-            "iCal fetch failed for user %s: %s", feed.user_id, exc
+            "iCal sync failed for user %s: %s", feed.user_id, fetched.error
         )
         await db.flush()
-        return 0
+        return FeedApplied(blocks=0)
 
-    try:
-        events = parse_events(ics)
-    except Exception as exc:
-        feed.last_sync_error = f"Parse error: {exc}"[:2000]
+    now = datetime.now(timezone.utc)
+    feed.last_synced_at = now
+    feed.last_sync_error = None
+    if fetched.status == "not_modified":
         await db.flush()
-        return 0
+        held = (
+            await db.execute(
+                select(func.count(ExternalBusyBlock.id)).where(
+                    ExternalBusyBlock.feed_id == feed.id
+                )
+            )
+        ).scalar_one()
+        return FeedApplied(blocks=int(held), unchanged=True)
 
-    # Only keep events in a reasonable window (past 30d → future 180d)
-    # to keep the table small. Anything older/further is dropped.
-    now = datetime.now(timezone.utc)
-    window_start = now - timedelta(days=30)
-    window_end = now + timedelta(days=180)
-    clean = [
-        (s, e)
-        for (s, e) in events
-        if e >= window_start and s <= window_end
-    ]
-
-    # Wipe + reinsert — small rowcounts make this safe and simple.
+    feed.etag = (fetched.etag or None) and fetched.etag[:255]
+    feed.last_modified = (fetched.last_modified or None) and fetched.last_modified[:64]
+    digest = _events_hash(fetched.events)
+    if digest == feed.content_hash and feed.window_end == fetched.window_end:
+        # Server ignores validators (or the body changed outside the
+        # window): the ranges are identical, nothing to write.
+        await db.flush()
+        return FeedApplied(blocks=len(fetched.events), unchanged=True)
+
+    # Blocks imported before per-feed tracking belong to no feed: they
+    # are superseded by this feed's own rows.
     await db.execute(
         delete(ExternalBusyBlock).where(
-            ExternalBusyBlock.user_id == feed.user_id
+            ExternalBusyBlock.user_id == feed.user_id,
+            ExternalBusyBlock.feed_id.is_(None),
         )
     )
-    for (s, e) in clean:
+    existing = (
+        await db.execute(
+            select(
+                ExternalBusyBlock.id,
+                ExternalBusyBlock.start_at,
+                ExternalBusyBlock.end_at,
+            ).where(ExternalBusyBlock.feed_id == feed.id)
+        )
+    ).all()
+    wanted = Counter(fetched.events)
+    stale_ids: list[int] = []
+    for block_id, start_at, end_at in existing:
+        key = (_utc(start_at), _utc(end_at))
+        if wanted[key] > 0:
+            wanted[key] -= 1
+        else:
+            stale_ids.append(block_id)
+    if stale_ids:
+        await db.execute(
+            delete(ExternalBusyBlock).where(
+                ExternalBusyBlock.id.in_(stale_ids)
+            )
+        )
+    added = list(wanted.elements())
+    for (s, e) in added:
         db.add(
             ExternalBusyBlock(
                 user_id=feed.user_id,
+                feed_id=feed.id,
                 start_at=s,
                 end_at=e,
                 source="ics",
             )
         )
-    feed.last_synced_at = now
-    feed.last_sync_error = None
+    feed.content_hash = digest
+    feed.window_end = fetched.window_end
     await db.flush()
-    return len(clean)
+    return FeedApplied(
+        blocks=len(fetched.events), inserted=len(added), removed=len(stale_ids)
+    )
+
+
+async def sync_user_feed(
+    db: AsyncSession, feed: UserCalendarFeed
+) -> int:
+    """Fetch + parse + diff ExternalBusyBlock rows for this feed.
+    Returns the number of blocks the feed now holds."""
+    etag, modified = _validators(feed)
+    async with _http_client() as http:
+        fetched = await fetch_feed(
+            http, feed.ics_url, etag=etag, last_modified=modified
+        )
+    return (await apply_fetch(db, feed, fetched)).blocks
+
+
+async def sync_feeds(
+    db: AsyncSession,
+    feeds: Iterable[UserCalendarFeed],
+    *,
+    concurrency: int = _FETCH_CONCURRENCY,
+) -> dict:
+    """Sync many feeds: conditional GETs run concurrently (bounded by
+    ``concurrency``), then each result is applied on ``db`` in turn.
+    One failing feed never stops the others. The caller commits."""
+    feeds = list(feeds)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    # Plain values only: the session is not touched while fetching.
+    targets = [(f.ics_url, *_validators(f)) for f in feeds]
+
+    async with _http_client() as http:
+
+        async def _one(url: str, etag, modified) -> FeedFetch:
+            async with sem:
+                return await fetch_feed(
+                    http, url, etag=etag, last_modified=modified
+                )
+
+        fetches = await asyncio.gather(*(_one(*t) for t in targets))
+
+    stats = {
+        "feeds_total": len(feeds),
+        "synced": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "inserted": 0,
+        "removed": 0,
+    }
+    for feed, fetched in zip(feeds, fetches):
+        try:
+            applied = await apply_fetch(db, feed, fetched)
+        except Exception:
+            log.exception("iCal apply failed for feed %s", feed.id)
+            stats["failed"] += 1
+            continue
+        if fetched.status == "error":
+            stats["failed"] += 1
+            continue
+        stats["synced"] += 1
+        stats["unchanged"] += int(applied.unchanged)
+        stats["inserted"] += applied.inserted
+        stats["removed"] += applied.removed
+    return stats
@@ -0,0 +1,770 @@
+"""Agrégats matérialisés dépôts / maintenance (``imm_*_rollups``).
+
+``depots_overview`` et ``maintenance_rollup`` relisaient à chaque
+ouverture tous les baux, dossiers de départ, locataires et bons internes
+du parc. Ils lisent maintenant ``imm_depot_rollups`` (une ligne par
+immeuble) et ``imm_maintenance_rollups`` (une ligne par immeuble et par
+mois), tenus à jour ici :
+
+- ``after_flush`` repère les lignes sources touchées (bons de travail,
+  baux, dossiers de relocation, logements, noms de locataires,
+  immeubles supprimés) et recalcule SEULEMENT les clés concernées, dans
+  la transaction de l'appelant (même connexion : un rollback annule
+  aussi l'agrégat) ;
+- le recalcul est le même code que la reconstruction complète
+  (``compute_maintenance`` / ``compute_depots``, requêtes Core) : une
+  clé rafraîchie vaut exactement un recalcul from scratch ;
+- l'écriture est un upsert (deux transactions qui rafraîchissent la même
+  clé ne se heurtent pas sur la clé primaire).
+
+Ce qui dépend du jour (un départ acté dont la date est passée rend le
+dépôt « à rendre ») est stocké en date et appliqué à la lecture.
+
+Les écritures en masse (``update()`` / ``delete()`` ORM, SQL brut) et
+deux transactions concurrentes sur le même immeuble peuvent laisser un
+agrégat en retard : ``check_rollups`` le compare au recalcul complet et
+le cron ``immobilier-rollups-reconcile`` réécrit les clés en écart.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import date, datetime, timezone
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, event, func, inspect, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.bon_travail import BonTravail
+from app.models.immobilier import (
+    Bail,
+    BailStatus,
+    Immeuble,
+    Locataire,
+    LocationDossier,
+    Logement,
+)
+from app.models.immobilier_rollup import DepotRollup, MaintenanceRollup
+from app.services.locatif_depart import DOSSIER_STATUTS_REGLES
+
+log = logging.getLogger(__name__)
+
+#: Écart toléré par ``check_rollups`` sur les montants.
+TOLERANCE = 0.005
+#: Lignes par upsert multi-lignes.
+_UPSERT_ROWS = 500
+
+#: (immeuble, mois) ; mois ``None`` = tous les mois de l'immeuble.
+MaintenanceKey = Tuple[int, Optional[date]]
+
+_A_RENDRE_STATUS = {BailStatus.TERMINE.value, BailStatus.RESILIE.value}
+
+# Colonnes dont la modification change un agrégat.
+_WATCHED = {
+    BonTravail: (
+        "kind", "status", "immeuble_id", "logement_id", "amount", "title",
+        "created_at",
+    ),
+    Bail: (
+        "logement_id", "locataire_id", "status", "depot_garantie",
+        "depot_recu_le", "depot_detenteur", "depot_rendu_le", "date_debut",
+        "date_fin",
+    ),
+    LocationDossier: ("logement_id", "bail_id", "statut", "date_depart"),
+    Logement: ("immeuble_id", "numero"),
+    Locataire: ("full_name",),
+    Immeuble: (),
+}
+
+
+def _iso(d: Optional[date]) -> Optional[str]:
+    return d.isoformat() if d is not None else None
+
+
+def month_of(dt: datetime) -> date:
+    """Premier jour du mois UTC de ``dt`` (naïf = UTC, comme SQLite)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return date(dt.year, dt.month, 1)
+
+
+def _month_bounds(mois: date) -> Tuple[datetime, datetime]:
+    start = datetime(mois.year, mois.month, 1, tzinfo=timezone.utc)
+    if mois.month == 12:
+        return start, datetime(mois.year + 1, 1, 1, tzinfo=timezone.utc)
+    return start, datetime(mois.year, mois.month + 1, 1, tzinfo=timezone.utc)
+
+
+def _upsert(conn: Connection, model, rows: List[dict], keys: List[str]) -> None:
+    insert = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    for i in range(0, len(rows), _UPSERT_ROWS):
+        stmt = insert(model).values(rows[i : i + _UPSERT_ROWS])
+        conn.execute(
+            stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={
+                    **{
+                        c: getattr(stmt.excluded, c)
+                        for c in rows[0]
+                        if c not in keys
+                    },
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+
+# ── Maintenance : bons internes par immeuble et par mois ────────────────
+
+
+def compute_maintenance(
+    conn: Connection, keys: Optional[Iterable[MaintenanceKey]] = None
+) -> Dict[Tuple[int, date], dict]:
+    """Agrégats attendus (tout le parc, ou les clés données) depuis
+    ``bons_travail`` — mêmes règles que l'endpoint : bons internes non
+    annulés, rattachés à un immeuble, regroupés par logement (``None`` =
+    communs)."""
+    q = (
+        select(
+            BonTravail.id,
+            BonTravail.immeuble_id,
+            BonTravail.logement_id,
+            BonTravail.title,
+            BonTravail.amount,
+            BonTravail.status,
+            BonTravail.created_at,
+        )
+        .where(
+            BonTravail.kind == "interne",
+            BonTravail.status != "cancelled",
+            BonTravail.immeuble_id.isnot(None),
+        )
+        .order_by(BonTravail.id)
+    )
+    if keys is not None:
+        conds = []
+        for imm, mois in set(keys):
+            if mois is None:
+                conds.append(BonTravail.immeuble_id == imm)
+            else:
+                start, end = _month_bounds(mois)
+                conds.append(
+                    and_(
+                        BonTravail.immeuble_id == imm,
+                        BonTravail.created_at >= start,
+                        BonTravail.created_at < end,
+                    )
+                )
+        if not conds:
+            return {}
+        q = q.where(or_(*conds))
+    out: Dict[Tuple[int, date], dict] = {}
+    for bid, imm, lid, title, amount, st, created in conn.execute(q):
+        if created is None:
+            continue
+        amt = float(amount) if amount is not None else 0.0
+        e = out.setdefault(
+            (imm, month_of(created)),
+            {
+                "total": 0.0,
+                "count": 0,
+                "communs_total": 0.0,
+                "communs_count": 0,
+                "logements": {},
+                "communs_bons": [],
+            },
+        )
+        bon = {
+            "id": bid,
+            "titre": title,
+            "montant": amt,
+            "status": st,
+            "created_at": created.isoformat(),
+        }
+        e["total"] += amt
+        e["count"] += 1
+        if lid:
+            le = e["logements"].setdefault(
+                str(lid), {"total": 0.0, "count": 0, "bons": []}
+            )
+            le["total"] += amt
+            le["count"] += 1
+            le["bons"].append(bon)
+        else:
+            e["communs_total"] += amt
+            e["communs_count"] += 1
+            e["communs_bons"].append(bon)
+    return out
+
+
+def _maintenance_row(key: Tuple[int, date], e: dict) -> dict:
+    return {
+        "immeuble_id": key[0],
+        "mois": key[1],
+        "total": e["total"],
+        "count": e["count"],
+        "communs_total": e["communs_total"],
+        "communs_count": e["communs_count"],
+        "detail_json": json.dumps(
+            {"logements": e["logements"], "communs_bons": e["communs_bons"]}
+        ),
+    }
+
+
+def refresh_maintenance(
+    conn: Connection, keys: Optional[Iterable[MaintenanceKey]] = None
+) -> int:
+    """Réécrit les agrégats des clés données (tout le parc si ``None``) ;
+    une clé sans bon perd sa ligne. Retourne le nombre de lignes écrites."""
+    keys = set(keys) if keys is not None else None
+    computed = compute_maintenance(conn, keys)
+    _upsert(
+        conn,
+        MaintenanceRollup,
+        [_maintenance_row(k, e) for k, e in computed.items()],
+        ["immeuble_id", "mois"],
+    )
+    existing = select(MaintenanceRollup.immeuble_id, MaintenanceRollup.mois)
+    if keys is not None:
+        existing = existing.where(
+            or_(
+                *(
+                    MaintenanceRollup.immeuble_id == imm
+                    if mois is None
+                    else and_(
+                        MaintenanceRollup.immeuble_id == imm,
+                        MaintenanceRollup.mois == mois,
+                    )
+                    for imm, mois in keys
+                )
+            )
+        )
+    for imm, mois in conn.execute(existing).all():
+        if (imm, mois) not in computed:
+            conn.execute(
+                delete(MaintenanceRollup).where(
+                    MaintenanceRollup.immeuble_id == imm,
+                    MaintenanceRollup.mois == mois,
+                )
+            )
+    return len(computed)
+
+
+# ── Dépôts de garantie : une liste de lignes par immeuble ───────────────
+
+
+def compute_depots(
+    conn: Connection, immeuble_ids: Optional[Iterable[int]] = None
+) -> Dict[int, List[dict]]:
+    """Lignes attendues de la page Dépôts, par immeuble — mêmes règles
+    que l'endpoint (voir ``depots_overview``), « à rendre » sur départ
+    acté laissé en date (``a_rendre_des``)."""
+    ids = list(immeuble_ids) if immeuble_ids is not None else None
+    q = (
+        select(
+            Bail.id,
+            Bail.logement_id,
+            Bail.locataire_id,
+            Bail.status,
+            Bail.depot_garantie,
+            Bail.depot_recu_le,
+            Bail.depot_detenteur,
+            Bail.depot_rendu_le,
+            Bail.date_debut,
+            Bail.date_fin,
+            Logement.immeuble_id,
+            Logement.numero,
+            Locataire.id,
+            Locataire.full_name,
+        )
+        .join(Logement, Logement.id == Bail.logement_id)
+        .outerjoin(Locataire, Locataire.id == Bail.locataire_id)
+        .order_by(Bail.id)
+    )
+    dq = select(
+        LocationDossier.logement_id,
+        LocationDossier.bail_id,
+        LocationDossier.statut,
+        LocationDossier.date_depart,
+    ).where(LocationDossier.date_depart.isnot(None))
+    if ids is not None:
+        if not ids:
+            return {}
+        q = q.where(Logement.immeuble_id.in_(ids))
+        dq = dq.join(Logement, Logement.id == LocationDossier.logement_id).where(
+            Logement.immeuble_id.in_(ids)
+        )
+    baux = conn.execute(q).all()
+    if not baux:
+        return {}
+
+    baux_par_logement: Dict[int, List[Any]] = {}
+    actifs_par_logement: Dict[int, List[Any]] = {}
+    for b in baux:
+        baux_par_logement.setdefault(b[1], []).append(b)
+        if b[3] == BailStatus.ACTIF.value:
+            actifs_par_logement.setdefault(b[1], []).append(b)
+
+    # Départ ACTÉ (dossier non annulé) : date à partir de laquelle le
+    # locataire est parti.
+    depart_par_bail: Dict[int, date] = {}
+    for logement_id, bail_id, statut, depart in conn.execute(dq):
+        if statut in DOSSIER_STATUTS_REGLES and statut != "reloue":
+            continue  # dossier annulé : le locataire est resté
+        for b in baux_par_logement.get(logement_id, ()):
+            if bail_id is None or bail_id == b[0]:
+                prev = depart_par_bail.get(b[0])
+                depart_par_bail[b[0]] = depart if prev is None else min(prev, depart)
+
+    out: Dict[int, List[dict]] = {}
+    for (
+        bail_id, logement_id, locataire_id, st, depot, recu_le, detenteur,
+        rendu_le, debut, fin, imm_id, numero, loc_id, loc_name,
+    ) in baux:
+        montant = float(depot or 0)
+        a_rendre_des: Optional[date] = None
+        if montant <= 0:
+            if st != BailStatus.ACTIF.value:
+                continue
+            statut = "aucun"
+        elif rendu_le is not None:
+            statut = "rendu"
+        elif st in _A_RENDRE_STATUS and any(
+            nb[0] != bail_id and nb[2] != locataire_id
+            for nb in actifs_par_logement.get(logement_id, ())
+        ):
+            statut = "a_rendre"  # reloué à quelqu'un d'autre
+        else:
+            statut = "detenu"
+            if st in _A_RENDRE_STATUS:
+                a_rendre_des = depart_par_bail.get(bail_id)
+        out.setdefault(imm_id, []).append(
+            {
+                "bail_id": bail_id,
+                "logement_id": logement_id,
+                "logement_numero": numero,
+                "locataire_id": loc_id,
+                "locataire_name": loc_name,
+                "montant": montant,
+                "statut": statut,
+                "a_rendre_des": _iso(a_rendre_des),
+                "depot_recu_le": _iso(recu_le),
+                "depot_detenteur": detenteur,
+                "depot_rendu_le": _iso(rendu_le),
+                "date_debut": _iso(debut),
+                "date_fin": _iso(fin),
+            }
+        )
+    return out
+
+
+def refresh_depots(
+    conn: Connection, immeuble_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Réécrit les lignes Dépôts des immeubles donnés (tout le parc si
+    ``None``) ; un immeuble sans ligne perd son agrégat."""
+    ids = set(immeuble_ids) if immeuble_ids is not None else None
+    computed = compute_depots(conn, ids)
+    _upsert(
+        conn,
+        DepotRollup,
+        [
+            {"immeuble_id": imm, "rows_json": json.dumps(rows)}
+            for imm, rows in computed.items()
+        ],
+        ["immeuble_id"],
+    )
+    existing = select(DepotRollup.immeuble_id)
+    if ids is not None:
+        existing = existing.where(DepotRollup.immeuble_id.in_(list(ids)))
+    stale = [i for i in conn.execute(existing).scalars() if i not in computed]
+    if stale:
+        conn.execute(delete(DepotRollup).where(DepotRollup.immeuble_id.in_(stale)))
+    return len(computed)
+
+
+# ── Rafraîchissement incrémental (événements de session) ────────────────
+
+
+def _values(obj: object, attr: str) -> Tuple[Set[Any], bool]:
+    """Valeurs connues d'un attribut avant ET après le flush ; ``False``
+    si l'attribut n'est pas chargé (rien n'est connu)."""
+    hist = inspect(obj).attrs[attr].history
+    vals = set(chain(hist.added, hist.deleted, hist.unchanged))
+    return vals, bool(vals)
+
+
+def _changed(obj: object, *attrs: str) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _collect(session: Session) -> Optional[dict]:
+    touched: Optional[dict] = None
+
+    def _t() -> dict:
+        nonlocal touched
+        if touched is None:
+            touched = {
+                "bons": set(),
+                "maintenance": set(),
+                "baux": set(),
+                "dossiers": set(),
+                "logements": set(),
+                "locataires": set(),
+                "immeubles": set(),
+                "supprimes": set(),
+            }
+        return touched
+
+    for obj, new, deleted in chain(
+        ((o, True, False) for o in session.new),
+        ((o, False, False) for o in session.dirty),
+        ((o, False, True) for o in session.deleted),
+    ):
+        fields = _WATCHED.get(type(obj))
+        if fields is None:
+            continue
+        if not (new or deleted) and not _changed(obj, *fields):
+            continue
+        if isinstance(obj, BonTravail):
+            kinds, known = _values(obj, "kind")
+            if known and "interne" not in kinds:
+                continue  # bon construction : hors maintenance
+            if not deleted:
+                _t()["bons"].add(obj.id)
+            # Anciennes clés (immeuble / date modifiés, ou bon supprimé) ;
+            # la clé courante vient de la relecture par id.
+            if deleted or _changed(obj, "immeuble_id", "created_at"):
+                imms, _ = _values(obj, "immeuble_id")
+                dates, dates_known = _values(obj, "created_at")
+                for imm in imms - {None}:
+                    if dates_known and None not in dates:
+                        _t()["maintenance"].update((imm, month_of(d)) for d in dates)
+                    else:
+                        _t()["maintenance"].add((imm, None))
+        elif isinstance(obj, Bail):
+            if not deleted:
+                _t()["baux"].add(obj.id)
+            if deleted or _changed(obj, "logement_id"):
+                _t()["logements"].update(_values(obj, "logement_id")[0] - {None})
+        elif isinstance(obj, LocationDossier):
+            if not deleted:
+                _t()["dossiers"].add(obj.id)
+            if deleted or _changed(obj, "logement_id"):
+                _t()["logements"].update(_values(obj, "logement_id")[0] - {None})
+        elif isinstance(obj, Logement):
+            if new:
+                continue  # pas encore de bail
+            if not deleted:
+                _t()["logements"].add(obj.id)
+            if deleted or _changed(obj, "immeuble_id"):
+                _t()["immeubles"].update(_values(obj, "immeuble_id")[0] - {None})
+        elif isinstance(obj, Locataire):
+            if not new:
+                _t()["locataires"].add(obj.id)
+        elif isinstance(obj, Immeuble) and deleted:
+            _t()["supprimes"].add(obj.id)
+    return touched
+
+
+def _refresh_touched(conn: Connection, t: dict) -> None:
+    maintenance: Set[MaintenanceKey] = set(t["maintenance"])
+    if t["bons"]:
+        for imm, created in conn.execute(
+            select(BonTravail.immeuble_id, BonTravail.created_at).where(
+                BonTravail.id.in_(list(t["bons"])),
+                BonTravail.immeuble_id.isnot(None),
+            )
+        ):
+            maintenance.add((imm, month_of(created) if created else None))
+
+    immeubles: Set[int] = set(t["immeubles"])
+    logements: Set[int] = set(t["logements"])
+    if t["baux"]:
+        logements.update(
+            conn.execute(
+                select(Bail.logement_id).where(Bail.id.in_(list(t["baux"])))
+            ).scalars()
+        )
+    if t["dossiers"]:
+        logements.update(
+            conn.execute(
+                select(LocationDossier.logement_id).where(
+                    LocationDossier.id.in_(list(t["dossiers"]))
+                )
+            ).scalars()
+        )
+    if logements:
+        immeubles.update(
+            conn.execute(
+                select(Logement.immeuble_id).where(
+                    Logement.id.in_(list(logements))
+                )
+            ).scalars()
+        )
+    if t["locataires"]:
+        immeubles.update(
+            conn.execute(
+                select(Logement.immeuble_id)
+                .join(Bail, Bail.logement_id == Logement.id)
+                .where(Bail.locataire_id.in_(list(t["locataires"])))
+                .distinct()
+            ).scalars()
+        )
+
+    supprimes = t["supprimes"]
+    if supprimes:
+        # La FK ON DELETE CASCADE s'en charge sous Postgres ; explicite
+        # pour SQLite.
+        conn.execute(
+            delete(MaintenanceRollup).where(
+                MaintenanceRollup.immeuble_id.in_(list(supprimes))
+            )
+        )
+        conn.execute(
+            delete(DepotRollup).where(DepotRollup.immeuble_id.in_(list(supprimes)))
+        )
+    maintenance = {k for k in maintenance if k[0] not in supprimes}
+    immeubles = {i for i in immeubles if i is not None and i not in supprimes}
+    if maintenance:
+        refresh_maintenance(conn, maintenance)
+    if immeubles:
+        refresh_depots(conn, immeubles)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_on_flush(session: Session, _ctx) -> None:
+    touched = _collect(session)
+    if touched:
+        _refresh_touched(session.connection(), touched)
+
+
+# ── Reconstruction et contrôle ──────────────────────────────────────────
+
+
+async def rebuild_rollups(
+    db: AsyncSession, immeuble_ids: Optional[Iterable[int]] = None
+) -> Tuple[int, int]:
+    """Réécrit les agrégats (tout le parc, ou les immeubles donnés) depuis
+    les tables sources. Retourne (lignes maintenance, lignes dépôts).
+    L'appelant commite."""
+    ids = set(immeuble_ids) if immeuble_ids is not None else None
+
+    def _go(session: Session) -> Tuple[int, int]:
+        if ids is not None and not ids:
+            return 0, 0
+        conn = session.connection()
+        keys = [(i, None) for i in ids] if ids is not None else None
+        return refresh_maintenance(conn, keys), refresh_depots(conn, ids)
+
+    return await db.run_sync(_go)
+
+
+def _diff(
+    issues: List[dict], rollup: str, imm: int, mois: Optional[str],
+    field: str, stored: Any, expected: Any,
+) -> None:
+    issues.append(
+        {
+            "rollup": rollup,
+            "immeuble_id": imm,
+            "mois": mois,
+            "field": field,
+            "stored": stored,
+            "expected": expected,
+        }
+    )
+
+
+async def check_rollups(
+    db: AsyncSession, immeuble_ids: Optional[Iterable[int]] = None
+) -> List[dict]:
+    """Écarts entre les agrégats et le recalcul complet (liste vide = OK)."""
+    ids = set(immeuble_ids) if immeuble_ids is not None else None
+
+    def _go(session: Session) -> List[dict]:
+        conn = session.connection()
+        keys = [(i, None) for i in ids] if ids is not None else None
+        want_m = compute_maintenance(conn, keys)
+        want_d = compute_depots(conn, ids)
+        mq = select(MaintenanceRollup)
+        dq = select(DepotRollup.immeuble_id, DepotRollup.rows_json)
+        if ids is not None:
+            mq = mq.where(MaintenanceRollup.immeuble_id.in_(list(ids)))
+            dq = dq.where(DepotRollup.immeuble_id.in_(list(ids)))
+        have_m = {
+            (r.immeuble_id, r.mois): r
+            for r in conn.execute(mq).all()
+        }
+        have_d = {imm: json.loads(rows) for imm, rows in conn.execute(dq).all()}
+
+        issues: List[dict] = []
+        for imm, mois in sorted(set(want_m) | set(have_m)):
+            want = want_m.get((imm, mois))
+            have = have_m.get((imm, mois))
+            for f in ("total", "count", "communs_total", "communs_count"):
+                w = want[f] if want else 0
+                h = getattr(have, f) if have else 0
+                if abs(float(h or 0) - float(w)) > TOLERANCE:
+                    _diff(issues, "maintenance", imm, mois.isoformat(), f, h, w)
+            w_detail = (
+                {"logements": want["logements"], "communs_bons": want["communs_bons"]}
+                if want
+                else None
+            )
+            h_detail = json.loads(have.detail_json) if have else None
+            if w_detail != h_detail:
+                _diff(
+                    issues, "maintenance", imm, mois.isoformat(), "detail",
+                    None if have is None else have.count,
+                    None if want is None else want["count"],
+                )
+        for imm in sorted(set(want_d) | set(have_d)):
+            want_rows = {r["bail_id"]: r for r in want_d.get(imm, [])}
+            have_rows = {r["bail_id"]: r for r in have_d.get(imm, [])}
+            for bail_id in sorted(set(want_rows) | set(have_rows)):
+                w, h = want_rows.get(bail_id), have_rows.get(bail_id)
+                if w is None or h is None:
+                    _diff(
+                        issues, "depots", imm, None, f"bail {bail_id}",
+                        h and h["statut"], w and w["statut"],
+                    )
+                    continue
+                for f in sorted(set(w) | set(h)):
+                    if w.get(f) != h.get(f):
+                        _diff(
+                            issues, "depots", imm, None, f"bail {bail_id}.{f}",
+                            h.get(f), w.get(f),
+                        )
+        return issues
+
+    return await db.run_sync(_go)
+
+
+async def reconcile_rollups(db: AsyncSession) -> List[dict]:
+    """Contrôle complet puis réécriture des immeubles en écart. Retourne
+    les écarts trouvés. L'appelant commite."""
+    issues = await check_rollups(db)
+    if issues:
+        await rebuild_rollups(db, {i["immeuble_id"] for i in issues})
+    return issues
+
+
+# ── Lecture (endpoints) ─────────────────────────────────────────────────
+
+
+async def maintenance_for_year(
+    db: AsyncSession,
+    year: int,
+    *,
+    immeuble_id: Optional[int] = None,
+    visible: Optional[Set[int]] = None,
+) -> Dict[int, dict]:
+    """Mois de l'année cumulés par immeuble : ``{immeuble_id: {"name",
+    "address", "total", "count", "communs_total", "communs_count",
+    "communs_bons", "logements": {logement_id: {"total", "count",
+    "bons"}}}}`` — bons avec ``created_at`` en datetime."""
+    q = (
+        select(
+            MaintenanceRollup.immeuble_id,
+            MaintenanceRollup.total,
+            MaintenanceRollup.count,
+            MaintenanceRollup.communs_total,
+            MaintenanceRollup.communs_count,
+            MaintenanceRollup.detail_json,
+            Immeuble.name,
+            Immeuble.address,
+        )
+        .outerjoin(Immeuble, Immeuble.id == MaintenanceRollup.immeuble_id)
+        .where(
+            MaintenanceRollup.mois >= date(year, 1, 1),
+            MaintenanceRollup.mois < date(year + 1, 1, 1),
+        )
+        .order_by(MaintenanceRollup.immeuble_id, MaintenanceRollup.mois)
+    )
+    if immeuble_id is not None:
+        q = q.where(MaintenanceRollup.immeuble_id == int(immeuble_id))
+    if visible is not None:
+        q = q.where(MaintenanceRollup.immeuble_id.in_(list(visible)))
+
+    def _bons(items: List[dict]) -> List[dict]:
+        return [
+            {**b, "created_at": datetime.fromisoformat(b["created_at"])}
+            for b in items
+        ]
+
+    out: Dict[int, dict] = {}
+    for imm, total, count, c_total, c_count, detail, name, address in (
+        await db.execute(q)
+    ).all():
+        d = json.loads(detail)
+        e = out.setdefault(
+            imm,
+            {
+                "name": name,
+                "address": address,
+                "total": 0.0,
+                "count": 0,
+                "communs_total": 0.0,
+                "communs_count": 0,
+                "communs_bons": [],
+                "logements": {},
+            },
+        )
+        e["total"] += total
+        e["count"] += count
+        e["communs_total"] += c_total
+        e["communs_count"] += c_count
+        e["communs_bons"].extend(_bons(d["communs_bons"]))
+        for lid, lv in d["logements"].items():
+            le = e["logements"].setdefault(
+                int(lid), {"total": 0.0, "count": 0, "bons": []}
+            )
+            le["total"] += lv["total"]
+            le["count"] += lv["count"]
+            le["bons"].extend(_bons(lv["bons"]))
+    return out
+
+
+async def depot_rows(
+    db: AsyncSession,
+    today: date,
+    *,
+    entreprise_id: Optional[int] = None,
+    immeuble_id: Optional[int] = None,
+    visible: Optional[Set[int]] = None,
+) -> List[dict]:
+    """Lignes Dépôts des immeubles gérés à l'interne, statut du jour
+    appliqué (départ acté passé → « a_rendre »), triées par bail."""
+    q = (
+        select(DepotRollup.immeuble_id, DepotRollup.rows_json, Immeuble.name)
+        .join(Immeuble, Immeuble.id == DepotRollup.immeuble_id)
+        # Gestion externe : dépôts suivis par le gestionnaire tiers →
+        # exclu (isnot(True) couvre les NULL legacy).
+        .where(Immeuble.gestion_externe.isnot(True))
+    )
+    if entreprise_id is not None:
+        q = q.where(Immeuble.owner_entreprise_id == int(entreprise_id))
+    if immeuble_id is not None:
+        q = q.where(Immeuble.id == int(immeuble_id))
+    if visible is not None:
+        q = q.where(Immeuble.id.in_(list(visible)))
+    jour = today.isoformat()
+    out: List[dict] = []
+    for imm, rows_json, name in (await db.execute(q)).all():
+        for r in json.loads(rows_json):
+            des = r.pop("a_rendre_des", None)
+            if r["statut"] == "detenu" and des is not None and des <= jour:
+                r["statut"] = "a_rendre"
+            r["immeuble_id"] = imm
+            r["immeuble_name"] = name
+            out.append(r)
+    out.sort(key=lambda r: r["bail_id"])
+    return out
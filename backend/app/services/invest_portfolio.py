@@ -26,7 +26,6 @@ from app.models.entreprise import Entreprise
 from app.models.immobilier import (
     Bail,
     BailStatus,
-    DepenseImmeuble,
     Evaluation,
     EvaluationKind,
     Hypotheque,
@@ -34,7 +33,6 @@ from app.models.immobilier import (
     Immeuble,
     ImmeubleOwnership,
     Logement,
-    PaiementLoyer,
 )
 from app.models.invest_portal import (
     InvestFlux,
@@ -44,7 +42,7 @@ from app.models.invest_portal import (
     InvestProjetProfil,
 )
 from app.models.optimisation import OptimisationProjet
-from app.services.hypotheque_calc import balance_calculee_de, balance_effective
+from app.services.hypotheque_calc import balance_effective
 from app.services.invest_tri import xirr
 
 log = logging.getLogger(__name__)
@@ -461,10 +459,22 @@ async def serie_mensuelle(
     - cashflow_moyen : loyers effectifs − dépenses récurrentes −
       hypothèque (MÊME convention que `cash_flow_mensuel` de la fiche).
     """
-    from app.models.immobilier import PaiementExterne
+    from app.services.invest_portfolio_engine import cached_result
+
+    return await cached_result(
+        db,
+        entreprise_id,
+        ("serie_mensuelle", months),
+        lambda data: _serie_mensuelle_calc(data, months),
+    )
+
+
+def _serie_mensuelle_calc(data, months: Optional[int]) -> dict:
+    """Calcul en mémoire de `serie_mensuelle` sur les lignes groupées
+    d'une compagnie (`invest_portfolio_engine.PortfolioData`)."""
     from app.services.loyer_effectif import loyer_effectif_loue
 
-    pairs = await immeubles_of_entreprise(db, entreprise_id)
+    pairs = data.pairs
     if months is None:
         months = 12
         achats = [
@@ -490,97 +500,33 @@ async def serie_mensuelle(
 
     for imm, own_pct in pairs:
         pct = own_pct / 100.0
-        logements = (
-            await db.execute(
-                select(Logement).where(Logement.immeuble_id == imm.id)
-            )
-        ).scalars().all()
-        log_ids = [lg.id for lg in logements]
+        logements = data.logements.get(imm.id, [])
 
         # Paiements ENREGISTRÉS : loyers internes (par bail) + gestion
-        # externe (par logement).
-        if log_ids:
-            bail_ids = (
-                await db.execute(
-                    select(Bail.id).where(Bail.logement_id.in_(log_ids))
-                )
-            ).scalars().all()
-            if bail_ids:
-                rows = (
-                    await db.execute(
-                        select(
-                            PaiementLoyer.mois_couvert,
-                            func.sum(PaiementLoyer.montant),
-                        )
-                        .where(
-                            PaiementLoyer.bail_id.in_(list(bail_ids)),
-                            PaiementLoyer.mois_couvert >= start,
-                        )
-                        .group_by(PaiementLoyer.mois_couvert)
-                    )
-                ).all()
-                for mois, total in rows:
-                    k = _month_start(mois)
-                    if k in rev:
-                        rev[k] += float(total or 0) * pct
-            rows = (
-                await db.execute(
-                    select(
-                        PaiementExterne.mois_couvert,
-                        func.sum(PaiementExterne.montant),
-                    )
-                    .where(
-                        PaiementExterne.logement_id.in_(log_ids),
-                        PaiementExterne.mois_couvert >= start,
-                    )
-                    .group_by(PaiementExterne.mois_couvert)
-                )
-            ).all()
-            for mois, total in rows:
-                k = _month_start(mois)
-                if k in rev:
-                    rev[k] += float(total or 0) * pct
+        # externe (par logement), déjà sommés par mois.
+        for k, total in data.paiements.get(imm.id, {}).items():
+            if k in rev:
+                rev[k] += total * pct
 
         # Loyer effectif des unités louées — même hiérarchie que la
         # fiche (bail actif / loyer saisi en externe).
-        loyer_bail_par_log: dict[int, float] = {}
-        if log_ids:
-            for b in (
-                await db.execute(
-                    select(Bail).where(
-                        Bail.logement_id.in_(log_ids),
-                        Bail.status == BailStatus.ACTIF.value,
-                    )
-                )
-            ).scalars().all():
-                loyer_bail_par_log[b.logement_id] = (
-                    loyer_bail_par_log.get(b.logement_id, 0.0)
-                    + float(b.loyer_mensuel or 0)
-                )
         externe = bool(getattr(imm, "gestion_externe", False))
         loyers_imm = 0.0
         for lg in logements:
             m = loyer_effectif_loue(
-                lg, loyer_bail_par_log.get(lg.id), externe
+                lg, data.loyers_baux_actifs.get(lg.id), externe
             )
             if m is not None:
                 loyers_imm += m
         loyers_effectifs += loyers_imm * pct
 
-        depenses = (
-            await db.execute(
-                select(DepenseImmeuble).where(
-                    DepenseImmeuble.immeuble_id == imm.id
-                )
-            )
-        ).scalars().all()
         # Les récurrentes ne s'étalent pas avant l'achat de l'immeuble.
         imm_debut = (
             _month_start(imm.purchase_date)
             if imm.purchase_date
             else keys[0]
         )
-        for d in depenses:
+        for d in data.depenses.get(imm.id, []):
             base = float(d.montant or 0)
             if d.is_pourcentage:
                 base = loyers_imm * base / 100.0
@@ -612,9 +558,9 @@ async def serie_mensuelle(
                             par_categorie.get(cat, 0.0) + base * pct
                         )
 
-        hyps = await hypotheques_actives(db, imm.id)
         hypo_mensuel += sum(
-            float(h.paiement_mensuel or 0) for h in hyps
+            float(h.paiement_mensuel or 0)
+            for h in data.hypotheques.get(imm.id, [])
         ) * pct
 
     # Mode : « recus » si au moins un paiement est enregistré sur la
@@ -763,58 +709,18 @@ def kpis_participation(
 # ─────────────────────────────────────────────────────────────────────
 
 
-async def _equite_at(
-    db: AsyncSession, entreprise_id: int, at: date
-) -> float:
-    """Équité approximative de la compagnie à une date passée :
-    évaluation la plus récente ≤ date (sinon prix d'achat si acquis),
-    moins la balance CALCULÉE des hypothèques actives débutées ≤ date.
-    Approximation assumée (l'historique des hypothèques remplacées
-    n'est pas conservé) — le POINT FINAL de la série utilise toujours
-    la valeur exacte d'aujourd'hui."""
-    pairs = await immeubles_of_entreprise(db, entreprise_id)
-    total = 0.0
-    for imm, own_pct in pairs:
-        pct = own_pct / 100.0
-        if imm.purchase_date and imm.purchase_date > at:
-            continue
-        row = (
-            await db.execute(
-                select(Evaluation.valeur)
-                .where(
-                    Evaluation.immeuble_id == imm.id,
-                    Evaluation.date_evaluation <= at,
-                )
-                .order_by(
-                    Evaluation.is_reference.desc(),
-                    Evaluation.date_evaluation.desc(),
-                )
-                .limit(1)
-            )
-        ).scalar()
-        val = (
-            float(row)
-            if row is not None
-            else (float(imm.purchase_price) if imm.purchase_price else 0.0)
-        )
-        balance = 0.0
-        for h in await hypotheques_actives(db, imm.id):
-            if h.date_debut and h.date_debut > at:
-                continue
-            calc = balance_calculee_de(h, aujourd_hui=at)
-            balance += (
-                calc if calc is not None else float(h.montant_initial or 0)
-            )
-        total += (val - balance) * pct
-    return total
-
-
 async def serie_valeur_totale(
     db: AsyncSession,
     participations: list[tuple[InvestParticipation, list[InvestFlux]]],
 ) -> list[dict]:
     """Points trimestriels : valeur des parts (approx. historique) +
-    retours cumulés — la « valeur totale créée » du portefeuille."""
+    retours cumulés — la « valeur totale créée » du portefeuille.
+
+    Le point à chaque date utilise `invest_portfolio_engine.equite_at`
+    (approximation historique) ; le POINT FINAL de la série reste sur la
+    même approximation datée d'aujourd'hui."""
+    from app.services.invest_portfolio_engine import equite_at, portfolio_data
+
     all_flux = [f for _, fl in participations for f in fl]
     if not all_flux:
         return []
@@ -825,6 +731,11 @@ async def serie_valeur_totale(
             directories[part.entreprise_id] = await partner_directory(
                 db, part.entreprise_id
             )
+    # Lignes de chaque compagnie chargées une fois (requêtes groupées,
+    # cache) ; l'équité à chaque point est ensuite calculée en mémoire.
+    data_by_ent = {
+        eid: await portfolio_data(db, eid) for eid in directories
+    }
     first = min(f.date_flux for f in all_flux)
     today = date.today()
     # Points trimestriels du premier flux à aujourd'hui (max ~40 pts).
@@ -849,7 +760,7 @@ async def serie_valeur_totale(
             )
             if not started:
                 continue
-            equite = await _equite_at(db, part.entreprise_id, at)
+            equite = equite_at(data_by_ent[part.entreprise_id], at)
             total += equite * pct
             total += sum(
                 float(f.montant or 0)
@@ -0,0 +1,431 @@
+"""Portail Investisseur — moteur ensembliste des séries du portefeuille.
+
+Les séries `serie_mensuelle` et `serie_valeur_totale` faisaient leurs
+requêtes IMMEUBLE PAR IMMEUBLE (logements, baux, paiements, dépenses,
+hypothèques) et, pour la valeur totale, re-chargeaient tout à CHAQUE
+point trimestriel (~40 points × participations × plusieurs requêtes).
+
+Ici, tout ce dont les séries ont besoin pour UNE compagnie est chargé en
+une poignée de requêtes groupées (`IN` sur les immeubles, sommes de
+paiements agrégées par immeuble × mois en SQL), puis chaque série est
+calculée en mémoire. Nombre de requêtes constant, quel que soit le
+nombre d'immeubles ou de points.
+
+Cache par compagnie (dict module-level) : les lignes chargées ne sont
+que des `Row` immuables (pas d'objets ORM partagés entre sessions).
+Invalidation sur écriture d'un paiement, d'une dépense, d'une
+évaluation, d'une hypothèque, d'un bail ou d'un logement ; un changement
+d'immeuble ou de détention vide tout :
+
+- `after_flush` note les clés touchées (`imm:<id>`, `bail:<id>`,
+  `log:<id>`, `*`) dans la session et les publie par `pg_notify` dans
+  SA transaction (livré seulement si elle commite) ;
+- `after_commit` invalide les compagnies concernées de CE process — pas
+  avant : une requête concurrente rechargerait l'état d'avant le
+  commit ; `after_rollback` oublie les clés ;
+- les autres workers reçoivent les clés via la connexion LISTEN de
+  `access_snapshot.listen_loop` (canal `kratos_portfolio`) ;
+- un chargement commencé avant une invalidation n'est pas mis en cache.
+
+TTL : `_CACHE_TTL_SECONDS` quand l'écoute est active (filet de
+sécurité), `_CACHE_TTL_FALLBACK_SECONDS` sinon (SQLite, connexion LISTEN
+perdue) — c'est alors la borne de fraîcheur entre workers.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Optional
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.immobilier import (
+    Bail,
+    BailStatus,
+    DepenseImmeuble,
+    Evaluation,
+    Hypotheque,
+    HypothequeStatus,
+    Immeuble,
+    ImmeubleOwnership,
+    Logement,
+    PaiementExterne,
+    PaiementLoyer,
+)
+from app.services.access_snapshot import is_listening, listen_channel
+
+CHANNEL = "kratos_portfolio"
+_CACHE_TTL_SECONDS = 300.0
+# Sans LISTEN, borne la fraîcheur entre workers.
+_CACHE_TTL_FALLBACK_SECONDS = 30.0
+_PENDING_KEY = "portfolio_cache_pending"
+_ALL = "*"
+
+
+@dataclass
+class PortfolioData:
+    """Lignes brutes d'une compagnie, indexées par immeuble."""
+
+    entreprise_id: int
+    # [(immeuble, pct_détention 0-100)] — mêmes règles que
+    # `immeubles_of_entreprise` (détention explicite, sinon 100 %).
+    pairs: list[tuple[Any, float]]
+    logements: dict[int, list[Any]] = field(default_factory=dict)
+    # logement_id → somme des loyers des baux ACTIFS.
+    loyers_baux_actifs: dict[int, float] = field(default_factory=dict)
+    # immeuble_id → {1er du mois: total payé (internes + externes)}.
+    paiements: dict[int, dict[date, float]] = field(default_factory=dict)
+    depenses: dict[int, list[Any]] = field(default_factory=dict)
+    hypotheques: dict[int, list[Any]] = field(default_factory=dict)
+    # immeuble_id → [(valeur, date_evaluation, is_reference)].
+    evaluations: dict[int, list[tuple[Optional[float], date, bool]]] = field(
+        default_factory=dict
+    )
+    # Index inverses pour l'invalidation (bail/logement → immeuble).
+    bail_immeuble: dict[int, int] = field(default_factory=dict)
+    logement_immeuble: dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class _Entry:
+    data: PortfolioData
+    loaded_at: float
+    results: dict[tuple, Any] = field(default_factory=dict)
+
+
+_cache: dict[int, _Entry] = {}
+# Incrémenté à chaque invalidation : un chargement commencé avant ne
+# remplit pas le cache (il a pu lire l'état d'avant l'écriture).
+_generation = 0
+
+
+def invalidate_portfolio_cache(entreprise_id: Optional[int] = None) -> None:
+    """Vide le cache d'une compagnie (ou de toutes si None)."""
+    global _generation
+    _generation += 1
+    if entreprise_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(entreprise_id, None)
+
+
+async def load_portfolio_data(
+    db: AsyncSession, entreprise_id: int
+) -> PortfolioData:
+    """Charge les lignes d'une compagnie en requêtes groupées (9 max)."""
+    imm_cols = (
+        Immeuble.id,
+        Immeuble.purchase_date,
+        Immeuble.purchase_price,
+        Immeuble.gestion_externe,
+    )
+    pairs: dict[int, tuple[Any, float]] = {}
+    for row in (
+        await db.execute(
+            select(*imm_cols, ImmeubleOwnership.ownership_pct)
+            .join(Immeuble, Immeuble.id == ImmeubleOwnership.immeuble_id)
+            .where(
+                ImmeubleOwnership.entreprise_id == entreprise_id,
+                Immeuble.is_active.is_(True),
+            )
+        )
+    ).all():
+        pairs[row.id] = (row, float(row.ownership_pct or 100))
+    for row in (
+        await db.execute(
+            select(*imm_cols).where(
+                Immeuble.owner_entreprise_id == entreprise_id,
+                Immeuble.is_active.is_(True),
+            )
+        )
+    ).all():
+        pairs.setdefault(row.id, (row, 100.0))
+
+    data = PortfolioData(entreprise_id=entreprise_id, pairs=list(pairs.values()))
+    imm_ids = list(pairs)
+    if not imm_ids:
+        return data
+
+    for row in (
+        await db.execute(
+            select(
+                Logement.id,
+                Logement.immeuble_id,
+                Logement.status,
+                Logement.loyer_demande,
+            ).where(Logement.immeuble_id.in_(imm_ids))
+        )
+    ).all():
+        data.logements.setdefault(row.immeuble_id, []).append(row)
+        data.logement_immeuble[row.id] = row.immeuble_id
+
+    for row in (
+        await db.execute(
+            select(
+                Bail.id, Bail.logement_id, Bail.status, Bail.loyer_mensuel
+            )
+            .join(Logement, Logement.id == Bail.logement_id)
+            .where(Logement.immeuble_id.in_(imm_ids))
+        )
+    ).all():
+        data.bail_immeuble[row.id] = data.logement_immeuble[row.logement_id]
+        if row.status == BailStatus.ACTIF.value:
+            data.loyers_baux_actifs[row.logement_id] = (
+                data.loyers_baux_actifs.get(row.logement_id, 0.0)
+                + float(row.loyer_mensuel or 0)
+            )
+
+    for imm_id, mois, total in (
+        await db.execute(
+            select(
+                Logement.immeuble_id,
+                PaiementLoyer.mois_couvert,
+                func.sum(PaiementLoyer.montant),
+            )
+            .join(Bail, Bail.id == PaiementLoyer.bail_id)
+            .join(Logement, Logement.id == Bail.logement_id)
+            .where(Logement.immeuble_id.in_(imm_ids))
+            .group_by(Logement.immeuble_id, PaiementLoyer.mois_couvert)
+        )
+    ).all():
+        _add_paiement(data, imm_id, mois, total)
+    for imm_id, mois, total in (
+        await db.execute(
+            select(
+                Logement.immeuble_id,
+                PaiementExterne.mois_couvert,
+                func.sum(PaiementExterne.montant),
+            )
+            .join(Logement, Logement.id == PaiementExterne.logement_id)
+            .where(Logement.immeuble_id.in_(imm_ids))
+            .group_by(Logement.immeuble_id, PaiementExterne.mois_couvert)
+        )
+    ).all():
+        _add_paiement(data, imm_id, mois, total)
+
+    for row in (
+        await db.execute(
+            select(
+                DepenseImmeuble.immeuble_id,
+                DepenseImmeuble.montant,
+                DepenseImmeuble.is_pourcentage,
+                DepenseImmeuble.taxable,
+                DepenseImmeuble.categorie,
+                DepenseImmeuble.frequence,
+                DepenseImmeuble.date_depense,
+            ).where(DepenseImmeuble.immeuble_id.in_(imm_ids))
+        )
+    ).all():
+        data.depenses.setdefault(row.immeuble_id, []).append(row)
+
+    for row in (
+        await db.execute(
+            select(
+                Hypotheque.immeuble_id,
+                Hypotheque.montant_initial,
+                Hypotheque.taux_pct,
+                Hypotheque.amortissement_mois,
+                Hypotheque.composition_interets,
+                Hypotheque.date_debut,
+                Hypotheque.paiement_mensuel,
+            ).where(
+                Hypotheque.immeuble_id.in_(imm_ids),
+                Hypotheque.status == HypothequeStatus.ACTIVE.value,
+            )
+        )
+    ).all():
+        data.hypotheques.setdefault(row.immeuble_id, []).append(row)
+
+    for imm_id, valeur, d, is_ref in (
+        await db.execute(
+            select(
+                Evaluation.immeuble_id,
+                Evaluation.valeur,
+                Evaluation.date_evaluation,
+                Evaluation.is_reference,
+            ).where(Evaluation.immeuble_id.in_(imm_ids))
+        )
+    ).all():
+        if d is None:
+            continue
+        data.evaluations.setdefault(imm_id, []).append(
+            (float(valeur) if valeur is not None else None, d, bool(is_ref))
+        )
+    return data
+
+
+def _add_paiement(data: PortfolioData, imm_id: int, mois: date, total) -> None:
+    k = mois.replace(day=1)
+    per_month = data.paiements.setdefault(imm_id, {})
+    per_month[k] = per_month.get(k, 0.0) + float(total or 0)
+
+
+async def portfolio_data(db: AsyncSession, entreprise_id: int) -> PortfolioData:
+    """Données de la compagnie depuis le cache (rechargées si périmées)."""
+    return (await _entry(db, entreprise_id)).data
+
+
+async def _entry(db: AsyncSession, entreprise_id: int) -> _Entry:
+    entry = _cache.get(entreprise_id)
+    ttl = _CACHE_TTL_SECONDS if is_listening() else _CACHE_TTL_FALLBACK_SECONDS
+    if entry is None or time.monotonic() - entry.loaded_at > ttl:
+        generation = _generation
+        data = await load_portfolio_data(db, entreprise_id)
+        entry = _Entry(data=data, loaded_at=time.monotonic())
+        if generation == _generation:
+            _cache[entreprise_id] = entry
+    return entry
+
+
+async def cached_result(db: AsyncSession, entreprise_id: int, key: tuple, compute):
+    """Résultat mémoïsé d'un calcul pur `compute(data)` sur la compagnie.
+
+    La clé inclut la date du jour (les séries en dépendent) ; elle vit
+    aussi longtemps que les données en cache."""
+    entry = await _entry(db, entreprise_id)
+    full_key = (*key, date.today())
+    if full_key not in entry.results:
+        entry.results[full_key] = compute(entry.data)
+    return entry.results[full_key]
+
+
+def equite_at(data: PortfolioData, at: date) -> float:
+    """Équité approximative de la compagnie à une date passée :
+    évaluation la plus récente ≤ date (une évaluation de référence
+    prime), sinon prix d'achat si acquis, moins la balance CALCULÉE des
+    hypothèques actives débutées ≤ date. Approximation assumée
+    (l'historique des hypothèques remplacées n'est pas conservé)."""
+    from app.services.hypotheque_calc import balance_calculee_de
+
+    total = 0.0
+    for imm, own_pct in data.pairs:
+        pct = own_pct / 100.0
+        if imm.purchase_date and imm.purchase_date > at:
+            continue
+        candidates = [
+            (is_ref, d, valeur)
+            for valeur, d, is_ref in data.evaluations.get(imm.id, [])
+            if d <= at
+        ]
+        best = (
+            max(candidates, key=lambda c: (c[0], c[1]))[2]
+            if candidates
+            else None
+        )
+        if best is not None:
+            val = best
+        else:
+            val = float(imm.purchase_price) if imm.purchase_price else 0.0
+        balance = 0.0
+        for h in data.hypotheques.get(imm.id, []):
+            if h.date_debut and h.date_debut > at:
+                continue
+            calc = balance_calculee_de(h, aujourd_hui=at)
+            balance += (
+                calc if calc is not None else float(h.montant_initial or 0)
+            )
+        total += (val - balance) * pct
+    return total
+
+
+# ─────────────────────────────────────────────────────────────────────
+# Invalidation sur écriture
+# ─────────────────────────────────────────────────────────────────────
+
+
+def _cache_key(obj) -> Optional[str]:
+    """Clé d'invalidation de `obj`, indépendante du contenu du cache (les
+    autres workers la résolvent sur le leur) ; `*` = tout vider."""
+    if isinstance(obj, (Immeuble, ImmeubleOwnership)):
+        return _ALL
+    if isinstance(obj, (DepenseImmeuble, Evaluation, Hypotheque, Logement)):
+        return f"imm:{obj.immeuble_id}"
+    if isinstance(obj, PaiementLoyer):
+        return f"bail:{obj.bail_id}"
+    if isinstance(obj, (PaiementExterne, Bail)):
+        return f"log:{obj.logement_id}"
+    return None
+
+
+def _invalidate_keys(keys) -> None:
+    """Invalide les compagnies en cache concernées par `keys`."""
+    global _generation
+    keys = set(keys)
+    if not keys:
+        return
+    _generation += 1
+    if _ALL in keys:
+        _cache.clear()
+        return
+    for eid, entry in list(_cache.items()):
+        data = entry.data
+        imm_ids = {imm.id for imm, _ in data.pairs}
+        for key in keys:
+            kind, _, raw = key.partition(":")
+            try:
+                ref = int(raw)
+            except ValueError:
+                continue
+            if kind == "bail":
+                target = data.bail_immeuble.get(ref)
+            elif kind == "log":
+                target = data.logement_immeuble.get(ref)
+            else:
+                target = ref
+            if target in imm_ids:
+                _cache.pop(eid, None)
+                break
+
+
+_WATCHED = (
+    Immeuble,
+    ImmeubleOwnership,
+    Logement,
+    Bail,
+    PaiementLoyer,
+    PaiementExterne,
+    DepenseImmeuble,
+    Evaluation,
+    Hypotheque,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_on_flush(session, _flush_context) -> None:
+    keys = {
+        k
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if isinstance(obj, _WATCHED) and (k := _cache_key(obj)) is not None
+    }
+    if not keys:
+        return
+    session.info.setdefault(_PENDING_KEY, set()).update(keys)
+    conn = session.connection()
+    if conn.dialect.name == "postgresql":
+        conn.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANNEL, "payload": ",".join(sorted(keys))},
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    keys = session.info.pop(_PENDING_KEY, None)
+    if keys:
+        _invalidate_keys(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_rollback(session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+listen_channel(
+    CHANNEL,
+    lambda payload: _invalidate_keys(k for k in payload.split(",") if k),
+    invalidate_portfolio_cache,
+)
@@ -0,0 +1,559 @@
+"""File de travaux durable sur Postgres (``FOR UPDATE SKIP LOCKED``).
+
+Remplace les ``asyncio.create_task(push_…_now(id))`` lancés depuis les
+requêtes : une tâche détachée était perdue au redéploiement, partait
+AVANT le commit de la requête (elle pouvait relire l'état d'avant) et
+cinq modifications de la même facture faisaient cinq pushes QBO.
+
+- ``job_handler(kind, queue=…)`` déclare un handler typé
+  ``async (payload: dict) -> résultat`` ;
+- ``enqueue(db, kind, payload, dedup_key=…)`` insère la ligne DANS la
+  transaction de l'appelant (rien ne part si la requête échoue). Une clé
+  de dédoublonnage déjà EN ATTENTE coalesce : la ligne existante reçoit
+  le dernier payload, aucun nouveau travail ;
+- ``worker_loop`` (démarrée par le ``lifespan``) réclame les travaux dus
+  par ``SELECT … FOR UPDATE SKIP LOCKED`` — deux workers ne prennent
+  jamais la même ligne — avec une concurrence bornée par file
+  (``QUEUE_CONCURRENCY``, par process) ;
+- échec : nouvel essai avec backoff exponentiel jusqu'à ``max_attempts``,
+  puis ``failed`` (``last_error`` garde la raison) ;
+- ``batch_size > 1`` : le handler reçoit une LISTE de payloads (les
+  travaux dus du même type, réclamés ensemble) et retourne une issue par
+  payload — une exception dans la liste n'échoue que ce travail-là.
+
+Un travail ``running`` dont le worker est mort (redéploiement) est remis
+en file après ``_STALE_AFTER_SECONDS``. Reprise (nouvel essai ou travail
+orphelin) alors qu'un travail de même ``dedup_key`` a été mis en file
+entre-temps : l'index unique partiel refuse un second ``pending`` — le
+travail repris passe ``superseded``, celui en attente (dernier payload)
+fait foi. Sur SQLite (tests) le verrou est
+ignoré : un seul process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.background_job import BackgroundJob
+
+log = logging.getLogger(__name__)
+
+# Travaux simultanés par file ET par worker (process).
+# « pdf » : rastérisation (eSign) — un rendu à la fois, budget mémoire.
+# « mail » : un $batch Graph à la fois (Graph limite la concurrence par
+# boîte d'envoi).
+QUEUE_CONCURRENCY: dict[str, int] = {
+    "qbo": 2, "cron": 1, "pdf": 1, "mail": 1, "default": 4,
+}
+_POLL_INTERVAL_SECONDS = 2.0
+# Laisse le démarrage (create_all) créer la table avant le 1ᵉʳ passage.
+_FIRST_POLL_DELAY_SECONDS = 10.0
+_BACKOFF_BASE_SECONDS = 30.0
+_BACKOFF_MAX_SECONDS = 3600.0
+# Un cron complet peut durer plusieurs minutes : marge large.
+_STALE_AFTER_SECONDS = 3600.0
+_MAINTENANCE_INTERVAL_SECONDS = 600.0
+_KEEP_DONE_DAYS = 7
+
+_WAKEUP_KEY = "job_queue_wakeup"
+
+JobFn = Callable[[Any], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    kind: str
+    queue: str
+    fn: JobFn
+    max_attempts: int
+    batch_size: int = 1
+
+
+_handlers: dict[str, JobHandler] = {}
+_wakeup: Optional[asyncio.Event] = None
+
+
+def job_handler(
+    kind: str,
+    *,
+    queue: str = "default",
+    max_attempts: int = 5,
+    batch_size: int = 1,
+) -> Callable[[JobFn], JobFn]:
+    """Décorateur : enregistre ``fn`` comme handler des travaux ``kind``.
+
+    ``batch_size > 1`` : ``fn(payloads: list[dict]) -> list[issue]``, une
+    issue (résultat ou exception) par payload, dans le même ordre."""
+
+    def deco(fn: JobFn) -> JobFn:
+        _handlers[kind] = JobHandler(
+            kind, queue, fn, max_attempts, max(1, batch_size)
+        )
+        return fn
+
+    return deco
+
+
+def _load_handlers() -> None:
+    """Importe les modules qui déclarent des handlers (import paresseux :
+    ils tirent les services QBO / les jobs cron)."""
+    import app.api.v1.endpoints.cron_runner  # noqa: F401
+    import app.integrations.req.companies  # noqa: F401
+    import app.services.esign_pages  # noqa: F401
+    import app.services.mail_outbox  # noqa: F401
+    import app.services.qbo_jobs  # noqa: F401
+
+
+def _handler(kind: str) -> JobHandler:
+    if kind not in _handlers:
+        _load_handlers()
+    try:
+        return _handlers[kind]
+    except KeyError:
+        raise ValueError(f"Type de travail inconnu : {kind}") from None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Délai avant le prochain essai (30 s, 1 min, 2 min… plafonné 1 h),
+    avec ±10 % de gigue pour étaler les reprises groupées."""
+    base = min(
+        _BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        _BACKOFF_MAX_SECONDS,
+    )
+    return base * random.uniform(0.9, 1.1)
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: Optional[dict[str, Any]] = None,
+    *,
+    dedup_key: Optional[str] = None,
+    delay_seconds: float = 0.0,
+) -> Optional[int]:
+    """Met un travail en file dans la transaction de ``db`` (l'appelant
+    commite). Retourne l'id de la ligne (nouvelle ou coalescée)."""
+    handler = _handler(kind)
+    values = {
+        "queue": handler.queue,
+        "kind": kind,
+        "payload_json": json.dumps(payload or {}, default=str),
+        "dedup_key": dedup_key,
+        "status": "pending",
+        "attempts": 0,
+        "max_attempts": handler.max_attempts,
+        "run_after": _now() + timedelta(seconds=delay_seconds),
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = pg_insert(BackgroundJob).values(**values)
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(BackgroundJob).values(**values)
+    else:  # pragma: no cover — dialectes non utilisés
+        job = BackgroundJob(**values)
+        db.add(job)
+        await db.flush()
+        db.info[_WAKEUP_KEY] = True
+        return job.id
+    if dedup_key is not None:
+        # Index unique partiel (status = 'pending') : un seul en attente.
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BackgroundJob.dedup_key],
+            index_where=BackgroundJob.status == "pending",
+            set_={"payload_json": stmt.excluded.payload_json},
+        )
+    job_id = (
+        await db.execute(stmt.returning(BackgroundJob.id))
+    ).scalar_one_or_none()
+    db.info[_WAKEUP_KEY] = True
+    return job_id
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session: Session) -> None:
+    """Travail mis en file par ce process : réveille la boucle locale
+    sans attendre le prochain passage."""
+    if session.info.pop(_WAKEUP_KEY, False) and _wakeup is not None:
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_wakeup(session: Session) -> None:
+    session.info.pop(_WAKEUP_KEY, None)
+
+
+# ---------------------------------------------------------------------------
+# Réclamation / exécution
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+async def _lock_due(
+    db: AsyncSession,
+    queue: str,
+    limit: int,
+    *,
+    kind: Optional[str] = None,
+    exclude: tuple[int, ...] = (),
+) -> list[BackgroundJob]:
+    stmt = select(BackgroundJob).where(
+        BackgroundJob.queue == queue,
+        BackgroundJob.status == "pending",
+        BackgroundJob.run_after <= _now(),
+    )
+    if kind is not None:
+        stmt = stmt.where(BackgroundJob.kind == kind)
+    if exclude:
+        stmt = stmt.where(BackgroundJob.id.notin_(exclude))
+    return list(
+        (
+            await db.execute(
+                stmt.order_by(BackgroundJob.run_after, BackgroundJob.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        ).scalars().all()
+    )
+
+
+def _mark_running(job: BackgroundJob, worker_id: str) -> ClaimedJob:
+    job.status = "running"
+    job.locked_at = _now()
+    job.locked_by = worker_id
+    job.attempts = (job.attempts or 0) + 1
+    return ClaimedJob(
+        id=job.id,
+        kind=job.kind,
+        payload=json.loads(job.payload_json or "{}"),
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+    )
+
+
+async def claim(
+    db: AsyncSession, queue: str, limit: int, worker_id: str
+) -> list[ClaimedJob]:
+    """Réserve jusqu'à ``limit`` travaux dus de ``queue`` (commit inclus).
+    Les lignes verrouillées par un autre worker sont SAUTÉES."""
+    if limit <= 0:
+        return []
+    out = [_mark_running(j, worker_id) for j in await _lock_due(db, queue, limit)]
+    await db.commit()
+    return out
+
+
+async def claim_units(
+    db: AsyncSession, queue: str, limit: int, worker_id: str
+) -> list[list[ClaimedJob]]:
+    """Comme ``claim``, mais groupé en UNITÉS d'exécution : un travail d'un
+    type ``batch_size > 1`` emmène les autres travaux dus du même type
+    (jusqu'à ``batch_size``). ``limit`` borne le nombre d'unités."""
+    if limit <= 0:
+        return []
+    rows = await _lock_due(db, queue, limit)
+    taken = tuple(r.id for r in rows)
+    units: list[list[BackgroundJob]] = []
+    by_kind: dict[str, list[BackgroundJob]] = {}
+    for row in rows:
+        try:
+            size = _handler(row.kind).batch_size
+        except ValueError:
+            size = 1
+        unit = by_kind.get(row.kind) if size > 1 else None
+        if unit is not None and len(unit) < size:
+            unit.append(row)
+            continue
+        unit = [row]
+        units.append(unit)
+        if size > 1:
+            by_kind[row.kind] = unit
+            extra = await _lock_due(
+                db, queue, size - 1, kind=row.kind, exclude=taken
+            )
+            unit.extend(extra)
+            taken += tuple(r.id for r in extra)
+    out = [[_mark_running(r, worker_id) for r in unit] for unit in units]
+    await db.commit()
+    return out
+
+
+async def _finish(job_id: int, **values: Any) -> None:
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id)
+            .values(locked_at=None, locked_by=None, **values)
+        )
+        await db.commit()
+
+
+async def _requeue(job_id: int, **values: Any) -> bool:
+    """Repasse un travail en ``pending``. Un autre travail de même
+    ``dedup_key`` déjà en attente (mis en file pendant l'exécution) le
+    remplace : celui-ci passe ``superseded``. False dans ce cas."""
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id)
+                .values(status="pending", locked_at=None, locked_by=None, **values)
+            )
+            await db.commit()
+            return True
+        except IntegrityError:
+            await db.rollback()
+        await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id)
+            .values(
+                status="superseded",
+                locked_at=None,
+                locked_by=None,
+                finished_at=_now(),
+                last_error=values.get("last_error"),
+            )
+        )
+        await db.commit()
+    log.info("Travail %s remplacé par un travail de même clé en attente", job_id)
+    return False
+
+
+async def _record(job: ClaimedJob, outcome: Any) -> bool:
+    """Enregistre l'issue d'un travail (résultat ou exception)."""
+    if isinstance(outcome, BaseException):
+        error = f"{type(outcome).__name__}: {outcome}"[:2000]
+        if job.attempts >= job.max_attempts:
+            log.error(
+                "Travail %s (%s) abandonné après %s essais : %s",
+                job.id, job.kind, job.attempts, error,
+            )
+            await _finish(
+                job.id, status="failed", last_error=error, finished_at=_now()
+            )
+        else:
+            delay = backoff_seconds(job.attempts)
+            log.warning(
+                "Travail %s (%s) essai %s/%s échoué, reprise dans %.0f s : %s",
+                job.id, job.kind, job.attempts, job.max_attempts, delay, error,
+            )
+            await _requeue(
+                job.id,
+                last_error=error,
+                run_after=_now() + timedelta(seconds=delay),
+            )
+        return False
+    await _finish(
+        job.id,
+        status="done",
+        last_error=None,
+        result_json=json.dumps(outcome, default=str)[:20000]
+        if outcome is not None
+        else None,
+        finished_at=_now(),
+    )
+    return True
+
+
+async def execute_unit(jobs: list[ClaimedJob]) -> int:
+    """Exécute une unité réservée (1 travail, ou un lot du même type) et
+    enregistre chaque issue. Retourne le nombre de réussites."""
+    outcomes: list[Any]
+    try:
+        handler = _handler(jobs[0].kind)
+        if handler.batch_size > 1:
+            outcomes = list(await handler.fn([j.payload for j in jobs]))
+            if len(outcomes) != len(jobs):
+                raise RuntimeError(
+                    f"Handler {handler.kind} : {len(outcomes)} issues "
+                    f"pour {len(jobs)} travaux"
+                )
+        else:
+            outcomes = [await handler.fn(j.payload) for j in jobs]
+    except asyncio.CancelledError:
+        # Arrêt de l'app : la ligne reste ``running`` et sera reprise
+        # par ``requeue_stale`` — on ne touche plus la DB ici.
+        raise
+    except Exception as exc:  # noqa: BLE001
+        outcomes = [exc] * len(jobs)
+    ok = 0
+    for job, outcome in zip(jobs, outcomes):
+        try:
+            ok += await _record(job, outcome)
+        except Exception:  # noqa: BLE001
+            # Issue non enregistrée (DB indisponible…) : la ligne reste
+            # ``running`` et ``requeue_stale`` la reprendra. Les autres
+            # travaux du lot sont enregistrés quand même.
+            log.exception(
+                "Travail %s (%s) : issue non enregistrée", job.id, job.kind
+            )
+    return ok
+
+
+async def execute(job: ClaimedJob) -> bool:
+    """Exécute un travail réservé et enregistre l'issue. True si réussi."""
+    return bool(await execute_unit([job]))
+
+
+async def requeue_stale(db: AsyncSession) -> int:
+    """Remet en file les travaux ``running`` d'un worker disparu, un par
+    un (SAVEPOINT) : une clé déjà en attente ne bloque que sa ligne, qui
+    passe ``superseded``. L'appelant commite."""
+    cutoff = _now() - timedelta(seconds=_STALE_AFTER_SECONDS)
+    stale = (
+        await db.execute(
+            select(BackgroundJob.id).where(
+                BackgroundJob.status == "running",
+                BackgroundJob.locked_at < cutoff,
+            )
+        )
+    ).scalars().all()
+    requeued = 0
+    for job_id in stale:
+        try:
+            async with db.begin_nested():
+                await db.execute(
+                    update(BackgroundJob)
+                    .where(BackgroundJob.id == job_id)
+                    .values(status="pending", locked_at=None, locked_by=None)
+                )
+            requeued += 1
+        except IntegrityError:
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job_id)
+                .values(
+                    status="superseded",
+                    locked_at=None,
+                    locked_by=None,
+                    finished_at=_now(),
+                )
+            )
+    return requeued
+
+
+async def purge_finished(db: AsyncSession) -> int:
+    """Supprime les travaux réussis ou remplacés de plus de
+    ``_KEEP_DONE_DAYS`` jours (les ``failed`` restent pour diagnostic)."""
+    cutoff = _now() - timedelta(days=_KEEP_DONE_DAYS)
+    res = await db.execute(
+        delete(BackgroundJob).where(
+            BackgroundJob.status.in_(("done", "superseded")),
+            BackgroundJob.finished_at < cutoff,
+        )
+    )
+    return res.rowcount or 0
+
+
+async def run_pending(
+    queue: Optional[str] = None, *, worker_id: str = "inline"
+) -> int:
+    """Exécute tout ce qui est dû MAINTENANT, file par file, avec la même
+    concurrence que le worker (scripts, tests). Retourne le nombre de
+    travaux exécutés (réussis ou non)."""
+    from app.db.session import AsyncSessionLocal
+
+    queues = [queue] if queue else list(QUEUE_CONCURRENCY)
+    done = 0
+    for q in queues:
+        while True:
+            async with AsyncSessionLocal() as db:
+                units = await claim_units(
+                    db, q, QUEUE_CONCURRENCY.get(q, 1), worker_id
+                )
+            if not units:
+                break
+            await asyncio.gather(*(execute_unit(u) for u in units))
+            done += sum(len(u) for u in units)
+    return done
+
+
+async def worker_loop() -> None:
+    """Tâche de fond démarrée avec l'app : réclame et exécute les travaux
+    dus, au plus ``QUEUE_CONCURRENCY[file]`` unités à la fois par file."""
+    global _wakeup
+    from app.db.session import AsyncSessionLocal
+
+    _load_handlers()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"[:64]
+    _wakeup = asyncio.Event()
+    active: dict[str, int] = {q: 0 for q in QUEUE_CONCURRENCY}
+    running: set[asyncio.Task] = set()
+    last_maintenance = 0.0
+    loop = asyncio.get_running_loop()
+
+    def _spawn(queue: str, unit: list[ClaimedJob]) -> None:
+        active[queue] += 1
+        task = asyncio.create_task(execute_unit(unit))
+        running.add(task)
+
+        def _done(t: asyncio.Task) -> None:
+            running.discard(t)
+            active[queue] -= 1
+            _wakeup.set()  # une place s'est libérée
+
+        task.add_done_callback(_done)
+
+    await asyncio.sleep(_FIRST_POLL_DELAY_SECONDS)
+    try:
+        while True:
+            _wakeup.clear()
+            try:
+                if loop.time() - last_maintenance > _MAINTENANCE_INTERVAL_SECONDS:
+                    async with AsyncSessionLocal() as db:
+                        await requeue_stale(db)
+                        await purge_finished(db)
+                        await db.commit()
+                    last_maintenance = loop.time()
+                for queue, limit in QUEUE_CONCURRENCY.items():
+                    free = limit - active[queue]
+                    if free <= 0:
+                        continue
+                    async with AsyncSessionLocal() as db:
+                        units = await claim_units(db, queue, free, worker_id)
+                    for unit in units:
+                        _spawn(queue, unit)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                log.warning("File de travaux : passage échoué", exc_info=True)
+            try:
+                await asyncio.wait_for(
+                    _wakeup.wait(), timeout=_POLL_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        for task in running:
+            task.cancel()
+        _wakeup = None
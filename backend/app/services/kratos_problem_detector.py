@@ -12,15 +12,19 @@ Format de l'action :
 
 Idempotence : on supprime les problèmes "open" plus vieux qu'une
 semaine avant de regénérer, pour éviter l'accumulation. Les
-problèmes appliqués ou rejetés sont conservés.
+problèmes appliqués ou rejetés sont conservés. Chaque scan réussi
+garde l'empreinte de l'état analysé (``input_hash``) : tant qu'elle ne
+change pas, le scan quotidien réutilise ses problèmes sans appel IA.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Union
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -34,12 +38,16 @@ from app.models.kratos_problem import (
     KratosProblemStatus,
 )
 from app.models.qg_strategic import Activity, StrategicProject, Vision
+from app.services.ai_briefings import fan_out, state_hash
 
 
 log = logging.getLogger(__name__)
 
 
 MODEL = "claude-sonnet-4-6"
+# Entre dans l'empreinte des scans : changer le prompt invalide les
+# problèmes réutilisés.
+PROMPT_VERSION = f"kratos-problems@v1:{MODEL}"
 
 
 SYSTEM_PROMPT = """Tu es Kratos, l'analyste stratégique d'un dirigeant \
@@ -201,7 +209,10 @@ async def _call_claude(entreprise: Entreprise, state: dict) -> list[dict]:
         "## Demande\nDétecte 3 à 5 problèmes selon le schéma JSON.",
     ]
     user_prompt = "\n\n".join(parts)
-    msg = client.messages.create(
+    # SDK synchrone : hors de la boucle, pour que le scan quotidien
+    # puisse mener plusieurs entreprises de front.
+    msg = await asyncio.to_thread(
+        client.messages.create,
         model=MODEL,
         max_tokens=1500,
         system=SYSTEM_PROMPT,
@@ -396,23 +407,40 @@ def _detect_problems_locally(entreprise: Entreprise, state: dict) -> list[dict]:
     return problems[:5]
 
 
-async def detect_for_entreprise(
-    db: AsyncSession,
-    entreprise_id: int,
-    *,
-    force: bool = False,
+@dataclass
+class _ScanJob:
+    """Scan à confier à l'IA : état rassemblé et son empreinte."""
+
+    entreprise: Entreprise
+    state: dict
+    input_hash: str
+
+
+async def _open_problems(
+    db: AsyncSession, entreprise_id: int, *conds
 ) -> list[KratosProblem]:
-    """Lance l'analyse et persiste les nouveaux problèmes.
+    return list(
+        (
+            await db.execute(
+                select(KratosProblem)
+                .where(
+                    KratosProblem.entreprise_id == entreprise_id,
+                    KratosProblem.status == KratosProblemStatus.OPEN.value,
+                    *conds,
+                )
+                .order_by(KratosProblem.created_at.desc())
+            )
+        ).scalars().all()
+    )
 
-    Si `force=False`, on saute si un scan a déjà tourné dans les
-    dernières 24 h (un problem créé < 24 h). Sinon on regénère."""
-    ent = (
-        await db.execute(
-            select(Entreprise).where(Entreprise.id == entreprise_id)
-        )
-    ).scalar_one_or_none()
-    if ent is None or not ent.is_active:
-        return []
+
+async def _prepare_scan(
+    db: AsyncSession, ent: Entreprise, *, force: bool
+) -> Union[list[KratosProblem], _ScanJob]:
+    """Retourne les problèmes ouverts quand aucun appel IA n'est
+    nécessaire (scan < 24 h, ou état inchangé depuis le dernier scan
+    réussi), sinon le scan à confier à l'IA."""
+    entreprise_id = ent.id
 
     # Idempotence par 24 h.
     if not force:
@@ -427,18 +455,34 @@ async def detect_for_entreprise(
         ).scalars().first()
         if recent is not None:
             # Retourne ce qui est ouvert pour cette entreprise.
-            return list(
-                (
-                    await db.execute(
-                        select(KratosProblem)
-                        .where(
-                            KratosProblem.entreprise_id == entreprise_id,
-                            KratosProblem.status
-                            == KratosProblemStatus.OPEN.value,
-                        )
-                        .order_by(KratosProblem.created_at.desc())
-                    )
-                ).scalars().all()
+            return await _open_problems(db, entreprise_id)
+
+    state = await _gather_state(db, entreprise_id)
+    input_hash = state_hash(
+        PROMPT_VERSION,
+        ent.name,
+        ent.description,
+        state["todo"],
+        state["visions"],
+        state["projects"],
+        state["activities"],
+    )
+    if not force:
+        last_hash = (
+            await db.execute(
+                select(KratosProblem.input_hash)
+                .where(
+                    KratosProblem.entreprise_id == entreprise_id,
+                    KratosProblem.problem_text.is_(None),
+                )
+                .order_by(KratosProblem.created_at.desc())
+                .limit(1)
+            )
+        ).scalar_one_or_none()
+        if last_hash == input_hash:
+            # Rien n'a bougé depuis le dernier scan : mêmes problèmes.
+            return await _open_problems(
+                db, entreprise_id, KratosProblem.input_hash == input_hash
             )
 
     # Cleanup : supprime les "open" plus vieux qu'une semaine pour
@@ -456,11 +500,16 @@ async def detect_for_entreprise(
     for p in old_open:
         await db.delete(p)
     await db.flush()
+    return _ScanJob(entreprise=ent, state=state, input_hash=input_hash)
 
-    state = await _gather_state(db, entreprise_id)
 
+async def _detect(job: _ScanJob) -> tuple[list[dict], Optional[str]]:
+    """Appel IA (sans session DB : exécutable en parallèle). Retourne
+    les problèmes et l'empreinte à garder — aucune pour le fallback
+    local, pour que le scan suivant rappelle l'IA."""
+    ent = job.entreprise
     try:
-        problems_raw = await _call_claude(ent, state)
+        return await _call_claude(ent, job.state), job.input_hash
     except Exception as exc:  # noqa: BLE001
         log.warning(
             "Kratos detector → fallback heuristique local pour %s : %s",
@@ -471,8 +520,15 @@ async def detect_for_entreprise(
         # l'état actuel (tâches en retard, stagnation, vision absente,
         # etc.) pour que Kratos continue à proposer des actions même
         # sans Claude.
-        problems_raw = _detect_problems_locally(ent, state)
+        return _detect_problems_locally(ent, job.state), None
 
+
+async def _persist_problems(
+    db: AsyncSession,
+    entreprise_id: int,
+    problems_raw: list[dict],
+    input_hash: Optional[str],
+) -> list[KratosProblem]:
     created: list[KratosProblem] = []
     valid_sev = {s.value for s in KratosProblemSeverity}
     for p in problems_raw[:8]:
@@ -496,6 +552,7 @@ async def detect_for_entreprise(
                 :2000
             ],
             status=KratosProblemStatus.OPEN.value,
+            input_hash=input_hash,
         )
         db.add(problem)
         created.append(problem)
@@ -503,6 +560,94 @@ async def detect_for_entreprise(
     return created
 
 
+async def detect_for_entreprise(
+    db: AsyncSession,
+    entreprise_id: int,
+    *,
+    force: bool = False,
+) -> list[KratosProblem]:
+    """Lance l'analyse et persiste les nouveaux problèmes.
+
+    Si `force=False`, on saute si un scan a déjà tourné dans les
+    dernières 24 h (un problem créé < 24 h), ou si l'état de
+    l'entreprise n'a pas changé depuis le dernier scan réussi (même
+    empreinte). Sinon on regénère."""
+    ent = (
+        await db.execute(
+            select(Entreprise).where(Entreprise.id == entreprise_id)
+        )
+    ).scalar_one_or_none()
+    if ent is None or not ent.is_active:
+        return []
+
+    job = await _prepare_scan(db, ent, force=force)
+    if not isinstance(job, _ScanJob):
+        return job
+    problems_raw, input_hash = await _detect(job)
+    return await _persist_problems(db, entreprise_id, problems_raw, input_hash)
+
+
+async def detect_for_all_active(db: AsyncSession) -> dict:
+    """Scan quotidien de toutes les entreprises actives.
+
+    État + empreinte de chaque entreprise d'abord, puis appels IA des
+    seules entreprises qui ont bougé, en parallèle sous la limite du
+    fournisseur, puis enregistrement. Chaque entreprise est isolée
+    dans un SAVEPOINT : un échec n'emporte pas les autres. L'appelant
+    commite."""
+    ents = (
+        await db.execute(
+            select(Entreprise).where(Entreprise.is_active.is_(True))
+        )
+    ).scalars().all()
+    out = {
+        "total": len(ents),
+        "detected": 0,
+        "reused": 0,
+        "errors": 0,
+        "problems": 0,
+    }
+    jobs: list[_ScanJob] = []
+    for ent in ents:
+        try:
+            async with db.begin_nested():
+                prepared = await _prepare_scan(db, ent, force=False)
+        except Exception as exc:  # noqa: BLE001
+            log.exception(
+                "Kratos detect_for_entreprise failed for %s: %s", ent.id, exc
+            )
+            out["errors"] += 1
+            continue
+        if isinstance(prepared, _ScanJob):
+            jobs.append(prepared)
+        else:
+            out["reused"] += 1
+
+    results = await fan_out(jobs, _detect, provider="anthropic")
+    for job, result in zip(jobs, results):
+        ent = job.entreprise
+        try:
+            if isinstance(result, BaseException):
+                raise result
+            async with db.begin_nested():
+                created = await _persist_problems(db, ent.id, *result)
+        except Exception as exc:  # noqa: BLE001
+            log.exception(
+                "Kratos detect_for_entreprise failed for %s: %s", ent.id, exc
+            )
+            out["errors"] += 1
+            continue
+        out["detected"] += 1
+        out["problems"] += len(created)
+        if created:
+            log.info(
+                "Kratos: %d problème(s) détecté(s) pour %s",
+                len(created),
+                ent.name,
+            )
+    return out
+
+
 async def apply_solution(
     db: AsyncSession,
     problem_id: int,
@@ -0,0 +1,581 @@
+"""Grilles de sensibilité de l'analyse financière (mode batch NumPy).
+
+`lead_analysis_finance.compute_all` évalue UN jeu d'intrants par appel
+(dataclasses scalaires) et `lead_tri_calc.irr` fait sa bissection en
+Python pur : une grille prix × taux × TGA × loyers de quelques milliers
+de cellules coûterait autant d'appels séquentiels.
+
+Ici le même pipeline est évalué en une passe sur des tableaux NumPy
+diffusés (broadcast) sur les 4 axes :
+
+    prix_achat        → frais de démarrage, MDF, financement achat
+    taux_interet_refi → hypothèque max RCD / paiements des 3 refi
+    tga               → valeur économique TGA des 4 scénarios
+    facteur_loyers    → revenus achat + loyers projetés (H13, PDM,
+                        abordable) — 1.0 = loyers de la fiche
+
+Tout ce qui ne dépend pas des axes est calculé UNE fois par les
+fonctions scalaires du moteur (typologie, barème des dépenses) : les
+dépenses sont affines en revenus (inoccupation, gestion, autres
+normalisations en % des revenus), on en tire constante + pente. Les
+règles d'overrides / masquage / postes finançables sont celles de
+`compute_all`, poste par poste.
+
+TRI investisseur : même mapping que `_derive_tri_auto_inputs` (fiche
+TRI de `lead_analyses`) puis `compute_tri_vec` / `irr_vec` — bissection
+vectorisée aux mêmes bornes et tolérance que `lead_tri_calc.irr`.
+
+Les tests dorés (`tests/services/test_lead_analysis_grid.py`) vérifient
+cellule par cellule l'égalité avec le moteur scalaire (cas Saint-Joseph).
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.lead_analysis_finance import (
+    FRAIS_FIXES,
+    PCT_COURTIERS,
+    TAXES_BIENVENUE_MTL_BRACKETS,
+    FinanceInputs,
+    FraisDemarrage,
+    ScenarioConfig,
+    compute_depenses_for_scenario,
+    compute_typology_aggregates,
+    resolve_scenario,
+)
+from app.services.lead_tri_calc import HORIZONS, _EXPO
+
+# Borne dure sur la taille d'une grille (cellules) — au-delà, la
+# réponse JSON elle-même devient le goulot.
+MAX_GRID_CELLS: int = 20_000
+
+AXES: tuple[str, ...] = ("prix_achat", "taux_interet_refi", "tga", "facteur_loyers")
+
+
+# ─── Helpers vectorisés (mêmes conventions que les scalaires) ─────
+
+
+def pv_canadian_vec(
+    rate_annual: np.ndarray, n_months: int, payment_monthly: np.ndarray
+) -> np.ndarray:
+    """`pv_canadian` sur tableaux (taux et paiements diffusés)."""
+    rate_annual = np.asarray(rate_annual, dtype=float)
+    payment_monthly = np.asarray(payment_monthly, dtype=float)
+    if n_months <= 0:
+        return np.zeros(np.broadcast(rate_annual, payment_monthly).shape)
+    rate_monthly = (1 + rate_annual / 2) ** (1 / 6) - 1
+    zero = (rate_annual == 0) | (rate_monthly == 0)
+    safe = np.where(zero, 1.0, rate_monthly)
+    factor = (1 - (1 + safe) ** (-n_months)) / safe
+    return np.where(zero, -payment_monthly * n_months, -payment_monthly * factor)
+
+
+def pmt_canadian_vec(
+    rate_annual: np.ndarray, n_months: int, principal: np.ndarray
+) -> np.ndarray:
+    """`pmt_canadian` sur tableaux."""
+    rate_annual = np.asarray(rate_annual, dtype=float)
+    principal = np.asarray(principal, dtype=float)
+    if n_months <= 0:
+        return np.zeros(np.broadcast(rate_annual, principal).shape)
+    rate_monthly = (1 + rate_annual / 2) ** (1 / 6) - 1
+    zero = (rate_annual == 0) | (rate_monthly == 0)
+    safe = np.where(zero, 1.0, rate_monthly)
+    pmt = principal * safe / (1 - (1 + safe) ** (-n_months))
+    out = np.where(zero, principal / n_months, pmt)
+    return np.where(principal <= 0, 0.0, out)
+
+
+def taxes_bienvenue_vec(
+    prix_achat: np.ndarray, brackets: Optional[List[tuple]] = None
+) -> np.ndarray:
+    """`taxes_bienvenue_mtl` sur tableaux : somme des tranches écrêtées."""
+    prix = np.asarray(prix_achat, dtype=float)
+    brackets = brackets if brackets else TAXES_BIENVENUE_MTL_BRACKETS
+    taxe = np.zeros_like(prix)
+    seuil_bas = 0.0
+    for seuil_haut, taux in brackets:
+        taxe = taxe + np.clip(prix - seuil_bas, 0.0, seuil_haut - seuil_bas) * taux
+        if math.isinf(seuil_haut):
+            break
+        seuil_bas = seuil_haut
+    return np.where(prix <= 0, 0.0, taxe)
+
+
+def irr_vec(
+    cashflows: np.ndarray,
+    lo: float = -0.9999,
+    hi: float = 10.0,
+    tol: float = 1e-9,
+    maxit: int = 200,
+) -> np.ndarray:
+    """`lead_tri_calc.irr` pour un lot de suites de flux.
+
+    ``cashflows`` de forme ``(..., T)`` ; retourne un tableau ``(...)``
+    de taux, ``NaN`` là où le scalaire retourne ``None`` (pas de
+    changement de signe sur ``[lo, hi]``). Chaque ligne suit exactement
+    la bissection scalaire : elle s'arrête dès que ``|VAN| < tol``."""
+    cf = np.asarray(cashflows, dtype=float)
+    t = np.arange(cf.shape[-1], dtype=float)
+    batch = cf.shape[:-1]
+
+    def npv(r: np.ndarray) -> np.ndarray:
+        return (cf / (1.0 + r)[..., None] ** t).sum(axis=-1)
+
+    lo_a = np.full(batch, lo)
+    hi_a = np.full(batch, hi)
+    flo, fhi = npv(lo_a), npv(hi_a)
+    out = np.full(batch, np.nan)
+    done = flo * fhi > 0
+    for _ in range(maxit):
+        if done.all():
+            break
+        mid = (lo_a + hi_a) / 2.0
+        fm = npv(mid)
+        hit = ~done & (np.abs(fm) < tol)
+        out[hit] = mid[hit]
+        done |= hit
+        left = ~done & (flo * fm < 0)
+        right = ~done & ~(flo * fm < 0)
+        hi_a = np.where(left, mid, hi_a)
+        lo_a = np.where(right, mid, lo_a)
+        flo = np.where(right, fm, flo)
+    rest = ~done
+    out[rest] = ((lo_a + hi_a) / 2.0)[rest]
+    return out
+
+
+def compute_tri_vec(
+    *,
+    prix: np.ndarray,
+    rpv_achat: np.ndarray,
+    pret_constr: np.ndarray,
+    mdf: np.ndarray,
+    capital: float,
+    pct: float,
+    loyers2: np.ndarray,
+    dep2: np.ndarray,
+    valeur2: np.ndarray,
+    rpv_refi: np.ndarray,
+    cr_loyers: float,
+    cr_dep: float,
+) -> Dict[int, np.ndarray]:
+    """`lead_tri_calc.compute_tri` réduit aux 3 TRI, sur tableaux.
+
+    Retourne ``{2: tri, 7: tri, 12: tri}`` (``NaN`` = pas de TRI)."""
+    arrays = np.broadcast_arrays(
+        *(np.asarray(a, dtype=float)
+          for a in (prix, rpv_achat, pret_constr, mdf,
+                    loyers2, dep2, valeur2, rpv_refi))
+    )
+    prix, rpv_achat, pret_constr, mdf, loyers2, dep2, valeur2, rpv_refi = arrays
+
+    hypotheque = rpv_achat * prix
+    marge = capital - mdf
+    rno2 = loyers2 - dep2
+    multiplicateur = np.where(
+        rno2 != 0, valeur2 / np.where(rno2 != 0, rno2, 1.0), 0.0
+    )
+
+    rno = {
+        h: loyers2 * (1 + cr_loyers) ** _EXPO[h] - dep2 * (1 + cr_dep) ** _EXPO[h]
+        for h in HORIZONS
+    }
+    valeur = {2: valeur2, 7: rno[7] * multiplicateur, 12: rno[12] * multiplicateur}
+    pret_refi = {h: rpv_refi * valeur[h] for h in HORIZONS}
+    equite = {h: valeur[h] - pret_refi[h] for h in HORIZONS}
+    dispo = {
+        2: pret_refi[2] + marge - (hypotheque + pret_constr),
+        7: pret_refi[7] - pret_refi[2],
+        12: pret_refi[12] - pret_refi[7],
+    }
+
+    restant = np.full(prix.shape, float(capital))
+    cash: Dict[int, np.ndarray] = {}
+    valeur_parts: Dict[int, np.ndarray] = {}
+    for h in HORIZONS:
+        retour = np.maximum(0.0, np.minimum(dispo[h], restant))
+        surplus = np.maximum(0.0, dispo[h] - retour)
+        restant = restant - retour
+        cash[h] = retour + pct * surplus
+        valeur_parts[h] = pct * equite[h] + restant
+
+    tri: Dict[int, np.ndarray] = {}
+    for exit_year in HORIZONS:
+        f = np.zeros(prix.shape + (13,))
+        f[..., 0] = -capital
+        f[..., 2] += cash[2]
+        if exit_year >= 7:
+            f[..., 7] += cash[7]
+        if exit_year >= 12:
+            f[..., 12] += cash[12]
+        f[..., exit_year] += valeur_parts[exit_year]
+        tri[exit_year] = irr_vec(f)
+    return tri
+
+
+# ─── Pipeline vectorisé ────────────────────────────────────────────
+
+
+@dataclass
+class SensitivityGrid:
+    """Grilles de résultats de forme ``(prix, taux, tga, loyers)``."""
+
+    axes: Dict[str, List[float]]
+    grids: Dict[str, np.ndarray]
+    # Labels des programmes refi (index de ``grids["best_refi_index"]``).
+    programs: List[str] = field(default_factory=list)
+
+    @property
+    def shape(self) -> tuple:
+        return tuple(len(self.axes[a]) for a in AXES)
+
+    def to_dict(self) -> dict:
+        """Sérialisation JSON : listes imbriquées, ``NaN`` → ``None``."""
+
+        def _clean(arr: np.ndarray):
+            if arr.dtype.kind != "f":
+                return arr.tolist()
+            return np.where(np.isnan(arr), None, arr).tolist()
+
+        return {
+            "axes": self.axes,
+            "shape": list(self.shape),
+            "programs": self.programs,
+            "grids": {k: _clean(v) for k, v in self.grids.items()},
+        }
+
+
+def _axis(values: Optional[Sequence[float]], default: float) -> np.ndarray:
+    if values is None or len(values) == 0:
+        return np.array([float(default)])
+    return np.asarray([float(v) for v in values], dtype=float)
+
+
+def _depenses_affines(inputs: FinanceInputs, *, is_refi: bool, is_aph: bool, nb_log: int):
+    """(constante, pente) des dépenses totales en fonction des revenus."""
+
+    def total(rev: float) -> float:
+        return compute_depenses_for_scenario(
+            is_refi=is_refi,
+            is_aph=is_aph,
+            nb_log=nb_log,
+            revenus_totaux=rev,
+            taxes_municipales=inputs.taxes_municipales,
+            taxes_scolaires=inputs.taxes_scolaires,
+            assurances=inputs.assurances,
+            energie_base=inputs.energie,
+            reduction_energie_pct=inputs.reduction_energie_pct,
+            depenses_autres=inputs.depenses_autres,
+            wifi_ajoute=inputs.wifi_ajoute,
+            nb_thermopompes_ajoutees=inputs.nb_thermopompes_ajoutees,
+            taux_inoccupation_pct=inputs.taux_inoccupation_pct,
+            bareme_overrides=inputs.bareme_overrides,
+            seuil_bascule_log=inputs.seuil_bascule_bareme_log,
+        ).total
+
+    const = total(0.0)
+    return const, total(1.0) - const
+
+
+def _scenario_vec(
+    cfg: ScenarioConfig,
+    *,
+    revenus: np.ndarray,
+    dep: tuple[float, float],
+    tga: np.ndarray,
+    taux: np.ndarray,
+    valeur_marchande: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """`compute_scenario` sur tableaux (mêmes gardes contre zéro)."""
+    depenses_total = dep[0] + dep[1] * revenus
+    revenus_net = revenus - depenses_total
+    valeur_eco_tga = np.where(
+        tga > 0, revenus_net / np.where(tga > 0, tga, 1.0), 0.0
+    )
+    paiement_hyp_max = revenus_net / cfg.rcd if cfg.rcd > 0 else revenus_net * 0.0
+    hyp_max_rcd = -pv_canadian_vec(taux, cfg.amort_annees * 12, paiement_hyp_max / 12.0)
+    valeur_eco_rcd = hyp_max_rcd / cfg.ltv if cfg.ltv > 0 else hyp_max_rcd * 0.0
+    valeur_retenue = np.minimum(valeur_eco_rcd, valeur_eco_tga)
+    if valeur_marchande is not None:
+        valeur_retenue = np.minimum(valeur_marchande, valeur_retenue)
+    financement = valeur_retenue * cfg.ltv
+    paiement = pmt_canadian_vec(taux, cfg.amort_annees * 12, financement)
+    return {
+        "revenus_totaux": revenus,
+        "depenses_total": depenses_total,
+        "revenus_net": revenus_net,
+        "valeur_retenue": valeur_retenue,
+        "financement": financement,
+        "cashflow_annuel": revenus_net - paiement * 12.0,
+    }
+
+
+def compute_grid(
+    inputs: FinanceInputs,
+    *,
+    use_aph_select: bool = True,
+    prix_achat: Optional[Sequence[float]] = None,
+    taux_interet_refi: Optional[Sequence[float]] = None,
+    tga: Optional[Sequence[float]] = None,
+    facteur_loyers: Optional[Sequence[float]] = None,
+    tri_manuels: Optional[dict] = None,
+) -> SensitivityGrid:
+    """Évalue `compute_all` sur la grille des 4 axes.
+
+    Axe absent / vide → valeur de ``inputs`` (dimension 1). Les taux et
+    le TGA sont en FRACTION (comme ``FinanceInputs``). ``facteur_loyers``
+    multiplie les revenus achat et tous les loyers projetés (≥ 0).
+
+    ``tri_manuels`` = ``{capital, pct, cr_loyers, cr_dep}`` (fractions) :
+    si fourni avec un capital > 0, ajoute les grilles ``tri_an2/7/12``.
+
+    Lève ``ValueError`` si la grille dépasse ``MAX_GRID_CELLS`` ou si un
+    facteur de loyers est négatif."""
+    ax_prix = _axis(prix_achat, inputs.prix_achat)
+    ax_taux = _axis(taux_interet_refi, inputs.taux_interet_refi)
+    ax_tga = _axis(tga, inputs.tga)
+    ax_loy = _axis(facteur_loyers, 1.0)
+    n_cells = ax_prix.size * ax_taux.size * ax_tga.size * ax_loy.size
+    if n_cells > MAX_GRID_CELLS:
+        raise ValueError(
+            f"Grille trop grande ({n_cells} cellules, max {MAX_GRID_CELLS})."
+        )
+    if (ax_loy < 0).any():
+        raise ValueError("Le facteur de loyers doit être positif.")
+
+    shape = (ax_prix.size, ax_taux.size, ax_tga.size, ax_loy.size)
+    prix = ax_prix.reshape(-1, 1, 1, 1)
+    taux_refi = ax_taux.reshape(1, -1, 1, 1)
+    tga_g = ax_tga.reshape(1, 1, -1, 1)
+    f_loy = ax_loy.reshape(1, 1, 1, -1)
+
+    sc_ov = inputs.scenario_overrides
+    cfg_achat = resolve_scenario("achat", sc_ov)
+    cfg_schl = resolve_scenario("schl_std", sc_ov)
+    cfg_aph50 = resolve_scenario("aph50", sc_ov)
+    cfg_aph100 = resolve_scenario("aph100", sc_ov)
+
+    # Typologie aux loyers de la fiche : H13 et loyer PDM sont
+    # homogènes de degré 1 en loyers (l'ordre des typos ne change pas
+    # sous un facteur ≥ 0) → on les multiplie simplement par le facteur.
+    typo = compute_typology_aggregates(
+        inputs.typologie,
+        inputs.typologie_prix,
+        inputs.nombre_logements,
+        ratio_abordabilite=inputs.ratio_abordabilite_aph,
+    )
+    nb_log_achat = inputs.nombre_logements
+    nb_log_refi = inputs.nombre_logements + inputs.nb_logements_ajoutes
+
+    # ── Scénarios ────────────────────────────────────────────────
+    achat = _scenario_vec(
+        cfg_achat,
+        revenus=inputs.revenus_annuels * f_loy,
+        dep=_depenses_affines(inputs, is_refi=False, is_aph=False, nb_log=nb_log_achat),
+        tga=tga_g,
+        taux=np.asarray(inputs.taux_interet_achat, dtype=float),
+        valeur_marchande=prix,
+    )
+    revenus_refi_std = typo.h13_loyer_pondere * f_loy * nb_log_refi * 12.0
+    refis: List[tuple[ScenarioConfig, Dict[str, np.ndarray]]] = [
+        (
+            cfg_schl,
+            _scenario_vec(
+                cfg_schl,
+                revenus=revenus_refi_std,
+                dep=_depenses_affines(inputs, is_refi=True, is_aph=False, nb_log=nb_log_refi),
+                tga=tga_g,
+                taux=taux_refi,
+            ),
+        ),
+        (
+            cfg_aph50,
+            _scenario_vec(
+                cfg_aph50,
+                revenus=revenus_refi_std,
+                dep=_depenses_affines(inputs, is_refi=True, is_aph=True, nb_log=nb_log_refi),
+                tga=tga_g,
+                taux=taux_refi,
+            ),
+        ),
+    ]
+    keys = ["refi_schl", "refi_aph_50"]
+    if use_aph_select and typo.nb_abordables > 0:
+        revenus_aph_100 = (
+            typo.nb_abordables * inputs.nouveau_loyer_abordable
+            + typo.nb_pdm * typo.nouveau_loyer_moyen_pdm
+        ) * f_loy * 12.0
+        refis.append(
+            (
+                cfg_aph100,
+                _scenario_vec(
+                    cfg_aph100,
+                    revenus=revenus_aph_100,
+                    dep=_depenses_affines(inputs, is_refi=True, is_aph=True, nb_log=nb_log_refi),
+                    tga=tga_g,
+                    taux=taux_refi,
+                ),
+            )
+        )
+        keys.append("refi_aph_100")
+    financement_best_aph = refis[-1][1]["financement"]
+
+    # ── Frais de démarrage (mêmes règles que compute_all) ────────
+    ff = dict(FRAIS_FIXES)
+    for k, v in (inputs.frais_fixes_overrides or {}).items():
+        if v is not None:
+            ff[k] = float(v)
+    pc = dict(PCT_COURTIERS)
+    for k, v in (inputs.pct_courtiers_overrides or {}).items():
+        if v is not None:
+            pc[k] = float(v)
+    frais: Dict[str, np.ndarray] = {
+        "courtier_hypothecaire_1": pc["courtier_hypothecaire_1"] * prix,
+        "courtier_hypothecaire_2": pc["courtier_hypothecaire_2"] * financement_best_aph,
+        "taxes_bienvenue": taxes_bienvenue_vec(prix, inputs.taxes_bienvenue_brackets),
+        "frais_developpement": np.asarray(inputs.frais_developpement, dtype=float),
+        "frais_negociations": np.asarray(inputs.frais_negociations, dtype=float),
+        "frais_travaux": np.asarray(inputs.frais_travaux, dtype=float),
+        "frais_dossier_preteur": inputs.frais_dossier_preteur_pct * prix * cfg_achat.ltv,
+        "interets": np.asarray(0.0),
+        "revenus_nets_pendant_projet": -achat["revenus_net"] * inputs.duree_projet_annees,
+    }
+    for k in FRAIS_FIXES:
+        frais[k] = np.asarray(ff[k], dtype=float)
+
+    custom: List[tuple[str, np.ndarray]] = []
+    for item in inputs.frais_custom_defs or []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            valeur = float(item.get("valeur", 0) or 0)
+        except (TypeError, ValueError):
+            valeur = 0.0
+        type_montant = item.get("type_montant", "fixe")
+        if type_montant == "fixe":
+            montant = np.asarray(valeur)
+        elif type_montant == "pct_prix_achat":
+            montant = (valeur / 100.0) * prix
+        elif type_montant == "pct_financement":
+            montant = (valeur / 100.0) * financement_best_aph
+        else:
+            montant = np.asarray(0.0)
+        custom.append((str(item.get("id", "")), montant))
+
+    noms = [f.name for f in fields(FraisDemarrage) if f.name != "frais_custom"]
+    overrides = inputs.frais_demarrage_overrides or {}
+    for k, v in overrides.items():
+        if v is not None and k in frais:
+            frais[k] = np.asarray(float(v))
+    custom = [
+        (cid, np.asarray(float(overrides[cid])) if cid and overrides.get(cid) is not None else m)
+        for cid, m in custom
+    ]
+    masques = set(inputs.frais_masques or [])
+    for k in masques:
+        if k in frais:
+            frais[k] = np.asarray(0.0)
+    custom = [(cid, m) for cid, m in custom if cid not in masques]
+
+    mdf_pct = (
+        inputs.mdf_preteur_b_pct if inputs.mdf_preteur_b_pct is not None else 0.25
+    )
+    financables = set(inputs.frais_demarrage_financables or [])
+    frais_fin_total = sum(
+        (frais[k] for k in noms if k != "interets" and k in financables),
+        np.asarray(0.0),
+    ) + sum((m for cid, m in custom if cid in financables), np.asarray(0.0))
+    frais["interets"] = (
+        (1 - mdf_pct)
+        * (prix + frais_fin_total)
+        * inputs.taux_interet_preteur_b_projet
+        * inputs.duree_projet_annees
+    )
+
+    frais_total = sum((frais[k] for k in noms), np.asarray(0.0)) + sum(
+        (m for _cid, m in custom), np.asarray(0.0)
+    )
+    prix_acquisition = prix + frais_total
+    frais_cash = sum(
+        (frais[k] * mdf_pct if k in financables else frais[k] for k in noms),
+        np.asarray(0.0),
+    ) + sum(
+        (m * mdf_pct if cid in financables else m for cid, m in custom),
+        np.asarray(0.0),
+    )
+    mdf_preteur_b = mdf_pct * prix + frais_cash
+
+    # ── MDF achat / équité / best refi ───────────────────────────
+    equites = np.stack(
+        [np.broadcast_to(sc["financement"] - prix_acquisition, shape) for _c, sc in refis]
+    )
+    best_idx = np.argmax(equites, axis=0)
+    best_amount = np.take_along_axis(equites, best_idx[None], axis=0)[0]
+
+    def _bc(a) -> np.ndarray:
+        return np.broadcast_to(np.asarray(a, dtype=float), shape)
+
+    grids: Dict[str, np.ndarray] = {
+        "frais_demarrage_total": _bc(frais_total),
+        "prix_acquisition": _bc(prix_acquisition),
+        "mdf_preteur_b": _bc(mdf_preteur_b),
+        "achat_financement": _bc(achat["financement"]),
+        "achat_mdf_necessaire": _bc(prix_acquisition - achat["financement"]),
+        "achat_cashflow_annuel": _bc(achat["cashflow_annuel"]),
+        "best_refi_amount": best_amount,
+        "best_refi_index": best_idx,
+    }
+    for key, (_cfg, sc) in zip(keys, refis):
+        grids[f"{key}_financement"] = _bc(sc["financement"])
+        grids[f"{key}_valeur_retenue"] = _bc(sc["valeur_retenue"])
+        grids[f"{key}_equite_a_la_fin"] = _bc(sc["financement"] - prix_acquisition)
+        grids[f"{key}_cashflow_annuel"] = _bc(sc["cashflow_annuel"])
+
+    manuels = tri_manuels or {}
+    capital = float(manuels.get("capital") or 0)
+    if capital > 0:
+        # Mapping de `_derive_tri_auto_inputs` (lead_analyses) : intrants
+        # du best refi + portion finançable des frais.
+        def _pick(name: str) -> np.ndarray:
+            stack = np.stack([_bc(sc[name]) for _c, sc in refis])
+            return np.take_along_axis(stack, best_idx[None], axis=0)[0]
+
+        # Contrairement aux intérêts de portage, la fiche TRI compte
+        # TOUS les postes finançables (intérêts compris s'ils le sont).
+        pret_constr_base = sum(
+            (frais[k] for k in noms if k in financables), np.asarray(0.0)
+        ) + sum((m for cid, m in custom if cid in financables), np.asarray(0.0))
+        ltvs = np.asarray([cfg.ltv for cfg, _sc in refis])
+        tri = compute_tri_vec(
+            prix=_bc(prix),
+            rpv_achat=max(0.0, 1.0 - float(mdf_pct or 0)),
+            pret_constr=_bc(pret_constr_base) * (1.0 - float(mdf_pct or 0)),
+            mdf=_bc(mdf_preteur_b),
+            capital=capital,
+            pct=float(manuels.get("pct") or 0),
+            loyers2=_pick("revenus_totaux"),
+            dep2=_pick("depenses_total"),
+            valeur2=_pick("valeur_retenue"),
+            rpv_refi=ltvs[best_idx],
+            cr_loyers=float(manuels.get("cr_loyers") or 0),
+            cr_dep=float(manuels.get("cr_dep") or 0),
+        )
+        for h in HORIZONS:
+            grids[f"tri_an{h}"] = tri[h]
+
+    return SensitivityGrid(
+        axes={
+            "prix_achat": ax_prix.tolist(),
+            "taux_interet_refi": ax_taux.tolist(),
+            "tga": ax_tga.tolist(),
+            "facteur_loyers": ax_loy.tolist(),
+        },
+        grids=grids,
+        programs=[cfg.label for cfg, _sc in refis],
+    )
@@ -260,40 +260,47 @@ def parse_pdf_ocr(pdf_bytes: bytes, filename: str = "pdf") -> str:
     """
     try:
         import pytesseract  # type: ignore
-        from pdf2image import convert_from_bytes  # type: ignore
+        import pdf2image  # type: ignore  # noqa: F401
     except ImportError as exc:
         log.warning("OCR PDF désactivé — paquet manquant : %s", exc)
         return ""
 
+    from app.services.pdf_documents import iter_page_images
+
+    # Rendu page par page, en niveaux de gris (3× moins de mémoire) :
+    # une seule page décodée à la fois, sous le budget commun.
     t0 = time.perf_counter()
+    texts: List[str] = []
+    n_pages = 0
     try:
-        images = convert_from_bytes(pdf_bytes, dpi=200)
+        for i, img in iter_page_images(pdf_bytes, dpi=200, grayscale=True):
+            n_pages = i
+            try:
+                page_text = (
+                    pytesseract.image_to_string(img, lang="fra+eng") or ""
+                )
+            except Exception as exc:  # noqa: BLE001
+                log.warning(
+                    "OCR PDF '%s' page %d a échoué : %s", filename, i, exc
+                )
+                continue
+            if page_text.strip():
+                texts.append(page_text)
     except Exception as exc:  # noqa: BLE001
         log.warning(
             "Conversion PDF→images (poppler) a échoué pour '%s' : %s",
             filename,
             exc,
         )
-        return ""
-
-    texts: List[str] = []
-    for i, img in enumerate(images, start=1):
-        try:
-            page_text = pytesseract.image_to_string(img, lang="fra+eng") or ""
-        except Exception as exc:  # noqa: BLE001
-            log.warning(
-                "OCR PDF '%s' page %d a échoué : %s", filename, i, exc
-            )
-            continue
-        if page_text.strip():
-            texts.append(page_text)
+        if not texts:
+            return ""
 
     full = "\n\n".join(texts)
     dt = time.perf_counter() - t0
     log.info(
         "OCR PDF '%s' : %d pages, %d chars extraits en %.2fs",
         filename,
-        len(images),
+        n_pages,
         len(full),
         dt,
     )
@@ -1804,21 +1811,14 @@ def parse_pdf(blob: bytes) -> str:
     Retourne une chaîne vide si le PDF est purement scanné (pas de
     couche texte) — le caller émettra alors un warning."""
     try:
-        from pypdf import PdfReader  # type: ignore
+        import pypdf  # type: ignore  # noqa: F401
     except ImportError:
         log.warning("pypdf non installé — extraction PDF désactivée")
         return ""
+    from app.services.pdf_documents import page_texts
+
     try:
-        reader = PdfReader(io.BytesIO(blob))
-        chunks: List[str] = []
-        for page in reader.pages:
-            try:
-                t = page.extract_text() or ""
-            except Exception:  # noqa: BLE001
-                t = ""
-            if t.strip():
-                chunks.append(t)
-        return "\n".join(chunks)
+        return "\n".join(t for t in page_texts(blob) if t.strip())
     except Exception as exc:  # noqa: BLE001
         log.warning("pypdf extraction failed: %s", exc)
         return ""
@@ -0,0 +1,218 @@
+"""Outbox des courriels : mise en file transactionnelle, envoi groupé.
+
+``GraphMailer.send`` fait un aller-retour Graph par courriel, en ligne
+dans l'action qui l'appelle : une cadence de 200 relances = 200 appels
+séquentiels dans le cron, et un échec Graph (limitation, 5xx) perdait le
+courriel. Ici :
+
+- ``queue_mail`` insère le courriel (``mail_outbox``) et son travail
+  ``mail.send`` DANS la transaction de l'appelant — rien ne part si
+  l'action échoue ;
+- le handler reçoit les courriels dus ensemble (jusqu'à 20, file
+  ``mail``) et les envoie par ``GraphMailer.send_batch`` : un ``$batch``
+  Graph par boîte d'envoi, sessions de téléversement pour les grosses
+  pièces jointes, ``Retry-After`` respecté par boîte ;
+- issue par courriel : ``sent``, ou nouvel essai avec backoff (``job_queue``)
+  si l'échec est passager, ``failed`` s'il est définitif ou après
+  ``MAX_ATTEMPTS``. L'entrée ``email_logs`` liée suit le même statut.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.integrations.email_graph import (
+    BATCH_MAX_REQUESTS,
+    EmailAttachment,
+    OutgoingMail,
+)
+from app.models.email_log import EmailLog
+from app.models.mail_outbox import OutboundMail, OutboundMailAttachment
+from app.services.job_queue import enqueue, job_handler
+
+log = logging.getLogger(__name__)
+
+SEND_JOB = "mail.send"
+MAX_ATTEMPTS = 6
+
+
+async def queue_mail(
+    db: AsyncSession,
+    *,
+    to: Iterable[str],
+    subject: str,
+    html_body: str,
+    cc: Optional[Iterable[str]] = None,
+    bcc: Optional[Iterable[str]] = None,
+    reply_to: Optional[str] = None,
+    attachments: Optional[List[EmailAttachment]] = None,
+    internal: bool = False,
+    from_email: Optional[str] = None,
+    from_name: Optional[str] = None,
+    request_read_receipt: bool = False,
+    email_log: Optional[EmailLog] = None,
+) -> OutboundMail:
+    """Met un courriel en file (mêmes arguments que ``GraphMailer.send``).
+    ``email_log`` : entrée du journal CRM à passer à ``sent`` / ``failed``
+    à l'envoi. L'appelant commite."""
+    if email_log is not None:
+        await db.flush()
+    mail = OutboundMail(
+        status="pending",
+        from_email=from_email,
+        from_name=from_name,
+        to_json=json.dumps(list(to)),
+        cc_json=json.dumps(list(cc)) if cc else None,
+        bcc_json=json.dumps(list(bcc)) if bcc else None,
+        reply_to=reply_to,
+        subject=subject,
+        html_body=html_body,
+        internal=internal,
+        request_read_receipt=request_read_receipt,
+        email_log_id=email_log.id if email_log is not None else None,
+        attempts=0,
+    )
+    db.add(mail)
+    await db.flush()
+    for a in attachments or []:
+        db.add(
+            OutboundMailAttachment(
+                mail_id=mail.id,
+                name=a.name,
+                content_type=a.content_type,
+                content=a.content_bytes,
+            )
+        )
+    await enqueue(
+        db,
+        SEND_JOB,
+        {"mail_id": mail.id},
+        dedup_key=f"{SEND_JOB}:{mail.id}",
+    )
+    return mail
+
+
+def _outgoing(
+    mail: OutboundMail, attachments: List[OutboundMailAttachment]
+) -> OutgoingMail:
+    return OutgoingMail(
+        to=json.loads(mail.to_json),
+        subject=mail.subject,
+        html_body=mail.html_body,
+        cc=json.loads(mail.cc_json) if mail.cc_json else None,
+        bcc=json.loads(mail.bcc_json) if mail.bcc_json else None,
+        reply_to=mail.reply_to,
+        attachments=[
+            EmailAttachment(a.name, a.content, a.content_type)
+            for a in attachments
+        ]
+        or None,
+        internal=mail.internal,
+        from_email=mail.from_email,
+        from_name=mail.from_name,
+        request_read_receipt=mail.request_read_receipt,
+    )
+
+
+async def dispatch(mail_ids: List[int]) -> dict[int, Any]:
+    """Envoie les courriels ``mail_ids`` en une passe groupée et
+    enregistre l'issue de chacun. Retourne ``{mail_id: issue}`` — une
+    exception = échec passager, à reprendre par la file."""
+    from app.db.session import AsyncSessionLocal
+    from app.integrations.email_graph import get_mailer
+
+    out: dict[int, Any] = {}
+    async with AsyncSessionLocal() as db:
+        mails = {
+            m.id: m
+            for m in (
+                await db.execute(
+                    select(OutboundMail).where(OutboundMail.id.in_(mail_ids))
+                )
+            ).scalars()
+        }
+        todo = [
+            mails[i]
+            for i in mail_ids
+            if i in mails and mails[i].status == "pending"
+        ]
+        for i in mail_ids:
+            if i not in mails:
+                out[i] = {"skipped": "absent"}
+            elif mails[i].status != "pending":
+                out[i] = {"skipped": mails[i].status}
+        if not todo:
+            return out
+
+        attachments: dict[int, List[OutboundMailAttachment]] = {}
+        for a in (
+            await db.execute(
+                select(OutboundMailAttachment)
+                .where(OutboundMailAttachment.mail_id.in_([m.id for m in todo]))
+                .order_by(OutboundMailAttachment.id)
+            )
+        ).scalars():
+            attachments.setdefault(a.mail_id, []).append(a)
+
+        try:
+            results: List[Optional[Exception]] = await get_mailer().send_batch(
+                [_outgoing(m, attachments.get(m.id, [])) for m in todo]
+            )
+        except Exception as exc:  # noqa: BLE001 — jeton, réseau : tout le lot
+            results = [exc] * len(todo)
+
+        logs = {
+            e.id: e
+            for e in (
+                await db.execute(
+                    select(EmailLog).where(
+                        EmailLog.id.in_(
+                            [m.email_log_id for m in todo if m.email_log_id]
+                        )
+                    )
+                )
+            ).scalars()
+        }
+        now = datetime.now(timezone.utc)
+        for mail, result in zip(todo, results):
+            mail.attempts = (mail.attempts or 0) + 1
+            entry = logs.get(mail.email_log_id)
+            if result is None:
+                mail.status = "sent"
+                mail.sent_at = now
+                mail.last_error = None
+                if entry is not None:
+                    entry.status = "sent"
+                    entry.sent_at = now
+                out[mail.id] = {"sent": True}
+                continue
+            mail.last_error = f"{type(result).__name__}: {result}"[:2000]
+            retryable = getattr(result, "retryable", True)
+            if retryable and mail.attempts < MAX_ATTEMPTS:
+                out[mail.id] = result
+                continue
+            mail.status = "failed"
+            if entry is not None:
+                entry.status = "failed"
+            log.warning("courriel %s abandonné : %s", mail.id, mail.last_error)
+            out[mail.id] = {"failed": mail.last_error}
+        await db.commit()
+    return out
+
+
+@job_handler(
+    SEND_JOB,
+    queue="mail",
+    max_attempts=MAX_ATTEMPTS,
+    batch_size=BATCH_MAX_REQUESTS,
+)
+async def _send_mails(payloads: list[dict]) -> list[Any]:
+    ids = [int(p["mail_id"]) for p in payloads]
+    outcomes = await dispatch(ids)
+    return [outcomes[i] for i in ids]
@@ -3,24 +3,123 @@
 Appelé par les autres services quand un événement important arrive
 (soumission signée, facture payée, congé demandé, punch à approuver…).
 
-Idempotence: les callers sont responsables de ne pas créer des
-doublons — c'est plus simple que de dédupliquer ici avec une clé de
-dédup, et en pratique chaque événement source ne se produit qu'une
-fois par objet.
+Idempotence : ``dedup_key`` (``événement:entité``) est unique PAR
+UTILISATEUR (index ``uq_notifications_user_dedup``) — un cron relancé
+ne renotifie personne. Sans clé, les callers restent responsables des
+doublons (chaque événement source ne se produit qu'une fois par objet).
+
+Fan-out : ``notify_role`` insérait une ligne puis un flush par
+destinataire. Il fait maintenant UN ``INSERT … SELECT`` depuis ``users``
+(rôle ≥ ``min_role``, ``ON CONFLICT DO NOTHING`` pour la dédup) qui
+renvoie les seuls destinataires nouvellement notifiés ; compteurs et
+push ne concernent qu'eux. Nombre d'instructions constant, quelle que
+soit la taille du rôle.
+
+Compteurs (``notification_counters``) : non-lues par (utilisateur,
+volet) pour le badge de la cloche. Tenus à jour dans la transaction de
+l'écriture :
+
+- ``notify_role`` et ``mark_all_read`` les ajustent eux-mêmes (écritures
+  en masse) ;
+- toute autre écriture ORM d'une ``Notification`` (création directe,
+  lecture d'une notif, suppression) est captée par l'écouteur
+  ``after_flush`` ci-dessous.
+
+Le volet d'une notification se déduit de son ``href`` et de son ``kind``
+(``notification_volet``) — même règle que le filtre ``scope`` de la
+liste. ``rebuild_counters`` recalcule depuis ``notifications`` ; il
+tourne à chaque démarrage (``ensure_notification_tables``).
 """
 
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
 
+from sqlalchemy import delete, event, func, inspect, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.types import Boolean, String, Text
 
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationCounter
 
 
 log = logging.getLogger(__name__)
 
+# Préfixes de href par volet. Sert à cloisonner la cloche : une
+# notification dont le href cible explicitement un AUTRE volet
+# n'apparaît pas (ex. un NDA signé — href /prospection/… — ne doit
+# pas s'afficher dans la cloche du volet construction /app).
+VOLET_PREFIXES: dict[str, tuple[str, ...]] = {
+    "construction": ("/app", "/m"),
+    "prospection": ("/prospection",),
+    "immobilier": ("/immobilier",),
+    "entreprises": ("/entreprises",),
+    "devlog": ("/dev-logiciel",),
+}
+
+# Certaines notifications appartiennent à un volet de façon non ambiguë,
+# peu importe leur href (qui peut être nul sur d'anciennes notifs, ou
+# pointer vers un autre volet pour des raisons de routage historique).
+# On les rattache par `kind` pour cloisonner la cloche de façon fiable —
+# ex. « NDA signé » est de la prospection et ne doit jamais apparaître
+# dans la cloche du volet construction.
+KIND_VOLET: dict[str, str] = {
+    "nda.signed": "prospection",
+}
+
+#: Volet d'une notification visible partout (href neutre ou nul).
+NEUTRAL_VOLET = ""
+#: Volet d'une notification qu'aucun filtre de volet ne garde (href et
+#: kind rattachés à deux volets différents) : comptée sans filtre seulement.
+NO_VOLET = "~"
+
+
+def notification_volet(kind: Optional[str], href: Optional[str]) -> str:
+    """Volet de la cloche où la notification apparaît (voir ``NEUTRAL_VOLET``
+    et ``NO_VOLET``)."""
+    by_href = None
+    if href:
+        for volet, prefixes in VOLET_PREFIXES.items():
+            if href.startswith(prefixes):
+                by_href = volet
+                break
+    by_kind = KIND_VOLET.get(kind or "")
+    if by_href and by_kind and by_href != by_kind:
+        return NO_VOLET
+    return by_href or by_kind or NEUTRAL_VOLET
+
+
+def _insert(dialect: str):
+    return pg_insert if dialect == "postgresql" else sqlite_insert
+
+
+def _bump_stmt(dialect: str, deltas: Dict[Tuple[int, str], int]):
+    """Upsert additif ``unread = unread + delta`` — une instruction pour
+    tous les (utilisateur, volet) touchés."""
+    stmt = _insert(dialect)(NotificationCounter).values(
+        [
+            {"user_id": uid, "volet": volet, "unread": delta}
+            for (uid, volet), delta in deltas.items()
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id, NotificationCounter.volet],
+        set_={
+            "unread": NotificationCounter.unread + stmt.excluded.unread,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def _bump(db: AsyncSession, deltas: Dict[Tuple[int, str], int]) -> None:
+    deltas = {k: d for k, d in deltas.items() if d}
+    if deltas:
+        await db.execute(_bump_stmt(db.get_bind().dialect.name, deltas))
+
 
 async def notify(
     db: AsyncSession,
@@ -31,16 +130,46 @@ async def notify(
     body: Optional[str] = None,
     href: Optional[str] = None,
     push: bool = True,
+    dedup_key: Optional[str] = None,
 ) -> Notification:
-    n = Notification(
-        user_id=user_id,
-        kind=kind,
-        title=title[:255],
-        body=body,
-        href=href[:500] if href else None,
-    )
-    db.add(n)
-    await db.flush()
+    """Crée une notification pour ``user_id``. Avec ``dedup_key`` : si
+    l'utilisateur l'a déjà reçue, la retourne sans rien créer ni pousser.
+
+    Avec clé, l'insertion est un ``INSERT … ON CONFLICT DO NOTHING`` (comme
+    ``notify_role``) : deux exécutions concurrentes ne lèvent pas
+    d'``IntegrityError`` au flush — ce qui annulerait la transaction de
+    l'appelant — la perdante relit simplement la ligne existante."""
+    row = {
+        "user_id": user_id,
+        "kind": kind,
+        "title": title[:255],
+        "body": body,
+        "href": href[:500] if href else None,
+    }
+    if dedup_key is None:
+        n = Notification(**row)
+        db.add(n)
+        await db.flush()
+    else:
+        stmt = (
+            _insert(db.get_bind().dialect.name)(Notification)
+            .values(**row, dedup_key=dedup_key, is_read=False)
+            .on_conflict_do_nothing()
+            .returning(Notification.id)
+        )
+        new_id = (await db.execute(stmt)).scalar_one_or_none()
+        n = (
+            await db.execute(
+                select(Notification).where(
+                    Notification.user_id == user_id,
+                    Notification.dedup_key == dedup_key,
+                )
+            )
+        ).scalar_one()
+        if new_id is None:
+            return n
+        # Insertion hors ORM : l'écouteur ``after_flush`` ne la voit pas.
+        await _bump(db, {(user_id, notification_volet(kind, row["href"])): 1})
     if push:
         await _push_best_effort(
             db, [user_id], kind=kind, title=title, body=body, href=href
@@ -89,41 +218,164 @@ async def notify_role(
     title: str,
     body: Optional[str] = None,
     href: Optional[str] = None,
+    dedup_key: Optional[str] = None,
 ) -> int:
-    """Fan-out a notification to every user at or above `min_role`.
+    """Fan-out a notification to every active user at or above `min_role`.
 
     Utile pour « nouveau prospect », « punch à approuver » — on notifie
-    tous les managers/admins d'un coup. Retourne le nombre de notifs
+    tous les managers/admins d'un coup. ``dedup_key`` : les utilisateurs
+    qui l'ont déjà reçue sont sautés. Retourne le nombre de notifs
     créées.
     """
-    from sqlalchemy import select
-
-    from app.models.user import User
-
-    rank_map = {"owner": 4, "admin": 3, "manager": 2, "employee": 1}
-    min_rank = rank_map.get(min_role, 99)
-    users = (
-        await db.execute(select(User).where(User.is_active.is_(True)))
-    ).scalars().all()
-    count = 0
-    cibles: list[int] = []
-    for u in users:
-        if rank_map.get(u.role, 0) >= min_rank:
-            # push=False ici : un SEUL envoi push groupé après la boucle
-            # (une requête au lieu d'une par destinataire).
-            await notify(
-                db,
-                user_id=u.id,
-                kind=kind,
-                title=title,
-                body=body,
-                href=href,
-                push=False,
+    from app.models.user import ROLE_RANK, User
+
+    min_rank = ROLE_RANK.get(min_role, 99)
+    roles = [role for role, rank in ROLE_RANK.items() if rank >= min_rank]
+    if not roles:
+        return 0
+    href = href[:500] if href else None
+    insert = _insert(db.get_bind().dialect.name)
+    rows = select(
+        User.id,
+        literal(kind, String),
+        literal(title[:255], String),
+        literal(body, Text),
+        literal(href, String),
+        literal(dedup_key, String),
+        literal(False, Boolean),
+    ).where(User.is_active.is_(True), User.role.in_(roles))
+    stmt = insert(Notification).from_select(
+        ["user_id", "kind", "title", "body", "href", "dedup_key", "is_read"],
+        rows,
+    )
+    if dedup_key is not None:
+        stmt = stmt.on_conflict_do_nothing()
+    cibles = list(
+        (await db.execute(stmt.returning(Notification.user_id))).scalars()
+    )
+    if not cibles:
+        return 0
+    volet = notification_volet(kind, href)
+    await _bump(db, {(uid, volet): 1 for uid in cibles})
+    # Un SEUL envoi push groupé, aux seuls nouveaux destinataires.
+    await _push_best_effort(
+        db, cibles, kind=kind, title=title, body=body, href=href
+    )
+    return len(cibles)
+
+
+# ---------------------------------------------------------------------------
+# Compteurs de non-lues
+# ---------------------------------------------------------------------------
+
+
+async def unread_total(
+    db: AsyncSession, user_id: int, scope: Optional[str] = None
+) -> int:
+    """Non-lues de ``user_id`` visibles dans le volet ``scope`` (tous les
+    volets si absent ou inconnu) — une lecture de ``notification_counters``."""
+    stmt = select(func.coalesce(func.sum(NotificationCounter.unread), 0)).where(
+        NotificationCounter.user_id == user_id
+    )
+    if scope and scope in VOLET_PREFIXES:
+        stmt = stmt.where(NotificationCounter.volet.in_((NEUTRAL_VOLET, scope)))
+    return max(int((await db.execute(stmt)).scalar_one() or 0), 0)
+
+
+async def mark_all_read(db: AsyncSession, user_id: int) -> int:
+    """Marque toute la boîte de ``user_id`` lue ; compteurs à zéro."""
+    from datetime import datetime, timezone
+
+    res = await db.execute(
+        update(Notification)
+        .where(
+            Notification.user_id == user_id,
+            Notification.is_read.is_(False),
+        )
+        .values(is_read=True, read_at=datetime.now(timezone.utc))
+    )
+    await db.execute(
+        update(NotificationCounter)
+        .where(NotificationCounter.user_id == user_id)
+        .values(unread=0)
+    )
+    await db.flush()
+    return res.rowcount or 0
+
+
+async def rebuild_counters(
+    db: AsyncSession, user_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Recalcule les compteurs depuis ``notifications`` (tous les
+    utilisateurs, ou ``user_ids``). Retourne le nombre de lignes écrites.
+    L'appelant commite.
+
+    Postgres : verrou EXCLUSIVE sur ``notification_counters`` jusqu'au
+    commit. Les écritures concurrentes (qui ajustent les compteurs dans
+    leur transaction) ont alors soit commité avant le comptage, soit
+    attendent et appliquent leur delta sur le résultat : aucune n'est
+    perdue ni comptée deux fois."""
+    ids = list(user_ids) if user_ids is not None else None
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        await db.execute(text("LOCK TABLE notification_counters IN EXCLUSIVE MODE"))
+    grouped = (
+        select(
+            Notification.user_id,
+            Notification.kind,
+            Notification.href,
+            func.count(),
+        )
+        .where(Notification.is_read.is_(False))
+        .group_by(Notification.user_id, Notification.kind, Notification.href)
+    )
+    purge = delete(NotificationCounter)
+    if ids is not None:
+        grouped = grouped.where(Notification.user_id.in_(ids))
+        purge = purge.where(NotificationCounter.user_id.in_(ids))
+    totals: Counter = Counter()
+    for uid, kind, href, n in (await db.execute(grouped)).all():
+        totals[(uid, notification_volet(kind, href))] += n
+    await db.execute(purge)
+    if totals:
+        await db.execute(
+            _insert(dialect)(NotificationCounter).values(
+                [
+                    {"user_id": uid, "volet": volet, "unread": n}
+                    for (uid, volet), n in totals.items()
+                ]
             )
-            cibles.append(u.id)
-            count += 1
-    if cibles:
-        await _push_best_effort(
-            db, cibles, kind=kind, title=title, body=body, href=href
         )
-    return count
+    return len(totals)
+
+
+@event.listens_for(Session, "after_flush")
+def _count_orm_writes(session: Session, _ctx) -> None:
+    """Écritures ORM unitaires d'une ``Notification`` → compteurs."""
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, Notification) and not obj.is_read:
+            deltas[(obj.user_id, notification_volet(obj.kind, obj.href))] += 1
+    for obj in session.deleted:
+        if not isinstance(obj, Notification):
+            continue
+        # Ligne déjà supprimée : pas de rechargement, état en mémoire seul.
+        loaded = inspect(obj).dict
+        if "is_read" in loaded and not loaded["is_read"]:
+            volet = notification_volet(loaded.get("kind"), loaded.get("href"))
+            deltas[(loaded.get("user_id"), volet)] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, Notification):
+            continue
+        hist = inspect(obj).attrs.is_read.history
+        if not hist.has_changes() or not hist.deleted:
+            continue
+        before, after = bool(hist.deleted[0]), bool(obj.is_read)
+        if before != after:
+            deltas[(obj.user_id, notification_volet(obj.kind, obj.href))] += (
+                1 if before else -1
+            )
+    deltas = Counter({k: d for k, d in deltas.items() if d})
+    if deltas:
+        conn = session.connection()
+        conn.execute(_bump_stmt(conn.dialect.name, dict(deltas)))
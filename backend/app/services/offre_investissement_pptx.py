@@ -1503,6 +1503,154 @@ def _replace_in_slide(slide, find: str, replace: str, dupe_strategy: str) -> int
     return total
 
 
+# ─── Index compilé du template ──────────────────────────────────────
+#
+# ``_replace_in_slide`` parcourt toutes les formes, tous les paragraphes
+# et toutes les cellules de la slide pour CHAQUE substitution (~120 par
+# offre) : l'essentiel du CPU d'une génération. Le template, lui, ne
+# change qu'au déploiement. On le compile donc une fois (par chemin +
+# mtime + taille) en un index des cadres de texte — chemin (forme,
+# cellule) + textes d'origine — et chaque substitution ne visite que les
+# cadres qui contiennent la chaîne cherchée, dans l'ordre exact du
+# parcours complet. Les cadres déjà modifiés pendant la génération sont
+# suivis avec leur texte courant (une substitution peut produire le texte
+# cherché par la suivante) : le résultat est identique à
+# ``_replace_in_slide``.
+
+
+@dataclass(frozen=True)
+class _FrameRef:
+    """Cadre de texte du template : forme (index dans ``slide.shapes``),
+    cellule (ligne, colonne) pour une table, textes d'origine (runs
+    joints de chaque paragraphe + texte du cadre)."""
+
+    shape_idx: int
+    cell: Optional[Tuple[int, int]]
+    haystack: Tuple[str, ...]
+
+
+@dataclass
+class _TemplateIndex:
+    blob: bytes
+    slides: List[List[_FrameRef]]
+    _hits: Dict[Tuple[int, str], Tuple[int, ...]] = field(default_factory=dict)
+
+    def candidates(self, slide_idx: int, find: str) -> Tuple[int, ...]:
+        """Cadres de la slide dont le texte d'origine contient ``find``
+        (mémoïsé : les chaînes cherchées sont celles du template)."""
+        key = (slide_idx, find)
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = tuple(
+                i
+                for i, ref in enumerate(self.slides[slide_idx])
+                if any(find in text for text in ref.haystack)
+            )
+            self._hits[key] = hits
+        return hits
+
+
+# (chemin, mtime_ns, taille) → index ; une seule version par chemin.
+_TEMPLATE_INDEXES: Dict[Tuple[str, int, int], _TemplateIndex] = {}
+
+
+def _frame_haystack(text_frame) -> Tuple[str, ...]:
+    return tuple(
+        "".join(r.text for r in para.runs) for para in text_frame.paragraphs
+    ) + (text_frame.text,)
+
+
+def _compile_template(blob: bytes) -> _TemplateIndex:
+    """Parcourt le template une fois, dans l'ordre de ``_replace_in_slide``."""
+    from pptx import Presentation  # type: ignore
+
+    prs = Presentation(io.BytesIO(blob))
+    slides: List[List[_FrameRef]] = []
+    for slide in prs.slides:
+        frames: List[_FrameRef] = []
+        for shape_idx, shape in enumerate(slide.shapes):
+            if shape.has_text_frame:
+                frames.append(
+                    _FrameRef(shape_idx, None, _frame_haystack(shape.text_frame))
+                )
+            if shape.has_table:
+                for r, row in enumerate(shape.table.rows):
+                    for c, cell in enumerate(row.cells):
+                        frames.append(
+                            _FrameRef(
+                                shape_idx, (r, c), _frame_haystack(cell.text_frame)
+                            )
+                        )
+        slides.append(frames)
+    return _TemplateIndex(blob=blob, slides=slides)
+
+
+def _template_index(template_path: Path) -> _TemplateIndex:
+    """Index compilé du template, recompilé si le fichier a changé."""
+    st = template_path.stat()
+    key = (str(template_path), st.st_mtime_ns, st.st_size)
+    index = _TEMPLATE_INDEXES.get(key)
+    if index is None:
+        index = _compile_template(template_path.read_bytes())
+        for stale in [k for k in _TEMPLATE_INDEXES if k[0] == key[0]]:
+            del _TEMPLATE_INDEXES[stale]
+        _TEMPLATE_INDEXES[key] = index
+    return index
+
+
+def _resolve_frame(slide, ref: _FrameRef):
+    shape = slide.shapes[ref.shape_idx]
+    if ref.cell is None:
+        return shape.text_frame
+    return shape.table.cell(*ref.cell).text_frame
+
+
+def _apply_substitutions(
+    prs, index: _TemplateIndex, substitutions: List[Tuple[int, str, str, str]]
+) -> Tuple[int, int]:
+    """Applique les substitutions texte via l'index compilé — même
+    résultat que ``_replace_in_slide`` pour chacune, dans l'ordre.
+
+    Retourne (remplacements appliqués, substitutions sans effet).
+    """
+    slides = list(prs.slides)
+    frames: Dict[Tuple[int, int], Any] = {}
+    # slide → cadres modifiés pendant cette génération → texte courant
+    touched: Dict[int, Dict[int, Tuple[str, ...]]] = {}
+    applied = 0
+    skipped = 0
+    for slide_idx, find, replace, dupe_strategy in substitutions:
+        if not find or find == replace:
+            skipped += 1
+            continue
+        if slide_idx >= len(slides):
+            continue
+        current = touched.setdefault(slide_idx, {})
+        hits = [fi for fi in index.candidates(slide_idx, find) if fi not in current]
+        hits.extend(
+            fi
+            for fi, haystack in current.items()
+            if any(find in text for text in haystack)
+        )
+        total = 0
+        for fi in sorted(hits):
+            tf = frames.get((slide_idx, fi))
+            if tf is None:
+                tf = _resolve_frame(slides[slide_idx], index.slides[slide_idx][fi])
+                frames[(slide_idx, fi)] = tf
+            n = _safe_replace_in_text_frame(tf, find, replace)
+            if n:
+                current[fi] = _frame_haystack(tf)
+                total += n
+                if dupe_strategy == "first":
+                    break
+        if total:
+            applied += total
+        else:
+            skipped += 1
+    return applied, skipped
+
+
 def _replace_table_cell_text(
     slide,
     table_name: str,
@@ -1939,25 +2087,13 @@ async def generate_offre_investissement_pptx(
         for att in result.scalars().all():
             resolved_photos.append(att.blob)
 
-    # Open template
-    prs = Presentation(str(template_path))
+    # Open template (index compilé une fois par version du fichier)
+    index = _template_index(template_path)
+    prs = Presentation(io.BytesIO(index.blob))
 
     # Apply text substitutions
     substitutions = _build_substitutions(rec, strat)
-    applied = 0
-    skipped = 0
-    for slide_idx, find, replace, dupe_strategy in substitutions:
-        if not find or find == replace:
-            skipped += 1
-            continue
-        if slide_idx >= len(prs.slides):
-            continue
-        slide = prs.slides[slide_idx]
-        n = _replace_in_slide(slide, find, replace, dupe_strategy)
-        if n:
-            applied += n
-        else:
-            skipped += 1
+    applied, skipped = _apply_substitutions(prs, index, substitutions)
     log.info(
         "Offre PPTX generated (%s): %s subs applied, %s skipped (analysis %s)",
         template_version,
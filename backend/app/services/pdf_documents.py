@@ -0,0 +1,316 @@
+"""Traitement des PDF sous budget mémoire (scans de baux, JLR, eSign…).
+
+Sur l'instance 512 Mo, un bail scanné de 40 pages rendu d'un bloc
+(``convert_from_bytes`` sans bornes) suffisait à faire redémarrer le
+service : chaque page décodée à 200 dpi pèse ~25 Mo en RGB. Ici :
+
+- ``PdfDocument`` : le PDF n'est jamais recopié en entier. Un upload est
+  lu par morceaux dans un fichier temporaire spoolé (mémoire jusqu'à
+  ``pdf_spool_memory_kb``, disque au-delà) en calculant son SHA-256 au
+  passage ; des ``bytes`` déjà chargés sont lus sur place ;
+- ``page_count`` / ``page_texts`` : pypdf lit le flux à la demande ;
+  résultats gardés en cache par empreinte du document (un même PDF
+  revu plusieurs fois n'est analysé qu'une fois) ;
+- ``iter_page_images`` : rendu paresseux, UNE page à la fois (poppler
+  sur le fichier, bornes ``first_page``/``last_page``), à une résolution
+  adaptée à la taille de la page pour tenir dans le budget ;
+- budget : les bitmaps vivants de tout le process ne dépassent pas
+  ``pdf_render_budget_mb`` — un rendu attend qu'un autre libère sa
+  place (rendus lancés en parallèle via ``asyncio.to_thread``).
+
+Fonctions synchrones, CPU/IO-bound : les endpoints les appellent via
+``asyncio.to_thread``.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import IO, Any, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+#: Morceau de lecture des uploads / copies vers le disque.
+CHUNK_BYTES = 1024 * 1024
+#: Résolution plancher : en dessous, l'OCR ne lit plus rien.
+MIN_DPI = 72
+
+_PAGE_COUNTS: "OrderedDict[str, int]" = OrderedDict()
+_PAGE_COUNTS_MAX = 512
+_TEXTS: "OrderedDict[str, List[str]]" = OrderedDict()
+_TEXTS_MAX = 64
+#: Au-delà, la couche texte n'est pas gardée en cache (gros rapports).
+_TEXT_CACHE_MAX_CHARS = 2_000_000
+_cache_lock = threading.Lock()
+
+
+class PdfDocument:
+    """Un PDF en lecture, adossé à un flux (jamais recopié en entier).
+
+    S'utilise en gestionnaire de contexte : ``close()`` supprime le
+    fichier temporaire éventuel.
+    """
+
+    def __init__(self, stream: IO[bytes], sha256: str, size: int) -> None:
+        self._stream = stream
+        self.sha256 = sha256
+        self.size = size
+        self._path: Optional[str] = None
+        self._reader = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PdfDocument":
+        # BytesIO partage le buffer des bytes (pas de copie).
+        return cls(
+            io.BytesIO(data), hashlib.sha256(data).hexdigest(), len(data)
+        )
+
+    @classmethod
+    async def from_upload(
+        cls, upload, *, max_bytes: Optional[int] = None
+    ) -> "PdfDocument":
+        """Spoole un ``UploadFile`` par morceaux. ``ValueError`` si le
+        fichier dépasse ``max_bytes``."""
+        spool = tempfile.SpooledTemporaryFile(
+            max_size=settings.pdf_spool_memory_kb * 1024
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            while True:
+                chunk = await upload.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError("PDF trop volumineux.")
+                digest.update(chunk)
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+        spool.seek(0)
+        return cls(spool, digest.hexdigest(), size)
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._reader = None
+        self._stream.close()
+        if self._path is not None:
+            with contextlib.suppress(OSError):
+                os.unlink(self._path)
+            self._path = None
+
+    def reader(self):
+        """``PdfReader`` sur le flux (lecture des objets à la demande)."""
+        if self._reader is None:
+            from pypdf import PdfReader
+
+            self._stream.seek(0)
+            self._reader = PdfReader(self._stream)
+        return self._reader
+
+    def path(self) -> str:
+        """Chemin disque du PDF (poppler lit un fichier). Copié par
+        morceaux au premier appel, supprimé par ``close()``."""
+        if self._path is None:
+            fd, path = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, "wb") as out:
+                self._stream.seek(0)
+                shutil.copyfileobj(self._stream, out, CHUNK_BYTES)
+            self._path = path
+        return self._path
+
+
+def _as_document(source) -> Tuple[PdfDocument, bool]:
+    """(document, à fermer par l'appelant ?)"""
+    if isinstance(source, PdfDocument):
+        return source, False
+    return PdfDocument.from_bytes(bytes(source)), True
+
+
+def _cache_get(cache: OrderedDict, key: str):
+    with _cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key: str, value, limit: int) -> None:
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+
+def page_count(source) -> int:
+    """Nombre de pages (``PdfDocument`` ou ``bytes``), en cache par
+    empreinte."""
+    doc, owned = _as_document(source)
+    try:
+        cached = _cache_get(_PAGE_COUNTS, doc.sha256)
+        if cached is not None:
+            return cached
+        n = len(doc.reader().pages)
+        _cache_put(_PAGE_COUNTS, doc.sha256, n, _PAGE_COUNTS_MAX)
+        return n
+    finally:
+        if owned:
+            doc.close()
+
+
+def page_texts(source) -> List[str]:
+    """Couche texte de chaque page (chaîne vide pour une page scannée),
+    en cache par empreinte. Une page illisible ne fait pas échouer les
+    autres."""
+    doc, owned = _as_document(source)
+    try:
+        cached = _cache_get(_TEXTS, doc.sha256)
+        if cached is not None:
+            return list(cached)
+        texts: List[str] = []
+        for page in doc.reader().pages:
+            try:
+                texts.append(page.extract_text() or "")
+            except Exception:  # noqa: BLE001
+                texts.append("")
+        _cache_put(_PAGE_COUNTS, doc.sha256, len(texts), _PAGE_COUNTS_MAX)
+        if sum(len(t) for t in texts) <= _TEXT_CACHE_MAX_CHARS:
+            _cache_put(_TEXTS, doc.sha256, texts, _TEXTS_MAX)
+        return list(texts)
+    finally:
+        if owned:
+            doc.close()
+
+
+class _RenderBudget:
+    """Octets de bitmaps décodés vivants, pour tout le process."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self.in_use = 0
+
+    @property
+    def limit(self) -> int:
+        return max(settings.pdf_render_budget_mb, 1) * 1024 * 1024
+
+    @contextlib.contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        # Une page plus grosse que le budget passe seule.
+        nbytes = min(nbytes, self.limit)
+        with self._cond:
+            while self.in_use and self.in_use + nbytes > self.limit:
+                self._cond.wait()
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= nbytes
+                self._cond.notify_all()
+
+
+_budget = _RenderBudget()
+
+
+def _page_inches(doc: PdfDocument, page_number: int) -> Tuple[float, float]:
+    box = doc.reader().pages[page_number - 1].mediabox
+    return float(box.width) / 72.0, float(box.height) / 72.0
+
+
+def adaptive_dpi(
+    width_in: float, height_in: float, dpi: int, bytes_per_pixel: int
+) -> int:
+    """Résolution ≤ ``dpi`` dont le bitmap tient dans le budget (plancher
+    ``MIN_DPI``). Un plan 11×17 ou une page géante descend en dpi au
+    lieu de faire exploser la mémoire."""
+    area = max(width_in * height_in, 1e-6) * bytes_per_pixel
+    fit = int((_budget.limit / area) ** 0.5)
+    return max(MIN_DPI, min(dpi, fit))
+
+
+def iter_page_images(
+    source,
+    *,
+    dpi: int = 150,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    grayscale: bool = False,
+) -> Iterator[Tuple[int, Any]]:
+    """Rend les pages UNE par UNE : ``(numéro, PIL.Image)``.
+
+    L'image n'est valide que jusqu'au tour suivant (elle est fermée et
+    sa place rendue au budget dès que l'appelant avance). ``grayscale``
+    divise la mémoire par 3 — suffisant pour l'OCR.
+    """
+    from pdf2image import convert_from_path
+
+    doc, owned = _as_document(source)
+    try:
+        total = page_count(doc)
+        last = min(last_page or total, total)
+        bpp = 1 if grayscale else 3
+        for n in range(max(first_page, 1), last + 1):
+            w_in, h_in = _page_inches(doc, n)
+            page_dpi = adaptive_dpi(w_in, h_in, dpi, bpp)
+            if page_dpi < dpi:
+                log.info(
+                    "PDF %s page %d : %d dpi au lieu de %d (budget mémoire)",
+                    doc.sha256[:12], n, page_dpi, dpi,
+                )
+            estimate = int(w_in * h_in * page_dpi * page_dpi * bpp)
+            with _budget.reserve(estimate):
+                images = convert_from_path(
+                    doc.path(),
+                    dpi=page_dpi,
+                    first_page=n,
+                    last_page=n,
+                    grayscale=grayscale,
+                    thread_count=1,
+                )
+                if not images:
+                    raise ValueError(f"Page {n} introuvable dans le PDF.")
+                img = images[0]
+                try:
+                    yield n, img
+                finally:
+                    img.close()
+    finally:
+        if owned:
+            doc.close()
+
+
+def render_page_png(source, page_number: int, dpi: int = 130) -> bytes:
+    """Une page (1-based) en PNG, sous budget mémoire."""
+    doc, owned = _as_document(source)
+    try:
+        if page_number < 1 or page_number > page_count(doc):
+            raise ValueError(f"Page {page_number} introuvable dans le PDF.")
+        pages = iter_page_images(
+            doc, dpi=dpi, first_page=page_number, last_page=page_number
+        )
+        with contextlib.closing(pages):
+            for _, img in pages:
+                buf = io.BytesIO()
+                img.save(buf, format="PNG")
+                return buf.getvalue()
+        raise ValueError(f"Page {page_number} introuvable dans le PDF.")
+    finally:
+        if owned:
+            doc.close()
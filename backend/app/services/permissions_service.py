@@ -7,6 +7,8 @@
   compte courant n'a pas le rôle minimum). Remplace les gardes en dur
   (RequireManager, etc.) sur les endpoints rendus configurables.
 - ``invalidate_permissions_cache()`` : à appeler après une écriture (PUT).
+  Les commits touchant ``role_permissions`` l'appellent aussi sur TOUS les
+  workers via ``access_snapshot`` (LISTEN/NOTIFY).
 
 Le cache est un simple dict module-level + horodatage monotone : la grille
 change rarement, on évite un SELECT par requête sans complexité de plus.
@@ -46,6 +48,16 @@ def invalidate_permissions_cache() -> None:
     _cache_loaded_at = 0.0
 
 
+async def role_thresholds() -> dict[str, str]:
+    """Seuils configurés en DB (``capability → min_role``), via le cache.
+
+    Le dict renvoyé est une copie : l'appelant peut le figer tel quel
+    (cf. ``access_snapshot``)."""
+    if time.monotonic() - _cache_loaded_at > _CACHE_TTL_SECONDS:
+        await _load_cache()
+    return dict(_cache)
+
+
 async def get_min_role(capability: str) -> str:
     """Rôle minimum requis pour ``capability`` (DB si dispo, sinon défaut).
 
@@ -57,6 +69,12 @@ async def get_min_role(capability: str) -> str:
     stored = _cache.get(capability)
     if stored:
         return stored
+    return default_min_role(capability)
+
+
+def default_min_role(capability: str) -> str:
+    """Seuil par défaut du registre (capacité ou page), ``owner`` si
+    la clé est inconnue."""
     cap = CAPABILITIES_BY_ID.get(capability)
     if cap:
         return cap.default_min_role
@@ -72,9 +90,14 @@ async def user_has_capability(db, user: User, capability: str) -> bool:
     """L'utilisateur a-t-il la capacité ? — mêmes règles que
     ``compute_access`` (permissions v2, 2026-07-24) : exception
     individuelle d'abord (allow force l'accès, deny le retire — owner
-    jamais bloqué), sinon rôle ≥ seuil configuré."""
+    jamais bloqué), sinon rôle ≥ seuil configuré. Sans requête si
+    l'instantané d'accès de l'utilisateur est à jour."""
     from app.models.user_access_override import UserAccessOverride
+    from app.services.access_snapshot import current_snapshot
 
+    snap = current_snapshot(user)
+    if snap is not None:
+        return snap.has_capability(capability)
     row = (
         await db.execute(
             select(UserAccessOverride).where(
@@ -162,7 +162,88 @@ async def run_migration(
     recréer de doublon au re-run. Les erreurs sont collectées par dossier
     sans tout interrompre.
     """
-    from app.integrations.quickbooks import QuickBooksError, get_qbo
+    from app.integrations.quickbooks import get_qbo, memoized_reads
+
+    qbo = get_qbo()
+    await qbo._load_refresh_from_db()
+    if not qbo.ready:
+        return {"error": "QuickBooks non connecté (OAuth)."}
+    # Lectures identiques (items, classes, clients QB) servies une fois.
+    with memoized_reads():
+        return await _run_migration(qbo, db, client_id=client_id)
+
+
+async def _flush_invoice_creates(
+    qbo, db: AsyncSession, pending: list, res: dict
+) -> None:
+    """Factures en attente de la migration : lien par DocNumber en une
+    requête, puis création des autres par ``/batch`` (30 par appel),
+    puis paiements. Un refus dans le lot n'échoue que sa facture."""
+    from app.integrations.quickbooks import batch_fault_message
+    from app.services.facture_qbo import sync_facture_payments_to_qbo
+
+    if not pending:
+        return
+    todo = list(pending)
+    pending.clear()
+    try:
+        found = await qbo.find_invoices_by_docnumbers(
+            [f.reference for f, _ref, _p, _d in todo if f.reference]
+        )
+    except Exception:  # noqa: BLE001
+        found = {}
+    creates = []
+    for f, ref, payload, detail in todo:
+        ex_inv = found.get((f.reference or "").strip())
+        if ex_inv and ex_inv.get("Id"):
+            f.qbo_invoice_id = str(ex_inv.get("Id"))
+            f.qbo_sync_token = str(ex_inv.get("SyncToken") or "") or None
+            f.qbo_doc_number = str(ex_inv.get("DocNumber") or "") or None
+            res["factures"]["already_linked"] += 1
+            creates.append((f, ref, detail, None))
+        else:
+            creates.append((f, ref, detail, payload))
+    ops = [
+        {"operation": "create", "entity": "Invoice", "payload": payload}
+        for _f, _ref, _d, payload in creates
+        if payload is not None
+    ]
+    try:
+        responses = iter(await qbo.batch(ops) if ops else [])
+    except Exception as exc:  # noqa: BLE001
+        for f, _ref, detail, payload in creates:
+            if payload is not None:
+                res["factures"]["errors"] += 1
+                detail["errors"].append(f"facture {f.id}: {exc}")
+        creates = [c for c in creates if c[3] is None]
+        responses = iter([])
+    for f, ref, detail, payload in creates:
+        try:
+            if payload is not None:
+                resp = next(responses)
+                fault = batch_fault_message(resp)
+                if fault is not None:
+                    raise RuntimeError(fault)
+                inv = resp.get("Invoice") or resp
+                f.qbo_invoice_id = str(inv.get("Id") or "") or None
+                f.qbo_sync_token = str(inv.get("SyncToken") or "") or None
+                f.qbo_doc_number = str(inv.get("DocNumber") or "") or None
+                res["factures"]["pushed"] += 1
+            await db.flush()
+            # Chaque virement Kratos → un Payment QBO distinct.
+            pushed = await sync_facture_payments_to_qbo(
+                qbo, db, f, ref, f.qbo_invoice_id or ""
+            )
+            res["payments"]["applied"] += len(pushed)
+        except Exception as exc:  # noqa: BLE001
+            res["factures"]["errors"] += 1
+            detail["errors"].append(f"facture {f.id}: {exc}")
+
+
+async def _run_migration(
+    qbo, db: AsyncSession, *, client_id: Optional[int] = None
+) -> dict:
+    from app.integrations.quickbooks import BATCH_MAX_ITEMS, QuickBooksError
     from app.services.facture_qbo import (
         _build_invoice_payload,
         _build_lines,
@@ -170,11 +251,6 @@ async def run_migration(
         sync_facture_payments_to_qbo,
     )
 
-    qbo = get_qbo()
-    await qbo._load_refresh_from_db()
-    if not qbo.ready:
-        return {"error": "QuickBooks non connecté (OAuth)."}
-
     cstmt = select(Client)
     if client_id is not None:
         cstmt = cstmt.where(Client.id == client_id)
@@ -195,6 +271,8 @@ async def run_migration(
         "achats": {"pushed": 0, "errors": 0},
         "details": [],
     }
+    # Factures à lier/créer, poussées par lots (``_flush_invoice_creates``).
+    pending: list = []
 
     for c in clients:
         detail: dict = {"client_id": c.id, "name": c.name, "errors": []}
@@ -291,31 +369,10 @@ async def run_migration(
                     )
                     res["payments"]["applied"] += len(pushed)
                     continue
-                # Lien perdu (reset) mais la facture existe peut-être déjà
-                # dans QB sous ce numéro → on s'y RELIE au lieu de la
-                # recréer (sinon erreur 6140 « numéro en double »).
-                if f.reference:
-                    try:
-                        ex_inv = await qbo.find_invoice_by_docnumber(
-                            f.reference
-                        )
-                    except Exception:  # noqa: BLE001
-                        ex_inv = None
-                    if ex_inv and ex_inv.get("Id"):
-                        f.qbo_invoice_id = str(ex_inv.get("Id"))
-                        f.qbo_sync_token = (
-                            str(ex_inv.get("SyncToken") or "") or None
-                        )
-                        f.qbo_doc_number = (
-                            str(ex_inv.get("DocNumber") or "") or None
-                        )
-                        await db.flush()
-                        res["factures"]["already_linked"] += 1
-                        pushed = await sync_facture_payments_to_qbo(
-                            qbo, db, f, ref, f.qbo_invoice_id
-                        )
-                        res["payments"]["applied"] += len(pushed)
-                        continue
+                # Lien perdu (reset) ou jamais poussée : mise en attente.
+                # Le lien par numéro (la facture existe peut-être déjà dans
+                # QB → on s'y RELIE, sinon erreur 6140 « numéro en double »)
+                # et la création partent GROUPÉS par 30 (``/batch``).
                 items = await _load_items(db, f.id)
                 lines = await _build_lines(
                     qbo, items, fallback_name=f.reference
@@ -327,21 +384,12 @@ async def run_migration(
                     existing_invoice_id=None,
                     existing_sync_token=None,
                 )
-                invoice = await qbo.create_invoice(payload)
-                inv = invoice.get("Invoice") or invoice
-                f.qbo_invoice_id = str(inv.get("Id") or "") or None
-                f.qbo_sync_token = str(inv.get("SyncToken") or "") or None
-                f.qbo_doc_number = str(inv.get("DocNumber") or "") or None
-                await db.flush()
-                res["factures"]["pushed"] += 1
-                # Chaque virement Kratos → un Payment QBO distinct.
-                pushed = await sync_facture_payments_to_qbo(
-                    qbo, db, f, ref, str(inv.get("Id") or "")
-                )
-                res["payments"]["applied"] += len(pushed)
+                pending.append((f, ref, payload, detail))
             except Exception as exc:  # noqa: BLE001
                 res["factures"]["errors"] += 1
                 detail["errors"].append(f"facture {f.id}: {exc}")
+        if len(pending) >= BATCH_MAX_ITEMS:
+            await _flush_invoice_creates(qbo, db, pending, res)
 
         # 4) Achats (coûts) des projets du client → Bills/Purchases QB
         # rattachés au SOUS-CLIENT du projet (pour qu'ils apparaissent dans
@@ -388,6 +436,11 @@ async def run_migration(
         except Exception:  # noqa: BLE001
             await db.rollback()
 
+    await _flush_invoice_creates(qbo, db, pending, res)
+    try:
+        await db.commit()
+    except Exception:  # noqa: BLE001
+        await db.rollback()
     return res
 
 
@@ -0,0 +1,184 @@
+"""Travaux QBO mis en file (``job_queue``) depuis les endpoints.
+
+Chaque push ciblé déclenché par une action utilisateur passe par ici au
+lieu d'un ``create_task`` : la clé de dédoublonnage (objet QB visé)
+coalesce les rafales — cinq lignes modifiées sur une facture émise = UN
+push — et un échec QBO (jeton expiré, 5xx) est repris avec backoff au
+lieu d'être perdu.
+
+Les handlers appellent les fonctions QUI LÈVENT (pas les wrappers
+``*_now`` best-effort) : un résultat ``{"error": …}`` compte aussi comme
+un échec à reprendre. L'issue de chaque push est gardée par entité
+(``qbo_sync_states``) ; les pushes de factures dus ensemble partent en
+lot (``qbo_outbox``). Les filets horaires (``qbo_nets``) restent en
+place pour tout ce qui n'aurait pas convergé.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.job_queue import enqueue, job_handler
+
+
+def _raise_on_error(result: Any) -> Any:
+    if isinstance(result, dict) and result.get("error"):
+        raise RuntimeError(str(result["error"]))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Mise en file (appelée dans la transaction de la requête)
+# ---------------------------------------------------------------------------
+
+
+async def enqueue_facture_push(
+    db: AsyncSession, facture_id: int
+) -> Optional[int]:
+    return await enqueue(
+        db,
+        "qbo.push_facture",
+        {"facture_id": int(facture_id)},
+        dedup_key=f"qbo.facture:{int(facture_id)}",
+    )
+
+
+async def enqueue_billable_flip(
+    db: AsyncSession, achat_id: int, billable: bool
+) -> Optional[int]:
+    # Même clé pour les deux sens : le dernier (dé)cochage l'emporte.
+    return await enqueue(
+        db,
+        "qbo.flip_billable",
+        {"achat_id": int(achat_id), "billable": bool(billable)},
+        dedup_key=f"qbo.achat_billable:{int(achat_id)}",
+    )
+
+
+async def enqueue_bill_payment(
+    db: AsyncSession, achat_id: int
+) -> Optional[int]:
+    return await enqueue(
+        db,
+        "qbo.push_bill_payment",
+        {"achat_id": int(achat_id)},
+        dedup_key=f"qbo.bill_payment:{int(achat_id)}",
+    )
+
+
+async def enqueue_punch_time(
+    db: AsyncSession, punch_id: int
+) -> Optional[int]:
+    return await enqueue(
+        db,
+        "qbo.push_punch_time",
+        {"punch_id": int(punch_id)},
+        dedup_key=f"qbo.punch:{int(punch_id)}",
+    )
+
+
+async def enqueue_time_activity_delete(
+    db: AsyncSession, ta_id: str
+) -> Optional[int]:
+    return await enqueue(
+        db,
+        "qbo.delete_time_activity",
+        {"ta_id": ta_id},
+        dedup_key=f"qbo.time_activity_delete:{ta_id}",
+    )
+
+
+async def enqueue_bon_job(db: AsyncSession, project_id: int) -> Optional[int]:
+    return await enqueue(
+        db,
+        "qbo.push_bon_job",
+        {"project_id": int(project_id)},
+        dedup_key=f"qbo.bon_job:{int(project_id)}",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Handlers (worker)
+# ---------------------------------------------------------------------------
+
+
+@job_handler("qbo.push_facture", queue="qbo", batch_size=30)
+async def _push_factures(payloads: list[dict]) -> list[Any]:
+    # Les pushes dus ensemble partent groupés (``/batch``, cf. qbo_outbox).
+    from app.services.qbo_outbox import push_factures
+
+    ids = [int(p["facture_id"]) for p in payloads]
+    outcomes = await push_factures(ids)
+    return [outcomes[i] for i in ids]
+
+
+async def _tracked(entity_type: str, entity_id: Any, result: Any) -> Any:
+    """Enregistre l'état de synchro de l'entité puis lève si erreur."""
+    from app.integrations.quickbooks import get_qbo
+    from app.services.qbo_outbox import record_sync_state
+
+    outcome: Any = result
+    if isinstance(result, dict) and result.get("error"):
+        outcome = RuntimeError(str(result["error"]))
+    await record_sync_state(get_qbo().realm_id, entity_type, entity_id, outcome)
+    return _raise_on_error(result)
+
+
+@job_handler("qbo.flip_billable", queue="qbo")
+async def _flip_billable(payload: dict) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.achat_qbo import set_qbo_billable_status
+
+    async with AsyncSessionLocal() as db:
+        result = await set_qbo_billable_status(
+            db, int(payload["achat_id"]), bool(payload["billable"])
+        )
+        await db.commit()
+    return await _tracked("achat_billable", payload["achat_id"], result)
+
+
+@job_handler("qbo.push_bill_payment", queue="qbo")
+async def _push_bill_payment(payload: dict) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.achat_qbo import push_bill_payment_to_qbo
+
+    async with AsyncSessionLocal() as db:
+        result = await push_bill_payment_to_qbo(db, int(payload["achat_id"]))
+        await db.commit()
+    return await _tracked("bill_payment", payload["achat_id"], result)
+
+
+@job_handler("qbo.push_punch_time", queue="qbo")
+async def _push_punch_time(payload: dict) -> Any:
+    from app.db.session import AsyncSessionLocal
+    from app.services.labour_time_qbo import push_punch_time_to_qbo
+
+    async with AsyncSessionLocal() as db:
+        result = await push_punch_time_to_qbo(db, int(payload["punch_id"]))
+        await db.commit()
+    return await _tracked("punch", payload["punch_id"], result)
+
+
+@job_handler("qbo.delete_time_activity", queue="qbo")
+async def _delete_time_activity(payload: dict) -> Any:
+    from app.integrations.quickbooks import get_qbo
+
+    ta_id = str(payload["ta_id"])
+    qbo = get_qbo()
+    await qbo._load_refresh_from_db()
+    if not qbo.ready:
+        return {"skipped": "qbo_not_configured"}
+    if not await qbo.delete_time_activity(ta_id):
+        raise RuntimeError(f"TimeActivity QB {ta_id} : suppression échouée")
+    return {"ok": True, "removed": ta_id}
+
+
+@job_handler("qbo.push_bon_job", queue="qbo", max_attempts=3)
+async def _push_bon_job(payload: dict) -> None:
+    # Best-effort par nature : la 1ʳᵉ facture / le 1ᵉʳ coût du projet
+    # crée de toute façon le sous-client via le même résolveur.
+    from app.services.bon_project import push_bon_qbo_job_now
+
+    await push_bon_qbo_job_now(int(payload["project_id"]))
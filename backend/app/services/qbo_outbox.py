@@ -0,0 +1,126 @@
+"""Outbox QBO : écritures coalescées, groupées et suivies par entité.
+
+La file ``job_queue`` coalesce déjà les rafales (clé de dédoublonnage =
+objet QB visé : UN push en attente par facture). Ce module ajoute :
+
+- ``push_factures`` : les pushes de factures dus ensemble partent en UNE
+  passe (``sync_factures_to_qbo_batch``) — lectures mémoïsées, lien par
+  DocNumber en une requête, Invoice écrites par ``/batch`` (30 par
+  appel). Une migration de centaines de factures = quelques dizaines
+  d'appels au lieu de plusieurs centaines ;
+- ``record_sync_states`` : l'issue de chaque push est conservée par
+  (realm, type, id) dans ``qbo_sync_states``.
+
+Le débit vers QB est borné dans le client (``_TokenBucket`` par realm,
+``app.integrations.quickbooks``) : tous les chemins en profitent.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.qbo_sync_state import QboSyncState
+
+log = logging.getLogger(__name__)
+
+
+def _qbo_id_of(outcome: Any) -> Optional[str]:
+    if not isinstance(outcome, dict):
+        return None
+    for key in ("qbo_invoice_id", "qbo_id", "qbo_bill_payment_id", "Id"):
+        if outcome.get(key):
+            return str(outcome[key])[:64]
+    return None
+
+
+async def record_sync_states(
+    db: AsyncSession,
+    realm_id: Optional[str],
+    entity_type: str,
+    outcomes: Mapping[Any, Any],
+) -> None:
+    """Upsert de l'état de synchro de chaque entité (``{id: issue}`` —
+    une exception = ``error``). L'appelant commite."""
+    if not outcomes:
+        return
+    realm = realm_id or ""
+    ids = [str(i) for i in outcomes]
+    existing = {
+        s.entity_id: s
+        for s in (
+            await db.execute(
+                select(QboSyncState).where(
+                    QboSyncState.realm_id == realm,
+                    QboSyncState.entity_type == entity_type,
+                    QboSyncState.entity_id.in_(ids),
+                )
+            )
+        ).scalars().all()
+    }
+    now = datetime.now(timezone.utc)
+    for entity_id, outcome in outcomes.items():
+        state = existing.get(str(entity_id))
+        if state is None:
+            state = QboSyncState(
+                realm_id=realm, entity_type=entity_type, entity_id=str(entity_id)
+            )
+            db.add(state)
+        if isinstance(outcome, BaseException):
+            state.status = "error"
+            state.last_error = f"{type(outcome).__name__}: {outcome}"[:2000]
+            continue
+        if isinstance(outcome, dict) and outcome.get("skipped"):
+            state.status = "skipped"
+        else:
+            state.status = "ok"
+            state.synced_at = now
+        state.qbo_id = _qbo_id_of(outcome) or state.qbo_id
+        state.last_error = (
+            (outcome.get("sync_warning") if isinstance(outcome, dict) else None)
+            or None
+        )
+
+
+async def record_sync_state(
+    realm_id: Optional[str], entity_type: str, entity_id: Any, outcome: Any
+) -> None:
+    """Variante unitaire, session FRAÎCHE, best-effort (handlers)."""
+    try:
+        from app.db.session import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            await record_sync_states(
+                db, realm_id, entity_type, {entity_id: outcome}
+            )
+            await db.commit()
+    except Exception:  # noqa: BLE001
+        log.warning(
+            "record_sync_state %s %s: échec", entity_type, entity_id,
+            exc_info=True,
+        )
+
+
+async def push_factures(facture_ids: list[int]) -> dict[int, Any]:
+    """Pousse plusieurs factures en une passe groupée et enregistre
+    l'état de chacune. Retourne ``{facture_id: résultat | exception}``."""
+    from app.db.session import AsyncSessionLocal
+    from app.integrations.quickbooks import get_qbo
+    from app.services.facture_qbo import (
+        record_facture_sync_error,
+        sync_factures_to_qbo_batch,
+    )
+
+    async with AsyncSessionLocal() as db:
+        outcomes = await sync_factures_to_qbo_batch(db, facture_ids)
+        await record_sync_states(db, get_qbo().realm_id, "facture", outcomes)
+        await db.commit()
+    for fid, outcome in outcomes.items():
+        if isinstance(outcome, BaseException):
+            # Rend l'échec VISIBLE sur la fiche facture (comme push_facture_now).
+            await record_facture_sync_error(fid, str(outcome))
+    return outcomes
@@ -6,7 +6,9 @@ demande à l'IA un résumé synthétique pour le dirigeant. Sauvegardé
 dans ``qg_summaries`` (type=daily_briefing) — historique conservé.
 
 Idempotent : un briefing par entreprise par jour. Re-déclencher écrase
-seulement si ``force=True``.
+seulement si ``force=True``. Quand l'état de l'entreprise n'a pas bougé
+depuis le dernier briefing (même ``input_hash``), le briefing du jour
+le recopie sans appel IA ; le cron fait les autres appels en parallèle.
 """
 
 from __future__ import annotations
@@ -14,8 +16,9 @@ from __future__ import annotations
 import json
 import logging
 import time
+from dataclasses import dataclass
 from datetime import date, datetime, time as dtime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Union
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -23,7 +26,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.integrations.ai import (
     AIProviderError,
     AIProviderUnavailable,
+    CompletionResult,
     complete,
+    current_provider,
 )
 from app.models.entreprise import Entreprise
 from app.models.entreprise_tache import EntrepriseTache, TacheStatus
@@ -33,6 +38,7 @@ from app.models.qg_strategic import (
     SummaryScope,
     SummaryType,
 )
+from app.services.ai_briefings import fan_out, state_hash
 
 
 log = logging.getLogger(__name__)
@@ -263,28 +269,43 @@ def _salvage_partial_json(raw: str) -> Optional[dict]:
     }
 
 
-async def generate_for_entreprise(
-    db: AsyncSession,
-    entreprise_id: int,
-    *,
-    force: bool = False,
-) -> Optional[Summary]:
-    """Génère (ou retourne) le daily briefing pour une entreprise.
+@dataclass
+class _PulseJob:
+    """Briefing à générer par l'IA (état rassemblé, empreinte)."""
 
-    - Si un briefing existe déjà aujourd'hui et ``force=False`` → retourne
-      celui-là sans nouvel appel IA.
-    - Si ``force=True`` → écrase le briefing existant du jour.
-    - Si l'IA est indisponible → retourne None silencieusement.
-    """
-    today = datetime.now(timezone.utc).date()
+    entreprise: Entreprise
+    prompt: str
+    input_hash: str
+    existing: Optional[Summary]
+    today_start: datetime
 
-    ent = (
+
+async def _latest_briefing(
+    db: AsyncSession, entreprise_id: int, before: datetime
+) -> Optional[Summary]:
+    return (
         await db.execute(
-            select(Entreprise).where(Entreprise.id == entreprise_id)
+            select(Summary)
+            .where(
+                Summary.entreprise_id == entreprise_id,
+                Summary.type == SummaryType.DAILY_BRIEFING.value,
+                Summary.period_start < before,
+            )
+            .order_by(Summary.period_start.desc())
+            .limit(1)
         )
     ).scalar_one_or_none()
-    if ent is None or not ent.is_active:
-        return None
+
+
+async def _prepare(
+    db: AsyncSession, ent: Entreprise, *, force: bool
+) -> Union[Summary, _PulseJob]:
+    """Rassemble l'état de l'entreprise. Retourne le briefing du jour
+    quand aucun appel IA n'est nécessaire (déjà généré, ou état
+    inchangé depuis le dernier briefing → recopié), sinon le travail
+    à confier à l'IA."""
+    entreprise_id = ent.id
+    today = datetime.now(timezone.utc).date()
 
     existing = await _today_briefing(db, entreprise_id, today)
     if existing is not None and not force:
@@ -366,8 +387,6 @@ async def generate_for_entreprise(
         )
     ).scalars().all()
 
-    yest_brief = await _today_briefing(db, entreprise_id, yesterday)
-
     # Contexte stratégique : visions actives + projets stratégiques en
     # cours. Permet à l'IA de toujours avoir matière à analyser même
     # quand l'activité quotidienne est faible.
@@ -391,6 +410,44 @@ async def generate_for_entreprise(
         )
     ).scalars().all()
 
+    # Le briefing d'hier n'entre pas dans l'empreinte : il n'est que
+    # du contexte, et il change tous les jours.
+    input_hash = state_hash(
+        PROMPT_VERSION,
+        ent.name,
+        ent.description,
+        is_parent,
+        list(todo),
+        list(in_prog),
+        list(done_yest),
+        list(acts),
+        list(visions),
+        list(strategic_projects),
+    )
+    if not force:
+        last = await _latest_briefing(db, entreprise_id, today_start)
+        if last is not None and last.input_hash == input_hash:
+            # Rien n'a bougé : le briefing du jour reprend le dernier.
+            s = Summary(
+                entreprise_id=entreprise_id,
+                type=SummaryType.DAILY_BRIEFING.value,
+                scope=SummaryScope.COMPANY.value,
+                period_start=today_start,
+                period_end=today_start + timedelta(days=1),
+                headline=last.headline,
+                summary_text=last.summary_text,
+                highlights_json=last.highlights_json,
+                model_used=last.model_used,
+                provider=last.provider,
+                prompt_version=last.prompt_version,
+                input_hash=input_hash,
+                created_at=datetime.now(timezone.utc),
+            )
+            db.add(s)
+            await db.flush()
+            return s
+
+    yest_brief = await _today_briefing(db, entreprise_id, yesterday)
     prompt = _build_prompt(
         entreprise=ent,
         todo_taches=list(todo),
@@ -414,35 +471,42 @@ async def generate_for_entreprise(
             "regard de dirigeant qui supervise tout le groupe — pas "
             "seulement une entité.\n\n"
         ) + prompt
+    return _PulseJob(
+        entreprise=ent,
+        prompt=prompt,
+        input_hash=input_hash,
+        existing=existing,
+        today_start=today_start,
+    )
+
 
+async def _complete(job: _PulseJob) -> tuple[CompletionResult, int]:
+    """Appel IA (sans session DB : exécutable en parallèle)."""
     t0 = time.perf_counter()
-    try:
-        res = await complete(
-            prompt=prompt,
-            system=SYSTEM_PROMPT,
-            # Marge confortable + thinking désactivé : évite que la
-            # sortie JSON de gemini-2.5-flash soit tronquée (parse
-            # échoué → JSON brut affiché).
-            max_tokens=2048,
-            temperature=0.4,
-            thinking_budget=0,
-        )
-    except (AIProviderUnavailable, AIProviderError) as exc:
-        log.warning(
-            "Daily pulse AI failed for entreprise %d: %s",
-            entreprise_id,
-            exc,
-        )
-        return None
+    res = await complete(
+        prompt=job.prompt,
+        system=SYSTEM_PROMPT,
+        # Marge confortable + thinking désactivé : évite que la
+        # sortie JSON de gemini-2.5-flash soit tronquée (parse
+        # échoué → JSON brut affiché).
+        max_tokens=2048,
+        temperature=0.4,
+        thinking_budget=0,
+    )
+    return res, int((time.perf_counter() - t0) * 1000)
 
-    duration_ms = int((time.perf_counter() - t0) * 1000)
 
+async def _persist(
+    db: AsyncSession, job: _PulseJob, res: CompletionResult, duration_ms: int
+) -> Summary:
+    ent = job.entreprise
+    input_hash: Optional[str] = job.input_hash
     try:
         parsed = _parse_ai_json(res.text)
     except Exception as exc:  # noqa: BLE001
         log.warning(
             "Daily pulse JSON parse failed for entreprise %d: %s — raw: %s",
-            entreprise_id,
+            ent.id,
             exc,
             res.text[:200],
         )
@@ -453,6 +517,8 @@ async def generate_for_entreprise(
             "avec « Regénérer »)",
             "highlights": [],
         }
+        # Briefing dégradé : pas d'empreinte, demain on réessaie.
+        input_hash = None
 
     headline = str(parsed.get("headline") or "").strip()[:500]
     summary_text = str(parsed.get("summary") or "").strip()
@@ -461,10 +527,11 @@ async def generate_for_entreprise(
         highlights = [str(highlights)]
     highlights = [str(h)[:300] for h in highlights[:8]]
 
-    period_start = today_start
-    period_end = today_start + timedelta(days=1)
+    period_start = job.today_start
+    period_end = job.today_start + timedelta(days=1)
 
-    if existing is not None and force:
+    existing = job.existing
+    if existing is not None:
         existing.headline = headline or existing.headline
         existing.summary_text = summary_text or existing.summary_text
         existing.highlights_json = json.dumps(highlights, ensure_ascii=False)
@@ -474,11 +541,12 @@ async def generate_for_entreprise(
         existing.output_tokens = res.output_tokens
         existing.generation_duration_ms = duration_ms
         existing.prompt_version = PROMPT_VERSION
+        existing.input_hash = input_hash
         await db.flush()
         return existing
 
     s = Summary(
-        entreprise_id=entreprise_id,
+        entreprise_id=ent.id,
         type=SummaryType.DAILY_BRIEFING.value,
         scope=SummaryScope.COMPANY.value,
         period_start=period_start,
@@ -492,6 +560,7 @@ async def generate_for_entreprise(
         input_tokens=res.input_tokens,
         output_tokens=res.output_tokens,
         generation_duration_ms=duration_ms,
+        input_hash=input_hash,
         created_at=datetime.now(timezone.utc),
     )
     db.add(s)
@@ -500,27 +569,107 @@ async def generate_for_entreprise(
     return s
 
 
+async def generate_for_entreprise(
+    db: AsyncSession,
+    entreprise_id: int,
+    *,
+    force: bool = False,
+) -> Optional[Summary]:
+    """Génère (ou retourne) le daily briefing pour une entreprise.
+
+    - Si un briefing existe déjà aujourd'hui et ``force=False`` → retourne
+      celui-là sans nouvel appel IA.
+    - Si l'état de l'entreprise n'a pas changé depuis le dernier
+      briefing et ``force=False`` → le recopie pour aujourd'hui, sans
+      appel IA.
+    - Si ``force=True`` → écrase le briefing existant du jour.
+    - Si l'IA est indisponible → retourne None silencieusement.
+    """
+    ent = (
+        await db.execute(
+            select(Entreprise).where(Entreprise.id == entreprise_id)
+        )
+    ).scalar_one_or_none()
+    if ent is None or not ent.is_active:
+        return None
+
+    job = await _prepare(db, ent, force=force)
+    if isinstance(job, Summary):
+        return job
+    try:
+        res, duration_ms = await _complete(job)
+    except (AIProviderUnavailable, AIProviderError) as exc:
+        log.warning(
+            "Daily pulse AI failed for entreprise %d: %s",
+            entreprise_id,
+            exc,
+        )
+        return None
+    return await _persist(db, job, res, duration_ms)
+
+
 async def generate_for_all_active(
     db: AsyncSession, *, force: bool = False
 ) -> dict:
     """Génère le briefing pour toutes les entreprises actives.
-    Appelé par le cron quotidien Render."""
+    Appelé par le cron quotidien Render.
+
+    Trois temps : état + empreinte de chaque entreprise (session
+    partagée), appels IA des seules entreprises qui ont bougé (en
+    parallèle, bornés par fournisseur), puis enregistrement."""
     rows = (
         await db.execute(
             select(Entreprise).where(Entreprise.is_active.is_(True))
         )
     ).scalars().all()
-    out = {"total": len(rows), "generated": 0, "skipped": 0, "errors": 0}
+    out = {
+        "total": len(rows),
+        "generated": 0,
+        "reused": 0,
+        "skipped": 0,
+        "errors": 0,
+    }
+    jobs: list[_PulseJob] = []
     for e in rows:
         try:
-            s = await generate_for_entreprise(db, e.id, force=force)
-            if s is None:
-                out["skipped"] += 1
-            else:
-                out["generated"] += 1
+            prepared = await _prepare(db, e, force=force)
         except Exception as exc:  # noqa: BLE001
             log.exception(
                 "Daily pulse error for entreprise %d: %s", e.id, exc
             )
             out["errors"] += 1
+            continue
+        if isinstance(prepared, Summary):
+            out["reused"] += 1
+        else:
+            jobs.append(prepared)
+
+    results = await fan_out(jobs, _complete, provider=current_provider())
+    for job, result in zip(jobs, results):
+        if isinstance(result, (AIProviderUnavailable, AIProviderError)):
+            log.warning(
+                "Daily pulse AI failed for entreprise %d: %s",
+                job.entreprise.id,
+                result,
+            )
+            out["skipped"] += 1
+            continue
+        if isinstance(result, BaseException):
+            log.error(
+                "Daily pulse error for entreprise %d: %s",
+                job.entreprise.id,
+                result,
+            )
+            out["errors"] += 1
+            continue
+        try:
+            await _persist(db, job, *result)
+            out["generated"] += 1
+        except Exception as exc:  # noqa: BLE001
+            log.exception(
+                "Daily pulse error for entreprise %d: %s",
+                job.entreprise.id,
+                exc,
+            )
+            out["errors"] += 1
     return out
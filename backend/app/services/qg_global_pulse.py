@@ -3,8 +3,11 @@ agrégée Tâches (sous Navigation > Gestion d'entreprise).
 
 Différent du daily-pulse par-entreprise : un seul briefing pour
 l'ensemble des entreprises actives + des deals Pipeline ouverts.
-Pas de persistance ; cache en mémoire pour une journée (regénération
-explicite via ?force=true).
+Persisté dans ``qg_global_summaries`` (une ligne par périmètre) : un
+briefing par jour, partagé entre workers et conservé au redémarrage.
+Si l'état rassemblé n'a pas changé depuis la dernière génération (même
+``input_hash``), le briefing est reconduit sans appel IA. Regénération
+explicite via ?force=true.
 """
 
 from __future__ import annotations
@@ -17,6 +20,8 @@ from datetime import date, datetime, time as dtime, timedelta, timezone
 from typing import List, Optional
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.integrations.ai import (
@@ -32,6 +37,8 @@ from app.models.prospection_deal_task import ProspectionDealTask
 from app.models.prospection_deal_task_assignee import (
     ProspectionDealTaskAssignee,
 )
+from app.models.qg_strategic import GlobalSummary
+from app.services.ai_briefings import state_hash
 
 log = logging.getLogger(__name__)
 
@@ -64,9 +71,55 @@ class GlobalBriefing:
     created_at: datetime
 
 
-# Cache en mémoire. Clé = date_iso (briefing global) ou
-# `date_iso:user:{id}` (briefing scopé à un user). Recyclé au boot.
-_CACHE: dict[str, GlobalBriefing] = {}
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite rend des datetimes naïfs.
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _from_row(row: GlobalSummary) -> GlobalBriefing:
+    try:
+        highlights = json.loads(row.highlights_json or "[]")
+    except ValueError:
+        highlights = []
+    return GlobalBriefing(
+        period_start=row.period_start,
+        period_end=row.period_end,
+        headline=row.headline,
+        summary_text=row.summary_text,
+        highlights=[str(h) for h in highlights],
+        model_used=row.model_used,
+        provider=row.provider,
+        created_at=row.created_at,
+    )
+
+
+async def _load(db: AsyncSession, scope_key: str) -> Optional[GlobalSummary]:
+    return (
+        await db.execute(
+            select(GlobalSummary).where(GlobalSummary.scope_key == scope_key)
+        )
+    ).scalar_one_or_none()
+
+
+async def _store(db: AsyncSession, scope_key: str, **values) -> GlobalSummary:
+    """Upsert de la ligne du périmètre (deux workers peuvent générer
+    en même temps : le dernier gagne, sans violation d'unicité)."""
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    stmt = insert(GlobalSummary).values(scope_key=scope_key, **values)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[GlobalSummary.scope_key], set_=values
+        )
+    )
+    row = (
+        await db.execute(
+            select(GlobalSummary).where(GlobalSummary.scope_key == scope_key)
+        )
+    ).scalar_one()
+    # La ligne peut déjà être dans la session (lue avant l'upsert).
+    await db.refresh(row)
+    return row
 
 
 def _format_taches(taches: list[EntrepriseTache]) -> str:
@@ -208,21 +261,24 @@ async def get_or_generate_global_pulse(
     user_id: Optional[int] = None,
 ) -> Optional[GlobalBriefing]:
     """Retourne le briefing global du jour. Génère via l'IA si
-    absent du cache ou force=True. None si IA indisponible.
+    absent (et l'état a changé depuis le dernier) ou force=True. None
+    si IA indisponible.
 
     Si `user_id` est fourni, le périmètre est filtré aux **tâches
     assignées à ce user** (entreprise + deals) — utilisé par le
-    bouton « Mes tâches » de la page agrégée Tâches. Cache distinct
+    bouton « Mes tâches » de la page agrégée Tâches. Ligne distincte
     par user pour éviter le crosstalk.
     """
     today = datetime.now(timezone.utc).date()
-    cache_key = (
-        f"{today.isoformat()}:user:{user_id}"
-        if user_id is not None
-        else today.isoformat()
-    )
-    if not force and cache_key in _CACHE:
-        return _CACHE[cache_key]
+    today_start = datetime.combine(today, dtime.min, tzinfo=timezone.utc)
+    scope_key = f"user:{user_id}" if user_id is not None else "all"
+    previous = await _load(db, scope_key)
+    if (
+        not force
+        and previous is not None
+        and _as_utc(previous.period_start) >= today_start
+    ):
+        return _from_row(previous)
 
     entreprises = list(
         (
@@ -309,7 +365,6 @@ async def get_or_generate_global_pulse(
 
     yesterday = today - timedelta(days=1)
     yest_start = datetime.combine(yesterday, dtime.min, tzinfo=timezone.utc)
-    today_start = datetime.combine(today, dtime.min, tzinfo=timezone.utc)
     done_q = select(EntrepriseTache).where(
         EntrepriseTache.entreprise_id.in_(ent_ids),
         EntrepriseTache.status == TacheStatus.DONE.value,
@@ -370,6 +425,26 @@ async def get_or_generate_global_pulse(
                 (await db.execute(deal_q)).scalars().all()
             )
 
+    input_hash = state_hash(
+        PROMPT_VERSION,
+        user_id is not None,
+        entreprises,
+        open_taches,
+        done_yest,
+        deal_open_taches,
+        len(active_deals),
+    )
+    if (
+        not force
+        and previous is not None
+        and previous.input_hash == input_hash
+    ):
+        # Rien n'a bougé depuis le dernier briefing : reconduit tel quel.
+        previous.period_start = today_start
+        previous.period_end = today_start + timedelta(days=1)
+        await db.flush()
+        return _from_row(previous)
+
     prompt = _build_prompt(
         entreprises=entreprises,
         open_taches_by_ent=open_by_ent,
@@ -416,6 +491,9 @@ async def get_or_generate_global_pulse(
             "avec « Regénérer »)",
             "highlights": [],
         }
+        # Briefing dégradé : pas d'empreinte, le prochain briefing
+        # rappellera l'IA même si rien n'a bougé.
+        input_hash = None
 
     headline = str(parsed.get("headline") or "").strip()[:500]
     summary_text = str(parsed.get("summary") or "").strip()
@@ -427,21 +505,24 @@ async def get_or_generate_global_pulse(
     period_start = today_start
     period_end = today_start + timedelta(days=1)
 
-    brief = GlobalBriefing(
+    row = await _store(
+        db,
+        scope_key,
         period_start=period_start,
         period_end=period_end,
         headline=headline or "Briefing global",
         summary_text=summary_text or "(résumé indisponible)",
-        highlights=highlights,
+        highlights_json=json.dumps(highlights, ensure_ascii=False),
         model_used=res.model,
         provider=res.provider,
+        prompt_version=PROMPT_VERSION,
+        input_hash=input_hash,
         created_at=datetime.now(timezone.utc),
     )
-    _CACHE[cache_key] = brief
     log.info(
         "Global pulse generated in %d ms (provider=%s, model=%s)",
         duration_ms,
         res.provider,
         res.model,
     )
-    return brief
+    return _from_row(row)
@@ -3,7 +3,8 @@
 À l'entrée en cadence, la séquence GLOBALE (CadenceStep) est copiée en
 relances par lead (RelanceItem) avec des dates planifiées — chacune
 modifiable ensuite sur la fiche prospect. Le moteur exécute à l'échéance :
-étape « courriel » → envoi AUTOMATIQUE du gabarit ; étape « appel »/« sms »
+étape « courriel » → envoi AUTOMATIQUE du gabarit (outbox
+``mail_outbox``, envoyé groupé par le worker) ; étape « appel »/« sms »
 → tâche + notification. Il s'arrête (annule les relances restantes) dès
 que le lead RÉPOND (communication entrante) ou est engagé/clos.
 """
@@ -102,6 +103,7 @@ async def _send_cadence_email(
 
     from app.api.v1.endpoints.email_templates import render_template
     from app.integrations.email_graph import get_mailer
+    from app.services.mail_outbox import queue_mail
 
     mailer = get_mailer()
     if not mailer.ready:
@@ -116,29 +118,28 @@ async def _send_cadence_email(
     }
     subject = render_template(tpl.subject, variables)
     body_html = render_template(tpl.body_html, variables)
-    try:
-        await mailer.send(
-            to=[lead.email],
-            subject=subject,
-            html_body=body_html,
-            reply_to=mailer.sender,
-        )
-    except Exception as exc:  # noqa: BLE001
-        log.warning("relance email failed for lead %s: %s", lead.id, exc)
-        return False
+    # Mis en file (outbox) : le cron ne fait plus un aller-retour Graph
+    # par relance — les envois partent groupés par ``$batch`` et le
+    # journal passe de « queued » à « sent » à l'envoi effectif.
     now = datetime.now(timezone.utc)
-    db.add(
-        EmailLog(
-            direction="outbound",
-            status="sent",
-            from_email=mailer.sender,
-            to_email=lead.email,
-            subject=subject,
-            body_preview=(body_html or "")[:2000],
-            entity_type="contact_request",
-            entity_id=lead.id,
-            sent_at=now,
-        )
+    entry = EmailLog(
+        direction="outbound",
+        status="queued",
+        from_email=mailer.sender,
+        to_email=lead.email,
+        subject=subject,
+        body_preview=(body_html or "")[:2000],
+        entity_type="contact_request",
+        entity_id=lead.id,
+    )
+    db.add(entry)
+    await queue_mail(
+        db,
+        to=[lead.email],
+        subject=subject,
+        html_body=body_html,
+        reply_to=mailer.sender,
+        email_log=entry,
     )
     db.add(
         FollowUp(
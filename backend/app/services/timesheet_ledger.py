@@ -0,0 +1,329 @@
+"""Grand livre des soldes Feuille de temps (``timesheet_balances``).
+
+Le dashboard Paies affichait des cumuls recalculés sur TOUT l'historique
+à chaque ouverture (toutes les entrées, tous les taux, tous les
+règlements). Ici, chaque écriture qui change un dû ou un règlement
+applique son DELTA à la ligne (employé, compagnie) concernée :
+
+- feuille (approbation, réouverture, grille, taux, suppression) :
+  ``sheet_contribution`` AVANT la modification, puis ``sheet_changed``
+  applique (après − avant) — seule une feuille APPROUVÉE contribue ;
+- règlement (création, correction, suppression) : ``reglement_changed``
+  avec le montant signé ;
+- changement de règle de calcul (taux employé × compagnie, compagnie
+  passée interne / refacturable) : ``rebuild_balances`` des employés
+  touchés.
+
+Les deltas passent par un upsert ``col = col + delta`` (atomique, pas de
+lecture-modification-écriture). ``check_balances`` compare le livre au
+recalcul complet ; ``reconcile_balances`` réécrit les employés en écart
+(démarrage et cron ``timesheet-ledger-reconcile``) ;
+``scripts/timesheet_ledger.py`` reconstruit/contrôle à la main.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.timesheet import (
+    Timesheet,
+    TimesheetBalance,
+    TimesheetCompany,
+    TimesheetEntry,
+    TimesheetReglement,
+    TimesheetUserRate,
+)
+
+log = logging.getLogger(__name__)
+
+#: Colonnes cumulées d'une ligne du livre.
+FIELDS = (
+    "heures",
+    "paie_due",
+    "refac_heures",
+    "refac_due",
+    "paie_reglee",
+    "refac_reglee",
+)
+#: Ligne des règlements sans compagnie.
+NO_COMPANY = 0
+#: Écart toléré par ``check_balances`` (arrondis des deltas successifs).
+TOLERANCE = 0.005
+
+#: {company_id: {champ: montant}}
+Contribution = Dict[int, Dict[str, float]]
+
+
+def _line_rate(ts: Timesheet, ov: Optional[TimesheetUserRate]) -> float:
+    # Même règle que timesheets._line_rate : override employé → défaut.
+    if ov is not None and ov.taux_refacturation is not None:
+        return float(ov.taux_refacturation)
+    return float(ts.taux_refacturation or 0.0)
+
+
+def _add(out: Contribution, cid: int, field: str, value: float) -> None:
+    row = out.setdefault(cid, {})
+    row[field] = row.get(field, 0.0) + value
+
+
+async def _nr_companies(db: AsyncSession) -> set[int]:
+    return {
+        cid
+        for cid, nr in (
+            await db.execute(
+                select(
+                    TimesheetCompany.id, TimesheetCompany.heures_nr_autorisees
+                )
+            )
+        ).all()
+        if nr
+    }
+
+
+def _sheet_amounts(
+    out: Contribution,
+    ts: Timesheet,
+    sums: Iterable[tuple],
+    nr: set[int],
+    overrides: Dict[tuple, TimesheetUserRate],
+) -> None:
+    """Paie = TOUTES les heures × taux horaire de la feuille ;
+    refacturation = heures refacturables × taux effectif."""
+    for cid, refc, h in sums:
+        if not h:
+            continue
+        h = float(h)
+        _add(out, cid, "heures", h)
+        _add(out, cid, "paie_due", h * float(ts.taux_horaire or 0.0))
+        if refc and cid not in nr:
+            rate = _line_rate(ts, overrides.get((ts.user_id, cid)))
+            _add(out, cid, "refac_heures", h)
+            _add(out, cid, "refac_due", h * rate)
+
+
+async def sheet_contribution(
+    db: AsyncSession, ts: Timesheet
+) -> Contribution:
+    """Part de la feuille dans le livre (vide si pas approuvée)."""
+    if ts.status != "approuve":
+        return {}
+    sums = (
+        await db.execute(
+            select(
+                TimesheetEntry.company_id,
+                TimesheetEntry.refacturable,
+                func.sum(TimesheetEntry.hours),
+            )
+            .where(TimesheetEntry.timesheet_id == ts.id)
+            .group_by(TimesheetEntry.company_id, TimesheetEntry.refacturable)
+        )
+    ).all()
+    overrides = {
+        (o.user_id, o.company_id): o
+        for o in (
+            await db.execute(
+                select(TimesheetUserRate).where(
+                    TimesheetUserRate.user_id == ts.user_id
+                )
+            )
+        ).scalars().all()
+    }
+    out: Contribution = {}
+    _sheet_amounts(out, ts, sums, await _nr_companies(db), overrides)
+    return out
+
+
+async def apply_delta(
+    db: AsyncSession,
+    user_id: int,
+    after: Contribution,
+    before: Optional[Contribution] = None,
+) -> None:
+    """Ajoute (after − before) aux lignes de l'employé (upsert additif)."""
+    before = before or {}
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    for cid in set(after) | set(before):
+        delta = {
+            f: after.get(cid, {}).get(f, 0.0) - before.get(cid, {}).get(f, 0.0)
+            for f in FIELDS
+        }
+        if not any(abs(v) > 1e-9 for v in delta.values()):
+            continue
+        stmt = insert(TimesheetBalance).values(
+            user_id=user_id, company_id=cid, **delta
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    TimesheetBalance.user_id, TimesheetBalance.company_id
+                ],
+                set_={
+                    **{
+                        f: getattr(TimesheetBalance, f) + getattr(stmt.excluded, f)
+                        for f in FIELDS
+                    },
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+
+async def sheet_changed(
+    db: AsyncSession, ts: Timesheet, before: Contribution
+) -> None:
+    """À appeler après toute modification d'une feuille (avant commit),
+    avec sa contribution relevée AVANT la modification."""
+    await db.flush()
+    await apply_delta(db, ts.user_id, await sheet_contribution(db, ts), before)
+
+
+async def reglement_changed(
+    db: AsyncSession,
+    *,
+    kind: str,
+    user_id: int,
+    company_id: Optional[int],
+    montant: float,
+) -> None:
+    """Règlement ajouté (montant > 0), retiré (< 0) ou corrigé (écart)."""
+    field = "paie_reglee" if kind == "paie" else "refac_reglee"
+    await apply_delta(
+        db, user_id, {company_id or NO_COMPANY: {field: float(montant)}}
+    )
+
+
+async def compute_balances(
+    db: AsyncSession, user_ids: Optional[Iterable[int]] = None
+) -> Dict[int, Contribution]:
+    """Recalcul COMPLET (historique) : {user_id: {company_id: montants}}.
+    Source de vérité de ``rebuild_balances`` / ``check_balances``."""
+    ids = list(user_ids) if user_ids is not None else None
+    sheet_stmt = select(Timesheet).where(Timesheet.status == "approuve")
+    rate_stmt = select(TimesheetUserRate)
+    reg_stmt = select(
+        TimesheetReglement.kind,
+        TimesheetReglement.user_id,
+        TimesheetReglement.company_id,
+        func.sum(TimesheetReglement.montant),
+    ).group_by(
+        TimesheetReglement.kind,
+        TimesheetReglement.user_id,
+        TimesheetReglement.company_id,
+    )
+    if ids is not None:
+        sheet_stmt = sheet_stmt.where(Timesheet.user_id.in_(ids))
+        rate_stmt = rate_stmt.where(TimesheetUserRate.user_id.in_(ids))
+        reg_stmt = reg_stmt.where(TimesheetReglement.user_id.in_(ids))
+    sheets = {s.id: s for s in (await db.execute(sheet_stmt)).scalars().all()}
+    overrides = {
+        (o.user_id, o.company_id): o
+        for o in (await db.execute(rate_stmt)).scalars().all()
+    }
+    nr = await _nr_companies(db)
+    per_sheet: Dict[int, list] = {}
+    if sheets:
+        for ts_id, cid, refc, h in (
+            await db.execute(
+                select(
+                    TimesheetEntry.timesheet_id,
+                    TimesheetEntry.company_id,
+                    TimesheetEntry.refacturable,
+                    func.sum(TimesheetEntry.hours),
+                )
+                .where(TimesheetEntry.timesheet_id.in_(list(sheets)))
+                .group_by(
+                    TimesheetEntry.timesheet_id,
+                    TimesheetEntry.company_id,
+                    TimesheetEntry.refacturable,
+                )
+            )
+        ).all():
+            per_sheet.setdefault(ts_id, []).append((cid, refc, h))
+
+    out: Dict[int, Contribution] = {}
+    for ts_id, sums in per_sheet.items():
+        ts = sheets[ts_id]
+        _sheet_amounts(
+            out.setdefault(ts.user_id, {}), ts, sums, nr, overrides
+        )
+    for kind, uid, cid, total in (await db.execute(reg_stmt)).all():
+        field = "paie_reglee" if kind == "paie" else "refac_reglee"
+        _add(out.setdefault(uid, {}), cid or NO_COMPANY, field, float(total or 0))
+    return out
+
+
+async def rebuild_balances(
+    db: AsyncSession, user_ids: Optional[Iterable[int]] = None
+) -> int:
+    """Réécrit le livre (tout, ou les employés donnés) depuis l'historique.
+    Retourne le nombre de lignes écrites. L'appelant commite."""
+    ids = list(user_ids) if user_ids is not None else None
+    computed = await compute_balances(db, ids)
+    stmt = delete(TimesheetBalance)
+    if ids is not None:
+        stmt = stmt.where(TimesheetBalance.user_id.in_(ids))
+    await db.execute(stmt)
+    n = 0
+    for uid, rows in computed.items():
+        for cid, amounts in rows.items():
+            db.add(
+                TimesheetBalance(
+                    user_id=uid,
+                    company_id=cid,
+                    **{f: amounts.get(f, 0.0) for f in FIELDS},
+                )
+            )
+            n += 1
+    await db.flush()
+    return n
+
+
+async def check_balances(db: AsyncSession) -> List[dict]:
+    """Écarts entre le livre et le recalcul complet (liste vide = OK)."""
+    expected = await compute_balances(db)
+    stored = {
+        (b.user_id, b.company_id): b
+        for b in (await db.execute(select(TimesheetBalance))).scalars().all()
+    }
+    keys = set(stored) | {
+        (uid, cid) for uid, rows in expected.items() for cid in rows
+    }
+    issues: List[dict] = []
+    for uid, cid in sorted(keys):
+        want = expected.get(uid, {}).get(cid, {})
+        row = stored.get((uid, cid))
+        for f in FIELDS:
+            have = float(getattr(row, f) or 0.0) if row else 0.0
+            if abs(have - want.get(f, 0.0)) > TOLERANCE:
+                issues.append(
+                    {
+                        "user_id": uid,
+                        "company_id": cid,
+                        "field": f,
+                        "ledger": round(have, 2),
+                        "expected": round(want.get(f, 0.0), 2),
+                    }
+                )
+    return issues
+
+
+async def reconcile_balances(db: AsyncSession) -> List[dict]:
+    """Contrôle complet puis réécriture des employés en écart. Retourne
+    les écarts trouvés. L'appelant commite."""
+    issues = await check_balances(db)
+    if issues:
+        await rebuild_balances(db, {i["user_id"] for i in issues})
+    return issues
+
+
+async def load_balances(db: AsyncSession) -> List[TimesheetBalance]:
+    """Lecture du dashboard : le livre tel quel (réconcilié au démarrage
+    par ``ensure_timesheet_tables``)."""
+    return list((await db.execute(select(TimesheetBalance))).scalars().all())
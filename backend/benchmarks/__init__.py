@@ -0,0 +1,2 @@
+"""Suite de benchmarks reproductibles (SQLite, même harnais que les smoke
+tests). Point d'entrée : ``python -m benchmarks.run`` depuis backend/."""
@@ -0,0 +1,488 @@
+"""Générateur de données à l'échelle pour les benchmarks.
+
+Un jeu déterministe (``random.Random(seed)``) relatif à la date du jour :
+les endpoints lisent « le mois courant », les données doivent donc
+entourer aujourd'hui. Même échelle + même graine = mêmes lignes.
+
+Insertion par ``insert(table)`` en ``executemany`` (pas d'ORM : 1M
+d'unités du rôle en quelques minutes plutôt qu'en une heure), par
+paquets de ``BATCH`` lignes. Les ids sont posés à la main à partir du
+max existant, pour chaîner les clés étrangères sans relire la base.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from sqlalchemy import func, insert, select
+
+BATCH = 5000
+
+
+@dataclass(frozen=True)
+class Scale:
+    immeubles: int
+    logements_par_immeuble: int
+    annees_paiements: int
+    leads: int
+    property_units: int
+    employes: int
+    semaines_feuilles: int
+    entreprises: int
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(
+        immeubles=20, logements_par_immeuble=6, annees_paiements=2,
+        leads=500, property_units=20_000, employes=5,
+        semaines_feuilles=26, entreprises=4,
+    ),
+    "medium": Scale(
+        immeubles=200, logements_par_immeuble=8, annees_paiements=3,
+        leads=5_000, property_units=200_000, employes=20,
+        semaines_feuilles=52, entreprises=20,
+    ),
+    "large": Scale(
+        immeubles=1_000, logements_par_immeuble=10, annees_paiements=5,
+        leads=50_000, property_units=1_000_000, employes=60,
+        semaines_feuilles=104, entreprises=100,
+    ),
+}
+
+ARRONDISSEMENTS = (
+    "Le Plateau-Mont-Royal", "Ville-Marie", "Rosemont–La Petite-Patrie",
+    "Villeray–Saint-Michel–Parc-Extension", "Verdun", "Le Sud-Ouest",
+)
+MUNICIPALITES = (
+    ("Montréal", "mtl-island"), ("Laval", "laval"),
+    ("Longueuil", "rive-sud"), ("Terrebonne", "rive-nord"),
+)
+RUES = (
+    "rue Saint-Denis", "avenue du Mont-Royal", "rue Ontario",
+    "boulevard Saint-Laurent", "rue Wellington", "rue Beaubien",
+    "avenue Papineau", "rue Fleury", "rue Masson", "rue Notre-Dame",
+)
+
+
+def _months_back(today: date, n: int) -> List[date]:
+    """Les ``n`` derniers premiers-du-mois, mois courant inclus."""
+    y, m = today.year, today.month
+    out = []
+    for _ in range(n):
+        out.append(date(y, m, 1))
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return out[::-1]
+
+
+def _chunked(rows: Iterable[dict]) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _Ids:
+    """Ids séquentiels par table, à partir du max existant."""
+
+    def __init__(self) -> None:
+        self._next: Dict[str, int] = {}
+
+    async def start(self, s, model) -> None:
+        current = (await s.execute(select(func.max(model.id)))).scalar() or 0
+        self._next[model.__tablename__] = current + 1
+
+    def take(self, model) -> int:
+        name = model.__tablename__
+        value = self._next[name]
+        self._next[name] = value + 1
+        return value
+
+
+async def _bulk(s, model, rows: Iterable[dict]) -> int:
+    n = 0
+    for batch in _chunked(rows):
+        await s.execute(insert(model.__table__), batch)
+        n += len(batch)
+    return n
+
+
+async def generate(
+    session_factory: Callable[[], Any],
+    owner_id: int,
+    scale: Scale,
+    *,
+    seed: int = 42,
+    log: Callable[[str], None] = print,
+) -> Dict[str, int]:
+    """Remplit la base. Retourne le nombre de lignes par table."""
+    from app.models.bon_travail import BonTravail
+    from app.models.entreprise import Entreprise
+    from app.models.immobilier import (
+        Bail,
+        BailStatus,
+        Evaluation,
+        EvaluationKind,
+        Immeuble,
+        Locataire,
+        Logement,
+        LogementStatus,
+        PaiementLoyer,
+    )
+    from app.models.invest_portal import InvestFlux, InvestParticipation
+    from app.models.montreal_property_unit import MontrealPropertyUnit
+    from app.models.prospection_lead import ProspectionLead
+    from app.models.qbo_loyers import (
+        QboCompteImmeuble,
+        QboCompteLoyer,
+        QboTransactionLoyer,
+    )
+    from app.models.timesheet import Timesheet, TimesheetCompany, TimesheetEntry
+    from app.models.user import User
+    from app.services import immobilier_rollups, timesheet_ledger
+    from app.services.automation_state import set_automation_config
+    from app.services.qbo_validation_loyers import VALIDATION_KEY
+
+    rnd = random.Random(seed)
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    mois = _months_back(today, 12 * scale.annees_paiements)
+    counts: Dict[str, int] = {}
+    ids = _Ids()
+
+    def _step(name: str, n: int, started: float) -> None:
+        counts[name] = n
+        log(f"  {name:<22} {n:>9}  ({time.perf_counter() - started:.1f}s)")
+
+    async with session_factory() as s:
+        for model in (
+            Entreprise, Immeuble, Logement, Locataire, Bail, PaiementLoyer,
+            Evaluation, BonTravail, InvestParticipation, InvestFlux,
+            QboCompteLoyer, QboCompteImmeuble, QboTransactionLoyer,
+            ProspectionLead, User, Timesheet, TimesheetCompany,
+            TimesheetEntry,
+        ):
+            await ids.start(s, model)
+
+        # ── Compagnies propriétaires + parts de l'owner ──────────
+        t = time.perf_counter()
+        ent_ids = [ids.take(Entreprise) for _ in range(scale.entreprises)]
+        _step("entreprises", await _bulk(s, Entreprise, (
+            {"id": e, "name": f"Bench Immo {i:04d} inc."}
+            for i, e in enumerate(ent_ids)
+        )), t)
+
+        # ── Parc immobilier : immeubles → logements → baux ───────
+        t = time.perf_counter()
+        imm_rows = []
+        for i in range(scale.immeubles):
+            imm_rows.append({
+                "id": ids.take(Immeuble),
+                "name": f"Immeuble bench {i:04d}",
+                "address": f"{100 + i} {rnd.choice(RUES)}",
+                "city": "Montréal",
+                "is_active": True,
+                "gestion_externe": False,
+                "owner_entreprise_id": ent_ids[i % len(ent_ids)],
+                "purchase_date": today - timedelta(days=365 * rnd.randint(2, 15)),
+                "purchase_price": rnd.randint(400, 4000) * 1000,
+            })
+        _step("immeubles", await _bulk(s, Immeuble, imm_rows), t)
+
+        t = time.perf_counter()
+        logements = []
+        for imm in imm_rows:
+            for n in range(scale.logements_par_immeuble):
+                logements.append({
+                    "id": ids.take(Logement),
+                    "immeuble_id": imm["id"],
+                    "numero": str(n + 1),
+                    "status": LogementStatus.OCCUPE.value,
+                })
+        _step("logements", await _bulk(s, Logement, logements), t)
+
+        t = time.perf_counter()
+        debut = mois[0]
+        locataires, baux = [], []
+        for lg in logements:
+            loc_id = ids.take(Locataire)
+            locataires.append({
+                "id": loc_id,
+                "full_name": f"Locataire {loc_id}",
+                "email": f"locataire{loc_id}@bench.test",
+            })
+            loyer = rnd.randint(80, 240) * 10
+            baux.append({
+                "id": ids.take(Bail),
+                "logement_id": lg["id"],
+                "locataire_id": loc_id,
+                "date_debut": debut,
+                "date_fin": today + timedelta(days=rnd.randint(30, 365)),
+                "loyer_mensuel": loyer,
+                "jour_echeance": 1,
+                "status": BailStatus.ACTIF.value,
+                "depot_garantie": loyer if rnd.random() < 0.3 else None,
+                "depot_recu_le": debut,
+            })
+        await _bulk(s, Locataire, locataires)
+        _step("baux", await _bulk(s, Bail, baux), t)
+
+        # Un paiement par bail et par mois ; ~8 % d'impayés, surtout
+        # récents (ce que le pôle loyers affiche en rouge).
+        t = time.perf_counter()
+
+        def _paiements() -> Iterator[dict]:
+            for b in baux:
+                for m in mois:
+                    if rnd.random() < (0.25 if m == mois[-1] else 0.05):
+                        continue
+                    yield {
+                        "id": ids.take(PaiementLoyer),
+                        "bail_id": b["id"],
+                        "mois_couvert": m,
+                        "montant": b["loyer_mensuel"],
+                        "paye_le": m + timedelta(days=rnd.randint(0, 6)),
+                        "methode": "virement",
+                        "en_retard": False,
+                        "created_at": now,
+                    }
+
+        _step("paiements", await _bulk(s, PaiementLoyer, _paiements()), t)
+
+        t = time.perf_counter()
+        annees = sorted({m.year for m in mois})
+        _step("evaluations", await _bulk(s, Evaluation, (
+            {
+                "id": ids.take(Evaluation),
+                "immeuble_id": imm["id"],
+                "kind": EvaluationKind.MUNICIPALE.value,
+                "valeur": imm["purchase_price"] * (1 + 0.04 * k),
+                "date_evaluation": date(y, 1, 1),
+                "is_reference": False,
+                "created_at": now,
+            }
+            for imm in imm_rows
+            for k, y in enumerate(annees)
+        )), t)
+
+        # Bons internes : quelques-uns par logement et par année.
+        t = time.perf_counter()
+
+        def _bons() -> Iterator[dict]:
+            for lg in logements:
+                for y in annees:
+                    for _ in range(rnd.randint(0, 3)):
+                        bid = ids.take(BonTravail)
+                        yield {
+                            "id": bid,
+                            "reference": f"BT-BENCH-{bid:08d}",
+                            "title": "Entretien",
+                            "kind": "interne",
+                            "status": "draft",
+                            "immeuble_id": lg["immeuble_id"],
+                            "logement_id": lg["id"],
+                            "amount": rnd.randint(50, 3000),
+                            "created_at": datetime(
+                                y, rnd.randint(1, 12), rnd.randint(1, 28),
+                                tzinfo=timezone.utc,
+                            ),
+                        }
+
+        _step("bons_travail", await _bulk(s, BonTravail, _bons()), t)
+
+        # ── Portail investisseur : l'owner a des parts partout ───
+        t = time.perf_counter()
+        parts = [
+            {
+                "id": ids.take(InvestParticipation),
+                "user_id": owner_id,
+                "entreprise_id": e,
+                "parts_pct": rnd.choice((10, 20, 25, 50)),
+                "statut": "actif",
+                "is_visible": True,
+            }
+            for e in ent_ids
+        ]
+        await _bulk(s, InvestParticipation, parts)
+        _step("invest_flux", await _bulk(s, InvestFlux, (
+            {
+                "id": ids.take(InvestFlux),
+                "participation_id": p["id"],
+                "type": kind,
+                "montant": montant,
+                "date_flux": date(y, 6, 30),
+                "source": "manuel",
+            }
+            for p in parts
+            for y in annees
+            for kind, montant in (
+                (("apport", 100_000.0),) if y == annees[0]
+                else (("dividende", 6_000.0),)
+            )
+        )), t)
+
+        # ── Validation bancaire : comptes QBO + transactions ─────
+        t = time.perf_counter()
+        comptes = []
+        for i, imm in enumerate(imm_rows[::5]):
+            comptes.append({
+                "id": ids.take(QboCompteLoyer),
+                "qbo_account_id": f"BENCH-{i}",
+                "qbo_account_name": f"Loyer à remettre - {imm['name']}",
+                "tous_les_immeubles": False,
+                "actif": True,
+            })
+        await _bulk(s, QboCompteLoyer, comptes)
+        await _bulk(s, QboCompteImmeuble, (
+            {
+                "id": ids.take(QboCompteImmeuble),
+                "compte_id": comptes[i // 5]["id"],
+                "immeuble_id": imm["id"],
+            }
+            for i, imm in enumerate(imm_rows)
+        ))
+        compte_of = {
+            imm["id"]: comptes[i // 5] for i, imm in enumerate(imm_rows)
+        }
+        imm_of = {lg["id"]: lg["immeuble_id"] for lg in logements}
+
+        def _txns() -> Iterator[dict]:
+            for b in baux:
+                imm_id = imm_of[b["logement_id"]]
+                compte = compte_of[imm_id]
+                for m in mois[-3:]:
+                    tid = ids.take(QboTransactionLoyer)
+                    matched = rnd.random() < 0.85
+                    yield {
+                        "id": tid,
+                        "qbo_txn_type": "Deposit",
+                        "qbo_txn_id": f"D{tid}",
+                        "qbo_account_id": compte["qbo_account_id"],
+                        "compte_id": compte["id"],
+                        "immeuble_id": imm_id,
+                        "date_txn": m + timedelta(days=rnd.randint(0, 5)),
+                        "montant": b["loyer_mensuel"],
+                        "sens": "entree",
+                        "payeur": f"Locataire {b['locataire_id']}",
+                        "statut": "rapproche" if matched else "non_rapproche",
+                        "bail_id": b["id"] if matched else None,
+                        "mois_couvert": m if matched else None,
+                    }
+
+        _step("qbo_transactions", await _bulk(s, QboTransactionLoyer, _txns()), t)
+        await set_automation_config(
+            s, VALIDATION_KEY, {"active": True, "alerte_jours": 7}
+        )
+
+        # ── Prospection : leads + rôle d'évaluation ──────────────
+        t = time.perf_counter()
+        _step("leads", await _bulk(s, ProspectionLead, (
+            {
+                "id": ids.take(ProspectionLead),
+                "name": f"Lead bench {i}",
+                "address": f"{rnd.randint(1, 9999)} {rnd.choice(RUES)}",
+                "city": "Montréal",
+                "lat": 45.45 + rnd.random() * 0.15,
+                "lng": -73.65 + rnd.random() * 0.15,
+                "priority": rnd.randint(1, 5),
+                "score": rnd.randint(0, 100),
+            }
+            for i in range(scale.leads)
+        )), t)
+
+        t = time.perf_counter()
+
+        def _units() -> Iterator[dict]:
+            for i in range(scale.property_units):
+                municipalite, region = rnd.choice(MUNICIPALITES)
+                civique = str(rnd.randint(1, 9999))
+                rue = rnd.choice(RUES)
+                yield {
+                    "matricule": f"B{i:011d}",
+                    "civique_debut": civique,
+                    "nom_rue": rue,
+                    "municipalite": municipalite,
+                    "region": region,
+                    "arrondissement": (
+                        rnd.choice(ARRONDISSEMENTS)
+                        if municipalite == "Montréal" else None
+                    ),
+                    "nombre_logement": rnd.choice((1, 2, 3, 4, 5, 6, 8, 12, 24)),
+                    "annee_construction": rnd.randint(1890, 2023),
+                    "superficie_terrain": float(rnd.randint(150, 3000)),
+                    "search_key": f"{civique} {rue.split(' ', 1)[1].lower()}",
+                }
+
+        _step("property_units", await _bulk(s, MontrealPropertyUnit, _units()), t)
+
+        # ── Feuilles de temps approuvées + livre des soldes ──────
+        t = time.perf_counter()
+        companies = [
+            {
+                "id": ids.take(TimesheetCompany),
+                "label": f"Compagnie bench {i}",
+                "position": i,
+                "taux_refacturation": 11.0 if i % 2 else 33.0,
+                "refacturable": True,
+                "heures_nr_autorisees": False,
+                "is_active": True,
+            }
+            for i in range(4)
+        ]
+        await _bulk(s, TimesheetCompany, companies)
+        employes = [
+            {
+                "id": ids.take(User),
+                "email": f"employe{i}@bench.test",
+                "hashed_password": "!",
+                "is_active": True,
+                "is_admin": False,
+                "role": "employee",
+            }
+            for i in range(scale.employes)
+        ]
+        await _bulk(s, User, employes)
+        lundi = today - timedelta(days=today.weekday())
+        sheets = [
+            {
+                "id": ids.take(Timesheet),
+                "user_id": e["id"],
+                "period_start": lundi - timedelta(weeks=w),
+                "period_end": lundi - timedelta(weeks=w) + timedelta(days=6),
+                "status": "approuve",
+                "approved_at": now,
+            }
+            for e in employes
+            for w in range(1, scale.semaines_feuilles + 1)
+        ]
+        await _bulk(s, Timesheet, sheets)
+        _step("timesheet_entries", await _bulk(s, TimesheetEntry, (
+            {
+                "id": ids.take(TimesheetEntry),
+                "timesheet_id": sh["id"],
+                "company_id": companies[(sh["id"] + d) % len(companies)]["id"],
+                "day_index": d,
+                "refacturable": True,
+                "hours": float(rnd.randint(4, 9)),
+            }
+            for sh in sheets
+            for d in range(5)
+        )), t)
+        await timesheet_ledger.rebuild_balances(s)
+        # Insertion Core en masse : pas d'after_flush → agrégats
+        # construits d'un coup, comme au premier démarrage.
+        await immobilier_rollups.rebuild_rollups(s)
+        await s.commit()
+
+    return counts
+
+
+def describe(scale: Scale) -> Dict[str, int]:
+    return asdict(scale)
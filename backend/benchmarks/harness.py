@@ -0,0 +1,125 @@
+"""Harnais des benchmarks : l'app sur SQLite, comme les smoke tests.
+
+Réutilise ``tests/conftest.py`` (env factice posé AVANT l'import de
+l'app, intégrations neutralisées) et ``tests/smoke/conftest.py`` (JSONB
+→ JSON, ``get_db`` overridé, ``SyncClient``, filet des FK orphelines)
+au lieu d'en maintenir une copie : un endpoint qui passe les smoke tests
+tourne ici à l'identique, seul le volume de données change.
+
+``DATABASE_URL`` peut pointer sur un fichier SQLite persistant
+(``--db``) : la génération du jeu « large » (1M d'unités du rôle) prend
+plusieurs minutes, on ne la refait que si l'échelle ou la graine change.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import tests.conftest  # noqa: F401 — env factice AVANT tout import de l'app
+
+
+def configure(db_path: Optional[str]) -> None:
+    """À appeler AVANT ``open_app`` : fixe le fichier SQLite utilisé."""
+    if db_path:
+        path = Path(db_path).resolve()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{path.as_posix()}"
+
+
+class Harness:
+    """App + loop + client HTTP authentifié (owner) sur la base SQLite."""
+
+    def __init__(self) -> None:
+        import httpx
+
+        from tests.smoke import conftest as smoke
+
+        self.smoke = smoke
+        self.loop = asyncio.new_event_loop()
+        self.session = smoke.TestSessionLocal
+        self._http = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=smoke.fastapi_app),
+            base_url="http://bench",
+            timeout=None,
+        )
+        self.client = smoke.SyncClient(self._http, self.loop)
+        self.headers: dict = {}
+        self.user_id: Optional[int] = None
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    # ── Schéma + utilisateur ──────────────────────────────────────
+
+    def create_schema(self) -> None:
+        from app.db.base import Base
+
+        self.smoke._stub_unresolved_fk_targets()
+
+        async def _create_all():
+            async with self.smoke.app_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+
+        self.run(_create_all())
+
+    def login(self, email: str = "bench-owner@example.com") -> int:
+        """Owner du jeu (tous les volets, gestionnaire des feuilles de
+        temps, investisseur) : crée le compte au besoin, pose le JWT."""
+        from sqlalchemy import select
+
+        from app.core.security import create_access_token, get_password_hash
+        from app.models.user import User
+
+        async def _user() -> int:
+            async with self.session() as s:
+                user = (
+                    await s.execute(select(User).where(User.email == email))
+                ).scalar_one_or_none()
+                if user is None:
+                    user = User(
+                        email=email,
+                        hashed_password=get_password_hash("Bench!Owner42"),
+                        is_active=True,
+                        is_admin=True,
+                        role="owner",
+                    )
+                    s.add(user)
+                    await s.commit()
+                return user.id
+
+        self.user_id = self.run(_user())
+        token = create_access_token(subject=str(self.user_id))
+        self.headers = {"Authorization": f"Bearer {token}"}
+        return self.user_id
+
+    # ── Marqueur du jeu de données ────────────────────────────────
+
+    @staticmethod
+    def _marker_path() -> Optional[Path]:
+        url = os.environ["DATABASE_URL"]
+        prefix = "sqlite+aiosqlite:///"
+        if not url.startswith(prefix):
+            return None
+        return Path(url[len(prefix):] + ".bench.json")
+
+    def dataset(self) -> Optional[dict]:
+        path = self._marker_path()
+        if path is None or not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def mark_dataset(self, meta: dict) -> None:
+        path = self._marker_path()
+        if path is not None:
+            path.write_text(json.dumps(meta, indent=2, sort_keys=True))
+
+    def close(self) -> None:
+        try:
+            self.run(self._http.aclose())
+            self.run(self.smoke.app_engine.dispose())
+        finally:
+            self.loop.close()
@@ -0,0 +1,270 @@
+"""Benchmarks des endpoints lourds : latence, requêtes SQL, mémoire.
+
+Rejoue chaque scénario (``benchmarks/scenarios.py``) contre l'app sur
+SQLite, avec un jeu de données à l'échelle (``benchmarks/datagen.py``),
+et écrit un rapport JSON :
+
+- ``p50_ms`` / ``p95_ms`` / ``mean_ms`` : latence de bout en bout
+  (ASGI, sans réseau), sur ``--iterations`` appels après un échauffement ;
+- ``queries`` : instructions SQL par appel (``request_metrics.track``) —
+  déterministe, c'est LE signal de régression N+1 ;
+- ``peak_mb`` : pic d'allocations Python (``tracemalloc``) d'un appel
+  mesuré à part, pour ne pas fausser la latence ;
+- ``n_plus_one`` : forme de requête la plus répétée si elle dépasse
+  ``query_repeat_threshold`` (au lieu de l'avertissement du middleware,
+  coupé ici pour ne pas noyer la sortie).
+
+Le rapport est comparé à ``benchmarks/baseline.json`` (une entrée par
+échelle) : plus de requêtes SQL qu'en référence = régression ; latence
+ou mémoire au-delà de ``--tolerance`` aussi (avec un plancher absolu,
+le bruit d'une machine à l'autre sur des appels de quelques ms).
+Code de sortie 1 en cas de régression.
+
+Usage (depuis backend/) :
+    python -m benchmarks.run --scale small
+    python -m benchmarks.run --scale large --db /tmp/bench-large.db
+    python -m benchmarks.run --scale small --update-baseline
+    python -m benchmarks.run --only loyers_overview,list_properties -n 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import platform
+import resource
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+#: Écart absolu sous lequel une hausse de latence n'est pas une
+#: régression (ms) — même en relatif au-delà de la tolérance.
+LATENCY_FLOOR_MS = 5.0
+#: Idem pour le pic mémoire (Mo).
+MEMORY_FLOOR_MB = 1.0
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Rang le plus proche (pas d'interpolation : reproductible)."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _peak_rss_mb() -> float:
+    # Linux : ru_maxrss en Ko.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(harness, scenario, iterations: int) -> Dict[str, Any]:
+    from app.core import request_metrics
+
+    params = scenario.params()
+
+    def _call():
+        resp = harness.client.get(
+            scenario.path, params=params, headers=harness.headers
+        )
+        if resp.status_code != 200:
+            raise RuntimeError(
+                f"{scenario.name} : HTTP {resp.status_code} — {resp.text[:300]}"
+            )
+        return resp
+
+    _call()  # échauffement : caches de permissions, plans SQLite
+
+    latencies: List[float] = []
+    queries: List[int] = []
+    worst: Optional[tuple] = None
+    size = 0
+    for _ in range(iterations):
+        with request_metrics.track() as stats:
+            started = time.perf_counter()
+            resp = _call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(stats.queries)
+        repeated = stats.repeated()
+        if repeated and (worst is None or repeated[0][1] > worst[1]):
+            worst = repeated[0]
+        size = len(resp.content)
+
+    tracemalloc.start()
+    try:
+        _call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "queries": max(queries),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "response_kb": round(size / 1024, 1),
+        "n_plus_one": (
+            {"statement": worst[0][:200], "count": worst[1]} if worst else None
+        ),
+    }
+
+
+def compare(
+    report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Régressions du rapport par rapport à la référence (même échelle)."""
+    problems: List[str] = []
+    for name, cur in report["scenarios"].items():
+        ref = baseline.get("scenarios", {}).get(name)
+        if ref is None:
+            continue
+        if cur["queries"] > ref["queries"]:
+            problems.append(
+                f"{name} : {cur['queries']} requêtes SQL "
+                f"(référence {ref['queries']})"
+            )
+        for key, floor, unit in (
+            ("p95_ms", LATENCY_FLOOR_MS, "ms"),
+            ("peak_mb", MEMORY_FLOOR_MB, "Mo"),
+        ):
+            limit = ref[key] * (1 + tolerance)
+            if cur[key] > limit and cur[key] - ref[key] > floor:
+                problems.append(
+                    f"{name} : {key} {cur[key]}{unit} "
+                    f"(référence {ref[key]}{unit}, +{tolerance:.0%} toléré)"
+                )
+    return problems
+
+
+def _print_table(report: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    refs = (baseline or {}).get("scenarios", {})
+    print(
+        f"\n{'scénario':<22} {'p50 ms':>9} {'p95 ms':>9} {'SQL':>5} "
+        f"{'pic Mo':>8}   référence p95 / SQL"
+    )
+    for name, r in report["scenarios"].items():
+        ref = refs.get(name)
+        ref_txt = f"{ref['p95_ms']:>9} / {ref['queries']}" if ref else "—"
+        print(
+            f"{name:<22} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['queries']:>5} "
+            f"{r['peak_mb']:>8}   {ref_txt}"
+        )
+        if r["n_plus_one"]:
+            print(f"{'':<22} N+1 : {r['n_plus_one']['count']}× "
+                  f"{r['n_plus_one']['statement'][:90]}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", default="small", choices=("small", "medium", "large"))
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="Fichier SQLite persistant (réutilisé).")
+    parser.add_argument("--only", help="Scénarios à jouer (séparés par des virgules).")
+    parser.add_argument("--out", help="Rapport JSON (défaut : stdout seulement).")
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    from benchmarks import harness as harness_mod
+
+    harness_mod.configure(args.db)
+    logging.getLogger("app.core.request_metrics").setLevel(logging.ERROR)
+
+    from benchmarks import datagen
+    from benchmarks.scenarios import BY_NAME, SCENARIOS
+
+    scenarios = (
+        [BY_NAME[n] for n in args.only.split(",")] if args.only else SCENARIOS
+    )
+    scale = datagen.SCALES[args.scale]
+    wanted = {"scale": args.scale, "seed": args.seed, **datagen.describe(scale)}
+
+    h = harness_mod.Harness()
+    try:
+        h.create_schema()
+        owner_id = h.login()
+        dataset = h.dataset()
+        if dataset is None or dataset.get("params") != wanted:
+            if dataset is not None:
+                print(
+                    "Base existante générée avec d'autres paramètres : "
+                    "utiliser un autre --db.",
+                    file=sys.stderr,
+                )
+                return 2
+            print(f"Génération du jeu « {args.scale} »…")
+            started = time.perf_counter()
+            counts = h.run(
+                datagen.generate(h.session, owner_id, scale, seed=args.seed)
+            )
+            dataset = {
+                "params": wanted,
+                "rows": counts,
+                "generated_s": round(time.perf_counter() - started, 1),
+            }
+            h.mark_dataset(dataset)
+
+        report: Dict[str, Any] = {
+            "meta": {
+                "scale": args.scale,
+                "seed": args.seed,
+                "iterations": args.iterations,
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "machine": platform.machine(),
+                "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "rows": dataset.get("rows", {}),
+            },
+            "scenarios": {},
+        }
+        for sc in scenarios:
+            print(f"  {sc.name}…", flush=True)
+            report["scenarios"][sc.name] = measure(h, sc, args.iterations)
+        report["meta"]["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    finally:
+        h.close()
+
+    baselines: Dict[str, Any] = {}
+    path = Path(args.baseline)
+    if path.exists():
+        baselines = json.loads(path.read_text())
+    baseline = baselines.get(args.scale)
+
+    _print_table(report, baseline)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.update_baseline:
+        merged = dict((baseline or {}).get("scenarios", {}))
+        merged.update(report["scenarios"])
+        baselines[args.scale] = {"meta": report["meta"], "scenarios": merged}
+        path.write_text(
+            json.dumps(baselines, indent=2, ensure_ascii=False, sort_keys=True)
+            + "\n"
+        )
+        print(f"\nRéférence « {args.scale} » mise à jour ({path}).")
+        return 0
+
+    if baseline is None:
+        print(f"\nPas de référence « {args.scale} » : rien à comparer.")
+        return 0
+    problems = compare(report, baseline, args.tolerance)
+    for p in problems:
+        print(f"RÉGRESSION — {p}")
+    if not problems:
+        print("\nAucune régression par rapport à la référence.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
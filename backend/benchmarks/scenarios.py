@@ -0,0 +1,54 @@
+"""Scénarios : les endpoints lourds, tels que le front les appelle.
+
+Chaque scénario est un GET (chemin + paramètres) rejoué tel quel à chaque
+itération. Les paramètres dépendent de la date du jour (mois courant),
+comme les données générées par ``datagen``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    path: str
+    params: Callable[[], Dict[str, str]] = field(default=lambda: {})
+
+
+def _mois() -> Dict[str, str]:
+    return {"mois": date.today().strftime("%Y-%m")}
+
+
+def _annee() -> Dict[str, str]:
+    return {"year": str(date.today().year)}
+
+
+SCENARIOS: List[Scenario] = [
+    Scenario("loyers_overview", "/api/v1/immobilier/loyers/overview", _mois),
+    Scenario("depots_overview", "/api/v1/immobilier/depots/overview"),
+    Scenario(
+        "maintenance_rollup", "/api/v1/immobilier/maintenance-rollup", _annee
+    ),
+    Scenario(
+        "list_properties",
+        "/api/v1/prospection/mtl-properties",
+        lambda: {
+            "region": "mtl-island",
+            "min_logements": "4",
+            "min_annee": "1950",
+        },
+    ),
+    Scenario(
+        "reconciliation_etat",
+        "/api/v1/immobilier/validation-bancaire/etat",
+        _mois,
+    ),
+    Scenario("invest_portefeuille", "/api/v1/invest/me/portefeuille"),
+    Scenario("timesheet_dashboard", "/api/v1/timesheets/dashboard"),
+]
+
+BY_NAME: Dict[str, Scenario] = {s.name: s for s in SCENARIOS}
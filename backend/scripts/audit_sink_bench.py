@@ -0,0 +1,148 @@
+"""Benchmark du journal d'audit : écriture en ligne vs tampon.
+
+Rejoue ``--actions`` actions « métier » (une session, une mise à jour,
+``log_action``, commit — le profil des endpoints mutatifs) de deux
+façons :
+
+- ``inline``   : ``log_action(..., transactional=True)``, l'ancien
+                 chemin (un INSERT dans la transaction de l'appelant) ;
+- ``buffered`` : ``log_action`` tamponné, puis ``audit_sink.drain()``
+                 comme à l'arrêt de l'app (compté dans le total).
+
+Affiche, par mode : latence par action vue de l'appelant (p50 / p95),
+durée totale, instructions SQL et INSERT d'audit émis.
+
+Usage (depuis backend/) :
+    python -m scripts.audit_sink_bench --actions 1000
+    python -m scripts.audit_sink_bench --db /tmp/audit-bench.db --json bench.json
+
+Base SQLite jetable (fichier temporaire par défaut) : rien n'est écrit
+dans la base configurée.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.gettempdir()}/audit-bench-app.db"
+)
+os.environ.setdefault("JWT_SECRET", "bench")
+
+from sqlalchemy import (  # noqa: E402
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    event,
+    func,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.models.audit_log import AuditLog  # noqa: E402
+from app.services import audit  # noqa: E402
+from app.services.audit import AuditSink, log_action  # noqa: E402
+
+_counters = Table(
+    "bench_counters", MetaData(), Column("id", Integer, primary_key=True), Column("n", Integer)
+)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _run(path: str, mode: str, actions: int) -> dict:
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: AuditLog.__table__.create(c))
+        await conn.run_sync(lambda c: _counters.create(c))
+        await conn.execute(_counters.insert().values(id=1, n=0))
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    sink = AuditSink(session_factory=factory)
+    audit.audit_sink = sink
+    sink.start()
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_a) -> None:
+        nonlocal statements
+        statements += 1
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for i in range(actions):
+        t0 = time.perf_counter()
+        async with factory() as db:
+            await db.execute(update(_counters).values(n=_counters.c.n + 1))
+            await log_action(
+                db,
+                user=None,
+                action="bench.action",
+                entity_type="bench",
+                entity_id=i,
+                details={"i": i},
+                transactional=mode == "inline",
+            )
+            await db.commit()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0)  # laisse tourner les flushs, comme entre deux requêtes
+    await sink.drain()
+    total_ms = (time.perf_counter() - started) * 1000
+
+    async with factory() as db:
+        rows = (await db.execute(select(func.count(AuditLog.id)))).scalar_one()
+    await engine.dispose()
+    return {
+        "mode": mode,
+        "actions": actions,
+        "rows": rows,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+        "total_ms": round(total_ms, 1),
+        "statements": statements,
+        "audit_inserts": sink.inserts if mode == "buffered" else actions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=1000)
+    parser.add_argument("--db", help="fichier SQLite (recréé à chaque mode)")
+    parser.add_argument("--modes", default="inline,buffered")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "audit-bench.db")
+    results = [
+        asyncio.run(_run(path, mode, args.actions)) for mode in args.modes.split(",")
+    ]
+    for r in results:
+        print(
+            f"{r['mode']:<9} p50 {r['p50_ms']:>7.3f} ms  p95 {r['p95_ms']:>7.3f} ms  "
+            f"total {r['total_ms']:>8.1f} ms  SQL {r['statements']:>5}  "
+            f"INSERT audit {r['audit_inserts']:>5}  lignes {r['rows']}"
+        )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Agrégats Dépôts / maintenance — reconstruction et contrôle.
+
+Les pages Dépôts et Maintenance lisent ``imm_depot_rollups`` et
+``imm_maintenance_rollups``, rafraîchis à chaque écriture
+(``app.services.immobilier_rollups``). Ce script :
+
+- ``--check``   compare les agrégats au recalcul complet et liste les
+                écarts (code de sortie 1 s'il y en a) ;
+- ``--rebuild`` réécrit les agrégats (tout, ou les immeubles passés par
+                ``--immeuble``).
+
+Usage (depuis backend/) :
+    python -m scripts.immobilier_rollups --check
+    python -m scripts.immobilier_rollups --rebuild
+    python -m scripts.immobilier_rollups --rebuild --immeuble 3 --immeuble 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.services.immobilier_rollups import (  # noqa: E402
+    check_rollups,
+    rebuild_rollups,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+log = logging.getLogger("immobilier_rollups")
+
+
+async def _run(rebuild: bool, immeubles: Optional[List[int]]) -> int:
+    async with AsyncSessionLocal() as db:
+        if rebuild:
+            n_maint, n_depots = await rebuild_rollups(db, immeubles)
+            await db.commit()
+            log.info(
+                "Agrégats reconstruits : %s mois de maintenance, %s immeuble(s) "
+                "avec dépôts",
+                n_maint, n_depots,
+            )
+            return 0
+        issues = await check_rollups(db, immeubles)
+    for i in issues:
+        log.warning(
+            "Écart %(rollup)s immeuble %(immeuble_id)s %(mois)s — "
+            "%(field)s : agrégat %(stored)s ≠ recalcul %(expected)s",
+            i,
+        )
+    log.info("%s écart(s)", len(issues))
+    return 1 if issues else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--check", action="store_true")
+    mode.add_argument("--rebuild", action="store_true")
+    parser.add_argument(
+        "--immeuble", type=int, action="append", help="immeuble (répétable)"
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.rebuild, args.immeuble)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Benchmark des substitutions de l'offre d'investissement (PPTX).
+
+Fabrique un template synthétique avec python-pptx (libellés fixes,
+montants coupés en plusieurs runs, sauts de ligne, tables), puis
+chronomètre les mêmes substitutions de deux façons :
+
+- ``full``  : l'ancien chemin — ``_replace_in_slide`` parcourt toutes
+              les formes / cellules pour chaque substitution ;
+- ``index`` : ``_apply_substitutions`` sur l'index compilé du template
+              (recherches mémoïsées, comme en production).
+
+Affiche le meilleur temps de ``--reps`` passages, le nombre de cadres de
+texte visités par chaque chemin, et vérifie que les deux donnent le même
+XML.
+
+Usage (depuis backend/) :
+    python -m scripts.offre_pptx_bench
+    python -m scripts.offre_pptx_bench --slides 24 --boxes 60 --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_template(slides: int, boxes: int, rows: int = 12, cols: int = 6) -> bytes:
+    """Surtout des libellés fixes, quelques montants / dates à substituer
+    par slide — la forme du vrai template."""
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    prs = Presentation()
+    layout = prs.slide_layouts[6]
+    for s in range(slides):
+        slide = prs.slides.add_slide(layout)
+        for b in range(boxes):
+            tf = slide.shapes.add_textbox(
+                Inches(0.1), Inches(0.1), Inches(2), Inches(0.3)
+            ).text_frame
+            tf.text = f"Libellé fixe {s}.{b}"
+            tf.add_paragraph().text = "Texte de présentation du projet"
+        tf = slide.shapes.add_textbox(
+            Inches(0.1), Inches(0.1), Inches(2), Inches(0.3)
+        ).text_frame
+        tf.text = "Prix demandé — 1 200 000$"
+        para = tf.add_paragraph()
+        para.add_run().text = "Total 375 "
+        para.add_run().text = "000$"
+        tf.add_paragraph().text = "Loyer\vmoyen 953$"
+        table = slide.shapes.add_table(
+            rows, cols, Inches(1), Inches(3), Inches(8), Inches(3)
+        ).table
+        for r in range(rows):
+            for c in range(cols):
+                table.cell(r, c).text = f"Poste {r}.{c}"
+        table.cell(1, 1).text = "M1.1 – Juillet 2026"
+        table.cell(3, 2).text = "Création chambres"
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+def make_substitutions(slides: int) -> list:
+    subs = []
+    for s in range(slides):
+        subs += [
+            (s, "1 200 000$", "1 450 000$", "all"),
+            (s, "375 000$", "410 000$", "first"),
+            (s, "953$", "1 010$", "first"),
+            (s, "Création chambres", "Rencontres", "first"),
+            (s, "Rencontres", "Rencontres avec locataires", "first"),
+            (s, "Juillet 2026", "Août 2026", "all"),
+            (s, "absent du template", "x", "first"),
+        ]
+    return subs
+
+
+def run(slides: int, boxes: int, reps: int) -> dict:
+    from lxml import etree
+    from pptx import Presentation
+
+    from app.services import offre_investissement_pptx as offre
+
+    blob = make_template(slides, boxes)
+    subs = make_substitutions(slides)
+    index = offre._compile_template(blob)
+
+    visits = {"n": 0}
+    real = offre._safe_replace_in_text_frame
+
+    def _counting(tf, find, replace):
+        visits["n"] += 1
+        return real(tf, find, replace)
+
+    def _full():
+        prs = Presentation(io.BytesIO(blob))
+        for slide_idx, find, replace, dupe in subs:
+            if not find or find == replace or slide_idx >= len(prs.slides):
+                continue
+            offre._replace_in_slide(prs.slides[slide_idx], find, replace, dupe)
+        return prs
+
+    def _index():
+        prs = Presentation(io.BytesIO(index.blob))
+        offre._apply_substitutions(prs, index, subs)
+        return prs
+
+    def _measure(fn) -> tuple:
+        offre._safe_replace_in_text_frame = _counting
+        try:
+            visits["n"] = 0
+            prs = fn()
+            visited = visits["n"]
+        finally:
+            offre._safe_replace_in_text_frame = real
+        best = float("inf")
+        for _ in range(reps):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        return prs, visited, best
+
+    full_prs, full_visits, full_s = _measure(_full)
+    index_prs, index_visits, index_s = _measure(_index)
+    identical = all(
+        etree.tostring(a._element) == etree.tostring(b._element)
+        for a, b in zip(full_prs.slides, index_prs.slides)
+    )
+    return {
+        "slides": slides,
+        "boxes": boxes,
+        "substitutions": len(subs),
+        "full_ms": round(full_s * 1000, 1),
+        "index_ms": round(index_s * 1000, 1),
+        "speedup": round(full_s / index_s, 1) if index_s else None,
+        "full_frames_visited": full_visits,
+        "index_frames_visited": index_visits,
+        "identical": identical,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slides", type=int, default=12)
+    parser.add_argument("--boxes", type=int, default=30)
+    parser.add_argument("--reps", type=int, default=5)
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    result = run(args.slides, args.boxes, args.reps)
+    print(
+        f"parcours complet {result['full_ms']} ms "
+        f"({result['full_frames_visited']} cadres), "
+        f"index {result['index_ms']} ms "
+        f"({result['index_frames_visited']} cadres), "
+        f"x{result['speedup']}, identique={result['identical']}"
+    )
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark mémoire du rendu de PDF scannés (pic RSS).
+
+Génère un gros PDF « scanné » (une image bruitée pleine page par page,
+comme un bail passé au numériseur), puis mesure le pic de mémoire
+résidente (``ru_maxrss``) de deux façons de le rendre, chacune dans un
+processus neuf pour isoler son pic :
+
+- ``bulk``   : l'ancien chemin — ``convert_from_bytes`` sur tout le PDF ;
+- ``stream`` : ``pdf_documents.iter_page_images`` (une page à la fois,
+               dpi adaptatif, budget ``PDF_RENDER_BUDGET_MB``).
+
+Usage (depuis backend/, poppler-utils installé) :
+    python -m scripts.pdf_memory_bench --pages 40
+    python -m scripts.pdf_memory_bench --pages 40 --dpi 200 --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _peak_rss_mb() -> float:
+    # Linux : ru_maxrss en Ko.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_fixture(path: str, pages: int) -> None:
+    """PDF lettre de ``pages`` pages, chacune une image bruitée 150 dpi
+    (incompressible, comme un vrai scan)."""
+    from PIL import Image
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(path, pagesize=letter)
+    w, h = letter
+    for n in range(pages):
+        img = Image.frombytes(
+            "L", (1275, 1650), os.urandom(1275 * 1650)
+        ).convert("RGB")
+        c.drawImage(ImageReader(img), 0, 0, width=w, height=h)
+        c.drawString(72, 72, f"page {n + 1}")
+        c.showPage()
+    c.save()
+
+
+def _run_mode(mode: str, path: str, dpi: int) -> dict:
+    t0 = time.perf_counter()
+    base = _peak_rss_mb()
+    pages = 0
+    if mode == "bulk":
+        from pdf2image import convert_from_bytes
+
+        with open(path, "rb") as fh:
+            images = convert_from_bytes(fh.read(), dpi=dpi)
+        pages = len(images)
+    else:
+        from app.services.pdf_documents import PdfDocument, iter_page_images
+
+        with open(path, "rb") as fh, PdfDocument.from_bytes(fh.read()) as doc:
+            for _ in iter_page_images(doc, dpi=dpi, grayscale=True):
+                pages += 1
+    return {
+        "mode": mode,
+        "pages": pages,
+        "dpi": dpi,
+        "seconds": round(time.perf_counter() - t0, 2),
+        "rss_before_mb": round(base, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--dpi", type=int, default=200)
+    parser.add_argument("--modes", default="bulk,stream")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--_child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args._child:
+        mode, path = args._child
+        print(json.dumps(_run_mode(mode, path, args.dpi)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "scan.pdf")
+        make_fixture(path, args.pages)
+        print(
+            f"Fixture : {args.pages} pages, "
+            f"{os.path.getsize(path) / 1e6:.1f} Mo"
+        )
+        for mode in args.modes.split(","):
+            out = subprocess.run(
+                [
+                    sys.executable, "-m", "scripts.pdf_memory_bench",
+                    "--dpi", str(args.dpi), "--_child", mode, path,
+                ],
+                capture_output=True,
+                text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            )
+            if out.returncode != 0:
+                # Un OOM-kill (-9) est justement ce qu'on mesure.
+                results.append(
+                    {"mode": mode, "error": out.stderr.strip()[-300:]
+                     or f"code {out.returncode}"}
+                )
+            else:
+                results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            print(results[-1])
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Benchmark de latence de la secrétaire IA par rejeu d'appels réels.
+
+Rejoue les historiques enregistrés (`voice_call_turns`) tour par tour
+contre `decide_next_turn` (même provider, même prompt caché, même
+streaming qu'en prod) et mesure, pour chaque tour appelant :
+
+- `llm_first_token_ms` : délai du premier morceau streamé
+- `llm_ms`             : durée jusqu'à la décision (coupure anticipée
+                         dès que `say` est fermé)
+
+Affiche p50 / p95 / max, et les compare aux `latency_ms` déjà mesurées
+en prod sur les mêmes appels (webhook → TwiML).
+
+Usage (depuis backend/, clés IA configurées en env) :
+    python -m scripts.secretary_replay_bench --calls 20
+    python -m scripts.secretary_replay_bench --calls 50 --json bench.json
+
+Aucune écriture en base : lecture seule des appels + appels IA.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import List, Optional
+
+from sqlalchemy import select
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.integrations.voice.secretary import decide_next_turn  # noqa: E402
+from app.models.voice import Call, CallTurn  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+log = logging.getLogger("secretary_replay_bench")
+
+
+def _percentile(values: List[int], pct: float) -> Optional[int]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _summary(values: List[int]) -> dict:
+    return {
+        "n": len(values),
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "max": max(values) if values else None,
+    }
+
+
+async def _load_histories(limit: int) -> list[tuple[Call, list[CallTurn]]]:
+    async with AsyncSessionLocal() as db:
+        call_ids = (
+            await db.execute(
+                select(CallTurn.call_id)
+                .where(CallTurn.role == "user")
+                .group_by(CallTurn.call_id)
+                .order_by(CallTurn.call_id.desc())
+                .limit(limit)
+            )
+        ).scalars().all()
+        out = []
+        for call_id in call_ids:
+            call = await db.get(Call, call_id)
+            if call is None:
+                continue
+            turns = (
+                await db.execute(
+                    select(CallTurn)
+                    .where(CallTurn.call_id == call_id)
+                    .order_by(CallTurn.turn_index)
+                )
+            ).scalars().all()
+            out.append((call, list(turns)))
+        return out
+
+
+async def main(limit: int, json_path: Optional[str]) -> int:
+    started = time.monotonic()
+    histories = await _load_histories(limit)
+    log.info("Rejeu de %d appel(s)…", len(histories))
+
+    first_tokens: List[int] = []
+    llm_totals: List[int] = []
+    prod_latencies: List[int] = []
+    for call, turns in histories:
+        prod_latencies.extend(
+            t.latency_ms for t in turns if t.latency_ms is not None
+        )
+        for i, turn in enumerate(turns):
+            if turn.role != "user":
+                continue
+            history = [(t.role, t.text) for t in turns[: i + 1]]
+            decision = await decide_next_turn(
+                history=history,
+                current_turn_count=len(history),
+                caller_e164=call.from_e164 or "",
+            )
+            if decision.llm_ms is None:
+                continue  # repli (max tours / IA indisponible)
+            llm_totals.append(decision.llm_ms)
+            if decision.llm_first_token_ms is not None:
+                first_tokens.append(decision.llm_first_token_ms)
+
+    report = {
+        "calls": len(histories),
+        "replay_llm_first_token_ms": _summary(first_tokens),
+        "replay_llm_ms": _summary(llm_totals),
+        "prod_turn_latency_ms": _summary(prod_latencies),
+        "elapsed_s": round(time.monotonic() - started, 1),
+    }
+    log.info(json.dumps(report, indent=2))
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.calls, args.json_path)))
@@ -0,0 +1,69 @@
+"""Livre des soldes Feuille de temps — reconstruction et contrôle.
+
+Le dashboard Paies lit ``timesheet_balances``, tenu à jour par deltas à
+chaque écriture (``app.services.timesheet_ledger``). Ce script :
+
+- ``--check``   compare le livre au recalcul complet depuis l'historique
+                et liste les écarts (code de sortie 1 s'il y en a) ;
+- ``--rebuild`` réécrit le livre depuis l'historique (tout, ou les
+                employés passés par ``--user``).
+
+Usage (depuis backend/) :
+    python -m scripts.timesheet_ledger --check
+    python -m scripts.timesheet_ledger --rebuild
+    python -m scripts.timesheet_ledger --rebuild --user 12 --user 14
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.services.timesheet_ledger import (  # noqa: E402
+    check_balances,
+    rebuild_balances,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+log = logging.getLogger("timesheet_ledger")
+
+
+async def _run(rebuild: bool, users: Optional[List[int]]) -> int:
+    async with AsyncSessionLocal() as db:
+        if rebuild:
+            n = await rebuild_balances(db, users)
+            await db.commit()
+            log.info("Livre reconstruit : %s ligne(s)", n)
+            return 0
+        issues = await check_balances(db)
+    for i in issues:
+        log.warning(
+            "Écart employé %(user_id)s / compagnie %(company_id)s — "
+            "%(field)s : livre %(ledger)s ≠ historique %(expected)s",
+            i,
+        )
+    log.info("%s écart(s)", len(issues))
+    return 1 if issues else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--check", action="store_true")
+    mode.add_argument("--rebuild", action="store_true")
+    parser.add_argument(
+        "--user", type=int, action="append", help="employé (répétable)"
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.rebuild, args.user)))
+
+
+if __name__ == "__main__":
+    main()
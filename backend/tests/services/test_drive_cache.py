@@ -0,0 +1,162 @@
+"""Tests du cache de métadonnées Drive (drive_cache via drive_api).
+
+Faux client Drive en mémoire : on compte les appels Google pour vérifier
+que listing, métadonnées et breadcrumbs sont servis par le cache, et que
+``changes.list`` comme les mutations Kratos invalident ce qu'il faut.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.services import drive_api, drive_cache
+
+
+class _Req:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeDrive:
+    """Arborescence root > A > B (+ fichier f1 dans B)."""
+
+    def __init__(self) -> None:
+        self.items = {
+            "root": {"id": "root", "name": "Mon Drive", "parents": []},
+            "A": {"id": "A", "name": "Clients", "parents": ["root"]},
+            "B": {"id": "B", "name": "Dupont", "parents": ["A"]},
+            "f1": {"id": "f1", "name": "bail.pdf", "parents": ["B"],
+                   "mimeType": "application/pdf"},
+        }
+        self.calls: list[str] = []
+        self.pending_changes: list[dict] = []
+
+    # -- files() --
+    def files(self):
+        return self
+
+    def get(self, fileId, **_kw):
+        def run():
+            self.calls.append(f"get:{fileId}")
+            return dict(self.items[fileId])
+        return _Req(run)
+
+    def list(self, q, **_kw):
+        folder = q.split("'")[1]
+
+        def run():
+            self.calls.append(f"list:{folder}")
+            return {"files": [
+                dict(f) for f in self.items.values()
+                if folder in f.get("parents", [])
+            ]}
+        return _Req(run)
+
+    def update(self, fileId, body=None, **_kw):
+        def run():
+            self.calls.append(f"update:{fileId}")
+            self.items[fileId].update(body or {})
+            return dict(self.items[fileId])
+        return _Req(run)
+
+    # -- changes() --
+    def changes(self):
+        return _Changes(self)
+
+
+class _Changes:
+    def __init__(self, drive: FakeDrive) -> None:
+        self.drive = drive
+
+    def getStartPageToken(self, **_kw):
+        def run():
+            self.drive.calls.append("start_token")
+            return {"startPageToken": "1"}
+        return _Req(run)
+
+    def list(self, pageToken, **_kw):
+        def run():
+            self.drive.calls.append(f"changes:{pageToken}")
+            changes, self.drive.pending_changes = self.drive.pending_changes, []
+            return {"changes": changes, "newStartPageToken": str(int(pageToken) + 1)}
+        return _Req(run)
+
+
+@pytest.fixture
+def drive(monkeypatch):
+    fake = FakeDrive()
+
+    async def fake_service(user_id, db):
+        return fake
+
+    monkeypatch.setattr(drive_api, "get_drive_service", fake_service)
+    drive_cache.invalidate_drive_cache()
+    yield fake
+    drive_cache.invalidate_drive_cache()
+
+
+def _expire_sync(user_id: int = 1) -> None:
+    drive_cache._caches[user_id].synced_at = 0.0
+
+
+def test_breadcrumbs_memoises(drive):
+    path = asyncio.run(drive_api.get_folder_path(1, None, "B"))
+    assert [s["name"] for s in path] == ["Mon Drive", "Clients", "Dupont"]
+    assert drive.calls == ["start_token", "get:B", "get:A", "get:root"]
+
+    drive.calls.clear()
+    assert asyncio.run(drive_api.get_folder_path(1, None, "B")) == path
+    # Ancêtres déjà connus : aucun files.get pour le chemin de A.
+    assert [s["id"] for s in asyncio.run(
+        drive_api.get_folder_path(1, None, "A")
+    )] == ["root", "A"]
+    assert asyncio.run(drive_api.get_file_metadata(1, None, "A"))["name"] == "Clients"
+    assert drive.calls == []
+
+
+def test_listing_servi_par_le_cache_puis_invalide_par_changes(drive):
+    first = asyncio.run(drive_api.list_folder_contents(1, None, "B"))
+    assert [f["id"] for f in first["files"]] == ["f1"]
+    asyncio.run(drive_api.list_folder_contents(1, None, "B"))
+    asyncio.run(drive_api.get_file_metadata(1, None, "f1"))
+    assert drive.calls == ["start_token", "list:B"]
+
+    # Renommage fait ailleurs (web Drive) : remonté par changes.list.
+    asyncio.run(drive_api.get_folder_path(1, None, "B"))
+    drive.items["A"]["name"] = "Clients 2026"
+    drive.pending_changes = [{"fileId": "A", "file": dict(drive.items["A"])}]
+    _expire_sync()
+    drive.calls.clear()
+    path = asyncio.run(drive_api.get_folder_path(1, None, "B"))
+    assert path[1]["name"] == "Clients 2026"
+    assert drive.calls[0] == "changes:1"
+    # Le listing de B n'est pas touché par un changement sur A.
+    asyncio.run(drive_api.list_folder_contents(1, None, "B"))
+    assert "list:B" not in drive.calls
+
+    # Fichier supprimé ailleurs : listing du parent invalidé.
+    drive.pending_changes = [{"fileId": "f1", "removed": True}]
+    del drive.items["f1"]
+    _expire_sync()
+    listing = asyncio.run(drive_api.list_folder_contents(1, None, "B"))
+    assert listing["files"] == []
+    assert drive_cache._caches[1].page_token == "3"
+
+
+def test_mutations_kratos_appliquees_sans_attendre(drive):
+    asyncio.run(drive_api.list_folder_contents(1, None, "B"))
+    asyncio.run(drive_api.rename_file(1, None, "f1", "bail-2026.pdf"))
+    drive.calls.clear()
+    listing = asyncio.run(drive_api.list_folder_contents(1, None, "B"))
+    assert [f["name"] for f in listing["files"]] == ["bail-2026.pdf"]
+    assert drive.calls == ["list:B"]
+
+    asyncio.run(drive_api.trash_file(1, None, "f1"))
+    assert drive_cache.get_file(drive_cache._caches[1], "f1") is None
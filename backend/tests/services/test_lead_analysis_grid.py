@@ -0,0 +1,139 @@
+"""Tests dorés du mode batch NumPy (lead_analysis_grid).
+
+Chaque cellule de la grille doit reproduire le moteur scalaire
+(`compute_all` + mapping TRI de la fiche + `compute_tri`) sur le cas
+Saint-Joseph, y compris avec APH 100, overrides, masquage et postes
+finançables. Tolérance : 1e-6 relatif sur les montants, 1e-6 absolu
+sur les TRI (bissection à 1e-9).
+"""
+
+import dataclasses
+import itertools
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.services.lead_analysis_finance import compute_all
+from app.services.lead_analysis_grid import compute_grid, irr_vec
+from app.services.lead_tri_calc import compute_tri, irr
+from test_lead_analysis_finance import make_saint_joseph_inputs
+
+
+PRIX = [1_500_000, 1_699_000, 1_900_000]
+TAUX = [0.0, 0.0375, 0.05]
+TGA = [0.04, 0.05]
+LOYERS = [0.9, 1.0, 1.15]
+MANUELS = {"capital": 600_000, "pct": 0.5, "cr_loyers": 0.03, "cr_dep": 0.03}
+
+
+def close(a: float, b: float, rel: float = 1e-6) -> bool:
+    return abs(a - b) <= rel * max(1.0, abs(b))
+
+
+def _scaled(inputs, prix, taux, tga, facteur):
+    return dataclasses.replace(
+        inputs,
+        prix_achat=prix,
+        taux_interet_refi=taux,
+        tga=tga,
+        revenus_annuels=inputs.revenus_annuels * facteur,
+        typologie_prix={k: v * facteur for k, v in inputs.typologie_prix.items()},
+        nouveau_loyer_abordable=inputs.nouveau_loyer_abordable * facteur,
+    )
+
+
+def _tri_scalaire(results: dict) -> dict:
+    from app.api.v1.endpoints.lead_analyses import _derive_tri_auto_inputs
+
+    r = compute_tri(**_derive_tri_auto_inputs(results), **MANUELS)
+    return r["tri"]
+
+
+def _assert_grid_matches(inputs, use_aph_select: bool) -> None:
+    grid = compute_grid(
+        inputs,
+        use_aph_select=use_aph_select,
+        prix_achat=PRIX,
+        taux_interet_refi=TAUX,
+        tga=TGA,
+        facteur_loyers=LOYERS,
+        tri_manuels=MANUELS,
+    )
+    g = grid.grids
+    assert grid.shape == (3, 3, 2, 3)
+    for (i, p), (j, t), (k, tg), (m, f) in itertools.product(
+        enumerate(PRIX), enumerate(TAUX), enumerate(TGA), enumerate(LOYERS)
+    ):
+        cell = (i, j, k, m)
+        res = compute_all(_scaled(inputs, p, t, tg, f), use_aph_select=use_aph_select)
+        assert close(g["prix_acquisition"][cell], res.prix_acquisition)
+        assert close(g["mdf_preteur_b"][cell], res.mdf_preteur_b)
+        assert close(g["achat_mdf_necessaire"][cell], res.achat.mdf_necessaire)
+        assert close(g["achat_cashflow_annuel"][cell], res.achat.cashflow_annuel)
+        for key in ("refi_schl", "refi_aph_50", "refi_aph_100"):
+            sc = getattr(res, key)
+            if sc is None:
+                assert f"{key}_financement" not in g
+                continue
+            assert close(g[f"{key}_financement"][cell], sc.financement)
+            assert close(g[f"{key}_equite_a_la_fin"][cell], sc.equite_a_la_fin)
+            assert close(g[f"{key}_cashflow_annuel"][cell], sc.cashflow_annuel)
+        assert close(g["best_refi_amount"][cell], res.best_refi_amount)
+        assert grid.programs[g["best_refi_index"][cell]] == res.best_refi_program
+
+        tri = _tri_scalaire(res.to_dict())
+        for h in (2, 7, 12):
+            expected = tri[f"an{h}"]
+            got = g[f"tri_an{h}"][cell]
+            if expected is None:
+                assert math.isnan(got)
+            else:
+                assert abs(got - expected) <= 1e-6, (cell, h, got, expected)
+
+
+def test_grille_saint_joseph_officiel():
+    _assert_grid_matches(make_saint_joseph_inputs(), use_aph_select=False)
+
+
+def test_grille_saint_joseph_aph_select_et_frais():
+    inputs = make_saint_joseph_inputs()
+    inputs.nouveau_loyer_abordable = 1_100
+    inputs.frais_demarrage_financables = [
+        "rapport_efficacite", "frais_travaux", "perso_pct",
+    ]
+    inputs.frais_demarrage_overrides = {"inspection": 2_000}
+    inputs.frais_masques = ["notaire_2"]
+    inputs.frais_custom_defs = [
+        {"id": "perso_pct", "type_montant": "pct_prix_achat", "valeur": 0.5},
+        {"id": "perso_fin", "type_montant": "pct_financement", "valeur": 1},
+        {"id": "perso_fixe", "type_montant": "fixe", "valeur": 750},
+    ]
+    _assert_grid_matches(inputs, use_aph_select=True)
+
+
+def test_axes_absents_reprennent_la_fiche():
+    inputs = make_saint_joseph_inputs()
+    grid = compute_grid(inputs, use_aph_select=False)
+    assert grid.shape == (1, 1, 1, 1)
+    res = compute_all(inputs, use_aph_select=False)
+    assert close(grid.grids["best_refi_amount"][0, 0, 0, 0], res.best_refi_amount)
+    assert "tri_an2" not in grid.grids  # pas de capital → pas de TRI
+    assert grid.to_dict()["shape"] == [1, 1, 1, 1]
+
+
+def test_irr_vec_identique_au_scalaire():
+    rng = np.random.default_rng(42)
+    flows = rng.normal(20_000, 40_000, size=(200, 13))
+    flows[:, 0] = -rng.uniform(100_000, 500_000, size=200)
+    flows[:5] = np.abs(flows[:5])  # tous positifs → pas de racine
+    got = irr_vec(flows)
+    for row, g in zip(flows, got):
+        expected = irr(list(row))
+        if expected is None:
+            assert math.isnan(g)
+        else:
+            assert abs(g - expected) <= 1e-6
@@ -0,0 +1,179 @@
+"""Tests de l'index compilé du template d'offre (offre_investissement_pptx).
+
+Template synthétique fabriqué avec python-pptx (zones de texte, runs
+coupés, sauts de ligne, tables) : les substitutions appliquées via
+l'index doivent donner exactement le même document que le parcours
+complet ``_replace_in_slide``, en ne visitant que les cadres qui
+contiennent la chaîne cherchée. Chronométrage :
+``python -m scripts.offre_pptx_bench``.
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from lxml import etree
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.services import offre_investissement_pptx as offre
+from app.services.offre_investissement_pptx import (
+    _apply_substitutions,
+    _compile_template,
+    _replace_in_slide,
+    _template_index,
+)
+
+SLIDES = 12
+BOXES = 30
+ROWS, COLS = 12, 6
+
+
+def _template() -> bytes:
+    """Comme le vrai template : surtout des libellés fixes, quelques
+    montants/dates de l'exemple à substituer."""
+    prs = Presentation()
+    layout = prs.slide_layouts[6]
+    for s in range(SLIDES):
+        slide = prs.slides.add_slide(layout)
+        for b in range(BOXES):
+            tf = slide.shapes.add_textbox(
+                Inches(0.1), Inches(0.1), Inches(2), Inches(0.3)
+            ).text_frame
+            tf.text = f"Libellé fixe {s}.{b}"
+            tf.add_paragraph().text = "Texte de présentation du projet"
+        tf = slide.shapes.add_textbox(
+            Inches(0.1), Inches(0.1), Inches(2), Inches(0.3)
+        ).text_frame
+        tf.text = "Prix demandé — 1 200 000$"
+        para = tf.add_paragraph()
+        # Montant coupé en deux runs : trouvé via les runs joints.
+        para.add_run().text = "Total 375 "
+        para.add_run().text = "000$"
+        # Saut de ligne : trouvé seulement via le texte du cadre.
+        tf.add_paragraph().text = "Loyer\vmoyen 953$"
+        slide.shapes.add_textbox(
+            Inches(0.1), Inches(0.1), Inches(2), Inches(0.3)
+        ).text_frame.text = "Valeur 1 200 000$"
+        table = slide.shapes.add_table(
+            ROWS, COLS, Inches(1), Inches(3), Inches(8), Inches(3)
+        ).table
+        for r in range(ROWS):
+            for c in range(COLS):
+                table.cell(r, c).text = f"Poste {r}.{c}"
+        table.cell(1, 1).text = "M1.1 – Juillet 2026"
+        table.cell(2, 1).text = "M3.2 – Juillet 2026"
+        table.cell(3, 2).text = "Création chambres"
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+
+def _substitutions():
+    subs = []
+    for s in range(SLIDES):
+        subs += [
+            (s, "1 200 000$", "1 450 000$", "all"),
+            (s, "375 000$", "410 000$", "first"),
+            (s, "953$", "1 010$", "first"),
+            (s, "Création chambres", "Rencontres", "first"),
+            # Chaîne : le texte produit par une sub est cherché par la suivante.
+            (s, "Rencontres", "Rencontres avec locataires", "first"),
+            (s, "M3.2 – Juillet 2026", "M3.2 – Mars 2027", "first"),
+            (s, "Juillet 2026", "Août 2026", "all"),
+            (s, "absent du template", "x", "first"),
+            (s, "", "ignoré", "first"),
+            (s, "953$", "953$", "first"),
+        ]
+    subs.append((SLIDES + 3, "1 200 000$", "hors limites", "all"))
+    return subs
+
+
+def _full_walk(blob, subs):
+    prs = Presentation(io.BytesIO(blob))
+    for slide_idx, find, replace, dupe in subs:
+        if not find or find == replace or slide_idx >= len(prs.slides):
+            continue
+        _replace_in_slide(prs.slides[slide_idx], find, replace, dupe)
+    return prs
+
+
+def _compiled(index, subs):
+    prs = Presentation(io.BytesIO(index.blob))
+    _apply_substitutions(prs, index, subs)
+    return prs
+
+
+def _texts(prs) -> bytes:
+    out = []
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                out.append(shape.text_frame.text)
+            if shape.has_table:
+                for row in shape.table.rows:
+                    out.extend(cell.text for cell in row.cells)
+    return "\n".join(out).encode("utf-8")
+
+
+def test_index_equivalent_au_parcours_complet():
+    blob = _template()
+    subs = _substitutions()
+    ref = _full_walk(blob, subs)
+    got = _compiled(_compile_template(blob), subs)
+
+    assert _texts(got) == _texts(ref)
+    assert "1 450 000$" in _texts(got).decode()
+    assert "Rencontres avec locataires" in _texts(got).decode()
+    # Au-delà du texte : XML des slides identique (runs, paragraphes).
+    for a, b in zip(got.slides, ref.slides):
+        assert etree.tostring(a._element) == etree.tostring(b._element)
+
+
+def test_index_ne_visite_que_les_cadres_concernes(monkeypatch):
+    blob = _template()
+    subs = _substitutions()
+    index = _compile_template(blob)
+    real = offre._safe_replace_in_text_frame
+    visits = []
+
+    def _counting(tf, find, replace):
+        n = real(tf, find, replace)
+        visits.append(n)
+        return n
+
+    monkeypatch.setattr(offre, "_safe_replace_in_text_frame", _counting)
+    ref = _full_walk(blob, subs)
+    full = len(visits)
+    visits.clear()
+    got = _compiled(index, subs)
+
+    assert _texts(got) == _texts(ref)
+    # Chaque cadre visité via l'index reçoit un remplacement : aucun
+    # parcours à vide, là où le parcours complet lit toute la slide.
+    assert visits and all(visits)
+    assert full > 20 * len(visits)
+
+
+def test_index_recompile_si_le_template_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(offre, "_TEMPLATE_INDEXES", {})
+    path = tmp_path / "horizon_test.pptx"
+    path.write_bytes(_template())
+
+    first = _template_index(path)
+    assert _template_index(path) is first
+
+    prs = Presentation(io.BytesIO(first.blob))
+    prs.slides[0].shapes.add_textbox(
+        Inches(0), Inches(0), Inches(1), Inches(1)
+    ).text_frame.text = "Nouveau"
+    prs.save(str(path))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+    second = _template_index(path)
+    assert second is not first
+    assert len(second.slides[0]) == len(first.slides[0]) + 1
+    assert list(offre._TEMPLATE_INDEXES.values()) == [second]
@@ -0,0 +1,147 @@
+"""Tests du traitement PDF sous budget mémoire (pdf_documents).
+
+PDF générés avec reportlab ; le rendu poppler est remplacé par un faux
+``convert_from_path`` qui fabrique l'image demandée — on vérifie le
+rendu page par page, la résolution adaptative, le budget et les caches
+par empreinte sans dépendre de ``pdftoppm``.
+"""
+
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.core.config import settings
+from app.services import pdf_documents
+from app.services.pdf_documents import (
+    PdfDocument,
+    adaptive_dpi,
+    iter_page_images,
+    page_count,
+    page_texts,
+    render_page_png,
+)
+
+
+def _pdf(pages: int, size=(612, 792)) -> bytes:
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=size)
+    for n in range(pages):
+        c.drawString(72, 700, f"Bail page {n + 1}")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def _clean_caches(monkeypatch):
+    for name in ("_PAGE_COUNTS", "_TEXTS"):
+        monkeypatch.setattr(pdf_documents, name, pdf_documents.OrderedDict())
+
+
+class FakePoppler:
+    def __init__(self) -> None:
+        self.calls: list[tuple[int, int, int]] = []
+        self.open_images: list = []
+
+    def __call__(self, path, dpi, first_page, last_page, grayscale, **kw):
+        from PIL import Image
+
+        assert os.path.exists(path)
+        self.calls.append((first_page, last_page, dpi))
+        mode = "L" if grayscale else "RGB"
+        img = Image.new(mode, (int(8.5 * dpi), 11 * dpi))
+        self.open_images.append(img)
+        return [img]
+
+
+@pytest.fixture
+def poppler(monkeypatch):
+    import pdf2image
+
+    fake = FakePoppler()
+    monkeypatch.setattr(pdf2image, "convert_from_path", fake)
+    return fake
+
+
+def test_nombre_de_pages_et_texte_en_cache(monkeypatch):
+    blob = _pdf(5)
+    assert page_count(blob) == 5
+    assert page_texts(blob)[2].strip() == "Bail page 3"
+
+    # Même empreinte : plus aucune lecture pypdf.
+    def _boom(self):
+        raise AssertionError("relu")
+
+    monkeypatch.setattr(PdfDocument, "reader", _boom)
+    assert page_count(blob) == 5
+    assert len(page_texts(blob)) == 5
+
+
+def test_upload_spoole_par_morceaux(monkeypatch):
+    class Upload:
+        def __init__(self, data: bytes) -> None:
+            self._buf = io.BytesIO(data)
+            self.reads: list[int] = []
+
+        async def read(self, n: int = -1) -> bytes:
+            self.reads.append(n)
+            return self._buf.read(n)
+
+    monkeypatch.setattr(settings, "pdf_spool_memory_kb", 1)
+    monkeypatch.setattr(pdf_documents, "CHUNK_BYTES", 512)
+    blob = _pdf(40)
+    up = Upload(blob)
+    with asyncio.run(PdfDocument.from_upload(up)) as doc:
+        assert all(n == 512 for n in up.reads)
+        assert doc._stream._rolled  # au-delà de 1 Ko : sur disque
+        assert doc.size == len(blob)
+        assert page_count(doc) == 40
+        path = doc.path()
+        assert os.path.getsize(path) == len(blob)
+    assert not os.path.exists(path)
+
+    with pytest.raises(ValueError):
+        asyncio.run(PdfDocument.from_upload(Upload(blob), max_bytes=1000))
+
+
+def _closed(img) -> bool:
+    try:
+        img.im
+    except ValueError:
+        return True
+    return False
+
+
+def test_rendu_paresseux_une_page_a_la_fois(poppler):
+    seen = []
+    for n, img in iter_page_images(_pdf(4), dpi=100, grayscale=True):
+        # La page précédente est déjà fermée et rendue au budget.
+        assert all(_closed(i) for i in poppler.open_images[:-1])
+        assert pdf_documents._budget.in_use == int(8.5 * 11 * 100 * 100)
+        seen.append(n)
+    assert seen == [1, 2, 3, 4]
+    assert poppler.calls == [(n, n, 100) for n in range(1, 5)]
+    assert pdf_documents._budget.in_use == 0
+
+
+def test_dpi_adaptatif_sous_budget(poppler, monkeypatch):
+    monkeypatch.setattr(settings, "pdf_render_budget_mb", 8)
+    # Lettre RGB à 300 dpi ≈ 25 Mo → descend pour tenir dans 8 Mo.
+    dpi = adaptive_dpi(8.5, 11, 300, 3)
+    assert 8.5 * 11 * dpi * dpi * 3 <= 8 * 1024 * 1024
+    assert pdf_documents.MIN_DPI <= dpi < 300
+    # Plan 36×48 po : plancher, jamais en dessous.
+    assert adaptive_dpi(36, 48, 300, 3) == pdf_documents.MIN_DPI
+
+    png = render_page_png(_pdf(2), 2, dpi=300)
+    assert png.startswith(b"\x89PNG")
+    assert poppler.calls == [(2, 2, dpi)]
+    with pytest.raises(ValueError):
+        render_page_png(_pdf(2), 3)
@@ -0,0 +1,75 @@
+"""Tests du moteur de tour streamé de la secrétaire IA (secretary).
+
+- `parse_partial_decision` ne rend une décision qu'une fois la chaîne
+  `say` FERMÉE (échappements compris) et l'objet tronqué valide.
+- `decide_next_turn` coupe le flux dès que la décision est complète et
+  envoie le prompt statique comme préfixe cacheable (`cached_system`).
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.integrations.voice import secretary
+from app.integrations.voice.secretary import parse_partial_decision
+
+
+FULL = (
+    '{"lang": "fr-CA", "intent": "information", "lead_name": null, '
+    '"intake_data": {"type_travaux": "cuisine"}, "next_action": "continue", '
+    '"say": "Oui, on fait les \\"cuisines\\" complètes."}'
+)
+
+
+def test_pas_de_decision_tant_que_say_est_ouvert():
+    cut = FULL.index("complètes")
+    assert parse_partial_decision(FULL[:cut]) is None
+    assert parse_partial_decision('{"lang": "fr-CA", "say": "Bonjour"') is None
+
+
+def test_decision_des_que_say_est_ferme():
+    # Flux coupé juste après la fermeture de `say` (sans le `}` final).
+    decision = parse_partial_decision(FULL[:-1])
+    assert decision is not None
+    assert decision.next_action == "continue"
+    assert decision.say == 'Oui, on fait les "cuisines" complètes.'
+    assert decision.intake_data == {"type_travaux": "cuisine"}
+
+
+def test_book_slot_attend_chosen_slot_index():
+    partial = '{"next_action": "book_slot", "say": "Parfait."'
+    assert parse_partial_decision(partial) is None
+    partial = '{"chosen_slot_index": 1, "next_action": "book_slot", "say": "Ok."'
+    decision = parse_partial_decision(partial)
+    assert decision is not None and decision.chosen_slot_index == 1
+
+
+def test_decide_next_turn_coupe_le_flux(monkeypatch):
+    pieces = [FULL[i : i + 7] for i in range(0, len(FULL), 7)]
+    pieces.append(" TEXTE QUI NE DOIT PAS ÊTRE LU")
+    consumed: list[str] = []
+    seen_kwargs: dict = {}
+
+    async def fake_stream(**kwargs):
+        seen_kwargs.update(kwargs)
+        for p in pieces:
+            consumed.append(p)
+            yield p
+
+    monkeypatch.setattr(secretary, "chat_stream", fake_stream)
+    decision = asyncio.run(
+        secretary.decide_next_turn(
+            history=[("user", "Vous faites les cuisines ?")],
+            current_turn_count=1,
+            caller_e164="+15145550000",
+            identity_context="Appelant inconnu.",
+        )
+    )
+    assert decision.next_action == "continue"
+    assert decision.llm_ms is not None
+    assert decision.llm_first_token_ms is not None
+    assert pieces[-1] not in consumed
+    assert seen_kwargs["cached_system"] == secretary.SECRETARY_SYSTEM_PROMPT
+    assert "Appelant inconnu." in seen_kwargs["system"]
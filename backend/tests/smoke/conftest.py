@@ -24,6 +24,7 @@ NE MODIFIE AUCUN CODE DE PRODUCTION — fixtures de test uniquement.
 from __future__ import annotations
 
 import asyncio
+import contextlib
 from typing import Any, Optional
 
 import pytest
@@ -47,6 +48,8 @@ import httpx
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.api.api_key_deps import hash_api_key
+from app.core import request_metrics
+from app.core.config import settings
 from app.core.security import create_access_token, get_password_hash
 from app.db.base import Base
 from app.db.session import engine as app_engine
@@ -292,3 +295,31 @@ def employee_headers(employee_id) -> dict:
 def api_key_headers() -> dict:
     """Auth par clé d'API krts_… (connecteur / MCP)."""
     return {"Authorization": f"Bearer {API_KEY_PLAINTEXT}"}
+
+
+@pytest.fixture
+def query_budget():
+    """Budget SQL d'un bloc d'appels (un ou plusieurs endpoints) :
+
+        with query_budget(8):
+            client.get("/api/v1/…")
+
+    Échoue si le bloc exécute plus de ``max_queries`` instructions, ou
+    si une même forme de requête y revient ``max_repeats`` fois (N+1 ;
+    défaut ``settings.query_repeat_threshold``). Le message liste les
+    formes les plus fréquentes."""
+
+    @contextlib.contextmanager
+    def _budget(max_queries: int, *, max_repeats: Optional[int] = None):
+        with request_metrics.track() as stats:
+            yield stats
+        top = "\n".join(
+            f"  {n}× {shape[:160]}" for shape, n in stats.shapes.most_common(5)
+        )
+        assert stats.queries <= max_queries, (
+            f"{stats.queries} requêtes SQL (budget {max_queries}) :\n{top}"
+        )
+        repeated = stats.repeated(max_repeats or settings.query_repeat_threshold)
+        assert not repeated, f"N+1 probable :\n{top}"
+
+    return _budget
@@ -0,0 +1,107 @@
+"""Smoke — instantané d'accès (auth sans requête).
+
+- 2ᵉ requête authentifiée : ni ``users`` ni ``user_access_overrides`` ne
+  sont relus (``get_current_user`` + ``require_volet`` servis par
+  l'instantané) ;
+- un commit qui modifie les volets invalide l'instantané tout de suite ;
+- un ``delete()`` ORM en masse sur une table suivie invalide tout ;
+- une notification d'un autre worker (payload du canal) incrémente les
+  mêmes versions.
+"""
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import delete, event
+
+from app.db.session import engine as app_engine
+from app.models.user import User
+from app.models.user_immeuble import UserImmeuble
+from app.services import access_snapshot
+
+from .conftest import TestSessionLocal
+
+
+class _Statements:
+    def __init__(self) -> None:
+        self.sql: list[str] = []
+
+    def __enter__(self):
+        event.listen(app_engine.sync_engine, "before_cursor_execute", self._on)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(app_engine.sync_engine, "before_cursor_execute", self._on)
+
+    def _on(self, conn, cursor, statement, *args) -> None:
+        self.sql.append(statement)
+
+    def touching(self, table: str) -> list[str]:
+        return [s for s in self.sql if f"FROM {table}" in s]
+
+
+def _set_volets(run, user_id: int, volets) -> None:
+    async def _do():
+        async with TestSessionLocal() as s:
+            u = await s.get(User, user_id)
+            u.volets_json = json.dumps(volets) if volets is not None else None
+            await s.commit()
+
+    run(_do())
+
+
+def test_auth_servie_par_l_instantane(client, employee_headers, employee_id):
+    access_snapshot.invalidate_access_snapshots()
+    url = "/api/v1/devlog/soumissions"
+    first = client.get(url, headers=employee_headers)
+
+    with _Statements() as q:
+        again = client.get(url, headers=employee_headers)
+    assert again.status_code == first.status_code
+    assert q.touching("users") == []
+    assert q.touching("user_access_overrides") == []
+
+    me = client.get("/api/v1/auth/me", headers=employee_headers)
+    assert me.status_code == 200
+    assert me.json()["access"]["volet:prospection"] is True
+
+
+def test_commit_invalide_l_instantane(
+    run, client, employee_headers, employee_id
+):
+    access_snapshot.invalidate_access_snapshots()
+    client.get("/api/v1/auth/me", headers=employee_headers)
+    assert employee_id in access_snapshot._snapshots
+    try:
+        _set_volets(run, employee_id, ["construction"])
+        assert employee_id not in access_snapshot._snapshots
+        me = client.get("/api/v1/auth/me", headers=employee_headers).json()
+        assert me["access"]["volet:prospection"] is False
+    finally:
+        _set_volets(run, employee_id, None)
+
+
+def test_delete_en_masse_et_notification(
+    run, client, employee_headers, employee_id
+):
+    client.get("/api/v1/auth/me", headers=employee_headers)
+    assert employee_id in access_snapshot._snapshots
+
+    async def _bulk():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(UserImmeuble).where(UserImmeuble.user_id == -1)
+            )
+            await s.commit()
+
+    run(_bulk())
+    assert access_snapshot._snapshots == {}
+
+    # Notification d'un autre worker : version de l'utilisateur ciblé.
+    client.get("/api/v1/auth/me", headers=employee_headers)
+    stamp = access_snapshot._stamp(employee_id)
+    access_snapshot._on_notify(None, 0, access_snapshot.CHANNEL, f"{employee_id}")
+    assert access_snapshot._stamp(employee_id) == (stamp[0], stamp[1] + 1)
+    assert employee_id not in access_snapshot._snapshots
+    access_snapshot._on_notify(None, 0, access_snapshot.CHANNEL, "*")
+    assert access_snapshot._stamp(employee_id)[0] == stamp[0] + 1
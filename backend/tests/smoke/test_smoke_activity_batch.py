@@ -0,0 +1,210 @@
+"""Smoke — activité / lecture détaillée à nombre de requêtes fixe.
+
+- ``_collect_tasks`` + ``_collect_audit`` (même ``BatchLoader``) : une
+  plage de 30 jours coûte autant de requêtes qu'une journée, assignés et
+  entités visées par l'audit compris ;
+- ``load_entities_full`` : N soumissions (lead, client, modules, items)
+  en une requête par type ; scope et introuvables renvoyés par ref.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, event, select
+
+from app.api.v1.endpoints.activity import (
+    _collect_audit,
+    _collect_tasks,
+    _resolve_window,
+    load_entities_full,
+)
+from app.db.session import engine as app_engine
+from app.models.audit_log import AuditLog
+from app.models.devlog_client import DevlogClient
+from app.models.devlog_lead import DevlogLead
+from app.models.devlog_soumission import DevlogSoumission
+from app.models.devlog_soumission_item import DevlogSoumissionItem
+from app.models.devlog_soumission_module import DevlogSoumissionModule
+from app.models.entreprise import Entreprise
+from app.models.entreprise_tache import EntrepriseTache
+from app.models.user import User
+from app.services.entity_loader import BatchLoader
+
+from .conftest import ADMIN_EMAIL, TestSessionLocal
+
+ENT_NAME = "Lot Activité Smoke"
+DAYS = 20
+
+
+class _Statements:
+    def __init__(self) -> None:
+        self.sql: list[str] = []
+
+    def __enter__(self):
+        event.listen(app_engine.sync_engine, "before_cursor_execute", self._on)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(app_engine.sync_engine, "before_cursor_execute", self._on)
+
+    def _on(self, conn, cursor, statement, *args) -> None:
+        self.sql.append(statement)
+
+
+class _AllScopes:
+    def has_scope(self, scope: str) -> bool:
+        return not scope.startswith("entreprise:")
+
+
+@pytest.fixture
+def activite(run, admin_id):
+    async def _purge():
+        async with TestSessionLocal() as s:
+            ent_ids = (
+                await s.execute(
+                    select(Entreprise.id).where(Entreprise.name == ENT_NAME)
+                )
+            ).scalars().all()
+            await s.execute(
+                delete(EntrepriseTache).where(
+                    EntrepriseTache.entreprise_id.in_(ent_ids)
+                )
+            )
+            await s.execute(delete(Entreprise).where(Entreprise.id.in_(ent_ids)))
+            await s.execute(delete(AuditLog).where(AuditLog.action == "smoke.batch"))
+            await s.commit()
+
+    async def _setup():
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        async with TestSessionLocal() as s:
+            ent = Entreprise(name=ENT_NAME)
+            s.add(ent)
+            await s.flush()
+            tasks = []
+            for d in range(DAYS):
+                at = now - timedelta(days=d, minutes=5)
+                t = EntrepriseTache(
+                    entreprise_id=ent.id,
+                    title=f"Tâche lot {d}",
+                    assignee_user_id=admin_id,
+                    created_at=at,
+                    updated_at=at,
+                )
+                s.add(t)
+                tasks.append((t, at))
+            await s.flush()
+            for t, at in tasks:
+                s.add(
+                    AuditLog(
+                        user_id=admin_id,
+                        action="smoke.batch",
+                        entity_type="entreprise_tache",
+                        entity_id=t.id,
+                        created_at=at,
+                    )
+                )
+            await s.commit()
+
+    run(_purge())
+    run(_setup())
+    yield
+    run(_purge())
+
+
+def _activity(run, user_id: int, **window):
+    async def _go():
+        async with TestSessionLocal() as s:
+            user = await s.get(User, user_id)
+            start, end = _resolve_window(None, **window)
+            loader = BatchLoader(s)
+            with _Statements() as st:
+                tasks = await _collect_tasks(s, user, start, end, loader=loader)
+                audit = await _collect_audit(s, user, start, end, loader=loader)
+            return tasks, audit, len(st.sql)
+
+    return run(_go())
+
+
+def test_plage_longue_cout_fixe(run, admin_id, activite):
+    today = datetime.now().date()
+    _, _, one_day = _activity(
+        run, admin_id, date_from=today.isoformat(), date_to=today.isoformat()
+    )
+    tasks, audit, month = _activity(
+        run,
+        admin_id,
+        date_from=(today - timedelta(days=30)).isoformat(),
+        date_to=today.isoformat(),
+    )
+    ours = [t for t in tasks if t.title.startswith("Tâche lot")]
+    assert len(ours) >= DAYS - 1
+    assert month == one_day
+    # Assigné résolu (propriétaire de la clé, déjà en mémoire).
+    assert ours[0].entity["assignee"] == {"user_id": admin_id, "name": ADMIN_EMAIL}
+    batch = [a for a in audit if a.action == "smoke.batch"]
+    assert len(batch) >= DAYS - 1
+    assert all(a.entity["label"].startswith("Tâche lot") for a in batch)
+
+
+def test_details_soumissions_en_lot(run):
+    async def _go():
+        async with TestSessionLocal() as s:
+            client = DevlogClient(name="Client lot")
+            lead = DevlogLead(name="Lead lot")
+            s.add_all([client, lead])
+            await s.flush()
+            soums = [
+                DevlogSoumission(
+                    title=f"Soumission lot {n}",
+                    client_id=client.id,
+                    lead_id=lead.id,
+                )
+                for n in range(5)
+            ]
+            s.add_all(soums)
+            await s.flush()
+            for so in soums:
+                for p in (2, 1):
+                    s.add(
+                        DevlogSoumissionModule(
+                            soumission_id=so.id, name=f"Module {p}", position=p
+                        )
+                    )
+                    s.add(
+                        DevlogSoumissionItem(
+                            soumission_id=so.id, description=f"Item {p}", position=p
+                        )
+                    )
+            await s.commit()
+            ids = [so.id for so in soums]
+
+        async def _load(refs):
+            async with TestSessionLocal() as s:
+                with _Statements() as st:
+                    out = await load_entities_full(s, _AllScopes(), refs)
+                return out, len(st.sql)
+
+        one, n_one = await _load([("soumission", ids[0])])
+        many, n_many = await _load(
+            [("soumission", i) for i in ids]
+            + [("entreprise", 1), ("deal", 10**9), ("inconnu", 1)]
+        )
+        async with TestSessionLocal() as s:
+            await s.execute(delete(DevlogSoumission).where(DevlogSoumission.id.in_(ids)))
+            await s.execute(delete(DevlogClient).where(DevlogClient.id == client.id))
+            await s.execute(delete(DevlogLead).where(DevlogLead.id == lead.id))
+            await s.commit()
+        return one, n_one, many, n_many
+
+    one, n_one, many, n_many = run(_go())
+    # soumissions + leads + clients + modules + items, puis deals (absent).
+    assert n_one == 5
+    assert n_many == 6
+    first = one[0]
+    assert first["client"]["name"] == "Client lot"
+    assert [m["name"] for m in first["modules"]] == ["Module 1", "Module 2"]
+    assert [d["title"] for d in many[:5]] == [f"Soumission lot {n}" for n in range(5)]
+    assert isinstance(many[5], PermissionError)
+    assert isinstance(many[6], LookupError)
+    assert isinstance(many[7], ValueError)
@@ -0,0 +1,229 @@
+"""Smoke — générations IA quotidiennes sensibles aux changements.
+
+- daily pulse : les appels IA partent en parallèle sous la limite du
+  fournisseur ; le lendemain, une entreprise inchangée recopie son
+  briefing (même ``input_hash``) sans appel IA, une entreprise qui a
+  bougé est regénérée ;
+- Kratos : scan inchangé → problèmes réutilisés ; fallback local → pas
+  d'empreinte, l'IA est rappelée au scan suivant ;
+- briefing global : persisté en base, reconduit sans appel IA tant que
+  l'état ne bouge pas (survit au redémarrage).
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.integrations.ai import CompletionResult
+from app.models.entreprise import Entreprise
+from app.models.entreprise_tache import EntrepriseTache, TacheStatus
+from app.models.kratos_problem import KratosProblem
+from app.models.qg_strategic import GlobalSummary, Summary
+from app.services import (
+    ai_briefings,
+    kratos_problem_detector,
+    qg_daily_pulse,
+    qg_global_pulse,
+)
+
+from .conftest import TestSessionLocal
+
+NAMES = [f"Briefing Smoke {n}" for n in range(4)]
+
+
+class _FakeAI:
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, *, prompt: str, **kw) -> CompletionResult:
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return CompletionResult(
+            text='{"headline": "H", "summary": "S", "highlights": ["a"]}',
+            model="fake",
+            provider="fake",
+        )
+
+    def calls_for(self, name: str) -> int:
+        return sum(1 for p in self.prompts if f"## Entreprise\n{name}\n" in p)
+
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    fake = _FakeAI()
+    monkeypatch.setattr(qg_daily_pulse, "complete", fake)
+    monkeypatch.setattr(qg_daily_pulse, "current_provider", lambda: "fake")
+    monkeypatch.setattr(qg_global_pulse, "complete", fake)
+    monkeypatch.setitem(ai_briefings.PROVIDER_LIMITS, "fake", (6000, 2))
+    monkeypatch.setattr(ai_briefings, "_buckets", {})
+    return fake
+
+
+@pytest.fixture
+def entreprises(run, seeded_users):
+    async def _setup():
+        async with TestSessionLocal() as s:
+            rows = [Entreprise(name=n) for n in NAMES]
+            s.add_all(rows)
+            await s.flush()
+            for e in rows:
+                s.add(
+                    EntrepriseTache(
+                        entreprise_id=e.id,
+                        title=f"Tâche {e.name}",
+                        status=TacheStatus.TODO.value,
+                    )
+                )
+            await s.commit()
+            return [e.id for e in rows]
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            ids = (
+                await s.execute(
+                    select(Entreprise.id).where(Entreprise.name.in_(NAMES))
+                )
+            ).scalars().all()
+            for model, col in (
+                (Summary, Summary.entreprise_id),
+                (KratosProblem, KratosProblem.entreprise_id),
+                (EntrepriseTache, EntrepriseTache.entreprise_id),
+            ):
+                await s.execute(delete(model).where(col.in_(ids)))
+            await s.execute(delete(Entreprise).where(Entreprise.id.in_(ids)))
+            await s.execute(delete(GlobalSummary))
+            await s.commit()
+
+    run(_purge())
+    yield run(_setup())
+    run(_purge())
+
+
+def _in_session(run, fn):
+    async def _go():
+        async with TestSessionLocal() as s:
+            out = await fn(s)
+            await s.commit()
+            return out
+
+    return run(_go())
+
+
+def _shift(run, stmt, attr: str, days: int):
+    """Recule ``attr`` de ``days`` jours (calcul Python : SQLite ne sait
+    pas soustraire un intervalle)."""
+
+    async def _go(s):
+        for row in (await s.execute(stmt)).scalars().all():
+            setattr(row, attr, getattr(row, attr) - timedelta(days=days))
+
+    _in_session(run, _go)
+
+
+def test_daily_pulse_parallele_et_reutilise(run, fake_ai, entreprises):
+    _in_session(run, lambda s: qg_daily_pulse.generate_for_all_active(s))
+    assert all(fake_ai.calls_for(n) == 1 for n in NAMES)
+    assert fake_ai.max_in_flight == 2
+
+    # Le lendemain : rien n'a bougé sauf la tâche de la 1re entreprise.
+    _shift(
+        run,
+        select(Summary).where(Summary.entreprise_id.in_(entreprises)),
+        "period_start",
+        1,
+    )
+
+    async def _touch(s):
+        await s.execute(
+            update(EntrepriseTache)
+            .where(EntrepriseTache.entreprise_id == entreprises[0])
+            .values(title="Tâche renommée")
+        )
+
+    _in_session(run, _touch)
+    fake_ai.prompts.clear()
+    out = _in_session(run, lambda s: qg_daily_pulse.generate_for_all_active(s))
+    assert fake_ai.calls_for(NAMES[0]) == 1
+    assert all(fake_ai.calls_for(n) == 0 for n in NAMES[1:])
+    assert out["reused"] >= 3
+
+    async def _load(s):
+        rows = (
+            await s.execute(
+                select(Summary)
+                .where(Summary.entreprise_id == entreprises[1])
+                .order_by(Summary.period_start)
+            )
+        ).scalars().all()
+        return [(r.headline, r.input_hash) for r in rows]
+
+    (h1, hash1), (h2, hash2) = _in_session(run, _load)
+    assert h1 == h2 == "H" and hash1 == hash2 is not None
+
+
+def test_kratos_reutilise_ou_rappelle(run, entreprises, monkeypatch):
+    calls: list[int] = []
+    fail = {"on": True}
+
+    async def _claude(ent, state):
+        calls.append(ent.id)
+        if fail["on"]:
+            raise RuntimeError("quota")
+        return [{"title": "Problème IA", "severity": "high"}]
+
+    monkeypatch.setattr(kratos_problem_detector, "_call_claude", _claude)
+    ent_id = entreprises[0]
+
+    def _scan():
+        return _in_session(
+            run,
+            lambda s: kratos_problem_detector.detect_for_entreprise(
+                s, ent_id, force=False
+            ),
+        )
+
+    def _age():
+        _shift(
+            run,
+            select(KratosProblem).where(KratosProblem.entreprise_id == ent_id),
+            "created_at",
+            2,
+        )
+
+    # 1) IA en panne → fallback local, sans empreinte.
+    assert len(_scan()) >= 3
+    _age()
+    # 2) État inchangé, mais le fallback n'a pas d'empreinte → rappel IA.
+    fail["on"] = False
+    assert [p.title for p in _scan()] == ["Problème IA"]
+    _age()
+    # 3) État inchangé depuis le scan réussi → réutilisé, pas d'appel.
+    assert [p.title for p in _scan()] == ["Problème IA"]
+    assert calls == [ent_id, ent_id]
+
+
+def test_briefing_global_persiste(run, fake_ai, entreprises):
+    first = _in_session(
+        run, lambda s: qg_global_pulse.get_or_generate_global_pulse(s)
+    )
+    assert first.headline == "H" and len(fake_ai.prompts) == 1
+
+    # Hier, même état : reconduit depuis la base (pas de cache mémoire).
+    _shift(run, select(GlobalSummary), "period_start", 1)
+    again = _in_session(
+        run, lambda s: qg_global_pulse.get_or_generate_global_pulse(s)
+    )
+    assert again.headline == "H" and len(fake_ai.prompts) == 1
+
+    forced = _in_session(
+        run, lambda s: qg_global_pulse.get_or_generate_global_pulse(s, force=True)
+    )
+    assert forced.headline == "H" and len(fake_ai.prompts) == 2
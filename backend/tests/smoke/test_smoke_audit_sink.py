@@ -0,0 +1,239 @@
+"""Smoke — journal d'audit tamponné (``services/audit``).
+
+- seuil de taille : ``flush_rows`` entrées → un INSERT multi-lignes ;
+- seuil de temps : moins d'entrées, écrites après ``flush_interval_s`` ;
+- ordre : les lignes sortent dans l'ordre des ``enqueue``, même avec
+  des flushs concurrents ;
+- ``drain()`` (arrêt de l'app) écrit tout, minuteur compris ;
+- ``log_action`` : tamponné au commit, jeté au rollback, écrit dans la
+  transaction avec ``transactional=True`` ;
+- une ligne invalide n'empêche pas l'écriture du reste du lot ;
+- hors du lifespan de l'API (cron ``python -m app.jobs.…``), le tampon
+  n'est pas actif : les lignes d'audit du job sont écrites.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.models.audit_log import AuditLog
+from app.models.employe import Employe
+from app.models.punch import Punch
+from app.services import audit
+from app.services.audit import AuditSink, log_action
+
+from .conftest import TestSessionLocal
+
+PREFIX = "smoke.audit."
+
+
+@pytest.fixture
+def purge(run, db_setup):
+    yield
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(AuditLog).where(AuditLog.action.like(f"{PREFIX}%")))
+            await s.commit()
+
+    run(_purge())
+
+
+def _rows(n: int, tag: str) -> list[dict]:
+    return [
+        audit._row(None, f"{PREFIX}{tag}", "smoke", i, {"i": i}) for i in range(n)
+    ]
+
+
+async def _logged(tag: str) -> list[int]:
+    async with TestSessionLocal() as s:
+        return list(
+            (
+                await s.execute(
+                    select(AuditLog.entity_id)
+                    .where(AuditLog.action == f"{PREFIX}{tag}")
+                    .order_by(AuditLog.id)
+                )
+            ).scalars()
+        )
+
+
+async def _settle(sink: AuditSink) -> None:
+    for _ in range(20):
+        await asyncio.sleep(0)
+    while sink._tasks:
+        await asyncio.gather(*list(sink._tasks))
+
+
+def test_seuil_de_taille(run, purge):
+    sink = AuditSink(flush_rows=50, flush_interval_s=60, session_factory=TestSessionLocal)
+
+    async def _go():
+        sink.enqueue(_rows(49, "taille"))
+        await _settle(sink)
+        assert await _logged("taille") == [] and sink.pending == 49
+        sink.enqueue(_rows(1, "taille"))
+        await _settle(sink)
+        assert sink.pending == 0 and sink.inserts == 1
+        assert sink._timer is None
+        return await _logged("taille")
+
+    assert run(_go()) == list(range(49)) + [0]
+
+
+def test_seuil_de_temps(run, purge):
+    sink = AuditSink(flush_rows=1000, flush_interval_s=0.05, session_factory=TestSessionLocal)
+
+    async def _go():
+        sink.enqueue(_rows(3, "temps"))
+        await asyncio.sleep(0.01)
+        sink.enqueue(_rows(2, "temps"))  # ne réarme pas le minuteur
+        assert await _logged("temps") == []
+        await asyncio.sleep(0.1)
+        await _settle(sink)
+        assert sink.pending == 0 and sink.inserts == 1
+        return await _logged("temps")
+
+    assert run(_go()) == [0, 1, 2, 0, 1]
+
+
+def test_ordre_avec_flushs_concurrents(run, purge):
+    sink = AuditSink(flush_rows=10, flush_interval_s=60, session_factory=TestSessionLocal)
+
+    async def _go():
+        for start in range(0, 95, 5):
+            sink.enqueue(
+                [audit._row(None, f"{PREFIX}ordre", "smoke", start + i, None) for i in range(5)]
+            )
+            if start % 15 == 0:
+                await asyncio.sleep(0)  # laisse démarrer un flush en vol
+        await sink.drain()
+        return await _logged("ordre")
+
+    assert run(_go()) == list(range(95))
+
+
+def test_drain_a_l_arret(run, purge):
+    sink = AuditSink(flush_rows=1000, flush_interval_s=3600, session_factory=TestSessionLocal)
+
+    async def _go():
+        sink.enqueue(_rows(7, "arret"))
+        assert sink._timer is not None
+        written = await sink.drain()
+        assert sink._timer is None and sink.pending == 0
+        return written, await _logged("arret")
+
+    assert run(_go()) == (7, list(range(7)))
+
+
+def test_ligne_invalide_ecartee(run, purge):
+    sink = AuditSink(flush_rows=1000, flush_interval_s=3600, session_factory=TestSessionLocal)
+
+    async def _go():
+        rows = _rows(4, "invalide")
+        rows[2]["action"] = None  # NOT NULL
+        sink.enqueue(rows)
+        assert await sink.drain() == 3
+        return await _logged("invalide")
+
+    assert run(_go()) == [0, 1, 3]
+
+
+def test_log_action_commit_rollback_transactionnel(run, purge, monkeypatch):
+    sink = AuditSink(flush_rows=1000, flush_interval_s=3600, session_factory=TestSessionLocal)
+    monkeypatch.setattr(audit, "audit_sink", sink)
+    sink.start()
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            await log_action(s, user=None, action=f"{PREFIX}commit", entity_id=1)
+            await s.commit()
+            await log_action(s, user=None, action=f"{PREFIX}rollback", entity_id=2)
+            await s.rollback()
+            await log_action(
+                s, user=None, action=f"{PREFIX}tx", entity_id=3, transactional=True
+            )
+            # Écrite dans la transaction : visible avant le commit.
+            inline = (
+                await s.execute(
+                    select(AuditLog.entity_id).where(AuditLog.action == f"{PREFIX}tx")
+                )
+            ).scalars().all()
+            await s.commit()
+        assert inline == [3]
+        assert sink.pending == 1
+        assert await _logged("commit") == []
+        await sink.drain()
+        return (
+            await _logged("commit"),
+            await _logged("rollback"),
+            await _logged("tx"),
+        )
+
+    assert run(_go()) == ([1], [], [3])
+
+
+def test_log_action_sans_tampon_actif_ecrit_dans_la_transaction(run, purge):
+    assert not audit.audit_sink.active  # aucun lifespan dans les smoke
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            await log_action(s, user=None, action=f"{PREFIX}direct", entity_id=5)
+            await s.commit()
+        return audit.audit_sink.pending, await _logged("direct")
+
+    assert run(_go()) == (0, [5])
+
+
+def test_cron_main_ecrit_son_audit(run, db_setup):
+    """``punch_auto_close.main()`` (``asyncio.run``) dans un process à
+    part, comme sur Render : sa ligne ``punch.auto_closed`` doit exister
+    une fois le process terminé."""
+
+    async def _seed() -> int:
+        async with TestSessionLocal() as s:
+            emp = Employe(full_name="Smoke Audit Cron")
+            s.add(emp)
+            await s.flush()
+            punch = Punch(
+                employe_id=emp.id,
+                started_at=datetime.now(timezone.utc) - timedelta(days=2),
+            )
+            s.add(punch)
+            await s.commit()
+            return punch.id
+
+    punch_id = run(_seed())
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from app.jobs import punch_auto_close; punch_auto_close.main()",
+        ],
+        cwd=Path(__file__).resolve().parents[2],
+        env=os.environ.copy(),
+        check=True,
+        timeout=120,
+    )
+
+    async def _audit() -> list[int]:
+        async with TestSessionLocal() as s:
+            return list(
+                (
+                    await s.execute(
+                        select(AuditLog.entity_id).where(
+                            AuditLog.action == "punch.auto_closed",
+                            AuditLog.entity_id == punch_id,
+                        )
+                    )
+                ).scalars()
+            )
+
+    assert run(_audit()) == [punch_id]
@@ -0,0 +1,168 @@
+"""Smoke — blog public en cache (``blog_cache``) et recherche plein texte.
+
+- liste, article, sitemap : la deuxième requête avec ``If-None-Match``
+  (ou ``If-Modified-Since``) répond ``304`` sans corps, et le rendu
+  n'est pas refait ;
+- une modification d'article commitée par ce process vide le cache :
+  nouvel ETag, nouveau contenu ;
+- ``/blog/search`` : résultats classés (titre > corps), tous les termes
+  requis — repli LIKE sous SQLite.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, event, select
+
+from app.models.seo_article import SeoArticle
+from app.services import blog_cache
+
+from .conftest import TestSessionLocal
+
+PREFIX = "smoke-cache-"
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def articles(run, db_setup):
+    blog_cache.invalidate()
+
+    async def _seed():
+        async with TestSessionLocal() as s:
+            rows = [
+                ("toiture-laval", "Réfection de toiture à Laval",
+                 "Bardeaux, membrane et ventilation de l'entretoit."),
+                ("cuisine-mtl", "Rénovation de cuisine à Montréal",
+                 "Armoires, comptoirs et une toiture de terrasse en bonus."),
+                ("sous-sol", "Finition de sous-sol",
+                 "Isolation, gypse et drain français."),
+                ("toiture-couts", "Combien coûte une toiture ?",
+                 "Le prix d'une toiture dépend des bardeaux choisis."),
+            ]
+            for n, (slug, title, body) in enumerate(rows):
+                s.add(
+                    SeoArticle(
+                        slug=PREFIX + slug,
+                        locale="fr",
+                        title=title,
+                        meta_description=title,
+                        content_md=body * 5,
+                        target_city="Laval" if "laval" in slug else "Montréal",
+                        target_service="toiture",
+                        published=True,
+                        published_at=NOW - timedelta(days=n),
+                    )
+                )
+            await s.commit()
+
+    run(_seed())
+    yield
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(SeoArticle).where(SeoArticle.slug.like(f"{PREFIX}%"))
+            )
+            await s.commit()
+
+    run(_purge())
+    blog_cache.invalidate()
+
+
+@pytest.fixture
+def selects():
+    """Compte les lectures d'articles complets (rendus)."""
+    loaded: list[int] = []
+
+    def _on_load(target, _ctx):
+        loaded.append(target.id)
+
+    event.listen(SeoArticle, "load", _on_load)
+    yield loaded
+    event.remove(SeoArticle, "load", _on_load)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/v1/blog?locale=fr&city=Laval",
+        f"/api/v1/blog/{PREFIX}sous-sol",
+        "/api/v1/blog/sitemap",
+    ],
+)
+def test_304_sur_requete_repetee(client, articles, selects, url):
+    first = client.get(url)
+    assert first.status_code == 200, first.text
+    etag = first.headers["etag"]
+    assert "s-maxage=" in first.headers["cache-control"]
+    assert first.headers["last-modified"]
+    rendered = len(selects)
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    since = client.get(
+        url, headers={"If-Modified-Since": first.headers["last-modified"]}
+    )
+    assert since.status_code == 304
+
+    plain = client.get(url)
+    assert plain.status_code == 200
+    assert plain.content == first.content
+    assert len(selects) == rendered  # servi depuis le cache
+
+
+def test_edition_invalide_le_cache(run, client, articles):
+    url = f"/api/v1/blog/{PREFIX}sous-sol"
+    first = client.get(url)
+    etag = first.headers["etag"]
+
+    async def _edit():
+        async with TestSessionLocal() as s:
+            art = (
+                await s.execute(
+                    select(SeoArticle).where(
+                        SeoArticle.slug == f"{PREFIX}sous-sol"
+                    )
+                )
+            ).scalar_one()
+            art.title = "Finition de sous-sol (mise à jour)"
+            await s.commit()
+
+    run(_edit())
+    after = client.get(url, headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert after.json()["title"].endswith("(mise à jour)")
+
+
+def test_recherche_classee(client, articles):
+    resp = client.get("/api/v1/blog/search", params={"q": "toiture"})
+    assert resp.status_code == 200, resp.text
+    hits = [h for h in resp.json() if h["slug"].startswith(PREFIX)]
+    # Titre + corps, puis titre seul, puis corps seul ; l'article sans
+    # le terme est absent.
+    assert [h["slug"] for h in hits] == [
+        f"{PREFIX}toiture-couts",
+        f"{PREFIX}toiture-laval",
+        f"{PREFIX}cuisine-mtl",
+    ]
+    assert hits[0]["rank"] > hits[2]["rank"]
+
+    both = client.get(
+        "/api/v1/blog/search", params={"q": "toiture bardeaux"}
+    ).json()
+    assert {h["slug"] for h in both if h["slug"].startswith(PREFIX)} == {
+        f"{PREFIX}toiture-laval",
+        f"{PREFIX}toiture-couts",
+    }
+
+    again = client.get(
+        "/api/v1/blog/search",
+        params={"q": "toiture"},
+        headers={"If-None-Match": resp.headers["etag"]},
+    )
+    assert again.status_code == 304
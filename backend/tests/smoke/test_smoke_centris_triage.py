@@ -0,0 +1,131 @@
+"""Smoke — triage Centris en lot.
+
+`triage_recent_listings` charge les comparables de loyer de toutes les
+FSA du lot et les unités MTL (via `search_key`) en deux requêtes, puis
+score chaque annonce sur ces données partagées.
+"""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import event, select
+
+from app.db.session import engine as app_engine
+from app.integrations.roles_evaluation.montreal import make_search_key
+from app.models.centris_listing import CentrisListing
+from app.models.montreal_property_unit import MontrealPropertyUnit
+from app.models.prospection_lead import ProspectionLead
+from app.models.rental_listing import RentalListing
+from app.services import centris_triage
+
+from .conftest import TestSessionLocal
+
+
+@pytest.fixture(scope="module")
+def triage_seed(run, seeded_users) -> list[int]:
+    async def _seed() -> list[int]:
+        async with TestSessionLocal() as s:
+            for n, (beds, price) in enumerate(
+                [(2, 1400), (2, 1500), (2, 1600), (1, 900), (3, 2100)]
+            ):
+                s.add(
+                    RentalListing(
+                        source_url=f"https://kijiji.test/triage-smoke/{n}",
+                        source="kijiji",
+                        postal_code="h9z 1a1",
+                        bedrooms=beds,
+                        price=price,
+                    )
+                )
+            s.add(
+                MontrealPropertyUnit(
+                    matricule="9999-99-0001-0-000-0000",
+                    civique_debut="7701",
+                    nom_rue="Saint-Triage",
+                    nombre_logement=6,
+                    annee_construction=1962,
+                    search_key=make_search_key("7701", "Rue Saint-Triage"),
+                )
+            )
+            ids = []
+            for n, (civique, units) in enumerate(
+                [("7701", None), ("7703", 4), ("7705", None)]
+            ):
+                lst = CentrisListing(
+                    source_url=f"https://centris.test/triage-smoke/{n}",
+                    mls_id=f"9900770{n}",
+                    address=f"{civique} rue Saint-Triage, Montréal",
+                    civique=civique,
+                    nom_rue="rue Saint-Triage",
+                    city="Montréal",
+                    postal_code="H9Z 2B2",
+                    price=450_000,
+                    nb_units=units,
+                )
+                s.add(lst)
+                await s.flush()
+                ids.append(lst.id)
+            await s.commit()
+            return ids
+
+    return run(_seed())
+
+
+def test_contexte_charge_en_deux_requetes(run, triage_seed):
+    async def _ctx():
+        async with TestSessionLocal() as s:
+            listings = (
+                await s.execute(
+                    select(CentrisListing).where(
+                        CentrisListing.id.in_(triage_seed)
+                    )
+                )
+            ).scalars().all()
+            queries = []
+
+            def _on(*args, **kwargs):
+                queries.append(args[2])
+
+            event.listen(app_engine.sync_engine, "before_cursor_execute", _on)
+            try:
+                ctx = await centris_triage.load_triage_context(s, listings)
+            finally:
+                event.remove(
+                    app_engine.sync_engine, "before_cursor_execute", _on
+                )
+            return ctx, len(queries)
+
+    ctx, count = run(_ctx())
+    assert count == 2
+    # Médiane des 3 « 4½ » de la FSA (les 1 et 3 chambres sont ignorées).
+    assert ctx.rent_for_fsa("H9Z") == 1500
+    unit = centris_triage._enrich_from_mtl(
+        CentrisListing(civique="7701", nom_rue="Saint-Triage"), ctx
+    )
+    assert unit is not None and unit.nombre_logement == 6
+
+
+def test_triage_recent_listings_lot(run, triage_seed):
+    async def _triage():
+        async with TestSessionLocal() as s:
+            summary = await centris_triage.triage_recent_listings(s)
+            leads = (
+                await s.execute(
+                    select(ProspectionLead).where(
+                        ProspectionLead.address.like("77__ rue Saint-Triage%")
+                    )
+                )
+            ).scalars().all()
+            return summary, leads
+
+    summary, leads = run(_triage())
+    assert summary["processed"] == 3
+    assert summary["created"] == 2
+    assert summary["skipped"] == 1
+    by_addr = {lead.address.split(" ")[0]: lead for lead in leads}
+    # 7705 : ni nb_units ni unité MTL → sauté faute de données.
+    assert set(by_addr) == {"7701", "7703"}
+    # 7701 : # logements, année et matricule tirés du rôle MTL (search_key).
+    assert by_addr["7701"].matricule == "9999-99-0001-0-000-0000"
+    assert by_addr["7701"].nb_logements == 6
+    assert by_addr["7701"].annee_construction == 1962
+    assert by_addr["7703"].matricule is None
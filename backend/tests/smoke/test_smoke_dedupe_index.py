@@ -0,0 +1,261 @@
+"""Smoke — dédup incrémentale des achats / factures (``dedupe_index``).
+
+50 000 achats indexés par une reconstruction complète, puis 100 nouveaux
+(doublons « Sur compte » ré-importés, reçus Rona au format long, achats
+inédits) et une modification / suppression d'achats existants : la passe
+incrémentale ne charge que les blocs candidats, supprime les bons
+doublons, et laisse l'index avec EXACTEMENT les grappes d'une
+reconstruction complète.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import delete, event, insert, select
+
+from app.models.achat import Achat
+from app.models.dedupe_index import DedupeEntry, DedupeFingerprint
+from app.models.facture import Facture
+from app.services.achat_dedupe import dedupe_achats
+from app.services.facture_dedupe import dedupe_factures
+
+from .conftest import TestSessionLocal
+
+BASE = 5_000_000
+SEEDED = 50_000
+FOURNISSEURS = 200
+# updated_at explicite dans le passé : une modification pendant le test
+# change forcément la valeur (CURRENT_TIMESTAMP SQLite à la seconde).
+OLD = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _achat_row(i: int, **over) -> dict:
+    row = {
+        "id": BASE + i,
+        "reference": f"A{i:06d}",
+        "supplier_invoice_number": f"{76000 + i % 97}-{i:07d}",
+        "fournisseur_id": i % FOURNISSEURS + 1,
+        "kind": "material",
+        "description": f"Matériaux {i}",
+        "amount": float(100 + i % 900),
+        "amount_taxes": round((100 + i % 900) * 0.14975, 2),
+        "invoice_date": date(2025, 1 + i % 12, 1 + i % 28),
+        "status": "paid",
+        "payment_method": "cheque",
+        "qbo_bill_id": f"Q{i}" if i % 2 else None,
+        "project_id": None,
+        "is_billable": True,
+        "billable_manual": False,
+        "updated_at": OLD,
+    }
+    row.update(over)
+    return row
+
+
+async def _clusters(s, scope: str) -> dict:
+    rows = await s.execute(
+        select(DedupeEntry.entity_id, DedupeEntry.cluster_id).where(
+            DedupeEntry.scope == scope
+        )
+    )
+    return dict(rows.all())
+
+
+@pytest.fixture
+def purge(run, db_setup):
+    yield
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(Achat).where(Achat.id > BASE))
+            await s.execute(delete(Facture).where(Facture.id > BASE))
+            await s.execute(delete(DedupeEntry))
+            await s.execute(delete(DedupeFingerprint))
+            await s.commit()
+
+    run(_purge())
+
+
+def test_achats_incremental_egal_reconstruction(run, purge):
+    async def _seed():
+        async with TestSessionLocal() as s:
+            rows = [_achat_row(i) for i in range(1, SEEDED + 1)]
+            # Facture QB divisée sur deux projets : même transaction, même
+            # référence et montant → une grappe de 2 que le garde-fou
+            # conserve entière.
+            rows[10] = _achat_row(11, qbo_bill_id="SPLIT", project_id=1)
+            rows[11] = _achat_row(
+                12,
+                qbo_bill_id="SPLIT",
+                project_id=2,
+                reference="A000011",
+                amount=rows[10]["amount"],
+                amount_taxes=rows[10]["amount_taxes"],
+            )
+            for n in range(0, len(rows), 5000):
+                await s.execute(insert(Achat.__table__), rows[n : n + 5000])
+            await s.commit()
+        async with TestSessionLocal() as s:
+            assert await dedupe_achats(s, full=True) == 0
+            await s.commit()
+
+    run(_seed())
+
+    async def _changes():
+        async with TestSessionLocal() as s:
+            new = []
+            for k in range(40):
+                # Doublon « Sur compte » ré-importé sans fournisseur ni
+                # description : même référence + même TTC (signal 3).
+                src = _achat_row(100 + k * 997)
+                new.append(
+                    _achat_row(
+                        SEEDED + 1 + k,
+                        reference=src["reference"],
+                        supplier_invoice_number=None,
+                        fournisseur_id=None,
+                        description=None,
+                        amount=src["amount"],
+                        amount_taxes=src["amount_taxes"],
+                        status="unpaid",
+                        payment_method="bill_to_pay",
+                        qbo_bill_id=None,
+                    )
+                )
+            for k in range(20):
+                # Reçu Rona au format « long » zéro-paddé, montant à un
+                # cent près (signal 4).
+                i = 200 + k * 1999
+                src = _achat_row(i)
+                a, b = src["supplier_invoice_number"].split("-")
+                new.append(
+                    _achat_row(
+                        SEEDED + 41 + k,
+                        reference=f"{a}-0{b}",
+                        supplier_invoice_number=f"{a}-0{b}",
+                        fournisseur_id=src["fournisseur_id"],
+                        amount=src["amount"] + 0.01,
+                        amount_taxes=src["amount_taxes"],
+                        qbo_bill_id=None,
+                    )
+                )
+            for k in range(40):
+                new.append(_achat_row(SEEDED + 61 + k))  # inédits
+            await s.execute(insert(Achat.__table__), new)
+
+            # Achat existant modifié : devient le doublon exact d'un autre.
+            src = await s.get(Achat, BASE + 30_001)
+            moved = await s.get(Achat, BASE + 30_002)
+            moved.reference = src.reference
+            moved.amount = src.amount
+            moved.amount_taxes = src.amount_taxes
+            moved.supplier_invoice_number = None
+            moved.fournisseur_id = None
+            moved.qbo_bill_id = None
+            # Achat supprimé hors dédup.
+            await s.execute(delete(Achat).where(Achat.id == BASE + 40_000))
+            await s.commit()
+
+    run(_changes())
+
+    loaded: list[int] = []
+
+    def _on_load(target, _ctx):
+        loaded.append(target.id)
+
+    async def _incremental():
+        async with TestSessionLocal() as s:
+            event.listen(Achat, "load", _on_load)
+            try:
+                removed = await dedupe_achats(s)
+            finally:
+                event.remove(Achat, "load", _on_load)
+            await s.commit()
+            return removed, await _clusters(s, "achat")
+
+    removed, incremental = run(_incremental())
+    assert removed == 40 + 20 + 1
+    # Seuls les blocs candidats ont été lus : les 100 nouveaux, l'achat
+    # modifié, et leurs voisins par clé — pas les 50 000.
+    assert len(set(loaded)) < 400, len(set(loaded))
+
+    async def _full():
+        async with TestSessionLocal() as s:
+            assert await dedupe_achats(s, full=True) == 0
+            await s.commit()
+            return await _clusters(s, "achat")
+
+    full = run(_full())
+    assert incremental == full
+    assert full[BASE + 12] == full[BASE + 11] == BASE + 11
+    assert BASE + SEEDED + 1 not in full  # doublon supprimé
+    assert BASE + 40_000 not in full
+
+    # Rien de neuf : la passe suivante ne lit aucun achat.
+    loaded.clear()
+
+    async def _idle():
+        async with TestSessionLocal() as s:
+            event.listen(Achat, "load", _on_load)
+            try:
+                return await dedupe_achats(s)
+            finally:
+                event.remove(Achat, "load", _on_load)
+
+    assert run(_idle()) == 0
+    assert loaded == []
+
+
+def test_factures_incremental_egal_reconstruction(run, purge):
+    async def _run():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                insert(Facture.__table__),
+                [
+                    {
+                        "id": BASE + i,
+                        "reference": f"S-{i}",
+                        "total": float(500 + i),
+                        "status": "sent",
+                        "updated_at": OLD,
+                    }
+                    for i in range(1, 2001)
+                ],
+            )
+            await s.commit()
+        async with TestSessionLocal() as s:
+            assert await dedupe_factures(s, full=True) == 0
+            await s.commit()
+        async with TestSessionLocal() as s:
+            # Facture poussée dans QB puis ré-importée « QB-… ».
+            await s.execute(
+                insert(Facture.__table__),
+                [
+                    {
+                        "id": BASE + 3000 + k,
+                        "reference": f"QB-{9000 + k}",
+                        "qbo_doc_number": f"S-{k * 50 + 1}",
+                        "qbo_invoice_id": f"INV{k}",
+                        "total": float(500 + k * 50 + 1),
+                        "status": "paid",
+                        "updated_at": OLD,
+                    }
+                    for k in range(30)
+                ],
+            )
+            await s.commit()
+        async with TestSessionLocal() as s:
+            removed = await dedupe_factures(s)
+            await s.commit()
+            incremental = await _clusters(s, "facture")
+            kept = await s.get(Facture, BASE + 1)
+            assert kept.qbo_invoice_id == "INV0" and kept.status == "paid"
+        async with TestSessionLocal() as s:
+            assert await dedupe_factures(s, full=True) == 0
+            await s.commit()
+            return removed, incremental, await _clusters(s, "facture")
+
+    removed, incremental, full = run(_run())
+    assert removed == 30
+    assert incremental == full
@@ -0,0 +1,142 @@
+"""Smoke — cache des pages eSign (``esign_pages``).
+
+- un document fraîchement téléversé : parcourir toutes ses pages deux
+  fois ne rastérise qu'au premier passage, côté éditeur comme côté
+  page publique du signataire (même contenu = mêmes pages) ;
+- le travail ``esign.prerender_pages`` mis en file à la création rend
+  tout d'avance : aucun rendu à l'affichage, géométrie des pages prête
+  pour ``build_final_pdf``.
+
+Le rendu poppler est remplacé par un faux ``convert_from_path`` qui
+compte les rastérisations (pas de ``pdftoppm`` requis).
+"""
+from __future__ import annotations
+
+import io
+import secrets
+
+import pytest
+from sqlalchemy import delete
+
+from app.models.background_job import BackgroundJob
+from app.models.esign import EsignPageImage, EsignSigner
+from app.services import esign_pages, job_queue
+
+from .conftest import TestSessionLocal
+
+PAGES = 4
+
+
+def _pdf(tag: str) -> bytes:
+    from reportlab.pdfgen import canvas
+
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(612, 792))
+    for n in range(PAGES):
+        c.drawString(72, 700, f"Bail {tag} — page {n + 1}")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+class _Poppler:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, path, dpi, first_page, last_page, grayscale, **kw):
+        from PIL import Image
+
+        self.calls += 1
+        return [Image.new("RGB", (int(8.5 * dpi), 11 * dpi), "white")]
+
+
+@pytest.fixture
+def poppler(monkeypatch, run):
+    import pdf2image
+
+    fake = _Poppler()
+    monkeypatch.setattr(pdf2image, "convert_from_path", fake)
+    yield fake
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(EsignPageImage))
+            await s.execute(
+                delete(BackgroundJob).where(
+                    BackgroundJob.kind == esign_pages.PRERENDER_JOB
+                )
+            )
+            await s.commit()
+
+    run(_purge())
+
+
+def _upload(client, auth_headers, tag: str) -> dict:
+    resp = client.post(
+        "/api/v1/esign/documents",
+        headers=auth_headers,
+        files={"file": (f"{tag}.pdf", _pdf(tag), "application/pdf")},
+        data={"title": f"Bail {tag}"},
+    )
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+def _open_all(client, url: str, headers=None) -> list[bytes]:
+    out = []
+    for n in range(1, PAGES + 1):
+        resp = client.get(f"{url}/{n}", headers=headers or {})
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"] == "image/png"
+        out.append(resp.content)
+    return out
+
+
+def test_deuxieme_passage_sans_rasterisation(run, client, auth_headers, poppler):
+    doc = _upload(client, auth_headers, "cache")
+    pages_url = f"/api/v1/esign/documents/{doc['id']}/pages"
+
+    first = _open_all(client, pages_url, auth_headers)
+    assert poppler.calls == PAGES
+    second = _open_all(client, pages_url, auth_headers)
+    assert poppler.calls == PAGES
+    assert second == first
+
+    # Page publique du signataire : même contenu, même cache.
+    token = secrets.token_urlsafe(24)
+
+    async def _signer():
+        async with TestSessionLocal() as s:
+            s.add(
+                EsignSigner(
+                    document_id=doc["id"],
+                    order_index=0,
+                    first_name="Sig",
+                    last_name="Nataire",
+                    email="sig@example.com",
+                    signature_token=token,
+                )
+            )
+            await s.commit()
+
+    run(_signer())
+    assert _open_all(client, f"/api/v1/public/esign/{token}/pages") == first
+    assert poppler.calls == PAGES
+
+
+def test_pages_rendues_a_la_creation(run, client, auth_headers, poppler):
+    doc = _upload(client, auth_headers, "prerendu")
+    assert poppler.calls == 0  # l'upload n'attend pas le rendu
+
+    assert run(job_queue.run_pending("pdf")) >= 1
+    assert poppler.calls == PAGES
+
+    _open_all(client, f"/api/v1/esign/documents/{doc['id']}/pages", auth_headers)
+    assert poppler.calls == PAGES
+
+    async def _sizes():
+        async with TestSessionLocal() as s:
+            return await esign_pages.page_sizes(s, doc["sha256"])
+
+    sizes = run(_sizes())
+    assert sizes == {n: (612.0, 792.0) for n in range(1, PAGES + 1)}
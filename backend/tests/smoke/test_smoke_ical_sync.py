@@ -0,0 +1,222 @@
+"""Smoke — synchro iCal incrémentale (``ical_sync.sync_feeds``).
+
+- les flux sont récupérés en parallèle, au plus ``concurrency`` à la fois ;
+- GET conditionnel : un 304 ne réécrit aucun bloc ;
+- un événement déplacé = 1 insertion + 1 suppression, les autres blocs
+  gardent leur ligne ;
+- deux flux du même utilisateur ne s'écrasent plus l'un l'autre ;
+- lignes pliées (RFC 5545) reconstituées pendant la lecture en flux ;
+- quand la fenêtre d'import a avancé, le flux est relu sans validateurs
+  et les événements entrés dans la fenêtre sont importés.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import delete, select
+
+from app.models.calendar_sync import ExternalBusyBlock, UserCalendarFeed
+from app.services import ical_sync
+
+from .conftest import TestSessionLocal
+
+
+def _stamp(dt: datetime) -> str:
+    return dt.strftime("%Y%m%dT%H%M%SZ")
+
+
+def _ics(*starts: datetime) -> str:
+    lines = ["BEGIN:VCALENDAR"]
+    for s in starts:
+        lines += [
+            "BEGIN:VEVENT",
+            # DTSTART plié sur deux lignes physiques.
+            f"DTSTART:{_stamp(s)[:8]}",
+            f" {_stamp(s)[8:]}",
+            f"DTEND:{_stamp(s + timedelta(hours=1))}",
+            "SUMMARY:privé",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+class _Feeds:
+    def __init__(self) -> None:
+        self.bodies: dict[str, str] = {}
+        self.requests: list[httpx.Request] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        body = self.bodies[request.url.path]
+        etag = f'"{hash(body)}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, text=body, headers={"ETag": etag})
+
+
+@pytest.fixture
+def feeds(monkeypatch):
+    fake = _Feeds()
+    monkeypatch.setattr(
+        ical_sync,
+        "_http_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(fake)),
+    )
+    return fake
+
+
+@pytest.fixture
+def user_feeds(run, seeded_users, employee_id):
+    async def _setup():
+        async with TestSessionLocal() as s:
+            rows = [
+                UserCalendarFeed(
+                    user_id=employee_id, ics_url=f"https://cal.test/f{n}.ics"
+                )
+                for n in range(5)
+            ]
+            s.add_all(rows)
+            await s.commit()
+            return [r.id for r in rows]
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(ExternalBusyBlock).where(
+                    ExternalBusyBlock.user_id == employee_id
+                )
+            )
+            await s.execute(
+                delete(UserCalendarFeed).where(
+                    UserCalendarFeed.user_id == employee_id
+                )
+            )
+            await s.commit()
+
+    run(_purge())
+    ids = run(_setup())
+    yield ids
+    run(_purge())
+
+
+def _sync(run, ids: list[int]) -> dict:
+    async def _go():
+        async with TestSessionLocal() as s:
+            rows = (
+                await s.execute(
+                    select(UserCalendarFeed)
+                    .where(UserCalendarFeed.id.in_(ids))
+                    .order_by(UserCalendarFeed.id)
+                )
+            ).scalars().all()
+            stats = await ical_sync.sync_feeds(s, rows, concurrency=2)
+            await s.commit()
+            return stats
+
+    return run(_go())
+
+
+def _blocks(run, feed_id: int) -> list[tuple[int, datetime]]:
+    async def _load():
+        async with TestSessionLocal() as s:
+            rows = (
+                await s.execute(
+                    select(ExternalBusyBlock)
+                    .where(ExternalBusyBlock.feed_id == feed_id)
+                    .order_by(ExternalBusyBlock.start_at)
+                )
+            ).scalars().all()
+            return [(b.id, b.start_at.replace(tzinfo=None)) for b in rows]
+
+    return run(_load())
+
+
+def test_synchro_concurrente_conditionnelle_et_diff(run, feeds, user_feeds):
+    base = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    hours = [base + timedelta(hours=3 * n) for n in range(3)]
+    for n in range(5):
+        feeds.bodies[f"/f{n}.ics"] = _ics(*hours[: 1 + n % 3])
+
+    stats = _sync(run, user_feeds)
+    assert stats["synced"] == 5 and stats["failed"] == 0
+    assert stats["inserted"] == 1 + 2 + 3 + 1 + 2
+    assert feeds.max_in_flight == 2
+    # Les flux du même utilisateur coexistent.
+    assert len(_blocks(run, user_feeds[2])) == 3
+    assert len(_blocks(run, user_feeds[0])) == 1
+    assert _blocks(run, user_feeds[0])[0][1] == hours[0].replace(tzinfo=None)
+
+    # Rien n'a changé : 304 partout, aucune écriture.
+    feeds.requests.clear()
+    stats = _sync(run, user_feeds)
+    assert stats["unchanged"] == 5
+    assert stats["inserted"] == stats["removed"] == 0
+    assert all(r.headers.get("If-None-Match") for r in feeds.requests)
+
+    # Un événement déplacé : seul son bloc est remplacé.
+    before = _blocks(run, user_feeds[2])
+    moved = hours[2] + timedelta(days=2)
+    feeds.bodies["/f2.ics"] = _ics(hours[0], hours[1], moved)
+    stats = _sync(run, user_feeds)
+    assert stats["unchanged"] == 4
+    assert (stats["inserted"], stats["removed"]) == (1, 1)
+    after = _blocks(run, user_feeds[2])
+    assert after[:2] == before[:2]
+    assert after[2][1] == moved.replace(tzinfo=None)
+
+
+def test_erreur_de_flux_isolee(run, feeds, user_feeds):
+    base = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(days=1)
+    for n in range(4):
+        feeds.bodies[f"/f{n}.ics"] = _ics(base)
+    # f4 absent → KeyError côté serveur simulé → erreur de fetch.
+    stats = _sync(run, user_feeds)
+    assert (stats["synced"], stats["failed"]) == (4, 1)
+
+    async def _err():
+        async with TestSessionLocal() as s:
+            return (await s.get(UserCalendarFeed, user_feeds[4])).last_sync_error
+
+    assert run(_err()).startswith("Fetch error")
+
+
+def test_fenetre_glissante_relit_le_flux(run, feeds, user_feeds, monkeypatch):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    near, far = now + timedelta(days=1), now + timedelta(days=185)
+    for n in range(5):
+        feeds.bodies[f"/f{n}.ics"] = _ics(near, far)
+
+    stats = _sync(run, user_feeds)
+    assert stats["inserted"] == 5
+    assert len(_blocks(run, user_feeds[0])) == 1
+
+    # Même jour : 304 partout, l'événement lointain reste hors fenêtre.
+    feeds.requests.clear()
+    stats = _sync(run, user_feeds)
+    assert stats["unchanged"] == 5
+    assert all(r.headers.get("If-None-Match") for r in feeds.requests)
+
+    # La fenêtre a avancé (jours écoulés) : GET complet, sans validateurs,
+    # et l'événement désormais dans la fenêtre est importé.
+    monkeypatch.setattr(ical_sync, "_WINDOW_FUTURE_DAYS", 190)
+    feeds.requests.clear()
+    stats = _sync(run, user_feeds)
+    assert not any(r.headers.get("If-None-Match") for r in feeds.requests)
+    assert (stats["inserted"], stats["removed"]) == (5, 0)
+    assert _blocks(run, user_feeds[0])[1][1] == far.replace(tzinfo=None)
+
+    # Puis retour au GET conditionnel.
+    feeds.requests.clear()
+    stats = _sync(run, user_feeds)
+    assert stats["unchanged"] == 5
+    assert all(r.headers.get("If-None-Match") for r in feeds.requests)
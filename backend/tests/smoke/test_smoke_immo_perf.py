@@ -149,12 +149,16 @@ def immo_perf_seed(run, seeded_users) -> dict:
     return run(_seed())
 
 
-def test_renouvellements_overview_ok(client, auth_headers, immo_perf_seed):
+def test_renouvellements_overview_ok(
+    client, auth_headers, immo_perf_seed, query_budget
+):
     """L'aperçu renvoie 200 + les deux baux, avec la bonne résolution du
-    dernier renouvellement (le plus récent) et des jointures groupées."""
-    resp = client.get(
-        "/api/v1/immobilier/renouvellements/overview", headers=auth_headers
-    )
+    dernier renouvellement (le plus récent) et des jointures groupées —
+    nombre de requêtes borné, indépendant du nombre de baux."""
+    with query_budget(14):
+        resp = client.get(
+            "/api/v1/immobilier/renouvellements/overview", headers=auth_headers
+        )
     assert resp.status_code == 200, resp.text
     rows = resp.json()
     assert isinstance(rows, list)
@@ -192,14 +196,17 @@ def test_renouvellements_overview_ok(client, auth_headers, immo_perf_seed):
     assert rb["locataire_email"] is None
 
 
-def test_maintenance_rollup_year_window(client, auth_headers, immo_perf_seed):
+def test_maintenance_rollup_year_window(
+    client, auth_headers, immo_perf_seed, query_budget
+):
     """Le roll-up ne compte que les bons de l'année ciblée (borne SQL) — le
     bon de l'an dernier est exclu."""
     imm_id = immo_perf_seed["immeuble_id"]
-    resp = client.get(
-        f"/api/v1/immobilier/maintenance-rollup?immeuble_id={imm_id}",
-        headers=auth_headers,
-    )
+    with query_budget(12):
+        resp = client.get(
+            f"/api/v1/immobilier/maintenance-rollup?immeuble_id={imm_id}",
+            headers=auth_headers,
+        )
     assert resp.status_code == 200, resp.text
     data = resp.json()
     assert isinstance(data, list)
@@ -0,0 +1,386 @@
+"""Smoke — agrégats matérialisés Dépôts / maintenance.
+
+``depots_overview`` et ``maintenance-rollup`` lisent
+``imm_depot_rollups`` / ``imm_maintenance_rollups``, rafraîchis à chaque
+flush. On mute ce qui compte (dépôt reçu puis rendu, bail terminé et
+logement reloué, bon modifié / déplacé d'un mois / annulé / supprimé,
+locataire renommé) et, après chaque commit :
+
+- l'agrégat est égal au recalcul complet (``check_rollups`` vide) ;
+- l'endpoint rend la même chose avant et après ``rebuild_rollups``
+  (reconstruction from scratch).
+
+Plus : un rollback n'écrit rien, un écart injecté en SQL brut est vu et
+corrigé par la réconciliation, le démarrage complète des tables déjà
+partiellement remplies, le départ acté passé est appliqué à la lecture,
+et la visibilité filtre la maintenance.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.db.session import ensure_immobilier_rollup_tables
+from app.models.bon_travail import BonTravail
+from app.models.immobilier import (
+    Bail,
+    BailStatus,
+    Immeuble,
+    Locataire,
+    LocationDossier,
+    LocationDossierStatut,
+    Logement,
+    LogementStatus,
+)
+from app.models.immobilier_rollup import DepotRollup, MaintenanceRollup
+from app.services import immobilier_rollups
+
+from .conftest import TestSessionLocal
+
+YEAR = date.today().year
+
+
+def _bon(imm_id: int, logement_id, amount: float, month: int, **kw) -> BonTravail:
+    return BonTravail(
+        reference=f"BT-ROLL-{uuid.uuid4().hex[:10]}",
+        title=kw.pop("title", f"Réparation {month}"),
+        kind=kw.pop("kind", "interne"),
+        status=kw.pop("status", "draft"),
+        immeuble_id=imm_id,
+        logement_id=logement_id,
+        amount=amount,
+        created_at=datetime(YEAR, month, 10, 12, tzinfo=timezone.utc),
+        **kw,
+    )
+
+
+@pytest.fixture(scope="module")
+def parc(run, seeded_users) -> dict:
+    today = date.today()
+
+    async def _seed() -> dict:
+        async with TestSessionLocal() as s:
+            imm = Immeuble(name="Immeuble Rollup", address="9 rue Agrégat", is_active=True)
+            s.add(imm)
+            await s.flush()
+            lg1 = Logement(immeuble_id=imm.id, numero="101", status=LogementStatus.OCCUPE.value)
+            lg2 = Logement(immeuble_id=imm.id, numero="102", status=LogementStatus.VACANT.value)
+            alice = Locataire(full_name="Alice Rollup")
+            bob = Locataire(full_name="Bob Rollup")
+            s.add_all([lg1, lg2, alice, bob])
+            await s.flush()
+            actif = Bail(
+                logement_id=lg1.id, locataire_id=alice.id,
+                date_debut=today - timedelta(days=100), date_fin=today + timedelta(days=265),
+                loyer_mensuel=1100, status=BailStatus.ACTIF.value,
+            )
+            sortant = Bail(
+                logement_id=lg2.id, locataire_id=bob.id,
+                date_debut=today - timedelta(days=400), date_fin=today - timedelta(days=35),
+                loyer_mensuel=950, status=BailStatus.TERMINE.value, depot_garantie=400,
+            )
+            s.add_all([actif, sortant])
+            await s.flush()
+            s.add(
+                LocationDossier(
+                    logement_id=lg2.id, bail_id=sortant.id,
+                    statut=LocationDossierStatut.AVIS_RECU.value,
+                    date_depart=today + timedelta(days=10),
+                )
+            )
+            bons = [
+                _bon(imm.id, lg1.id, 120.50, 1),
+                _bon(imm.id, lg1.id, 80, 2),
+                _bon(imm.id, None, 300, 2),
+                _bon(imm.id, lg2.id, 999, 3, kind="construction"),
+            ]
+            s.add_all(bons)
+            await s.commit()
+            return {
+                "immeuble_id": imm.id,
+                "lg1": lg1.id,
+                "lg2": lg2.id,
+                "alice": alice.id,
+                "actif": actif.id,
+                "sortant": sortant.id,
+                "bons": [b.id for b in bons],
+            }
+
+    return run(_seed())
+
+
+def _check(run, ids) -> list:
+    async def _go():
+        async with TestSessionLocal() as s:
+            return await immobilier_rollups.check_rollups(s, [ids["immeuble_id"]])
+
+    return run(_go())
+
+
+def _rebuild(run, ids) -> None:
+    async def _go():
+        async with TestSessionLocal() as s:
+            await immobilier_rollups.rebuild_rollups(s, [ids["immeuble_id"]])
+            await s.commit()
+
+    run(_go())
+
+
+def _views(client, auth_headers, ids) -> tuple:
+    q = f"immeuble_id={ids['immeuble_id']}"
+    depots = client.get(f"/api/v1/immobilier/depots/overview?{q}", headers=auth_headers)
+    maint = client.get(
+        f"/api/v1/immobilier/maintenance-rollup?{q}&year={YEAR}", headers=auth_headers
+    )
+    assert depots.status_code == 200, depots.text
+    assert maint.status_code == 200, maint.text
+    return depots.json(), maint.json()
+
+
+def _agree(run, client, auth_headers, ids) -> tuple:
+    """Agrégat incrémental == recalcul complet, et l'endpoint ne bouge
+    pas quand on reconstruit from scratch."""
+    assert _check(run, ids) == []
+    before = _views(client, auth_headers, ids)
+    _rebuild(run, ids)
+    assert _views(client, auth_headers, ids) == before
+    return before
+
+
+def _mutate(run, fn) -> None:
+    async def _go():
+        async with TestSessionLocal() as s:
+            await fn(s)
+            await s.commit()
+
+    run(_go())
+
+
+def test_etat_initial(run, client, auth_headers, parc):
+    depots, maint = _agree(run, client, auth_headers, parc)
+    by_bail = {r["bail_id"]: r for r in depots["rows"]}
+    assert by_bail[parc["actif"]]["statut"] == "aucun"
+    # Départ acté mais à venir : le dépôt est encore détenu.
+    assert by_bail[parc["sortant"]]["statut"] == "detenu"
+    assert depots["total_detenu"] == 400.0 and depots["nb_sans_depot"] == 1
+
+    [imm] = maint
+    # Le bon « construction » ne compte pas.
+    assert (imm["total"], imm["count"]) == (500.5, 3)
+    assert (imm["communs_total"], imm["communs_count"]) == (300.0, 1)
+    [log1] = imm["logements"]
+    assert (log1["numero"], log1["total"], log1["count"]) == ("101", 200.5, 2)
+    assert [b["montant"] for b in log1["bons"]] == [80.0, 120.5]  # récents d'abord
+
+
+def test_depot_recu_puis_rendu(run, client, auth_headers, parc):
+    async def _recu(s):
+        bail = await s.get(Bail, parc["actif"])
+        bail.depot_garantie = 550
+        bail.depot_recu_le = date.today()
+
+    _mutate(run, _recu)
+    depots, _ = _agree(run, client, auth_headers, parc)
+    ligne = next(r for r in depots["rows"] if r["bail_id"] == parc["actif"])
+    assert (ligne["statut"], ligne["montant"]) == ("detenu", 550.0)
+    assert depots["total_detenu"] == 950.0
+
+    async def _rendu(s):
+        (await s.get(Bail, parc["sortant"])).depot_rendu_le = date.today()
+
+    _mutate(run, _rendu)
+    depots, _ = _agree(run, client, auth_headers, parc)
+    assert depots["total_rendu"] == 400.0 and depots["total_detenu"] == 550.0
+
+
+def test_relocation_et_renommage(run, client, auth_headers, parc):
+    async def _reloue(s):
+        (await s.get(Bail, parc["sortant"])).depot_rendu_le = None
+        s.add(
+            Bail(
+                logement_id=parc["lg2"], locataire_id=parc["alice"],
+                date_debut=date.today(), date_fin=date.today() + timedelta(days=365),
+                loyer_mensuel=990, status=BailStatus.ACTIF.value, depot_garantie=450,
+            )
+        )
+        (await s.get(Locataire, parc["alice"])).full_name = "Alice Renommée"
+
+    _mutate(run, _reloue)
+    depots, _ = _agree(run, client, auth_headers, parc)
+    by_bail = {r["bail_id"]: r for r in depots["rows"]}
+    # Reloué à quelqu'un d'autre : l'ancien dépôt est dû tout de suite.
+    assert by_bail[parc["sortant"]]["statut"] == "a_rendre"
+    assert depots["rows"][0]["bail_id"] == parc["sortant"]
+    assert {r["locataire_name"] for r in depots["rows"]} == {"Alice Renommée", "Bob Rollup"}
+
+
+def test_bons_modifies_deplaces_annules(run, client, auth_headers, parc):
+    b_jan, b_fev, b_communs, b_constr = parc["bons"]
+
+    async def _edits(s):
+        (await s.get(BonTravail, b_jan)).amount = 150
+        # Déplacé de février à avril (et vers les communs) : deux mois touchés.
+        bon = await s.get(BonTravail, b_fev)
+        bon.created_at = datetime(YEAR, 4, 2, tzinfo=timezone.utc)
+        bon.logement_id = None
+        (await s.get(BonTravail, b_communs)).status = "cancelled"
+        (await s.get(BonTravail, b_constr)).kind = "interne"
+        s.add(_bon(parc["immeuble_id"], parc["lg2"], 42, 5, title="Nouveau ticket"))
+
+    _mutate(run, _edits)
+    _, maint = _agree(run, client, auth_headers, parc)
+    [imm] = maint
+    assert (imm["total"], imm["count"]) == (150 + 80 + 999 + 42.0, 4)
+    assert (imm["communs_total"], imm["communs_count"]) == (80.0, 1)
+    assert {lg["numero"]: lg["total"] for lg in imm["logements"]} == {
+        "101": 150.0,
+        "102": 1041.0,
+    }
+
+    async def _moiss(s):
+        return set(
+            (
+                await s.execute(
+                    select(MaintenanceRollup.mois).where(
+                        MaintenanceRollup.immeuble_id == parc["immeuble_id"]
+                    )
+                )
+            ).scalars()
+        )
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            return await _moiss(s)
+
+    # Février n'a plus de bon actif : sa ligne a disparu.
+    assert run(_go()) == {date(YEAR, m, 1) for m in (1, 3, 4, 5)}
+
+    async def _suppr(s):
+        await s.delete(await s.get(BonTravail, b_constr))
+
+    _mutate(run, _suppr)
+    _, maint = _agree(run, client, auth_headers, parc)
+    assert maint[0]["count"] == 3
+    assert run(_go()) == {date(YEAR, m, 1) for m in (1, 4, 5)}
+
+
+def test_rollback_n_ecrit_rien(run, client, auth_headers, parc):
+    before = _views(client, auth_headers, parc)
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            (await s.get(Bail, parc["actif"])).depot_garantie = 9999
+            s.add(_bon(parc["immeuble_id"], None, 5000, 6))
+            await s.flush()  # agrégats rafraîchis dans la transaction…
+            await s.rollback()  # … et annulés avec elle
+
+    run(_go())
+    assert _check(run, parc) == []
+    assert _views(client, auth_headers, parc) == before
+
+
+def test_reconciliation_corrige_un_ecart(run, client, auth_headers, parc):
+    before = _views(client, auth_headers, parc)
+
+    async def _corrompt():
+        async with TestSessionLocal() as s:
+            # SQL en masse : invisible pour after_flush.
+            await s.execute(
+                update(MaintenanceRollup)
+                .where(MaintenanceRollup.immeuble_id == parc["immeuble_id"])
+                .values(total=1.0)
+            )
+            await s.execute(
+                update(DepotRollup)
+                .where(DepotRollup.immeuble_id == parc["immeuble_id"])
+                .values(rows_json="[]")
+            )
+            await s.commit()
+
+    run(_corrompt())
+    issues = _check(run, parc)
+    assert {i["rollup"] for i in issues} == {"maintenance", "depots"}
+    assert any(i["field"] == "total" and i["stored"] == 1.0 for i in issues)
+
+    async def _reconcile():
+        async with TestSessionLocal() as s:
+            found = await immobilier_rollups.reconcile_rollups(s)
+            await s.commit()
+            return found
+
+    found = run(_reconcile())
+    assert {i["immeuble_id"] for i in found} >= {parc["immeuble_id"]}
+    assert _check(run, parc) == []
+    assert _views(client, auth_headers, parc) == before
+
+
+def test_demarrage_complete_des_tables_partielles(run, client, auth_headers, parc):
+    """Tables créées par ``init_db`` puis remplies en partie par des
+    écritures pendant la fenêtre de démarrage : ``ensure_…`` doit quand
+    même reconstruire ce qui manque."""
+    before = _views(client, auth_headers, parc)
+
+    async def _partiel():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(MaintenanceRollup).where(
+                    MaintenanceRollup.immeuble_id == parc["immeuble_id"]
+                )
+            )
+            await s.execute(
+                delete(DepotRollup).where(DepotRollup.immeuble_id == parc["immeuble_id"])
+            )
+            # Un autre immeuble écrit pendant la fenêtre : tables non vides.
+            autre = Immeuble(name="Immeuble Fenêtre", address="1 rue Démarrage")
+            s.add(autre)
+            await s.flush()
+            s.add(_bon(autre.id, None, 50, 4))
+            await s.commit()
+            return (
+                await s.execute(select(MaintenanceRollup.immeuble_id).limit(1))
+            ).first() is not None
+
+    assert run(_partiel()) is True
+    assert _check(run, parc) != []
+    run(ensure_immobilier_rollup_tables())
+    assert _check(run, parc) == []
+    assert _views(client, auth_headers, parc) == before
+
+
+def test_depart_acte_applique_a_la_lecture_et_visibilite(run, parc):
+    async def _go():
+        async with TestSessionLocal() as s:
+            bail = await s.get(Bail, parc["sortant"])
+            # Relocation annulée : seul le départ acté (J+10) reste.
+            nouveau = (
+                await s.execute(
+                    select(Bail).where(
+                        Bail.logement_id == parc["lg2"], Bail.id != bail.id
+                    )
+                )
+            ).scalar_one()
+            await s.delete(nouveau)
+            await s.commit()
+
+            def _statut(rows):
+                return next(r["statut"] for r in rows if r["bail_id"] == parc["sortant"])
+
+            aujourd_hui = await immobilier_rollups.depot_rows(
+                s, date.today(), immeuble_id=parc["immeuble_id"]
+            )
+            apres_depart = await immobilier_rollups.depot_rows(
+                s, date.today() + timedelta(days=10), immeuble_id=parc["immeuble_id"]
+            )
+            cache = await immobilier_rollups.depot_rows(
+                s, date.today(), immeuble_id=parc["immeuble_id"], visible=set()
+            )
+            maint_cache = await immobilier_rollups.maintenance_for_year(
+                s, YEAR, visible={parc["immeuble_id"] + 10_000}
+            )
+            return _statut(aujourd_hui), _statut(apres_depart), cache, maint_cache
+
+    assert run(_go()) == ("detenu", "a_rendre", [], {})
+    assert _check(run, parc) == []
@@ -0,0 +1,280 @@
+"""Smoke — séries du portefeuille investisseur en requêtes groupées.
+
+`serie_mensuelle` / `serie_valeur_totale` passent par
+`invest_portfolio_engine` : nombre de requêtes constant (plus de boucle
+par immeuble ni par point trimestriel), résultats en cache par
+compagnie, invalidés dès qu'un paiement est COMMITÉ (pas au flush, pas
+sur rollback), par les clés reçues d'un autre worker (NOTIFY), et au plus
+tard après ``_CACHE_TTL_FALLBACK_SECONDS`` sans écoute active. Un
+chargement commencé avant une invalidation n'est pas gardé.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.db.session import engine as app_engine
+from app.models.entreprise import Entreprise
+from app.models.immobilier import (
+    Bail,
+    Evaluation,
+    Immeuble,
+    Locataire,
+    Logement,
+    PaiementLoyer,
+)
+from app.models.invest_portal import InvestFlux, InvestParticipation
+from app.services import access_snapshot, invest_portfolio_engine
+from app.services.invest_portfolio import serie_mensuelle, serie_valeur_totale
+
+from .conftest import TestSessionLocal
+
+
+@pytest.fixture(scope="module")
+def pf_seed(run, seeded_users) -> dict:
+    async def _seed() -> dict:
+        today = date.today()
+        async with TestSessionLocal() as s:
+            ent = Entreprise(name="INC Smoke Portefeuille")
+            s.add(ent)
+            await s.flush()
+            log_ids = []
+            for n in range(3):
+                imm = Immeuble(
+                    name=f"Immeuble Smoke Portefeuille {n}",
+                    address=f"{n} rue Batch",
+                    is_active=True,
+                    owner_entreprise_id=ent.id,
+                    purchase_date=today - timedelta(days=700),
+                    purchase_price=400_000,
+                )
+                s.add(imm)
+                await s.flush()
+                s.add(
+                    Evaluation(
+                        immeuble_id=imm.id,
+                        valeur=500_000,
+                        date_evaluation=today - timedelta(days=200),
+                        created_at=datetime.now(timezone.utc),
+                    )
+                )
+                lg = Logement(immeuble_id=imm.id, numero="1")
+                s.add(lg)
+                await s.flush()
+                log_ids.append(lg.id)
+            loc = Locataire(full_name="Locataire Smoke Portefeuille")
+            s.add(loc)
+            await s.flush()
+            bail = Bail(
+                logement_id=log_ids[0],
+                locataire_id=loc.id,
+                date_debut=today - timedelta(days=300),
+                date_fin=today + timedelta(days=65),
+                loyer_mensuel=1200,
+            )
+            s.add(bail)
+            part = InvestParticipation(
+                entreprise_id=ent.id,
+                user_id=seeded_users["admin_id"],
+                parts_pct=25,
+            )
+            s.add(part)
+            await s.flush()
+            s.add(
+                InvestFlux(
+                    participation_id=part.id,
+                    type="apport",
+                    montant=50_000,
+                    date_flux=today - timedelta(days=600),
+                )
+            )
+            await s.commit()
+            return {"entreprise_id": ent.id, "bail_id": bail.id}
+
+    return run(_seed())
+
+
+class _QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(app_engine.sync_engine, "before_cursor_execute", self._on)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(app_engine.sync_engine, "before_cursor_execute", self._on)
+
+    def _on(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+def test_serie_mensuelle_requetes_groupees_et_cache(run, pf_seed):
+    eid = pf_seed["entreprise_id"]
+    invest_portfolio_engine.invalidate_portfolio_cache()
+
+    async def _serie():
+        async with TestSessionLocal() as s:
+            return await serie_mensuelle(s, eid, months=12)
+
+    with _QueryCounter() as q:
+        serie = run(_serie())
+    # 3 immeubles : nombre de requêtes indépendant du nombre d'immeubles.
+    assert q.count <= 9
+    assert serie["revenus_mode"] == "potentiel"
+    assert serie["loyers_effectifs"] == 1200.0
+
+    with _QueryCounter() as q:
+        assert run(_serie()) == serie
+    assert q.count == 0  # servi par le cache
+
+    async def _payer():
+        async with TestSessionLocal() as s:
+            s.add(
+                PaiementLoyer(
+                    bail_id=pf_seed["bail_id"],
+                    mois_couvert=date.today().replace(day=1),
+                    montant=1200,
+                    created_at=datetime.now(timezone.utc),
+                )
+            )
+            await s.commit()
+
+    run(_payer())
+    serie2 = run(_serie())
+    assert serie2["revenus_mode"] == "recus"
+    assert serie2["rows"][-1]["revenus"] == 1200.0
+
+
+def test_serie_valeur_totale_sans_requete_par_point(run, pf_seed):
+    eid = pf_seed["entreprise_id"]
+    invest_portfolio_engine.invalidate_portfolio_cache()
+
+    async def _serie():
+        async with TestSessionLocal() as s:
+            from sqlalchemy import select
+
+            part = (
+                await s.execute(
+                    select(InvestParticipation).where(
+                        InvestParticipation.entreprise_id == eid
+                    )
+                )
+            ).scalar_one()
+            flux = (
+                await s.execute(
+                    select(InvestFlux).where(
+                        InvestFlux.participation_id == part.id
+                    )
+                )
+            ).scalars().all()
+            with _QueryCounter() as q:
+                points = await serie_valeur_totale(s, [(part, list(flux))])
+            return points, q.count
+
+    points, count = run(_serie())
+    assert len(points) >= 7  # ~600 jours de points trimestriels
+    # Annuaire des partenaires + chargement groupé, pas ~N par point.
+    assert count <= 15
+    # Dernier point : 3 × évaluation 500 k$ (aucune hypothèque).
+    assert points[-1]["valeur"] > 0
+
+
+def _cached(eid: int) -> bool:
+    return eid in invest_portfolio_engine._cache
+
+
+def _warm(run, eid: int) -> None:
+    async def _go():
+        async with TestSessionLocal() as s:
+            await invest_portfolio_engine.portfolio_data(s, eid)
+
+    run(_go())
+    assert _cached(eid)
+
+
+def test_invalidation_au_commit_seulement(run, pf_seed):
+    eid = pf_seed["entreprise_id"]
+    invest_portfolio_engine.invalidate_portfolio_cache()
+    _warm(run, eid)
+
+    def _paiement() -> PaiementLoyer:
+        return PaiementLoyer(
+            bail_id=pf_seed["bail_id"],
+            mois_couvert=date.today().replace(day=1) - timedelta(days=40),
+            montant=10,
+            created_at=datetime.now(timezone.utc),
+        )
+
+    async def _flush_puis(commit: bool) -> bool:
+        async with TestSessionLocal() as s:
+            s.add(_paiement())
+            await s.flush()
+            # Flushé, pas commité : une requête concurrente qui
+            # rechargerait maintenant lirait l'état d'avant.
+            encore = _cached(eid)
+            await (s.commit() if commit else s.rollback())
+            return encore
+
+    assert run(_flush_puis(commit=False)) is True
+    assert _cached(eid)  # rollback : rien à invalider
+    assert run(_flush_puis(commit=True)) is True
+    assert not _cached(eid)
+
+
+def test_invalidation_recue_d_un_autre_worker(run, pf_seed):
+    eid = pf_seed["entreprise_id"]
+    on_payload, reset = access_snapshot._channels[invest_portfolio_engine.CHANNEL]
+    invest_portfolio_engine.invalidate_portfolio_cache()
+    _warm(run, eid)
+    on_payload("bail:999999,imm:999999")  # autre compagnie
+    assert _cached(eid)
+    on_payload(f"bail:{pf_seed['bail_id']}")
+    assert not _cached(eid)
+    _warm(run, eid)
+    reset()  # (re)connexion LISTEN : des notifications ont pu manquer
+    assert not _cached(eid)
+
+
+def test_chargement_concurrent_d_une_invalidation_non_garde(
+    run, pf_seed, monkeypatch
+):
+    eid = pf_seed["entreprise_id"]
+    invest_portfolio_engine.invalidate_portfolio_cache()
+    real = invest_portfolio_engine.load_portfolio_data
+
+    async def _load(db, entreprise_id):
+        data = await real(db, entreprise_id)
+        # Commit d'un paiement pendant le chargement.
+        invest_portfolio_engine._invalidate_keys([f"bail:{pf_seed['bail_id']}"])
+        return data
+
+    monkeypatch.setattr(invest_portfolio_engine, "load_portfolio_data", _load)
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            return await invest_portfolio_engine.portfolio_data(s, eid)
+
+    assert run(_go()).entreprise_id == eid
+    assert not _cached(eid)
+
+
+def test_borne_de_fraicheur_sans_ecoute(run, pf_seed):
+    eid = pf_seed["entreprise_id"]
+    assert not access_snapshot.is_listening()  # SQLite : pas de LISTEN
+    invest_portfolio_engine.invalidate_portfolio_cache()
+    _warm(run, eid)
+    entry = invest_portfolio_engine._cache[eid]
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            await invest_portfolio_engine.portfolio_data(s, eid)
+
+    entry.loaded_at -= invest_portfolio_engine._CACHE_TTL_FALLBACK_SECONDS - 5
+    run(_go())
+    assert invest_portfolio_engine._cache[eid] is entry
+    entry.loaded_at -= 10
+    run(_go())
+    assert invest_portfolio_engine._cache[eid] is not entry
@@ -0,0 +1,246 @@
+"""Smoke — file de travaux durable (``job_queue``).
+
+- cinq mises en file de la même facture = UN travail en attente (le
+  dernier payload gagne) ;
+- un échec repasse en attente avec backoff, puis réussit ; au-delà de
+  ``max_attempts`` le travail est ``failed`` ;
+- un endpoint cron met en file et répond tout de suite ; le worker
+  exécute ensuite le job et son résultat est consultable ;
+- reprise (nouvel essai, travail orphelin) d'une clé déjà remise en
+  file pendant l'exécution : ``superseded``, pas d'erreur d'unicité ;
+- une issue impossible à enregistrer n'empêche pas celles du reste du
+  lot.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.api.v1.endpoints import cron_runner
+from app.core.config import settings
+from app.models.background_job import BackgroundJob
+from app.services import job_queue
+from app.services.qbo_jobs import enqueue_billable_flip, enqueue_facture_push
+
+from .conftest import TestSessionLocal
+
+_calls: list[dict] = []
+
+
+@job_queue.job_handler("smoke.flaky", max_attempts=3)
+async def _flaky(payload: dict) -> dict:
+    _calls.append(payload)
+    if len(_calls) == 1:
+        raise RuntimeError("QBO 503")
+    return {"ok": True, "n": len(_calls)}
+
+
+@job_queue.job_handler("smoke.broken", max_attempts=1)
+async def _broken(payload: dict) -> None:
+    raise RuntimeError("toujours en panne")
+
+
+@pytest.fixture
+def clean_jobs(run, seeded_users):
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(BackgroundJob))
+            await s.commit()
+
+    run(_purge())
+    _calls.clear()
+    yield
+    run(_purge())
+
+
+def _jobs(run, **where) -> list[BackgroundJob]:
+    async def _load():
+        async with TestSessionLocal() as s:
+            stmt = select(BackgroundJob).order_by(BackgroundJob.id)
+            for col, value in where.items():
+                stmt = stmt.where(getattr(BackgroundJob, col) == value)
+            return (await s.execute(stmt)).scalars().all()
+
+    return run(_load())
+
+
+def _make_due(run) -> None:
+    async def _due():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                update(BackgroundJob).values(
+                    run_after=datetime.now(timezone.utc)
+                )
+            )
+            await s.commit()
+
+    run(_due())
+
+
+def test_dedup_coalesce_les_pushes(run, clean_jobs):
+    async def _enqueue():
+        async with TestSessionLocal() as s:
+            for _ in range(5):
+                await enqueue_facture_push(s, 42)
+            await s.commit()
+        async with TestSessionLocal() as s:
+            await enqueue_facture_push(s, 42)
+            await enqueue_billable_flip(s, 7, True)
+            await enqueue_billable_flip(s, 7, False)
+            await s.commit()
+
+    run(_enqueue())
+    pending = _jobs(run, status="pending")
+    assert [j.dedup_key for j in pending] == [
+        "qbo.facture:42",
+        "qbo.achat_billable:7",
+    ]
+    assert all(j.queue == "qbo" for j in pending)
+    # Le dernier (dé)cochage l'emporte.
+    assert json.loads(pending[1].payload_json)["billable"] is False
+
+
+def test_retry_backoff_puis_succes(run, clean_jobs):
+    async def _enqueue():
+        async with TestSessionLocal() as s:
+            await job_queue.enqueue(
+                s, "smoke.flaky", {"x": 1}, dedup_key="smoke:flaky"
+            )
+            await job_queue.enqueue(s, "smoke.broken")
+            await s.commit()
+
+    run(_enqueue())
+    assert run(job_queue.run_pending("default")) == 2
+    flaky = _jobs(run, kind="smoke.flaky")[0]
+    assert flaky.status == "pending"
+    assert flaky.attempts == 1
+    assert "QBO 503" in flaky.last_error
+    assert flaky.run_after.replace(tzinfo=timezone.utc) > datetime.now(
+        timezone.utc
+    )
+    broken = _jobs(run, kind="smoke.broken")[0]
+    assert broken.status == "failed"
+
+    # Pas encore dû : rien ne tourne.
+    assert run(job_queue.run_pending("default")) == 0
+    _make_due(run)
+    assert run(job_queue.run_pending("default")) == 1
+    flaky = _jobs(run, kind="smoke.flaky")[0]
+    assert flaky.status == "done" and flaky.attempts == 2
+    assert json.loads(flaky.result_json) == {"ok": True, "n": 2}
+    assert _calls == [{"x": 1}, {"x": 1}]
+
+
+def test_cron_met_en_file_et_repond(run, client, clean_jobs, monkeypatch):
+    ran: list[dict] = []
+
+    async def _fake(params: dict) -> dict:
+        ran.append(params)
+        return {"envoyes": 3}
+
+    monkeypatch.setattr(settings, "cron_secret", "smoke-cron")
+    monkeypatch.setitem(cron_runner._CRON_JOBS, "facture-reminders", _fake)
+    headers = {"X-Cron-Secret": "smoke-cron"}
+
+    first = client.post(
+        "/api/v1/cron/run/facture-reminders?force=true", headers=headers
+    ).json()
+    again = client.post(
+        "/api/v1/cron/run/facture-reminders?force=true", headers=headers
+    ).json()
+    assert first["queued"] is True
+    # Rejoué avant exécution : coalescé sur le même travail.
+    assert again["job_id"] == first["job_id"]
+    assert ran == []
+
+    assert run(job_queue.run_pending("cron")) == 1
+    assert ran == [{"job": "facture-reminders", "force": True}]
+    status = client.get(
+        f"/api/v1/cron/jobs/{first['job_id']}", headers=headers
+    ).json()
+    assert status["status"] == "done"
+    assert status["result"] == {"envoyes": 3}
+
+
+def test_reprise_d_une_cle_deja_en_attente(run, clean_jobs):
+    async def _go():
+        async with TestSessionLocal() as s:
+            await job_queue.enqueue(s, "smoke.flaky", {"v": 1}, dedup_key="smoke:k")
+            await s.commit()
+        async with TestSessionLocal() as s:
+            [unit] = await job_queue.claim_units(s, "default", 1, "w1")
+        # Facture modifiée pendant le push : nouveau travail en attente.
+        async with TestSessionLocal() as s:
+            await job_queue.enqueue(s, "smoke.flaky", {"v": 2}, dedup_key="smoke:k")
+            await s.commit()
+        # 1er appel de ``_flaky`` : échec → nouvel essai impossible.
+        return await job_queue.execute_unit(unit)
+
+    assert run(_go()) == 0
+    first, second = _jobs(run, kind="smoke.flaky")
+    assert first.status == "superseded" and "QBO 503" in first.last_error
+    assert second.status == "pending"
+    assert json.loads(second.payload_json) == {"v": 2}
+    assert run(job_queue.run_pending("default")) == 1
+    assert _jobs(run, kind="smoke.flaky")[1].status == "done"
+
+
+def test_requeue_stale_avec_cle_en_attente(run, clean_jobs):
+    old = datetime.now(timezone.utc) - timedelta(hours=2)
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            s.add_all(
+                [
+                    BackgroundJob(
+                        queue="default", kind="smoke.flaky", dedup_key="smoke:k",
+                        status="running", locked_at=old, max_attempts=3,
+                    ),
+                    BackgroundJob(
+                        queue="default", kind="smoke.flaky", dedup_key="smoke:k",
+                        status="pending", max_attempts=3,
+                    ),
+                    BackgroundJob(
+                        queue="default", kind="smoke.flaky", dedup_key="smoke:autre",
+                        status="running", locked_at=old, max_attempts=3,
+                    ),
+                ]
+            )
+            await s.commit()
+        async with TestSessionLocal() as s:
+            n = await job_queue.requeue_stale(s)
+            await s.commit()
+        return n
+
+    assert run(_go()) == 1
+    assert [j.status for j in _jobs(run, kind="smoke.flaky")] == [
+        "superseded", "pending", "pending",
+    ]
+
+
+def test_issue_non_enregistree_n_arrete_pas_le_lot(run, clean_jobs, monkeypatch):
+    async def _claim():
+        async with TestSessionLocal() as s:
+            await job_queue.enqueue(s, "smoke.broken", {"n": 1})
+            await job_queue.enqueue(s, "smoke.broken", {"n": 2})
+            await s.commit()
+        async with TestSessionLocal() as s:
+            units = await job_queue.claim_units(s, "default", 2, "w1")
+        return [j for unit in units for j in unit]
+
+    jobs = run(_claim())
+    real = job_queue._finish
+
+    async def _finish(job_id, **values):
+        if job_id == jobs[0].id:
+            raise RuntimeError("DB indisponible")
+        await real(job_id, **values)
+
+    monkeypatch.setattr(job_queue, "_finish", _finish)
+    assert run(job_queue.execute_unit(jobs)) == 0
+    assert [j.status for j in _jobs(run, kind="smoke.broken")] == [
+        "running", "failed",
+    ]
@@ -0,0 +1,330 @@
+"""Smoke — outbox des courriels (``mail_outbox``, ``GraphMailer.send_batch``).
+
+Faux Graph (``httpx.MockTransport``) qui compte les appels et garde le
+contenu de chaque ``$batch`` :
+
+- cadence de 200 relances : le cron ne fait AUCUN appel Graph (mise en
+  file), le worker envoie tout en 10 ``$batch`` de 20 ``sendMail`` ; le
+  journal CRM passe de « queued » à « sent » ;
+- ``Retry-After`` : les seules requêtes limitées sont rejouées après
+  l'attente ; une limitation trop longue laisse les courriels en file
+  (reprise par la file) sans bloquer l'autre boîte d'envoi ;
+- grosse pièce jointe : brouillon + session de téléversement par
+  morceaux, jamais en base64 dans un ``$batch``.
+"""
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.integrations import email_graph
+from app.integrations.email_graph import EmailAttachment, GraphMailer
+from app.models.background_job import BackgroundJob
+from app.models.cadence_step import CadenceStep
+from app.models.contact_request import ContactRequest
+from app.models.email_log import EmailLog
+from app.models.email_template import EmailTemplate
+from app.models.follow_up import FollowUp
+from app.models.mail_outbox import OutboundMail, OutboundMailAttachment
+from app.models.relance_item import RelanceItem
+from app.services import job_queue, mail_outbox
+from app.services.relance_engine import _run_cadence
+
+from .conftest import TestSessionLocal
+
+LEADS = 200
+DOMAIN = "relance-outbox.test"
+
+
+class _FakeGraph:
+    """Répond comme Graph v1.0 (``$batch``, brouillons, téléversement)."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+        self.batches: list[list[dict]] = []
+        self.sent: list[str] = []
+        # destinataire → nombre de 429 à renvoyer pour sa requête.
+        self.throttle: dict[str, int] = {}
+        self.retry_after = "0.05"
+        self.ranges: list[str] = []
+        self.uploaded = bytearray()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.calls.append((request.method, path))
+        if path.endswith("/$batch"):
+            reqs = json.loads(request.content)["requests"]
+            self.batches.append(reqs)
+            out = []
+            for r in reversed(reqs):  # ordre non garanti par Graph
+                msg = r["body"]["message"]
+                to = msg["toRecipients"][0]["emailAddress"]["address"]
+                if self.throttle.get(to):
+                    self.throttle[to] -= 1
+                    out.append({
+                        "id": r["id"],
+                        "status": 429,
+                        "headers": {"Retry-After": self.retry_after},
+                        "body": {"error": {"code": "ApplicationThrottled"}},
+                    })
+                else:
+                    self.sent.append(to)
+                    out.append({"id": r["id"], "status": 202, "body": None})
+            return httpx.Response(200, json={"responses": out})
+        if path.endswith("/createUploadSession"):
+            return httpx.Response(
+                200, json={"uploadUrl": "https://upload.graph.test/s/draft-1"}
+            )
+        if request.method == "PUT":
+            self.ranges.append(request.headers["Content-Range"])
+            assert "Authorization" not in request.headers
+            self.uploaded += request.content
+            return httpx.Response(200, json={})
+        if path.endswith("/messages"):
+            msg = json.loads(request.content)
+            self.sent.append(msg["toRecipients"][0]["emailAddress"]["address"])
+            return httpx.Response(201, json={"id": "draft-1"})
+        if path.endswith("/send"):
+            return httpx.Response(202)
+        return httpx.Response(404, json={"error": {"message": path}})
+
+
+@pytest.fixture
+def graph(monkeypatch, run, db_setup):
+    fake = _FakeGraph()
+    real_client = httpx.AsyncClient
+
+    def _client(**kw):
+        return real_client(transport=httpx.MockTransport(fake), **kw)
+
+    monkeypatch.setattr(email_graph.httpx, "AsyncClient", _client)
+    monkeypatch.setattr(settings, "mail_capture_only", False)
+    monkeypatch.setattr(settings, "mail_redirect_all_to", "")
+    monkeypatch.setattr(settings, "client_email_bcc", "")
+    mailer = GraphMailer()
+    mailer.tenant = mailer.client_id = mailer.client_secret = "smoke"
+    mailer._cache.access_token = "tok"
+    mailer._cache.expires_at = time.time() + 3600
+    monkeypatch.setattr(email_graph, "_mailer", mailer)
+    yield fake
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(OutboundMailAttachment))
+            await s.execute(delete(OutboundMail))
+            await s.execute(
+                delete(BackgroundJob).where(
+                    BackgroundJob.kind == mail_outbox.SEND_JOB
+                )
+            )
+            await s.execute(delete(RelanceItem))
+            await s.execute(delete(CadenceStep))
+            await s.execute(
+                delete(EmailLog).where(EmailLog.to_email.like(f"%@{DOMAIN}"))
+            )
+            await s.execute(
+                delete(FollowUp).where(FollowUp.notes.like("[relance auto]%"))
+            )
+            await s.execute(
+                delete(ContactRequest).where(
+                    ContactRequest.email.like(f"%@{DOMAIN}")
+                )
+            )
+            await s.execute(
+                delete(EmailTemplate).where(EmailTemplate.name == "Relance smoke")
+            )
+            await s.commit()
+
+    run(_purge())
+
+
+def test_cadence_200_relances_en_10_batches(run, graph):
+    async def _seed():
+        async with TestSessionLocal() as s:
+            tpl = EmailTemplate(
+                name="Relance smoke",
+                subject="Votre projet, {{prenom}}",
+                body_html="<p>Bonjour {{nom}}, un suivi de votre demande.</p>",
+                category="relance",
+            )
+            s.add(tpl)
+            await s.flush()
+            # Délai long : les leads d'autres tests enrôlés au passage ne
+            # sont pas dus.
+            s.add(
+                CadenceStep(
+                    position=0,
+                    channel="email",
+                    delay_days=30,
+                    label="Courriel de relance",
+                    email_template_id=tpl.id,
+                )
+            )
+            past = datetime.now(timezone.utc) - timedelta(hours=1)
+            for n in range(LEADS):
+                lead = ContactRequest(
+                    name=f"Client {n}",
+                    email=f"client{n}@{DOMAIN}",
+                    message="Rénovation",
+                    status="contacted",
+                )
+                s.add(lead)
+                await s.flush()
+                s.add(
+                    RelanceItem(
+                        contact_request_id=lead.id,
+                        position=0,
+                        channel="email",
+                        label="Courriel de relance",
+                        email_template_id=tpl.id,
+                        scheduled_at=past,
+                        status="pending",
+                    )
+                )
+            await s.commit()
+
+    run(_seed())
+
+    async def _cadence():
+        async with TestSessionLocal() as s:
+            stats = await _run_cadence(s)
+            await s.commit()
+            return stats
+
+    stats = run(_cadence())
+    assert stats["emails_sent"] == LEADS
+    assert graph.calls == []  # le cron ne fait que mettre en file
+
+    assert run(job_queue.run_pending("mail")) == LEADS
+    assert graph.calls == [("POST", "/v1.0/$batch")] * (LEADS // 20)
+    assert [len(b) for b in graph.batches] == [20] * (LEADS // 20)
+    first = graph.batches[0][0]
+    assert first["method"] == "POST"
+    assert first["url"] == f"/users/{settings.mail_from_email}/sendMail"
+    assert first["body"]["message"]["subject"].startswith("Votre projet, Client")
+    assert sorted(graph.sent) == sorted(f"client{n}@{DOMAIN}" for n in range(LEADS))
+
+    async def _state():
+        async with TestSessionLocal() as s:
+            mails = (await s.execute(select(OutboundMail.status))).scalars().all()
+            logs = (
+                await s.execute(
+                    select(EmailLog.status, EmailLog.sent_at).where(
+                        EmailLog.entity_type == "contact_request"
+                    )
+                )
+            ).all()
+            return mails, logs
+
+    mails, logs = run(_state())
+    assert mails == ["sent"] * LEADS
+    assert len(logs) == LEADS
+    assert all(st == "sent" and at is not None for st, at in logs)
+
+
+def _queue(run, *mails: dict) -> list[int]:
+    async def _go():
+        async with TestSessionLocal() as s:
+            ids = [(await mail_outbox.queue_mail(s, **m)).id for m in mails]
+            await s.commit()
+            return ids
+
+    return run(_go())
+
+
+def test_retry_after_par_boite(run, graph):
+    _queue(
+        run,
+        *(
+            {"to": [f"t{n}@{DOMAIN}"], "subject": f"S{n}", "html_body": "<p/>"}
+            for n in range(5)
+        ),
+    )
+    graph.throttle = {f"t1@{DOMAIN}": 1, f"t3@{DOMAIN}": 1}
+
+    started = time.monotonic()
+    assert run(job_queue.run_pending("mail")) == 5
+    assert time.monotonic() - started >= 0.05
+    # Un $batch de 5, puis les 2 requêtes limitées seules.
+    assert [len(b) for b in graph.batches] == [5, 2]
+    assert sorted(graph.sent) == sorted(f"t{n}@{DOMAIN}" for n in range(5))
+
+    # Limitation longue sur la boîte par défaut : pas d'attente dans le
+    # worker, le courriel reste en file ; l'autre boîte envoie quand même.
+    graph.batches.clear()
+    graph.retry_after = "600"
+    graph.throttle = {f"long@{DOMAIN}": 1}
+    slow, other = _queue(
+        run,
+        {"to": [f"long@{DOMAIN}"], "subject": "L", "html_body": "<p/>"},
+        {
+            "to": [f"autre@{DOMAIN}"],
+            "subject": "A",
+            "html_body": "<p/>",
+            "from_email": "gestion@immohorizon.com",
+        },
+    )
+    started = time.monotonic()
+    run(job_queue.run_pending("mail"))
+    assert time.monotonic() - started < 5
+
+    async def _state():
+        async with TestSessionLocal() as s:
+            a = await s.get(OutboundMail, slow)
+            b = await s.get(OutboundMail, other)
+            job = (
+                await s.execute(
+                    select(BackgroundJob).where(
+                        BackgroundJob.dedup_key == f"{mail_outbox.SEND_JOB}:{slow}"
+                    )
+                )
+            ).scalar_one()
+            return a.status, a.attempts, b.status, job.status
+
+    assert run(_state()) == ("pending", 1, "sent", "pending")
+    assert f"autre@{DOMAIN}" in graph.sent
+    mailer = email_graph.get_mailer()
+    assert settings.mail_from_email.lower() in mailer._throttled_until
+    assert "gestion@immohorizon.com" not in mailer._throttled_until
+
+
+def test_grosse_piece_jointe_par_session(run, graph):
+    big = bytes(range(256)) * (5 * 1024 * 1024 // 256)  # 5 Mo
+    _queue(
+        run,
+        {
+            "to": [f"bail@{DOMAIN}"],
+            "subject": "Bail signé",
+            "html_body": "<p>Ci-joint.</p>",
+            "attachments": [
+                EmailAttachment("bail.pdf", big, "application/pdf"),
+                EmailAttachment("note.txt", b"petite", "text/plain"),
+            ],
+        },
+        {"to": [f"court@{DOMAIN}"], "subject": "Court", "html_body": "<p/>"},
+    )
+    assert run(job_queue.run_pending("mail")) == 2
+
+    posts = [p for m, p in graph.calls if m == "POST"]
+    assert posts == [
+        f"/v1.0/users/{settings.mail_from_email}/messages",
+        f"/v1.0/users/{settings.mail_from_email}/messages/draft-1"
+        "/attachments/createUploadSession",
+        f"/v1.0/users/{settings.mail_from_email}/messages/draft-1/send",
+        "/v1.0/$batch",
+    ]
+    chunk = email_graph._UPLOAD_CHUNK
+    assert graph.ranges == [
+        f"bytes 0-{chunk - 1}/{len(big)}",
+        f"bytes {chunk}-{len(big) - 1}/{len(big)}",
+    ]
+    assert bytes(graph.uploaded) == big
+    # Le courriel court part seul dans le $batch, sans base64 volumineux.
+    assert len(graph.batches) == 1 and len(graph.batches[0]) == 1
+    assert "attachments" not in graph.batches[0][0]["body"]["message"]
@@ -38,8 +38,9 @@ LIST_ENTITIES_KEYS = {
 }
 
 
-def test_activity_me_contract(client, api_key_headers):
-    resp = client.get("/api/v1/activity/me", headers=api_key_headers)
+def test_activity_me_contract(client, api_key_headers, query_budget):
+    with query_budget(12):
+        resp = client.get("/api/v1/activity/me", headers=api_key_headers)
     assert resp.status_code == 200, resp.text
     body = resp.json()
     assert set(body.keys()) == ACTIVITY_ME_KEYS
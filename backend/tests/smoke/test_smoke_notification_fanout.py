@@ -0,0 +1,319 @@
+"""Smoke — fan-out des notifications (``notify_role``) et compteurs de la cloche.
+
+- rôle de 500 gestionnaires : un ``INSERT … SELECT`` + une mise à jour
+  des compteurs — même nombre d'instructions SQL qu'avec 5 ;
+- relance du cron avec la même ``dedup_key`` : aucune nouvelle ligne,
+  compteurs inchangés ;
+- ``/notifications/unread-count`` lit les compteurs (par volet) ; lire
+  une notification, tout marquer lu ou en créer une à la main les tient
+  à jour — toujours égaux au ``COUNT`` de la boîte ;
+- le démarrage recompte même une table de compteurs déjà partiellement
+  remplie ;
+- ``notify`` avec une clé déjà insérée par un autre worker retourne la
+  ligne existante sans annuler la transaction de l'appelant.
+"""
+from __future__ import annotations
+
+
+import pytest
+from sqlalchemy import delete, event, func, insert, select
+
+from app.core import request_metrics
+from app.core.security import create_access_token
+from app.db.session import ensure_notification_tables
+from app.models.notification import Notification, NotificationCounter
+from app.models.user import User
+from app.services import notifications
+
+from .conftest import TestSessionLocal
+
+MANAGERS = 500
+DOMAIN = "fanout.test"
+
+
+@pytest.fixture
+def managers(run, db_setup):
+    async def _seed():
+        async with TestSessionLocal() as s:
+            users = [
+                User(
+                    email=f"gest{n}@{DOMAIN}",
+                    hashed_password="x",
+                    is_active=True,
+                    is_admin=False,
+                    role="manager",
+                )
+                for n in range(MANAGERS)
+            ]
+            s.add_all(users)
+            # Inactif et employé : jamais notifiés.
+            s.add_all(
+                [
+                    User(
+                        email=f"parti@{DOMAIN}",
+                        hashed_password="x",
+                        is_active=False,
+                        role="manager",
+                    ),
+                    User(
+                        email=f"employe@{DOMAIN}",
+                        hashed_password="x",
+                        is_active=True,
+                        role="employee",
+                    ),
+                ]
+            )
+            await s.commit()
+            return [u.id for u in users]
+
+    ids = run(_seed())
+    yield ids
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            users = select(User.id).where(User.email.like(f"%@{DOMAIN}"))
+            await s.execute(
+                delete(Notification).where(Notification.user_id.in_(users))
+            )
+            await s.execute(
+                delete(NotificationCounter).where(
+                    NotificationCounter.user_id.in_(users)
+                )
+            )
+            await s.execute(delete(User).where(User.email.like(f"%@{DOMAIN}")))
+            await s.commit()
+
+    run(_purge())
+
+
+def _fan_out(run, **kw) -> tuple[int, int]:
+    async def _go():
+        async with TestSessionLocal() as s:
+            with request_metrics.track() as stats:
+                n = await notifications.notify_role(s, **kw)
+            await s.commit()
+            return n, stats.queries
+
+    return run(_go())
+
+
+def _counts(run, user_id: int) -> tuple[int, int]:
+    """(compteur de la cloche, COUNT réel des non-lues)."""
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            counter = await notifications.unread_total(s, user_id)
+            real = (
+                await s.execute(
+                    select(func.count(Notification.id)).where(
+                        Notification.user_id == user_id,
+                        Notification.is_read.is_(False),
+                    )
+                )
+            ).scalar_one()
+            return counter, real
+
+    return run(_go())
+
+
+def test_fan_out_500_en_instructions_constantes(run, seeded_users, managers):
+    event = dict(
+        min_role="manager",
+        kind="loyer_retard",
+        title="3 loyers en retard ce mois",
+        href="/immobilier/paiements",
+    )
+    created, queries = _fan_out(
+        run, **event, dedup_key="loyer_retard:2026-10-19"
+    )
+    assert created >= MANAGERS  # + les admins de la base de test
+    assert queries <= 3
+
+    async def _rows():
+        async with TestSessionLocal() as s:
+            return (
+                await s.execute(
+                    select(Notification.user_id, func.count())
+                    .where(Notification.dedup_key == "loyer_retard:2026-10-19")
+                    .group_by(Notification.user_id)
+                )
+            ).all()
+
+    rows = dict(run(_rows()))
+    assert set(managers) <= set(rows) and set(rows.values()) == {1}
+    assert len(rows) == created
+
+    # Relance du cron : rien de neuf, même coût.
+    again, queries_again = _fan_out(
+        run, **event, dedup_key="loyer_retard:2026-10-19"
+    )
+    assert again == 0
+    assert queries_again <= queries
+    assert dict(run(_rows())) == rows
+    assert _counts(run, managers[0]) == (1, 1)
+
+    # Le lendemain : nouvelle clé, nouvelle notification ; le coût ne
+    # dépend pas de la taille du rôle (un rôle de 1–2 admins).
+    assert _fan_out(run, **event, dedup_key="loyer_retard:2026-10-20")[0] == created
+    small, small_queries = _fan_out(
+        run, min_role="admin", kind="x", title="Petit rôle"
+    )
+    assert 1 <= small < MANAGERS
+    assert small_queries == queries
+    assert _counts(run, managers[0]) == (2, 2)
+
+
+def test_compteurs_de_la_cloche(run, client, managers):
+    uid = managers[0]
+    headers = {"Authorization": f"Bearer {create_access_token(subject=str(uid))}"}
+
+    _fan_out(run, min_role="manager", kind="loyer_retard", title="Loyers",
+             href="/immobilier/paiements", dedup_key="loyer:a")
+    _fan_out(run, min_role="manager", kind="punch", title="Punch",
+             href="/app/punch/approbations", dedup_key="punch:a")
+    _fan_out(run, min_role="manager", kind="info", title="Annonce")
+
+    def badge(scope=None):
+        params = {"scope": scope} if scope else {}
+        resp = client.get(
+            "/api/v1/notifications/unread-count", headers=headers, params=params
+        )
+        assert resp.status_code == 200, resp.text
+        return resp.json()
+
+    # Même résultat que le filtre de volet de la liste.
+    for scope in (None, "immobilier", "construction", "devlog"):
+        listed = client.get(
+            "/api/v1/notifications",
+            headers=headers,
+            params={"only_unread": True, **({"scope": scope} if scope else {})},
+        ).json()
+        assert badge(scope) == len(listed), scope
+    assert (badge(), badge("immobilier"), badge("devlog")) == (3, 2, 1)
+
+    # Création directe (ORM) et lecture d'une notification.
+    async def _direct():
+        async with TestSessionLocal() as s:
+            n = await notifications.notify(
+                s, user_id=uid, kind="rdv", title="Rendez-vous",
+                href="/immobilier/agenda", push=False, dedup_key="rdv:1",
+            )
+            again = await notifications.notify(
+                s, user_id=uid, kind="rdv", title="Rendez-vous",
+                dedup_key="rdv:1",
+            )
+            await s.commit()
+            return n.id, again.id
+
+    nid, same = run(_direct())
+    assert nid == same
+    assert badge("immobilier") == 3
+    assert client.post(f"/api/v1/notifications/{nid}/read", headers=headers).status_code == 200
+    assert badge("immobilier") == 2
+    assert client.delete(
+        f"/api/v1/notifications/{nid}", headers=headers
+    ).status_code == 204
+    assert _counts(run, uid) == (3, 3)
+
+    assert client.post("/api/v1/notifications/read-all", headers=headers).json() == {
+        "updated": 3
+    }
+    assert badge() == 0 and _counts(run, uid) == (0, 0)
+
+    # Recalcul complet = compteurs tenus au fil de l'eau.
+    other = managers[1]
+    before = _counts(run, other)
+
+    async def _rebuild():
+        async with TestSessionLocal() as s:
+            await notifications.rebuild_counters(s, [uid, other])
+            await s.commit()
+
+    run(_rebuild())
+    assert _counts(run, other) == before
+    assert _counts(run, uid) == (0, 0)
+
+
+def test_demarrage_recompte_des_compteurs_partiels(run, managers):
+    _fan_out(run, min_role="manager", kind="loyer_retard", title="Loyers",
+             href="/immobilier/loyers")
+    perdu, garde = managers[0], managers[1]
+
+    async def _partiel():
+        # Compteurs non vides mais incomplets (écritures pendant la
+        # fenêtre de démarrage, avant tout recalcul).
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(NotificationCounter).where(NotificationCounter.user_id == perdu)
+            )
+            await s.commit()
+
+    run(_partiel())
+    assert _counts(run, perdu) == (0, 1) and _counts(run, garde) == (1, 1)
+    run(ensure_notification_tables())
+    assert _counts(run, perdu) == (1, 1) and _counts(run, garde) == (1, 1)
+
+
+def test_volet_comme_le_filtre_de_la_liste():
+    volet = notifications.notification_volet
+    assert volet("x", None) == notifications.NEUTRAL_VOLET
+    assert volet("x", "/autre") == notifications.NEUTRAL_VOLET
+    assert volet("x", "/m/punch") == "construction"
+    assert volet("nda.signed", None) == "prospection"
+    assert volet("nda.signed", "/prospection/nda/3") == "prospection"
+    assert volet("nda.signed", "/app/x") == notifications.NO_VOLET
+
+
+def test_notify_cle_inseree_par_un_autre_worker(run, managers):
+    """Un autre worker insère la même ``dedup_key`` juste avant l'écriture
+    de ``notify`` : ni ``IntegrityError`` ni transaction de
+    l'appelant annulée — la ligne existante est retournée."""
+    uid = managers[0]
+    engine = TestSessionLocal.kw["bind"].sync_engine
+    armed = {"on": True}
+
+    def _concurrent(conn, cursor, statement, params, context, many):
+        if not (armed["on"] and statement.lstrip().startswith(
+                "INSERT INTO notifications")):
+            return
+        armed["on"] = False
+        with engine.begin() as other:
+            other.execute(
+                insert(Notification).values(
+                    user_id=uid, kind="rdv", title="Rendez-vous",
+                    href="/immobilier/agenda", dedup_key="rdv:course",
+                    is_read=False,
+                )
+            )
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            row = await notifications.notify(
+                s, user_id=uid, kind="rdv", title="Rendez-vous",
+                href="/immobilier/agenda", push=False, dedup_key="rdv:course",
+            )
+            await notifications.notify(
+                s, user_id=uid, kind="autre", title="Autre", push=False,
+            )
+            await s.commit()
+            return row.id
+
+    event.listen(engine, "before_cursor_execute", _concurrent)
+    try:
+        nid = run(_go())
+    finally:
+        event.remove(engine, "before_cursor_execute", _concurrent)
+
+    async def _rows():
+        async with TestSessionLocal() as s:
+            return (
+                await s.execute(
+                    select(Notification.id, Notification.kind)
+                    .where(Notification.user_id == uid)
+                    .order_by(Notification.id)
+                )
+            ).all()
+
+    rows = run(_rows())
+    assert [k for _, k in rows] == ["rdv", "autre"]
+    assert rows[0][0] == nid
@@ -136,3 +136,29 @@ def test_lead_analysis_patch(client, auth_headers, seeded_analysis_id):
     body = patched.json()
     assert body["notes"] == "Note smoke"
     assert body["city"] == "Laval"
+
+
+def test_lead_analysis_sensitivity(client, auth_headers, seeded_analysis_id):
+    r = client.post(
+        f"/api/v1/lead-analyses/{seeded_analysis_id}/sensitivity",
+        headers=auth_headers,
+        json={
+            "prix_achat": [600000, 650000],
+            "tga_pct": [4, 5, 6],
+            "variation_loyers_pct": [-10, 0],
+        },
+    )
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["shape"] == [2, 1, 3, 2]
+    grid = body["grids"]["prix_acquisition"]
+    assert len(grid) == 2 and len(grid[0][0]) == 3
+    # Prix plus élevé → prix d'acquisition plus élevé, toutes cellules.
+    assert grid[1][0][0][0] > grid[0][0][0][0]
+
+    negatif = client.post(
+        f"/api/v1/lead-analyses/{seeded_analysis_id}/sensitivity",
+        headers=auth_headers,
+        json={"variation_loyers_pct": [-200]},
+    )
+    assert negatif.status_code == 400
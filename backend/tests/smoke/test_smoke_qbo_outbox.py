@@ -0,0 +1,197 @@
+"""Smoke — outbox QBO (écritures groupées, débit borné, état par entité).
+
+- ``QuickBooksClient.batch`` : 65 opérations = 3 appels ``/batch`` (30 +
+  30 + 5), réponses réalignées sur l'ordre demandé, faute isolée ;
+- ``memoized_reads`` : un GET identique ne part qu'une fois, une
+  écriture vide la mémo ;
+- 429 : le client attend ``Retry-After`` et rejoue ;
+- seau à jetons : au-delà de la rafale, les appels sont espacés ;
+- file : trois pushes de factures dus = UN appel groupé, l'échec d'une
+  facture ne fait échouer que son travail, l'état est gardé par entité.
+"""
+from __future__ import annotations
+
+import json
+import time
+
+import httpx
+import pytest
+from sqlalchemy import delete, select
+
+from app.integrations import quickbooks
+from app.integrations.quickbooks import (
+    QuickBooksClient,
+    batch_fault_message,
+    memoized_reads,
+)
+from app.models.background_job import BackgroundJob
+from app.models.qbo_sync_state import QboSyncState
+from app.services import job_queue, qbo_outbox
+from app.services.qbo_jobs import enqueue_facture_push
+
+from .conftest import TestSessionLocal
+
+
+class _FakeIntuit:
+    """Répond aux appels HTTP du client comme l'API v3 (strict minimum)."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+        self.throttle_next = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.rsplit("/", 1)[-1]
+        self.calls.append((request.method, path))
+        if self.throttle_next:
+            self.throttle_next -= 1
+            return httpx.Response(429, headers={"Retry-After": "0.01"})
+        if path == "batch":
+            items = json.loads(request.content)["BatchItemRequest"]
+            out = []
+            for item in reversed(items):  # ordre non garanti par Intuit
+                inv = item["Invoice"]
+                if inv.get("DocNumber") == "REFUS":
+                    out.append({
+                        "bId": item["bId"],
+                        "Fault": {"Error": [{"Message": "Invalid", "code": "2020"}]},
+                    })
+                else:
+                    out.append({
+                        "bId": item["bId"],
+                        "Invoice": {"Id": f"qb-{inv['DocNumber']}", **inv},
+                    })
+            return httpx.Response(200, json={"BatchItemResponse": out})
+        return httpx.Response(
+            200, json={"QueryResponse": {"Item": [{"Id": "1"}]}}
+        )
+
+
+@pytest.fixture
+def intuit(monkeypatch):
+    fake = _FakeIntuit()
+    real_client = httpx.AsyncClient
+
+    def _client(**kw):
+        return real_client(transport=httpx.MockTransport(fake), **kw)
+
+    monkeypatch.setattr(quickbooks.httpx, "AsyncClient", _client)
+    monkeypatch.setattr(quickbooks, "_buckets", {})
+    return fake
+
+
+def _qbo() -> QuickBooksClient:
+    qbo = QuickBooksClient()
+    qbo.realm_id = "realm-smoke"
+    qbo.tokens.access_token = "tok"
+    qbo.tokens.access_expires_at = time.time() + 3600
+    return qbo
+
+
+def test_batch_par_paquets_de_30(run, intuit):
+    ops = [
+        {
+            "operation": "create",
+            "entity": "Invoice",
+            "payload": {"DocNumber": "REFUS" if n == 40 else f"F{n}"},
+        }
+        for n in range(65)
+    ]
+    out = run(_qbo().batch(ops))
+    assert [c for c in intuit.calls] == [("POST", "batch")] * 3
+    assert len(out) == 65
+    assert out[0]["Invoice"]["Id"] == "qb-F0"
+    assert out[64]["Invoice"]["Id"] == "qb-F64"
+    assert batch_fault_message(out[40]) == "QBO refus : Invalid (2020)"
+    assert batch_fault_message(out[41]) is None
+
+
+def test_lectures_memoisees_et_429(run, intuit):
+    qbo = _qbo()
+
+    async def _go():
+        with memoized_reads():
+            a = await qbo.query("SELECT * FROM Item WHERE Name = 'X'")
+            a[0]["Id"] = "muté"  # la mémo rend une copie
+            b = await qbo.query("SELECT * FROM Item WHERE Name = 'X'")
+            await qbo.batch([
+                {"operation": "create", "entity": "Invoice",
+                 "payload": {"DocNumber": "F1"}},
+            ])
+            c = await qbo.query("SELECT * FROM Item WHERE Name = 'X'")
+        return b, c
+
+    intuit.throttle_next = 1
+    b, c = run(_go())
+    assert b == c == [{"Id": "1"}]
+    # 1 lecture (429 puis rejouée), l'écriture, puis relecture après MAJ.
+    assert intuit.calls == [
+        ("GET", "query"), ("GET", "query"), ("POST", "batch"), ("GET", "query"),
+    ]
+
+
+def test_seau_a_jetons_espace_les_appels(run):
+    bucket = quickbooks._TokenBucket(rate_per_minute=600, burst=2)
+
+    async def _go():
+        t0 = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        return time.monotonic() - t0
+
+    # 2 jetons d'avance, puis 10 / s → ~0,2 s pour les 2 suivants.
+    assert 0.15 <= run(_go()) < 1.0
+
+
+@pytest.fixture
+def clean_outbox(run, seeded_users):
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(BackgroundJob))
+            await s.execute(delete(QboSyncState))
+            await s.commit()
+
+    run(_purge())
+    yield
+    run(_purge())
+
+
+def test_file_pousse_les_factures_en_lot(run, clean_outbox, monkeypatch):
+    calls: list[list[int]] = []
+
+    async def _push(ids: list[int]) -> dict:
+        calls.append(list(ids))
+        outcomes = {i: {"qbo_invoice_id": f"qb-{i}"} for i in ids}
+        outcomes[102] = RuntimeError("QBO 503")
+        async with TestSessionLocal() as s:
+            await qbo_outbox.record_sync_states(s, "realm-smoke", "facture", outcomes)
+            await s.commit()
+        return outcomes
+
+    monkeypatch.setattr(qbo_outbox, "push_factures", _push)
+
+    async def _enqueue():
+        async with TestSessionLocal() as s:
+            for fid in (101, 102, 103, 101):
+                await enqueue_facture_push(s, fid)
+            await s.commit()
+
+    run(_enqueue())
+    assert run(job_queue.run_pending("qbo")) == 3
+    assert [sorted(c) for c in calls] == [[101, 102, 103]]
+
+    async def _load():
+        async with TestSessionLocal() as s:
+            jobs = (await s.execute(select(BackgroundJob))).scalars().all()
+            states = (await s.execute(select(QboSyncState))).scalars().all()
+            return (
+                {json.loads(j.payload_json)["facture_id"]: j.status for j in jobs},
+                {st.entity_id: (st.status, st.qbo_id) for st in states},
+            )
+
+    jobs, states = run(_load())
+    assert jobs == {101: "done", 102: "pending", 103: "done"}
+    assert states == {
+        "101": ("ok", "qb-101"),
+        "102": ("error", None),
+        "103": ("ok", "qb-103"),
+    }
@@ -0,0 +1,206 @@
+"""Smoke — lookup REQ tolérant (noms et adresses de siège).
+
+Jeu de corporations avec des voisins piégeux (même rue, civique
+inversé ; même adresse, autre ville ; noms proches), adresses
+normalisées par ``backfill_normalized`` comme sur une base importée
+avant la colonne. Chaque saisie bruitée (fautes, « St- » / « Saint »,
+« boul. » / « Blvd », unité, ordre anglais) doit remonter la bonne
+corporation en tête — score SQLite = score ``pg_trgm``.
+
+Le démarrage ne normalise plus lui-même : il met
+``req.backfill_normalized`` en file (un seul en attente), que le worker
+exécute ensuite.
+"""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import delete, select
+
+from app.db.session import ensure_req_search_indexes
+from app.integrations.req import companies
+from app.integrations.req.matching import normalize_address, trigram_similarity
+from app.models.background_job import BackgroundJob
+from app.models.req_company import ReqCompany
+from app.services import job_queue
+
+from .conftest import TestSessionLocal
+
+CORPS = {
+    "9900000001": ("Gestion Immobilière St-Denis Inc.", "4520, boulevard Saint-Laurent", "Montréal"),
+    "9900000002": ("9123-4567 Québec inc.", "201-1234 rue Sainte-Catherine Ouest", "Montréal"),
+    "9900000003": ("Les Immeubles Beaubien Ltée", "6500 rue Saint-Hubert", "Montréal"),
+    "9900000004": ("Placements Laurentides S.E.N.C.", "4250 boulevard Saint-Laurent", "Montréal"),
+    "9900000005": ("Gestion Saint-Denis Construction", "800 rue Sherbrooke Est", "Montréal"),
+    "9900000006": ("Habitations du Plateau", "55 rue Rachel Est", "Montréal"),
+    "9900000007": ("Investissements Côte-des-Neiges", "5800 chemin de la Côte-des-Neiges", "Montréal"),
+    "9900000008": ("Immeubles Rachel", "55 rue Rachel Est", "Longueuil"),
+    "9900000009": ("Les Entreprises Jean-Talon", "12, 1re Avenue", "Laval"),
+}
+
+NAMES = [
+    ("gestion immobiliere saint denis", "9900000001"),
+    ("Gestion Immobillière St Denis", "9900000001"),
+    ("9123 4567 Quebec", "9900000002"),
+    ("Immeubles Beaubein", "9900000003"),
+    ("Investisements Cote des Neige", "9900000007"),
+    ("Placement Laurentide senc", "9900000004"),
+    ("Gestion St-Denis Constructions Inc", "9900000005"),
+]
+
+ADDRESSES = [
+    ("4520 St-Laurent Blvd", None, "9900000001"),
+    ("4250 boul. St Laurent, bureau 300", "Montréal", "9900000004"),
+    ("1234 Ste-Catherine O., app. 201", "Mtl", "9900000002"),
+    ("#12-6500 rue St-Hubert", None, "9900000003"),
+    ("55 Rachel E", "Montreal (QC)", "9900000006"),
+    ("55 rue Rachel est", "Longueuil", "9900000008"),
+    ("5800 ch. Cote-des-Neiges", None, "9900000007"),
+    ("12 1ère av", "Laval", "9900000009"),
+]
+
+
+@pytest.fixture(scope="module")
+def req_rows(run, db_setup):
+    async def _seed():
+        async with TestSessionLocal() as s:
+            for neq, (nom, adresse, ville) in CORPS.items():
+                s.add(
+                    ReqCompany(
+                        neq=neq, nom=nom, adresse=adresse, ville=ville, statut="Immatriculée"
+                    )
+                )
+            await s.commit()
+            return await companies.backfill_normalized(s, batch_size=4)
+
+    assert run(_seed()) >= len(CORPS)
+    yield
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(delete(ReqCompany).where(ReqCompany.neq.in_(list(CORPS))))
+            await s.commit()
+
+    run(_purge())
+
+
+def _top(run, coro_factory):
+    async def _go():
+        async with TestSessionLocal() as s:
+            return await coro_factory(s)
+
+    return run(_go())
+
+
+@pytest.mark.parametrize("name,neq", NAMES)
+def test_nom_bruite_top1(run, req_rows, name, neq):
+    matches = _top(run, lambda s: companies.search_by_name(s, name))
+    assert matches and matches[0].company.neq == neq, [
+        (m.company.nom, round(m.score, 3)) for m in matches
+    ]
+    scores = [m.score for m in matches]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.parametrize("address,city,neq", ADDRESSES)
+def test_adresse_bruitee_top1(run, req_rows, address, city, neq):
+    matches = _top(run, lambda s: companies.search_by_address(s, address, city))
+    assert matches and matches[0].company.neq == neq, [
+        (m.company.adresse, m.company.ville, round(m.score, 3)) for m in matches
+    ]
+    assert all(m.score >= companies.DEFAULT_MIN_SCORE for m in matches)
+    # Civique différent (4520 / 4250) : jamais candidat.
+    civic = normalize_address(address).split()[0]
+    assert {m.company.adresse_normalized.split()[0] for m in matches} == {civic}
+
+
+def test_sans_correspondance_et_api_historique(run, req_rows):
+    assert _top(run, lambda s: companies.search_by_address(s, "9999 rue Inexistante", None)) == []
+    assert _top(run, lambda s: companies.search_by_name(s, "zzz qqq")) == []
+    # Seuil relevé : la saisie approximative ne passe plus.
+    assert _top(
+        run,
+        lambda s: companies.search_by_name(s, "Immeubles Beaubein", min_score=0.9),
+    ) == []
+    # API historique : ReqCompany, meilleure en tête ; sous-chaîne exacte
+    # toujours trouvée même sous le seuil.
+    rows = _top(run, lambda s: companies.lookup_by_address(s, "4520 boul St-Laurent", "Montréal"))
+    assert [r.neq for r in rows] == ["9900000001"]
+    rows = _top(run, lambda s: companies.lookup_by_name(s, "Beaubien", limit=3))
+    assert rows[0].neq == "9900000003"
+
+
+def test_normalisation_et_score_pg_trgm(run, req_rows):
+    assert normalize_address("201-4520 Boul. St-Laurent O.") == "4520 boul saint laurent ouest"
+    assert normalize_address("4520 St Laurent Blvd W, suite 3") == "4520 boul saint laurent ouest"
+    assert normalize_address("123 Main St") == "123 rue main"
+    # Valeurs de référence de la documentation pg_trgm.
+    assert round(trigram_similarity("word", "two words"), 6) == 0.363636
+    assert trigram_similarity("", "abc") == 0.0
+
+    async def _stored():
+        async with TestSessionLocal() as s:
+            return dict(
+                (
+                    await s.execute(
+                        select(ReqCompany.neq, ReqCompany.adresse_normalized).where(
+                            ReqCompany.neq.in_(["9900000002", "9900000009"])
+                        )
+                    )
+                ).all()
+            )
+
+    assert run(_stored()) == {
+        "9900000002": "1234 rue sainte catherine ouest",
+        "9900000009": "12 av 1e",
+    }
+
+
+def test_backfill_mis_en_file_au_demarrage(run, req_rows):
+    neqs = ["9900000101", "9900000102", "9900000103"]
+
+    async def _go():
+        async with TestSessionLocal() as s:
+            s.add_all(
+                ReqCompany(neq=neq, nom=f"Importée {neq}", adresse="10 St-Denis E")
+                for neq in neqs
+            )
+            await s.commit()
+        # Deux workers qui démarrent : un seul travail en attente, et
+        # rien n'est normalisé dans la chaîne de démarrage.
+        await ensure_req_search_indexes()
+        await ensure_req_search_indexes()
+        async with TestSessionLocal() as s:
+            jobs = (
+                await s.execute(
+                    select(BackgroundJob.status).where(
+                        BackgroundJob.kind == companies.BACKFILL_JOB
+                    )
+                )
+            ).scalars().all()
+            pending = (
+                await s.execute(
+                    select(ReqCompany.neq).where(
+                        ReqCompany.neq.in_(neqs),
+                        ReqCompany.adresse_normalized.is_(None),
+                    )
+                )
+            ).scalars().all()
+        await job_queue.run_pending("default")
+        async with TestSessionLocal() as s:
+            stored = set(
+                (
+                    await s.execute(
+                        select(ReqCompany.adresse_normalized).where(
+                            ReqCompany.neq.in_(neqs)
+                        )
+                    )
+                ).scalars()
+            )
+            await s.execute(delete(ReqCompany).where(ReqCompany.neq.in_(neqs)))
+            await s.execute(
+                delete(BackgroundJob).where(BackgroundJob.kind == companies.BACKFILL_JOB)
+            )
+            await s.commit()
+        return jobs, len(pending), stored
+
+    assert run(_go()) == (["pending"], 3, {normalize_address("10 St-Denis E")})
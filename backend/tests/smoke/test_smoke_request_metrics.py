@@ -0,0 +1,67 @@
+"""Smoke — instrumentation des requêtes (core/request_metrics).
+
+- chaque réponse porte ``Server-Timing`` (hors production) avec le
+  nombre et la durée des requêtes SQL ;
+- ``/admin/metrics/requests`` expose les histogrammes par gabarit de
+  route (admin seulement) ;
+- une même forme de requête répétée est signalée comme N+1, quelles
+  que soient les valeurs ou la taille des listes ``IN``.
+"""
+from __future__ import annotations
+
+from sqlalchemy import select
+
+from app.core import request_metrics
+from app.models.user import User
+
+from .conftest import TestSessionLocal
+
+OVERVIEW = "/api/v1/immobilier/renouvellements/overview"
+
+
+def test_server_timing_et_histogrammes(client, auth_headers, employee_headers):
+    client.delete("/api/v1/admin/metrics/requests", headers=auth_headers)
+    resp = client.get(OVERVIEW, headers=auth_headers)
+    assert resp.status_code == 200, resp.text
+    timing = resp.headers["server-timing"]
+    assert timing.startswith("db;dur=") and "queries" in timing and "app;dur=" in timing
+
+    resp = client.get("/api/v1/admin/metrics/requests", headers=auth_headers)
+    assert resp.status_code == 200, resp.text
+    routes = resp.json()["routes"]
+    entry = routes[f"GET {OVERVIEW}"]
+    assert entry["count"] == 1
+    assert entry["queries"]["max"] >= 1
+    assert sum(entry["latency_ms"]["buckets"].values()) == 1
+    # Gabarit de route, jamais l'URL brute.
+    assert not any("?" in r for r in routes)
+
+    denied = client.get("/api/v1/admin/metrics/requests", headers=employee_headers)
+    assert denied.status_code == 403
+
+
+def test_detection_n_plus_un(run, admin_id):
+    shape = request_metrics.statement_shape
+    assert shape("SELECT a FROM t WHERE id IN (?, ?, ?)") == shape(
+        "SELECT a FROM t  WHERE id IN (?)"
+    )
+    assert shape("SELECT a FROM t1 LIMIT 5") == "SELECT a FROM t1 LIMIT ?"
+
+    async def _n_plus_one():
+        async with TestSessionLocal() as s:
+            for _ in range(12):
+                s.expunge_all()
+                await s.execute(select(User).where(User.id == admin_id))
+
+    with request_metrics.track() as outer:
+        with request_metrics.track() as stats:
+            run(_n_plus_one())
+    assert stats.queries == outer.queries == 12
+    [(_, n)] = stats.repeated(10)
+
+    request_metrics.reset()
+    request_metrics.observe("GET /test", stats, 3.0)
+    entry = request_metrics.snapshot()["GET /test"]
+    assert n == 12
+    assert entry["n_plus_one"] == 1
+    assert entry["worst_repeat"]["count"] == 12
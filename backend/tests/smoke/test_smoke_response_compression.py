@@ -0,0 +1,221 @@
+"""Smoke — couche de réponse : compression négociée, orjson, flux.
+
+- ``/prospection/mtl-properties`` (600 unités, page de 1000) : réponse en
+  flux compressée en gzip ; le JSON décodé est identique à la version
+  non compressée, et à la réponse typée d'une petite page ;
+- ``/immobilier/loyers/overview`` et ``/activity/entities/deals`` : même
+  contenu avec ou sans ``Accept-Encoding``, compressé au-delà du seuil ;
+- en flux, chaque morceau compressé est décodable dès réception (vidage
+  ``Z_SYNC_FLUSH``) ; ``text/event-stream`` n'est jamais compressé ;
+- ``FastJSONResponse`` encode ``Decimal`` / dates / ``UUID`` / ``Enum``
+  comme ``jsonable_encoder``.
+"""
+from __future__ import annotations
+
+import asyncio
+import enum
+import json
+import uuid
+import zlib
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete
+
+from app.api.v1.endpoints import mtl_properties
+from app.core import compression
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.models.montreal_property_unit import MontrealPropertyUnit
+
+from .conftest import TestSessionLocal
+
+VILLE = "Smokeville-Compression"
+UNITS = 600
+PROPS = "/api/v1/prospection/mtl-properties"
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def units(run, db_setup):
+    async def _seed():
+        async with TestSessionLocal() as s:
+            for n in range(UNITS):
+                s.add(
+                    MontrealPropertyUnit(
+                        matricule=f"SMKCMP{n:05d}",
+                        civique_debut=str(100 + n),
+                        nom_rue="rue Saint-Denis",
+                        municipalite=VILLE,
+                        nombre_logement=n % 24 + 1,
+                        annee_construction=1900 + n % 120,
+                        code_utilisation="1000",
+                        libelle_utilisation="Logement",
+                        categorie_uef="Régulier",
+                        superficie_terrain=250.0 + n,
+                        superficie_batiment=180.5,
+                        owners_json=json.dumps(
+                            [
+                                {
+                                    "name": f"Gestion {n} inc.",
+                                    "inscription_date": "2019-06-01",
+                                }
+                            ]
+                        )
+                        if n % 3 == 0
+                        else None,
+                    )
+                )
+            await s.commit()
+
+    run(_seed())
+    yield
+
+    async def _purge():
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(MontrealPropertyUnit).where(
+                    MontrealPropertyUnit.municipalite == VILLE
+                )
+            )
+            await s.commit()
+
+    run(_purge())
+
+
+def _both(client, url, headers, **kw):
+    plain = client.get(url, headers={**headers, **IDENTITY}, **kw)
+    packed = client.get(url, headers={**headers, **GZIP}, **kw)
+    assert plain.status_code == packed.status_code == 200, packed.text
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == packed.json()
+    return plain, packed
+
+
+def test_liste_mtl_en_flux_compressee(client, auth_headers, units):
+    params = {"municipalite": VILLE, "limit": 1000, "sort_by": "matricule_asc"}
+    plain, packed = _both(client, PROPS, auth_headers, params=params)
+    body = packed.json()
+    assert body["total"] == UNITS
+    assert len(body["properties"]) == UNITS >= mtl_properties.STREAM_MIN_ITEMS
+    assert body["properties"][0]["owner_names"] == ["Gestion 0 inc."]
+    assert body["properties"][1]["owner_names"] is None
+
+    assert packed.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in packed.headers["vary"].lower()
+    raw = len(plain.content)
+    sent = packed.num_bytes_downloaded
+    assert sent * 5 < raw, (sent, raw)
+
+    # Page sous le seuil de flux : réponse typée, même JSON élément par
+    # élément.
+    small = client.get(
+        PROPS, headers=auth_headers, params={**params, "limit": 50}
+    ).json()
+    assert small["total"] == UNITS
+    assert small["properties"] == body["properties"][:50]
+
+
+@pytest.mark.parametrize(
+    "url,headers",
+    [
+        ("/api/v1/immobilier/loyers/overview", "auth_headers"),
+        ("/api/v1/activity/entities/deals", "api_key_headers"),
+    ],
+)
+def test_meme_contenu_avec_ou_sans_compression(client, request, url, headers):
+    auth = request.getfixturevalue(headers)
+    if "activity" in url:
+        client.post(
+            "/api/v1/prospection/deals",
+            headers=request.getfixturevalue("auth_headers"),
+            json={"address": "12 rue de la Compression"},
+        )
+    plain, packed = _both(client, url, auth)
+    if len(plain.content) >= settings.response_compression_min_bytes:
+        assert packed.headers["content-encoding"] == "gzip"
+        assert packed.num_bytes_downloaded < len(plain.content)
+        assert "accept-encoding" in plain.headers["vary"].lower()
+    else:
+        assert "content-encoding" not in packed.headers
+
+
+def test_negociation_accept_encoding():
+    best = "br" if compression.brotli is not None else "gzip"
+    assert compression.negotiate("gzip, deflate, br") == best
+    assert compression.negotiate("gzip;q=0.5, br;q=0") == "gzip"
+    assert compression.negotiate("*;q=0.2") == best
+    assert compression.negotiate("gzip;q=0, identity") is None
+    assert compression.negotiate("deflate") is None
+
+
+def test_fast_json_comme_jsonable_encoder():
+    class Statut(enum.Enum):
+        ACTIF = "actif"
+
+    payload = {
+        "montant": Decimal("1250.75"),
+        "entier": Decimal("3"),
+        "jour": date(2026, 7, 1),
+        "quand": datetime(2026, 7, 1, 9, 30, 15, 250, tzinfo=timezone.utc),
+        "naif": datetime(2026, 7, 1, 9, 30),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "statut": Statut.ACTIF,
+        "tags": ("a", "b"),
+        7: None,
+    }
+    body = FastJSONResponse(payload).body
+    legacy = json.dumps(jsonable_encoder(payload))  # JSONResponse d'origine
+    assert json.loads(body) == json.loads(legacy)
+
+
+def _stream(ctype: bytes, chunks: list[bytes]) -> list[dict]:
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", ctype)],
+            }
+        )
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent: list[dict] = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    mw = compression.CompressionMiddleware(app, minimum_size=0)
+    asyncio.run(mw(scope, None, send))
+    return sent
+
+
+def test_flux_vide_chaque_morceau():
+    chunks = [b'{"ligne": %d}\n' % n for n in range(5)]
+    start, *bodies = _stream(b"application/json", chunks)
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    # Chaque petit morceau part aussitôt, complet, sans attendre la fin.
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk, message in zip(chunks, bodies):
+        assert message["more_body"] is True
+        assert inflate.decompress(message["body"]) == chunk
+    assert bodies[-1]["more_body"] is False
+    inflate.decompress(bodies[-1]["body"])
+    assert inflate.eof
+
+
+def test_sse_jamais_compresse():
+    chunks = [b"data: %d\n\n" % n * 200 for n in range(3)]
+    start, *bodies = _stream(b"text/event-stream", chunks)
+    assert all(k != b"content-encoding" for k, _ in start["headers"])
+    assert [m["body"] for m in bodies] == chunks + [b""]
@@ -0,0 +1,203 @@
+"""Smoke — livre des soldes Feuille de temps (``timesheet_balances``).
+
+Parcours complet via l'API (grille, approbation, règlement, taux
+employé × compagnie, correction d'une feuille approuvée, réouverture) :
+après chaque étape le livre égale le recalcul complet
+(``check_balances``), et le dashboard ne relit plus ni les entrées ni
+les feuilles approuvées. Un livre partiel (écritures servies pendant le
+démarrage) est complété au démarrage, et le cron de réconciliation
+corrige un écart injecté en SQL.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, event, update
+
+from app.db.session import engine as app_engine
+from app.db.session import ensure_timesheet_tables
+from app.jobs import timesheet_ledger_reconcile
+from app.models.timesheet import (
+    Timesheet,
+    TimesheetBalance,
+    TimesheetEntry,
+    TimesheetReglement,
+    TimesheetUserRate,
+)
+from app.services import timesheet_ledger
+
+from .conftest import TestSessionLocal
+
+
+@pytest.fixture
+def clean_ledger(run, seeded_users):
+    async def _purge():
+        async with TestSessionLocal() as s:
+            for model in (
+                TimesheetEntry,
+                TimesheetReglement,
+                TimesheetUserRate,
+                TimesheetBalance,
+                Timesheet,
+            ):
+                await s.execute(delete(model))
+            await s.commit()
+
+    run(_purge())
+    yield
+    run(_purge())
+
+
+def _check(run) -> list:
+    async def _go():
+        async with TestSessionLocal() as s:
+            return await timesheet_ledger.check_balances(s)
+
+    return run(_go())
+
+
+def _employee(dashboard: dict, user_id: int) -> dict:
+    return next(e for e in dashboard["employees"] if e["user_id"] == user_id)
+
+
+def test_livre_suit_les_ecritures(
+    run, client, auth_headers, employee_id, clean_ledger
+):
+    companies = client.get(
+        "/api/v1/timesheets/companies", headers=auth_headers
+    ).json()
+    c1, c2 = companies[0]["id"], companies[2]["id"]
+    ts = client.get(
+        "/api/v1/timesheets/resolve",
+        params={"user_id": employee_id, "period_start": date(2026, 6, 1)},
+        headers=auth_headers,
+    ).json()
+    base = f"/api/v1/timesheets/{ts['id']}"
+    grid = {
+        "entries": [
+            {"company_id": c1, "day_index": 0, "hours": 4},
+            {"company_id": c1, "day_index": 1, "hours": 3},
+            {"company_id": c2, "day_index": 0, "hours": 2},
+        ]
+    }
+    assert client.put(f"{base}/entries", json=grid, headers=auth_headers).status_code == 200
+    # Brouillon : rien au livre.
+    dash = client.get("/api/v1/timesheets/dashboard", headers=auth_headers).json()
+    assert all(e["user_id"] != employee_id for e in dash["employees"])
+
+    client.post(f"{base}/approve", headers=auth_headers)
+    emp = _employee(
+        client.get("/api/v1/timesheets/dashboard", headers=auth_headers).json(),
+        employee_id,
+    )
+    assert emp["total_heures"] == 9
+    assert emp["paie_due"] == 9 * ts["taux_horaire"]
+    assert emp["refac_due"] == 9 * ts["taux_refacturation"]
+    assert _check(run) == []
+
+    r = client.post(
+        "/api/v1/timesheets/reglements",
+        json={"kind": "refacturation", "user_id": employee_id,
+              "company_id": c1, "montant": 50},
+        headers=auth_headers,
+    ).json()
+    client.patch(
+        f"/api/v1/timesheets/reglements/{r['id']}",
+        json={"montant": 60}, headers=auth_headers,
+    )
+    client.post(
+        "/api/v1/timesheets/reglements",
+        json={"kind": "paie", "user_id": employee_id, "montant": 20},
+        headers=auth_headers,
+    )
+    client.post(
+        "/api/v1/timesheets/user-rates",
+        json={"user_id": employee_id, "company_id": c2,
+              "taux_refacturation": 40},
+        headers=auth_headers,
+    )
+    # Correction d'une feuille APPROUVÉE par un gestionnaire.
+    grid["entries"][1]["hours"] = 5
+    client.put(f"{base}/entries", json=grid, headers=auth_headers)
+    assert _check(run) == []
+
+    statements: list[str] = []
+
+    def _on(conn, cursor, statement, *a):
+        statements.append(statement)
+
+    event.listen(app_engine.sync_engine, "before_cursor_execute", _on)
+    try:
+        dash = client.get(
+            "/api/v1/timesheets/dashboard", headers=auth_headers
+        ).json()
+    finally:
+        event.remove(app_engine.sync_engine, "before_cursor_execute", _on)
+    assert not [s for s in statements if "FROM timesheet_entries" in s]
+    emp = _employee(dash, employee_id)
+    rows = {row["company_id"]: row for row in emp["companies"]}
+    assert emp["total_heures"] == 11
+    assert rows[c1]["due"] == 9 * ts["taux_refacturation"]
+    assert rows[c1]["regle"] == 60
+    assert rows[c2]["due"] == 2 * 40
+    assert emp["paie_reglee"] == 20
+
+    # Réouverture : les dûs sortent, les règlements restent.
+    client.post(f"{base}/reopen", headers=auth_headers)
+    emp = _employee(
+        client.get("/api/v1/timesheets/dashboard", headers=auth_headers).json(),
+        employee_id,
+    )
+    assert (emp["total_heures"], emp["paie_due"], emp["refac_due"]) == (0, 0, 0)
+    assert emp["paie_solde"] == -20
+    assert _check(run) == []
+
+
+def test_demarrage_et_cron_reconcilient_le_livre(
+    run, client, auth_headers, employee_id, clean_ledger
+):
+    companies = client.get(
+        "/api/v1/timesheets/companies", headers=auth_headers
+    ).json()
+    c1 = companies[0]["id"]
+    ts = client.get(
+        "/api/v1/timesheets/resolve",
+        params={"user_id": employee_id, "period_start": date(2026, 6, 8)},
+        headers=auth_headers,
+    ).json()
+    base = f"/api/v1/timesheets/{ts['id']}"
+    grid = {"entries": [{"company_id": c1, "day_index": 0, "hours": 6}]}
+    client.put(f"{base}/entries", json=grid, headers=auth_headers)
+    client.post(f"{base}/approve", headers=auth_headers)
+    client.post(
+        "/api/v1/timesheets/reglements",
+        json={"kind": "paie", "user_id": employee_id, "montant": 30},
+        headers=auth_headers,
+    )
+    assert _check(run) == []
+
+    async def _partiel():
+        # Historique présent, livre non vide mais incomplet : seule la
+        # ligne des règlements a été écrite pendant le démarrage.
+        async with TestSessionLocal() as s:
+            await s.execute(
+                delete(TimesheetBalance).where(TimesheetBalance.company_id == c1)
+            )
+            await s.commit()
+
+    run(_partiel())
+    assert _check(run) != []
+    run(ensure_timesheet_tables())
+    assert _check(run) == []
+
+    async def _corrompt():
+        async with TestSessionLocal() as s:
+            await s.execute(update(TimesheetBalance).values(paie_reglee=1.0))
+            await s.commit()
+
+    run(_corrompt())
+    report = run(timesheet_ledger_reconcile._run())
+    assert report["ecarts"] > 0
+    assert report["employes_reecrits"] == [employee_id]
+    assert _check(run) == []